@@ -0,0 +1,66 @@
+"""Add report_jobs table
+
+Revision ID: 20251228_add_report_jobs
+Revises: 20251224_rename_unified_contact_to_contact
+Create Date: 2025-12-28
+
+Creates the report_jobs table for background accounting/tax report jobs
+with content-hash deduplication and compressed result storage.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20251228_add_report_jobs"
+down_revision: Union[str, None] = "20251224_rename_unified_contact_to_contact"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('report_type', sa.String(length=100), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('params_hash', sa.String(length=64), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='reportjobstatus'),
+            nullable=False,
+        ),
+        sa.Column('progress_percent', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('progress_message', sa.String(length=255), nullable=True),
+        sa.Column('task_id', sa.String(length=255), nullable=True),
+        sa.Column('result_data', sa.LargeBinary(), nullable=True),
+        sa.Column('result_path', sa.String(length=500), nullable=True),
+        sa.Column('result_size', sa.Integer(), nullable=True),
+        sa.Column('result_compressed_size', sa.Integer(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_report_jobs_id'), 'report_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_report_jobs_report_type'), 'report_jobs', ['report_type'], unique=False)
+    op.create_index(op.f('ix_report_jobs_params_hash'), 'report_jobs', ['params_hash'], unique=False)
+    op.create_index(op.f('ix_report_jobs_status'), 'report_jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_report_jobs_expires_at'), 'report_jobs', ['expires_at'], unique=False)
+    op.create_index('ix_report_jobs_hash_status', 'report_jobs', ['params_hash', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_jobs_hash_status', table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_expires_at'), table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_status'), table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_params_hash'), table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_report_type'), table_name='report_jobs')
+    op.drop_index(op.f('ix_report_jobs_id'), table_name='report_jobs')
+    op.drop_table('report_jobs')
+    op.execute("DROP TYPE IF EXISTS reportjobstatus")
@@ -0,0 +1,98 @@
+"""add search indexes
+
+Revision ID: 20251229_add_search_indexes
+Revises: 20251228_add_report_jobs
+Create Date: 2025-12-29
+
+Index-backed search for the Data Explorer global search and the knowledge base
+(see app/services/search_service.py):
+- pg_trgm GIN indexes for substring search on customers, invoices, employees
+  and pops
+- kb_articles.search_vector: weighted tsvector (title A, keywords B, content C)
+  maintained by a trigger, replacing the unweighted expression index
+
+Postgres only; SQLite uses FTS5 tables created at startup.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "20251229_add_search_indexes"
+down_revision: Union[str, None] = "20251228_add_report_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGRAM_INDEXES = [
+    ("ix_customers_name_trgm", "customers", "name"),
+    ("ix_customers_email_trgm", "customers", "email"),
+    ("ix_customers_phone_trgm", "customers", "phone"),
+    ("ix_customers_account_number_trgm", "customers", "account_number"),
+    ("ix_invoices_invoice_number_trgm", "invoices", "invoice_number"),
+    ("ix_employees_name_trgm", "employees", "name"),
+    ("ix_employees_email_trgm", "employees", "email"),
+    ("ix_pops_name_trgm", "pops", "name"),
+    ("ix_pops_code_trgm", "pops", "code"),
+    ("ix_kb_articles_title_trgm", "kb_articles", "title"),
+]
+
+KB_SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce({p}title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({p}search_keywords, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce({p}content, '')), 'C')
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # KB tsvector column, trigger and backfill
+    op.execute("ALTER TABLE kb_articles ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION kb_articles_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {KB_SEARCH_VECTOR.format(p="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS kb_articles_search_vector_trg ON kb_articles")
+    op.execute("""
+        CREATE TRIGGER kb_articles_search_vector_trg
+        BEFORE INSERT OR UPDATE OF title, search_keywords, content ON kb_articles
+        FOR EACH ROW EXECUTE FUNCTION kb_articles_search_vector_update()
+    """)
+    op.execute(f"UPDATE kb_articles SET search_vector = {KB_SEARCH_VECTOR.format(p='')}")
+
+    # Must run outside transaction for CONCURRENTLY
+    with op.get_context().autocommit_block():
+        for name, table, column in TRIGRAM_INDEXES:
+            op.execute(f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}
+                ON {table} USING gin ({column} gin_trgm_ops)
+            """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_kb_articles_search_vector
+            ON kb_articles USING gin (search_vector)
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_kb_articles_fulltext")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_kb_articles_fulltext ON kb_articles
+        USING gin(to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, '') || ' ' || coalesce(search_keywords, '')))
+    """)
+    op.execute("DROP INDEX IF EXISTS ix_kb_articles_search_vector")
+    for name, _table, _column in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    op.execute("DROP TRIGGER IF EXISTS kb_articles_search_vector_trg ON kb_articles")
+    op.execute("DROP FUNCTION IF EXISTS kb_articles_search_vector_update()")
+    op.execute("ALTER TABLE kb_articles DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,91 @@
+"""Add stock valuation state and snapshot tables
+
+Revision ID: 20251230_add_stock_valuation
+Revises: 20251229_add_search_indexes
+Create Date: 2025-12-30
+
+Creates stock_valuation_states (current FIFO/LIFO cost layers and moving
+average per item/warehouse, maintained from stock ledger entries) and
+stock_valuation_snapshots (end-of-day copies used for as-of valuation),
+plus a partial index on cancelled stock ledger entries so each sync can
+find entries cancelled after they were applied.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20251230_add_stock_valuation"
+down_revision: Union[str, None] = "20251229_add_search_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _valuation_columns() -> list:
+    return [
+        sa.Column('qty', sa.Numeric(precision=18, scale=6), nullable=False, server_default='0'),
+        sa.Column('moving_average_rate', sa.Numeric(precision=18, scale=6), nullable=False, server_default='0'),
+        sa.Column('fifo_value', sa.Numeric(precision=18, scale=6), nullable=False, server_default='0'),
+        sa.Column('lifo_value', sa.Numeric(precision=18, scale=6), nullable=False, server_default='0'),
+        sa.Column('fifo_layers', sa.JSON(), nullable=True),
+        sa.Column('lifo_layers', sa.JSON(), nullable=True),
+        sa.Column('last_sle_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_posting_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_valuation_states',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_code', sa.String(length=255), nullable=False),
+        sa.Column('warehouse', sa.String(length=255), nullable=False),
+        *_valuation_columns(),
+        sa.Column('cancelled_sle_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('item_code', 'warehouse', name='uq_stock_valuation_state_item_wh'),
+    )
+    op.create_index(op.f('ix_stock_valuation_states_id'), 'stock_valuation_states', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_valuation_states_item_code'), 'stock_valuation_states', ['item_code'], unique=False)
+    op.create_index(op.f('ix_stock_valuation_states_warehouse'), 'stock_valuation_states', ['warehouse'], unique=False)
+    op.create_index(op.f('ix_stock_valuation_states_last_sle_id'), 'stock_valuation_states', ['last_sle_id'], unique=False)
+
+    op.create_table(
+        'stock_valuation_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_code', sa.String(length=255), nullable=False),
+        sa.Column('warehouse', sa.String(length=255), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        *_valuation_columns(),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('item_code', 'warehouse', 'snapshot_date', name='uq_stock_valuation_snapshot'),
+    )
+    op.create_index(op.f('ix_stock_valuation_snapshots_id'), 'stock_valuation_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_stock_valuation_snapshots_item_code'), 'stock_valuation_snapshots', ['item_code'], unique=False)
+    op.create_index(
+        op.f('ix_stock_valuation_snapshots_snapshot_date'), 'stock_valuation_snapshots', ['snapshot_date'], unique=False
+    )
+
+    op.create_index(
+        'ix_stock_ledger_entries_cancelled_item_wh',
+        'stock_ledger_entries',
+        ['item_code', 'warehouse'],
+        unique=False,
+        postgresql_where=sa.text("is_cancelled = true"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_ledger_entries_cancelled_item_wh', table_name='stock_ledger_entries')
+    op.drop_index(op.f('ix_stock_valuation_snapshots_snapshot_date'), table_name='stock_valuation_snapshots')
+    op.drop_index(op.f('ix_stock_valuation_snapshots_item_code'), table_name='stock_valuation_snapshots')
+    op.drop_index(op.f('ix_stock_valuation_snapshots_id'), table_name='stock_valuation_snapshots')
+    op.drop_table('stock_valuation_snapshots')
+    op.drop_index(op.f('ix_stock_valuation_states_last_sle_id'), table_name='stock_valuation_states')
+    op.drop_index(op.f('ix_stock_valuation_states_warehouse'), table_name='stock_valuation_states')
+    op.drop_index(op.f('ix_stock_valuation_states_item_code'), table_name='stock_valuation_states')
+    op.drop_index(op.f('ix_stock_valuation_states_id'), table_name='stock_valuation_states')
+    op.drop_table('stock_valuation_states')
@@ -0,0 +1,53 @@
+"""Add agent open-ticket workload counters
+
+Revision ID: 20251231_add_agent_workloads
+Revises: 20251230_add_stock_valuation
+Create Date: 2025-12-31
+
+Creates agent_workloads (open-ticket count per assignee, maintained when
+tickets are flushed) and backfills it from the tickets table.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20251231_add_agent_workloads"
+down_revision: Union[str, None] = "20251230_add_stock_valuation"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'agent_workloads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('assignee', sa.String(length=255), nullable=False),
+        sa.Column('open_tickets', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_agent_workloads_id'), 'agent_workloads', ['id'], unique=False)
+    op.create_index(op.f('ix_agent_workloads_assignee'), 'agent_workloads', ['assignee'], unique=True)
+    op.create_index(op.f('ix_agent_workloads_open_tickets'), 'agent_workloads', ['open_tickets'], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO agent_workloads (assignee, open_tickets, updated_at)
+        SELECT assigned_to, COUNT(*), CURRENT_TIMESTAMP
+        FROM tickets
+        WHERE assigned_to IS NOT NULL
+          AND assigned_to <> ''
+          AND status IN ('OPEN', 'REPLIED', 'ON_HOLD')
+          AND is_deleted = false
+        GROUP BY assigned_to
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_agent_workloads_open_tickets'), table_name='agent_workloads')
+    op.drop_index(op.f('ix_agent_workloads_assignee'), table_name='agent_workloads')
+    op.drop_index(op.f('ix_agent_workloads_id'), table_name='agent_workloads')
+    op.drop_table('agent_workloads')
@@ -0,0 +1,91 @@
+"""Add approver assignments for the pending-approvals inbox
+
+Revision ID: 20260101_add_approval_assignments
+Revises: 20251231_add_agent_workloads
+Create Date: 2026-01-01
+
+Creates approval_assignments (who can act on each pending document at its
+current step, maintained by the approval engine) and backfills it from the
+pending document_approvals and their current steps.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260101_add_approval_assignments"
+down_revision: Union[str, None] = "20251231_add_agent_workloads"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'approval_assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_approval_id', sa.Integer(), nullable=False),
+        sa.Column('doctype', sa.String(length=100), nullable=False),
+        sa.Column('step_order', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('role_name', sa.String(length=100), nullable=True),
+        sa.Column('is_escalation', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['document_approval_id'], ['document_approvals.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_approval_assignments_id'), 'approval_assignments', ['id'], unique=False)
+    op.create_index(
+        op.f('ix_approval_assignments_document_approval_id'),
+        'approval_assignments',
+        ['document_approval_id'],
+        unique=False,
+    )
+    op.create_index('ix_approval_assignments_user', 'approval_assignments', ['user_id', 'doctype'], unique=False)
+    op.create_index('ix_approval_assignments_role', 'approval_assignments', ['role_name', 'doctype'], unique=False)
+
+    pending_steps = """
+        FROM document_approvals da
+        JOIN approval_steps s
+          ON s.workflow_id = da.workflow_id AND s.step_order = da.current_step
+        WHERE da.status = 'PENDING'
+    """
+    # The step's own approver: its user, else its role, else anyone
+    op.execute(
+        f"""
+        INSERT INTO approval_assignments
+            (document_approval_id, doctype, step_order, user_id, role_name, is_escalation, created_at)
+        SELECT da.id, da.doctype, s.step_order, s.user_id,
+               CASE WHEN s.user_id IS NULL THEN s.role_required END,
+               false, CURRENT_TIMESTAMP
+        {pending_steps}
+        """
+    )
+    # Escalation targets of already-escalated documents
+    op.execute(
+        f"""
+        INSERT INTO approval_assignments
+            (document_approval_id, doctype, step_order, user_id, role_name, is_escalation, created_at)
+        SELECT da.id, da.doctype, s.step_order, s.escalation_user_id, NULL, true, CURRENT_TIMESTAMP
+        {pending_steps}
+          AND da.escalation_count > 0 AND s.escalation_user_id IS NOT NULL
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO approval_assignments
+            (document_approval_id, doctype, step_order, user_id, role_name, is_escalation, created_at)
+        SELECT da.id, da.doctype, s.step_order, NULL, s.escalation_role, true, CURRENT_TIMESTAMP
+        {pending_steps}
+          AND da.escalation_count > 0 AND s.escalation_role IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_approval_assignments_role', table_name='approval_assignments')
+    op.drop_index('ix_approval_assignments_user', table_name='approval_assignments')
+    op.drop_index(op.f('ix_approval_assignments_document_approval_id'), table_name='approval_assignments')
+    op.drop_index(op.f('ix_approval_assignments_id'), table_name='approval_assignments')
+    op.drop_table('approval_assignments')
@@ -0,0 +1,60 @@
+"""Add payroll runs for background salary slip generation
+
+Revision ID: 20260102_add_payroll_runs
+Revises: 20260101_add_approval_assignments
+Create Date: 2026-01-02
+
+Creates payroll_runs, which tracks chunked slip generation for a payroll
+entry: progress counters, skipped employees and the last committed
+employee id used to resume an interrupted run.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260102_add_payroll_runs"
+down_revision: Union[str, None] = "20260101_add_approval_assignments"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payroll_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('payroll_entry_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='payrollrunstatus'),
+            nullable=False,
+        ),
+        sa.Column('task_id', sa.String(length=255), nullable=True),
+        sa.Column('total_employees', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed_employees', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('skipped_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_employee_id', sa.Integer(), nullable=True),
+        sa.Column('skipped_details', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['payroll_entry_id'], ['payroll_entries.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_payroll_runs_id'), 'payroll_runs', ['id'], unique=False)
+    op.create_index(op.f('ix_payroll_runs_payroll_entry_id'), 'payroll_runs', ['payroll_entry_id'], unique=False)
+    op.create_index(op.f('ix_payroll_runs_status'), 'payroll_runs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payroll_runs_status'), table_name='payroll_runs')
+    op.drop_index(op.f('ix_payroll_runs_payroll_entry_id'), table_name='payroll_runs')
+    op.drop_index(op.f('ix_payroll_runs_id'), table_name='payroll_runs')
+    op.drop_table('payroll_runs')
+    sa.Enum(name='payrollrunstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,65 @@
+"""Add employee hierarchy closure table
+
+Revision ID: 20260103_add_employee_hierarchy
+Revises: 20260102_add_payroll_runs
+Create Date: 2026-01-03
+
+Creates employee_hierarchy, one row per (ancestor, descendant) pair in the
+reports_to_id tree with the number of levels between them (0 for the
+employee's own row). Team and manager-chain lookups read it in a single
+indexed query. Existing employees are backfilled here; afterwards rows are
+kept current by the employee flush hook and the nightly reconcile task.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260103_add_employee_hierarchy"
+down_revision: Union[str, None] = "20260102_add_payroll_runs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'employee_hierarchy',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['employees.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['employees.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index(
+        'ix_employee_hierarchy_ancestor_depth', 'employee_hierarchy', ['ancestor_id', 'depth'], unique=False
+    )
+    op.create_index(
+        'ix_employee_hierarchy_descendant_depth', 'employee_hierarchy', ['descendant_id', 'depth'], unique=False
+    )
+
+    # Walk up each employee's manager chain; the path array stops the walk
+    # at a reporting cycle instead of looping.
+    op.execute(
+        """
+        WITH RECURSIVE chain(descendant_id, ancestor_id, depth, path) AS (
+            SELECT id, id, 0, ARRAY[id]
+            FROM employees
+            UNION ALL
+            SELECT c.descendant_id, e.reports_to_id, c.depth + 1, c.path || e.reports_to_id
+            FROM chain c
+            JOIN employees e ON e.id = c.ancestor_id
+            WHERE e.reports_to_id IS NOT NULL
+              AND NOT e.reports_to_id = ANY(c.path)
+        )
+        INSERT INTO employee_hierarchy (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM chain
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_employee_hierarchy_descendant_depth', table_name='employee_hierarchy')
+    op.drop_index('ix_employee_hierarchy_ancestor_depth', table_name='employee_hierarchy')
+    op.drop_table('employee_hierarchy')
@@ -0,0 +1,118 @@
+"""Add leave ledger entries and maintained leave balances
+
+Revision ID: 20260104_add_leave_ledger
+Revises: 20260103_add_employee_hierarchy
+Create Date: 2026-01-04
+
+Creates leave_ledger_entries, one signed row per change to a leave
+allocation's unused leaves (allocation, consumption by an approved
+application, reversal on cancel, adjustment), and leave_balances, the
+running balance per employee, leave type and allocation period that
+balance checks read instead of summing allocations. Existing active
+allocations are backfilled with an opening ledger entry and their period
+balance; afterwards rows are kept current by the allocation flush hook and
+the nightly reconcile task.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260104_add_leave_ledger"
+down_revision: Union[str, None] = "20260103_add_employee_hierarchy"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'leave_ledger_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('allocation_id', sa.Integer(), nullable=False),
+        sa.Column('application_id', sa.Integer(), nullable=True),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('leave_type_id', sa.Integer(), nullable=False),
+        sa.Column('from_date', sa.Date(), nullable=False),
+        sa.Column('to_date', sa.Date(), nullable=False),
+        sa.Column(
+            'entry_type',
+            sa.Enum('ALLOCATION', 'CONSUMPTION', 'REVERSAL', 'ADJUSTMENT', name='leaveledgerentrytype'),
+            nullable=False,
+        ),
+        sa.Column('days', sa.Numeric(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['application_id'], ['leave_applications.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id']),
+        sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_leave_ledger_entries_id'), 'leave_ledger_entries', ['id'], unique=False)
+    op.create_index(
+        op.f('ix_leave_ledger_entries_allocation_id'), 'leave_ledger_entries', ['allocation_id'], unique=False
+    )
+    op.create_index(
+        op.f('ix_leave_ledger_entries_application_id'), 'leave_ledger_entries', ['application_id'], unique=False
+    )
+    op.create_index(
+        'ix_leave_ledger_entries_emp_type_period',
+        'leave_ledger_entries',
+        ['employee_id', 'leave_type_id', 'from_date'],
+        unique=False,
+    )
+
+    op.create_table(
+        'leave_balances',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=False),
+        sa.Column('leave_type_id', sa.Integer(), nullable=False),
+        sa.Column('from_date', sa.Date(), nullable=False),
+        sa.Column('to_date', sa.Date(), nullable=False),
+        sa.Column('allocated', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('balance', sa.Numeric(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id']),
+        sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'employee_id', 'leave_type_id', 'from_date', 'to_date', name='uq_leave_balances_emp_type_period'
+        ),
+    )
+    op.create_index(op.f('ix_leave_balances_id'), 'leave_balances', ['id'], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO leave_ledger_entries
+            (allocation_id, employee_id, leave_type_id, from_date, to_date, entry_type, days, created_at)
+        SELECT id, employee_id, leave_type_id, from_date, to_date, 'ALLOCATION', unused_leaves, now()
+        FROM leave_allocations
+        WHERE status IN ('SUBMITTED', 'DRAFT')
+          AND employee_id IS NOT NULL
+          AND leave_type_id IS NOT NULL
+          AND COALESCE(unused_leaves, 0) <> 0
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO leave_balances
+            (employee_id, leave_type_id, from_date, to_date, allocated, balance, updated_at)
+        SELECT employee_id, leave_type_id, from_date, to_date,
+               COALESCE(SUM(total_leaves_allocated), 0), COALESCE(SUM(unused_leaves), 0), now()
+        FROM leave_allocations
+        WHERE status IN ('SUBMITTED', 'DRAFT')
+          AND employee_id IS NOT NULL
+          AND leave_type_id IS NOT NULL
+        GROUP BY employee_id, leave_type_id, from_date, to_date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_leave_balances_id'), table_name='leave_balances')
+    op.drop_table('leave_balances')
+    op.drop_index('ix_leave_ledger_entries_emp_type_period', table_name='leave_ledger_entries')
+    op.drop_index(op.f('ix_leave_ledger_entries_application_id'), table_name='leave_ledger_entries')
+    op.drop_index(op.f('ix_leave_ledger_entries_allocation_id'), table_name='leave_ledger_entries')
+    op.drop_index(op.f('ix_leave_ledger_entries_id'), table_name='leave_ledger_entries')
+    op.drop_table('leave_ledger_entries')
+    sa.Enum(name='leaveledgerentrytype').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,72 @@
+"""Add e-invoice batches and stored UBL documents
+
+Revision ID: 20260105_add_einvoice_batches
+Revises: 20260104_add_leave_ledger
+Create Date: 2026-01-05
+
+Adds ubl_xml, ubl_hash and ubl_rendered_at to ng_einvoices so a rendered
+UBL document is reused while the content hash of its inputs is unchanged,
+and creates ng_einvoice_batches, which tracks chunked bulk validation and
+rendering: the selected invoice ids, progress counters, per-invoice errors
+and the last committed invoice id used to resume an interrupted batch.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260105_add_einvoice_batches"
+down_revision: Union[str, None] = "20260104_add_leave_ledger"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ng_einvoices', sa.Column('ubl_xml', sa.Text(), nullable=True))
+    op.add_column('ng_einvoices', sa.Column('ubl_hash', sa.String(length=64), nullable=True))
+    op.add_column('ng_einvoices', sa.Column('ubl_rendered_at', sa.DateTime(), nullable=True))
+
+    op.create_table(
+        'ng_einvoice_batches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('company', sa.String(length=255), nullable=False),
+        sa.Column('einvoice_ids', sa.JSON(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='einvoicebatchstatus'),
+            nullable=False,
+        ),
+        sa.Column('task_id', sa.String(length=255), nullable=True),
+        sa.Column('total_invoices', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed_invoices', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('valid_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('invalid_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rendered_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cached_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_einvoice_id', sa.Integer(), nullable=True),
+        sa.Column('invoice_errors', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_ng_einvoice_batches_id'), 'ng_einvoice_batches', ['id'], unique=False)
+    op.create_index(op.f('ix_ng_einvoice_batches_company'), 'ng_einvoice_batches', ['company'], unique=False)
+    op.create_index(op.f('ix_ng_einvoice_batches_status'), 'ng_einvoice_batches', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ng_einvoice_batches_status'), table_name='ng_einvoice_batches')
+    op.drop_index(op.f('ix_ng_einvoice_batches_company'), table_name='ng_einvoice_batches')
+    op.drop_index(op.f('ix_ng_einvoice_batches_id'), table_name='ng_einvoice_batches')
+    op.drop_table('ng_einvoice_batches')
+    sa.Enum(name='einvoicebatchstatus').drop(op.get_bind(), checkfirst=True)
+
+    op.drop_column('ng_einvoices', 'ubl_rendered_at')
+    op.drop_column('ng_einvoices', 'ubl_hash')
+    op.drop_column('ng_einvoices', 'ubl_xml')
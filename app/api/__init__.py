@@ -43,6 +43,7 @@ from app.api.dashboards import router as dashboards_router
 from app.api.workflow_tasks import router as workflow_tasks_router
 from app.api.migration import router as migration_router
 from app.api.admin_sync import router as admin_sync_router
+from app.api.report_jobs import router as report_jobs_router
 
 api_router = APIRouter()
 
@@ -98,6 +99,7 @@ api_router.include_router(tax_core_router, prefix="/v1")
 api_router.include_router(vehicles_router, prefix="/v1", tags=["vehicles"])
 api_router.include_router(dashboards_router, prefix="/v1", tags=["dashboards"])
 api_router.include_router(workflow_tasks_router, prefix="/v1", tags=["workflow-tasks"])
+api_router.include_router(report_jobs_router, prefix="/v1")
 api_router.include_router(zoho_import.router, prefix="/v1")
 api_router.include_router(support.router, prefix="/support", tags=["support"])
 api_router.include_router(network.router, prefix="/network", tags=["network"])
@@ -141,6 +143,7 @@ api_router.include_router(workflow_tasks_router, tags=["workflow-tasks"])  # Uni
 # Import routers
 api_router.include_router(zoho_import.router)  # Already has /zoho-import prefix
 api_router.include_router(migration_router)  # Already has /migration prefix
+api_router.include_router(report_jobs_router)  # Already has /report-jobs prefix
 
 # Public (unauthenticated) routers
 public_api_router = APIRouter()
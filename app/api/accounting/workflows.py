@@ -376,6 +376,8 @@ def deactivate_workflow(
 @router.get("/approvals/pending", dependencies=[Depends(Require("books:approve"))])
 def get_pending_approvals(
     doctype: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
     db: Session = Depends(get_db),
     user=Depends(Require("books:approve")),
 ) -> Dict[str, Any]:
@@ -383,21 +385,46 @@ def get_pending_approvals(
 
     Args:
         doctype: Filter by document type
+        limit: Page size
+        offset: Number of approvals to skip
 
     Returns:
-        List of pending approvals
+        Page of pending approvals with the total count
     """
     from app.services.approval_engine import ApprovalEngine
 
     engine = ApprovalEngine(db)
-    pending = engine.get_pending_approvals(user.id, doctype)
+    pending = engine.get_pending_approvals(user.id, doctype, limit=limit, offset=offset)
 
     return {
-        "total": len(pending),
+        "total": engine.count_pending_approvals(user.id, doctype, use_cache=False),
+        "limit": limit,
+        "offset": offset,
         "pending": pending,
     }
 
 
+@router.get("/approvals/pending/count", dependencies=[Depends(Require("books:approve"))])
+def get_pending_approval_count(
+    doctype: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user=Depends(Require("books:approve")),
+) -> Dict[str, Any]:
+    """Get the number of documents pending approval for the current user.
+
+    Served from a short-lived cache; intended for the inbox badge.
+
+    Args:
+        doctype: Filter by document type
+
+    Returns:
+        Pending approval count
+    """
+    from app.services.approval_engine import ApprovalEngine
+
+    return {"total": ApprovalEngine(db).count_pending_approvals(user.id, doctype)}
+
+
 @router.get("/approvals/{doctype}/{document_id}", dependencies=[Depends(Require("books:read"))])
 def get_approval_status(
     doctype: str,
@@ -3,16 +3,20 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, inspect, and_, or_
+from sqlalchemy import case, func, inspect, and_, or_, text, tuple_
 from sqlalchemy.types import DateTime, Date
-from typing import Dict, Any, List, Optional, cast
-from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple, cast
+from dataclasses import dataclass, field
+from datetime import date, datetime
 from decimal import Decimal
-import csv
-import io
+import base64
+import binascii
 import json
 
-from app.database import get_db
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.services.export_service import ExportService, OPENPYXL_AVAILABLE
+from app.services.search_service import SearchService
 # Core models
 from app.models.customer import Customer
 from app.models.subscription import Subscription
@@ -227,6 +231,201 @@ TABLE_TO_CATEGORY = {
 }
 
 
+# Per-table statement timeouts for explorer queries on very large tables.
+# Other tables use settings.analytics_statement_timeout_ms.
+TABLE_STATEMENT_TIMEOUT_MS: Dict[str, int] = {
+    "gl_entries": 30000,
+    "messages": 30000,
+    "ticket_messages": 30000,
+    "invoices": 20000,
+    "payments": 20000,
+}
+
+# Tables whose planner estimate is below this are cheap enough to count exactly
+EXACT_COUNT_THRESHOLD = 100_000
+
+
+def _apply_statement_timeout(db: Session, table_name: Optional[str] = None) -> None:
+    """Apply a per-table statement timeout for Postgres connections."""
+    timeout_ms = TABLE_STATEMENT_TIMEOUT_MS.get(table_name or "") or getattr(
+        settings, "analytics_statement_timeout_ms", None
+    )
+    if not timeout_ms or not db.bind or db.bind.dialect.name != "postgresql":
+        return
+    try:
+        # SET cannot take bind parameters under server-side binding; inline the validated int
+        db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+    except Exception:
+        db.rollback()
+
+
+def _is_postgres(db: Session) -> bool:
+    return bool(db.bind) and db.bind.dialect.name == "postgresql"
+
+
+def _estimate_table_rows(db: Session, table_names: List[str]) -> Dict[str, int]:
+    """Planner row estimates from pg_class.reltuples (never-analyzed tables are omitted)."""
+    if not _is_postgres(db) or not table_names:
+        return {}
+    try:
+        rows = db.execute(
+            text(
+                "SELECT c.relname, c.reltuples::bigint AS estimate "
+                "FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') "
+                "AND c.relname = ANY(:names)"
+            ),
+            {"names": table_names},
+        ).all()
+    except Exception:
+        db.rollback()
+        return {}
+    return {row.relname: int(row.estimate) for row in rows if row.estimate is not None and row.estimate >= 0}
+
+
+def _estimate_query_rows(db: Session, query: Any) -> Optional[int]:
+    """Planner row estimate for a filtered query via EXPLAIN."""
+    try:
+        compiled = query.statement.compile(dialect=db.bind.dialect)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        db.rollback()
+        return None
+
+
+def _count_rows(db: Session, model: Any, query: Any, filtered: bool, exact: bool) -> Tuple[int, bool]:
+    """Count rows, using planner estimates for large tables unless exact is requested.
+
+    Returns:
+        Tuple of (count, is_estimate)
+    """
+    if exact or not _is_postgres(db):
+        return query.count(), False
+
+    if filtered:
+        estimate = _estimate_query_rows(db, query.order_by(None))
+    else:
+        estimate = _estimate_table_rows(db, [model.__tablename__]).get(model.__tablename__)
+
+    if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+        return query.count(), False
+    return estimate, True
+
+
+# =============================================================================
+# KEYSET PAGINATION
+# =============================================================================
+
+
+def _cursor_value(value: Any) -> Any:
+    """Serialize a sort value for a keyset cursor without losing precision."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    raw = json.dumps([_cursor_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _coerce_cursor_value(column: Any, value: Any) -> Any:
+    """Convert a decoded cursor value back to the column's Python type."""
+    if value is None:
+        return None
+    column_type = column.type
+    enum_class = getattr(column_type, "enum_class", None)
+    try:
+        if enum_class is not None:
+            return enum_class(value)
+        python_type = column_type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+    except (NotImplementedError, ValueError, TypeError):
+        pass
+    return value
+
+
+def _primary_key_attr(model: Any) -> Optional[str]:
+    """Attribute name of a single-column primary key, if the model has one."""
+    mapper = inspect(model).mapper
+    if len(mapper.primary_key) != 1:
+        return None
+    return mapper.get_property_by_column(mapper.primary_key[0]).key
+
+
+def _keyset_page(
+    query: Any,
+    model: Any,
+    sort_key: str,
+    pk_key: str,
+    descending: bool,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page ordered by (sort column, primary key) after ``cursor``.
+
+    NULL sort values are ordered last in both directions so the page boundary
+    is always well defined.
+    """
+    sort_col = cast(Any, getattr(model, sort_key))
+    pk_col = cast(Any, getattr(model, pk_key))
+    after = (lambda col, v: col < v) if descending else (lambda col, v: col > v)
+
+    if cursor:
+        last_sort, last_pk = _decode_cursor(cursor)
+        last_pk = _coerce_cursor_value(pk_col, last_pk)
+        if sort_key == pk_key:
+            query = query.filter(after(pk_col, last_pk))
+        else:
+            last_sort = _coerce_cursor_value(sort_col, last_sort)
+            if last_sort is None:
+                query = query.filter(sort_col.is_(None), after(pk_col, last_pk))
+            else:
+                query = query.filter(or_(
+                    after(sort_col, last_sort),
+                    and_(sort_col == last_sort, after(pk_col, last_pk)),
+                    sort_col.is_(None),
+                ))
+
+    direction = (lambda col: col.desc()) if descending else (lambda col: col.asc())
+    if sort_key == pk_key:
+        query = query.order_by(direction(pk_col))
+    else:
+        query = query.order_by(direction(sort_col).nulls_last(), direction(pk_col))
+
+    records = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        next_cursor = _encode_cursor([getattr(last, sort_key), getattr(last, pk_key)])
+    return records, next_cursor
+
+
 def _get_date_columns(model: Any) -> List[str]:
     """Get list of date/datetime columns for a model."""
     date_columns = []
@@ -249,14 +448,56 @@ def _serialize_value(value: Any) -> Any:
     return value
 
 
+def _apply_table_filters(
+    query: Any,
+    model: Any,
+    date_column: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    search: Optional[str],
+) -> Any:
+    """Apply the explorer's date-range and free-text search filters."""
+    # Apply date filtering
+    if date_column and start_date and end_date:
+        col = getattr(model, date_column, None)
+        if col is None:
+            raise HTTPException(status_code=400, detail=f"Invalid date column: {date_column}")
+        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+        query = query.filter(col >= start_dt, col <= end_dt)
+
+    # Apply search (search in string columns)
+    if search:
+        search_conditions = []
+        for column in inspect(model).mapper.column_attrs:
+            col = getattr(model, column.key)
+            if hasattr(col, 'type') and hasattr(col.type, 'python_type'):
+                if col.type.python_type == str:
+                    search_conditions.append(col.ilike(f"%{search}%"))
+        if search_conditions:
+            query = query.filter(or_(*search_conditions))
+
+    return query
+
+
 @router.get("/tables", dependencies=[Depends(Require("explorer:read"))])
-async def list_tables(db: Session = Depends(get_db)) -> Dict[str, Any]:
-    """List all available tables with record counts, organized by category."""
+async def list_tables(
+    exact_counts: bool = Query(default=False, description="Count every table exactly instead of using planner estimates"),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """List all available tables with record counts, organized by category.
+
+    On Postgres, large tables report the planner's row estimate (one catalog
+    query for all tables) unless exact_counts is set.
+    """
     tables = {}
     by_category: Dict[str, List[Dict[str, Any]]] = {}
+    estimates = {} if exact_counts else _estimate_table_rows(db, [m.__tablename__ for m in TABLES.values()])
 
     for name, model in TABLES.items():
-        count = db.query(model).count()
+        estimate = estimates.get(model.__tablename__)
+        count_is_estimate = estimate is not None and estimate >= EXACT_COUNT_THRESHOLD
+        count = estimate if count_is_estimate else db.query(model).count()
         columns = [c.key for c in inspect(model).mapper.column_attrs]
         date_columns = _get_date_columns(model)
         category = TABLE_TO_CATEGORY.get(name, "other")
@@ -264,6 +505,7 @@ async def list_tables(db: Session = Depends(get_db)) -> Dict[str, Any]:
         table_info = {
             "name": name,
             "count": count,
+            "count_is_estimate": count_is_estimate,
             "columns": columns,
             "date_columns": date_columns,
             "category": category,
@@ -295,51 +537,59 @@ async def explore_table(
     start_date: Optional[str] = Query(default=None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(default=None, description="End date (YYYY-MM-DD)"),
     search: Optional[str] = Query(default=None, description="Search text in string columns"),
+    paginate: str = Query(default="offset", pattern="^(offset|keyset)$", description="offset or keyset paging"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous keyset page"),
+    exact_count: Optional[bool] = Query(
+        default=None,
+        description="Exact total (default: exact for offset paging, planner estimate for keyset paging)",
+    ),
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
-    """Explore data in a specific table with date filtering and search."""
+    """Explore data in a specific table with date filtering and search.
+
+    Keyset paging (``paginate=keyset`` or any ``cursor``) seeks past the last
+    row of the previous page instead of scanning ``offset`` rows, so deep
+    pages cost the same as the first one.
+    """
     if table_name not in TABLES:
         raise HTTPException(status_code=404, detail=f"Table not found: {table_name}")
 
     model = TABLES[table_name]
+    keyset = paginate == "keyset" or cursor is not None
+    _apply_statement_timeout(db, table_name)
     query = db.query(model)
 
-    # Apply date filtering
-    if date_column and start_date and end_date:
-        col = getattr(model, date_column, None)
-        if col is None:
-            raise HTTPException(status_code=400, detail=f"Invalid date column: {date_column}")
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-        query = query.filter(col >= start_dt, col <= end_dt)
+    query = _apply_table_filters(query, model, date_column, start_date, end_date, search)
+    filtered = bool(search or (date_column and (start_date or end_date)))
 
-    # Apply search (search in string columns)
-    if search:
-        search_conditions = []
-        for column in inspect(model).mapper.column_attrs:
-            col = getattr(model, column.key)
-            if hasattr(col, 'type') and hasattr(col.type, 'python_type'):
-                if col.type.python_type == str:
-                    search_conditions.append(col.ilike(f"%{search}%"))
-        if search_conditions:
-            query = query.filter(or_(*search_conditions))
+    if order_by and getattr(model, order_by, None) is None:
+        raise HTTPException(status_code=400, detail=f"Invalid column: {order_by}")
 
-    # Apply ordering
-    if order_by:
-        column = cast(Any, getattr(model, order_by, None))
-        if column is None:
-            raise HTTPException(status_code=400, detail=f"Invalid column: {order_by}")
-        if order_dir == "desc":
-            query = query.order_by(column.desc())
-        else:
-            query = query.order_by(column.asc())
-    else:
-        # Default order by id desc
-        if hasattr(model, "id"):
-            query = query.order_by(model.id.desc())
+    total, total_is_estimate = _count_rows(
+        db, model, query, filtered, exact=exact_count if exact_count is not None else not keyset
+    )
 
-    total = query.count()
-    records = query.offset(offset).limit(limit).all()
+    next_cursor = None
+    if keyset:
+        pk_key = _primary_key_attr(model)
+        if pk_key is None:
+            raise HTTPException(status_code=400, detail=f"Keyset paging not supported for table: {table_name}")
+        records, next_cursor = _keyset_page(
+            query, model, order_by or pk_key, pk_key, order_dir == "desc", cursor, limit
+        )
+    else:
+        # Apply ordering
+        if order_by:
+            column = cast(Any, getattr(model, order_by))
+            if order_dir == "desc":
+                query = query.order_by(column.desc())
+            else:
+                query = query.order_by(column.asc())
+        else:
+            # Default order by id desc
+            if hasattr(model, "id"):
+                query = query.order_by(model.id.desc())
+        records = query.offset(offset).limit(limit).all()
 
     # Convert to dict
     data = []
@@ -353,8 +603,12 @@ async def explore_table(
     return {
         "table": table_name,
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "limit": limit,
-        "offset": offset,
+        "offset": None if keyset else offset,
+        "pagination": "keyset" if keyset else "offset",
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None if keyset else offset + len(data) < total,
         "date_columns": _get_date_columns(model),
         "columns": [c.key for c in inspect(model).mapper.column_attrs],
         "filters_applied": {
@@ -367,6 +621,161 @@ async def explore_table(
     }
 
 
+@dataclass(frozen=True)
+class TableStatsSpec:
+    """Aggregates reported by the stats endpoint for one table.
+
+    Attributes:
+        group_by: stat key -> column to break the row count down by
+        sums: stat key -> numeric column to total
+        counts: stat key -> boolean condition to count rows for
+        top_n: stat key -> keep only the N largest groups of that breakdown
+    """
+    group_by: Dict[str, Any] = field(default_factory=dict)
+    sums: Dict[str, Any] = field(default_factory=dict)
+    counts: Dict[str, Any] = field(default_factory=dict)
+    top_n: Dict[str, int] = field(default_factory=dict)
+
+
+TABLE_STATS: Dict[str, TableStatsSpec] = {
+    "customers": TableStatsSpec(
+        group_by={"by_status": Customer.status, "by_type": Customer.customer_type},
+    ),
+    "subscriptions": TableStatsSpec(
+        group_by={"by_status": Subscription.status, "by_plan": Subscription.plan_name},
+        top_n={"by_plan": 20},
+    ),
+    "invoices": TableStatsSpec(
+        group_by={"by_status": Invoice.status},
+        sums={"total_invoiced": Invoice.total_amount, "total_paid": Invoice.amount_paid},
+    ),
+    "credit_notes": TableStatsSpec(
+        group_by={"by_status": CreditNote.status},
+        sums={"total_credit_notes": CreditNote.amount},
+    ),
+    "payments": TableStatsSpec(
+        group_by={"by_method": Payment.payment_method},
+        sums={"total_payments": Payment.amount},
+    ),
+    "conversations": TableStatsSpec(
+        group_by={"by_status": Conversation.status, "by_channel": Conversation.channel},
+    ),
+    "pops": TableStatsSpec(
+        counts={"active": Pop.is_active.is_(True), "inactive": Pop.is_active.is_(False)},
+    ),
+    "employees": TableStatsSpec(
+        group_by={"by_department": Employee.department, "by_status": Employee.status},
+    ),
+    "tickets": TableStatsSpec(
+        group_by={"by_status": Ticket.status, "by_priority": Ticket.priority, "by_source": Ticket.source},
+    ),
+    "projects": TableStatsSpec(
+        group_by={"by_status": Project.status},
+        counts={
+            "with_customer": Project.customer_id.isnot(None),
+            "with_manager": Project.project_manager_id.isnot(None),
+        },
+    ),
+    "tariffs": TableStatsSpec(
+        group_by={"by_type": Tariff.tariff_type},
+        counts={"enabled": Tariff.enabled.is_(True)},
+    ),
+    "routers": TableStatsSpec(
+        group_by={"by_nas_type": Router.nas_type},
+        counts={"with_pop": Router.pop_id.isnot(None)},
+    ),
+    "leads": TableStatsSpec(
+        group_by={"by_status": Lead.status},
+        counts={"converted": Lead.customer_id.isnot(None)},
+    ),
+    "network_monitors": TableStatsSpec(
+        group_by={"by_ping_state": NetworkMonitor.ping_state},
+        counts={"active": NetworkMonitor.active.is_(True)},
+    ),
+    "ipv4_networks": TableStatsSpec(
+        group_by={"by_type": IPv4Network.network_type, "by_usage": IPv4Network.type_of_usage},
+    ),
+    "ipv4_addresses": TableStatsSpec(
+        counts={
+            "used": IPv4Address.is_used.is_(True),
+            "available": IPv4Address.is_used.is_(False),
+            "assigned_to_customer": IPv4Address.customer_id.isnot(None),
+        },
+    ),
+    "accounts": TableStatsSpec(
+        group_by={"by_account_type": Account.account_type, "by_root_type": Account.root_type},
+    ),
+    "journal_entries": TableStatsSpec(
+        sums={"total_debit": JournalEntry.total_debit, "total_credit": JournalEntry.total_credit},
+    ),
+    "gl_entries": TableStatsSpec(
+        sums={"total_debit": GLEntry.debit, "total_credit": GLEntry.credit},
+    ),
+    "purchase_invoices": TableStatsSpec(
+        group_by={"by_status": PurchaseInvoice.status},
+        sums={"total_amount": PurchaseInvoice.grand_total},
+    ),
+    "administrators": TableStatsSpec(
+        group_by={"by_role": Administrator.role_name},
+    ),
+}
+
+
+def _stat_key(value: Any) -> Optional[str]:
+    """Breakdown key for a group value; empty groups are not reported."""
+    if value is None or value == "":
+        return None
+    return value.value if hasattr(value, "value") else str(value)
+
+
+def _compute_table_stats(db: Session, model: Any, spec: TableStatsSpec) -> Dict[str, Any]:
+    """Compute all aggregates for a table.
+
+    On Postgres every breakdown, sum and conditional count comes from a single
+    scan using GROUPING SETS; other databases run one aggregate query plus one
+    GROUP BY per breakdown.
+    """
+    aggregates = [func.count().label("total_records")]
+    aggregates += [func.sum(col).label(key) for key, col in spec.sums.items()]
+    aggregates += [
+        func.sum(case((cond, 1), else_=0)).label(key) for key, cond in spec.counts.items()
+    ]
+    breakdowns: Dict[str, Dict[str, int]] = {key: {} for key in spec.group_by}
+    group_cols = list(spec.group_by.values())
+
+    if group_cols and _is_postgres(db):
+        flags = [func.grouping(col) for col in group_cols]
+        grouping_sets = func.grouping_sets(*[tuple_(col) for col in group_cols], tuple_())
+        totals = None
+        for row in db.query(*group_cols, *flags, *aggregates).group_by(grouping_sets).all():
+            row_flags = row[len(group_cols):2 * len(group_cols)]
+            if all(row_flags):
+                totals = row
+                continue
+            index = row_flags.index(0)
+            key = _stat_key(row[index])
+            if key is not None:
+                breakdowns[list(spec.group_by)[index]][key] = int(row.total_records or 0)
+    else:
+        totals = db.query(*aggregates).one()
+        for stat, col in spec.group_by.items():
+            for value, count in db.query(col, func.count()).group_by(col).all():
+                key = _stat_key(value)
+                if key is not None:
+                    breakdowns[stat][key] = int(count or 0)
+
+    stats: Dict[str, Any] = {"total_records": int(totals.total_records or 0) if totals else 0}
+    for stat, groups in breakdowns.items():
+        if stat in spec.top_n:
+            groups = dict(sorted(groups.items(), key=lambda item: item[1], reverse=True)[:spec.top_n[stat]])
+        stats[stat] = groups
+    for key in spec.sums:
+        stats[key] = float(getattr(totals, key, None) or 0) if totals else 0.0
+    for key in spec.counts:
+        stats[key] = int(getattr(totals, key, None) or 0) if totals else 0
+    return stats
+
+
 @router.get("/tables/{table_name}/stats", dependencies=[Depends(Require("explorer:read"))])
 async def get_table_stats(
     table_name: str,
@@ -377,332 +786,102 @@ async def get_table_stats(
         raise HTTPException(status_code=404, detail=f"Table not found: {table_name}")
 
     model = TABLES[table_name]
+    _apply_statement_timeout(db, table_name)
 
-    stats = {
+    return {
         "table": table_name,
-        "total_records": db.query(model).count(),
+        **_compute_table_stats(db, model, TABLE_STATS.get(table_name, TableStatsSpec())),
     }
 
-    # Add specific stats based on table
-    if table_name == "customers":
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Customer.status, func.count(Customer.id).label("count"))
-            .group_by(Customer.status)
-            .all()
-        }
-        stats["by_type"] = {
-            row.customer_type.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Customer.customer_type, func.count(Customer.id).label("count"))
-            .group_by(Customer.customer_type)
-            .all()
-        }
-
-    elif table_name == "subscriptions":
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Subscription.status, func.count(Subscription.id).label("count"))
-            .group_by(Subscription.status)
-            .all()
-        }
-        stats["by_plan"] = {
-            row.plan_name: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Subscription.plan_name, func.count(Subscription.id).label("count"))
-            .group_by(Subscription.plan_name)
-            .order_by(func.count(Subscription.id).desc())
-            .limit(20)
-            .all()
-        }
-
-    elif table_name == "invoices":
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Invoice.status, func.count(Invoice.id).label("count"))
-            .group_by(Invoice.status)
-            .all()
-        }
-        total_amount = db.query(func.sum(Invoice.total_amount)).scalar()
-        total_paid = db.query(func.sum(Invoice.amount_paid)).scalar()
-        stats["total_invoiced"] = float(total_amount or 0)
-        stats["total_paid"] = float(total_paid or 0)
-    elif table_name == "credit_notes":
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(CreditNote.status, func.count(CreditNote.id).label("count"))
-            .group_by(CreditNote.status)
-            .all()
-        }
-        total_amount = db.query(func.sum(CreditNote.amount)).scalar()
-        stats["total_credit_notes"] = float(total_amount or 0)
-
-    elif table_name == "payments":
-        stats["by_method"] = {
-            row.payment_method.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Payment.payment_method, func.count(Payment.id).label("count"))
-            .group_by(Payment.payment_method)
-            .all()
-        }
-        total = db.query(func.sum(Payment.amount)).scalar()
-        stats["total_payments"] = float(total or 0)
-
-    elif table_name == "conversations":
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Conversation.status, func.count(Conversation.id).label("count"))
-            .group_by(Conversation.status)
-            .all()
-        }
-        stats["by_channel"] = {
-            row.channel: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Conversation.channel, func.count(Conversation.id).label("count"))
-            .group_by(Conversation.channel)
-            .all()
-            if row.channel
-        }
 
-    elif table_name == "pops":
-        stats["active"] = db.query(Pop).filter(Pop.is_active.is_(True)).count()
-        stats["inactive"] = db.query(Pop).filter(Pop.is_active.is_(False)).count()
-
-    elif table_name == "employees":
-        stats["by_department"] = {
-            row.department: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Employee.department, func.count(Employee.id).label("count"))
-            .group_by(Employee.department)
-            .all()
-            if row.department
-        }
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Employee.status, func.count(Employee.id).label("count"))
-            .group_by(Employee.status)
-            .all()
-        }
-
-    elif table_name == "tickets":
-        stats["by_status"] = {
-            row.status.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Ticket.status, func.count(Ticket.id).label("count"))
-            .group_by(Ticket.status)
-            .all()
-        }
-        stats["by_priority"] = {
-            row.priority.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Ticket.priority, func.count(Ticket.id).label("count"))
-            .group_by(Ticket.priority)
-            .all()
-        }
-        stats["by_source"] = {
-            row.source.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Ticket.source, func.count(Ticket.id).label("count"))
-            .group_by(Ticket.source)
-            .all()
-        }
+# Rows fetched per server-side cursor round-trip when streaming exports
+EXPORT_BATCH_SIZE = 1000
 
-    elif table_name == "projects":
-        stats["by_status"] = {
-            row.status.value if hasattr(row.status, 'value') else row.status: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Project.status, func.count(Project.id).label("count"))
-            .group_by(Project.status)
-            .all()
-            if row.status
-        }
-        stats["with_customer"] = db.query(Project).filter(Project.customer_id.isnot(None)).count()
-        stats["with_manager"] = db.query(Project).filter(Project.project_manager_id.isnot(None)).count()
-
-    elif table_name == "tariffs":
-        stats["by_type"] = {
-            row.tariff_type.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Tariff.tariff_type, func.count(Tariff.id).label("count"))
-            .group_by(Tariff.tariff_type)
-            .all()
-        }
-        stats["enabled"] = db.query(Tariff).filter(Tariff.enabled.is_(True)).count()
-
-    elif table_name == "routers":
-        stats["by_nas_type"] = {
-            str(row.nas_type): int(getattr(row, "count", 0) or 0)
-            for row in db.query(Router.nas_type, func.count(Router.id).label("count"))
-            .group_by(Router.nas_type)
-            .all()
-            if row.nas_type is not None
-        }
-        stats["with_pop"] = db.query(Router).filter(Router.pop_id.isnot(None)).count()
-
-    elif table_name == "leads":
-        stats["by_status"] = {
-            row.status: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Lead.status, func.count(Lead.id).label("count"))
-            .group_by(Lead.status)
-            .all()
-            if row.status
-        }
-        stats["converted"] = db.query(Lead).filter(Lead.customer_id.isnot(None)).count()
-
-    elif table_name == "network_monitors":
-        stats["by_ping_state"] = {
-            row.ping_state.value: int(getattr(row, "count", 0) or 0)
-            for row in db.query(NetworkMonitor.ping_state, func.count(NetworkMonitor.id).label("count"))
-            .group_by(NetworkMonitor.ping_state)
-            .all()
-        }
-        stats["active"] = db.query(NetworkMonitor).filter(NetworkMonitor.active.is_(True)).count()
-
-    elif table_name == "ipv4_networks":
-        stats["by_type"] = {
-            row.network_type: int(getattr(row, "count", 0) or 0)
-            for row in db.query(IPv4Network.network_type, func.count(IPv4Network.id).label("count"))
-            .group_by(IPv4Network.network_type)
-            .all()
-            if row.network_type
-        }
-        stats["by_usage"] = {
-            row.type_of_usage: int(getattr(row, "count", 0) or 0)
-            for row in db.query(IPv4Network.type_of_usage, func.count(IPv4Network.id).label("count"))
-            .group_by(IPv4Network.type_of_usage)
-            .all()
-            if row.type_of_usage
-        }
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
 
-    elif table_name == "ipv4_addresses":
-        stats["used"] = db.query(IPv4Address).filter(IPv4Address.is_used.is_(True)).count()
-        stats["available"] = db.query(IPv4Address).filter(IPv4Address.is_used.is_(False)).count()
-        stats["assigned_to_customer"] = db.query(IPv4Address).filter(IPv4Address.customer_id.isnot(None)).count()
-
-    elif table_name == "accounts":
-        stats["by_account_type"] = {
-            row.account_type: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Account.account_type, func.count(Account.id).label("count"))
-            .group_by(Account.account_type)
-            .all()
-            if row.account_type
-        }
-        stats["by_root_type"] = {
-            row.root_type: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Account.root_type, func.count(Account.id).label("count"))
-            .group_by(Account.root_type)
-            .all()
-            if row.root_type
-        }
 
-    elif table_name == "journal_entries":
-        total_debit = db.query(func.sum(JournalEntry.total_debit)).scalar()
-        total_credit = db.query(func.sum(JournalEntry.total_credit)).scalar()
-        stats["total_debit"] = float(total_debit or 0)
-        stats["total_credit"] = float(total_credit or 0)
-
-    elif table_name == "gl_entries":
-        total_debit = db.query(func.sum(GLEntry.debit)).scalar()
-        total_credit = db.query(func.sum(GLEntry.credit)).scalar()
-        stats["total_debit"] = float(total_debit or 0)
-        stats["total_credit"] = float(total_credit or 0)
-
-    elif table_name == "purchase_invoices":
-        stats["by_status"] = {
-            row.status: int(getattr(row, "count", 0) or 0)
-            for row in db.query(PurchaseInvoice.status, func.count(PurchaseInvoice.id).label("count"))
-            .group_by(PurchaseInvoice.status)
-            .all()
-            if row.status
-        }
-        total = db.query(func.sum(PurchaseInvoice.grand_total)).scalar()
-        stats["total_amount"] = float(total or 0)
-
-    elif table_name == "administrators":
-        stats["by_role"] = {
-            row.role_name: int(getattr(row, "count", 0) or 0)
-            for row in db.query(Administrator.role_name, func.count(Administrator.id).label("count"))
-            .group_by(Administrator.role_name)
-            .all()
-            if row.role_name
-        }
+def _iter_export_rows(
+    model: Any,
+    columns: List[str],
+    date_column: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    search: Optional[str],
+    limit: Optional[int],
+) -> Iterator[List[Any]]:
+    """Yield serialized rows from a server-side cursor.
+
+    Uses its own session: the request-scoped session is closed before a
+    StreamingResponse body is consumed.
+    """
+    db = SessionLocal()
+    try:
+        query = _apply_table_filters(db.query(model), model, date_column, start_date, end_date, search)
+        if hasattr(model, "id"):
+            query = query.order_by(model.id.desc())
+        if limit:
+            query = query.limit(limit)
 
-    return stats
+        for record in query.yield_per(EXPORT_BATCH_SIZE):
+            yield [_serialize_value(getattr(record, col)) for col in columns]
+            # Drop loaded instances so the identity map doesn't grow with the export
+            db.expunge(record)
+    finally:
+        db.close()
 
 
 @router.get("/tables/{table_name}/export", dependencies=[Depends(Require("explorer:read"))])
 async def export_table(
     table_name: str,
-    format: str = Query(default="csv", pattern="^(csv|json)$"),
+    format: str = Query(default="csv", pattern="^(csv|json|ndjson|xlsx)$"),
     date_column: Optional[str] = Query(default=None, description="Column to filter by date"),
     start_date: Optional[str] = Query(default=None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(default=None, description="End date (YYYY-MM-DD)"),
     search: Optional[str] = Query(default=None, description="Search text in string columns"),
+    limit: Optional[int] = Query(default=None, ge=1, description="Max rows to export (default: all)"),
     db: Session = Depends(get_db),
 ) -> StreamingResponse:
-    """Export table data as CSV or JSON with optional filtering."""
+    """Export table data as CSV, JSON, NDJSON or XLSX with optional filtering.
+
+    Rows are streamed from a server-side cursor in batches, so exports are not
+    capped by memory.
+    """
     if table_name not in TABLES:
         raise HTTPException(status_code=404, detail=f"Table not found: {table_name}")
+    if format == "xlsx" and not OPENPYXL_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Excel export not available (install openpyxl)")
 
     model = TABLES[table_name]
-    query = db.query(model)
-
-    # Apply date filtering
-    if date_column and start_date and end_date:
-        col = getattr(model, date_column, None)
-        if col is None:
-            raise HTTPException(status_code=400, detail=f"Invalid date column: {date_column}")
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-        query = query.filter(col >= start_dt, col <= end_dt)
-
-    # Apply search (search in string columns)
-    if search:
-        search_conditions = []
-        for column in inspect(model).mapper.column_attrs:
-            col = getattr(model, column.key)
-            if hasattr(col, 'type') and hasattr(col.type, 'python_type'):
-                if col.type.python_type == str:
-                    search_conditions.append(col.ilike(f"%{search}%"))
-        if search_conditions:
-            query = query.filter(or_(*search_conditions))
-
-    # Default order by id desc
-    if hasattr(model, "id"):
-        query = query.order_by(model.id.desc())
-
-    # Limit to 10000 records for export to prevent memory issues
-    records = query.limit(10000).all()
+    # Validate filters up front so bad input fails before streaming starts
+    _apply_table_filters(db.query(model), model, date_column, start_date, end_date, search)
 
     # Get column names
     columns = [c.key for c in inspect(model).mapper.column_attrs]
+    rows = _iter_export_rows(model, columns, date_column, start_date, end_date, search, limit)
 
+    export_service = ExportService()
+    body: Iterator[Any]
     if format == "csv":
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(columns)
-        for record in records:
-            row = []
-            for col in columns:
-                value = getattr(record, col)
-                row.append(_serialize_value(value))
-            writer.writerow(row)
-
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename={table_name}_export.csv"
-            },
-        )
+        body = export_service.stream_csv(columns, rows)
+    elif format == "xlsx":
+        body = export_service.stream_xlsx(columns, rows, sheet_title=table_name)
+    elif format == "ndjson":
+        body = export_service.stream_ndjson(dict(zip(columns, row)) for row in rows)
     else:  # json
-        json_data: List[Dict[str, Any]] = []
-        for record in records:
-            json_row: Dict[str, Any] = {}
-            for col in columns:
-                value = getattr(record, col)
-                json_row[col] = _serialize_value(value)
-            json_data.append(json_row)
-
-        json_output: str = json.dumps(json_data, indent=2, default=str)
-        return StreamingResponse(
-            iter([json_output]),
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f"attachment; filename={table_name}_export.json"
-            },
-        )
+        body = export_service.stream_json_array(dict(zip(columns, row)) for row in rows)
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename={table_name}_export.{format}"
+        },
+    )
 
 
 @router.get("/data-quality", dependencies=[Depends(Require("explorer:read"))])
@@ -778,94 +957,57 @@ async def check_data_quality(db: Session = Depends(get_db)) -> Dict[str, Any]:
     return report
 
 
+# Result serializers for the global search, by search entity
+SEARCH_ALL_ENTITIES: Dict[str, Any] = {
+    "customers": lambda c: {
+        "id": c.id,
+        "name": c.name,
+        "email": c.email,
+        "phone": c.phone,
+        "status": c.status.value,
+    },
+    "invoices": lambda inv: {
+        "id": inv.id,
+        "invoice_number": inv.invoice_number,
+        "total_amount": str(inv.total_amount),
+        "status": inv.status.value,
+    },
+    "employees": lambda e: {
+        "id": e.id,
+        "name": e.name,
+        "email": e.email,
+        "department": e.department,
+    },
+    "pops": lambda p: {
+        "id": p.id,
+        "name": p.name,
+        "code": p.code,
+    },
+}
+
+
 @router.get("/search", dependencies=[Depends(Require("explorer:read"))])
 async def search_all(
     q: str = Query(..., min_length=2),
-    limit: int = Query(default=50, le=200),
+    limit: int = Query(default=50, le=200, description="Maximum results per entity"),
+    entities: Optional[str] = Query(
+        default=None,
+        description="Comma-separated entities to search (customers, invoices, employees, pops); default all",
+    ),
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
-    """Search across all major tables."""
+    """Search across all major tables, best matches first."""
+    requested = [e.strip() for e in entities.split(",") if e.strip()] if entities else list(SEARCH_ALL_ENTITIES)
+    unknown = [e for e in requested if e not in SEARCH_ALL_ENTITIES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search entities: {', '.join(unknown)}")
+
+    _apply_statement_timeout(db)
+    search = SearchService(db)
     results = {}
-    search_term = f"%{q}%"
-
-    # Search customers
-    customers = (
-        db.query(Customer)
-        .filter(
-            Customer.name.ilike(search_term)
-            | Customer.email.ilike(search_term)
-            | Customer.phone.ilike(search_term)
-            | Customer.account_number.ilike(search_term)
-        )
-        .limit(limit)
-        .all()
-    )
-    results["customers"] = [
-        {
-            "id": c.id,
-            "name": c.name,
-            "email": c.email,
-            "phone": c.phone,
-            "status": c.status.value,
-        }
-        for c in customers
-    ]
 
-    # Search invoices
-    invoices = (
-        db.query(Invoice)
-        .filter(Invoice.invoice_number.ilike(search_term))
-        .limit(limit)
-        .all()
-    )
-    results["invoices"] = [
-        {
-            "id": inv.id,
-            "invoice_number": inv.invoice_number,
-            "total_amount": str(inv.total_amount),
-            "status": inv.status.value,
-        }
-        for inv in invoices
-    ]
-
-    # Search employees
-    employees = (
-        db.query(Employee)
-        .filter(
-            Employee.name.ilike(search_term)
-            | Employee.email.ilike(search_term)
-        )
-        .limit(limit)
-        .all()
-    )
-    results["employees"] = [
-        {
-            "id": e.id,
-            "name": e.name,
-            "email": e.email,
-            "department": e.department,
-        }
-        for e in employees
-    ]
-
-    # Search POPs
-    pops = (
-        db.query(Pop)
-        .filter(
-            Pop.name.ilike(search_term)
-            | Pop.code.ilike(search_term)
-        )
-        .limit(limit)
-        .all()
-    )
-    results["pops"] = [
-        {
-            "id": p.id,
-            "name": p.name,
-            "code": p.code,
-        }
-        for p in pops
-    ]
+    for entity in requested:
+        results[entity] = [SEARCH_ALL_ENTITIES[entity](row) for row in search.search(entity, q, limit)]
 
     return results
 
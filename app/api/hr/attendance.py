@@ -16,6 +16,7 @@ from app.database import get_db
 from app.auth import Require, get_current_principal
 from app.models.auth import User
 from app.services.audit_logger import AuditLogger, serialize_for_audit
+from app.services.hr_bulk_service import HRBulkService
 from app.models.hr_attendance import (
     ShiftType,
     ShiftAssignment,
@@ -716,56 +717,19 @@ async def bulk_mark_attendance(
 
     Returns details on created vs skipped (already existed) entries.
     """
-    created = []
-    skipped = []
-    audit = AuditLogger(db)
-
-    for emp_id in payload.employee_ids:
-        existing = db.query(Attendance).filter(
-            Attendance.employee_id == emp_id,
-            Attendance.attendance_date == payload.attendance_date,
-        ).first()
-
-        if existing:
-            # Skip - attendance already exists for this employee on this date
-            skipped.append({
-                "employee_id": emp_id,
-                "existing_id": existing.id,
-                "existing_status": existing.status.value if existing.status else None,
-            })
-        else:
-            attendance = Attendance(
-                employee=f"EMP-{emp_id}",
-                employee_id=emp_id,
-                attendance_date=payload.attendance_date,
-                status=payload.status,
-                created_by_id=current_user.id if current_user else None,
-            )
-            db.add(attendance)
-            db.flush()
-            created.append({
-                "employee_id": emp_id,
-                "id": attendance.id,
-            })
-
-    # Log audit event for bulk operation
-    if created:
-        audit.log_create(
-            doctype="attendance",
-            document_id=0,  # Bulk operation
-            new_values={"employee_ids": [c["employee_id"] for c in created], "status": payload.status.value},
-            user_id=current_user.id if current_user else None,
-            document_name=f"Bulk attendance for {payload.attendance_date}",
-            remarks=f"Bulk created {len(created)} attendance records",
-        )
-
+    result = HRBulkService(db).mark_attendance(
+        payload.employee_ids,
+        payload.attendance_date,
+        payload.status,
+        user_id=current_user.id if current_user else None,
+    )
     db.commit()
     return {
-        "created": len(created),
-        "skipped": len(skipped),
+        "created": len(result.succeeded),
+        "skipped": len(result.skipped),
         "total": len(payload.employee_ids),
-        "created_details": created,
-        "skipped_details": skipped,
+        "created_details": result.succeeded,
+        "skipped_details": result.skipped,
     }
 
 
@@ -1047,14 +1011,14 @@ async def reject_attendance_request(
 async def bulk_approve_attendance_requests(
     payload: AttendanceRequestBulkAction,
     db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_principal),
 ) -> Dict[str, Any]:
     """Bulk approve attendance requests."""
-    updated = 0
-    for req_id in payload.request_ids:
-        request = db.query(AttendanceRequest).filter(AttendanceRequest.id == req_id).first()
-        if request and request.status == AttendanceRequestStatus.PENDING:
-            request.status = AttendanceRequestStatus.APPROVED
-            updated += 1
+    updated = HRBulkService(db).set_attendance_request_status(
+        payload.request_ids,
+        AttendanceRequestStatus.APPROVED,
+        user_id=current_user.id if current_user else None,
+    )
     db.commit()
     return {"updated": updated, "requested": len(payload.request_ids)}
 
@@ -1063,13 +1027,13 @@ async def bulk_approve_attendance_requests(
 async def bulk_reject_attendance_requests(
     payload: AttendanceRequestBulkAction,
     db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_principal),
 ) -> Dict[str, Any]:
     """Bulk reject attendance requests."""
-    updated = 0
-    for req_id in payload.request_ids:
-        request = db.query(AttendanceRequest).filter(AttendanceRequest.id == req_id).first()
-        if request and request.status == AttendanceRequestStatus.PENDING:
-            request.status = AttendanceRequestStatus.REJECTED
-            updated += 1
+    updated = HRBulkService(db).set_attendance_request_status(
+        payload.request_ids,
+        AttendanceRequestStatus.REJECTED,
+        user_id=current_user.id if current_user else None,
+    )
     db.commit()
     return {"updated": updated, "requested": len(payload.request_ids)}
@@ -13,7 +13,7 @@ from typing import Any, Dict, List, Optional, TYPE_CHECKING
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_
 
 if TYPE_CHECKING:
     from app.models.hr_leave import LeaveAllocation, LeaveApplication, LeaveType
@@ -65,26 +65,19 @@ def get_leave_balance(
     """
     Calculate available leave balance for an employee/leave type as of a given date.
 
-    Returns the sum of unused_leaves from all active allocations for the period,
-    aligned with allocation balances updated during approvals/cancellations.
+    Reads the maintained leave_balances rows for the periods covering the date,
+    which track the unused_leaves of active allocations as approvals and
+    cancellations update them.
     """
-    from app.models.hr_leave import LeaveAllocation, LeaveAllocationStatus
-
-    # Find active allocations covering the date
-    allocations = db.query(LeaveAllocation).filter(
-        LeaveAllocation.employee_id == employee_id,
-        LeaveAllocation.leave_type_id == leave_type_id,
-        LeaveAllocation.from_date <= as_of_date,
-        LeaveAllocation.to_date >= as_of_date,
-        LeaveAllocation.status.in_([LeaveAllocationStatus.SUBMITTED, LeaveAllocationStatus.DRAFT]),
-    ).all()
+    from app.models.hr_leave import LeaveBalance
 
-    if not allocations:
-        return Decimal("0")
-
-    # Use the tracked unused_leaves to align with prior approvals/cancellations
-    remaining = sum([a.unused_leaves or Decimal("0") for a in allocations], Decimal("0"))
-    return remaining
+    remaining = db.query(func.sum(LeaveBalance.balance)).filter(
+        LeaveBalance.employee_id == employee_id,
+        LeaveBalance.leave_type_id == leave_type_id,
+        LeaveBalance.from_date <= as_of_date,
+        LeaveBalance.to_date >= as_of_date,
+    ).scalar()
+    return decimal_or_default(remaining)
 
 
 def check_leave_overlap(
@@ -166,7 +159,8 @@ def get_leave_type_constraints(db: Session, leave_type_id: int) -> Optional[Dict
     """
     Get leave type constraints for validation.
 
-    Returns dict with max_leaves_allowed, max_continuous_days_allowed, is_carry_forward.
+    Returns dict with max_leaves_allowed, max_continuous_days_allowed, is_carry_forward,
+    is_lwp and include_holiday.
     """
     from app.models.hr_leave import LeaveType
 
@@ -181,6 +175,7 @@ def get_leave_type_constraints(db: Session, leave_type_id: int) -> Optional[Dict
         "max_continuous_days_allowed": lt.max_continuous_days_allowed or 0,
         "is_carry_forward": lt.is_carry_forward or False,
         "is_lwp": lt.is_lwp or False,
+        "include_holiday": lt.include_holiday or False,
     }
 
 
@@ -190,14 +185,21 @@ def update_allocation_balance(
     leave_type_id: int,
     application_from_date: date,
     days_delta: Decimal,
+    application_id: Optional[int] = None,
 ) -> bool:
     """
     Update the unused_leaves in the allocation covering the application period.
 
     days_delta: positive to restore balance (cancel), negative to deduct (approve)
+    application_id: recorded on the leave ledger entry for the change
     Returns True if allocation found and updated, False otherwise.
     """
-    from app.models.hr_leave import LeaveAllocation, LeaveAllocationStatus
+    from app.models.hr_leave import (
+        LeaveAllocation,
+        LeaveAllocationStatus,
+        LeaveLedgerEntryType,
+        record_ledger_source,
+    )
 
     allocation = db.query(LeaveAllocation).filter(
         LeaveAllocation.employee_id == employee_id,
@@ -210,6 +212,10 @@ def update_allocation_balance(
     if not allocation:
         return False
 
+    if application_id is not None:
+        entry_type = LeaveLedgerEntryType.CONSUMPTION if days_delta < 0 else LeaveLedgerEntryType.REVERSAL
+        record_ledger_source(allocation, entry_type, application_id)
+
     current_unused = allocation.unused_leaves or Decimal("0")
     allocation.unused_leaves = current_unused + days_delta
     return True
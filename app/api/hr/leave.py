@@ -27,6 +27,8 @@ from app.models.hr_leave import (
     LeaveApplicationStatus,
 )
 from app.services.audit_logger import AuditLogger, serialize_for_audit
+from app.services.holiday_calendar import count_leave_days, invalidate_holiday_calendars
+from app.services.hr_bulk_service import HRBulkService
 from .helpers import (
     decimal_or_default,
     csv_response,
@@ -584,73 +586,16 @@ def bulk_create_leave_allocations(
     if not policy.details:
         raise HTTPException(status_code=400, detail="Leave policy has no leave type details defined")
 
-    created = []
-    skipped = []
-    audit = AuditLogger(db)
-
-    for employee_id in payload.employee_ids:
-        for detail in policy.details:
-            # Check for existing allocation
-            if detail.leave_type_id is None:
-                skipped.append({
-                    "employee_id": employee_id,
-                    "leave_type": detail.leave_type,
-                    "reason": "Missing leave_type_id in policy detail",
-                })
-                continue
-            overlap = check_allocation_overlap(
-                db,
-                employee_id,
-                detail.leave_type_id,
-                payload.from_date,
-                payload.to_date,
-            )
-            if overlap:
-                skipped.append({
-                    "employee_id": employee_id,
-                    "leave_type": detail.leave_type,
-                    "reason": "Overlapping allocation exists",
-                })
-                continue
-
-            # Create allocation based on policy detail
-            allocation = LeaveAllocation(
-                employee=f"EMP-{employee_id}",  # Placeholder, could be enhanced to lookup
-                employee_id=employee_id,
-                leave_type=detail.leave_type,
-                leave_type_id=detail.leave_type_id,
-                from_date=payload.from_date,
-                to_date=payload.to_date,
-                new_leaves_allocated=detail.annual_allocation or Decimal("0"),
-                total_leaves_allocated=detail.annual_allocation or Decimal("0"),
-                unused_leaves=detail.annual_allocation or Decimal("0"),
-                leave_policy=policy.leave_policy_name,
-                status=LeaveAllocationStatus.DRAFT,
-                company=payload.company,
-                created_by_id=current_user.id if current_user else None,
-                updated_by_id=current_user.id if current_user else None,
-            )
-            db.add(allocation)
-            db.flush()
-
-            # Log audit event
-            audit.log_create(
-                doctype="leave_allocation",
-                document_id=allocation.id,
-                new_values=serialize_for_audit(allocation),
-                user_id=current_user.id if current_user else None,
-                document_name=f"EMP-{employee_id} - {detail.leave_type}",
-                remarks=f"Bulk created from policy: {policy.leave_policy_name}",
-            )
-
-            created.append({
-                "id": allocation.id,
-                "employee_id": employee_id,
-                "leave_type": detail.leave_type,
-                "total_allocated": float(detail.annual_allocation or 0),
-            })
-
+    result = HRBulkService(db).create_leave_allocations(
+        payload.employee_ids,
+        policy,
+        payload.from_date,
+        payload.to_date,
+        company=payload.company,
+        user_id=current_user.id if current_user else None,
+    )
     db.commit()
+    created, skipped = result.succeeded, result.skipped
     return {
         "created": len(created),
         "skipped": len(skipped),
@@ -877,9 +822,22 @@ def create_leave_application(
     if payload.total_leave_days is not None and payload.total_leave_days < 0:
         raise HTTPException(status_code=400, detail="total_leave_days must be non-negative")
 
+    leave_type_info = get_leave_type_constraints(db, payload.leave_type_id) if payload.leave_type_id else None
+
+    # Count working days from the holiday calendar when the client leaves it to us
+    total_leave_days = payload.total_leave_days
+    if "total_leave_days" not in payload.model_fields_set:
+        total_leave_days = count_leave_days(
+            db,
+            payload.from_date,
+            payload.to_date,
+            company=payload.company,
+            include_holidays=bool(leave_type_info and leave_type_info["include_holiday"]),
+            half_day=bool(payload.half_day),
+        )
+
     # Validate leave type constraints if leave_type_id is provided
     if payload.leave_type_id and payload.employee_id:
-        leave_type_info = get_leave_type_constraints(db, payload.leave_type_id)
         if leave_type_info:
             # Check max continuous days
             if leave_type_info["max_continuous_days_allowed"] > 0:
@@ -895,7 +853,7 @@ def create_leave_application(
                 available_balance = get_leave_balance(
                     db, payload.employee_id, payload.leave_type_id, payload.from_date
                 )
-                requested = payload.total_leave_days or Decimal("0")
+                requested = total_leave_days or Decimal("0")
                 if requested > available_balance:
                     raise HTTPException(
                         status_code=400,
@@ -924,7 +882,7 @@ def create_leave_application(
         posting_date=payload.posting_date,
         half_day=payload.half_day or False,
         half_day_date=payload.half_day_date,
-        total_leave_days=decimal_or_default(payload.total_leave_days),
+        total_leave_days=decimal_or_default(total_leave_days),
         description=payload.description,
         leave_approver=payload.leave_approver,
         leave_approver_name=payload.leave_approver_name,
@@ -1087,6 +1045,7 @@ def approve_leave_application(
                 application.leave_type_id,
                 application.from_date,
                 days_to_deduct,
+                application_id=application.id,
             )
             if not balance_updated:
                 raise HTTPException(
@@ -1163,6 +1122,7 @@ def cancel_leave_application(
                 application.leave_type_id,
                 application.from_date,
                 days_to_restore,  # Positive to restore
+                application_id=application.id,
             )
             if not balance_restored:
                 balance_restore_warning = "Leave balance could not be restored: no active allocation found for this period"
@@ -1202,71 +1162,12 @@ def bulk_approve_leave_applications(
     current_user: User = Depends(get_current_principal),
 ) -> Dict[str, Any]:
     """Bulk approve leave applications."""
-    updated = 0
-    skipped: List[Dict[str, Any]] = []
-    audit = AuditLogger(db)
-    now = datetime.utcnow()
-
-    for app_id in payload.application_ids:
-        application = db.query(LeaveApplication).filter(LeaveApplication.id == app_id).first()
-        if not application or application.status != LeaveApplicationStatus.OPEN:
-            skipped.append({"application_id": app_id, "reason": "Not open or not found"})
-            continue
-
-        # Get leave type constraints once per iteration
-        lt_info = None
-        is_lwp = False
-        if application.leave_type_id:
-            lt_info = get_leave_type_constraints(db, application.leave_type_id)
-            is_lwp = lt_info.get("is_lwp", False) if lt_info else False
-
-        # Re-validate balance (skip for LWP)
-        if application.leave_type_id and application.employee_id and not is_lwp:
-            available_balance = get_leave_balance(
-                db, application.employee_id, application.leave_type_id, application.from_date
-            )
-            requested = application.total_leave_days or Decimal("0")
-            if requested > available_balance:
-                skipped.append({
-                    "application_id": app_id,
-                    "reason": "Insufficient balance",
-                    "available": float(available_balance),
-                    "requested": float(requested),
-                })
-                continue
-
-        # Deduct balance first (before status change) for non-LWP types
-        if application.employee_id and application.leave_type_id and not is_lwp:
-            days_to_deduct = -(application.total_leave_days or Decimal("0"))
-            allocation_updated = update_allocation_balance(
-                db,
-                application.employee_id,
-                application.leave_type_id,
-                application.from_date,
-                days_to_deduct,
-            )
-            if not allocation_updated:
-                skipped.append({
-                    "application_id": app_id,
-                    "reason": "No allocation covering dates",
-                })
-                continue
-
-        # Only update status after successful allocation deduction
-        application.status = LeaveApplicationStatus.APPROVED
-        application.status_changed_by_id = current_user.id if current_user else None
-        application.status_changed_at = now
-        application.updated_by_id = current_user.id if current_user else None
-
-        audit.log_approve(
-            doctype="leave_application",
-            document_id=application.id,
-            user_id=current_user.id if current_user else None,
-            document_name=f"{application.employee} - {application.leave_type}",
-            remarks="Bulk approval: open to approved",
-        )
-        updated += 1
+    result = HRBulkService(db).approve_leave_applications(
+        payload.application_ids,
+        user_id=current_user.id if current_user else None,
+    )
     db.commit()
+    updated, skipped = len(result.succeeded), result.skipped
     return {
         "updated": updated,
         "requested": len(payload.application_ids),
@@ -1281,27 +1182,10 @@ def bulk_reject_leave_applications(
     current_user: User = Depends(get_current_principal),
 ) -> Dict[str, Any]:
     """Bulk reject leave applications."""
-    updated = 0
-    audit = AuditLogger(db)
-    now = datetime.utcnow()
-
-    for app_id in payload.application_ids:
-        application = db.query(LeaveApplication).filter(LeaveApplication.id == app_id).first()
-        if application and application.status == LeaveApplicationStatus.OPEN:
-            old_status = application.status
-            application.status = LeaveApplicationStatus.REJECTED
-            application.status_changed_by_id = current_user.id if current_user else None
-            application.status_changed_at = now
-            application.updated_by_id = current_user.id if current_user else None
-
-            audit.log_reject(
-                doctype="leave_application",
-                document_id=application.id,
-                user_id=current_user.id if current_user else None,
-                document_name=f"{application.employee} - {application.leave_type}",
-                remarks=f"Bulk rejection: {old_status.value} to rejected",
-            )
-            updated += 1
+    updated = HRBulkService(db).reject_leave_applications(
+        payload.application_ids,
+        user_id=current_user.id if current_user else None,
+    )
     db.commit()
     return {"updated": updated, "requested": len(payload.application_ids)}
 
@@ -1443,6 +1327,7 @@ def create_holiday_list(
             db.add(holiday)
 
     db.commit()
+    invalidate_holiday_calendars()
     return get_holiday_list(holiday_list.id, db)
 
 
@@ -1482,6 +1367,7 @@ def update_holiday_list(
         holiday_list.total_holidays = len(payload.holidays)
 
     db.commit()
+    invalidate_holiday_calendars()
     return get_holiday_list(holiday_list.id, db)
 
 
@@ -1497,6 +1383,7 @@ def delete_holiday_list(
 
     db.delete(holiday_list)
     db.commit()
+    invalidate_holiday_calendars()
     return {"message": "Holiday list deleted", "id": list_id}
 
 
@@ -13,6 +13,7 @@ from app.auth import Require, get_current_principal, Principal
 from app.database import get_db
 from app.models.employee import Employee, EmploymentStatus
 from app.models.hr import Department, Designation, ERPNextUser, HDTeam, HDTeamMember
+from app.validators import HierarchyTable, validate_no_circular_reference
 
 router = APIRouter()
 
@@ -253,6 +254,10 @@ def update_employee(
     update_data = payload.model_dump(exclude_unset=True)
     if "status" in update_data and update_data["status"]:
         update_data["status"] = EmploymentStatus(update_data["status"])
+    if "reports_to_id" in update_data and not validate_no_circular_reference(
+        db, HierarchyTable.EMPLOYEES, employee.id, update_data["reports_to_id"]
+    ):
+        raise HTTPException(status_code=400, detail="Cannot set manager: would create circular reference")
 
     for key, value in update_data.items():
         setattr(employee, key, value)
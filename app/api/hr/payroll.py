@@ -4,7 +4,8 @@ Payroll Management Router
 Endpoints for SalaryComponent, SalaryStructure, SalaryStructureAssignment, PayrollEntry, SalarySlip.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Dict, Any, Optional, List
@@ -12,9 +13,9 @@ from datetime import date, datetime
 from decimal import Decimal
 from pydantic import BaseModel, Field
 
-from app.database import get_db
+from app.config import settings
+from app.database import SessionLocal, get_db
 from app.auth import Require, get_current_principal
-from app.feature_flags import feature_flags
 from app.models.auth import User
 from app.services.audit_logger import AuditLogger, serialize_for_audit
 from app.models.hr_payroll import (
@@ -25,13 +26,14 @@ from app.models.hr_payroll import (
     SalaryStructureDeduction,
     SalaryStructureAssignment,
     PayrollEntry,
+    PayrollRun,
+    PayrollRunStatus,
     SalarySlip,
     SalarySlipStatus,
     SalarySlipEarning,
     SalarySlipDeduction,
 )
-from app.models.employee import Employee
-from .helpers import decimal_or_default, csv_response, validate_date_order, status_counts, now
+from .helpers import decimal_or_default, validate_date_order, status_counts, now
 from app.api.integrations.transfers import get_transfer_client, generate_transfer_reference
 from app.models.transfer import Transfer, TransferType, TransferStatus
 from app.models.gateway_transaction import GatewayProvider
@@ -40,7 +42,14 @@ from app.models.hr_payroll import SalarySlipStatus
 from app.integrations.payments.config import get_payment_settings
 
 # Nigerian Tax Integration
-from app.api.tax.payroll_integration import calculate_slip_deductions, STATUTORY_COMPONENTS
+from app.services.payroll_run_service import PayrollRunError, PayrollRunService
+from app.services.export_service import OPENPYXL_AVAILABLE, PYARROW_AVAILABLE, ExportService
+from app.services.payroll_export import (
+    PayrollExport,
+    iter_export_rows,
+    payroll_register_export,
+    salary_slip_export,
+)
 
 router = APIRouter()
 
@@ -1018,6 +1027,51 @@ def list_salary_slips(
     }
 
 
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _check_export_format(format: str) -> None:
+    """Reject formats whose optional writer is not installed before streaming starts."""
+    if format == "xlsx" and not OPENPYXL_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Excel export not available (install openpyxl)")
+    if format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet export not available (install pyarrow)")
+
+
+def _iso_dates(rows: Any) -> Any:
+    for row in rows:
+        yield [v.isoformat() if isinstance(v, (date, datetime)) else v for v in row]
+
+
+def _export_response(export: PayrollExport, format: str, filename: str, sheet_title: str) -> StreamingResponse:
+    """Stream an export as CSV, XLSX or Parquet."""
+    rows = iter_export_rows(export)
+    export_service = ExportService()
+    body: Any
+    if format == "xlsx":
+        body = export_service.stream_xlsx(export.header, rows, sheet_title=sheet_title)
+    elif format == "parquet":
+        body = export_service.stream_parquet(export.header, export.types, rows)
+    else:
+        body = export_service.stream_csv(export.header, _iso_dates(rows))
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+
+def _salary_slip_status_filter(status: str) -> Any:
+    try:
+        return SalarySlip.status == SalarySlipStatus(status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+
+
 @router.get("/salary-slips/export", dependencies=[Depends(Require("hr:read"))])
 def export_salary_slips(
     employee_id: Optional[int] = None,
@@ -1025,53 +1079,23 @@ def export_salary_slips(
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
     company: Optional[str] = None,
-    db: Session = Depends(get_db),
+    format: str = Query(default="csv", pattern="^(csv|xlsx|parquet)$"),
 ):
-    """Export salary slips to CSV."""
-    query = db.query(SalarySlip)
+    """Export salary slips as CSV, XLSX or Parquet, streamed in batches."""
+    _check_export_format(format)
+    filters: List[Any] = []
     if employee_id:
-        query = query.filter(SalarySlip.employee_id == employee_id)
+        filters.append(SalarySlip.employee_id == employee_id)
     if status:
-        try:
-            status_enum = SalarySlipStatus(status)
-            query = query.filter(SalarySlip.status == status_enum)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+        filters.append(_salary_slip_status_filter(status))
     if from_date:
-        query = query.filter(SalarySlip.start_date >= from_date)
+        filters.append(SalarySlip.start_date >= from_date)
     if to_date:
-        query = query.filter(SalarySlip.end_date <= to_date)
+        filters.append(SalarySlip.end_date <= to_date)
     if company:
-        query = query.filter(SalarySlip.company.ilike(f"%{company}%"))
+        filters.append(SalarySlip.company.ilike(f"%{company}%"))
 
-    rows: List[List[Any]] = [[
-        "id",
-        "employee",
-        "employee_name",
-        "posting_date",
-        "start_date",
-        "end_date",
-        "gross_pay",
-        "total_deduction",
-        "net_pay",
-        "status",
-        "company",
-    ]]
-    for s in query.order_by(SalarySlip.posting_date.desc()).all():
-        rows.append([
-            s.id,
-            s.employee,
-            s.employee_name or "",
-            s.posting_date.isoformat() if s.posting_date else "",
-            s.start_date.isoformat() if s.start_date else "",
-            s.end_date.isoformat() if s.end_date else "",
-            float(s.gross_pay or 0),
-            float(s.total_deduction or 0),
-            float(s.net_pay or 0),
-            s.status.value if s.status else "",
-            s.company or "",
-        ])
-    return csv_response(rows, "salary_slips.csv")
+    return _export_response(salary_slip_export(filters), format, "salary_slips", "Salary Slips")
 
 
 @router.get("/salary-slips/summary", dependencies=[Depends(Require("hr:read"))])
@@ -1451,328 +1475,123 @@ def generate_payroll_slips(
     An assignment is considered active for the period if:
     - assignment.from_date <= entry.end_date (assignment started before period ends)
     - There is no newer assignment for the same employee that starts before entry.end_date
+    Slips are generated in chunks by the payroll run engine; for large
+    payrolls prefer POST /payroll-entries/{entry_id}/runs, which does the
+    same work on a background worker.
     """
     entry = db.query(PayrollEntry).filter(PayrollEntry.id == entry_id).first()
     if not entry:
         raise HTTPException(status_code=404, detail="Payroll entry not found")
 
-    if entry.salary_slips_created:
-        raise HTTPException(status_code=400, detail="Salary slips already created for this entry")
+    service = PayrollRunService(db)
+    try:
+        run = service.start(entry.id, created_by_id=current_user.id if current_user else None)
+    except PayrollRunError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Build query with proper date filtering
-    query = db.query(SalaryStructureAssignment).filter(
-        SalaryStructureAssignment.from_date <= entry.end_date,
-    )
+    created: List[Dict[str, Any]] = []
+    run = service.run(run.id, created_details=created)
+    if run.status != PayrollRunStatus.COMPLETED:
+        raise HTTPException(status_code=500, detail=f"Payroll run {run.id} failed: {run.error_message}")
 
-    # Apply company filter from payroll entry
-    if entry.company:
-        query = query.filter(SalaryStructureAssignment.company == entry.company)
+    return {
+        "run_id": run.id,
+        "created": len(created),
+        "skipped": run.skipped_count,
+        "created_details": created,
+        "skipped_details": run.skipped_details or [],
+    }
 
-    # Apply department/designation filters by joining with Employee
-    if entry.department or entry.designation:
-        query = query.join(
-            Employee, SalaryStructureAssignment.employee_id == Employee.id
-        )
-        if entry.department:
-            query = query.filter(Employee.department == entry.department)
-        if entry.designation:
-            query = query.filter(Employee.designation == entry.designation)
-
-    assignments = query.all()
-
-    # Filter to only the most recent assignment per employee
-    # (in case of multiple assignments, take the one with latest from_date before period)
-    employee_assignments: Dict[int, SalaryStructureAssignment] = {}
-    for assignment in assignments:
-        if assignment.employee_id is None:
-            continue
-        existing = employee_assignments.get(assignment.employee_id)
-        if existing is None or (assignment.from_date and existing.from_date and assignment.from_date > existing.from_date):
-            employee_assignments[assignment.employee_id] = assignment
-
-    assignments = list(employee_assignments.values())
-    created = []
-    skipped = []
-    audit = AuditLogger(db)
 
-    for assignment in assignments:
-        # Check if slip already exists for this employee and period
-        existing_slip = db.query(SalarySlip).filter(
-            SalarySlip.employee_id == assignment.employee_id,
-            SalarySlip.start_date == entry.start_date,
-            SalarySlip.end_date == entry.end_date,
-        ).first()
-
-        if existing_slip:
-            skipped.append({
-                "employee_id": assignment.employee_id,
-                "employee": assignment.employee,
-                "reason": "Salary slip already exists",
-            })
-            continue
-
-        # Get salary structure with earnings and deductions
-        structure = db.query(SalaryStructure).filter(
-            SalaryStructure.id == assignment.salary_structure_id
-        ).first()
-
-        if not structure:
-            skipped.append({
-                "employee_id": assignment.employee_id,
-                "employee": assignment.employee,
-                "reason": "Salary structure not found",
-            })
-            continue
-
-        # Calculate totals from structure and categorize earnings
-        gross_pay = Decimal("0")
-        basic_salary = Decimal("0")
-        housing_allowance = Decimal("0")
-        transport_allowance = Decimal("0")
-        other_allowances = Decimal("0")
-        structure_deductions = Decimal("0")
-
-        # Categorize earnings for tax calculation
-        for earning in structure.earnings:
-            if earning.statistical_component or earning.do_not_include_in_total:
-                continue
-            amount = earning.amount or Decimal("0")
-            gross_pay += amount
-            comp_name = (earning.salary_component or "").lower()
-
-            if "basic" in comp_name:
-                basic_salary += amount
-            elif "housing" in comp_name:
-                housing_allowance += amount
-            elif "transport" in comp_name:
-                transport_allowance += amount
-            else:
-                other_allowances += amount
-
-        # If no basic salary component found, use base from assignment
-        if basic_salary == Decimal("0") and assignment.base:
-            basic_salary = assignment.base
-
-        # Get employee for employment type
-        employee = db.query(Employee).filter(Employee.id == assignment.employee_id).first()
-        employment_type = None
-        months_of_service = None
-        if employee:
-            # Use enum value if available, otherwise fall back to string field
-            if hasattr(employee, 'employment_type_enum') and employee.employment_type_enum:
-                employment_type = employee.employment_type_enum.value if hasattr(employee.employment_type_enum, 'value') else str(employee.employment_type_enum)
-            else:
-                employment_type = employee.employment_type
-
-            # Calculate months of service for pension eligibility
-            if employee.date_of_joining:
-                from datetime import datetime
-                today = entry.posting_date or datetime.now().date()
-                delta = today - employee.date_of_joining.date() if hasattr(employee.date_of_joining, 'date') else today - employee.date_of_joining
-                months_of_service = delta.days // 30
-
-        if feature_flags.NIGERIA_COMPLIANCE_ENABLED:
-            # Calculate statutory deductions using Nigerian tax module
-            # Respects employment type eligibility (e.g., INTERN, NYSC exempt from some deductions)
-            statutory = calculate_slip_deductions(
-                basic_salary=basic_salary,
-                housing_allowance=housing_allowance,
-                transport_allowance=transport_allowance,
-                other_allowances=other_allowances,
-                employment_type=employment_type,
-                months_of_service=months_of_service,
-                db=db,
-                payroll_date=entry.posting_date,
-            )
-        else:
-            statutory = {
-                "paye": Decimal("0"),
-                "pension_employee": Decimal("0"),
-                "pension_employer": Decimal("0"),
-                "nhf": Decimal("0"),
-                "nhis_employee": Decimal("0"),
-                "nhis_employer": Decimal("0"),
-                "nsitf_employer": Decimal("0"),
-                "itf_provision": Decimal("0"),
-                "total_employee_deductions": Decimal("0"),
-                "total_employer_contributions": Decimal("0"),
-                "net_pay": gross_pay,
-                "gross_monthly": gross_pay,
-                "is_paye_exempt": True,
-                "eligibility": {
-                    "paye": False,
-                    "pension": False,
-                    "nhf": False,
-                    "nhis": False,
-                    "nsitf": False,
-                    "itf": False,
-                },
-            }
+def _run_payroll_inline(run_id: int) -> None:
+    """Fallback runner used when no Celery broker is configured."""
+    db = SessionLocal()
+    try:
+        PayrollRunService(db).run(run_id)
+    finally:
+        db.close()
 
-        # Sum non-statutory deductions from structure
-        for deduction in structure.deductions:
-            if not deduction.statistical_component and not deduction.do_not_include_in_total:
-                # Skip statutory components that we'll add from tax calc
-                comp_name = (deduction.salary_component or "").lower()
-                if any(x in comp_name for x in ["paye", "pension", "nhf", "nhis"]):
-                    continue
-                structure_deductions += deduction.amount or Decimal("0")
-
-        # Total deduction = statutory + structure deductions
-        total_deduction = statutory["total_employee_deductions"] + structure_deductions
-        net_pay = gross_pay - total_deduction
-
-        # Create salary slip
-        slip = SalarySlip(
-            employee=assignment.employee,
-            employee_id=assignment.employee_id,
-            employee_name=assignment.employee_name,
-            salary_structure=structure.salary_structure_name,
-            posting_date=entry.posting_date,
-            start_date=entry.start_date,
-            end_date=entry.end_date,
-            payroll_frequency=structure.payroll_frequency,
-            company=entry.company or structure.company,
-            currency=entry.currency or structure.currency,
-            gross_pay=gross_pay,
-            total_deduction=total_deduction,
-            net_pay=net_pay,
-            rounded_total=net_pay,
-            status=SalarySlipStatus.DRAFT,
-            payroll_entry=f"PAYROLL-{entry.id}",
-            created_by_id=current_user.id if current_user else None,
-        )
-        db.add(slip)
-        db.flush()
 
-        # Copy earnings from structure
-        for idx, earning in enumerate(structure.earnings):
-            slip_earning = SalarySlipEarning(
-                salary_slip_id=slip.id,
-                salary_component=earning.salary_component,
-                abbr=earning.abbr,
-                amount=earning.amount or Decimal("0"),
-                default_amount=earning.amount or Decimal("0"),
-                statistical_component=earning.statistical_component,
-                do_not_include_in_total=earning.do_not_include_in_total,
-                idx=idx,
-            )
-            db.add(slip_earning)
+def _enqueue_payroll_run(run: PayrollRun, db: Session, background_tasks: BackgroundTasks) -> None:
+    if settings.redis_url:
+        from app.tasks.payroll_tasks import run_payroll_run
 
-        # Add statutory deductions from Nigerian tax calculation
-        deduction_idx = 0
+        task = run_payroll_run.delay(run.id)
+        run.task_id = task.id
+        db.commit()
+    else:
+        background_tasks.add_task(_run_payroll_inline, run.id)
 
-        # PAYE (only if not exempt)
-        if statutory["paye"] > Decimal("0"):
-            slip_deduction = SalarySlipDeduction(
-                salary_slip_id=slip.id,
-                salary_component=STATUTORY_COMPONENTS["PAYE"]["name"],
-                abbr=STATUTORY_COMPONENTS["PAYE"]["abbr"],
-                amount=statutory["paye"],
-                default_amount=statutory["paye"],
-                statistical_component=False,
-                do_not_include_in_total=False,
-                idx=deduction_idx,
-            )
-            db.add(slip_deduction)
-            deduction_idx += 1
 
-        # Pension - Employee
-        if statutory["pension_employee"] > Decimal("0"):
-            slip_deduction = SalarySlipDeduction(
-                salary_slip_id=slip.id,
-                salary_component=STATUTORY_COMPONENTS["PENSION_EMPLOYEE"]["name"],
-                abbr=STATUTORY_COMPONENTS["PENSION_EMPLOYEE"]["abbr"],
-                amount=statutory["pension_employee"],
-                default_amount=statutory["pension_employee"],
-                statistical_component=False,
-                do_not_include_in_total=False,
-                idx=deduction_idx,
-            )
-            db.add(slip_deduction)
-            deduction_idx += 1
+def _payroll_run_to_response(run: PayrollRun) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "payroll_entry_id": run.payroll_entry_id,
+        "status": run.status.value,
+        "task_id": run.task_id,
+        "total_employees": run.total_employees,
+        "processed_employees": run.processed_employees,
+        "progress_percent": run.progress_percent,
+        "created": run.created_count,
+        "skipped": run.skipped_count,
+        "skipped_details": run.skipped_details or [],
+        "error_message": run.error_message,
+        "created_at": run.created_at.isoformat() if run.created_at else None,
+        "started_at": run.started_at.isoformat() if run.started_at else None,
+        "completed_at": run.completed_at.isoformat() if run.completed_at else None,
+    }
 
-        # NHF
-        if statutory["nhf"] > Decimal("0"):
-            slip_deduction = SalarySlipDeduction(
-                salary_slip_id=slip.id,
-                salary_component=STATUTORY_COMPONENTS["NHF"]["name"],
-                abbr=STATUTORY_COMPONENTS["NHF"]["abbr"],
-                amount=statutory["nhf"],
-                default_amount=statutory["nhf"],
-                statistical_component=False,
-                do_not_include_in_total=False,
-                idx=deduction_idx,
-            )
-            db.add(slip_deduction)
-            deduction_idx += 1
 
-        # NHIS - Employee
-        if statutory["nhis_employee"] > Decimal("0"):
-            slip_deduction = SalarySlipDeduction(
-                salary_slip_id=slip.id,
-                salary_component=STATUTORY_COMPONENTS["NHIS_EMPLOYEE"]["name"],
-                abbr=STATUTORY_COMPONENTS["NHIS_EMPLOYEE"]["abbr"],
-                amount=statutory["nhis_employee"],
-                default_amount=statutory["nhis_employee"],
-                statistical_component=False,
-                do_not_include_in_total=False,
-                idx=deduction_idx,
-            )
-            db.add(slip_deduction)
-            deduction_idx += 1
-
-        # Add non-statutory deductions from structure (skip statutory ones)
-        for deduction in structure.deductions:
-            comp_name = (deduction.salary_component or "").lower()
-            # Skip statutory components already added
-            if any(x in comp_name for x in ["paye", "pension", "nhf", "nhis"]):
-                continue
-            slip_deduction = SalarySlipDeduction(
-                salary_slip_id=slip.id,
-                salary_component=deduction.salary_component,
-                abbr=deduction.abbr,
-                amount=deduction.amount or Decimal("0"),
-                default_amount=deduction.amount or Decimal("0"),
-                statistical_component=deduction.statistical_component,
-                do_not_include_in_total=deduction.do_not_include_in_total,
-                idx=deduction_idx,
-            )
-            db.add(slip_deduction)
-            deduction_idx += 1
-
-        created.append({
-            "id": slip.id,
-            "employee": assignment.employee,
-            "employee_id": assignment.employee_id,
-            "gross_pay": float(gross_pay),
-            "net_pay": float(net_pay),
-            "paye": float(statutory["paye"]),
-            "pension": float(statutory["pension_employee"]),
-            "is_paye_exempt": statutory["is_paye_exempt"],
-        })
-
-    # Mark entry as having slips created
-    entry.salary_slips_created = True
-    entry.updated_by_id = current_user.id if current_user else None
+@router.post("/payroll-entries/{entry_id}/runs", status_code=202, dependencies=[Depends(Require("hr:write"))])
+def start_payroll_run(
+    entry_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_principal),
+) -> Dict[str, Any]:
+    """Queue background salary slip generation for a payroll entry."""
+    entry = db.query(PayrollEntry).filter(PayrollEntry.id == entry_id).first()
+    if not entry:
+        raise HTTPException(status_code=404, detail="Payroll entry not found")
 
-    # Log audit
-    audit.log_create(
-        doctype="payroll_entry",
-        document_id=entry.id,
-        new_values={"slip_count": len(created)},
-        user_id=current_user.id if current_user else None,
-        document_name=f"Payroll {entry.start_date} to {entry.end_date}",
-        remarks=f"Generated {len(created)} salary slips",
-    )
+    try:
+        run = PayrollRunService(db).start(entry.id, created_by_id=current_user.id if current_user else None)
+    except PayrollRunError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _enqueue_payroll_run(run, db, background_tasks)
+    return _payroll_run_to_response(run)
 
-    db.commit()
-    return {
-        "created": len(created),
-        "skipped": len(skipped),
-        "created_details": created,
-        "skipped_details": skipped,
-    }
+
+@router.get("/payroll-runs/{run_id}", dependencies=[Depends(Require("hr:read"))])
+def get_payroll_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Get payroll run status and progress."""
+    run = PayrollRunService(db).get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Payroll run not found")
+    return _payroll_run_to_response(run)
+
+
+@router.post("/payroll-runs/{run_id}/resume", status_code=202, dependencies=[Depends(Require("hr:write"))])
+def resume_payroll_run(
+    run_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Re-queue a failed or interrupted payroll run from its last committed chunk."""
+    service = PayrollRunService(db)
+    if not service.get_run(run_id):
+        raise HTTPException(status_code=404, detail="Payroll run not found")
+    try:
+        run = service.resume(run_id)
+    except PayrollRunError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _enqueue_payroll_run(run, db, background_tasks)
+    return _payroll_run_to_response(run)
 
 
 @router.post("/payroll-entries/{entry_id}/regenerate-slips", dependencies=[Depends(Require("hr:write"))])
@@ -2170,55 +1989,27 @@ def export_payroll_register(
     end_date: date,
     company: Optional[str] = None,
     status: Optional[str] = None,
+    format: str = Query(default="csv", pattern="^(csv|xlsx|parquet)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_principal),
 ) -> Any:
     """
-    Export payroll register as CSV for a date range.
+    Export payroll register for a date range as CSV, XLSX or Parquet.
 
-    Returns a CSV with all salary slip details for the period.
+    One row per salary slip with its totals and a column per earning and
+    deduction component, pivoted in the database and streamed in batches.
     """
-    query = db.query(SalarySlip).filter(
+    _check_export_format(format)
+    filters: List[Any] = [
         SalarySlip.start_date >= start_date,
         SalarySlip.end_date <= end_date,
-    )
-
+    ]
     if company:
-        query = query.filter(SalarySlip.company.ilike(f"%{company}%"))
+        filters.append(SalarySlip.company.ilike(f"%{company}%"))
     if status:
-        try:
-            status_enum = SalarySlipStatus(status)
-            query = query.filter(SalarySlip.status == status_enum)
-        except ValueError:
-            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+        filters.append(_salary_slip_status_filter(status))
 
-    slips = query.order_by(SalarySlip.employee, SalarySlip.start_date).all()
-
-    # Build CSV rows
-    headers = [
-        "Employee ID", "Employee", "Employee Name", "Department", "Designation",
-        "Period Start", "Period End", "Gross Pay", "Total Deduction", "Net Pay",
-        "Status", "Payment Reference", "Paid At", "Company"
-    ]
-    rows: List[List[Any]] = [headers]
-
-    for slip in slips:
-        rows.append([
-            slip.employee_id or "",
-            slip.employee,
-            slip.employee_name or "",
-            slip.department or "",
-            slip.designation or "",
-            slip.start_date.isoformat() if slip.start_date else "",
-            slip.end_date.isoformat() if slip.end_date else "",
-            float(slip.gross_pay) if slip.gross_pay else 0,
-            float(slip.total_deduction) if slip.total_deduction else 0,
-            float(slip.net_pay) if slip.net_pay else 0,
-            slip.status.value if slip.status else "",
-            slip.payment_reference or "",
-            slip.paid_at.isoformat() if slip.paid_at else "",
-            slip.company or "",
-        ])
+    export = payroll_register_export(db, filters)
 
     # Log export audit
     audit = AuditLogger(db)
@@ -2227,7 +2018,10 @@ def export_payroll_register(
         document_id=0,
         user_id=current_user.id if current_user else None,
         document_name=f"Payroll Register {start_date} to {end_date}",
-        remarks=f"Exported {len(slips)} salary slips",
+        remarks=f"Exported {export.count(db)} salary slips",
     )
+    db.commit()
 
-    return csv_response(rows, f"payroll_register_{start_date}_{end_date}.csv")
+    return _export_response(
+        export, format, f"payroll_register_{start_date}_{end_date}", "Payroll Register"
+    )
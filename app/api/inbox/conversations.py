@@ -23,8 +23,7 @@ from app.api.inbox.websocket import (
     broadcast_assignment,
     broadcast_conversation_update,
     broadcast_new_message,
-    broadcast_stats_update,
-    build_inbox_stats_snapshot,
+    request_stats_update,
 )
 from app.models.agent import Agent, Team
 from app.models.ticket import Ticket, TicketStatus, TicketPriority
@@ -309,7 +308,7 @@ async def update_conversation(
         conversation_payload,
         assigned_agent_id=conv.assigned_agent_id,
     )
-    await broadcast_stats_update(build_inbox_stats_snapshot(db))
+    request_stats_update()
 
     return conversation_payload
 
@@ -361,7 +360,7 @@ async def assign_conversation(
         )
     else:
         await broadcast_conversation_update(conversation_payload)
-    await broadcast_stats_update(build_inbox_stats_snapshot(db))
+    request_stats_update()
 
     return conversation_payload
 
@@ -413,7 +412,7 @@ async def send_reply(
         conversation_payload,
         assigned_agent_id=conv.assigned_agent_id,
     )
-    await broadcast_stats_update(build_inbox_stats_snapshot(db))
+    request_stats_update()
 
     return message_payload
 
@@ -449,7 +448,7 @@ async def mark_conversation_read(
         conversation_payload,
         assigned_agent_id=conv.assigned_agent_id,
     )
-    await broadcast_stats_update(build_inbox_stats_snapshot(db))
+    request_stats_update()
 
     return {"success": True, "conversation_id": conversation_id}
 
@@ -577,7 +576,7 @@ async def delete_conversation(
         serialize_conversation(conv),
         assigned_agent_id=conv.assigned_agent_id,
     )
-    await broadcast_stats_update(build_inbox_stats_snapshot(db))
+    request_stats_update()
 
     return None
 
@@ -602,6 +601,6 @@ async def archive_conversation(
         serialize_conversation(conv),
         assigned_agent_id=conv.assigned_agent_id,
     )
-    await broadcast_stats_update(build_inbox_stats_snapshot(db))
+    request_stats_update()
 
     return {"success": True, "conversation_id": conversation_id}
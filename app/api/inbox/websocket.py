@@ -3,13 +3,16 @@ Inbox WebSocket API
 
 Real-time updates for inbox conversations, messages, and stats.
 """
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
-from typing import Dict, Set, Any, Optional
-import json
 import asyncio
+import json
+from collections import OrderedDict
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Query
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
 
 from app.auth import (
     AUTH_COOKIE_NAME,
@@ -25,16 +28,104 @@ from app.config import settings
 import structlog
 
 ws_logger = structlog.get_logger("inbox.websocket")
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.omni import OmniConversation
+from app.services.inbox_backplane import (
+    CONTROL_STATS_REFRESH,
+    STATS_REFRESH_KEY,
+    InboxBackplane,
+    InboxEvent,
+    Target,
+    inbox_message,
+)
 
 router = APIRouter()
 
 
+def coalesce_key(message: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """
+    Key under which a queued message may be replaced by a newer one.
+
+    Stats and conversation updates are full snapshots, so a client that has
+    not received the previous one yet only needs the latest.
+    """
+    event = message.get("event")
+    if event == InboxEvent.STATS_UPDATE:
+        return (event,)
+    if event == InboxEvent.CONVERSATION_UPDATE:
+        conversation_id = (message.get("data") or {}).get("id")
+        if conversation_id is not None:
+            return (event, conversation_id)
+    return None
+
+
+class ConnectionSendQueue:
+    """Outgoing messages for one connection, drained by its own task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_failure: Callable[[WebSocket], None],
+        max_pending: int = 200,
+        send_timeout: float = 10.0,
+    ) -> None:
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.coalesced = 0
+        self._on_failure = on_failure
+        self._pending: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._drain())
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def push(self, message: Dict[str, Any]) -> bool:
+        """Queue a message; returns False when the client has fallen too far behind."""
+        key = coalesce_key(message)
+        if key is not None and key in self._pending:
+            self._pending[key] = message
+            self.coalesced += 1
+            return True
+        if len(self._pending) >= self.max_pending:
+            return False
+        if key is None:
+            self._seq += 1
+            key = ("_seq", self._seq)
+        self._pending[key] = message
+        self._wakeup.set()
+        return True
+
+    def close(self) -> None:
+        self._task.cancel()
+
+    async def _drain(self) -> None:
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._pending:
+                    _, message = self._pending.popitem(last=False)
+                    await asyncio.wait_for(self.websocket.send_json(message), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._on_failure(self.websocket)
+
+
 class InboxConnectionManager:
-    """Manages WebSocket connections for inbox real-time updates."""
+    """
+    Manages WebSocket connections for inbox real-time updates.
 
-    def __init__(self) -> None:
+    Connections are local to this worker; events from other workers and
+    Celery arrive through the backplane and are fanned out with deliver().
+    Each connection has its own send queue, so a slow client only delays
+    itself.
+    """
+
+    def __init__(self, max_pending: int = 200, send_timeout: float = 10.0) -> None:
         # Connections grouped by channel
         self.active_connections: Dict[str, Set[WebSocket]] = {
             "stats": set(),         # Dashboard stats updates
@@ -49,6 +140,12 @@ class InboxConnectionManager:
         self.connection_channels: Dict[WebSocket, Set[str]] = {}
         self.connection_users: Dict[WebSocket, str] = {}
         self.connection_agents: Dict[WebSocket, int] = {}
+        self.queues: Dict[WebSocket, ConnectionSendQueue] = {}
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.dropped_slow_clients = 0
+        # Called with the local agent ids whenever they change
+        self.on_presence_change: Optional[Callable[[Set[int]], None]] = None
 
     async def connect(
         self,
@@ -59,6 +156,9 @@ class InboxConnectionManager:
     ) -> None:
         """Accept a new WebSocket connection."""
         await websocket.accept()
+        self.queues[websocket] = ConnectionSendQueue(
+            websocket, self._drop, max_pending=self.max_pending, send_timeout=self.send_timeout
+        )
 
         # Add to channel
         if channel in self.active_connections:
@@ -72,8 +172,11 @@ class InboxConnectionManager:
 
         # Track agent-specific connection
         if agent_id:
+            is_new_agent = agent_id not in self.agent_connections
             self.agent_connections.setdefault(agent_id, set()).add(websocket)
             self.connection_agents[websocket] = agent_id
+            if is_new_agent:
+                self._presence_changed()
 
     def subscribe(self, websocket: WebSocket, channel: str) -> bool:
         """Subscribe a connection to an additional channel."""
@@ -86,6 +189,10 @@ class InboxConnectionManager:
 
     def disconnect(self, websocket: WebSocket) -> None:
         """Remove a WebSocket connection from all tracking structures."""
+        queue = self.queues.pop(websocket, None)
+        if queue is not None:
+            queue.close()
+
         channels = self.connection_channels.pop(websocket, set())
         for channel in channels:
             if channel in self.active_connections:
@@ -102,46 +209,46 @@ class InboxConnectionManager:
             self.agent_connections[agent_id].discard(websocket)
             if not self.agent_connections[agent_id]:
                 del self.agent_connections[agent_id]
-
-    async def broadcast_to_channel(self, channel: str, message: Dict[str, Any]) -> None:
-        """Broadcast message to all connections in a channel."""
-        if channel not in self.active_connections:
+                self._presence_changed()
+
+    def send(self, websocket: WebSocket, message: Dict[str, Any]) -> None:
+        """Queue a message for one connection."""
+        queue = self.queues.get(websocket)
+        if queue is not None and not queue.push(message):
+            self._drop(websocket)
+
+    def deliver(self, targets: List[Target], message: Dict[str, Any]) -> int:
+        """
+        Queue a message for every local connection matched by any target.
+
+        A connection matched by several targets receives the message once.
+        Returns the number of connections it was queued for.
+        """
+        recipients: Set[WebSocket] = set()
+        for target in targets:
+            if "channel" in target:
+                recipients.update(self.active_connections.get(target["channel"], ()))
+            elif "agent_id" in target:
+                recipients.update(self.agent_connections.get(target["agent_id"], ()))
+            elif "user_id" in target:
+                recipients.update(self.user_connections.get(target["user_id"], ()))
+
+        for websocket in recipients:
+            self.send(websocket, message)
+        return len(recipients)
+
+    def _drop(self, websocket: WebSocket) -> None:
+        """Disconnect a client that failed or fell too far behind."""
+        if websocket not in self.queues:
             return
+        self.dropped_slow_clients += 1
+        ws_logger.warning("websocket_client_dropped", agent_id=self.connection_agents.get(websocket))
+        self.disconnect(websocket)
+        asyncio.get_running_loop().create_task(_close_quietly(websocket))
 
-        disconnected = []
-        for connection in list(self.active_connections[channel]):
-            try:
-                await connection.send_json(message)
-            except Exception:
-                disconnected.append(connection)
-
-        # Clean up disconnected
-        for conn in disconnected:
-            self.disconnect(conn)
-
-    async def broadcast_to_agent(self, agent_id: int, message: Dict[str, Any]) -> None:
-        """Broadcast message to all connections for a specific agent."""
-        if agent_id not in self.agent_connections:
-            return
-
-        disconnected = []
-        for connection in list(self.agent_connections[agent_id]):
-            try:
-                await connection.send_json(message)
-            except Exception:
-                disconnected.append(connection)
-
-        for conn in disconnected:
-            self.disconnect(conn)
-
-    async def send_to_user(self, user_id: str, message: Dict[str, Any]) -> None:
-        """Send message to a specific user."""
-        if user_id in self.user_connections:
-            for connection in list(self.user_connections[user_id]):
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    self.disconnect(connection)
+    def _presence_changed(self) -> None:
+        if self.on_presence_change is not None:
+            self.on_presence_change(set(self.agent_connections))
 
     def get_stats(self) -> Dict[str, Any]:
         """Get connection statistics."""
@@ -152,32 +259,130 @@ class InboxConnectionManager:
             },
             "users_connected": len(self.user_connections),
             "agents_with_connections": len(self.agent_connections),
+            "queued_messages": sum(len(queue) for queue in self.queues.values()),
+            "coalesced_messages": sum(queue.coalesced for queue in self.queues.values()),
+            "dropped_slow_clients": self.dropped_slow_clients,
+            "backplane": backplane.transport,
         }
 
 
+async def _close_quietly(websocket: WebSocket) -> None:
+    try:
+        # 1013: try again later; the client reconnects and resyncs over REST
+        await websocket.close(code=1013)
+    except Exception:
+        pass
+
+
+class InboxStatsRefresher:
+    """
+    Debounced stats broadcasts.
+
+    Requests within one window cost a single recompute for the whole
+    deployment: the first worker to request takes a shared lease, waits out
+    the window and broadcasts; requests meeting a held lease are covered by
+    that broadcast.
+    """
+
+    def __init__(
+        self,
+        backplane: InboxBackplane,
+        compute: Callable[[], Dict[str, Any]],
+        window: float = 1.0,
+    ) -> None:
+        self.backplane = backplane
+        self.compute = compute
+        self.window = window
+        self.refreshes = 0
+        self._pending = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def request(self) -> None:
+        if self._pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._pending = True
+        task = loop.create_task(self._refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self) -> None:
+        try:
+            if not await self.backplane.claim(STATS_REFRESH_KEY, self.window):
+                return
+            await asyncio.sleep(self.window)
+        finally:
+            self._pending = False
+        try:
+            stats = await run_in_threadpool(self.compute)
+            stats["agents_online"] = await self.backplane.agents_online(stats["agents_online"])
+            self.refreshes += 1
+            await self.backplane.publish(
+                [{"channel": "stats"}],
+                inbox_message(InboxEvent.STATS_UPDATE, stats),
+            )
+        except Exception as e:
+            ws_logger.error("inbox_stats_refresh_failed", error=str(e))
+
+
+def _on_control(control: str) -> None:
+    if control == CONTROL_STATS_REFRESH:
+        stats_refresher.request()
+
+
+def _on_presence_change(agent_ids: Set[int]) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(backplane.set_presence(agent_ids))
+
+
 # Global connection manager
 manager = InboxConnectionManager()
+backplane = InboxBackplane(manager.deliver, on_control=_on_control)
+stats_refresher = InboxStatsRefresher(backplane, lambda: _compute_inbox_stats())
+manager.on_presence_change = _on_presence_change
+
+_presence_task: Optional[asyncio.Task] = None
+
 
+async def _refresh_presence() -> None:
+    while True:
+        await asyncio.sleep(InboxBackplane.PRESENCE_TTL / 3)
+        await backplane.set_presence(set(manager.agent_connections))
 
-# Event types for inbox
-class InboxEvent:
-    STATS_UPDATE = "stats_update"
-    CONVERSATION_UPDATE = "conversation_update"
-    CONVERSATION_ASSIGNED = "conversation_assigned"
-    NEW_MESSAGE = "new_message"
-    MESSAGE_READ = "message_read"
-    STATUS_CHANGED = "status_changed"
-    PRIORITY_CHANGED = "priority_changed"
+
+async def start_inbox_realtime() -> None:
+    """Subscribe this worker to the inbox backplane (called at startup)."""
+    global _presence_task
+    await backplane.start()
+    _presence_task = asyncio.create_task(_refresh_presence())
+
+
+async def stop_inbox_realtime() -> None:
+    """Unsubscribe from the backplane and stop background tasks."""
+    global _presence_task
+    if _presence_task is not None:
+        _presence_task.cancel()
+        _presence_task = None
+    await backplane.stop()
 
 
 async def broadcast_stats_update(stats: Dict[str, Any]) -> None:
     """Broadcast updated inbox stats to all stats subscribers."""
-    message = {
-        "event": InboxEvent.STATS_UPDATE,
-        "data": stats,
-        "timestamp": datetime.utcnow().isoformat(),
-    }
-    await manager.broadcast_to_channel("stats", message)
+    await backplane.publish(
+        [{"channel": "stats"}],
+        inbox_message(InboxEvent.STATS_UPDATE, stats),
+    )
+
+
+def request_stats_update() -> None:
+    """Schedule a debounced stats broadcast after an inbox change."""
+    stats_refresher.request()
 
 
 async def broadcast_conversation_update(
@@ -185,18 +390,11 @@ async def broadcast_conversation_update(
     assigned_agent_id: Optional[int] = None,
 ) -> None:
     """Broadcast a conversation update."""
-    message = {
-        "event": InboxEvent.CONVERSATION_UPDATE,
-        "data": conversation_data,
-        "timestamp": datetime.utcnow().isoformat(),
-    }
-
-    # Broadcast to conversations channel
-    await manager.broadcast_to_channel("conversations", message)
-
+    targets: List[Target] = [{"channel": "conversations"}]
     # If assigned to agent, also notify them
     if assigned_agent_id:
-        await manager.broadcast_to_agent(assigned_agent_id, message)
+        targets.append({"agent_id": assigned_agent_id})
+    await backplane.publish(targets, inbox_message(InboxEvent.CONVERSATION_UPDATE, conversation_data))
 
 
 async def broadcast_new_message(
@@ -205,21 +403,17 @@ async def broadcast_new_message(
     assigned_agent_id: Optional[int] = None,
 ) -> None:
     """Broadcast a new message notification."""
-    message = {
-        "event": InboxEvent.NEW_MESSAGE,
-        "data": {
-            "conversation_id": conversation_id,
-            "message": message_data,
-        },
-        "timestamp": datetime.utcnow().isoformat(),
-    }
-
-    # Broadcast to messages channel
-    await manager.broadcast_to_channel("messages", message)
-
+    targets: List[Target] = [{"channel": "messages"}]
     # If conversation assigned, notify agent
     if assigned_agent_id:
-        await manager.broadcast_to_agent(assigned_agent_id, message)
+        targets.append({"agent_id": assigned_agent_id})
+    await backplane.publish(
+        targets,
+        inbox_message(InboxEvent.NEW_MESSAGE, {
+            "conversation_id": conversation_id,
+            "message": message_data,
+        }),
+    )
 
 
 async def broadcast_assignment(
@@ -228,69 +422,54 @@ async def broadcast_assignment(
     conversation_data: Dict[str, Any],
 ) -> None:
     """Broadcast when a conversation is assigned to an agent."""
-    message = {
-        "event": InboxEvent.CONVERSATION_ASSIGNED,
-        "data": {
+    # Notify the assigned agent, and the conversations channel for dashboards
+    await backplane.publish(
+        [{"agent_id": agent_id}, {"channel": "conversations"}],
+        inbox_message(InboxEvent.CONVERSATION_ASSIGNED, {
             "conversation_id": conversation_id,
             "agent_id": agent_id,
             "conversation": conversation_data,
-        },
-        "timestamp": datetime.utcnow().isoformat(),
-    }
-
-    # Notify the assigned agent
-    await manager.broadcast_to_agent(agent_id, message)
-
-    # Also broadcast to conversations channel for dashboard updates
-    await manager.broadcast_to_channel("conversations", message)
+        }),
+    )
 
 
 def build_inbox_stats_snapshot(db: Session) -> Dict[str, Any]:
-    """Compute lightweight inbox stats for live updates."""
-    open_count = (
-        db.query(func.count(OmniConversation.id))
-        .filter(OmniConversation.status == "open")
-        .scalar()
-    ) or 0
-
-    pending_count = (
-        db.query(func.count(OmniConversation.id))
-        .filter(OmniConversation.status == "pending")
-        .scalar()
-    ) or 0
-
-    resolved_count = (
-        db.query(func.count(OmniConversation.id))
-        .filter(OmniConversation.status == "resolved")
-        .scalar()
-    ) or 0
-
-    total_unread = (
-        db.query(func.sum(OmniConversation.unread_count))
-        .filter(OmniConversation.status.in_(["open", "pending"]))
-        .scalar()
-    ) or 0
-
-    unassigned_count = (
-        db.query(func.count(OmniConversation.id))
-        .filter(
-            OmniConversation.status.in_(["open", "pending"]),
-            OmniConversation.assigned_agent_id.is_(None),
-            OmniConversation.assigned_team_id.is_(None),
-        )
-        .scalar()
-    ) or 0
+    """Compute lightweight inbox stats for live updates in one query."""
+    active = OmniConversation.status.in_(["open", "pending"])
+
+    def count_where(condition: Any) -> Any:
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    row = db.query(
+        count_where(OmniConversation.status == "open"),
+        count_where(OmniConversation.status == "pending"),
+        count_where(OmniConversation.status == "resolved"),
+        count_where(
+            active
+            & OmniConversation.assigned_agent_id.is_(None)
+            & OmniConversation.assigned_team_id.is_(None)
+        ),
+        func.coalesce(func.sum(case((active, OmniConversation.unread_count), else_=0)), 0),
+    ).one()
 
     return {
-        "open_count": open_count,
-        "pending_count": pending_count,
-        "resolved_count": resolved_count,
-        "unassigned_count": unassigned_count,
-        "total_unread": total_unread,
+        "open_count": int(row[0]),
+        "pending_count": int(row[1]),
+        "resolved_count": int(row[2]),
+        "unassigned_count": int(row[3]),
+        "total_unread": int(row[4]),
         "agents_online": manager.get_stats().get("agents_with_connections", 0),
     }
 
 
+def _compute_inbox_stats() -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        return build_inbox_stats_snapshot(db)
+    finally:
+        db.close()
+
+
 async def authenticate_inbox_websocket(
     websocket: WebSocket,
     db: Session,
@@ -419,8 +598,9 @@ async def inbox_websocket(
     await manager.connect(websocket, channel, user_id=user_id, agent_id=agent_id)
 
     try:
-        # Send initial connection confirmation
-        await websocket.send_json({
+        # Replies go through the connection's send queue so they never
+        # interleave with broadcasts being written by its drain task
+        manager.send(websocket, {
             "event": "connected",
             "channel": channel,
             "agent_id": agent_id,
@@ -428,7 +608,7 @@ async def inbox_websocket(
         })
 
         # Keep connection alive and handle incoming messages
-        while True:
+        while websocket in manager.queues:
             try:
                 data = await asyncio.wait_for(
                     websocket.receive_text(),
@@ -438,17 +618,17 @@ async def inbox_websocket(
                 try:
                     message = json.loads(data)
                     if message.get("type") == "ping":
-                        await websocket.send_json({"type": "pong"})
+                        manager.send(websocket, {"type": "pong"})
                     elif message.get("type") == "subscribe":
                         # Allow subscribing to additional channels
                         new_channel = message.get("channel")
                         if new_channel and manager.subscribe(websocket, new_channel):
-                            await websocket.send_json({
+                            manager.send(websocket, {
                                 "type": "subscribed",
                                 "channel": new_channel,
                             })
                         else:
-                            await websocket.send_json({
+                            manager.send(websocket, {
                                 "type": "error",
                                 "message": "invalid_channel",
                             })
@@ -457,9 +637,11 @@ async def inbox_websocket(
 
             except asyncio.TimeoutError:
                 # Send heartbeat
-                await websocket.send_json({"type": "heartbeat"})
+                manager.send(websocket, {"type": "heartbeat"})
 
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 
@@ -1,7 +1,7 @@
 """Inventory API endpoints for stock management."""
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, and_, desc
@@ -10,7 +10,8 @@ from datetime import datetime, date
 from decimal import Decimal
 import structlog
 
-from app.database import get_db
+from app.config import settings
+from app.database import SessionLocal, get_db
 from app.auth import Require, get_current_principal, Principal
 from app.models.inventory import (
     Warehouse,
@@ -22,6 +23,7 @@ from app.models.inventory import (
     LandedCostTax,
 )
 from app.models.sales import Item, ItemGroup
+from app.services.inventory_valuation_service import InventoryValuationService
 from pydantic import validator
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
@@ -1255,6 +1257,32 @@ async def get_stock_summary(
 
 # ============= INVENTORY VALUATION =============
 
+def _sync_inventory_valuation_inline() -> None:
+    """Fallback runner used when no Celery broker is configured."""
+    db = SessionLocal()
+    try:
+        InventoryValuationService(db).sync()
+    finally:
+        db.close()
+
+
+@router.post("/valuation-report/sync", status_code=202, dependencies=[Depends(Require("inventory:write"))])
+async def sync_inventory_valuation(background_tasks: BackgroundTasks) -> Dict[str, Any]:
+    """Queue applying newly posted stock ledger entries to the valuation cost layers.
+
+    The valuation sync also runs on a schedule; use this after bulk stock
+    postings that should show up in the valuation report immediately.
+    """
+    if settings.redis_url:
+        from app.tasks.inventory_tasks import sync_inventory_valuation as sync_task
+
+        task = sync_task.delay()
+        return {"message": "Inventory valuation sync enqueued", "task_id": task.id, "backend": "celery"}
+
+    background_tasks.add_task(_sync_inventory_valuation_inline)
+    return {"message": "Inventory valuation sync started", "backend": "background"}
+
+
 @router.get("/valuation-report", dependencies=[Depends(Require("inventory:read"))])
 async def get_inventory_valuation_report(
     as_of_date: Optional[str] = Query(None, description="Valuation as of date (YYYY-MM-DD)"),
@@ -1275,104 +1303,35 @@ async def get_inventory_valuation_report(
     - Weighted Average
 
     Returns detailed valuation per item and warehouse with cost analysis.
+    Reads the maintained cost layers; new stock ledger entries are applied
+    by the scheduled valuation sync (or POST /valuation-report/sync).
     """
     as_of = _parse_date(as_of_date, "as_of_date") or date.today()
 
-    # Build base query for stock as of date
-    sle_query = db.query(
-        StockLedgerEntry.item_code,
-        StockLedgerEntry.warehouse,
-        func.sum(StockLedgerEntry.actual_qty).label("qty"),
-        func.sum(StockLedgerEntry.stock_value_difference).label("total_value"),
-    ).filter(
-        StockLedgerEntry.is_cancelled == False,
-        StockLedgerEntry.posting_date <= as_of,
-    )
-
-    if warehouse:
-        sle_query = sle_query.filter(StockLedgerEntry.warehouse == warehouse)
-
-    sle_query = sle_query.group_by(
-        StockLedgerEntry.item_code,
-        StockLedgerEntry.warehouse,
+    service = InventoryValuationService(db)
+    frame = _apply_valuation_method(
+        service.valuation_frame(as_of, warehouse=warehouse, item_group=item_group),
+        valuation_method,
     )
 
-    stock_data = sle_query.all()
-
-    # Get item master data
-    item_codes = list(set(row.item_code for row in stock_data if row.item_code))
-    items_query = db.query(Item).filter(Item.item_code.in_(item_codes))
-
-    if item_group:
-        items_query = items_query.filter(Item.item_group == item_group)
-
-    items_map = {item.item_code: item for item in items_query.all()}
-
-    # Calculate valuation for each item/warehouse combination
-    valuation_data = []
-    total_qty = Decimal("0")
-    total_value = Decimal("0")
-
-    for row in stock_data:
-        if row.item_code not in items_map:
-            continue
-
-        item = items_map[row.item_code]
-        qty = Decimal(str(row.qty or 0))
-
-        if not include_zero_stock and qty <= 0:
-            continue
-
-        # Get valuation rate based on method
-        if valuation_method == "fifo":
-            # For FIFO, use earliest incoming rates still in stock
-            val_rate = _calculate_fifo_rate(db, row.item_code, row.warehouse, as_of, qty)
-        elif valuation_method == "lifo":
-            # For LIFO, use latest incoming rates
-            val_rate = _calculate_lifo_rate(db, row.item_code, row.warehouse, as_of, qty)
-        else:
-            # Weighted average - use current valuation rate
-            latest_sle = db.query(StockLedgerEntry).filter(
-                StockLedgerEntry.item_code == row.item_code,
-                StockLedgerEntry.warehouse == row.warehouse,
-                StockLedgerEntry.is_cancelled == False,
-                StockLedgerEntry.posting_date <= as_of,
-            ).order_by(desc(StockLedgerEntry.posting_date), desc(StockLedgerEntry.id)).first()
-            val_rate = Decimal(str(latest_sle.valuation_rate or 0)) if latest_sle else Decimal("0")
-
-        stock_value = qty * val_rate
-
-        valuation_data.append({
-            "item_code": row.item_code,
-            "item_name": item.item_name,
-            "item_group": item.item_group,
-            "warehouse": row.warehouse,
-            "quantity": float(qty),
-            "uom": item.stock_uom,
-            "valuation_rate": float(val_rate),
-            "stock_value": float(stock_value),
-            "standard_rate": float(item.standard_rate or 0),
-            "last_purchase_rate": float(item.last_purchase_rate or 0) if hasattr(item, 'last_purchase_rate') else None,
-        })
-
-        total_qty += qty
-        total_value += stock_value
+    if not include_zero_stock:
+        frame = frame[frame["quantity"] > 0]
 
     # Sort by value descending
-    valuation_data.sort(key=lambda x: x["stock_value"], reverse=True)
-
-    # Apply pagination
-    paginated = valuation_data[offset:offset + limit]
+    frame = frame.sort_values("stock_value", ascending=False, kind="stable")
+    total_qty = float(frame["quantity"].sum())
+    total_value = float(frame["stock_value"].sum())
 
     # Group by item group for summary
-    by_group: Dict[str, Dict[str, Any]] = {}
-    for item_data in valuation_data:
-        group = item_data["item_group"] or "Uncategorized"
-        if group not in by_group:
-            by_group[group] = {"total_qty": 0, "total_value": 0, "item_count": 0}
-        by_group[group]["total_qty"] += item_data["quantity"]
-        by_group[group]["total_value"] += item_data["stock_value"]
-        by_group[group]["item_count"] += 1
+    by_group = (
+        frame.assign(item_group=frame["item_group"].fillna("Uncategorized"))
+        .groupby("item_group", sort=False)
+        .agg(item_count=("item_code", "size"), total_qty=("quantity", "sum"), total_value=("stock_value", "sum"))
+        .sort_values("total_value", ascending=False)
+    )
+
+    # Apply pagination
+    paginated = frame.iloc[offset:offset + limit][VALUATION_REPORT_COLUMNS]
 
     return {
         "as_of_date": as_of.isoformat(),
@@ -1380,108 +1339,63 @@ async def get_inventory_valuation_report(
         "warehouse_filter": warehouse,
         "item_group_filter": item_group,
         "summary": {
-            "total_items": len(valuation_data),
-            "total_quantity": float(total_qty),
-            "total_value": float(total_value),
+            "total_items": len(frame),
+            "total_quantity": total_qty,
+            "total_value": total_value,
             "by_item_group": [
                 {
                     "item_group": group,
-                    "item_count": data["item_count"],
-                    "total_qty": data["total_qty"],
-                    "total_value": data["total_value"],
-                    "percent_of_total": round(data["total_value"] / float(total_value) * 100, 2) if total_value > 0 else 0,
+                    "item_count": int(row.item_count),
+                    "total_qty": float(row.total_qty),
+                    "total_value": float(row.total_value),
+                    "percent_of_total": round(float(row.total_value) / total_value * 100, 2) if total_value > 0 else 0,
                 }
-                for group, data in sorted(by_group.items(), key=lambda x: x[1]["total_value"], reverse=True)
+                for group, row in by_group.iterrows()
             ],
         },
-        "total": len(valuation_data),
+        "total": len(frame),
         "offset": offset,
         "limit": limit,
-        "items": paginated,
+        "items": [
+            {**record, "last_purchase_rate": None}
+            for record in paginated.astype(object).where(paginated.notna(), None).to_dict("records")
+        ],
     }
 
 
-def _calculate_fifo_rate(db: Session, item_code: str, warehouse: str, as_of: date, qty_needed: Decimal) -> Decimal:
-    """Calculate FIFO valuation rate by taking earliest receipts first."""
-    # Get all incoming transactions (positive actual_qty) in chronological order
-    receipts = db.query(StockLedgerEntry).filter(
-        StockLedgerEntry.item_code == item_code,
-        StockLedgerEntry.warehouse == warehouse,
-        StockLedgerEntry.is_cancelled == False,
-        StockLedgerEntry.posting_date <= as_of,
-        StockLedgerEntry.actual_qty > 0,
-    ).order_by(StockLedgerEntry.posting_date.asc(), StockLedgerEntry.id.asc()).all()
-
-    # Get total consumed qty
-    total_consumed = db.query(func.sum(StockLedgerEntry.actual_qty)).filter(
-        StockLedgerEntry.item_code == item_code,
-        StockLedgerEntry.warehouse == warehouse,
-        StockLedgerEntry.is_cancelled == False,
-        StockLedgerEntry.posting_date <= as_of,
-        StockLedgerEntry.actual_qty < 0,
-    ).scalar() or Decimal("0")
-    total_consumed = abs(Decimal(str(total_consumed)))
-
-    # FIFO: consume from earliest receipts
-    remaining_consumed = total_consumed
-    fifo_layers = []
-
-    for receipt in receipts:
-        receipt_qty = Decimal(str(receipt.actual_qty))
-        if remaining_consumed >= receipt_qty:
-            # This entire receipt is consumed
-            remaining_consumed -= receipt_qty
-        else:
-            # Part or all of this receipt remains
-            remaining_qty = receipt_qty - remaining_consumed
-            remaining_consumed = Decimal("0")
-            fifo_layers.append({
-                "qty": remaining_qty,
-                "rate": Decimal(str(receipt.incoming_rate or receipt.valuation_rate or 0)),
-            })
-
-    # Calculate weighted average of remaining layers for qty_needed
-    if not fifo_layers:
-        return Decimal("0")
-
-    total_value = Decimal("0")
-    qty_allocated = Decimal("0")
-
-    for layer in fifo_layers:
-        take_qty = min(layer["qty"], qty_needed - qty_allocated)
-        total_value += take_qty * layer["rate"]
-        qty_allocated += take_qty
-        if qty_allocated >= qty_needed:
-            break
-
-    return total_value / qty_allocated if qty_allocated > 0 else Decimal("0")
-
-
-def _calculate_lifo_rate(db: Session, item_code: str, warehouse: str, as_of: date, qty_needed: Decimal) -> Decimal:
-    """Calculate LIFO valuation rate by taking latest receipts first."""
-    # Get all incoming transactions in reverse chronological order
-    receipts = db.query(StockLedgerEntry).filter(
-        StockLedgerEntry.item_code == item_code,
-        StockLedgerEntry.warehouse == warehouse,
-        StockLedgerEntry.is_cancelled == False,
-        StockLedgerEntry.posting_date <= as_of,
-        StockLedgerEntry.actual_qty > 0,
-    ).order_by(StockLedgerEntry.posting_date.desc(), StockLedgerEntry.id.desc()).all()
+VALUATION_REPORT_COLUMNS = [
+    "item_code",
+    "item_name",
+    "item_group",
+    "warehouse",
+    "quantity",
+    "uom",
+    "valuation_rate",
+    "stock_value",
+    "standard_rate",
+]
 
-    # For LIFO, take from latest receipts
-    total_value = Decimal("0")
-    qty_allocated = Decimal("0")
 
-    for receipt in receipts:
-        receipt_qty = Decimal(str(receipt.actual_qty))
-        take_qty = min(receipt_qty, qty_needed - qty_allocated)
-        rate = Decimal(str(receipt.incoming_rate or receipt.valuation_rate or 0))
-        total_value += take_qty * rate
-        qty_allocated += take_qty
-        if qty_allocated >= qty_needed:
-            break
+def _apply_valuation_method(frame: Any, valuation_method: str) -> Any:
+    """Add quantity, uom, valuation_rate and stock_value columns for the chosen method.
 
-    return total_value / qty_allocated if qty_allocated > 0 else Decimal("0")
+    FIFO/LIFO value the remaining cost layers; weighted_average uses the
+    moving-average rate. Items without stock on hand have no layers, so their
+    FIFO/LIFO rate is zero.
+    """
+    qty = frame["qty"].astype(float)
+    if valuation_method in ("fifo", "lifo"):
+        layer_value = frame[f"{valuation_method}_value"].astype(float)
+        in_stock = qty > 0
+        rate = (layer_value / qty.where(in_stock)).where(in_stock, 0.0)
+    else:
+        rate = frame["moving_average_rate"].astype(float)
+    return frame.assign(
+        quantity=qty,
+        uom=frame["stock_uom"],
+        valuation_rate=rate,
+        stock_value=qty * rate,
+    )
 
 
 @router.get("/valuation-report/{item_code}", dependencies=[Depends(Require("inventory:read"))])
@@ -1498,49 +1412,21 @@ async def get_item_valuation_detail(
     if not item or item.disabled:
         raise HTTPException(status_code=404, detail="Item not found")
 
-    # Get stock by warehouse
-    stock_by_warehouse = db.query(
-        StockLedgerEntry.warehouse,
-        func.sum(StockLedgerEntry.actual_qty).label("qty"),
-    ).filter(
-        StockLedgerEntry.item_code == item_code,
-        StockLedgerEntry.is_cancelled == False,
-        StockLedgerEntry.posting_date <= as_of,
-    ).group_by(StockLedgerEntry.warehouse).all()
-
-    warehouses_data = []
-    total_qty = Decimal("0")
-    total_value = Decimal("0")
+    service = InventoryValuationService(db)
+    frame = _apply_valuation_method(service.valuation_frame(as_of, item_code=item_code), valuation_method)
+    frame = frame[frame["quantity"] > 0]
 
-    for wh_row in stock_by_warehouse:
-        qty = Decimal(str(wh_row.qty or 0))
-        if qty <= 0:
-            continue
-
-        # Calculate valuation rate
-        if valuation_method == "fifo":
-            val_rate = _calculate_fifo_rate(db, item_code, wh_row.warehouse, as_of, qty)
-        elif valuation_method == "lifo":
-            val_rate = _calculate_lifo_rate(db, item_code, wh_row.warehouse, as_of, qty)
-        else:
-            latest_sle = db.query(StockLedgerEntry).filter(
-                StockLedgerEntry.item_code == item_code,
-                StockLedgerEntry.warehouse == wh_row.warehouse,
-                StockLedgerEntry.is_cancelled == False,
-                StockLedgerEntry.posting_date <= as_of,
-            ).order_by(desc(StockLedgerEntry.posting_date)).first()
-            val_rate = Decimal(str(latest_sle.valuation_rate or 0)) if latest_sle else Decimal("0")
-
-        stock_value = qty * val_rate
-        total_qty += qty
-        total_value += stock_value
-
-        warehouses_data.append({
-            "warehouse": wh_row.warehouse,
-            "quantity": float(qty),
-            "valuation_rate": float(val_rate),
-            "stock_value": float(stock_value),
-        })
+    total_qty = Decimal(str(frame["quantity"].sum()))
+    total_value = Decimal(str(frame["stock_value"].sum()))
+    warehouses_data = [
+        {
+            "warehouse": row.warehouse,
+            "quantity": float(row.quantity),
+            "valuation_rate": float(row.valuation_rate),
+            "stock_value": float(row.stock_value),
+        }
+        for row in frame.itertuples()
+    ]
 
     # Get cost layers (recent receipts)
     cost_layers = db.query(StockLedgerEntry).filter(
@@ -19,6 +19,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 
 from app.database import get_db
+from app.services.payroll_engine import invalidate_payroll_rules
 from app.auth import Require, get_current_principal
 from app.models.auth import User
 from app.models.payroll_config import (
@@ -253,6 +254,7 @@ def create_region(
     )
     db.add(region)
     db.commit()
+    invalidate_payroll_rules()
     db.refresh(region)
 
     return {"id": region.id, "code": region.code, "name": region.name}
@@ -282,6 +284,7 @@ def update_region(
         setattr(region, key, value)
 
     db.commit()
+    invalidate_payroll_rules()
     db.refresh(region)
 
     return {"id": region.id, "code": region.code, "name": region.name, "updated": True}
@@ -307,6 +310,7 @@ def delete_region(
 
     db.delete(region)
     db.commit()
+    invalidate_payroll_rules()
 
     return {"id": region_id, "deleted": True}
 
@@ -580,6 +584,7 @@ def create_rule(
             db.add(band)
 
     db.commit()
+    invalidate_payroll_rules()
     db.refresh(rule)
 
     return {"id": rule.id, "code": rule.code, "name": rule.name}
@@ -641,6 +646,7 @@ def update_rule(
         setattr(rule, key, value)
 
     db.commit()
+    invalidate_payroll_rules()
     db.refresh(rule)
 
     return {"id": rule.id, "code": rule.code, "name": rule.name, "updated": True}
@@ -661,6 +667,7 @@ def delete_rule(
 
     db.delete(rule)
     db.commit()
+    invalidate_payroll_rules()
 
     return {"id": rule_id, "deleted": True}
 
@@ -691,6 +698,7 @@ def add_tax_band(
     )
     db.add(band)
     db.commit()
+    invalidate_payroll_rules()
     db.refresh(band)
 
     return {
@@ -714,6 +722,7 @@ def delete_tax_band(
 
     db.delete(band)
     db.commit()
+    invalidate_payroll_rules()
 
     return {"id": band_id, "deleted": True}
 
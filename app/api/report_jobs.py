@@ -0,0 +1,225 @@
+"""
+Background report job API endpoints.
+
+Heavy accounting and tax reports are computed by a Celery worker instead of
+inside the request:
+- Submit a report job (identical requests share one job/result)
+- Poll job progress
+- Download the stored result as JSON, CSV or PDF
+"""
+from typing import Any, Dict, List, Optional
+
+import structlog
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app.api.tax.deps import SINGLE_COMPANY
+from app.auth import Principal, Require, get_current_principal
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.models.report_job import ReportJob, ReportJobStatus
+from app.services.report_job_service import (
+    REPORT_DEFINITIONS,
+    TAX_REPORT_TYPES,
+    ReportJobError,
+    ReportJobService,
+)
+
+logger = structlog.get_logger()
+
+router = APIRouter(
+    prefix="/report-jobs",
+    tags=["Report Jobs"],
+    dependencies=[Depends(Require("books:read"))],
+)
+
+
+# ============================================================================
+# Schemas
+# ============================================================================
+
+class SubmitReportJobRequest(BaseModel):
+    report_type: str = Field(..., description="Report type (see GET /report-jobs/types)")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Report parameters")
+    force: bool = Field(False, description="Recompute even if a stored result exists")
+
+
+class ReportJobResponse(BaseModel):
+    id: int
+    report_type: str
+    params: Optional[Dict[str, Any]]
+    status: str
+    progress_percent: float
+    progress_message: Optional[str]
+    result_size: Optional[int]
+    result_compressed_size: Optional[int]
+    error_message: Optional[str]
+    created_at: Optional[str]
+    started_at: Optional[str]
+    completed_at: Optional[str]
+    expires_at: Optional[str]
+
+
+class SubmitReportJobResponse(ReportJobResponse):
+    deduplicated: bool
+
+
+class ReportTypeInfo(BaseModel):
+    report_type: str
+    description: str
+    formats: List[str]
+
+
+# ============================================================================
+# Helper functions
+# ============================================================================
+
+def _job_to_response(job: ReportJob) -> Dict[str, Any]:
+    """Convert ReportJob to a response dict."""
+    return dict(
+        id=job.id,
+        report_type=job.report_type,
+        params=job.params,
+        status=job.status.value,
+        progress_percent=job.progress_percent or 0.0,
+        progress_message=job.progress_message,
+        result_size=job.result_size,
+        result_compressed_size=job.result_compressed_size,
+        error_message=job.error_message,
+        created_at=job.created_at.isoformat() if job.created_at else None,
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        completed_at=job.completed_at.isoformat() if job.completed_at else None,
+        expires_at=job.expires_at.isoformat() if job.expires_at else None,
+    )
+
+
+def _check_report_access(report_type: str, principal: Principal) -> None:
+    """Accounting statements additionally require accounting:read."""
+    if report_type not in TAX_REPORT_TYPES and not principal.has_scope("accounting:read"):
+        raise HTTPException(status_code=403, detail="Permission denied. Required: accounting:read")
+
+
+def _run_inline(job_id: int) -> None:
+    """Fallback runner used when no Celery broker is configured."""
+    db = SessionLocal()
+    try:
+        ReportJobService(db).run(job_id)
+    finally:
+        db.close()
+
+
+def _enqueue(job: ReportJob, db: Session, background_tasks: BackgroundTasks) -> None:
+    if settings.redis_url:
+        from app.tasks.report_tasks import run_report_job
+
+        task = run_report_job.delay(job.id)
+        job.task_id = task.id
+        db.commit()
+    else:
+        background_tasks.add_task(_run_inline, job.id)
+
+
+def _get_job_or_404(db: Session, job_id: int, principal: Principal) -> ReportJob:
+    job = ReportJobService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    _check_report_access(job.report_type, principal)
+    return job
+
+
+# ============================================================================
+# Endpoints
+# ============================================================================
+
+@router.get("/types", response_model=List[ReportTypeInfo])
+def list_report_types() -> List[ReportTypeInfo]:
+    """List reports that can be run as background jobs."""
+    return [
+        ReportTypeInfo(
+            report_type=d.report_type,
+            description=d.description,
+            formats=["json", "csv", "pdf"] if d.exportable else ["json"],
+        )
+        for d in REPORT_DEFINITIONS.values()
+    ]
+
+
+@router.post("", response_model=SubmitReportJobResponse, status_code=202)
+def submit_report_job(
+    payload: SubmitReportJobRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal),
+) -> Dict[str, Any]:
+    """Enqueue a report job and return its id.
+
+    Identical report requests (same type and parameters) return the existing
+    in-flight job or stored result instead of computing the report again.
+    """
+    if payload.report_type not in REPORT_DEFINITIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown report type: {payload.report_type}")
+    _check_report_access(payload.report_type, principal)
+
+    params = dict(payload.params)
+    if payload.report_type in TAX_REPORT_TYPES:
+        # Single-tenant: company scope is fixed, never user-provided
+        params["company"] = SINGLE_COMPANY
+
+    service = ReportJobService(db)
+    try:
+        job, created = service.submit(
+            payload.report_type,
+            params,
+            created_by_id=principal.id if principal.type == "user" else None,
+            force=payload.force,
+        )
+    except ReportJobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if created:
+        _enqueue(job, db, background_tasks)
+
+    return {**_job_to_response(job), "deduplicated": not created}
+
+
+@router.get("/{job_id}", response_model=ReportJobResponse)
+def get_report_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal),
+) -> Dict[str, Any]:
+    """Get report job status and progress."""
+    return _job_to_response(_get_job_or_404(db, job_id, principal))
+
+
+@router.get("/{job_id}/download")
+def download_report_job(
+    job_id: int,
+    format: str = Query("json", description="Download format: json, csv or pdf"),
+    filename: Optional[str] = Query(None, description="Override download filename (without extension)"),
+    db: Session = Depends(get_db),
+    principal: Principal = Depends(get_current_principal),
+) -> Response:
+    """Download a completed report job result."""
+    from app.services.export_service import ExportError
+
+    if format not in ("json", "csv", "pdf"):
+        raise HTTPException(status_code=400, detail="Format must be 'json', 'csv' or 'pdf'")
+
+    job = _get_job_or_404(db, job_id, principal)
+    if job.status != ReportJobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status.value}")
+
+    try:
+        content, media_type, extension = ReportJobService(db).render(job, format)
+    except (ReportJobError, ExportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    base_filename = filename or f"{job.report_type}_{job.id}"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{base_filename}.{extension}"'},
+    )
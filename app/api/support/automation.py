@@ -3,7 +3,6 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Dict, Any, Optional, List, cast
-from enum import Enum
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, field_validator
@@ -21,6 +20,7 @@ from app.models.support_automation import (
 from app.models.ticket import Ticket
 from app.auth import Require
 from app.cache import cached, CACHE_TTL
+from app.services.rule_compiler import compile_rule, resolve_field
 
 router = APIRouter()
 
@@ -336,46 +336,19 @@ def test_rule(
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    # Evaluate conditions (simplified - full logic in automation_executor)
+    # Evaluate conditions with the same compiled predicates the executor uses
+    compiled = compile_rule(rule.id, 0, rule.conditions)
+    would_match = compiled.matches(ticket)
     conditions_result = []
-    would_match = True
-
-    if rule.conditions:
-        for condition in rule.conditions:
-            field = condition.get("field", "")
-            operator = condition.get("operator", "")
-            value = condition.get("value")
-
-            # Get ticket field value
-            ticket_value = getattr(ticket, field, None)
-            if isinstance(ticket_value, Enum):
-                ticket_value = ticket_value.value
-
-            # Simple evaluation
-            matched = False
-            if operator == "equals":
-                matched = str(ticket_value) == str(value)
-            elif operator == "not_equals":
-                matched = str(ticket_value) != str(value)
-            elif operator == "contains":
-                matched = value in str(ticket_value) if ticket_value else False
-            elif operator == "is_empty":
-                matched = ticket_value is None or ticket_value == ""
-            elif operator == "is_not_empty":
-                matched = ticket_value is not None and ticket_value != ""
-            elif operator == "in_list":
-                matched = str(ticket_value) in (value if isinstance(value, list) else [value])
-
-            conditions_result.append({
-                "field": field,
-                "operator": operator,
-                "expected_value": value,
-                "actual_value": str(ticket_value) if ticket_value else None,
-                "matched": matched,
-            })
-
-            if not matched:
-                would_match = False
+    for condition in compiled.conditions:
+        ticket_value = resolve_field(ticket, condition.field)
+        conditions_result.append({
+            "field": condition.field,
+            "operator": condition.operator,
+            "expected_value": condition.expected,
+            "actual_value": str(ticket_value) if ticket_value is not None else None,
+            "matched": condition.test(ticket_value),
+        })
 
     return {
         "rule_id": rule.id,
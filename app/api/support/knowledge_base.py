@@ -8,7 +8,6 @@ from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
 
 from app.database import get_db
 from app.models.support_kb import (
@@ -20,6 +19,7 @@ from app.models.support_kb import (
     ArticleVisibility,
 )
 from app.auth import Require
+from app.services.search_service import SearchService
 
 router = APIRouter()
 
@@ -297,16 +297,13 @@ def list_articles(
         query = query.filter(KBArticle.status == status)
     if visibility:
         query = query.filter(KBArticle.visibility == visibility)
+    order = [KBArticle.updated_at.desc()]
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(or_(
-            KBArticle.title.ilike(search_term),
-            KBArticle.content.ilike(search_term),
-            KBArticle.search_keywords.ilike(search_term),
-        ))
+        query, rank = SearchService(db).apply(query, "kb_articles", search)
+        order.insert(0, rank.desc())
 
     total = query.count()
-    articles = query.order_by(KBArticle.updated_at.desc()).offset(offset).limit(limit).all()
+    articles = query.order_by(*order).offset(offset).limit(limit).all()
 
     return {
         "total": total,
@@ -659,16 +656,13 @@ def search_public_articles(
         if category:
             query = query.filter(KBArticle.category_id == category.id)
 
+    order = [KBArticle.view_count.desc()]
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(or_(
-            KBArticle.title.ilike(search_term),
-            KBArticle.content.ilike(search_term),
-            KBArticle.search_keywords.ilike(search_term),
-        ))
+        query, rank = SearchService(db).apply(query, "kb_articles", search)
+        order.insert(0, rank.desc())
 
     total = query.count()
-    articles = query.order_by(KBArticle.view_count.desc()).offset(offset).limit(limit).all()
+    articles = query.order_by(*order).offset(offset).limit(limit).all()
 
     return {
         "total": total,
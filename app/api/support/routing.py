@@ -3,10 +3,9 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import Dict, Any, Optional, List, cast
-from enum import Enum
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -16,6 +15,8 @@ from app.models.agent import Agent, Team, TeamMember
 from app.models.ticket import Ticket, TicketStatus
 from app.auth import Require
 from app.cache import cached, CACHE_TTL
+from app.services.agent_workload import agent_capacity, agent_loads, agent_name, open_ticket_counts
+from app.services.routing_engine import RoutingEngine
 
 router = APIRouter()
 
@@ -89,6 +90,10 @@ class AutoAssignRequest(BaseModel):
     ticket_id: int
 
 
+class BulkAutoAssignRequest(BaseModel):
+    limit: int = Field(default=50, ge=1, le=1000)
+
+
 class RebalanceRequest(BaseModel):
     team_id: Optional[int] = None
     max_per_agent: Optional[int] = None
@@ -307,16 +312,7 @@ def auto_assign(
         }
 
     # Find matching routing rule
-    rules = db.query(RoutingRule).filter(
-        RoutingRule.is_active == True
-    ).order_by(RoutingRule.priority).all()
-
-    matched_rule = None
-    for rule in rules:
-        conditions = rule.conditions if isinstance(rule.conditions, list) else None
-        if _evaluate_routing_conditions(conditions, ticket):
-            matched_rule = rule
-            break
+    matched_rule = RoutingEngine(db).find_matching_rule(ticket)
 
     if not matched_rule:
         return {
@@ -424,41 +420,17 @@ def auto_assign(
     }
 
 
-def _evaluate_routing_conditions(conditions: Optional[List[dict]], ticket: Ticket) -> bool:
-    """Evaluate if ticket matches routing conditions."""
-    if not conditions:
-        return True  # No conditions = match all
-
-    for condition in conditions:
-        field = condition.get("field", "")
-        operator = condition.get("operator", "")
-        value = condition.get("value")
-
-        ticket_value = getattr(ticket, field, None)
-        if isinstance(ticket_value, Enum):
-            ticket_value = ticket_value.value
-
-        if operator == "equals":
-            if str(ticket_value) != str(value):
-                return False
-        elif operator == "not_equals":
-            if str(ticket_value) == str(value):
-                return False
-        elif operator == "contains":
-            if str(value) not in str(ticket_value or ""):
-                return False
-        elif operator == "in_list":
-            val_list = value if isinstance(value, list) else [value]
-            if str(ticket_value) not in [str(v) for v in val_list]:
-                return False
-        elif operator == "is_empty":
-            if ticket_value is not None and ticket_value != "":
-                return False
-        elif operator == "is_not_empty":
-            if ticket_value is None or ticket_value == "":
-                return False
-
-    return True
+@router.post("/auto-assign/bulk", dependencies=[Depends(Require("support:write"))])
+def auto_assign_bulk(
+    payload: BulkAutoAssignRequest,
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """Route the oldest unassigned open tickets in one pass.
+
+    Agent loads are read once and updated as the batch assigns, so
+    load-balanced rules respect agent capacity across the whole batch.
+    """
+    return RoutingEngine(db).auto_assign_batch(payload.limit)
 
 
 def _round_robin_select(db: Session, team_id: int, agents: List[Agent]) -> Optional[Agent]:
@@ -495,19 +467,7 @@ def _round_robin_select(db: Session, team_id: int, agents: List[Agent]) -> Optio
 
 def _least_busy_select(db: Session, agents: List[Agent]) -> Optional[Agent]:
     """Select agent with fewest open tickets."""
-    agent_ids = [a.id for a in agents]
-
-    # Count open tickets per agent (by assigned_to name matching)
-    agent_names = {a.id: a.display_name or a.email for a in agents}
-
-    ticket_counts = {}
-    for agent in agents:
-        name = agent.display_name or agent.email
-        count = db.query(func.count(Ticket.id)).filter(
-            Ticket.assigned_to == name,
-            Ticket.status.in_([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD])
-        ).scalar() or 0
-        ticket_counts[agent.id] = count
+    ticket_counts = agent_loads(db, agents)
 
     # Select agent with minimum tickets
     min_count = min(ticket_counts.values())
@@ -550,15 +510,11 @@ def _load_balanced_select(db: Session, agents: List[Agent]) -> Optional[Agent]:
     """Select agent based on capacity utilization."""
     best_agent = None
     lowest_utilization = float('inf')
+    loads = agent_loads(db, agents)
 
     for agent in agents:
-        capacity = agent.capacity or 10  # Default capacity
-        name = agent.display_name or agent.email
-
-        current_load = db.query(func.count(Ticket.id)).filter(
-            Ticket.assigned_to == name,
-            Ticket.status.in_([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD])
-        ).scalar() or 0
+        capacity = agent_capacity(agent)
+        current_load = loads[agent.id]
 
         utilization = current_load / capacity if capacity > 0 else float('inf')
 
@@ -590,16 +546,12 @@ def get_agent_workload(
         query = query.filter(Agent.id.in_(agent_ids))
 
     agents = query.all()
+    loads = agent_loads(db, agents)
 
     result = []
     for agent in agents:
-        name = agent.display_name or agent.email
-        capacity = agent.capacity or 10
-
-        open_count = db.query(func.count(Ticket.id)).filter(
-            Ticket.assigned_to == name,
-            Ticket.status.in_([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD])
-        ).scalar() or 0
+        capacity = agent_capacity(agent)
+        open_count = loads[agent.id]
 
         result.append({
             "agent_id": agent.id,
@@ -648,15 +600,8 @@ async def get_queue_health(
 
     # Agent utilization summary
     agents = db.query(Agent).filter(Agent.is_active == True).all()
-    total_capacity = sum(a.capacity or 10 for a in agents)
-    total_load = 0
-    for agent in agents:
-        name = agent.display_name or agent.email
-        load = db.query(func.count(Ticket.id)).filter(
-            Ticket.assigned_to == name,
-            Ticket.status.in_([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD])
-        ).scalar() or 0
-        total_load += load
+    total_capacity = sum(agent_capacity(a) for a in agents)
+    total_load = sum(open_ticket_counts(db, (agent_name(a) for a in agents)).values())
 
     return {
         "unassigned_tickets": unassigned,
@@ -697,14 +642,12 @@ def rebalance_tickets(
         return {"rebalanced": 0, "message": "Need at least 2 agents to rebalance"}
 
     # Calculate workloads
+    loads = agent_loads(db, agents)
     workloads: Dict[int, Dict[str, Any]] = {}
     for agent in agents:
         name = agent.display_name or agent.email
-        capacity = agent.capacity or 10
-        load = db.query(func.count(Ticket.id)).filter(
-            Ticket.assigned_to == name,
-            Ticket.status.in_([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD])
-        ).scalar() or 0
+        capacity = agent_capacity(agent)
+        load = loads[agent.id]
         workloads[agent.id] = {
             "agent": agent,
             "name": name,
@@ -23,6 +23,7 @@ from app.models.support_sla import (
 from app.models.ticket import Ticket
 from app.auth import Require
 from app.cache import cached, CACHE_TTL
+from app.services.business_calendar import invalidate_compiled_calendar
 
 router = APIRouter()
 
@@ -232,6 +233,7 @@ def update_calendar(
         calendar.is_default = payload.is_default
 
     db.commit()
+    invalidate_compiled_calendar(calendar_id)
     db.refresh(calendar)
     return {"id": calendar.id, "name": calendar.name}
 
@@ -256,6 +258,7 @@ def delete_calendar(
 
     db.delete(calendar)
     db.commit()
+    invalidate_compiled_calendar(calendar_id)
     return Response(status_code=204)
 
 
@@ -282,6 +285,7 @@ def add_holiday(
     )
     db.add(holiday)
     db.commit()
+    invalidate_compiled_calendar(calendar_id)
     db.refresh(holiday)
     return {"id": holiday.id, "holiday_date": holiday.holiday_date.isoformat()}
 
@@ -304,6 +308,7 @@ def remove_holiday(
         raise HTTPException(status_code=404, detail="Holiday not found")
     db.delete(holiday)
     db.commit()
+    invalidate_compiled_calendar(calendar_id)
     return Response(status_code=204)
 
 
@@ -6,17 +6,21 @@ Structure only - no direct FIRS API integration yet.
 """
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models.tax_ng import EInvoice, EInvoiceStatus
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.models.tax_ng import EInvoice, EInvoiceBatch, EInvoiceStatus
 from app.services.nigerian_tax_service import NigerianTaxService
+from app.services.einvoice_batch_service import EInvoiceBatchError, EInvoiceBatchService
 from app.api.tax.schemas import (
     EInvoiceCreate,
     EInvoiceResponse,
     EInvoiceValidationResult,
     EInvoiceUBLResponse,
+    EInvoiceBatchCreate,
+    EInvoiceBatchResponse,
     PaginatedResponse,
 )
 from app.api.tax.deps import get_single_company, require_tax_write
@@ -79,6 +83,90 @@ def create_einvoice(
     return EInvoiceResponse.model_validate(einvoice)
 
 
+def _run_einvoice_batch_inline(batch_id: int) -> None:
+    """Fallback runner used when no Celery broker is configured."""
+    db = SessionLocal()
+    try:
+        EInvoiceBatchService(db).run(batch_id)
+    finally:
+        db.close()
+
+
+def _enqueue_einvoice_batch(batch: EInvoiceBatch, db: Session, background_tasks: BackgroundTasks) -> None:
+    if settings.redis_url:
+        from app.tasks.tax_tasks import run_einvoice_batch
+
+        task = run_einvoice_batch.delay(batch.id)
+        batch.task_id = task.id
+        db.commit()
+    else:
+        background_tasks.add_task(_run_einvoice_batch_inline, batch.id)
+
+
+@router.post("/batches", response_model=EInvoiceBatchResponse, status_code=202)
+def start_einvoice_batch(
+    data: EInvoiceBatchCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    company: str = Depends(get_single_company),
+    _: None = Depends(require_tax_write()),
+):
+    """
+    Queue bulk validation and UBL rendering of e-invoices.
+
+    Selects the given e-invoice ids, or every invoice with the given status
+    (DRAFT by default) issued in the date range. Invoices are validated
+    and rendered in chunks; an invoice whose content is unchanged since its
+    UBL was last rendered reuses the stored XML. Poll the batch for progress
+    and per-invoice errors.
+    """
+    try:
+        batch = EInvoiceBatchService(db).start(
+            company=company,
+            einvoice_ids=data.einvoice_ids,
+            invoice_status=data.status,
+            from_date=data.from_date,
+            to_date=data.to_date,
+        )
+    except EInvoiceBatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _enqueue_einvoice_batch(batch, db, background_tasks)
+    return EInvoiceBatchResponse.model_validate(batch)
+
+
+@router.get("/batches/{batch_id}", response_model=EInvoiceBatchResponse)
+def get_einvoice_batch(
+    batch_id: int,
+    db: Session = Depends(get_db),
+):
+    """Get e-invoice batch progress and per-invoice errors."""
+    batch = EInvoiceBatchService(db).get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="E-invoice batch not found")
+    return EInvoiceBatchResponse.model_validate(batch)
+
+
+@router.post("/batches/{batch_id}/resume", response_model=EInvoiceBatchResponse, status_code=202)
+def resume_einvoice_batch(
+    batch_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_tax_write()),
+):
+    """Re-queue a failed or interrupted e-invoice batch from its last committed chunk."""
+    service = EInvoiceBatchService(db)
+    if not service.get_batch(batch_id):
+        raise HTTPException(status_code=404, detail="E-invoice batch not found")
+    try:
+        batch = service.resume(batch_id)
+    except EInvoiceBatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    _enqueue_einvoice_batch(batch, db, background_tasks)
+    return EInvoiceBatchResponse.model_validate(batch)
+
+
 @router.post("/{einvoice_id}/validate", response_model=EInvoiceValidationResult)
 def validate_einvoice(
     einvoice_id: int,
@@ -7,7 +7,7 @@ for Nigerian tax administration compliance.
 
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import date, timedelta
-from typing import Dict, List, Tuple, Optional, Any, cast
+from typing import Dict, List, Tuple, Optional, Any, Sequence, cast
 from calendar import monthrange
 
 from app.models.tax_ng import (
@@ -347,6 +347,112 @@ def calculate_all_statutory_deductions(
     Returns:
         Comprehensive dict with all deductions and totals
     """
+    return _statutory_deductions(
+        basic_salary, housing_allowance, transport_allowance, other_allowances,
+        include_paye, include_pension, include_nhf, include_nhis, include_nsitf, include_itf,
+        get_applicable_tax_law(tax_date),
+    )
+
+
+# ============= BATCH STATUTORY CALCULATION =============
+
+# (basic, housing, transport, other, include_paye, include_pension,
+#  include_nhf, include_nhis, include_nsitf, include_itf)
+StatutoryBatchItem = Tuple[Decimal, Decimal, Decimal, Decimal, bool, bool, bool, bool, bool, bool]
+
+_CENT = Decimal("0.01")
+_ZERO = Decimal("0")
+
+
+def _compile_paye_bands(
+    bands: List[Tuple[Decimal, Optional[Decimal], Decimal]],
+) -> List[Tuple[Optional[Decimal], Decimal, Dict[str, str], Decimal]]:
+    """
+    Precompute each band as (width, rate, labels, full_tax).
+
+    labels holds the breakdown strings for a band taxed over its full width,
+    and full_tax that band's tax, since they are the same for every employee
+    whose income runs past the band.
+    """
+    table = []
+    for lower, upper, rate in bands:
+        width = upper - lower if upper is not None else None
+        full_tax = (width * rate).quantize(_CENT, rounding=ROUND_HALF_UP) if width is not None else _ZERO
+        table.append((
+            width,
+            rate,
+            {
+                "lower_limit": str(lower),
+                "upper_limit": str(upper) if upper else "unlimited",
+                "rate": str(rate),
+                "taxable_in_band": str(width),
+                "tax_amount": str(full_tax),
+            },
+            full_tax,
+        ))
+    return table
+
+
+PAYE_BAND_TABLES = {
+    "PITA": _compile_paye_bands(PAYE_BANDS_PITA),
+    "NTA_2025": _compile_paye_bands(PAYE_BANDS_NTA_2025),
+}
+
+
+def calculate_statutory_deductions_batch(
+    items: Sequence[StatutoryBatchItem],
+    tax_date: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Calculate statutory deductions for many employees in one pass.
+
+    Returns, per item, exactly what calculate_all_statutory_deductions returns
+    for the same amounts and include flags. The tax law and PAYE band table
+    are resolved once for the batch, and items with the same amounts and
+    flags (common when employees share a salary structure) are computed
+    once and share the result dict, so callers must not mutate results.
+
+    Args:
+        items: StatutoryBatchItem tuples
+        tax_date: Date for tax law determination
+
+    Returns:
+        List of result dicts in item order
+    """
+    tax_law = get_applicable_tax_law(tax_date)
+
+    computed: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    results: List[Dict[str, Any]] = []
+    for item in items:
+        # str() keeps the exponent: Decimal("1") and Decimal("1.00") hash
+        # equal but render differently in the result
+        key = (str(item[0]), str(item[1]), str(item[2]), str(item[3]), *item[4:])
+        result = computed.get(key)
+        if result is None:
+            result = computed[key] = _statutory_deductions(*item, tax_law)
+        results.append(result)
+    return results
+
+
+def _statutory_deductions(
+    basic_salary: Decimal,
+    housing_allowance: Decimal,
+    transport_allowance: Decimal,
+    other_allowances: Decimal,
+    include_paye: bool,
+    include_pension: bool,
+    include_nhf: bool,
+    include_nhis: bool,
+    include_nsitf: bool,
+    include_itf: bool,
+    tax_law: str,
+) -> Dict[str, Any]:
+    """
+    Statutory deductions for one employee under a resolved tax law.
+
+    The single implementation behind calculate_all_statutory_deductions and
+    calculate_statutory_deductions_batch.
+    """
     # Calculate gross
     gross_monthly = basic_salary + housing_allowance + transport_allowance + other_allowances
     gross_annual = gross_monthly * 12
@@ -398,7 +504,7 @@ def calculate_all_statutory_deductions(
         bands_breakdown: List[Dict[str, Any]] = []
     else:
         # Get CRA
-        cra = calculate_cra(gross_annual, tax_date)
+        cra = _cra_for_law(gross_annual, tax_law)
 
         # Total reliefs for PAYE
         annual_pension = pension["employee_contribution"] * 12
@@ -410,7 +516,7 @@ def calculate_all_statutory_deductions(
         annual_taxable = max(gross_annual - total_reliefs, Decimal("0"))
 
         # Calculate PAYE
-        paye_annual, bands_breakdown, effective_rate = calculate_paye(annual_taxable, tax_date)
+        paye_annual, bands_breakdown, effective_rate = _paye_for_law(annual_taxable, tax_law)
         paye_monthly = (paye_annual / 12).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
     # Total employee deductions
@@ -436,7 +542,7 @@ def calculate_all_statutory_deductions(
         "gross_monthly": gross_monthly,
         "gross_annual": gross_annual,
         "is_paye_exempt": is_exempt,
-        "tax_law": get_applicable_tax_law(tax_date),
+        "tax_law": tax_law,
 
         "paye": {
             "monthly": paye_monthly,
@@ -693,8 +799,11 @@ def calculate_cra(annual_gross_income: Decimal, tax_date: Optional[date] = None)
     Returns:
         Tuple of (cra_fixed, cra_variable, total_cra)
     """
-    tax_law = get_applicable_tax_law(tax_date)
+    return _cra_for_law(annual_gross_income, get_applicable_tax_law(tax_date))
+
 
+def _cra_for_law(annual_gross_income: Decimal, tax_law: str) -> Tuple[Decimal, Decimal, Decimal]:
+    """calculate_cra for a resolved tax law."""
     if tax_law == "NTA_2025":
         # CRA eliminated under NTA 2025 - return zeros
         # Tax-free threshold is handled in the PAYE bands instead
@@ -762,29 +871,32 @@ def calculate_paye(
     Returns:
         Tuple of (annual_tax, bands_breakdown, effective_rate)
     """
+    return _paye_for_law(annual_taxable_income, get_applicable_tax_law(tax_date))
+
+
+def _paye_for_law(annual_taxable_income: Decimal, tax_law: str) -> Tuple[Decimal, List[Dict], Decimal]:
+    """calculate_paye for a resolved tax law, using its precomputed band table."""
     if annual_taxable_income <= 0:
         return Decimal("0"), [], Decimal("0")
 
-    # Select appropriate tax bands
-    tax_law = get_applicable_tax_law(tax_date)
-    if tax_law == "NTA_2025":
-        bands = PAYE_BANDS_NTA_2025
-    else:
-        bands = PAYE_BANDS_PITA
-
     remaining_income = annual_taxable_income
     total_tax = Decimal("0")
     bands_breakdown = []
 
-    for lower, upper, rate in bands:
+    for width, rate, labels, full_tax in PAYE_BAND_TABLES[tax_law]:
         if remaining_income <= 0:
             break
 
+        if width is not None and remaining_income > width:
+            # Whole band: min() would return width itself, so the
+            # precomputed tax and labels are exact
+            total_tax += full_tax
+            bands_breakdown.append(dict(labels))
+            remaining_income -= width
+            continue
+
         # Calculate band width
-        if upper is None:
-            band_width = remaining_income
-        else:
-            band_width = min(remaining_income, upper - lower)
+        band_width = remaining_income if width is None else min(remaining_income, width)
 
         if band_width <= 0:
             continue
@@ -794,21 +906,17 @@ def calculate_paye(
         total_tax += band_tax
 
         bands_breakdown.append({
-            "lower_limit": str(lower),
-            "upper_limit": str(upper) if upper else "unlimited",
-            "rate": str(rate),
+            **labels,
             "taxable_in_band": str(band_width),
-            "tax_amount": str(band_tax)
+            "tax_amount": str(band_tax),
         })
 
         remaining_income -= band_width
 
     # Calculate effective rate
-    effective_rate = Decimal("0")
-    if annual_taxable_income > 0:
-        effective_rate = (total_tax / annual_taxable_income).quantize(
-            Decimal("0.000001"), rounding=ROUND_HALF_UP
-        )
+    effective_rate = (total_tax / annual_taxable_income).quantize(
+        Decimal("0.000001"), rounding=ROUND_HALF_UP
+    )
 
     return total_tax, bands_breakdown, effective_rate
 
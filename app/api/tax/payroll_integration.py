@@ -16,7 +16,9 @@ from sqlalchemy import and_
 
 from app.database import get_db
 from app.api.tax.helpers import (
+    StatutoryBatchItem,
     calculate_all_statutory_deductions,
+    calculate_statutory_deductions_batch,
     calculate_pension_contributions,
     calculate_nhf_contribution,
     calculate_nhis_contributions,
@@ -407,73 +409,87 @@ def calculate_bulk_deductions(
         "net_pay": Decimal("0"),
     }
 
+    # Resolve eligibility once per employment type
+    configs: Dict[Optional[str], Dict[str, Any]] = {}
+    eligibilities: Dict[Optional[str], EmploymentTypeEligibility] = {}
+    items: List[StatutoryBatchItem] = []
     for emp in data.employees:
-        emp_config = get_employment_type_config(db, emp.employment_type)
+        emp_config = configs.get(emp.employment_type)
+        if emp_config is None:
+            emp_config = configs[emp.employment_type] = get_employment_type_config(db, emp.employment_type)
+            eligibilities[emp.employment_type] = EmploymentTypeEligibility(
+                employment_type=emp.employment_type,
+                paye_applicable=emp_config["paye_applicable"],
+                pension_applicable=emp_config["pension_applicable"],
+                nhf_applicable=emp_config["nhf_applicable"],
+                nhis_applicable=emp_config["nhis_applicable"],
+                nsitf_applicable=emp_config["nsitf_applicable"],
+                itf_applicable=emp_config["itf_applicable"],
+            )
         include_paye = emp.include_paye if emp.include_paye is not None else emp_config["paye_applicable"]
         include_pension = emp.include_pension if emp.include_pension is not None else emp_config["pension_applicable"]
         include_nhf = emp.include_nhf if emp.include_nhf is not None else emp_config["nhf_applicable"]
         include_nhis = emp.include_nhis if emp.include_nhis is not None else emp_config["nhis_applicable"]
-        include_nsitf = emp_config["nsitf_applicable"]
-        include_itf = emp_config["itf_applicable"]
 
         if include_pension and emp_config["pension_min_service_months"] > 0:
             if emp.months_of_service is not None and emp.months_of_service < emp_config["pension_min_service_months"]:
                 include_pension = False
 
-        result = calculate_all_statutory_deductions(
-            basic_salary=emp.basic_salary,
-            housing_allowance=emp.housing_allowance,
-            transport_allowance=emp.transport_allowance,
-            other_allowances=emp.other_allowances,
-            include_paye=include_paye,
-            include_pension=include_pension,
-            include_nhf=include_nhf,
-            include_nhis=include_nhis,
-            include_nsitf=include_nsitf,
-            include_itf=include_itf,
-            tax_date=payroll_date,
-        )
-
-        # Build deductions for slip
-        deductions_for_slip = {}
-        if include_paye and result["paye"]["monthly"] > Decimal("0"):
-            deductions_for_slip["PAYE"] = result["paye"]["monthly"]
-        if include_pension and result["pension"]["employee_contribution"] > Decimal("0"):
-            deductions_for_slip["Pension - Employee"] = result["pension"]["employee_contribution"]
-        if include_nhf and result["nhf"] and result["nhf"]["contribution"] > Decimal("0"):
-            deductions_for_slip["NHF"] = result["nhf"]["contribution"]
-        if include_nhis and result["nhis"] and result["nhis"]["employee_contribution"] > Decimal("0"):
-            deductions_for_slip["NHIS - Employee"] = result["nhis"]["employee_contribution"]
-
-        eligibility = EmploymentTypeEligibility(
-            employment_type=emp.employment_type,
-            paye_applicable=emp_config["paye_applicable"],
-            pension_applicable=emp_config["pension_applicable"],
-            nhf_applicable=emp_config["nhf_applicable"],
-            nhis_applicable=emp_config["nhis_applicable"],
-            nsitf_applicable=emp_config["nsitf_applicable"],
-            itf_applicable=emp_config["itf_applicable"],
-        )
+        items.append((
+            emp.basic_salary,
+            emp.housing_allowance,
+            emp.transport_allowance,
+            emp.other_allowances,
+            include_paye,
+            include_pension,
+            include_nhf,
+            include_nhis,
+            emp_config["nsitf_applicable"],
+            emp_config["itf_applicable"],
+        ))
+
+    results = calculate_statutory_deductions_batch(items, tax_date=payroll_date)
+
+    # Employees with identical inputs share a result; build its parts once
+    parts: Dict[int, Dict[str, Any]] = {}
+    for emp, item, result in zip(data.employees, items, results):
+        include_paye, include_pension, include_nhf, include_nhis, include_nsitf, include_itf = item[4:]
+        shared = parts.get(id(result))
+        if shared is None:
+            # Build deductions for slip
+            deductions_for_slip = {}
+            if include_paye and result["paye"]["monthly"] > Decimal("0"):
+                deductions_for_slip["PAYE"] = result["paye"]["monthly"]
+            if include_pension and result["pension"]["employee_contribution"] > Decimal("0"):
+                deductions_for_slip["Pension - Employee"] = result["pension"]["employee_contribution"]
+            if include_nhf and result["nhf"] and result["nhf"]["contribution"] > Decimal("0"):
+                deductions_for_slip["NHF"] = result["nhf"]["contribution"]
+            if include_nhis and result["nhis"] and result["nhis"]["employee_contribution"] > Decimal("0"):
+                deductions_for_slip["NHIS - Employee"] = result["nhis"]["employee_contribution"]
+
+            shared = parts[id(result)] = {
+                "gross_monthly": result["gross_monthly"],
+                "gross_annual": result["gross_annual"],
+                "is_paye_exempt": result["is_paye_exempt"],
+                "tax_law": result["tax_law"],
+                "paye": PAYEBreakdown(**result["paye"]),
+                "reliefs": ReliefsBreakdown(**result["reliefs"]),
+                "pension": PensionBreakdown(**result["pension"]),
+                "nhf_contribution": result["nhf"]["contribution"] if result["nhf"] else None,
+                "nhis_employee": result["nhis"]["employee_contribution"] if result["nhis"] else None,
+                "nhis_employer": result["nhis"]["employer_contribution"] if result["nhis"] else None,
+                "nsitf_employer": result["nsitf"]["employer_contribution"] if include_nsitf else Decimal("0"),
+                "itf_monthly_provision": result["itf"]["monthly_provision"] if include_itf else Decimal("0"),
+                "totals": EmployeeDeductionsTotals(**result["totals"]),
+                "deductions_for_slip": deductions_for_slip,
+            }
 
         emp_response = StatutoryDeductionsResponse(
             employee_id=emp.employee_id,
             employee_name=emp.employee_name,
             employment_type=emp.employment_type,
-            gross_monthly=result["gross_monthly"],
-            gross_annual=result["gross_annual"],
-            is_paye_exempt=result["is_paye_exempt"],
-            tax_law=result["tax_law"],
-            eligibility=eligibility,
-            paye=PAYEBreakdown(**result["paye"]),
-            reliefs=ReliefsBreakdown(**result["reliefs"]),
-            pension=PensionBreakdown(**result["pension"]),
-            nhf_contribution=result["nhf"]["contribution"] if result["nhf"] else None,
-            nhis_employee=result["nhis"]["employee_contribution"] if result["nhis"] else None,
-            nhis_employer=result["nhis"]["employer_contribution"] if result["nhis"] else None,
-            nsitf_employer=result["nsitf"]["employer_contribution"] if include_nsitf else Decimal("0"),
-            itf_monthly_provision=result["itf"]["monthly_provision"] if include_itf else Decimal("0"),
-            totals=EmployeeDeductionsTotals(**result["totals"]),
-            deductions_for_slip=deductions_for_slip,
+            eligibility=eligibilities[emp.employment_type],
+            **shared,
         )
         employees.append(emp_response)
 
@@ -609,10 +625,13 @@ def calculate_slip_deductions(
     include_nsitf: Optional[bool] = None,
     include_itf: Optional[bool] = None,
     payroll_date: Optional[date] = None,
+    employment_config: Optional[Dict[str, Any]] = None,
 ) -> dict:
     """
     Utility function for HR payroll to calculate statutory deductions.
-    Respects employment type eligibility when db session is provided.
+    Respects employment type eligibility when db session is provided, or
+    when employment_config (from get_employment_type_config) is passed in,
+    which keeps the calculation free of database access.
 
     Call this during salary slip generation to get computed deductions.
 
@@ -646,7 +665,9 @@ def calculate_slip_deductions(
         Dict with deduction amounts ready for salary slip, including eligibility info
     """
     # Get employment type config if db is provided
-    if db is not None and employment_type:
+    if employment_config is not None:
+        emp_config = employment_config
+    elif db is not None and employment_type:
         emp_config = get_employment_type_config(db, employment_type)
     else:
         emp_config = {
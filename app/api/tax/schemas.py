@@ -16,6 +16,7 @@ from app.models.tax_ng import (
     CITCompanySize,
     VATTransactionType,
     EInvoiceStatus,
+    EInvoiceBatchStatus,
     PAYEFilingFrequency,
 )
 
@@ -588,5 +589,46 @@ class EInvoiceUBLResponse(BaseModel):
     qr_code_data: Optional[str]
 
 
+class EInvoiceBatchCreate(BaseModel):
+    """Start bulk validation and UBL rendering.
+
+    Either explicit e-invoice ids, or every invoice with the given status
+    issued in the date range.
+    """
+    einvoice_ids: Optional[List[int]] = Field(default=None, min_length=1)
+    status: Optional[EInvoiceStatus] = EInvoiceStatus.DRAFT
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+
+
+class EInvoiceBatchInvoiceError(BaseModel):
+    """Validation errors of one invoice in a batch."""
+    einvoice_id: int
+    invoice_number: Optional[str]
+    errors: List[Dict[str, str]]
+
+
+class EInvoiceBatchResponse(BaseModel):
+    """E-invoice batch progress and per-invoice errors."""
+    id: int
+    company: str
+    status: EInvoiceBatchStatus
+    task_id: Optional[str]
+    total_invoices: int
+    processed_invoices: int
+    progress_percent: float
+    valid_count: int
+    invalid_count: int
+    rendered_count: int
+    cached_count: int
+    invoice_errors: Optional[List[EInvoiceBatchInvoiceError]]
+    error_message: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    completed_at: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Fix forward reference
 EInvoiceCreate.model_rebuild()
@@ -57,6 +57,10 @@ class Settings(BaseSettings):
     sync_batch_size_tickets: int = 500
     sync_batch_size_messages: int = 1000  # Higher for messages
 
+    # ERPNext child tables (salary slip/structure rows) fetched with get_list
+    erpnext_child_batch_size: int = 100  # Parent documents per child-table request
+    erpnext_child_fetch_concurrency: int = 4  # Child-table requests in flight at once
+
     # Circuit breaker settings
     circuit_breaker_fail_max: int = 5  # Failures before opening circuit
     circuit_breaker_reset_timeout: int = 60  # Seconds before attempting reset
@@ -69,6 +73,11 @@ class Settings(BaseSettings):
     # Redis
     redis_url: Optional[str] = None
 
+    # Event bus dispatch: "celery" (one task per event) or "streams"
+    # (Redis stream consumed in batches by events.consume_stream)
+    event_bus_backend: str = "celery"
+    event_stream_maxlen: int = 500_000  # Approximate retention for replay
+
     # Branding (used in templates and emails)
     company_name: str = "dotMac Limited"
     product_name: str = "DotMac Insights"
@@ -144,6 +153,27 @@ class Settings(BaseSettings):
     # Payroll
     payroll_cache_ttl_seconds: int = 300
 
+    # Background report jobs
+    report_job_storage_dir: Optional[str] = None  # Store results on disk instead of in the DB
+    report_job_result_ttl_hours: int = 24  # How long identical requests reuse a stored result
+    report_job_stale_after_seconds: int = 3600  # Pending/running jobs older than this are not reused
+
+    # Payroll runs (background salary slip generation)
+    payroll_run_chunk_size: int = 500  # Employees computed and committed per chunk
+    payroll_run_workers: int = 0  # Processes for slip computation; 0 computes in-process
+    payroll_run_stale_after_seconds: int = 900  # Running runs idle this long may be resumed
+
+    # E-invoice batches (bulk validation and UBL rendering)
+    einvoice_batch_chunk_size: int = 200  # Invoices loaded, processed and committed per chunk
+    einvoice_batch_workers: int = 0  # Processes for validation/rendering; 0 works in-process
+    einvoice_batch_stale_after_seconds: int = 900  # Running batches idle this long may be resumed
+
+    # HR bulk endpoints (attendance marking, approvals, policy allocations)
+    hr_bulk_chunk_size: int = 1000  # Ids per existence query / multi-row INSERT
+
+    # Performance scorecards (period-level KPI computation)
+    scorecard_batch_size: int = 500  # Scorecards scored and committed per chunk of grouped KPI queries
+
     @property
     def is_production(self) -> bool:
         return self.environment == "production"
@@ -10,7 +10,10 @@ from app.middleware.metrics import get_metrics_response
 from app.observability.otel import setup_otel, shutdown_otel
 from app.middleware.license import enforce_license
 from app.services.rbac_sync import ensure_admin_has_all_permissions
+from app.services.search_service import ensure_search_indexes
+from app.database import engine
 from app.services.platform_client import init_platform_client, close_platform_client
+from app.api.inbox.websocket import start_inbox_realtime, stop_inbox_realtime
 
 # Configure structured logging
 structlog.configure(
@@ -59,9 +62,19 @@ async def lifespan(app: FastAPI):
 
     ensure_admin_has_all_permissions()
 
+    # SQLite search tables (Postgres search indexes come from migrations)
+    try:
+        ensure_search_indexes(engine)
+    except Exception as e:
+        logger.warning("search_indexes_unavailable", error=str(e))
+
+    # Subscribe this worker to inbox events published by other workers and Celery
+    await start_inbox_realtime()
+
     yield
 
     # Shutdown
+    await stop_inbox_realtime()
     await close_platform_client()
     shutdown_otel()
     logger.info("shutting_down_application")
@@ -6,6 +6,9 @@ Defines and manages Prometheus metrics for monitoring:
 - Contacts drift percentage (for sync monitoring)
 - Outbound sync success/failure rates
 - Contacts query latency
+- SLA breach sweep duration and counts
+- Webhook delivery batch duration and outcomes
+- Notification fan-out latency per event
 
 Usage:
     from app.middleware.metrics import increment_webhook_auth_failure
@@ -21,7 +24,7 @@ Metrics are exposed at /metrics endpoint when configured.
 
 from contextlib import contextmanager
 from time import time
-from typing import Optional
+from typing import Dict, Optional
 
 import structlog
 
@@ -117,6 +120,48 @@ if PROMETHEUS_AVAILABLE:
         ['method', 'endpoint', 'status_code']
     )
 
+    # SLA breach sweep metrics
+    SLA_SWEEP_DURATION = Histogram(
+        'sla_sweep_duration_seconds',
+        'SLA warning/breach sweep duration',
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+    )
+    SLA_SWEEP_TICKETS = Gauge(
+        'sla_sweep_tickets',
+        'Tickets found by the last SLA sweep',
+        ['result']  # result: warnings, breaches, logged
+    )
+    SLA_BREACHES_LOGGED = Counter(
+        'sla_breaches_logged_total',
+        'SLA breach log rows written',
+        ['target_type']  # target_type: first_response, resolution
+    )
+
+    # Outbound webhook delivery metrics
+    WEBHOOK_DELIVERY_BATCH_DURATION = Histogram(
+        'webhook_delivery_batch_duration_seconds',
+        'Webhook delivery batch duration',
+        buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+    )
+    WEBHOOK_DELIVERIES = Counter(
+        'webhook_deliveries_total',
+        'Webhook delivery attempts by outcome',
+        ['result']  # result: delivered, retry, failed, skipped
+    )
+
+    # Notification fan-out metrics
+    NOTIFICATION_FANOUT_DURATION = Histogram(
+        'notification_fanout_duration_seconds',
+        'In-app and email fan-out time per emitted event',
+        ['event_type'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    )
+    NOTIFICATION_FANOUT_RECIPIENTS = Histogram(
+        'notification_fanout_recipients',
+        'Recipients per emitted event',
+        buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+    )
+
 else:
     # Stub implementations when prometheus_client is not available
     class StubCounter:
@@ -151,6 +196,13 @@ else:
     CONTACTS_QUERY_LATENCY = StubHistogram()
     API_REQUEST_LATENCY = StubHistogram()
     API_REQUESTS_TOTAL = StubCounter()
+    SLA_SWEEP_DURATION = StubHistogram()
+    SLA_SWEEP_TICKETS = StubGauge()
+    SLA_BREACHES_LOGGED = StubCounter()
+    WEBHOOK_DELIVERY_BATCH_DURATION = StubHistogram()
+    WEBHOOK_DELIVERIES = StubCounter()
+    NOTIFICATION_FANOUT_DURATION = StubHistogram()
+    NOTIFICATION_FANOUT_RECIPIENTS = StubHistogram()
 
     logger.warning("prometheus_client not installed - metrics are disabled")
 
@@ -316,6 +368,66 @@ def record_api_request(method: str, endpoint: str, status_code: int, latency_sec
         logger.error("failed_to_record_metric", metric="api_request", error=str(e))
 
 
+def record_sla_sweep(
+    duration_seconds: float,
+    warnings: int,
+    breaches: int,
+    logged_by_type: Dict[str, int],
+) -> None:
+    """
+    Record the outcome of an SLA warning/breach sweep.
+
+    Args:
+        duration_seconds: Sweep wall-clock duration
+        warnings: Tickets approaching a deadline
+        breaches: Breached (ticket, target type) pairs
+        logged_by_type: New breach log rows per target type
+    """
+    try:
+        SLA_SWEEP_DURATION.observe(duration_seconds)
+        SLA_SWEEP_TICKETS.labels(result="warnings").set(warnings)
+        SLA_SWEEP_TICKETS.labels(result="breaches").set(breaches)
+        SLA_SWEEP_TICKETS.labels(result="logged").set(sum(logged_by_type.values()))
+        for target_type, count in logged_by_type.items():
+            if count:
+                SLA_BREACHES_LOGGED.labels(target_type=target_type).inc(count)
+    except Exception as e:
+        logger.error("failed_to_record_metric", metric="sla_sweep", error=str(e))
+
+
+def record_webhook_batch(duration_seconds: float, results: Dict[str, int]) -> None:
+    """
+    Record the outcome of a webhook delivery batch.
+
+    Args:
+        duration_seconds: Batch wall-clock duration
+        results: Deliveries per result (delivered, retry, failed, skipped)
+    """
+    try:
+        WEBHOOK_DELIVERY_BATCH_DURATION.observe(duration_seconds)
+        for result, count in results.items():
+            if count:
+                WEBHOOK_DELIVERIES.labels(result=result).inc(count)
+    except Exception as e:
+        logger.error("failed_to_record_metric", metric="webhook_batch", error=str(e))
+
+
+def record_notification_fanout(event_type: str, duration_seconds: float, recipients: int) -> None:
+    """
+    Record in-app/email fan-out for one emitted event.
+
+    Args:
+        event_type: Notification event type value
+        duration_seconds: Time to resolve preferences and queue all rows
+        recipients: Distinct users the event was addressed to
+    """
+    try:
+        NOTIFICATION_FANOUT_DURATION.labels(event_type=event_type).observe(duration_seconds)
+        NOTIFICATION_FANOUT_RECIPIENTS.observe(recipients)
+    except Exception as e:
+        logger.error("failed_to_record_metric", metric="notification_fanout", error=str(e))
+
+
 # =============================================================================
 # METRICS ENDPOINT HELPERS
 # =============================================================================
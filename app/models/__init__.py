@@ -8,7 +8,7 @@ from app.models.payment_allocation import PaymentAllocation, AllocationType, Dis
 from app.models.supplier_payment import SupplierPayment, SupplierPaymentStatus
 from app.models.conversation import Conversation, Message
 from app.models.sync_log import SyncLog
-from app.models.employee import Employee
+from app.models.employee import Employee, EmployeeHierarchy
 from app.models.project import (
     Project,
     ProjectUser,
@@ -126,6 +126,7 @@ from app.models.tax_ng import (
     CITCompanySize,
     VATTransactionType,
     EInvoiceStatus,
+    EInvoiceBatchStatus,
     PAYEFilingFrequency,
     TaxSettings,
     NigerianTaxRate,
@@ -136,6 +137,7 @@ from app.models.tax_ng import (
     CITAssessment,
     EInvoice,
     EInvoiceLine,
+    EInvoiceBatch,
 )
 from app.models.accounting_ext import FiscalPeriod
 from app.models.settings import SettingGroup, SettingsAuditLog
@@ -145,6 +147,8 @@ from app.models.inventory import (
     StockEntryDetail,
     StockEntryType,
     StockLedgerEntry,
+    StockValuationState,
+    StockValuationSnapshot,
     LandedCostVoucher,
     LandedCostItem,
     LandedCostTax,
@@ -253,7 +257,7 @@ from app.models.performance import (
     ScorecardInstanceStatus,
     OverrideReason,
 )
-from app.models.agent import Agent, Team, TeamMember
+from app.models.agent import Agent, Team, TeamMember, AgentWorkload
 from app.models.omni import (
     OmniChannel,
     OmniChannelType,
@@ -350,6 +354,7 @@ from app.models.migration import (
     RecordAction,
     EntityType,
 )
+from app.models.report_job import ReportJob, ReportJobStatus
 
 __all__ = [
     "Customer",
@@ -367,6 +372,7 @@ __all__ = [
     "Message",
     "SyncLog",
     "Employee",
+    "EmployeeHierarchy",
     "Expense",
     "CreditNote",
     "Ticket",
@@ -471,6 +477,7 @@ __all__ = [
     "CITCompanySize",
     "VATTransactionType",
     "EInvoiceStatus",
+    "EInvoiceBatchStatus",
     "PAYEFilingFrequency",
     "TaxSettings",
     "NigerianTaxRate",
@@ -481,6 +488,7 @@ __all__ = [
     "CITAssessment",
     "EInvoice",
     "EInvoiceLine",
+    "EInvoiceBatch",
     # Settings models
     "SettingGroup",
     "SettingsAuditLog",
@@ -503,6 +511,8 @@ __all__ = [
     "StockEntryDetail",
     "StockEntryType",
     "StockLedgerEntry",
+    "StockValuationState",
+    "StockValuationSnapshot",
     "LandedCostVoucher",
     "LandedCostItem",
     "LandedCostTax",
@@ -595,6 +605,7 @@ __all__ = [
     "Agent",
     "Team",
     "TeamMember",
+    "AgentWorkload",
     # Omni models
     "OmniChannel",
     "OmniChannelType",
@@ -680,4 +691,7 @@ __all__ = [
     "DedupStrategy",
     "RecordAction",
     "EntityType",
+    # Report job models
+    "ReportJob",
+    "ReportJobStatus",
 ]
@@ -4,6 +4,7 @@ Extended Accounting Models for Books Module
 Provides models for:
 - Fiscal Period management and closing
 - Approval workflows with multi-step chains
+- Approver assignments for the pending-approvals inbox
 - Immutable audit logging
 - Exchange rates and revaluation
 - Accounting controls
@@ -291,7 +292,7 @@ class DocumentApproval(Base):
 
     __table_args__ = (
         UniqueConstraint("doctype", "document_id", name="uq_document_approval"),
-        Index("ix_document_approvals_status", "status", "doctype"),
+        Index("ix_document_approvals_status_doctype", "status", "doctype"),
     )
 
     def __repr__(self) -> str:
@@ -325,6 +326,45 @@ class ApprovalHistory(Base):
         return f"<ApprovalHistory step={self.step_order} action={self.action}>"
 
 
+class ApprovalAssignment(Base):
+    """Who can act on a pending document at its current step.
+
+    Denormalised from DocumentApproval.current_step and the step's
+    requirements so the approvals inbox is an indexed lookup. Rows are
+    replaced by the approval engine on submit, approve, reject, cancel and
+    escalate; only pending documents have rows. A row with neither user_id
+    nor role_name means any approver may act.
+    """
+
+    __tablename__ = "approval_assignments"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    document_approval_id: Mapped[int] = mapped_column(
+        ForeignKey("document_approvals.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    doctype: Mapped[str] = mapped_column(String(100), nullable=False)
+    step_order: Mapped[int] = mapped_column(nullable=False)
+
+    # Exactly one of these is set, or neither for "anyone"
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    role_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+
+    # Added by escalation rather than the step's own requirements
+    is_escalation: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_approval_assignments_user", "user_id", "doctype"),
+        Index("ix_approval_assignments_role", "role_name", "doctype"),
+    )
+
+    def __repr__(self) -> str:
+        target = self.user_id if self.user_id is not None else self.role_name or "*"
+        return f"<ApprovalAssignment approval={self.document_approval_id} step={self.step_order} {target}>"
+
+
 # =============================================================================
 # AUDIT LOG
 # =============================================================================
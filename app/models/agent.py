@@ -81,3 +81,23 @@ class TeamMember(Base):
 
     def __repr__(self) -> str:
         return f"<TeamMember team={self.team_id} agent={self.agent_id}>"
+
+
+class AgentWorkload(Base):
+    """Open-ticket counter per assignee.
+
+    Keyed by the assignee string stored on tickets (agent display name or
+    email). Kept current by a flush hook on tickets and corrected by a
+    periodic reconciliation against the tickets table.
+    """
+
+    __tablename__ = "agent_workloads"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    assignee: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
+    open_tickets: Mapped[int] = mapped_column(Integer, default=0, nullable=False, index=True)
+
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<AgentWorkload {self.assignee}={self.open_tickets}>"
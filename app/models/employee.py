@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from sqlalchemy import String, Enum, ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Enum, ForeignKey, Index, Integer, delete, event, insert, inspect, select
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 from datetime import datetime
 from app.utils.datetime_utils import utc_now
 from decimal import Decimal
-from typing import Optional, List, TYPE_CHECKING
+from typing import Any, Iterable, Optional, List, Tuple, TYPE_CHECKING
 import enum
+import logging
 from app.database import Base
 
 if TYPE_CHECKING:
@@ -21,6 +22,9 @@ if TYPE_CHECKING:
     )
 
 
+logger = logging.getLogger(__name__)
+
+
 class EmploymentStatus(enum.Enum):
     ACTIVE = "active"
     INACTIVE = "inactive"
@@ -145,3 +149,126 @@ class Employee(Base):
 
     def __repr__(self) -> str:
         return f"<Employee {self.name} - {self.department}>"
+
+
+class EmployeeHierarchy(Base):
+    """Reporting-line closure table: one row per (manager, report) pair.
+
+    Every employee has a depth-0 row for itself; depth 1 is a direct report,
+    depth 2 a report's report, and so on. Kept current by a flush hook on
+    employees (reports_to_id changes) and rebuilt from reports_to_id by
+    app.services.employee_hierarchy.reconcile_employee_hierarchy.
+    """
+
+    __tablename__ = "employee_hierarchy"
+
+    ancestor_id: Mapped[int] = mapped_column(
+        ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True
+    )
+    descendant_id: Mapped[int] = mapped_column(
+        ForeignKey("employees.id", ondelete="CASCADE"), primary_key=True
+    )
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_employee_hierarchy_ancestor_depth", "ancestor_id", "depth"),
+        Index("ix_employee_hierarchy_descendant_depth", "descendant_id", "depth"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EmployeeHierarchy {self.ancestor_id}->{self.descendant_id} ({self.depth})>"
+
+
+# =============================================================================
+# HIERARCHY MAINTENANCE
+# =============================================================================
+
+# Session.info flag: skip the flush hook (the caller reconciles afterwards)
+DEFER_HIERARCHY_UPDATES = "defer_employee_hierarchy"
+
+
+def add_hierarchy_nodes(connection: Any, employee_ids: Iterable[int]) -> None:
+    """Insert the depth-0 self rows for new employees."""
+    rows = [{"ancestor_id": i, "descendant_id": i, "depth": 0} for i in employee_ids]
+    if rows:
+        connection.execute(insert(EmployeeHierarchy.__table__), rows)
+
+
+def move_hierarchy_subtree(connection: Any, employee_id: int, manager_id: Optional[int]) -> bool:
+    """Re-attach an employee and everyone under them below a new manager.
+
+    Drops the subtree's links to its old ancestors and links it to the new
+    manager's ancestors (and the manager). Returns False, leaving the subtree
+    unchanged, when the new manager is inside the subtree (a cycle).
+    """
+    table = EmployeeHierarchy.__table__
+    subtree = select(table.c.descendant_id).where(table.c.ancestor_id == employee_id)
+
+    attached = manager_id is not None
+    if attached and connection.execute(
+        select(table.c.depth).where(
+            table.c.ancestor_id == employee_id, table.c.descendant_id == manager_id
+        )
+    ).first():
+        logger.warning(f"Employee {employee_id} cannot report to {manager_id}: cycle in reporting lines")
+        return False
+
+    connection.execute(
+        delete(table).where(
+            table.c.descendant_id.in_(subtree),
+            table.c.ancestor_id.not_in(subtree),
+        )
+    )
+    if attached:
+        above = table.alias("above")
+        below = table.alias("below")
+        connection.execute(
+            insert(table).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1).where(
+                    above.c.descendant_id == manager_id,
+                    below.c.ancestor_id == employee_id,
+                ),
+            )
+        )
+    return True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_employee_hierarchy(session: Session, flush_context: Any) -> None:
+    """Apply reporting-line changes for employees written in this flush.
+
+    Runs on the flush's connection, so hierarchy rows commit or roll back
+    with the employee changes. Writes that bypass the ORM (or run with
+    DEFER_HIERARCHY_UPDATES set) are picked up by reconcile_employee_hierarchy.
+    """
+    if session.info.get(DEFER_HIERARCHY_UPDATES):
+        return
+
+    added: List[int] = []
+    moved: List[Tuple[int, Optional[int]]] = []
+    for obj in session.new:
+        if isinstance(obj, Employee):
+            added.append(obj.id)
+            if obj.reports_to_id is not None:
+                moved.append((obj.id, obj.reports_to_id))
+
+    for obj in session.dirty:
+        if isinstance(obj, Employee) and inspect(obj).attrs.reports_to_id.history.has_changes():
+            moved.append((obj.id, obj.reports_to_id))
+
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Employee)]
+    if not (added or moved or removed):
+        return
+
+    connection = session.connection()
+    add_hierarchy_nodes(connection, added)
+    for employee_id, manager_id in moved:
+        move_hierarchy_subtree(connection, employee_id, manager_id)
+    if removed:
+        table = EmployeeHierarchy.__table__
+        connection.execute(
+            delete(table).where(
+                table.c.ancestor_id.in_(removed) | table.c.descendant_id.in_(removed)
+            )
+        )
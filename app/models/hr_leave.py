@@ -1,11 +1,12 @@
 """Leave Management models for ERPNext HR Module sync."""
 from __future__ import annotations
 
-from sqlalchemy import String, Text, ForeignKey, Enum, Index
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Text, ForeignKey, Enum, Index, UniqueConstraint, event, inspect, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Optional, List, TYPE_CHECKING
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
 import enum
 from app.database import Base
 
@@ -28,6 +29,17 @@ class LeaveAllocationStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+class LeaveLedgerEntryType(enum.Enum):
+    ALLOCATION = "allocation"  # Allocation created
+    CONSUMPTION = "consumption"  # Leave application approved
+    REVERSAL = "reversal"  # Approved application cancelled
+    ADJUSTMENT = "adjustment"  # Edits, syncs, cancelled/deleted allocations, reconciliation
+
+
+# Allocations that count towards balances and overlap checks
+ACTIVE_ALLOCATION_STATUSES = (LeaveAllocationStatus.SUBMITTED, LeaveAllocationStatus.DRAFT)
+
+
 # ============= LEAVE TYPE =============
 class LeaveType(Base):
     """Leave Type reference - types of leave available (PTO, Sick, etc.)."""
@@ -191,25 +203,27 @@ class LeaveAllocation(Base):
 
     # Employee reference
     employee: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    # Columns feeding leave_balances load their old value on set (active_history)
+    # so the after_flush hook can always tell what the allocation counted before
     employee_id: Mapped[Optional[int]] = mapped_column(
-        ForeignKey("employees.id"), nullable=True, index=True
+        ForeignKey("employees.id"), nullable=True, index=True, active_history=True
     )
     employee_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     # Leave type
     leave_type: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     leave_type_id: Mapped[Optional[int]] = mapped_column(
-        ForeignKey("leave_types.id"), nullable=True, index=True
+        ForeignKey("leave_types.id"), nullable=True, index=True, active_history=True
     )
 
     # Period
-    from_date: Mapped[date] = mapped_column(nullable=False, index=True)
-    to_date: Mapped[date] = mapped_column(nullable=False)
+    from_date: Mapped[date] = mapped_column(nullable=False, index=True, active_history=True)
+    to_date: Mapped[date] = mapped_column(nullable=False, active_history=True)
 
     # Allocation amounts
     new_leaves_allocated: Mapped[Decimal] = mapped_column(default=Decimal("0"))
-    total_leaves_allocated: Mapped[Decimal] = mapped_column(default=Decimal("0"))
-    unused_leaves: Mapped[Decimal] = mapped_column(default=Decimal("0"))
+    total_leaves_allocated: Mapped[Decimal] = mapped_column(default=Decimal("0"), active_history=True)
+    unused_leaves: Mapped[Decimal] = mapped_column(default=Decimal("0"), active_history=True)
     carry_forwarded_leaves: Mapped[Decimal] = mapped_column(default=Decimal("0"))
     carry_forwarded_leaves_count: Mapped[Decimal] = mapped_column(default=Decimal("0"))
 
@@ -218,7 +232,7 @@ class LeaveAllocation(Base):
 
     # Status
     status: Mapped[LeaveAllocationStatus] = mapped_column(
-        Enum(LeaveAllocationStatus), default=LeaveAllocationStatus.DRAFT
+        Enum(LeaveAllocationStatus), default=LeaveAllocationStatus.DRAFT, active_history=True
     )
     docstatus: Mapped[int] = mapped_column(default=0)
     company: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -303,3 +317,280 @@ class LeaveApplication(Base):
 
     def __repr__(self) -> str:
         return f"<LeaveApplication {self.employee} - {self.leave_type} ({self.from_date} to {self.to_date})>"
+
+
+# ============= LEAVE LEDGER =============
+class LeaveLedgerEntry(Base):
+    """Leave Ledger Entry - one signed change to an allocation's unused leaves.
+
+    The entries of an allocation sum to its unused_leaves while it is active
+    (and to zero once it is cancelled or deleted). allocation_id carries no
+    foreign key so the history outlives a deleted allocation.
+    """
+
+    __tablename__ = "leave_ledger_entries"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    allocation_id: Mapped[int] = mapped_column(nullable=False, index=True)
+    application_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("leave_applications.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), nullable=False)
+    leave_type_id: Mapped[int] = mapped_column(ForeignKey("leave_types.id"), nullable=False)
+
+    # Allocation period the days count against
+    from_date: Mapped[date] = mapped_column(nullable=False)
+    to_date: Mapped[date] = mapped_column(nullable=False)
+
+    entry_type: Mapped[LeaveLedgerEntryType] = mapped_column(Enum(LeaveLedgerEntryType), nullable=False)
+    days: Mapped[Decimal] = mapped_column(nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_leave_ledger_entries_emp_type_period", "employee_id", "leave_type_id", "from_date"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LeaveLedgerEntry {self.entry_type.value} {self.days} (allocation {self.allocation_id})>"
+
+
+class LeaveBalance(Base):
+    """Leave Balance - running balance per employee, leave type and allocation period.
+
+    Sums of total_leaves_allocated and unused_leaves over the active
+    allocations of the period, kept current by the allocation flush hook
+    below and checked by app.services.leave_ledger.reconcile_leave_balances.
+    """
+
+    __tablename__ = "leave_balances"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    employee_id: Mapped[int] = mapped_column(ForeignKey("employees.id"), nullable=False)
+    leave_type_id: Mapped[int] = mapped_column(ForeignKey("leave_types.id"), nullable=False)
+    from_date: Mapped[date] = mapped_column(nullable=False)
+    to_date: Mapped[date] = mapped_column(nullable=False)
+
+    allocated: Mapped[Decimal] = mapped_column(default=Decimal("0"))
+    balance: Mapped[Decimal] = mapped_column(default=Decimal("0"))
+
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "employee_id", "leave_type_id", "from_date", "to_date", name="uq_leave_balances_emp_type_period"
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<LeaveBalance {self.employee_id}/{self.leave_type_id} {self.from_date}: {self.balance}>"
+
+
+# =============================================================================
+# BALANCE MAINTENANCE
+# =============================================================================
+
+# (employee_id, leave_type_id, from_date, to_date)
+LeavePeriod = Tuple[int, int, date, date]
+
+_BALANCE_KEYS = (
+    "employee_id", "leave_type_id", "from_date", "to_date", "status", "unused_leaves", "total_leaves_allocated",
+)
+
+
+class LeaveMovement(NamedTuple):
+    """A change to one allocation's contribution to its period balance."""
+
+    allocation_id: int
+    period: LeavePeriod
+    days: Decimal  # Change in unused leaves (ledger entry amount)
+    allocated: Decimal  # Change in total leaves allocated
+    entry_type: LeaveLedgerEntryType
+    application_id: Optional[int] = None
+
+
+def record_ledger_source(
+    allocation: LeaveAllocation,
+    entry_type: LeaveLedgerEntryType,
+    application_id: Optional[int] = None,
+) -> None:
+    """Label the next balance change of an allocation for its ledger entry.
+
+    Changes flushed without a label are recorded as adjustments.
+    """
+    allocation.__dict__["_ledger_source"] = (entry_type, application_id)
+
+
+def _counted_allocation(
+    employee_id: Optional[int],
+    leave_type_id: Optional[int],
+    from_date: Optional[date],
+    to_date: Optional[date],
+    status: Any,
+    unused_leaves: Optional[Decimal],
+    total_leaves_allocated: Optional[Decimal],
+) -> Optional[Tuple[LeavePeriod, Decimal, Decimal]]:
+    """(period, unused, allocated) an allocation contributes, or None if it counts for nothing."""
+    if isinstance(status, str):
+        try:
+            status = LeaveAllocationStatus(status)
+        except ValueError:
+            return None
+    if status not in ACTIVE_ALLOCATION_STATUSES or None in (employee_id, leave_type_id, from_date, to_date):
+        return None
+    return (
+        (employee_id, leave_type_id, from_date, to_date),
+        Decimal(unused_leaves or 0),
+        Decimal(total_leaves_allocated or 0),
+    )
+
+
+def _previous_value(state: Any, key: str) -> Any:
+    """Value of an allocation attribute as of the start of the flush."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    if history.added:
+        return None
+    return getattr(state.obj(), key)
+
+
+def allocation_movements(
+    allocation_id: int,
+    before: Optional[Tuple[LeavePeriod, Decimal, Decimal]],
+    after: Optional[Tuple[LeavePeriod, Decimal, Decimal]],
+    source: Optional[Tuple[LeaveLedgerEntryType, Optional[int]]] = None,
+) -> List[LeaveMovement]:
+    """Movements taking an allocation from one counted state to another."""
+    entry_type, application_id = source or (
+        LeaveLedgerEntryType.ALLOCATION if before is None else LeaveLedgerEntryType.ADJUSTMENT, None
+    )
+    if before and after and before[0] == after[0]:
+        days, allocated = after[1] - before[1], after[2] - before[2]
+        if not days and not allocated:
+            return []
+        return [LeaveMovement(allocation_id, after[0], days, allocated, entry_type, application_id)]
+
+    movements = []
+    if before:
+        movements.append(LeaveMovement(
+            allocation_id, before[0], -before[1], -before[2], LeaveLedgerEntryType.ADJUSTMENT,
+        ))
+    if after:
+        movements.append(LeaveMovement(allocation_id, after[0], after[1], after[2], entry_type, application_id))
+    return movements
+
+
+def apply_leave_movements(connection: Any, movements: Iterable[LeaveMovement]) -> None:
+    """Write ledger entries and balance deltas for allocation changes.
+
+    Used by the flush hook and by bulk writes that change allocations with
+    Core statements.
+    """
+    now = datetime.utcnow()
+    entries: List[Dict[str, Any]] = []
+    deltas: Dict[LeavePeriod, List[Decimal]] = {}
+    for movement in movements:
+        if movement.days:
+            employee_id, leave_type_id, from_date, to_date = movement.period
+            entries.append({
+                "allocation_id": movement.allocation_id,
+                "application_id": movement.application_id,
+                "employee_id": employee_id,
+                "leave_type_id": leave_type_id,
+                "from_date": from_date,
+                "to_date": to_date,
+                "entry_type": movement.entry_type,
+                "days": movement.days,
+                "created_at": now,
+            })
+        delta = deltas.setdefault(movement.period, [Decimal("0"), Decimal("0")])
+        delta[0] += movement.days
+        delta[1] += movement.allocated
+
+    if entries:
+        connection.execute(insert(LeaveLedgerEntry.__table__), entries)
+    deltas = {period: delta for period, delta in deltas.items() if any(delta)}
+    if deltas:
+        _apply_balance_deltas(connection, deltas, now)
+
+
+def _apply_balance_deltas(connection: Any, deltas: Dict[LeavePeriod, List[Decimal]], now: datetime) -> None:
+    table = LeaveBalance.__table__
+    periods = sorted(deltas)
+
+    if connection.dialect.name == "postgresql":
+        stmt = pg_insert(table).values([
+            {
+                "employee_id": period[0], "leave_type_id": period[1], "from_date": period[2], "to_date": period[3],
+                "balance": deltas[period][0], "allocated": deltas[period][1], "updated_at": now,
+            }
+            for period in periods
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_leave_balances_emp_type_period",
+            set_={
+                "balance": table.c.balance + stmt.excluded.balance,
+                "allocated": table.c.allocated + stmt.excluded.allocated,
+                "updated_at": now,
+            },
+        )
+        connection.execute(stmt)
+        return
+
+    for period in periods:
+        days, allocated = deltas[period]
+        result = connection.execute(
+            table.update()
+            .where(
+                table.c.employee_id == period[0],
+                table.c.leave_type_id == period[1],
+                table.c.from_date == period[2],
+                table.c.to_date == period[3],
+            )
+            .values(balance=table.c.balance + days, allocated=table.c.allocated + allocated, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(
+                employee_id=period[0], leave_type_id=period[1], from_date=period[2], to_date=period[3],
+                balance=days, allocated=allocated, updated_at=now,
+            ))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_leave_balances(session: Session, flush_context: Any) -> None:
+    """Apply balance changes for leave allocations written in this flush.
+
+    Runs on the flush's connection, so ledger entries and balances commit or
+    roll back with the allocation changes. Core writes report their changes
+    through apply_leave_movements; anything else is picked up by
+    app.services.leave_ledger.reconcile_leave_balances.
+    """
+    movements: List[LeaveMovement] = []
+
+    for obj in session.new:
+        if isinstance(obj, LeaveAllocation):
+            after = _counted_allocation(*(getattr(obj, key) for key in _BALANCE_KEYS))
+            movements += allocation_movements(obj.id, None, after, obj.__dict__.pop("_ledger_source", None))
+
+    for obj in session.dirty:
+        if not isinstance(obj, LeaveAllocation):
+            continue
+        state = inspect(obj)
+        source = obj.__dict__.pop("_ledger_source", None)
+        if not any(state.attrs[key].history.has_changes() for key in _BALANCE_KEYS):
+            continue
+        before = _counted_allocation(*(_previous_value(state, key) for key in _BALANCE_KEYS))
+        after = _counted_allocation(*(getattr(obj, key) for key in _BALANCE_KEYS))
+        movements += allocation_movements(obj.id, before, after, source)
+
+    for obj in session.deleted:
+        if isinstance(obj, LeaveAllocation):
+            before = _counted_allocation(*(_previous_value(inspect(obj), key) for key in _BALANCE_KEYS))
+            movements += allocation_movements(obj.id, before, None)
+
+    if movements:
+        apply_leave_movements(session.connection(), movements)
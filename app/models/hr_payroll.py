@@ -1,7 +1,7 @@
 """Payroll models for ERPNext HR Module sync."""
 from __future__ import annotations
 
-from sqlalchemy import String, Text, ForeignKey, Enum, Index
+from sqlalchemy import String, Text, ForeignKey, Enum, Index, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, date
 from decimal import Decimal
@@ -29,6 +29,13 @@ class SalarySlipStatus(enum.Enum):
     VOIDED = "voided"
 
 
+class PayrollRunStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 # ============= SALARY COMPONENT =============
 class SalaryComponent(Base):
     """Salary Component - earnings and deductions types."""
@@ -272,6 +279,56 @@ class PayrollEntry(Base):
         return f"<PayrollEntry {self.start_date} to {self.end_date}>"
 
 
+# ============= PAYROLL RUN =============
+class PayrollRun(Base):
+    """Payroll Run - background salary slip generation for a payroll entry.
+
+    Employees are processed in ascending employee_id order and the run
+    commits after each chunk together with ``last_employee_id``, so a failed
+    or interrupted run resumes after the last committed employee.
+    """
+
+    __tablename__ = "payroll_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    payroll_entry_id: Mapped[int] = mapped_column(
+        ForeignKey("payroll_entries.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+
+    status: Mapped[PayrollRunStatus] = mapped_column(
+        Enum(PayrollRunStatus), default=PayrollRunStatus.PENDING, nullable=False, index=True
+    )
+    task_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    # Progress
+    total_employees: Mapped[int] = mapped_column(default=0)
+    processed_employees: Mapped[int] = mapped_column(default=0)
+    created_count: Mapped[int] = mapped_column(default=0)
+    skipped_count: Mapped[int] = mapped_column(default=0)
+    last_employee_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    skipped_details: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Audit
+    created_by_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    @property
+    def progress_percent(self) -> float:
+        if self.status == PayrollRunStatus.COMPLETED:
+            return 100.0
+        if not self.total_employees:
+            return 0.0
+        return round(100.0 * self.processed_employees / self.total_employees, 1)
+
+    def __repr__(self) -> str:
+        return f"<PayrollRun {self.id} entry={self.payroll_entry_id} ({self.status.value})>"
+
+
 # ============= SALARY SLIP =============
 class SalarySlip(Base):
     """Salary Slip - employee monthly payslip."""
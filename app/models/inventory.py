@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from sqlalchemy import String, Text, ForeignKey, Numeric, Enum
+from sqlalchemy import String, Text, ForeignKey, Numeric, Enum, JSON, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional, List
+from typing import Any, Optional, List
 import enum
 from app.database import Base
 
@@ -231,6 +231,71 @@ class StockLedgerEntry(Base):
         return f"<StockLedgerEntry {self.item_code} @ {self.warehouse} qty={self.actual_qty}>"
 
 
+# ============= STOCK VALUATION =============
+class StockValuationState(Base):
+    """Current FIFO/LIFO cost layers and moving-average rate per item and warehouse.
+
+    Maintained incrementally from stock ledger entries by
+    InventoryValuationService; layers are JSON lists of [qty, rate] strings.
+    """
+
+    __tablename__ = "stock_valuation_states"
+    __table_args__ = (
+        UniqueConstraint("item_code", "warehouse", name="uq_stock_valuation_state_item_wh"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    item_code: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    warehouse: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+
+    qty: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    moving_average_rate: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    fifo_value: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    lifo_value: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    fifo_layers: Mapped[Optional[List[Any]]] = mapped_column(JSON, default=list)
+    lifo_layers: Mapped[Optional[List[Any]]] = mapped_column(JSON, default=list)
+
+    # Last ledger entry applied (by id and by posting order)
+    last_sle_id: Mapped[int] = mapped_column(default=0, index=True)
+    last_posting_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Cancelled entries up to last_sle_id when the layers were last built;
+    # a different count means an applied entry was cancelled since
+    cancelled_sle_count: Mapped[int] = mapped_column(default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<StockValuationState {self.item_code} @ {self.warehouse} qty={self.qty}>"
+
+
+class StockValuationSnapshot(Base):
+    """End-of-day copy of a StockValuationState, used to rebuild valuations as of past dates."""
+
+    __tablename__ = "stock_valuation_snapshots"
+    __table_args__ = (
+        UniqueConstraint("item_code", "warehouse", "snapshot_date", name="uq_stock_valuation_snapshot"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    item_code: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    warehouse: Mapped[str] = mapped_column(String(255), nullable=False)
+    snapshot_date: Mapped[date] = mapped_column(nullable=False, index=True)
+
+    qty: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    moving_average_rate: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    fifo_value: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    lifo_value: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    fifo_layers: Mapped[Optional[List[Any]]] = mapped_column(JSON, default=list)
+    lifo_layers: Mapped[Optional[List[Any]]] = mapped_column(JSON, default=list)
+    last_sle_id: Mapped[int] = mapped_column(default=0)
+    last_posting_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<StockValuationSnapshot {self.item_code} @ {self.warehouse} {self.snapshot_date}>"
+
+
 # ============= LANDED COST VOUCHER =============
 class LandedCostVoucher(Base):
     """Landed cost voucher for allocating additional costs to inventory items."""
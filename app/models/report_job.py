@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import enum
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import String, Text, Enum, ForeignKey, Index, JSON, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.utils.datetime_utils import utc_now
+
+
+class ReportJobStatus(enum.Enum):
+    """Status of a background report job."""
+    PENDING = "pending"         # Job created, waiting for a worker
+    RUNNING = "running"         # Worker is computing the report
+    COMPLETED = "completed"     # Result stored and downloadable
+    FAILED = "failed"           # Report computation failed
+
+
+class ReportJob(Base):
+    """A heavy report computed in the background with a persisted result.
+
+    Jobs are keyed by ``params_hash`` (SHA256 of the report type and its
+    canonicalised parameters) so identical requests share one job/result.
+    Results are stored zlib-compressed either inline (``result_data``) or on
+    disk (``result_path``) when a storage directory is configured.
+    """
+
+    __tablename__ = "report_jobs"
+
+    __table_args__ = (
+        Index("ix_report_jobs_hash_status", "params_hash", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    # Report identification
+    report_type: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    params: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    params_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+
+    # Status tracking
+    status: Mapped[ReportJobStatus] = mapped_column(
+        Enum(ReportJobStatus),
+        default=ReportJobStatus.PENDING,
+        nullable=False,
+        index=True,
+    )
+    progress_percent: Mapped[float] = mapped_column(default=0.0)
+    progress_message: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    task_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    # Result storage (zlib-compressed JSON)
+    result_data: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    result_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    result_size: Mapped[Optional[int]] = mapped_column(nullable=True)  # Uncompressed bytes
+    result_compressed_size: Mapped[Optional[int]] = mapped_column(nullable=True)
+
+    # Error tracking
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Audit
+    created_by_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=utc_now)
+    started_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(nullable=True, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ReportJob {self.id}: {self.report_type} - {self.status.value}>"
+
+    @property
+    def has_result(self) -> bool:
+        return self.status == ReportJobStatus.COMPLETED and (
+            self.result_data is not None or self.result_path is not None
+        )
+
+    def start(self, task_id: Optional[str] = None) -> None:
+        """Mark job as running."""
+        self.status = ReportJobStatus.RUNNING
+        self.started_at = utc_now()
+        self.progress_percent = 0.0
+        if task_id:
+            self.task_id = task_id
+
+    def complete(self) -> None:
+        """Mark job as completed."""
+        self.status = ReportJobStatus.COMPLETED
+        self.progress_percent = 100.0
+        self.progress_message = None
+        self.completed_at = utc_now()
+
+    def fail(self, error_message: str) -> None:
+        """Mark job as failed."""
+        self.status = ReportJobStatus.FAILED
+        self.error_message = error_message
+        self.completed_at = utc_now()
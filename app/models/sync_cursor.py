@@ -22,7 +22,7 @@ def parse_datetime(value: Union[str, datetime, int, float, None]) -> Optional[da
 
     Handles:
     - datetime objects (passthrough)
-    - ISO format strings (YYYY-MM-DD HH:MM:SS or YYYY-MM-DDTHH:MM:SS)
+    - ISO format strings (YYYY-MM-DD HH:MM:SS[.ffffff] or YYYY-MM-DDTHH:MM:SS[.ffffff])
     - Date strings (YYYY-MM-DD)
     - Unix timestamps (int or float)
     """
@@ -36,6 +36,7 @@ def parse_datetime(value: Union[str, datetime, int, float, None]) -> Optional[da
         # Try various formats
         for fmt in [
             "%Y-%m-%d %H:%M:%S",
+            "%Y-%m-%d %H:%M:%S.%f",
             "%Y-%m-%dT%H:%M:%S",
             "%Y-%m-%dT%H:%M:%S.%f",
             "%Y-%m-%d",
@@ -82,6 +82,14 @@ class EInvoiceStatus(enum.Enum):
     CANCELLED = "cancelled"
 
 
+class EInvoiceBatchStatus(enum.Enum):
+    """Bulk e-invoice validation/rendering batch status."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class PAYEFilingFrequency(enum.Enum):
     """PAYE filing frequency."""
     MONTHLY = "monthly"
@@ -699,6 +707,11 @@ class EInvoice(Base):
     # QR code data (for printed invoices)
     qr_code_data: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
+    # Rendered UBL XML, reused while the content hash of its inputs is unchanged
+    ubl_xml: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    ubl_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    ubl_rendered_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
     # Notes
     note: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
@@ -767,3 +780,57 @@ class EInvoiceLine(Base):
 
     def __repr__(self) -> str:
         return f"<EInvoiceLine {self.line_id} {self.item_name}>"
+
+
+class EInvoiceBatch(Base):
+    """
+    Bulk validation and UBL rendering of a set of e-invoices.
+
+    Invoices are processed in ascending id order and the batch commits after
+    each chunk together with ``last_einvoice_id``, so a failed or interrupted
+    batch resumes after the last committed invoice. Invoices that fail
+    validation are listed in ``invoice_errors``.
+    """
+
+    __tablename__ = "ng_einvoice_batches"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    company: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+
+    # Invoices selected when the batch was started, in processing order
+    einvoice_ids: Mapped[List[int]] = mapped_column(JSON, nullable=False)
+
+    status: Mapped[EInvoiceBatchStatus] = mapped_column(
+        Enum(EInvoiceBatchStatus), default=EInvoiceBatchStatus.PENDING, nullable=False, index=True
+    )
+    task_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    # Progress
+    total_invoices: Mapped[int] = mapped_column(default=0)
+    processed_invoices: Mapped[int] = mapped_column(default=0)
+    valid_count: Mapped[int] = mapped_column(default=0)
+    invalid_count: Mapped[int] = mapped_column(default=0)
+    rendered_count: Mapped[int] = mapped_column(default=0)
+    cached_count: Mapped[int] = mapped_column(default=0)
+    last_einvoice_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    invoice_errors: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(JSON, nullable=True)
+
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Audit
+    created_by_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+
+    @property
+    def progress_percent(self) -> float:
+        if self.status == EInvoiceBatchStatus.COMPLETED:
+            return 100.0
+        if not self.total_invoices:
+            return 0.0
+        return round(100.0 * self.processed_invoices / self.total_invoices, 1)
+
+    def __repr__(self) -> str:
+        return f"<EInvoiceBatch {self.id} {self.company} ({self.status.value})>"
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
-from sqlalchemy import String, Text, ForeignKey, Enum, Numeric, JSON
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Text, ForeignKey, Enum, Numeric, JSON, event, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 from datetime import datetime
 from app.utils.datetime_utils import utc_now, ensure_utc
 from decimal import Decimal
-from typing import Optional, List, TYPE_CHECKING
+from typing import Any, Dict, Iterable, Optional, List, Tuple, TYPE_CHECKING
 import enum
 from app.database import Base, SoftDeleteMixin
+from app.models.agent import AgentWorkload
 
 if TYPE_CHECKING:
     from app.models.customer import Customer
@@ -26,6 +28,10 @@ class TicketStatus(enum.Enum):
     ON_HOLD = "on_hold"
 
 
+# Statuses that count towards an assignee's open-ticket workload
+OPEN_TICKET_STATUSES = (TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD)
+
+
 class TicketPriority(enum.Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -77,7 +83,9 @@ class Ticket(SoftDeleteMixin, Base):
     issue_type: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     # Status & Priority
-    status: Mapped[TicketStatus] = mapped_column(Enum(TicketStatus), default=TicketStatus.OPEN, index=True)
+    status: Mapped[TicketStatus] = mapped_column(
+        Enum(TicketStatus), default=TicketStatus.OPEN, index=True, active_history=True
+    )
     priority: Mapped[TicketPriority] = mapped_column(Enum(TicketPriority), default=TicketPriority.MEDIUM, index=True)
 
     # Assignment - Employee FKs
@@ -88,7 +96,7 @@ class Ticket(SoftDeleteMixin, Base):
     )  # FK for local queries
 
     # Legacy/String fields for non-linked data
-    assigned_to: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    assigned_to: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, active_history=True)
     raised_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     owner_email: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     company: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -398,3 +406,123 @@ class HDTicketDependency(Base):
 
     def __repr__(self) -> str:
         return f"<HDTicketDependency {self.ticket_id} depends on {self.depends_on_erpnext_id}>"
+
+
+# =============================================================================
+# AGENT WORKLOAD COUNTERS
+# =============================================================================
+
+_WORKLOAD_KEYS = ("assigned_to", "status", "is_deleted")
+
+
+def _counted_assignee(assignee: Optional[str], status: Any, is_deleted: Optional[bool]) -> Optional[str]:
+    """Return the assignee whose open-ticket count includes this ticket state."""
+    if isinstance(status, str):
+        try:
+            status = TicketStatus(status)
+        except ValueError:
+            return None
+    if assignee and status in OPEN_TICKET_STATUSES and not is_deleted:
+        return assignee
+    return None
+
+
+def _previous_value(state: Any, key: str) -> Any:
+    """Value of a ticket attribute as of the start of the flush."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    if history.added:
+        # Set without the old value ever being loaded
+        return None
+    return getattr(state.obj(), key)
+
+
+def _apply_workload_deltas(connection: Any, deltas: Dict[str, int]) -> None:
+    table = AgentWorkload.__table__
+    now = datetime.utcnow()
+    assignees = sorted(deltas)
+
+    if connection.dialect.name == "postgresql":
+        stmt = pg_insert(table).values([
+            {"assignee": assignee, "open_tickets": deltas[assignee], "updated_at": now}
+            for assignee in assignees
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["assignee"],
+            set_={"open_tickets": table.c.open_tickets + stmt.excluded.open_tickets, "updated_at": now},
+        )
+        connection.execute(stmt)
+        return
+
+    for assignee in assignees:
+        result = connection.execute(
+            table.update()
+            .where(table.c.assignee == assignee)
+            .values(open_tickets=table.c.open_tickets + deltas[assignee], updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(
+                table.insert().values(assignee=assignee, open_tickets=deltas[assignee], updated_at=now)
+            )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_agent_workload(session: Session, flush_context: Any) -> None:
+    """Apply open-ticket count changes for tickets written in this flush.
+
+    Runs on the flush's connection, so the counters commit or roll back with
+    the ticket changes. Bulk UPDATEs that bypass the ORM report their changes
+    through apply_workload_changes; anything else is picked up by the
+    periodic reconciliation in app.services.agent_workload.
+    """
+    deltas: Dict[str, int] = {}
+
+    def _bump(assignee: Optional[str], amount: int) -> None:
+        if assignee:
+            deltas[assignee] = deltas.get(assignee, 0) + amount
+
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            _bump(_counted_assignee(obj.assigned_to, obj.status, obj.is_deleted), 1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[key].history.has_changes() for key in _WORKLOAD_KEYS):
+            continue
+        _bump(_counted_assignee(*(_previous_value(state, key) for key in _WORKLOAD_KEYS)), -1)
+        _bump(_counted_assignee(obj.assigned_to, obj.status, obj.is_deleted), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            state = inspect(obj)
+            _bump(_counted_assignee(*(_previous_value(state, key) for key in _WORKLOAD_KEYS)), -1)
+
+    deltas = {assignee: delta for assignee, delta in deltas.items() if delta}
+    if deltas:
+        _apply_workload_deltas(session.connection(), deltas)
+
+
+def apply_workload_changes(
+    connection: Any,
+    changes: Iterable[Tuple[Tuple[Any, Any, Any], Tuple[Any, Any, Any]]],
+) -> None:
+    """Apply open-ticket count changes for tickets written with Core UPDATEs.
+
+    Each change is a pair of (assigned_to, status, is_deleted) tuples: the
+    ticket's state before and after the update.
+    """
+    deltas: Dict[str, int] = {}
+    for before, after in changes:
+        for state, amount in ((before, -1), (after, 1)):
+            assignee = _counted_assignee(*state)
+            if assignee:
+                deltas[assignee] = deltas.get(assignee, 0) + amount
+
+    deltas = {assignee: delta for assignee, delta in deltas.items() if delta}
+    if deltas:
+        _apply_workload_deltas(connection, deltas)
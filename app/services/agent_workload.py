@@ -0,0 +1,180 @@
+"""Agent open-ticket workload index.
+
+Routing reads agent loads from the agent_workloads counter table instead of
+counting tickets per agent:
+- open_ticket_counts: current loads for a set of assignees in one query
+- AgentPool: min-heaps over a candidate roster for least-busy and
+  load-balanced picks, kept current as a batch assigns tickets
+- reconcile_agent_workload: drift correction against a GROUP BY over tickets
+
+The counters themselves are maintained by the ticket flush hook in
+app.models.ticket.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.agent import Agent, AgentWorkload
+from app.models.ticket import OPEN_TICKET_STATUSES, Ticket
+
+logger = structlog.get_logger()
+
+DEFAULT_CAPACITY = 10
+
+
+def agent_name(agent: Agent) -> str:
+    """Assignee string routing uses for an agent's tickets."""
+    return str(agent.display_name or agent.email or f"agent-{agent.id}")
+
+
+def agent_capacity(agent: Agent) -> int:
+    return agent.capacity or DEFAULT_CAPACITY
+
+
+def open_ticket_counts(db: Session, assignees: Iterable[str]) -> Dict[str, int]:
+    """Open-ticket counts for the given assignees (missing ones count as 0)."""
+    names = sorted({name for name in assignees if name})
+    counts = dict.fromkeys(names, 0)
+    if not names:
+        return counts
+
+    rows = db.query(AgentWorkload.assignee, AgentWorkload.open_tickets).filter(
+        AgentWorkload.assignee.in_(names)
+    ).all()
+    for assignee, open_tickets in rows:
+        counts[assignee] = max(open_tickets or 0, 0)
+    return counts
+
+
+def agent_loads(db: Session, agents: List[Agent]) -> Dict[int, int]:
+    """Open-ticket counts keyed by agent id."""
+    counts = open_ticket_counts(db, (agent_name(agent) for agent in agents))
+    return {agent.id: counts.get(agent_name(agent), 0) for agent in agents}
+
+
+class AgentPool:
+    """Least-busy and load-balanced selection over one roster of agents.
+
+    Loads live in a dict shared by every pool of a batch, so assigning to an
+    agent through one roster is seen by the others. Heap entries are
+    refreshed lazily: loads only grow while a batch runs, so a stale entry
+    is re-pushed with its current key when it reaches the top. Ties go to
+    the agent listed first, as the linear scans did.
+    """
+
+    def __init__(self, agents: List[Agent], loads: Dict[str, int]):
+        self.agents = agents
+        self.loads = loads
+        self._names = [agent_name(agent) for agent in agents]
+        self._capacities = [agent_capacity(agent) for agent in agents]
+        self._least_busy: List[Tuple[int, int]] = [
+            (loads.get(name, 0), position) for position, name in enumerate(self._names)
+        ]
+        self._balanced: List[Tuple[float, int]] = [
+            (self._utilization(position), position) for position in range(len(agents))
+        ]
+        heapq.heapify(self._least_busy)
+        heapq.heapify(self._balanced)
+
+    def _utilization(self, position: int) -> float:
+        capacity = self._capacities[position]
+        load = self.loads.get(self._names[position], 0)
+        return load / capacity if capacity > 0 else float("inf")
+
+    def least_busy(self) -> Optional[Agent]:
+        """Agent with the fewest open tickets."""
+        heap = self._least_busy
+        while heap:
+            load, position = heap[0]
+            current = self.loads.get(self._names[position], 0)
+            if current == load:
+                return self.agents[position]
+            heapq.heapreplace(heap, (current, position))
+        return None
+
+    def load_balanced(self) -> Optional[Agent]:
+        """Agent with the lowest utilization that is still under capacity."""
+        heap = self._balanced
+        while heap:
+            utilization, position = heap[0]
+            current = self._utilization(position)
+            if current >= 1.0:
+                # Loads never drop during a batch, so a full agent stays full
+                heapq.heappop(heap)
+            elif current == utilization:
+                return self.agents[position]
+            else:
+                heapq.heapreplace(heap, (current, position))
+        return None
+
+    def record_assignment(self, agent: Agent) -> None:
+        name = agent_name(agent)
+        self.loads[name] = self.loads.get(name, 0) + 1
+
+
+def pool_for(db: Session, agents: List[Agent], loads: Optional[Dict[str, int]] = None) -> AgentPool:
+    """Build a pool, loading counts for any agents not yet in ``loads``."""
+    loads = {} if loads is None else loads
+    missing = [agent_name(agent) for agent in agents if agent_name(agent) not in loads]
+    if missing:
+        loads.update(open_ticket_counts(db, missing))
+    return AgentPool(agents, loads)
+
+
+def reconcile_agent_workload(db: Session) -> Dict[str, Any]:
+    """Correct counter drift against the tickets table.
+
+    Counter rows are locked before tickets are counted (on PostgreSQL), so
+    a concurrent assignment either commits before the count or applies its
+    delta after this correction, never both.
+    """
+    stored = {
+        row.assignee: row
+        for row in db.query(AgentWorkload).with_for_update().all()
+    }
+    actual: Dict[str, int] = dict(
+        db.query(Ticket.assigned_to, func.count(Ticket.id))
+        .filter(
+            Ticket.assigned_to.isnot(None),
+            Ticket.assigned_to != "",
+            Ticket.status.in_(OPEN_TICKET_STATUSES),
+        )
+        .group_by(Ticket.assigned_to)
+        .execution_options(include_all_companies=True)
+        .all()
+    )
+
+    corrections: List[Dict[str, Any]] = []
+    for assignee in sorted(set(stored) | set(actual)):
+        expected = actual.get(assignee, 0)
+        row = stored.get(assignee)
+        recorded = row.open_tickets if row else 0
+        if recorded == expected:
+            continue
+        corrections.append({"assignee": assignee, "recorded": recorded, "actual": expected})
+        if row:
+            row.open_tickets = expected
+        else:
+            db.add(AgentWorkload(assignee=assignee, open_tickets=expected))
+
+    db.commit()
+
+    drift = sum(abs(c["actual"] - c["recorded"]) for c in corrections)
+    if corrections:
+        logger.warning(
+            "agent_workload_drift_corrected",
+            assignees=len(corrections),
+            drift=drift,
+        )
+
+    return {
+        "assignees_checked": len(set(stored) | set(actual)),
+        "corrected": len(corrections),
+        "drift": drift,
+        "corrections": corrections,
+    }
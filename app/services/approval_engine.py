@@ -8,20 +8,29 @@ Provides a full workflow engine for document approvals with:
 - Escalation rules (timeout → escalate)
 - Parallel approval support (all must approve)
 - Document submit/approve/reject/post actions
-- Pending approvals dashboard per user
+- Pending approvals dashboard per user, served from approver assignments
+  (one row per user/role that can act on a pending document's current step)
+  with a cached per-user pending count
 """
+import time
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
+
+import structlog
+from redis import Redis
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, event, select
 
+from app.config import settings
 from app.models.accounting_ext import (
     ApprovalWorkflow,
     ApprovalStep,
     ApprovalMode,
     DocumentApproval,
     ApprovalHistory,
+    ApprovalAssignment,
     ApprovalStatus,
     AuditAction,
 )
@@ -56,6 +65,91 @@ class InvalidStateError(ApprovalError):
     pass
 
 
+# =============================================================================
+# PENDING COUNT CACHE
+# =============================================================================
+
+logger = structlog.get_logger()
+
+PENDING_COUNT_TTL = 60
+PENDING_COUNT_PREFIX = "approvals:pending"
+PENDING_COUNT_GENERATION_KEY = f"{PENDING_COUNT_PREFIX}:generation"
+
+# Set on a session whose transaction changed approval assignments
+_ASSIGNMENTS_CHANGED = "approval_assignments_changed"
+
+_redis_client: Optional[Redis] = None
+_local_generation = 0
+_local_counts: Dict[str, Tuple[float, int]] = {}
+
+
+def _get_redis() -> Optional[Redis]:
+    global _redis_client
+    if _redis_client is None and settings.redis_url:
+        try:
+            _redis_client = Redis.from_url(settings.redis_url, decode_responses=True)
+            _redis_client.ping()
+        except RedisError as e:
+            logger.warning("redis_connection_failed", error=str(e))
+            _redis_client = None
+    return _redis_client
+
+
+def invalidate_pending_counts() -> None:
+    """Drop every cached pending count, in this process and in Redis.
+
+    Counts are keyed by a generation number, so bumping it invalidates all
+    users at once; this is needed because role-based assignments affect
+    everyone holding the role.
+    """
+    global _local_generation
+    _local_generation += 1
+    _local_counts.clear()
+    client = _get_redis()
+    if client is not None:
+        try:
+            client.incr(PENDING_COUNT_GENERATION_KEY)
+        except RedisError as e:
+            logger.warning("approval_count_invalidate_failed", error=str(e))
+
+
+def _cached_count(user_id: int, doctype: Optional[str], compute) -> int:
+    suffix = f"{user_id}:{doctype or '*'}"
+    client = _get_redis()
+    if client is not None:
+        try:
+            generation = client.get(PENDING_COUNT_GENERATION_KEY) or "0"
+            key = f"{PENDING_COUNT_PREFIX}:{generation}:{suffix}"
+            cached = client.get(key)
+            if cached is not None:
+                return int(cached)
+            count = compute()
+            client.setex(key, PENDING_COUNT_TTL, count)
+            return count
+        except RedisError as e:
+            logger.warning("approval_count_cache_failed", error=str(e))
+
+    key = f"{_local_generation}:{suffix}"
+    hit = _local_counts.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+    count = compute()
+    _local_counts[key] = (time.monotonic() + PENDING_COUNT_TTL, count)
+    return count
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_counts_after_commit(session: Session) -> None:
+    # Only once the new assignments are visible to other sessions
+    if session.info.pop(_ASSIGNMENTS_CHANGED, False):
+        invalidate_pending_counts()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_assignment_changes(session: Session) -> None:
+    session.info.pop(_ASSIGNMENTS_CHANGED, None)
+
+
 class ApprovalEngine:
     """Service for managing document approval workflows."""
 
@@ -382,8 +476,9 @@ class ApprovalEngine:
         )
 
         # Emit notification to approvers if pending
+        current_step = self._get_current_step(approval) if approval.status == ApprovalStatus.PENDING else None
+        self._assign_approvers(approval, current_step)
         if approval.status == ApprovalStatus.PENDING:
-            current_step = self._get_current_step(approval)
             if current_step:
                 approver_ids = self._get_step_approver_ids(current_step)
                 self._emit_approval_notification(
@@ -481,6 +576,7 @@ class ApprovalEngine:
             approval.approved_at = datetime.utcnow()
             approval.approved_by_id = user_id
 
+        self._assign_approvers(approval, next_step)
         self.db.flush()
 
         # Audit log
@@ -580,6 +676,7 @@ class ApprovalEngine:
         approval.rejected_at = datetime.utcnow()
         approval.rejected_by_id = user_id
         approval.rejection_reason = reason
+        self._assign_approvers(approval, None)
 
         # Record history
         history = ApprovalHistory(
@@ -709,6 +806,7 @@ class ApprovalEngine:
 
         # Update approval
         approval.status = ApprovalStatus.CANCELLED
+        self._assign_approvers(approval, None)
 
         # Record history
         history = ApprovalHistory(
@@ -767,7 +865,20 @@ class ApprovalEngine:
         if not current_step:
             return False
 
-        return self._user_matches_step_requirements(user_id, current_step)
+        if self._user_matches_step_requirements(user_id, current_step):
+            return True
+
+        # Escalation targets may act once the step has been escalated
+        if approval.escalation_count:
+            return self.db.query(
+                self._assigned_to_user(user_id)
+                .where(
+                    ApprovalAssignment.document_approval_id == approval.id,
+                    ApprovalAssignment.is_escalation == True,
+                )
+                .exists()
+            ).scalar()
+        return False
 
     def _user_matches_step_requirements(
         self,
@@ -833,6 +944,8 @@ class ApprovalEngine:
         self,
         user_id: int,
         doctype: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
     ) -> List[dict]:
         """
         Get documents pending approval by a specific user.
@@ -840,59 +953,151 @@ class ApprovalEngine:
         Args:
             user_id: User ID
             doctype: Optional filter by document type
+            limit: Maximum number of results (all when None)
+            offset: Number of results to skip
+
+        Returns:
+            List of pending approval dicts, oldest first
+        """
+        query = (
+            self.db.query(DocumentApproval, ApprovalStep)
+            .join(
+                ApprovalStep,
+                and_(
+                    ApprovalStep.workflow_id == DocumentApproval.workflow_id,
+                    ApprovalStep.step_order == DocumentApproval.current_step,
+                ),
+            )
+            .filter(
+                DocumentApproval.id.in_(self._pending_for_user(user_id, doctype)),
+                DocumentApproval.status == ApprovalStatus.PENDING,
+            )
+            .order_by(DocumentApproval.id)
+            .offset(offset)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+
+        return [
+            {
+                "approval_id": approval.id,
+                "doctype": approval.doctype,
+                "document_id": approval.document_id,
+                "amount": str(approval.amount) if approval.amount else None,
+                "current_step": approval.current_step,
+                "step_name": current_step.step_name,
+                "submitted_at": approval.submitted_at.isoformat() if approval.submitted_at else None,
+                "submitted_by_id": approval.submitted_by_id,
+                "workflow_id": approval.workflow_id,
+                "can_reject": current_step.can_reject,
+            }
+            for approval, current_step in query
+        ]
+
+    def count_pending_approvals(
+        self,
+        user_id: int,
+        doctype: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> int:
+        """
+        Count documents pending approval by a specific user.
+
+        Cached for PENDING_COUNT_TTL seconds; the cache is dropped whenever a
+        transaction that changed assignments commits, so only role
+        membership changes can be served stale, and only until the TTL.
+
+        Args:
+            user_id: User ID
+            doctype: Optional filter by document type
+            use_cache: Read through the cache (False always queries)
 
         Returns:
-            List of pending approval dicts
+            Number of pending approvals
         """
-        # Get user's roles
+        def compute() -> int:
+            return (
+                self.db.query(func.count(DocumentApproval.id))
+                .filter(
+                    DocumentApproval.id.in_(self._pending_for_user(user_id, doctype)),
+                    DocumentApproval.status == ApprovalStatus.PENDING,
+                )
+                .scalar()
+            ) or 0
+
+        if not use_cache:
+            return compute()
+        return _cached_count(user_id, doctype, compute)
+
+    def _assigned_to_user(self, user_id: int):
+        """Select assignments naming the user, one of their roles, or anyone."""
         user_roles = (
-            self.db.query(Role.name)
+            select(Role.name)
             .join(UserRole, UserRole.role_id == Role.id)
-            .filter(UserRole.user_id == user_id)
-            .all()
+            .where(UserRole.user_id == user_id)
         )
-        role_names = [r[0] for r in user_roles]
-
-        # Query pending approvals
-        query = self.db.query(DocumentApproval).filter(
-            DocumentApproval.status == ApprovalStatus.PENDING
+        return select(ApprovalAssignment.document_approval_id).where(
+            or_(
+                ApprovalAssignment.user_id == user_id,
+                ApprovalAssignment.role_name.in_(user_roles),
+                and_(
+                    ApprovalAssignment.user_id.is_(None),
+                    ApprovalAssignment.role_name.is_(None),
+                ),
+            )
         )
 
+    def _pending_for_user(self, user_id: int, doctype: Optional[str]):
+        query = self._assigned_to_user(user_id)
         if doctype:
-            query = query.filter(DocumentApproval.doctype == doctype)
+            query = query.where(ApprovalAssignment.doctype == doctype)
+        return query
 
-        pending = query.all()
+    def _assign_approvers(
+        self,
+        approval: DocumentApproval,
+        step: Optional[ApprovalStep],
+        escalated: bool = False,
+    ) -> None:
+        """
+        Replace the approver assignments for a document.
 
-        # Filter to those the user can approve
-        results = []
-        for approval in pending:
-            current_step = self._get_current_step(approval)
-            if not current_step:
-                continue
+        Called whenever the status or current step changes. Pending documents
+        get rows for the step's user, else its role, else one "anyone" row
+        (mirroring _user_matches_step_requirements); escalation adds the
+        step's escalation user and role. Other statuses get no rows.
+        """
+        self.db.query(ApprovalAssignment).filter(
+            ApprovalAssignment.document_approval_id == approval.id
+        ).delete(synchronize_session=False)
+        self.db.info[_ASSIGNMENTS_CHANGED] = True
+
+        if approval.status != ApprovalStatus.PENDING or step is None:
+            return
 
-            can_approve = False
-            if current_step.user_id == user_id:
-                can_approve = True
-            elif current_step.role_required and current_step.role_required in role_names:
-                can_approve = True
-            elif not current_step.user_id and not current_step.role_required:
-                can_approve = True
-
-            if can_approve:
-                results.append({
-                    "approval_id": approval.id,
-                    "doctype": approval.doctype,
-                    "document_id": approval.document_id,
-                    "amount": str(approval.amount) if approval.amount else None,
-                    "current_step": approval.current_step,
-                    "step_name": current_step.step_name,
-                    "submitted_at": approval.submitted_at.isoformat() if approval.submitted_at else None,
-                    "submitted_by_id": approval.submitted_by_id,
-                    "workflow_id": approval.workflow_id,
-                    "can_reject": current_step.can_reject,
-                })
-
-        return results
+        if step.user_id is not None:
+            targets = [(step.user_id, None, False)]
+        elif step.role_required:
+            targets = [(None, step.role_required, False)]
+        else:
+            targets = [(None, None, False)]
+        if escalated:
+            if step.escalation_user_id is not None:
+                targets.append((step.escalation_user_id, None, True))
+            if step.escalation_role:
+                targets.append((None, step.escalation_role, True))
+
+        self.db.add_all([
+            ApprovalAssignment(
+                document_approval_id=approval.id,
+                doctype=approval.doctype,
+                step_order=step.step_order,
+                user_id=target_user_id,
+                role_name=role_name,
+                is_escalation=is_escalation,
+            )
+            for target_user_id, role_name, is_escalation in targets
+        ])
 
     def get_approval_status(
         self,
@@ -1020,6 +1225,7 @@ class ApprovalEngine:
         # Mark as escalated
         approval.escalated_at = datetime.utcnow()
         approval.escalation_count = (approval.escalation_count or 0) + 1
+        self._assign_approvers(approval, current_step, escalated=True)
 
         # Record history
         history = ApprovalHistory(
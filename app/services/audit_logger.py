@@ -4,10 +4,10 @@ Audit Logger Service
 Provides immutable audit logging for all accounting operations.
 All changes to accounting documents are recorded with full before/after state.
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Sequence
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert
 
 from app.models.accounting_ext import AuditLog, AuditAction
 from app.models.auth import User
@@ -91,6 +91,57 @@ class AuditLogger:
         self.db.flush()
         return entry
 
+    def log_batch(
+        self,
+        doctype: str,
+        action: AuditAction,
+        entries: Sequence[Dict[str, Any]],
+        user_id: Optional[int] = None,
+        remarks: Optional[str] = None,
+    ) -> int:
+        """
+        Create one audit log entry per document with a single INSERT.
+
+        Args:
+            doctype: Document type shared by all entries
+            action: Type of action performed
+            entries: Dicts with document_id and optionally document_name,
+                old_values, new_values and remarks
+            user_id: ID of the user performing the action (looked up once)
+            remarks: Default remarks for entries without their own
+
+        Returns:
+            Number of entries written
+        """
+        if not entries:
+            return 0
+
+        user_email = user_name = None
+        if user_id:
+            user = self.db.query(User).filter(User.id == user_id).first()
+            if user:
+                user_email, user_name = user.email, user.name
+
+        timestamp = datetime.utcnow()
+        rows = [
+            {
+                "doctype": doctype,
+                "document_id": entry["document_id"],
+                "document_name": entry.get("document_name"),
+                "action": action,
+                "user_id": user_id,
+                "user_email": user_email,
+                "user_name": user_name,
+                "old_values": entry.get("old_values"),
+                "new_values": entry.get("new_values"),
+                "remarks": entry.get("remarks", remarks),
+                "timestamp": timestamp,
+            }
+            for entry in entries
+        ]
+        self.db.execute(insert(AuditLog), rows)
+        return len(rows)
+
     def log_create(
         self,
         doctype: str,
@@ -376,6 +427,7 @@ def serialize_for_audit(obj: Any) -> Dict[str, Any]:
 
     Converts model to dict, handling special types like datetime, Decimal, Enum.
     """
+    from datetime import date
     from decimal import Decimal
     from enum import Enum
 
@@ -389,7 +441,7 @@ def serialize_for_audit(obj: Any) -> Dict[str, Any]:
         value = getattr(obj, key, None)
 
         # Convert special types
-        if isinstance(value, datetime):
+        if isinstance(value, (datetime, date)):
             value = value.isoformat()
         elif isinstance(value, Decimal):
             value = str(value)
@@ -1,36 +1,80 @@
 """Automation rule execution service.
 
-Evaluates and executes automation rules when triggers fire.
+Evaluates and executes automation rules when triggers fire. Sweeps over many
+tickets (idle tickets) use execute_trigger_bulk, which applies the same rule
+semantics but loads rules once and writes changes and logs set-based.
 """
 from __future__ import annotations
 
-import re
+import json
 import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, List, Sequence, Tuple
 
 import structlog
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, inspect as sa_inspect, update
 
 from app.models.support_automation import (
     AutomationRule,
     AutomationLog,
     AutomationTrigger,
     AutomationActionType,
-    ConditionOperator,
 )
-from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.models.ticket import Ticket, TicketStatus, TicketPriority, apply_workload_changes
 from app.models.agent import Agent, Team
+from app.services.rule_compiler import compile_rule, load_rule_set
 
 logger = structlog.get_logger()
 
+# Ticket columns that feed the agent open-ticket counters
+_WORKLOAD_FIELDS = ("assigned_to", "status", "is_deleted")
+
+
+class TicketDraft:
+    """Ticket view that collects action changes instead of writing them.
+
+    Reads see earlier changes, so later rules evaluate against the updated
+    ticket exactly as they do on the per-ticket path.
+    """
+
+    def __init__(self, ticket: Ticket) -> None:
+        object.__setattr__(self, "ticket", ticket)
+        object.__setattr__(self, "changes", {})
+
+    def __getattr__(self, name: str) -> Any:
+        changes = self.__dict__["changes"]
+        if name in changes:
+            return changes[name]
+        value = getattr(self.__dict__["ticket"], name)
+        if isinstance(value, list):
+            # Actions edit lists in place; keep those edits on the draft
+            value = list(value)
+            changes[name] = value
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if not hasattr(self.ticket, name):
+            raise AttributeError(name)
+        self.changes[name] = value
+
+    def dirty(self) -> Dict[str, Any]:
+        """Changed attributes whose value differs from the ticket's."""
+        return {
+            name: value for name, value in self.changes.items()
+            if value != getattr(self.ticket, name)
+        }
+
 
 class AutomationExecutor:
     """Service for executing automation rules."""
 
     def __init__(self, db: Session):
         self.db = db
+        # Agents/teams resolved during a bulk run; the session only holds
+        # weak references, so without this each ticket would reload them
+        self._lookups: Optional[Dict[Tuple[type, Any], Any]] = None
 
     def execute_trigger(
         self,
@@ -62,21 +106,23 @@ class AutomationExecutor:
             "executions": executions,
         }
 
-        # Get active rules for this trigger, ordered by priority
-        rules = self.db.query(AutomationRule).filter(
-            AutomationRule.is_active == True,
-            AutomationRule.trigger == trigger.value,
-        ).order_by(AutomationRule.priority).all()
+        # Compiled active rules for this trigger, ordered by priority
+        rule_set = load_rule_set(self.db, AutomationRule, {"trigger": trigger.value})
+        results["rules_evaluated"] = len(rule_set)
 
         logger.info(
             "automation_trigger_fired",
             trigger=trigger.value,
             ticket_id=ticket.id,
-            rules_to_evaluate=len(rules),
+            rules_to_evaluate=len(rule_set),
         )
 
-        for rule in rules:
-            results["rules_evaluated"] += 1
+        # Matches are found one at a time so later rules see earlier actions
+        for compiled in rule_set.matches(ticket, context):
+            start_time = time.time()
+            rule = self.db.get(AutomationRule, compiled.rule_id)
+            if rule is None:
+                continue
 
             # Check rate limiting
             if not self._check_rate_limit(rule):
@@ -87,12 +133,7 @@ class AutomationExecutor:
                 )
                 continue
 
-            # Evaluate conditions
-            start_time = time.time()
-            conditions_result = self._evaluate_conditions(rule.conditions, ticket, context)
-
-            if not conditions_result["all_matched"]:
-                continue
+            conditions_result = compiled.explain(ticket, context)
 
             # Execute actions
             actions_result = self._execute_actions(rule.actions, ticket, context)
@@ -123,13 +164,22 @@ class AutomationExecutor:
             if actions_result["errors"]:
                 errors.extend(actions_result["errors"])
 
-            # Update rule stats
-            rule.execution_count += 1
-            rule.last_executed_at = datetime.utcnow()
+            # Update rule stats without touching updated_at, which versions
+            # the compiled rule set
+            self.db.execute(
+                update(AutomationRule)
+                .where(AutomationRule.id == rule.id)
+                .values(
+                    execution_count=AutomationRule.execution_count + 1,
+                    last_executed_at=datetime.utcnow(),
+                    updated_at=AutomationRule.updated_at,
+                )
+            )
 
             # Check if we should stop processing
             if rule.stop_processing:
                 results["stopped_early"] = True
+                results["rules_evaluated"] = compiled.position + 1
                 logger.debug(
                     "automation_stop_processing",
                     rule_id=rule.id,
@@ -149,6 +199,206 @@ class AutomationExecutor:
 
         return results
 
+    def execute_trigger_bulk(
+        self,
+        trigger: AutomationTrigger,
+        tickets: Sequence[Ticket],
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Execute matching automation rules for many tickets at once.
+
+        Rule semantics match execute_trigger: priority order, later rules see
+        earlier actions, stop_processing, and the hourly limit enforced by
+        _check_rate_limit. The work is set-based:
+        - rules and per-rule execution counts for the last hour are loaded once
+        - ticket changes are written as one UPDATE per (column, value) pair
+        - execution logs are bulk-inserted, rule stats updated once per rule
+        - a single commit for the batch
+
+        Args:
+            trigger: The trigger event that fired
+            tickets: Tickets the trigger fired for
+            context: Additional context shared by all tickets
+
+        Returns:
+            Summary with per-ticket details
+        """
+        context = context or {}
+        details: List[Dict[str, Any]] = []
+        results: Dict[str, Any] = {
+            "trigger": trigger.value,
+            "tickets": len(tickets),
+            "rules_executed": 0,
+            "actions_performed": 0,
+            "rate_limited": 0,
+            "tickets_updated": 0,
+            "details": details,
+        }
+        if not tickets:
+            return results
+
+        rule_set = load_rule_set(self.db, AutomationRule, {"trigger": trigger.value})
+        rules = {
+            rule.id: rule
+            for rule in self.db.query(AutomationRule).filter(
+                AutomationRule.id.in_([compiled.rule_id for compiled in rule_set.rules])
+            )
+        } if len(rule_set) else {}
+        budgets = self._rate_limit_budgets(rules.values())
+
+        logs: List[Dict[str, Any]] = []
+        executions_by_rule: Counter = Counter()
+        drafts: List[TicketDraft] = []
+        self._lookups = {}
+
+        for ticket in tickets:
+            draft = TicketDraft(ticket)
+            drafts.append(draft)
+            rules_executed = 0
+
+            for compiled in rule_set.matches(draft, context):
+                start_time = time.time()
+                rule = rules.get(compiled.rule_id)
+                if rule is None:
+                    continue
+
+                if rule.id in budgets:
+                    if budgets[rule.id] <= 0:
+                        results["rate_limited"] += 1
+                        continue
+                    budgets[rule.id] -= 1
+
+                conditions_result = compiled.explain(draft, context)
+                actions_result = self._execute_actions(rule.actions, draft, context)
+
+                logs.append({
+                    "rule_id": rule.id,
+                    "ticket_id": ticket.id,
+                    "trigger": trigger.value,
+                    "conditions_matched": conditions_result["matched"],
+                    "actions_executed": actions_result["changes"],
+                    "success": actions_result["success"],
+                    "error_message": "; ".join(actions_result["errors"]) if actions_result["errors"] else None,
+                    "execution_time_ms": int((time.time() - start_time) * 1000),
+                })
+                executions_by_rule[rule.id] += 1
+                rules_executed += 1
+                results["actions_performed"] += actions_result["actions_executed"]
+
+                if rule.stop_processing:
+                    break
+
+            results["rules_executed"] += rules_executed
+            details.append({"ticket_id": ticket.id, "rules_executed": rules_executed})
+
+        self._lookups = None
+        results["tickets_updated"] = self._write_ticket_changes(drafts)
+
+        if logs:
+            self.db.bulk_insert_mappings(AutomationLog, logs)
+
+        now = datetime.utcnow()
+        for rule_id, count in executions_by_rule.items():
+            self.db.execute(
+                update(AutomationRule)
+                .where(AutomationRule.id == rule_id)
+                .values(
+                    execution_count=AutomationRule.execution_count + count,
+                    last_executed_at=now,
+                    updated_at=AutomationRule.updated_at,
+                )
+            )
+
+        self.db.commit()
+
+        logger.info(
+            "automation_bulk_trigger_completed",
+            trigger=trigger.value,
+            tickets=len(tickets),
+            rules_executed=results["rules_executed"],
+            tickets_updated=results["tickets_updated"],
+            rate_limited=results["rate_limited"],
+        )
+
+        return results
+
+    def _get(self, model: type, ident: Any) -> Any:
+        """Load a row by primary key, reusing it for the rest of a bulk run."""
+        if self._lookups is None:
+            return self.db.get(model, ident)
+        key = (model, ident)
+        if key not in self._lookups:
+            self._lookups[key] = self.db.get(model, ident)
+        return self._lookups[key]
+
+    def _rate_limit_budgets(self, rules: Iterable[AutomationRule]) -> Dict[int, int]:
+        """Executions left this hour for each rate-limited rule.
+
+        One grouped count for all rules; the same window as _check_rate_limit.
+        """
+        limits = {rule.id: rule.max_executions_per_hour for rule in rules if rule.max_executions_per_hour}
+        if not limits:
+            return {}
+
+        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
+        recent = dict(
+            self.db.query(AutomationLog.rule_id, func.count(AutomationLog.id))
+            .filter(
+                AutomationLog.rule_id.in_(list(limits)),
+                AutomationLog.created_at >= one_hour_ago,
+            )
+            .group_by(AutomationLog.rule_id)
+            .all()
+        )
+        return {rule_id: limit - recent.get(rule_id, 0) for rule_id, limit in limits.items()}
+
+    def _write_ticket_changes(self, drafts: Sequence[TicketDraft]) -> int:
+        """Write draft changes as one UPDATE per (column, value) group.
+
+        Returns the number of tickets changed.
+        """
+        columns = {attr.key for attr in sa_inspect(Ticket).column_attrs}
+        groups: Dict[Tuple[str, str], Tuple[Any, List[int]]] = {}
+        workload_changes = []
+        written: List[Tuple[Ticket, List[str]]] = []
+
+        for draft in drafts:
+            dirty = draft.dirty()
+            if not dirty:
+                continue
+            ticket = draft.ticket
+            names = []
+            for name, value in dirty.items():
+                if name not in columns:
+                    # Relationship or other non-column attribute: let the ORM write it
+                    setattr(ticket, name, value)
+                    continue
+                key = (name, json.dumps(value, sort_keys=True, default=str))
+                groups.setdefault(key, (value, []))[1].append(ticket.id)
+                names.append(name)
+            written.append((ticket, names))
+            if any(name in dirty for name in _WORKLOAD_FIELDS):
+                before = tuple(getattr(ticket, name) for name in _WORKLOAD_FIELDS)
+                after = tuple(dirty.get(name, before[i]) for i, name in enumerate(_WORKLOAD_FIELDS))
+                workload_changes.append((before, after))
+
+        for (name, _), (value, ticket_ids) in groups.items():
+            self.db.execute(
+                update(Ticket)
+                .where(Ticket.id.in_(ticket_ids))
+                .values({name: value})
+                .execution_options(synchronize_session=False)
+            )
+
+        if workload_changes:
+            apply_workload_changes(self.db.connection(), workload_changes)
+
+        # Reload the written columns on next access
+        for ticket, names in written:
+            if names:
+                self.db.expire(ticket, names + ["updated_at"])
+        return len(written)
+
     def _check_rate_limit(self, rule: AutomationRule) -> bool:
         """Check if rule is within rate limit."""
         if not rule.max_executions_per_hour:
@@ -179,109 +429,7 @@ class AutomationExecutor:
         Returns:
             Evaluation results
         """
-        result: Dict[str, Any] = {
-            "all_matched": True,
-            "matched": [],
-            "not_matched": [],
-        }
-
-        if not conditions:
-            return result
-
-        normalized_conditions: List[Dict[str, Any]]
-        if isinstance(conditions, dict):
-            normalized_conditions = [conditions]
-        else:
-            normalized_conditions = conditions
-
-        for condition in normalized_conditions:
-            field = condition.get("field", "")
-            operator = condition.get("operator", "")
-            value = condition.get("value")
-
-            # Get actual value from ticket or context
-            if field.startswith("context."):
-                actual_value = context.get(field[8:])
-            else:
-                actual_value = getattr(ticket, field, None)
-                if actual_value is not None and hasattr(actual_value, "value"):
-                    actual_value = getattr(actual_value, "value")
-
-            matched = self._check_condition(actual_value, operator, value)
-
-            condition_info = {
-                "field": field,
-                "operator": operator,
-                "expected": value,
-                "actual": str(actual_value) if actual_value is not None else None,
-                "matched": matched,
-            }
-
-            if matched:
-                result["matched"].append(condition_info)
-            else:
-                result["not_matched"].append(condition_info)
-                result["all_matched"] = False
-
-        return result
-
-    def _check_condition(self, actual: Any, operator: str, expected: Any) -> bool:
-        """Check a single condition."""
-        try:
-            if operator == ConditionOperator.EQUALS.value:
-                return str(actual) == str(expected)
-
-            elif operator == ConditionOperator.NOT_EQUALS.value:
-                return str(actual) != str(expected)
-
-            elif operator == ConditionOperator.CONTAINS.value:
-                return expected in str(actual or "")
-
-            elif operator == ConditionOperator.NOT_CONTAINS.value:
-                return expected not in str(actual or "")
-
-            elif operator == ConditionOperator.STARTS_WITH.value:
-                return str(actual or "").startswith(str(expected))
-
-            elif operator == ConditionOperator.ENDS_WITH.value:
-                return str(actual or "").endswith(str(expected))
-
-            elif operator == ConditionOperator.IN_LIST.value:
-                val_list = expected if isinstance(expected, list) else [expected]
-                return str(actual) in [str(v) for v in val_list]
-
-            elif operator == ConditionOperator.NOT_IN_LIST.value:
-                val_list = expected if isinstance(expected, list) else [expected]
-                return str(actual) not in [str(v) for v in val_list]
-
-            elif operator == ConditionOperator.GREATER_THAN.value:
-                return float(actual) > float(expected)
-
-            elif operator == ConditionOperator.LESS_THAN.value:
-                return float(actual) < float(expected)
-
-            elif operator == ConditionOperator.GREATER_OR_EQUAL.value:
-                return float(actual) >= float(expected)
-
-            elif operator == ConditionOperator.LESS_OR_EQUAL.value:
-                return float(actual) <= float(expected)
-
-            elif operator == ConditionOperator.IS_EMPTY.value:
-                return actual is None or actual == ""
-
-            elif operator == ConditionOperator.IS_NOT_EMPTY.value:
-                return actual is not None and actual != ""
-
-            elif operator == ConditionOperator.REGEX_MATCH.value:
-                try:
-                    return bool(re.search(expected, str(actual or "")))
-                except re.error:
-                    return False
-
-        except (TypeError, ValueError):
-            return False
-
-        return False
+        return compile_rule(0, 0, conditions).explain(ticket, context)
 
     def _execute_actions(
         self,
@@ -389,7 +537,8 @@ class AutomationExecutor:
         elif action_type == AutomationActionType.ASSIGN_AGENT.value:
             old_assignee: Optional[str] = ticket.assigned_to
             agent_id = params.get("agent_id")
-            agent = self.db.query(Agent).filter(Agent.id == agent_id).first()
+            # get() serves repeat lookups in a sweep from the identity map
+            agent = self._get(Agent, agent_id) if agent_id is not None else None
             if not agent:
                 raise ValueError(f"Agent not found: {agent_id}")
             ticket.assigned_to = agent.display_name or agent.email or f"agent-{agent.id}"
@@ -403,7 +552,7 @@ class AutomationExecutor:
         elif action_type == AutomationActionType.ASSIGN_TEAM.value:
             old_team: Optional[str] = ticket.resolution_team
             team_id = params.get("team_id")
-            team = self.db.query(Team).filter(Team.id == team_id).first()
+            team = self._get(Team, team_id) if team_id is not None else None
             if not team:
                 raise ValueError(f"Team not found: {team_id}")
             team_name = team.name or f"team-{team.id}"
@@ -420,8 +569,8 @@ class AutomationExecutor:
             if tag:
                 tags = ticket.tags or []
                 if isinstance(tags, list) and tag not in tags:
-                    tags.append(tag)
-                    ticket.tags = tags
+                    # Assign a new list: in-place changes to JSON are not tracked
+                    ticket.tags = tags + [tag]
                     return {"action": "add_tag", "tag": tag}
 
         elif action_type == AutomationActionType.REMOVE_TAG.value:
@@ -429,8 +578,7 @@ class AutomationExecutor:
             if tag:
                 tags = ticket.tags or []
                 if isinstance(tags, list) and tag in tags:
-                    tags.remove(tag)
-                    ticket.tags = tags
+                    ticket.tags = [t for t in tags if t != tag]
                     return {"action": "remove_tag", "tag": tag}
 
         elif action_type == AutomationActionType.UPDATE_FIELD.value:
@@ -576,16 +724,23 @@ class AutomationExecutor:
             Ticket.updated_at < threshold,
         ).order_by(Ticket.updated_at).limit(limit).all()
 
-    def process_idle_tickets(self, idle_hours: int = 24) -> Dict[str, Any]:
+    def process_idle_tickets(
+        self,
+        idle_hours: int = 24,
+        limit: int = 100,
+        batch_size: int = 50,
+    ) -> Dict[str, Any]:
         """Process idle tickets with automation.
 
         Args:
             idle_hours: Hours threshold for idle
+            limit: Maximum tickets to process in this sweep
+            batch_size: Tickets per bulk execution (one commit each)
 
         Returns:
             Processing summary
         """
-        tickets = self.find_idle_tickets(idle_hours)
+        tickets = self.find_idle_tickets(idle_hours, limit=limit)
 
         results: Dict[str, Any] = {
             "idle_tickets_found": len(tickets),
@@ -593,18 +748,16 @@ class AutomationExecutor:
             "details": [],
         }
 
-        for ticket in tickets:
-            result = self.execute_trigger(
+        for start in range(0, len(tickets), batch_size):
+            batch = self.execute_trigger_bulk(
                 AutomationTrigger.TICKET_IDLE,
-                ticket,
+                tickets[start:start + batch_size],
                 {"idle_hours": idle_hours},
             )
-            if result["rules_executed"] > 0:
-                results["automations_triggered"] += 1
-            results["details"].append({
-                "ticket_id": ticket.id,
-                "rules_executed": result["rules_executed"],
-            })
+            for detail in batch["details"]:
+                if detail["rules_executed"] > 0:
+                    results["automations_triggered"] += 1
+                results["details"].append(detail)
 
         logger.info(
             "idle_tickets_processed",
@@ -0,0 +1,294 @@
+"""Compiled business calendars for SLA time math.
+
+A BusinessCalendar is compiled once into a sorted list of business intervals
+covering a multi-year horizon:
+- Weekly schedule parsed once; holidays (dated and recurring) baked in
+- Cumulative business time per interval, so adding business hours and
+  counting elapsed business hours are binary searches instead of day walks
+- Times outside the horizon fall back to a day-by-day walk over the same
+  compiled schedule
+
+Compiled calendars are cached per process, keyed by calendar id and checked
+against a version stamp (calendar updated_at and schedule plus a holiday
+fingerprint) so edits made by any process are picked up. The SLA endpoints
+also drop the local entry directly on calendar or holiday edits.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.support_sla import BusinessCalendar, BusinessCalendarHoliday
+
+logger = structlog.get_logger()
+
+DAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Years of business intervals compiled either side of today
+HORIZON_YEARS_BEHIND = 3
+HORIZON_YEARS_AHEAD = 5
+
+_MICROSECOND = timedelta(microseconds=1)
+_MICROSECONDS_PER_HOUR = 3_600_000_000
+
+DayWindow = Optional[Tuple[time, time]]
+
+
+def parse_weekly_schedule(schedule: Optional[Dict[str, Any]]) -> Tuple[DayWindow, ...]:
+    """Parse a calendar schedule into one (start, end) window per weekday.
+
+    Days that are missing, closed or unparseable map to None. A window whose
+    end is not after its start contains no business time.
+    """
+    schedule = schedule or {}
+    windows: List[DayWindow] = []
+    for key in DAY_KEYS:
+        day_schedule = schedule.get(key)
+        if not day_schedule:
+            windows.append(None)
+            continue
+        try:
+            start = datetime.strptime(day_schedule.get("start", "09:00"), "%H:%M").time()
+            end = datetime.strptime(day_schedule.get("end", "17:00"), "%H:%M").time()
+        except (ValueError, AttributeError, TypeError):
+            windows.append(None)
+            continue
+        windows.append((start, end) if end > start else None)
+    return tuple(windows)
+
+
+class CompiledBusinessCalendar:
+    """Business intervals of one calendar with cumulative business time.
+
+    Positions are integer microseconds since ``origin`` (midnight of the first
+    horizon day). ``_cumulative[i]`` is the business time before interval i.
+    """
+
+    def __init__(
+        self,
+        weekly: Tuple[DayWindow, ...],
+        holiday_dates: Iterable[date],
+        recurring_holidays: Iterable[Tuple[int, int]],
+        horizon_start: date,
+        horizon_end: date,
+    ):
+        self.weekly = weekly
+        self.holiday_dates: FrozenSet[date] = frozenset(holiday_dates)
+        self.recurring_holidays: FrozenSet[Tuple[int, int]] = frozenset(recurring_holidays)
+        self.origin = datetime.combine(horizon_start, time(0, 0))
+        self.end = datetime.combine(horizon_end + timedelta(days=1), time(0, 0))
+
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._cumulative: List[int] = []
+        self._cumulative_ends: List[int] = []
+
+        total = 0
+        day = horizon_start
+        while day <= horizon_end:
+            window = self.day_window(day)
+            if window:
+                start, end = self._position(window[0]), self._position(window[1])
+                self._starts.append(start)
+                self._ends.append(end)
+                self._cumulative.append(total)
+                total += end - start
+                self._cumulative_ends.append(total)
+            day += timedelta(days=1)
+
+    @property
+    def has_business_hours(self) -> bool:
+        return any(self.weekly)
+
+    @property
+    def interval_count(self) -> int:
+        return len(self._starts)
+
+    def is_holiday(self, day: date) -> bool:
+        return day in self.holiday_dates or (day.month, day.day) in self.recurring_holidays
+
+    def day_window(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """Return the business window of a date, or None if it has none."""
+        window = self.weekly[day.weekday()]
+        if window is None or self.is_holiday(day):
+            return None
+        return datetime.combine(day, window[0]), datetime.combine(day, window[1])
+
+    def _position(self, moment: datetime) -> int:
+        return (moment - self.origin) // _MICROSECOND
+
+    def _in_horizon(self, moment: datetime) -> bool:
+        return self.origin <= moment <= self.end
+
+    def _business_before(self, position: int) -> int:
+        """Business microseconds between the origin and a position."""
+        i = bisect_right(self._starts, position) - 1
+        if i < 0:
+            return 0
+        return self._cumulative[i] + min(position, self._ends[i]) - self._starts[i]
+
+    # -------------------------------------------------------------------------
+    # Business time math
+    # -------------------------------------------------------------------------
+
+    def add_business_hours(self, start_time: datetime, hours: float) -> datetime:
+        """Return the moment ``hours`` business hours after start_time.
+
+        A deadline that exhausts a day's hours exactly lands on that day's
+        closing time, not the next opening.
+        """
+        if hours <= 0:
+            return start_time + timedelta(hours=hours)
+        if not self.has_business_hours:
+            logger.warning(
+                "sla_business_hours_calculation_exceeded_max",
+                start_time=start_time.isoformat(),
+                hours=hours,
+            )
+            return start_time + timedelta(hours=hours)
+
+        if self._in_horizon(start_time):
+            target = self._business_before(self._position(start_time)) + round(hours * _MICROSECONDS_PER_HOUR)
+            i = bisect_left(self._cumulative_ends, target)
+            if i < len(self._starts):
+                offset = self._starts[i] + target - self._cumulative[i]
+                return self.origin + timedelta(microseconds=offset)
+
+        return self._walk_add(start_time, hours)
+
+    def elapsed_business_hours(self, start_time: datetime, end_time: datetime) -> float:
+        """Return the business hours between two moments (0 if end precedes start)."""
+        if end_time <= start_time:
+            return 0.0
+        if self._in_horizon(start_time) and self._in_horizon(end_time):
+            elapsed = (
+                self._business_before(self._position(end_time))
+                - self._business_before(self._position(start_time))
+            )
+            return elapsed / _MICROSECONDS_PER_HOUR
+        return self._walk_elapsed(start_time, end_time)
+
+    # -------------------------------------------------------------------------
+    # Day walks (outside the compiled horizon)
+    # -------------------------------------------------------------------------
+
+    def _walk_add(self, start_time: datetime, hours: float) -> datetime:
+        remaining_hours = hours
+        current = start_time
+
+        # Maximum iterations to prevent infinite loop
+        for _ in range(int(hours / 0.1) + 365):
+            current_date = current.date()
+            window = self.day_window(current_date)
+            next_day = datetime.combine(current_date + timedelta(days=1), time(0, 0))
+            if window is None or current >= window[1]:
+                current = next_day
+                continue
+
+            current = max(current, window[0])
+            hours_today = (window[1] - current).total_seconds() / 3600
+            if hours_today >= remaining_hours:
+                return current + timedelta(hours=remaining_hours)
+            remaining_hours -= hours_today
+            current = next_day
+
+        logger.warning(
+            "sla_business_hours_calculation_exceeded_max",
+            start_time=start_time.isoformat(),
+            hours=hours,
+        )
+        return start_time + timedelta(hours=hours)
+
+    def _walk_elapsed(self, start_time: datetime, end_time: datetime) -> float:
+        total_hours = 0.0
+        current = start_time
+        while current < end_time:
+            current_date = current.date()
+            window = self.day_window(current_date)
+            if window is not None:
+                effective_start = max(current, window[0])
+                effective_end = min(end_time, window[1])
+                if effective_start < effective_end:
+                    total_hours += (effective_end - effective_start).total_seconds() / 3600
+            current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
+        return total_hours
+
+
+def compile_business_calendar(
+    calendar: BusinessCalendar,
+    holidays: Iterable[BusinessCalendarHoliday],
+    today: Optional[date] = None,
+) -> CompiledBusinessCalendar:
+    """Compile a calendar and its holidays over the default horizon around today."""
+    today = today or date.today()
+    holidays = list(holidays)
+    return CompiledBusinessCalendar(
+        weekly=parse_weekly_schedule(calendar.schedule),
+        holiday_dates=[h.holiday_date for h in holidays if not h.is_recurring],
+        recurring_holidays=[(h.holiday_date.month, h.holiday_date.day) for h in holidays if h.is_recurring],
+        horizon_start=date(today.year - HORIZON_YEARS_BEHIND, 1, 1),
+        horizon_end=date(today.year + HORIZON_YEARS_AHEAD, 12, 31),
+    )
+
+
+# =============================================================================
+# PROCESS CACHE
+# =============================================================================
+
+_cache: Dict[int, Tuple[Tuple[Any, ...], CompiledBusinessCalendar]] = {}
+_cache_lock = threading.Lock()
+
+
+def calendar_version(db: Session, calendar: BusinessCalendar) -> Tuple[Any, ...]:
+    """Version stamp that changes whenever the calendar or its holidays change."""
+    holiday_count, last_holiday_id, last_holiday_created = db.query(
+        func.count(BusinessCalendarHoliday.id),
+        func.max(BusinessCalendarHoliday.id),
+        func.max(BusinessCalendarHoliday.created_at),
+    ).filter(BusinessCalendarHoliday.calendar_id == calendar.id).one()
+    return (
+        calendar.updated_at,
+        json.dumps(calendar.schedule, sort_keys=True, default=str),
+        holiday_count,
+        last_holiday_id,
+        last_holiday_created,
+        date.today().year,
+    )
+
+
+def get_compiled_calendar(db: Session, calendar: BusinessCalendar) -> CompiledBusinessCalendar:
+    """Return the cached compiled calendar, recompiling if it is stale."""
+    version = calendar_version(db, calendar)
+    with _cache_lock:
+        entry = _cache.get(calendar.id)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    holidays = db.query(BusinessCalendarHoliday).filter(
+        BusinessCalendarHoliday.calendar_id == calendar.id
+    ).all()
+    compiled = compile_business_calendar(calendar, holidays)
+    with _cache_lock:
+        _cache[calendar.id] = (version, compiled)
+    logger.debug(
+        "business_calendar_compiled",
+        calendar_id=calendar.id,
+        intervals=compiled.interval_count,
+    )
+    return compiled
+
+
+def invalidate_compiled_calendar(calendar_id: Optional[int] = None) -> None:
+    """Drop one calendar (or every calendar) from this process's cache."""
+    with _cache_lock:
+        if calendar_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(calendar_id, None)
@@ -0,0 +1,481 @@
+"""
+E-Invoice Batch Service
+
+Validates e-invoices and renders their FIRS BIS 3.0 UBL XML in bulk, as a
+resumable batch:
+- Invoices and their lines are loaded once per chunk and reduced to a plain
+  UBL context (template inputs), which is all validation and rendering need
+- Validation and rendering are pure functions over that context, run
+  in-process or across a process pool
+- The rendered XML is stored with a content hash of its context; an invoice
+  whose hash is unchanged keeps its stored document instead of re-rendering
+- Progress, per-invoice errors and a resume cursor (last_einvoice_id) are
+  committed with each chunk, so a failed or interrupted batch continues
+  where it stopped
+
+NigerianTaxService.validate_einvoice and get_einvoice_ubl use the same
+context, checks and cache for single invoices.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.models.tax_ng import EInvoice, EInvoiceBatch, EInvoiceBatchStatus, EInvoiceStatus
+
+logger = structlog.get_logger(__name__)
+
+UBL_TEMPLATE = "tax/einvoice_ubl.xml.j2"
+
+# Part of every content hash: bump when the template or ubl_context changes
+# so stored documents are re-rendered
+UBL_RENDER_VERSION = "1"
+
+# Statuses a passing validation moves to VALIDATED; later stages are left alone
+VALIDATABLE_STATUSES = (EInvoiceStatus.DRAFT, EInvoiceStatus.VALIDATED, EInvoiceStatus.REJECTED)
+
+
+class EInvoiceBatchError(Exception):
+    """Exception raised for e-invoice batch errors."""
+    pass
+
+
+# =============================================================================
+# UBL DOCUMENTS (pure, runs in worker processes)
+# =============================================================================
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _percent(rate: Optional[Decimal]) -> str:
+    return format((Decimal(rate or 0) * 100).normalize(), "f")
+
+
+def ubl_context(einvoice: EInvoice) -> Dict[str, Any]:
+    """Template inputs for an invoice as plain JSON-compatible data."""
+    lines = sorted(einvoice.lines, key=lambda line: (line.idx, line.id or 0))
+    return {
+        "ubl_version": einvoice.ubl_version_id,
+        "customization_id": einvoice.customization_id,
+        "profile_id": einvoice.profile_id,
+        "invoice_number": einvoice.invoice_number,
+        "issue_date": einvoice.issue_date.isoformat() if einvoice.issue_date else "",
+        "due_date": einvoice.due_date.isoformat() if einvoice.due_date else None,
+        "invoice_type_code": einvoice.invoice_type_code,
+        "note": einvoice.note,
+        "currency_code": einvoice.document_currency_code,
+        "supplier": {
+            "name": _text(einvoice.supplier_name),
+            "tin": _text(einvoice.supplier_tin),
+            "vat_number": _text(einvoice.supplier_vat_number),
+            "address": _text(einvoice.supplier_street),
+            "city": _text(einvoice.supplier_city),
+            "postal_code": _text(einvoice.supplier_postal_code),
+            "country_code": einvoice.supplier_country_code or "NG",
+            "tax_scheme": "VAT" if einvoice.supplier_tin else "",
+        },
+        "customer": {
+            "name": _text(einvoice.customer_name),
+            "tin": _text(einvoice.customer_tin),
+            "address": _text(einvoice.customer_street),
+            "city": _text(einvoice.customer_city),
+            "postal_code": _text(einvoice.customer_postal_code),
+            "country_code": einvoice.customer_country_code or "NG",
+        },
+        "tax_amount": _text(einvoice.tax_amount),
+        "tax_subtotals": [{
+            "taxable_amount": _text(einvoice.tax_exclusive_amount),
+            "tax_amount": _text(einvoice.tax_amount),
+            "category_id": einvoice.tax_category_code or "S",
+            "percent": _percent(einvoice.tax_rate),
+            "scheme_id": "VAT",
+        }],
+        "line_extension_amount": _text(einvoice.line_extension_amount),
+        "tax_exclusive_amount": _text(einvoice.tax_exclusive_amount),
+        "tax_inclusive_amount": _text(einvoice.tax_inclusive_amount),
+        "payable_amount": _text(einvoice.payable_amount),
+        "lines": [
+            {
+                "id": line.line_id,
+                "quantity": _text(line.quantity),
+                "unit_code": line.unit_code or "EA",
+                "line_extension_amount": _text(line.line_extension_amount),
+                "item_name": line.item_name,
+                "item_description": line.item_description,
+                "unit_price": _text(line.unit_price),
+            }
+            for line in lines
+        ],
+    }
+
+
+def ubl_content_hash(context: Dict[str, Any]) -> str:
+    """SHA-256 of a UBL context and the render version."""
+    payload = json.dumps([UBL_RENDER_VERSION, context], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def check_ubl_context(context: Dict[str, Any]) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """BIS 3.0 validation errors and warnings for a UBL context."""
+    from app.api.tax.helpers import validate_tin
+
+    errors: List[Dict[str, str]] = []
+    warnings: List[Dict[str, str]] = []
+    supplier, customer = context["supplier"], context["customer"]
+
+    # Required fields validation
+    for field, value, label in (
+        ("invoice_number", context["invoice_number"], "Invoice number"),
+        ("issue_date", context["issue_date"], "Issue date"),
+        ("supplier_name", supplier["name"], "Supplier name"),
+        ("customer_name", customer["name"], "Customer name"),
+    ):
+        if not value:
+            errors.append({"field": field, "message": f"{label} is required"})
+
+    # TIN validation
+    if supplier["tin"] and not validate_tin(supplier["tin"]):
+        errors.append({"field": "supplier_tin", "message": "Invalid supplier TIN format"})
+    if customer["tin"] and not validate_tin(customer["tin"]):
+        errors.append({"field": "customer_tin", "message": "Invalid customer TIN format"})
+
+    # Line items validation
+    if not context["lines"]:
+        errors.append({"field": "lines", "message": "At least one line item is required"})
+
+    # Warnings
+    if not supplier["tin"]:
+        warnings.append({"field": "supplier_tin", "message": "Supplier TIN is recommended"})
+    if not customer["tin"]:
+        warnings.append({"field": "customer_tin", "message": "Customer TIN is recommended"})
+    if not supplier["vat_number"]:
+        warnings.append({"field": "supplier_vat_number", "message": "VAT registration number is recommended"})
+
+    return errors, warnings
+
+
+def render_ubl(context: Dict[str, Any]) -> str:
+    """Render the UBL XML for a context."""
+    from app.templates.environment import get_template_env
+
+    return get_template_env().get_template(UBL_TEMPLATE).render(**context)
+
+
+@dataclass(frozen=True)
+class UBLDocument:
+    """One invoice's UBL context and whether its stored XML is current."""
+    einvoice_id: int
+    invoice_number: str
+    context: Dict[str, Any]
+    content_hash: str
+    cached: bool
+
+
+@dataclass(frozen=True)
+class UBLResult:
+    """Validation outcome and, when rendered, the XML for one invoice."""
+    einvoice_id: int
+    invoice_number: str
+    content_hash: str
+    errors: Tuple[Dict[str, str], ...]
+    warnings: Tuple[Dict[str, str], ...]
+    xml: Optional[str]
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+def process_ubl_document(document: UBLDocument) -> UBLResult:
+    """Validate a document and render it if it is valid and not cached."""
+    errors, warnings = check_ubl_context(document.context)
+    xml = None
+    if not errors and not document.cached:
+        try:
+            xml = render_ubl(document.context)
+        except Exception as e:
+            errors.append({"field": "ubl", "message": f"UBL rendering failed: {e}"})
+    return UBLResult(
+        einvoice_id=document.einvoice_id,
+        invoice_number=document.invoice_number,
+        content_hash=document.content_hash,
+        errors=tuple(errors),
+        warnings=tuple(warnings),
+        xml=xml,
+    )
+
+
+def ubl_document(einvoice: EInvoice) -> UBLDocument:
+    context = ubl_context(einvoice)
+    content_hash = ubl_content_hash(context)
+    return UBLDocument(
+        einvoice_id=einvoice.id,
+        invoice_number=einvoice.invoice_number,
+        context=context,
+        content_hash=content_hash,
+        cached=einvoice.ubl_xml is not None and einvoice.ubl_hash == content_hash,
+    )
+
+
+def apply_ubl_result(einvoice: EInvoice, result: UBLResult, now: datetime) -> None:
+    """Record a result on its invoice: validation status/errors and any newly rendered XML."""
+    if result.is_valid and einvoice.status in VALIDATABLE_STATUSES:
+        einvoice.status = EInvoiceStatus.VALIDATED
+        einvoice.validated_at = now
+    einvoice.validation_errors = list(result.errors) or None
+    if result.xml is not None:
+        einvoice.ubl_xml = result.xml
+        einvoice.ubl_hash = result.content_hash
+        einvoice.ubl_rendered_at = now
+
+
+# =============================================================================
+# E-INVOICE BATCH SERVICE
+# =============================================================================
+
+
+class EInvoiceBatchService:
+    """Creates, runs and resumes e-invoice batches."""
+
+    ACTIVE_STATUSES = (EInvoiceBatchStatus.PENDING, EInvoiceBatchStatus.RUNNING)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_batch(self, batch_id: int) -> Optional[EInvoiceBatch]:
+        return self.db.get(EInvoiceBatch, batch_id)
+
+    def start(
+        self,
+        company: str,
+        einvoice_ids: Optional[Sequence[int]] = None,
+        invoice_status: Optional[EInvoiceStatus] = EInvoiceStatus.DRAFT,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        created_by_id: Optional[int] = None,
+    ) -> EInvoiceBatch:
+        """Create a pending batch for explicit invoices or a company's invoices by status and issue date."""
+        query = self.db.query(EInvoice.id).filter(EInvoice.company == company)
+        if einvoice_ids is not None:
+            requested = set(einvoice_ids)
+            query = query.filter(EInvoice.id.in_(requested))
+        else:
+            if invoice_status:
+                query = query.filter(EInvoice.status == invoice_status)
+            if from_date:
+                query = query.filter(EInvoice.issue_date >= from_date)
+            if to_date:
+                query = query.filter(EInvoice.issue_date <= to_date)
+        ids = [row.id for row in query.order_by(EInvoice.id)]
+
+        if einvoice_ids is not None:
+            missing = sorted(requested - set(ids))
+            if missing:
+                raise EInvoiceBatchError(f"E-invoices not found: {missing}")
+        if not ids:
+            raise EInvoiceBatchError("No e-invoices match the batch selection")
+
+        batch = EInvoiceBatch(
+            company=company,
+            einvoice_ids=ids,
+            total_invoices=len(ids),
+            status=EInvoiceBatchStatus.PENDING,
+            created_by_id=created_by_id,
+        )
+        self.db.add(batch)
+        self.db.commit()
+        return batch
+
+    def resume(self, batch_id: int) -> EInvoiceBatch:
+        """Put a failed or abandoned batch back to pending so it can be re-queued."""
+        batch = self.get_batch(batch_id)
+        if not batch:
+            raise EInvoiceBatchError(f"E-invoice batch {batch_id} not found")
+        if batch.status == EInvoiceBatchStatus.COMPLETED:
+            raise EInvoiceBatchError("E-invoice batch already completed")
+        if batch.status == EInvoiceBatchStatus.RUNNING and not self._is_stale(batch):
+            raise EInvoiceBatchError("E-invoice batch is still running")
+
+        batch.status = EInvoiceBatchStatus.PENDING
+        batch.error_message = None
+        self.db.commit()
+        return batch
+
+    def stale_batches(self) -> List[EInvoiceBatch]:
+        """Running batches whose worker stopped committing progress."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.einvoice_batch_stale_after_seconds)
+        return (
+            self.db.query(EInvoiceBatch)
+            .filter(EInvoiceBatch.status == EInvoiceBatchStatus.RUNNING, EInvoiceBatch.updated_at < cutoff)
+            .all()
+        )
+
+    def run(
+        self,
+        batch_id: int,
+        task_id: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> EInvoiceBatch:
+        """
+        Validate and render a batch, continuing after its last committed chunk.
+
+        Args:
+            batch_id: E-invoice batch to process
+            task_id: Celery task id, recorded on the batch
+            chunk_size: Invoices per chunk (settings.einvoice_batch_chunk_size)
+            workers: Validation/rendering processes (settings.einvoice_batch_workers);
+                0 or running inside a daemonic worker works in-process
+
+        Returns:
+            The batch; FAILED with error_message if processing raised
+        """
+        batch = self.get_batch(batch_id)
+        if not batch:
+            raise EInvoiceBatchError(f"E-invoice batch {batch_id} not found")
+        if batch.status == EInvoiceBatchStatus.COMPLETED or not self._claim(batch, task_id):
+            return batch
+
+        chunk_size = chunk_size or settings.einvoice_batch_chunk_size
+        workers = settings.einvoice_batch_workers if workers is None else workers
+        if workers and multiprocessing.current_process().daemon:
+            # Celery prefork children cannot start their own processes
+            workers = 0
+
+        pool: Optional[Executor] = ProcessPoolExecutor(max_workers=workers) if workers else None
+        try:
+            ids = list(batch.einvoice_ids)
+            if batch.last_einvoice_id is not None:
+                ids = [einvoice_id for einvoice_id in ids if einvoice_id > batch.last_einvoice_id]
+
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                self._process_chunk(batch, chunk, pool)
+                batch.processed_invoices += len(chunk)
+                batch.last_einvoice_id = chunk[-1]
+                self.db.commit()
+                logger.info(
+                    "einvoice_batch_chunk_committed",
+                    batch_id=batch.id,
+                    processed=batch.processed_invoices,
+                    total=batch.total_invoices,
+                )
+
+            batch.status = EInvoiceBatchStatus.COMPLETED
+            batch.completed_at = datetime.utcnow()
+            self.db.commit()
+            logger.info(
+                "einvoice_batch_completed",
+                batch_id=batch.id,
+                valid=batch.valid_count,
+                invalid=batch.invalid_count,
+                rendered=batch.rendered_count,
+                cached=batch.cached_count,
+            )
+        except Exception as e:
+            self.db.rollback()
+            batch = self.get_batch(batch_id) or batch
+            batch.status = EInvoiceBatchStatus.FAILED
+            batch.error_message = str(e)
+            self.db.commit()
+            logger.exception("einvoice_batch_failed", batch_id=batch_id, error=str(e))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return batch
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _is_stale(self, batch: EInvoiceBatch) -> bool:
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.einvoice_batch_stale_after_seconds)
+        return batch.updated_at is not None and batch.updated_at < cutoff
+
+    def _claim(self, batch: EInvoiceBatch, task_id: Optional[str]) -> bool:
+        """Move the batch to RUNNING unless another worker holds it."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.einvoice_batch_stale_after_seconds)
+        values: Dict[str, Any] = {
+            "status": EInvoiceBatchStatus.RUNNING,
+            "started_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+        if task_id:
+            values["task_id"] = task_id
+        claimed = self.db.execute(
+            update(EInvoiceBatch)
+            .where(
+                EInvoiceBatch.id == batch.id,
+                or_(
+                    EInvoiceBatch.status.in_([EInvoiceBatchStatus.PENDING, EInvoiceBatchStatus.FAILED]),
+                    EInvoiceBatch.updated_at < cutoff,
+                ),
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        self.db.refresh(batch)
+        if not claimed:
+            logger.info("einvoice_batch_already_claimed", batch_id=batch.id)
+        return bool(claimed)
+
+    def _process_chunk(self, batch: EInvoiceBatch, chunk: Sequence[int], pool: Optional[Executor]) -> None:
+        invoices = (
+            self.db.query(EInvoice)
+            .options(selectinload(EInvoice.lines))
+            .filter(EInvoice.id.in_(chunk))
+            .order_by(EInvoice.id)
+            .all()
+        )
+        documents = [ubl_document(einvoice) for einvoice in invoices]
+        if pool is not None:
+            workers = getattr(pool, "_max_workers", 1) or 1
+            results = list(pool.map(
+                process_ubl_document, documents, chunksize=max(1, len(documents) // (workers * 4))
+            ))
+        else:
+            results = [process_ubl_document(document) for document in documents]
+
+        now = datetime.utcnow()
+        invoice_errors: List[Dict[str, Any]] = []
+        found = {einvoice.id for einvoice in invoices}
+        for einvoice_id in chunk:
+            if einvoice_id not in found:
+                invoice_errors.append({
+                    "einvoice_id": einvoice_id,
+                    "invoice_number": None,
+                    "errors": [{"field": "id", "message": "E-invoice not found"}],
+                })
+
+        for einvoice, document, result in zip(invoices, documents, results):
+            apply_ubl_result(einvoice, result, now)
+            if result.is_valid:
+                batch.valid_count += 1
+                if document.cached:
+                    batch.cached_count += 1
+                else:
+                    batch.rendered_count += 1
+            else:
+                invoice_errors.append({
+                    "einvoice_id": result.einvoice_id,
+                    "invoice_number": result.invoice_number,
+                    "errors": list(result.errors),
+                })
+
+        batch.invalid_count += len(invoice_errors)
+        if invoice_errors:
+            batch.invoice_errors = (batch.invoice_errors or []) + invoice_errors
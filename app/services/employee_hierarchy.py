@@ -0,0 +1,163 @@
+"""Employee reporting hierarchy.
+
+Reads the employee_hierarchy closure table instead of walking
+Employee.reports_to_id one level (or one node) at a time:
+- get_reports: everyone under a manager, in one indexed query
+- get_manager_chain: the managers above an employee, nearest first
+- get_managers: employees with at least one direct report
+- reconcile_employee_hierarchy: rebuild/drift correction from reports_to_id
+
+The rows themselves are maintained by the employee flush hook in
+app.models.employee.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import structlog
+from sqlalchemy import and_, bindparam, delete, insert
+from sqlalchemy.orm import Session
+
+from app.models.employee import Employee, EmployeeHierarchy, EmploymentStatus
+
+logger = structlog.get_logger()
+
+
+def get_reports(
+    db: Session,
+    manager_id: int,
+    max_depth: Optional[int] = None,
+    active_only: bool = True,
+) -> List[Employee]:
+    """Employees under a manager, down to max_depth levels (1 = direct reports).
+
+    Returned depth-first (each report followed by their own reports, siblings
+    by id). With active_only, inactive employees and everyone reachable only
+    through them are left out.
+    """
+    if max_depth is not None and max_depth < 1:
+        return []
+
+    query = db.query(Employee).join(
+        EmployeeHierarchy, EmployeeHierarchy.descendant_id == Employee.id
+    ).filter(
+        EmployeeHierarchy.ancestor_id == manager_id,
+        EmployeeHierarchy.depth >= 1,
+    )
+    if max_depth is not None:
+        query = query.filter(EmployeeHierarchy.depth <= max_depth)
+
+    children: Dict[Optional[int], List[Employee]] = defaultdict(list)
+    for employee in query.order_by(Employee.id):
+        if not active_only or employee.status == EmploymentStatus.ACTIVE:
+            children[employee.reports_to_id].append(employee)
+
+    reports: List[Employee] = []
+    stack = list(reversed(children.get(manager_id, [])))
+    seen: Set[int] = {manager_id}
+    while stack:
+        employee = stack.pop()
+        if employee.id in seen:
+            continue
+        seen.add(employee.id)
+        reports.append(employee)
+        stack.extend(reversed(children.get(employee.id, [])))
+    return reports
+
+
+def get_manager_chain(
+    db: Session,
+    employee_id: int,
+    max_depth: Optional[int] = None,
+) -> List[Tuple[int, Employee]]:
+    """(level, manager) pairs above an employee, immediate manager first."""
+    query = db.query(EmployeeHierarchy.depth, Employee).join(
+        Employee, Employee.id == EmployeeHierarchy.ancestor_id
+    ).filter(
+        EmployeeHierarchy.descendant_id == employee_id,
+        EmployeeHierarchy.depth >= 1,
+    )
+    if max_depth is not None:
+        query = query.filter(EmployeeHierarchy.depth <= max_depth)
+    return [(depth, manager) for depth, manager in query.order_by(EmployeeHierarchy.depth)]
+
+
+def get_managers(db: Session) -> List[Employee]:
+    """Employees with at least one direct report."""
+    manager_ids = db.query(EmployeeHierarchy.ancestor_id).filter(EmployeeHierarchy.depth == 1).distinct()
+    return db.query(Employee).filter(Employee.id.in_(manager_ids)).order_by(Employee.id).all()
+
+
+def expected_hierarchy(parents: Dict[int, Optional[int]]) -> Dict[Tuple[int, int], int]:
+    """Closure rows (ancestor, descendant) -> depth for a reports_to_id map.
+
+    A chain stops at a missing manager or where it would revisit an
+    employee already on it (a reporting cycle).
+    """
+    rows: Dict[Tuple[int, int], int] = {}
+    for employee_id in parents:
+        rows[(employee_id, employee_id)] = 0
+        seen = {employee_id}
+        manager_id = parents[employee_id]
+        depth = 1
+        while manager_id is not None and manager_id in parents and manager_id not in seen:
+            rows[(manager_id, employee_id)] = depth
+            seen.add(manager_id)
+            manager_id = parents[manager_id]
+            depth += 1
+    return rows
+
+
+def reconcile_employee_hierarchy(db: Session) -> Dict[str, Any]:
+    """Rebuild hierarchy rows that drifted from Employee.reports_to_id.
+
+    Covers writes that bypass the ORM, bulk syncs that defer the flush hook
+    and the initial backfill. Only differing rows are written.
+    """
+    parents: Dict[int, Optional[int]] = dict(db.query(Employee.id, Employee.reports_to_id).all())
+    expected = expected_hierarchy(parents)
+
+    table = EmployeeHierarchy.__table__
+    stored = {
+        (ancestor_id, descendant_id): depth
+        for ancestor_id, descendant_id, depth in db.execute(
+            table.select().with_only_columns(table.c.ancestor_id, table.c.descendant_id, table.c.depth)
+        )
+    }
+
+    stale = [
+        {"a": ancestor_id, "d": descendant_id}
+        for (ancestor_id, descendant_id), depth in stored.items()
+        if expected.get((ancestor_id, descendant_id)) != depth
+    ]
+    missing = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": depth}
+        for (ancestor_id, descendant_id), depth in expected.items()
+        if stored.get((ancestor_id, descendant_id)) != depth
+    ]
+
+    if stale:
+        db.execute(
+            delete(table).where(
+                and_(table.c.ancestor_id == bindparam("a"), table.c.descendant_id == bindparam("d"))
+            ),
+            stale,
+        )
+    if missing:
+        db.execute(insert(table), missing)
+    db.commit()
+
+    if stale or missing:
+        logger.warning(
+            "employee_hierarchy_drift_corrected",
+            deleted=len(stale),
+            inserted=len(missing),
+        )
+
+    return {
+        "employees": len(parents),
+        "rows": len(expected),
+        "deleted": len(stale),
+        "inserted": len(missing),
+    }
@@ -1,4 +1,13 @@
-"""Event bus for cross-module communication using Redis pub/sub."""
+"""
+Event bus for cross-module communication.
+
+Two dispatch backends (settings.event_bus_backend):
+- celery: each event is stored for an hour and dispatched by its own
+  Celery task (the original behaviour)
+- streams: events are appended to a Redis stream and consumed in batches
+  by StreamConsumer (app/services/event_stream.py) through a consumer
+  group, so they are acknowledged, retried and replayable
+"""
 from __future__ import annotations
 
 import json
@@ -7,7 +16,7 @@ from collections import defaultdict
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, Sequence, TYPE_CHECKING
 
 import structlog
 from redis import Redis
@@ -16,7 +25,7 @@ from app.config import settings
 from app.models.notification import NotificationEventType
 
 if TYPE_CHECKING:
-    pass
+    from app.services.event_stream import StreamEntry
 
 logger = structlog.get_logger(__name__)
 
@@ -26,6 +35,9 @@ _event_bus: Optional["EventBus"] = None
 # Registry of event handlers (populated at import time via @subscribe decorator)
 _handler_registry: Dict[str, List[Callable]] = defaultdict(list)
 
+# Handlers that take every event of their type in a batch (@subscribe_batch)
+_batch_handler_registry: Dict[str, List[Callable]] = defaultdict(list)
+
 
 class EventEncoder(json.JSONEncoder):
     """JSON encoder that handles Event-specific types."""
@@ -103,6 +115,32 @@ def subscribe(event_type: NotificationEventType) -> Callable:
     return decorator
 
 
+def subscribe_batch(event_type: NotificationEventType) -> Callable:
+    """
+    Decorator to register a handler that receives events in batches.
+
+    Usage:
+        @subscribe_batch(NotificationEventType.PAYMENT_RECEIVED)
+        def on_payments(events: List[Event], db: Session):
+            # Handle all events of the batch at once
+            pass
+
+    Batch handlers only run with the streams backend; the Celery backend
+    dispatches one event at a time and calls them with a single-event list.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        _batch_handler_registry[event_type.value].append(func)
+        logger.debug(
+            "event_batch_handler_registered",
+            event_type=event_type.value,
+            handler=func.__name__,
+        )
+        return func
+
+    return decorator
+
+
 class EventBus:
     """
     Redis-based event bus for cross-module communication.
@@ -127,11 +165,24 @@ class EventBus:
         ))
     """
 
-    def __init__(self, redis_url: Optional[str] = None):
-        """Initialize event bus with Redis connection."""
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        stream: Any = None,
+        backend: Optional[str] = None,
+    ):
+        """
+        Initialize event bus with Redis connection.
+
+        Passing a stream (e.g. InMemoryEventStream) selects the streams
+        backend regardless of settings.
+        """
         self.redis_url = redis_url or settings.redis_url
         self._redis: Optional[Redis] = None
         self._handlers = _handler_registry
+        self._batch_handlers = _batch_handler_registry
+        self._stream = stream
+        self.backend = "streams" if stream is not None else (backend or settings.event_bus_backend)
 
     @property
     def redis(self) -> Optional[Redis]:
@@ -145,6 +196,15 @@ class EventBus:
                 self._redis = None
         return self._redis
 
+    @property
+    def stream(self) -> Any:
+        """Event stream when the streams backend is active and reachable."""
+        if self._stream is None and self.backend == "streams" and self.redis:
+            from app.services.event_stream import RedisEventStream
+
+            self._stream = RedisEventStream(self.redis, maxlen=settings.event_stream_maxlen)
+        return self._stream
+
     def publish(
         self,
         event: Event,
@@ -154,9 +214,12 @@ class EventBus:
         """
         Publish an event to the bus.
 
+        With the streams backend, an async publish only appends the event;
+        handlers and notifications run in the stream consumer.
+
         Args:
             event: The event to publish
-            dispatch_async: If True, dispatch handlers via Celery (default)
+            dispatch_async: If True, dispatch handlers via Celery or the stream (default)
             notify: If True, also emit via NotificationService (default)
 
         Returns:
@@ -170,6 +233,9 @@ class EventBus:
             entity_id=event.entity_id,
         )
 
+        if dispatch_async and self._append([event], notify):
+            return event.event_id
+
         # Store event in Redis for debugging/replay (optional)
         if self.redis:
             try:
@@ -194,6 +260,84 @@ class EventBus:
 
         return event.event_id
 
+    def publish_many(self, events: Sequence[Event], notify: bool = True) -> List[str]:
+        """
+        Publish a batch of events, e.g. from a sync run.
+
+        With the streams backend this is one pipelined round trip to Redis;
+        otherwise each event is published individually.
+        """
+        if not events:
+            return []
+        logger.info("events_published", count=len(events), event_type=events[0].event_type)
+        if self._append(events, notify):
+            return [event.event_id for event in events]
+        return [self.publish(event, notify=notify) for event in events]
+
+    def _append(self, events: Sequence[Event], notify: bool) -> bool:
+        """Append events to the stream; False when the stream is unavailable."""
+        stream = self.stream
+        if stream is None:
+            return False
+        try:
+            stream.append([(event, notify) for event in events])
+            return True
+        except Exception as e:
+            logger.warning("event_stream_append_failed", events=len(events), error=str(e))
+            return False
+
+    def replay(
+        self,
+        start_id: str = "-",
+        end_id: str = "+",
+        count: int = 100,
+        event_types: Optional[Sequence[str]] = None,
+    ) -> List["StreamEntry"]:
+        """
+        Read stored events from a stream offset (inclusive), oldest first.
+
+        To page through the stream, pass next_offset(last entry_id) as the
+        next start_id. Offsets are stream entry ids ("<ms>-<seq>").
+        """
+        stream = self.stream
+        if stream is None:
+            return []
+        entries = stream.range(start_id, end_id, count)
+        if event_types:
+            wanted = set(event_types)
+            entries = [entry for entry in entries if entry.event.event_type in wanted]
+        return entries
+
+    def reprocess(
+        self,
+        start_id: str,
+        end_id: str = "+",
+        count: int = 100,
+        event_types: Optional[Sequence[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run handlers again for stored events, without notifications.
+
+        Useful after fixing a handler bug; handlers must be idempotent.
+        """
+        from app.services.event_stream import StreamConsumer
+
+        scanned = self.replay(start_id, end_id, count)
+        if not scanned:
+            return {"replayed": 0, "failed": 0, "next_offset": None}
+        entries = scanned
+        if event_types:
+            wanted = set(event_types)
+            entries = [entry for entry in scanned if entry.event.event_type in wanted]
+        # Handlers only: the entries are not read through a consumer group
+        consumer = StreamConsumer(self.stream, notify=None)
+        failed = consumer.process(entries, notify=False)
+        return {
+            "replayed": len(entries),
+            "failed": len(failed),
+            "next_offset": next_offset(scanned[-1].entry_id),
+        }
+
     def _dispatch_async(self, event: Event) -> None:
         """Dispatch event handlers asynchronously via Celery."""
         try:
@@ -212,7 +356,8 @@ class EventBus:
     def _dispatch_sync(self, event: Event) -> None:
         """Dispatch event handlers synchronously (fallback)."""
         handlers = self._handlers.get(event.event_type, [])
-        if not handlers:
+        batch_handlers = self._batch_handlers.get(event.event_type, [])
+        if not handlers and not batch_handlers:
             return
 
         try:
@@ -226,6 +371,18 @@ class EventBus:
             return
 
         with SessionLocal() as db:
+            for batch_handler in batch_handlers:
+                try:
+                    batch_handler([event], db)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.error(
+                        "event_handler_error",
+                        event_id=event.event_id,
+                        handler=batch_handler.__name__,
+                        error=str(e),
+                    )
             for handler in handlers:
                 try:
                     if handler.__code__.co_argcount >= 2:
@@ -282,7 +439,7 @@ class EventBus:
         return self._handlers.get(event_type, [])
 
     def get_event(self, event_id: str) -> Optional[Event]:
-        """Retrieve a stored event by ID (for debugging)."""
+        """Retrieve a stored event by ID (for debugging; Celery backend only, use replay() with streams)."""
         if not self.redis:
             return None
         try:
@@ -295,6 +452,12 @@ class EventBus:
         return None
 
 
+def next_offset(entry_id: str) -> str:
+    """Smallest stream id after entry_id, for paging with replay()."""
+    ms, _, seq = entry_id.partition("-")
+    return f"{ms}-{int(seq or 0) + 1}"
+
+
 def get_event_bus() -> EventBus:
     """Get the global event bus instance."""
     global _event_bus
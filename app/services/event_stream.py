@@ -0,0 +1,460 @@
+"""
+Event Stream Backends
+
+Durable storage and group consumption for EventBus events:
+- RedisEventStream: one Redis stream read through consumer groups, with
+  pending-entry reclaim via XPENDING/XCLAIM and a dead-letter stream
+- InMemoryEventStream: synchronous implementation with the same semantics,
+  for tests and single-process use
+- StreamConsumer: reads batches, runs batch handlers once per event type
+  and per-event handlers for each event, acknowledges entries whose
+  handlers all succeeded, reclaims entries left by dead consumers and
+  dead-letters entries that keep failing
+
+Delivery is at-least-once: an entry whose handler failed stays pending and
+is retried with every handler, so handlers must be idempotent.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import structlog
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from app.services.event_bus import (
+    Event,
+    EventEncoder,
+    _batch_handler_registry,
+    _handler_registry,
+)
+
+logger = structlog.get_logger(__name__)
+
+STREAM_KEY = "events:stream"
+DEAD_LETTER_KEY = "events:dead"
+DEFAULT_GROUP = "event-handlers"
+
+
+@dataclass
+class StreamEntry:
+    """An event as stored in the stream."""
+
+    entry_id: str
+    event: Event
+    notify: bool = True
+    deliveries: int = 1
+
+
+@dataclass
+class PendingEntry:
+    """A delivered but unacknowledged entry."""
+
+    entry_id: str
+    consumer: str
+    idle_ms: int
+    deliveries: int
+
+
+def encode_entry(event: Event, notify: bool) -> Dict[str, str]:
+    return {
+        "event": json.dumps(event.to_dict(), cls=EventEncoder),
+        "notify": "1" if notify else "0",
+    }
+
+
+def decode_entry(entry_id: str, fields: Optional[Dict[str, str]]) -> Optional[StreamEntry]:
+    """Rebuild an entry; returns None for trimmed or unreadable entries."""
+    if not fields or "event" not in fields:
+        return None
+    try:
+        event = Event.from_dict(json.loads(fields["event"]))
+    except (TypeError, ValueError) as e:
+        logger.warning("event_stream_bad_entry", entry_id=entry_id, error=str(e))
+        return None
+    return StreamEntry(entry_id=entry_id, event=event, notify=fields.get("notify", "1") == "1")
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# =============================================================================
+# REDIS
+# =============================================================================
+
+
+class RedisEventStream:
+    """Events in a Redis stream, trimmed to roughly maxlen entries."""
+
+    def __init__(self, redis: Redis, key: str = STREAM_KEY, maxlen: int = 500_000) -> None:
+        # The client must be created with decode_responses=True
+        self.redis = redis
+        self.key = key
+        self.maxlen = maxlen
+
+    def append(self, items: Sequence[Tuple[Event, bool]]) -> List[str]:
+        pipe = self.redis.pipeline(transaction=False)
+        for event, notify in items:
+            pipe.xadd(self.key, encode_entry(event, notify), maxlen=self.maxlen, approximate=True)
+        return list(pipe.execute())
+
+    def ensure_group(self, group: str, start_id: str = "0") -> None:
+        try:
+            self.redis.xgroup_create(self.key, group, id=start_id, mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read_group(self, group: str, consumer: str, count: int, block_ms: int = 0) -> List[StreamEntry]:
+        response = self.redis.xreadgroup(group, consumer, {self.key: ">"}, count=count, block=block_ms or None)
+        entries = []
+        for _, messages in response or []:
+            for entry_id, fields in messages:
+                entry = decode_entry(entry_id, fields)
+                if entry is not None:
+                    entries.append(entry)
+                else:
+                    self.redis.xack(self.key, group, entry_id)
+        return entries
+
+    def ack(self, group: str, entry_ids: Iterable[str]) -> int:
+        entry_ids = list(entry_ids)
+        if not entry_ids:
+            return 0
+        return int(self.redis.xack(self.key, group, *entry_ids))
+
+    def pending(self, group: str, min_idle_ms: int, count: int) -> List[PendingEntry]:
+        rows = self.redis.xpending_range(self.key, group, min="-", max="+", count=count, idle=min_idle_ms)
+        return [
+            PendingEntry(
+                entry_id=row["message_id"],
+                consumer=row["consumer"],
+                idle_ms=int(row["time_since_delivered"]),
+                deliveries=int(row["times_delivered"]),
+            )
+            for row in rows
+        ]
+
+    def claim(self, group: str, consumer: str, entry_ids: Sequence[str], min_idle_ms: int) -> List[StreamEntry]:
+        if not entry_ids:
+            return []
+        claimed = self.redis.xclaim(self.key, group, consumer, min_idle_ms, list(entry_ids))
+        entries = []
+        for entry_id, fields in claimed:
+            entry = decode_entry(entry_id, fields)
+            if entry is not None:
+                entries.append(entry)
+            else:
+                # Trimmed while pending; nothing left to deliver
+                self.redis.xack(self.key, group, entry_id)
+        return entries
+
+    def range(self, start_id: str = "-", end_id: str = "+", count: int = 100) -> List[StreamEntry]:
+        entries = []
+        for entry_id, fields in self.redis.xrange(self.key, min=start_id, max=end_id, count=count):
+            entry = decode_entry(entry_id, fields)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def dead_letter(self, entries: Sequence[StreamEntry], reason: str) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for entry in entries:
+            fields = encode_entry(entry.event, entry.notify)
+            fields.update({"entry_id": entry.entry_id, "reason": reason, "deliveries": str(entry.deliveries)})
+            pipe.xadd(DEAD_LETTER_KEY, fields, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+
+    def __len__(self) -> int:
+        return int(self.redis.xlen(self.key))
+
+
+# =============================================================================
+# IN-MEMORY
+# =============================================================================
+
+
+def _id_key(entry_id: str) -> Tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class InMemoryEventStream:
+    """Synchronous stand-in for RedisEventStream with the same delivery rules."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.entries: List[Tuple[str, Dict[str, str]]] = []
+        self.dead: List[Tuple[StreamEntry, str]] = []
+        # group -> {"next": index of the next undelivered entry,
+        #           "pending": entry_id -> [consumer, delivered_at, deliveries]}
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self._seq = 0
+
+    def append(self, items: Sequence[Tuple[Event, bool]]) -> List[str]:
+        ids = []
+        for event, notify in items:
+            self._seq += 1
+            entry_id = f"{self._seq}-0"
+            self.entries.append((entry_id, encode_entry(event, notify)))
+            ids.append(entry_id)
+        return ids
+
+    def ensure_group(self, group: str, start_id: str = "0") -> None:
+        if group in self.groups:
+            return
+        if start_id == "$":
+            start = len(self.entries)
+        else:
+            start = sum(1 for entry_id, _ in self.entries if _id_key(entry_id) <= _id_key(start_id))
+        self.groups[group] = {"next": start, "pending": {}}
+
+    def read_group(self, group: str, consumer: str, count: int, block_ms: int = 0) -> List[StreamEntry]:
+        state = self.groups[group]
+        batch = self.entries[state["next"]:state["next"] + count]
+        state["next"] += len(batch)
+        now = self.clock()
+        entries = []
+        for entry_id, fields in batch:
+            state["pending"][entry_id] = [consumer, now, 1]
+            entries.append(decode_entry(entry_id, fields))
+        return [entry for entry in entries if entry is not None]
+
+    def ack(self, group: str, entry_ids: Iterable[str]) -> int:
+        pending = self.groups[group]["pending"]
+        return sum(1 for entry_id in list(entry_ids) if pending.pop(entry_id, None) is not None)
+
+    def pending(self, group: str, min_idle_ms: int, count: int) -> List[PendingEntry]:
+        now = self.clock()
+        rows = []
+        for entry_id, (consumer, delivered_at, deliveries) in self.groups[group]["pending"].items():
+            idle_ms = int((now - delivered_at) * 1000)
+            if idle_ms >= min_idle_ms:
+                rows.append(PendingEntry(entry_id, consumer, idle_ms, deliveries))
+        rows.sort(key=lambda row: _id_key(row.entry_id))
+        return rows[:count]
+
+    def claim(self, group: str, consumer: str, entry_ids: Sequence[str], min_idle_ms: int) -> List[StreamEntry]:
+        pending = self.groups[group]["pending"]
+        fields_by_id = dict(self.entries)
+        now = self.clock()
+        entries = []
+        for entry_id in entry_ids:
+            state = pending.get(entry_id)
+            if state is None or (now - state[1]) * 1000 < min_idle_ms:
+                continue
+            pending[entry_id] = [consumer, now, state[2] + 1]
+            entry = decode_entry(entry_id, fields_by_id.get(entry_id))
+            if entry is not None:
+                entry.deliveries = state[2] + 1
+                entries.append(entry)
+        return entries
+
+    def range(self, start_id: str = "-", end_id: str = "+", count: int = 100) -> List[StreamEntry]:
+        low = (0, 0) if start_id == "-" else _id_key(start_id)
+        high = None if end_id == "+" else _id_key(end_id)
+        entries = []
+        for entry_id, fields in self.entries:
+            key = _id_key(entry_id)
+            if key < low or (high is not None and key > high):
+                continue
+            entry = decode_entry(entry_id, fields)
+            if entry is not None:
+                entries.append(entry)
+            if len(entries) >= count:
+                break
+        return entries
+
+    def dead_letter(self, entries: Sequence[StreamEntry], reason: str) -> None:
+        self.dead.extend((entry, reason) for entry in entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+# =============================================================================
+# CONSUMER
+# =============================================================================
+
+
+def notify_events(db: Any, events: List[Event]) -> None:
+    """Forward events to NotificationService, as EventBus.publish does inline."""
+    from app.models.notification import NotificationEventType
+    from app.services.notification_service import NotificationService
+
+    service = NotificationService(db)
+    for event in events:
+        try:
+            event_type = NotificationEventType(event.event_type)
+        except ValueError:
+            continue
+        service.emit_event(
+            event_type=event_type,
+            payload=event.payload,
+            entity_type=event.entity_type,
+            entity_id=event.entity_id,
+            user_ids=event.user_ids,
+            company=event.company,
+        )
+
+
+def _default_session_factory() -> Any:
+    from app.database import SessionLocal
+
+    return SessionLocal()
+
+
+class StreamConsumer:
+    """
+    Consumes an event stream through a consumer group.
+
+    Batch handlers (registered with @subscribe_batch) receive every event of
+    their type in a batch at once; per-event handlers (@subscribe) are called
+    for each event. Each handler call commits on its own.
+    """
+
+    def __init__(
+        self,
+        stream: Any,
+        group: str = DEFAULT_GROUP,
+        consumer: Optional[str] = None,
+        handlers: Optional[Dict[str, List[Callable]]] = None,
+        batch_handlers: Optional[Dict[str, List[Callable]]] = None,
+        session_factory: Callable[[], Any] = _default_session_factory,
+        notify: Optional[Callable[[Any, List[Event]], None]] = notify_events,
+        max_deliveries: int = 5,
+    ) -> None:
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or default_consumer_name()
+        self.handlers = _handler_registry if handlers is None else handlers
+        self.batch_handlers = _batch_handler_registry if batch_handlers is None else batch_handlers
+        self.session_factory = session_factory
+        self.notify = notify
+        self.max_deliveries = max_deliveries
+        self._group_ready = False
+
+    def _ensure_group(self) -> None:
+        if not self._group_ready:
+            self.stream.ensure_group(self.group)
+            self._group_ready = True
+
+    def run_once(self, count: int = 100, block_ms: int = 0) -> Dict[str, int]:
+        """Read and process one batch of new entries."""
+        self._ensure_group()
+        entries = self.stream.read_group(self.group, self.consumer, count, block_ms)
+        return self._process_and_ack(entries)
+
+    def drain(self, count: int = 100, max_seconds: float = 30.0, block_ms: int = 0) -> Dict[str, int]:
+        """Process batches until the stream is idle or the time budget is spent."""
+        totals = {"read": 0, "acked": 0, "failed": 0, "batches": 0}
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            result = self.run_once(count=count, block_ms=block_ms)
+            if not result["read"]:
+                break
+            totals["batches"] += 1
+            for key, value in result.items():
+                totals[key] += value
+        return totals
+
+    def reclaim(self, min_idle_ms: int = 60_000, count: int = 100) -> Dict[str, int]:
+        """
+        Take over entries that have been pending for min_idle_ms.
+
+        Entries delivered max_deliveries times already are moved to the
+        dead-letter stream instead of being retried.
+        """
+        self._ensure_group()
+        stale = self.stream.pending(self.group, min_idle_ms, count)
+        if not stale:
+            return {"read": 0, "acked": 0, "failed": 0, "dead_lettered": 0}
+
+        claimed = self.stream.claim(self.group, self.consumer, [row.entry_id for row in stale], min_idle_ms)
+        deliveries = {row.entry_id: row.deliveries for row in stale}
+        poison = []
+        retry = []
+        for entry in claimed:
+            entry.deliveries = deliveries.get(entry.entry_id, entry.deliveries)
+            if entry.deliveries >= self.max_deliveries:
+                poison.append(entry)
+            else:
+                retry.append(entry)
+
+        if poison:
+            self.stream.dead_letter(poison, reason="max_deliveries")
+            self.stream.ack(self.group, [entry.entry_id for entry in poison])
+            logger.warning("event_stream_dead_lettered", count=len(poison), group=self.group)
+
+        result = self._process_and_ack(retry)
+        result["dead_lettered"] = len(poison)
+        return result
+
+    def process(self, entries: Sequence[StreamEntry], notify: bool = True) -> Set[str]:
+        """Run handlers for entries; returns the ids whose handlers failed."""
+        failed: Set[str] = set()
+        if not entries:
+            return failed
+
+        by_type: Dict[str, List[StreamEntry]] = defaultdict(list)
+        for entry in entries:
+            by_type[entry.event.event_type].append(entry)
+
+        db = self.session_factory()
+        try:
+            for event_type, typed in by_type.items():
+                for handler in self.batch_handlers.get(event_type, []):
+                    try:
+                        handler([entry.event for entry in typed], db)
+                        db.commit()
+                    except Exception as e:
+                        db.rollback()
+                        failed.update(entry.entry_id for entry in typed)
+                        logger.error(
+                            "batch_handler_failed",
+                            handler=handler.__name__,
+                            event_type=event_type,
+                            events=len(typed),
+                            error=str(e),
+                        )
+
+                for handler in self.handlers.get(event_type, []):
+                    for entry in typed:
+                        try:
+                            if handler.__code__.co_argcount >= 2:
+                                handler(entry.event, db)
+                            else:
+                                handler(entry.event)
+                            db.commit()
+                        except Exception as e:
+                            db.rollback()
+                            failed.add(entry.entry_id)
+                            logger.error(
+                                "event_handler_error",
+                                event_id=entry.event.event_id,
+                                handler=handler.__name__,
+                                error=str(e),
+                            )
+
+            to_notify = [entry.event for entry in entries if entry.notify and entry.entry_id not in failed]
+            if notify and to_notify and self.notify is not None:
+                try:
+                    self.notify(db, to_notify)
+                except Exception as e:
+                    db.rollback()
+                    logger.warning("notification_forward_failed", events=len(to_notify), error=str(e))
+        finally:
+            db.close()
+        return failed
+
+    def _process_and_ack(self, entries: Sequence[StreamEntry]) -> Dict[str, int]:
+        failed = self.process(entries)
+        acked = self.stream.ack(self.group, [entry.entry_id for entry in entries if entry.entry_id not in failed])
+        return {"read": len(entries), "acked": acked, "failed": len(failed)}
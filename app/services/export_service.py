@@ -7,10 +7,17 @@ Provides CSV and PDF export functionality for accounting reports:
 - Income Statement
 - General Ledger
 - Aging Reports (Receivables/Payables)
+- Year-over-year Income Statement
+- Tax summaries (VAT, PAYE, WHT remittances)
+
+Also provides streaming writers (CSV, NDJSON, JSON array, XLSX, Parquet) for
+row-level exports that are too large to build in memory.
 """
 import csv
 import io
-from typing import Dict, Any, List, Optional, cast
+import json
+import tempfile
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, cast
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -23,6 +30,36 @@ try:
 except ImportError:
     WEASYPRINT_AVAILABLE = False
 
+# Optional Excel support
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# Optional Parquet support
+PARQUET_TYPES: Dict[str, Any] = {}
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_TYPES = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("us"),
+        "bool": pa.bool_(),
+    }
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Flush streamed output once this many characters/bytes are buffered
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Rows per Parquet row group
+PARQUET_ROW_GROUP_SIZE = 10_000
+
 
 class ExportError(Exception):
     """Exception raised for export-related errors."""
@@ -40,6 +77,10 @@ class ExportService:
         "general_ledger": "reports/general_ledger.html.j2",
         "receivables_aging": "reports/receivables_aging.html.j2",
         "payables_aging": "reports/payables_aging.html.j2",
+        "income_statement_yoy": "reports/income_statement_yoy.html.j2",
+        "vat_summary": "reports/vat_summary.html.j2",
+        "paye_summary": "reports/paye_summary.html.j2",
+        "wht_remittance_due": "reports/wht_remittance_due.html.j2",
     }
 
     def __init__(self):
@@ -72,6 +113,14 @@ class ExportService:
             self._write_aging_csv(writer, data, "Receivables")
         elif report_type == "payables_aging":
             self._write_aging_csv(writer, data, "Payables")
+        elif report_type == "income_statement_yoy":
+            self._write_income_statement_yoy_csv(writer, data)
+        elif report_type == "vat_summary":
+            self._write_vat_summary_csv(writer, data)
+        elif report_type == "paye_summary":
+            self._write_paye_summary_csv(writer, data)
+        elif report_type == "wht_remittance_due":
+            self._write_wht_remittance_csv(writer, data)
         else:
             raise ExportError(f"Unknown report type: {report_type}")
 
@@ -103,6 +152,152 @@ class ExportService:
             raise ExportError("PDF generation failed - no output produced")
         return cast(bytes, pdf_bytes)
 
+    # =========================================================================
+    # STREAMING WRITERS
+    # =========================================================================
+    #
+    # These consume row iterators lazily and yield bounded chunks, so pairing
+    # them with a server-side cursor (Query.yield_per) keeps memory flat no
+    # matter how many rows are exported. StreamingResponse pulls the next chunk
+    # only after the previous one was sent, which gives natural backpressure.
+
+    def stream_csv(
+        self,
+        header: Optional[Sequence[Any]],
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """Yield CSV text in chunks of roughly ``chunk_size`` characters."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(header)
+
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def stream_ndjson(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """Yield newline-delimited JSON, one object per row."""
+        parts: List[str] = []
+        size = 0
+        for row in rows:
+            line = json.dumps(row, default=str) + "\n"
+            parts.append(line)
+            size += len(line)
+            if size >= chunk_size:
+                yield "".join(parts)
+                parts, size = [], 0
+
+        if parts:
+            yield "".join(parts)
+
+    def stream_json_array(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """Yield a JSON array incrementally (one element per line)."""
+        yield "["
+        first = True
+        for chunk in self.stream_ndjson(rows, chunk_size):
+            lines = chunk.rstrip("\n").split("\n")
+            body = ",\n".join(lines)
+            yield ("\n" if first else ",\n") + body
+            first = False
+        yield "\n]\n"
+
+    def stream_xlsx(
+        self,
+        header: Optional[Sequence[Any]],
+        rows: Iterable[Sequence[Any]],
+        sheet_title: str = "Export",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Build an XLSX with openpyxl write-only mode and yield it in chunks.
+
+        Write-only worksheets spool rows to disk as they are appended, so
+        memory stays bounded. XLSX is a zip container and can only be emitted
+        once complete, so the saved file is read back from a spooled temp file.
+        """
+        if not OPENPYXL_AVAILABLE:
+            raise ExportError("Excel export is not available. Install openpyxl: pip install openpyxl")
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(title=sheet_title[:31] or "Export")
+        if header:
+            worksheet.append(list(header))
+        for row in rows:
+            worksheet.append(list(row))
+
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as output:
+            workbook.save(output)
+            output.seek(0)
+            while True:
+                chunk = output.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def stream_parquet(
+        self,
+        header: Sequence[str],
+        types: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Write rows as Parquet row groups and yield the file in chunks.
+
+        Columns are typed from ``types`` (string, int, float, date, datetime,
+        bool) so every row group shares one schema, even one that is all
+        nulls. Only one row group is held in memory at a time; like XLSX the
+        file ends with a footer, so it is spooled and read back once complete.
+        """
+        if not PYARROW_AVAILABLE:
+            raise ExportError("Parquet export is not available. Install pyarrow: pip install pyarrow")
+        unknown = sorted(set(types) - set(PARQUET_TYPES))
+        if unknown:
+            raise ExportError(f"Unknown Parquet column types: {unknown}")
+
+        schema = pa.schema([(name, PARQUET_TYPES[kind]) for name, kind in zip(header, types)])
+
+        def write(writer: Any, batch: List[Sequence[Any]]) -> None:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as output:
+            writer = pq.ParquetWriter(output, schema)
+            batch: List[Sequence[Any]] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= row_group_size:
+                    write(writer, batch)
+                    batch = []
+            if batch:
+                write(writer, batch)
+            writer.close()
+
+            output.seek(0)
+            while True:
+                chunk = output.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
     def _write_trial_balance_csv(self, writer: Any, data: Dict[str, Any]) -> None:
         """Write trial balance to CSV."""
         writer.writerow([f"Trial Balance as of {data.get('as_of_date', '')}"])
@@ -260,6 +455,124 @@ class ExportService:
         summary_amounts = [self._format_number(summary.get(b, 0)) for b in buckets]
         writer.writerow(["TOTAL"] + summary_amounts + [self._format_number(summary.get("total", 0))])
 
+    def _write_income_statement_yoy_csv(self, writer: Any, data: Dict[str, Any]) -> None:
+        """Write year-over-year income statement to CSV (one column per year)."""
+        years = data.get("years", [])
+        statements = data.get("statements", {})
+        writer.writerow(["Income Statement - Year over Year"])
+        writer.writerow([f"Basis: {data.get('basis', 'accrual').title()}"])
+        writer.writerow([])
+
+        for section, label, total_label in (
+            ("income", "INCOME", "Total Income"),
+            ("expenses", "EXPENSES", "Total Expenses"),
+        ):
+            writer.writerow([label])
+            writer.writerow(["Account"] + years)
+            for account, amounts in self._pivot_accounts(statements, years, section).items():
+                writer.writerow([account] + [self._format_number(a) for a in amounts])
+            writer.writerow([total_label] + [
+                self._format_number(statements.get(y, {}).get(section, {}).get("total", 0)) for y in years
+            ])
+            writer.writerow([])
+
+        writer.writerow(["SUMMARY"])
+        writer.writerow([""] + years)
+        writer.writerow(["Gross Profit"] + [
+            self._format_number(statements.get(y, {}).get("gross_profit", 0)) for y in years
+        ])
+        writer.writerow(["Net Income"] + [
+            self._format_number(statements.get(y, {}).get("net_income", 0)) for y in years
+        ])
+
+    def _pivot_accounts(
+        self, statements: Dict[str, Any], years: List[str], section: str
+    ) -> Dict[str, List[Any]]:
+        """Pivot per-year account amounts into {account: [amount per year]}."""
+        pivot: Dict[str, List[Any]] = {}
+        for index, year in enumerate(years):
+            for acc in statements.get(year, {}).get(section, {}).get("accounts", []):
+                amounts = pivot.setdefault(acc.get("account", ""), [0] * len(years))
+                amounts[index] = acc.get("amount", 0)
+        return pivot
+
+    def _write_vat_summary_csv(self, writer: Any, data: Dict[str, Any]) -> None:
+        """Write multi-period VAT summary to CSV."""
+        writer.writerow([f"VAT Summary {data.get('start_period', '')} to {data.get('end_period', '')}"])
+        writer.writerow([])
+        writer.writerow(["Period", "Due Date", "Output VAT", "Input VAT", "Net VAT Payable", "Transactions", "Filed"])
+
+        for row in data.get("periods", []):
+            writer.writerow([
+                row.get("period", ""),
+                row.get("due_date", ""),
+                self._format_number(row.get("output_vat", 0)),
+                self._format_number(row.get("input_vat", 0)),
+                self._format_number(row.get("net_vat_payable", 0)),
+                row.get("transaction_count", 0),
+                "Yes" if row.get("is_filed") else "No",
+            ])
+
+        writer.writerow([])
+        writer.writerow([
+            "TOTAL", "",
+            self._format_number(data.get("total_output_vat", 0)),
+            self._format_number(data.get("total_input_vat", 0)),
+            self._format_number(data.get("total_net_vat_payable", 0)),
+        ])
+
+    def _write_paye_summary_csv(self, writer: Any, data: Dict[str, Any]) -> None:
+        """Write multi-period PAYE summary to CSV."""
+        writer.writerow([f"PAYE Summary {data.get('start_period', '')} to {data.get('end_period', '')}"])
+        writer.writerow([])
+        writer.writerow(["Period", "Due Date", "Employees", "Gross Income", "Tax", "Filed"])
+
+        for row in data.get("periods", []):
+            writer.writerow([
+                row.get("period", ""),
+                row.get("due_date", ""),
+                row.get("employee_count", 0),
+                self._format_number(row.get("total_gross_income", 0)),
+                self._format_number(row.get("total_tax", 0)),
+                "Yes" if row.get("is_filed") else "No",
+            ])
+
+        writer.writerow([])
+        writer.writerow([
+            "TOTAL", "", "",
+            self._format_number(data.get("total_gross_income", 0)),
+            self._format_number(data.get("total_tax", 0)),
+        ])
+
+    def _write_wht_remittance_csv(self, writer: Any, data: Dict[str, Any]) -> None:
+        """Write pending WHT remittances to CSV."""
+        writer.writerow(["WHT Remittances Due"])
+        writer.writerow([])
+        writer.writerow([
+            "Reference", "Transaction Date", "Supplier", "Supplier TIN", "Payment Type",
+            "Gross Amount", "WHT Rate", "WHT Amount", "Remittance Due",
+        ])
+
+        for txn in data.get("transactions", []):
+            writer.writerow([
+                txn.get("reference_number", ""),
+                txn.get("transaction_date", ""),
+                txn.get("supplier_name", ""),
+                txn.get("supplier_tin", ""),
+                txn.get("payment_type", ""),
+                self._format_number(txn.get("gross_amount", 0)),
+                txn.get("wht_rate", ""),
+                self._format_number(txn.get("wht_amount", 0)),
+                txn.get("remittance_due_date", ""),
+            ])
+
+        writer.writerow([])
+        writer.writerow(["Total Pending:", self._format_number(data.get("total_amount", 0))])
+        writer.writerow(["Overdue:", data.get("overdue_count", 0), self._format_number(data.get("overdue_amount", 0))])
+        writer.writerow([
+            "Due This Week:", data.get("due_this_week", 0), self._format_number(data.get("due_this_week_amount", 0))
+        ])
+
     def _generate_html(self, data: Dict[str, Any], report_type: str) -> str:
         """Generate HTML for PDF export using Jinja2 templates."""
         template_name = self.TEMPLATE_MAP.get(report_type)
@@ -271,6 +584,7 @@ class ExportService:
             data=data,
             company_name=self.company_name,
             now=datetime.now(),
+            pivot_accounts=self._pivot_accounts,
         )
 
     def _format_number(self, value: Any) -> str:
@@ -0,0 +1,158 @@
+"""Compiled holiday calendars for leave day counting.
+
+The holiday lists that apply to a company are compiled once into a sorted
+array of non-working dates:
+- Holiday rows of every list (ERPNext syncs weekly offs as rows too)
+- A list's weekly_off weekday expanded over the list's from/to range
+Counting the working days in a leave period is then two binary searches
+instead of a walk over each day and each holiday.
+
+Compiled calendars are cached per process, keyed by company and checked
+against a version stamp (list count and last edit plus a holiday
+fingerprint) so edits made by any process are picked up. The holiday list
+endpoints also drop the local entries directly.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import func, or_, true
+from sqlalchemy.orm import Session
+
+from app.models.hr_leave import Holiday, HolidayList
+
+logger = structlog.get_logger()
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def weekly_off_dates(weekly_off: Optional[str], from_date: Optional[date], to_date: Optional[date]) -> List[date]:
+    """Dates of a list's weekly off day (e.g. "Sunday") within its range."""
+    if not weekly_off or not from_date or not to_date:
+        return []
+    try:
+        weekday = WEEKDAYS.index(weekly_off.strip().lower())
+    except ValueError:
+        return []
+    day = from_date + timedelta(days=(weekday - from_date.weekday()) % 7)
+    dates = []
+    while day <= to_date:
+        dates.append(day)
+        day += timedelta(days=7)
+    return dates
+
+
+class CompiledHolidayCalendar:
+    """Sorted non-working dates (as ordinals) of one company's holiday lists."""
+
+    def __init__(self, holiday_dates: Iterable[date]):
+        self._ordinals: List[int] = sorted({day.toordinal() for day in holiday_dates})
+
+    @property
+    def holiday_count(self) -> int:
+        return len(self._ordinals)
+
+    def is_holiday(self, day: date) -> bool:
+        i = bisect_left(self._ordinals, day.toordinal())
+        return i < len(self._ordinals) and self._ordinals[i] == day.toordinal()
+
+    def holidays_between(self, start: date, end: date) -> int:
+        """Holidays from start to end inclusive."""
+        if end < start:
+            return 0
+        return bisect_right(self._ordinals, end.toordinal()) - bisect_left(self._ordinals, start.toordinal())
+
+    def working_days(self, start: date, end: date) -> int:
+        """Days from start to end inclusive that are not holidays."""
+        if end < start:
+            return 0
+        return (end - start).days + 1 - self.holidays_between(start, end)
+
+
+def compile_holiday_calendar(
+    holiday_lists: Iterable[HolidayList],
+    holidays: Iterable[Holiday],
+) -> CompiledHolidayCalendar:
+    """Compile holiday rows and weekly offs of a set of lists."""
+    dates: List[date] = [h.holiday_date for h in holidays]
+    for holiday_list in holiday_lists:
+        dates.extend(weekly_off_dates(holiday_list.weekly_off, holiday_list.from_date, holiday_list.to_date))
+    return CompiledHolidayCalendar(dates)
+
+
+# =============================================================================
+# PROCESS CACHE
+# =============================================================================
+
+_cache: Dict[Optional[str], Tuple[Tuple[Any, ...], CompiledHolidayCalendar]] = {}
+_cache_lock = threading.Lock()
+
+
+def _company_lists(company: Optional[str]) -> Any:
+    """Lists that apply to a company: its own and those without one (every list if no company)."""
+    if company is None:
+        return true()
+    return or_(HolidayList.company == company, HolidayList.company.is_(None))
+
+
+def calendar_version(db: Session, company: Optional[str]) -> Tuple[Any, ...]:
+    """Version stamp that changes whenever a company's lists or their holidays change."""
+    return tuple(db.query(
+        func.count(func.distinct(HolidayList.id)),
+        func.max(HolidayList.updated_at),
+        func.count(Holiday.id),
+        func.max(Holiday.id),
+    ).select_from(HolidayList).outerjoin(
+        Holiday, Holiday.holiday_list_id == HolidayList.id
+    ).filter(_company_lists(company)).one())
+
+
+def get_holiday_calendar(db: Session, company: Optional[str] = None) -> CompiledHolidayCalendar:
+    """Return the cached compiled calendar for a company, recompiling if it is stale."""
+    version = calendar_version(db, company)
+    with _cache_lock:
+        entry = _cache.get(company)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    holiday_lists = db.query(HolidayList).filter(_company_lists(company)).all()
+    holidays = db.query(Holiday).filter(
+        Holiday.holiday_list_id.in_([h.id for h in holiday_lists])
+    ).all() if holiday_lists else []
+    compiled = compile_holiday_calendar(holiday_lists, holidays)
+    with _cache_lock:
+        _cache[company] = (version, compiled)
+    logger.debug("holiday_calendar_compiled", company=company, holidays=compiled.holiday_count)
+    return compiled
+
+
+def invalidate_holiday_calendars() -> None:
+    """Drop every compiled calendar from this process's cache."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def count_leave_days(
+    db: Session,
+    from_date: date,
+    to_date: date,
+    company: Optional[str] = None,
+    include_holidays: bool = False,
+    half_day: bool = False,
+) -> Decimal:
+    """Leave days taken by a period: working days unless the leave type counts holidays.
+
+    A half day takes half a day off the total.
+    """
+    if include_holidays:
+        days = Decimal(max((to_date - from_date).days + 1, 0))
+    else:
+        days = Decimal(get_holiday_calendar(db, company).working_days(from_date, to_date))
+    if half_day and days:
+        days -= Decimal("0.5")
+    return days
@@ -0,0 +1,477 @@
+"""
+HR Bulk Operations
+
+Set-based implementations of the HR bulk endpoints:
+- Attendance marking for many employees on one date
+- Attendance request and leave application approval/rejection
+- Leave allocations for many employees from a leave policy
+
+Ids are processed in chunks of settings.hr_bulk_chunk_size. Per chunk, existing
+rows are found with one IN query, new rows are written with one multi-row
+INSERT ... RETURNING, status changes with one UPDATE and audit entries with one
+INSERT. Allocation balance changes are posted to the leave ledger and
+leave_balances alongside (these Core writes bypass the allocation flush hook).
+The caller commits, so a bulk request stays a single transaction.
+
+Created/skipped details (and their order) match what the endpoints returned
+when they handled one id at a time, including ids repeated in a request.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.accounting_ext import AuditAction
+from app.models.hr_attendance import Attendance, AttendanceRequest, AttendanceRequestStatus, AttendanceStatus
+from app.models.hr_leave import (
+    ACTIVE_ALLOCATION_STATUSES,
+    LeaveAllocation,
+    LeaveAllocationStatus,
+    LeaveApplication,
+    LeaveApplicationStatus,
+    LeaveLedgerEntryType,
+    LeaveMovement,
+    LeavePolicy,
+    LeaveType,
+    apply_leave_movements,
+)
+from app.services.audit_logger import AuditLogger, serialize_for_audit
+from app.utils.iteration import chunked
+
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk operation: per-id details in request order."""
+    succeeded: List[Dict[str, Any]] = field(default_factory=list)
+    skipped: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class HRBulkService:
+    """Set-based bulk writes for attendance and leave."""
+
+    def __init__(self, db: Session, chunk_size: Optional[int] = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.hr_bulk_chunk_size
+        self.audit = AuditLogger(db)
+
+    # =========================================================================
+    # ATTENDANCE
+    # =========================================================================
+
+    def mark_attendance(
+        self,
+        employee_ids: Sequence[int],
+        attendance_date: date,
+        status: AttendanceStatus,
+        user_id: Optional[int] = None,
+    ) -> BulkResult:
+        """Create attendance for employees without a record on the date."""
+        existing: Dict[int, Tuple[int, Optional[AttendanceStatus]]] = {}
+        created_ids: Dict[int, int] = {}
+        now = datetime.utcnow()
+
+        for chunk in chunked(list(dict.fromkeys(employee_ids)), self.chunk_size):
+            rows = self.db.query(Attendance.employee_id, Attendance.id, Attendance.status).filter(
+                Attendance.employee_id.in_(chunk),
+                Attendance.attendance_date == attendance_date,
+            ).all()
+            existing.update({row.employee_id: (row.id, row.status) for row in rows})
+
+            new_ids = [emp_id for emp_id in chunk if emp_id not in existing]
+            if not new_ids:
+                continue
+            inserted = self.db.execute(
+                insert(Attendance).returning(Attendance.id, Attendance.employee_id),
+                [
+                    {
+                        "employee": f"EMP-{emp_id}",
+                        "employee_id": emp_id,
+                        "attendance_date": attendance_date,
+                        "status": status,
+                        "created_by_id": user_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for emp_id in new_ids
+                ],
+            )
+            created_ids.update({row.employee_id: row.id for row in inserted})
+
+        result = BulkResult()
+        reported: Set[int] = set()
+        for emp_id in employee_ids:
+            if emp_id in created_ids and emp_id not in reported:
+                reported.add(emp_id)
+                result.succeeded.append({"employee_id": emp_id, "id": created_ids[emp_id]})
+                continue
+            # Either there was a record already or an earlier repeat of this id created one
+            existing_id, existing_status = existing.get(emp_id) or (created_ids[emp_id], status)
+            result.skipped.append({
+                "employee_id": emp_id,
+                "existing_id": existing_id,
+                "existing_status": existing_status.value if existing_status else None,
+            })
+
+        if result.succeeded:
+            self.audit.log_create(
+                doctype="attendance",
+                document_id=0,  # Bulk operation
+                new_values={"employee_ids": [c["employee_id"] for c in result.succeeded], "status": status.value},
+                user_id=user_id,
+                document_name=f"Bulk attendance for {attendance_date}",
+                remarks=f"Bulk created {len(result.succeeded)} attendance records",
+            )
+        return result
+
+    def set_attendance_request_status(
+        self,
+        request_ids: Sequence[int],
+        status: AttendanceRequestStatus,
+        user_id: Optional[int] = None,
+    ) -> int:
+        """Move pending attendance requests to APPROVED or REJECTED; returns the number changed."""
+        if status == AttendanceRequestStatus.APPROVED:
+            action, remarks = AuditAction.APPROVE, "Bulk approval: pending to approved"
+        else:
+            action, remarks = AuditAction.REJECT, "Bulk rejection: pending to rejected"
+        now = datetime.utcnow()
+        updated = 0
+
+        for chunk in chunked(list(dict.fromkeys(request_ids)), self.chunk_size):
+            rows = self.db.execute(
+                update(AttendanceRequest)
+                .where(
+                    AttendanceRequest.id.in_(chunk),
+                    AttendanceRequest.status == AttendanceRequestStatus.PENDING,
+                )
+                .values(
+                    status=status,
+                    status_changed_by_id=user_id,
+                    status_changed_at=now,
+                    updated_by_id=user_id,
+                    updated_at=now,
+                )
+                .returning(
+                    AttendanceRequest.id,
+                    AttendanceRequest.employee,
+                    AttendanceRequest.from_date,
+                    AttendanceRequest.to_date,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            updated += len(rows)
+            self.audit.log_batch(
+                "attendance_request",
+                action,
+                [
+                    {"document_id": row.id, "document_name": f"{row.employee} ({row.from_date} to {row.to_date})"}
+                    for row in rows
+                ],
+                user_id=user_id,
+                remarks=remarks,
+            )
+        return updated
+
+    # =========================================================================
+    # LEAVE ALLOCATIONS
+    # =========================================================================
+
+    def create_leave_allocations(
+        self,
+        employee_ids: Sequence[int],
+        policy: LeavePolicy,
+        from_date: date,
+        to_date: date,
+        company: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> BulkResult:
+        """
+        Allocate each leave type of a policy to each employee.
+
+        Employee/leave type pairs with an overlapping active allocation (including
+        one created earlier in the same request) are skipped.
+        """
+        details = list(policy.details)
+        leave_type_ids = {d.leave_type_id for d in details if d.leave_type_id is not None}
+        result = BulkResult()
+        now = datetime.utcnow()
+
+        for chunk in chunked(list(employee_ids), self.chunk_size):
+            taken: Set[Tuple[int, int]] = set()
+            if leave_type_ids:
+                taken.update(
+                    (row.employee_id, row.leave_type_id)
+                    for row in self.db.query(LeaveAllocation.employee_id, LeaveAllocation.leave_type_id).filter(
+                        LeaveAllocation.employee_id.in_(set(chunk)),
+                        LeaveAllocation.leave_type_id.in_(leave_type_ids),
+                        LeaveAllocation.status.in_(ACTIVE_ALLOCATION_STATUSES),
+                        LeaveAllocation.from_date <= to_date,
+                        LeaveAllocation.to_date >= from_date,
+                    )
+                )
+
+            # (employee_id, detail, row or skip reason) in request order
+            plan: List[Tuple[int, Any, Any]] = []
+            rows: List[Dict[str, Any]] = []
+            for employee_id in chunk:
+                for detail in details:
+                    if detail.leave_type_id is None:
+                        plan.append((employee_id, detail, "Missing leave_type_id in policy detail"))
+                        continue
+                    key = (employee_id, detail.leave_type_id)
+                    if key in taken:
+                        plan.append((employee_id, detail, "Overlapping allocation exists"))
+                        continue
+                    taken.add(key)
+                    allocated = detail.annual_allocation or Decimal("0")
+                    row = {
+                        "employee": f"EMP-{employee_id}",
+                        "employee_id": employee_id,
+                        "leave_type": detail.leave_type,
+                        "leave_type_id": detail.leave_type_id,
+                        "from_date": from_date,
+                        "to_date": to_date,
+                        "new_leaves_allocated": allocated,
+                        "total_leaves_allocated": allocated,
+                        "unused_leaves": allocated,
+                        "carry_forwarded_leaves": Decimal("0"),
+                        "carry_forwarded_leaves_count": Decimal("0"),
+                        "leave_policy": policy.leave_policy_name,
+                        "status": LeaveAllocationStatus.DRAFT,
+                        "docstatus": 0,
+                        "company": company,
+                        "created_by_id": user_id,
+                        "updated_by_id": user_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    rows.append(row)
+                    plan.append((employee_id, detail, row))
+
+            ids: Dict[Tuple[int, int], int] = {}
+            if rows:
+                inserted = self.db.execute(
+                    insert(LeaveAllocation).returning(
+                        LeaveAllocation.id, LeaveAllocation.employee_id, LeaveAllocation.leave_type_id
+                    ),
+                    rows,
+                )
+                ids = {(row.employee_id, row.leave_type_id): row.id for row in inserted}
+                # Core INSERT skips the allocation flush hook; post the ledger entries here
+                apply_leave_movements(self.db.connection(), [
+                    LeaveMovement(
+                        ids[(row["employee_id"], row["leave_type_id"])],
+                        (row["employee_id"], row["leave_type_id"], from_date, to_date),
+                        row["unused_leaves"],
+                        row["total_leaves_allocated"],
+                        LeaveLedgerEntryType.ALLOCATION,
+                    )
+                    for row in rows
+                ])
+
+            audit_entries = []
+            for employee_id, detail, outcome in plan:
+                if isinstance(outcome, str):
+                    result.skipped.append({
+                        "employee_id": employee_id,
+                        "leave_type": detail.leave_type,
+                        "reason": outcome,
+                    })
+                    continue
+                allocation_id = ids[(employee_id, detail.leave_type_id)]
+                audit_entries.append({
+                    "document_id": allocation_id,
+                    "document_name": f"EMP-{employee_id} - {detail.leave_type}",
+                    "new_values": serialize_for_audit(LeaveAllocation(id=allocation_id, **outcome)),
+                })
+                result.succeeded.append({
+                    "id": allocation_id,
+                    "employee_id": employee_id,
+                    "leave_type": detail.leave_type,
+                    "total_allocated": float(detail.annual_allocation or 0),
+                })
+
+            self.audit.log_batch(
+                "leave_allocation",
+                AuditAction.CREATE,
+                audit_entries,
+                user_id=user_id,
+                remarks=f"Bulk created from policy: {policy.leave_policy_name}",
+            )
+        return result
+
+    # =========================================================================
+    # LEAVE APPLICATIONS
+    # =========================================================================
+
+    def approve_leave_applications(
+        self,
+        application_ids: Sequence[int],
+        user_id: Optional[int] = None,
+    ) -> BulkResult:
+        """
+        Approve open leave applications, deducting days from covering allocations.
+
+        Applications are handled in request order, so several applications of one
+        employee draw down the same allocation in turn. Leave-without-pay types
+        skip the balance check and deduction.
+        """
+        result = BulkResult()
+        approved: Set[int] = set()
+        is_lwp: Dict[int, bool] = {}
+        now = datetime.utcnow()
+
+        for chunk in chunked(list(application_ids), self.chunk_size):
+            applications = {
+                row.id: row
+                for row in self.db.query(
+                    LeaveApplication.id,
+                    LeaveApplication.employee,
+                    LeaveApplication.employee_id,
+                    LeaveApplication.leave_type,
+                    LeaveApplication.leave_type_id,
+                    LeaveApplication.from_date,
+                    LeaveApplication.total_leave_days,
+                    LeaveApplication.status,
+                ).filter(LeaveApplication.id.in_(set(chunk)))
+            }
+
+            type_ids = {a.leave_type_id for a in applications.values() if a.leave_type_id} - is_lwp.keys()
+            if type_ids:
+                rows = self.db.query(LeaveType.id, LeaveType.is_lwp).filter(LeaveType.id.in_(type_ids)).all()
+                is_lwp.update({row.id: bool(row.is_lwp) for row in rows})
+
+            # Allocations (as mutable [from, to, unused]) by employee/leave type, oldest first
+            allocations: Dict[Tuple[int, int], List[Tuple[int, List[Any]]]] = {}
+            pairs = {(a.employee_id, a.leave_type_id) for a in applications.values() if a.employee_id and a.leave_type_id}
+            if pairs:
+                for row in self.db.query(
+                    LeaveAllocation.id,
+                    LeaveAllocation.employee_id,
+                    LeaveAllocation.leave_type_id,
+                    LeaveAllocation.from_date,
+                    LeaveAllocation.to_date,
+                    LeaveAllocation.unused_leaves,
+                ).filter(
+                    LeaveAllocation.employee_id.in_({p[0] for p in pairs}),
+                    LeaveAllocation.leave_type_id.in_({p[1] for p in pairs}),
+                    LeaveAllocation.status.in_(ACTIVE_ALLOCATION_STATUSES),
+                ).order_by(LeaveAllocation.id):
+                    allocations.setdefault((row.employee_id, row.leave_type_id), []).append(
+                        (row.id, [row.from_date, row.to_date, row.unused_leaves])
+                    )
+
+            balances: Dict[int, Decimal] = {}
+            movements: List[LeaveMovement] = []
+            approved_rows = []
+            for app_id in chunk:
+                application = applications.get(app_id)
+                if not application or application.status != LeaveApplicationStatus.OPEN or app_id in approved:
+                    result.skipped.append({"application_id": app_id, "reason": "Not open or not found"})
+                    continue
+
+                tracked = bool(application.employee_id and application.leave_type_id)
+                if tracked and not is_lwp.get(application.leave_type_id, False):
+                    covering = [
+                        (alloc_id, state)
+                        for alloc_id, state in allocations.get((application.employee_id, application.leave_type_id), [])
+                        if state[0] <= application.from_date <= state[1]
+                    ]
+                    available = sum((state[2] or Decimal("0") for _, state in covering), Decimal("0"))
+                    requested = application.total_leave_days or Decimal("0")
+                    if requested > available:
+                        result.skipped.append({
+                            "application_id": app_id,
+                            "reason": "Insufficient balance",
+                            "available": float(available),
+                            "requested": float(requested),
+                        })
+                        continue
+                    if not covering:
+                        result.skipped.append({"application_id": app_id, "reason": "No allocation covering dates"})
+                        continue
+                    alloc_id, state = covering[0]
+                    state[2] = (state[2] or Decimal("0")) - requested
+                    balances[alloc_id] = state[2]
+                    movements.append(LeaveMovement(
+                        alloc_id,
+                        (application.employee_id, application.leave_type_id, state[0], state[1]),
+                        -requested,
+                        Decimal("0"),
+                        LeaveLedgerEntryType.CONSUMPTION,
+                        app_id,
+                    ))
+
+                approved.add(app_id)
+                approved_rows.append(application)
+                result.succeeded.append({"application_id": app_id})
+
+            if balances:
+                self.db.execute(
+                    update(LeaveAllocation).execution_options(synchronize_session=False),
+                    [{"id": alloc_id, "unused_leaves": unused, "updated_at": now} for alloc_id, unused in balances.items()],
+                )
+                apply_leave_movements(self.db.connection(), movements)
+            if approved_rows:
+                self.db.execute(
+                    update(LeaveApplication)
+                    .where(LeaveApplication.id.in_([a.id for a in approved_rows]))
+                    .values(
+                        status=LeaveApplicationStatus.APPROVED,
+                        status_changed_by_id=user_id,
+                        status_changed_at=now,
+                        updated_by_id=user_id,
+                        updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            self.audit.log_batch(
+                "leave_application",
+                AuditAction.APPROVE,
+                [{"document_id": a.id, "document_name": f"{a.employee} - {a.leave_type}"} for a in approved_rows],
+                user_id=user_id,
+                remarks="Bulk approval: open to approved",
+            )
+        return result
+
+    def reject_leave_applications(
+        self,
+        application_ids: Sequence[int],
+        user_id: Optional[int] = None,
+    ) -> int:
+        """Reject open leave applications; returns the number changed."""
+        now = datetime.utcnow()
+        updated = 0
+
+        for chunk in chunked(list(dict.fromkeys(application_ids)), self.chunk_size):
+            rows = self.db.execute(
+                update(LeaveApplication)
+                .where(
+                    LeaveApplication.id.in_(chunk),
+                    LeaveApplication.status == LeaveApplicationStatus.OPEN,
+                )
+                .values(
+                    status=LeaveApplicationStatus.REJECTED,
+                    status_changed_by_id=user_id,
+                    status_changed_at=now,
+                    updated_by_id=user_id,
+                    updated_at=now,
+                )
+                .returning(LeaveApplication.id, LeaveApplication.employee, LeaveApplication.leave_type)
+                .execution_options(synchronize_session=False)
+            ).all()
+            updated += len(rows)
+            self.audit.log_batch(
+                "leave_application",
+                AuditAction.REJECT,
+                [{"document_id": row.id, "document_name": f"{row.employee} - {row.leave_type}"} for row in rows],
+                user_id=user_id,
+                remarks="Bulk rejection: open to rejected",
+            )
+        return updated
@@ -0,0 +1,367 @@
+"""
+Inbox Event Backplane
+
+Carries inbox real-time events between processes so that every API worker
+can fan them out to the WebSocket connections it holds:
+- Events are published to one Redis pub/sub channel and each worker runs a
+  single subscriber that delivers them locally
+- Celery tasks publish with the blocking client (publish_inbox_event)
+- Stats are refreshed on request: a shared Redis key debounces requests so
+  one worker recomputes per window, whichever worker the change came from
+- Each worker advertises its connected agents so "agents online" covers the
+  whole deployment
+- Without Redis, events are delivered in-process only
+
+Pub/sub is fire-and-forget: events published while a worker is reconnecting
+are lost, and clients resynchronise over REST when they reconnect.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+import redis.asyncio as aioredis
+import structlog
+from redis import Redis
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+INBOX_EVENTS_CHANNEL = "inbox:events"
+STATS_REFRESH_KEY = "inbox:stats:refresh"
+PRESENCE_KEY_PREFIX = "inbox:presence:"
+
+
+# Event types for inbox
+class InboxEvent:
+    STATS_UPDATE = "stats_update"
+    CONVERSATION_UPDATE = "conversation_update"
+    CONVERSATION_ASSIGNED = "conversation_assigned"
+    NEW_MESSAGE = "new_message"
+    MESSAGE_READ = "message_read"
+    STATUS_CHANGED = "status_changed"
+    PRIORITY_CHANGED = "priority_changed"
+
+
+# A target selects local connections: {"channel": "stats"}, {"agent_id": 4}
+# or {"user_id": "user_12"}
+Target = Dict[str, Any]
+
+CONTROL_STATS_REFRESH = "stats_refresh"
+
+
+def inbox_message(event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the message body clients receive for an inbox event."""
+    return {
+        "event": event,
+        "data": data,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def encode_envelope(targets: List[Target], message: Dict[str, Any]) -> str:
+    """Serialize an event and its targets for the backplane."""
+    return json.dumps({"targets": targets, "message": message}, default=str)
+
+
+def decode_envelope(raw: Any) -> Optional[Dict[str, Any]]:
+    """Parse a backplane payload, returning None for anything malformed."""
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    try:
+        envelope = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(envelope, dict):
+        return None
+    if "control" in envelope or isinstance(envelope.get("message"), dict):
+        return envelope
+    return None
+
+
+# =============================================================================
+# TRANSPORTS
+# =============================================================================
+
+
+class LocalInboxBus:
+    """In-process transport for single-worker deployments and tests."""
+
+    name = "local"
+
+    def __init__(self) -> None:
+        self._queues: List[asyncio.Queue] = []
+        self._claims: Dict[str, float] = {}
+        self._presence: Dict[str, Set[int]] = {}
+
+    async def publish(self, raw: str) -> None:
+        for queue in list(self._queues):
+            queue.put_nowait(raw)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+
+        async def stream() -> AsyncIterator[str]:
+            try:
+                while True:
+                    yield await queue.get()
+            finally:
+                if queue in self._queues:
+                    self._queues.remove(queue)
+
+        return stream()
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        now = time.monotonic()
+        if self._claims.get(key, 0.0) > now:
+            return False
+        self._claims[key] = now + ttl
+        return True
+
+    async def set_presence(self, worker_id: str, agent_ids: Set[int], ttl: int) -> None:
+        self._presence[worker_id] = set(agent_ids)
+
+    async def agents_online(self) -> int:
+        return len(set().union(*self._presence.values())) if self._presence else 0
+
+    async def close(self) -> None:
+        self._queues.clear()
+
+
+class RedisInboxBus:
+    """Redis pub/sub transport shared by all API workers and Celery."""
+
+    name = "redis"
+
+    def __init__(self, client: aioredis.Redis) -> None:
+        self.client = client
+
+    async def publish(self, raw: str) -> None:
+        await self.client.publish(INBOX_EVENTS_CHANNEL, raw)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(INBOX_EVENTS_CHANNEL)
+
+        async def stream() -> AsyncIterator[str]:
+            try:
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        yield item["data"]
+            finally:
+                await pubsub.unsubscribe(INBOX_EVENTS_CHANNEL)
+                await pubsub.aclose()
+
+        return stream()
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        return bool(await self.client.set(key, "1", nx=True, px=max(1, int(ttl * 1000))))
+
+    async def set_presence(self, worker_id: str, agent_ids: Set[int], ttl: int) -> None:
+        key = f"{PRESENCE_KEY_PREFIX}{worker_id}"
+        if agent_ids:
+            await self.client.set(key, json.dumps(sorted(agent_ids)), ex=ttl)
+        else:
+            await self.client.delete(key)
+
+    async def agents_online(self) -> int:
+        agent_ids: Set[int] = set()
+        async for key in self.client.scan_iter(match=f"{PRESENCE_KEY_PREFIX}*", count=100):
+            raw = await self.client.get(key)
+            if raw:
+                agent_ids.update(json.loads(raw))
+        return len(agent_ids)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+async def connect_inbox_bus() -> Any:
+    """Return a Redis transport when Redis is reachable, else a local one."""
+    if settings.redis_url:
+        client = aioredis.from_url(settings.redis_url)
+        try:
+            await client.ping()
+            return RedisInboxBus(client)
+        except RedisError as e:
+            logger.warning("inbox_backplane_redis_unavailable", error=str(e))
+            await client.aclose()
+    return LocalInboxBus()
+
+
+# =============================================================================
+# BACKPLANE
+# =============================================================================
+
+
+class InboxBackplane:
+    """
+    Publishes inbox events and delivers received events to local connections.
+
+    Before start() (or when publishing to the bus fails) events are
+    delivered to this process only.
+    """
+
+    PRESENCE_TTL = 90
+    RECONNECT_DELAY = 2.0
+
+    def __init__(
+        self,
+        deliver: Callable[[List[Target], Dict[str, Any]], None],
+        on_control: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.deliver = deliver
+        self.on_control = on_control
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.bus: Any = None
+        self._local = LocalInboxBus()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def transport(self) -> str:
+        return self.bus.name if self.bus is not None else "none"
+
+    async def start(self, bus: Any = None) -> None:
+        """Subscribe to the bus and start the delivery loop."""
+        if self._task is not None:
+            return
+        self.bus = bus if bus is not None else await connect_inbox_bus()
+        stream = await self.bus.subscribe()
+        self._task = asyncio.create_task(self._run(stream))
+        logger.info("inbox_backplane_started", transport=self.bus.name, worker_id=self.worker_id)
+
+    async def stop(self) -> None:
+        """Stop the delivery loop and release the transport."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self.bus is not None:
+            try:
+                await self.bus.set_presence(self.worker_id, set(), self.PRESENCE_TTL)
+                await self.bus.close()
+            except RedisError:
+                pass
+            self.bus = None
+
+    async def publish(self, targets: List[Target], message: Dict[str, Any]) -> None:
+        """Publish an event to every worker, including this one."""
+        if self.bus is None:
+            self.deliver(targets, message)
+            return
+        try:
+            await self.bus.publish(encode_envelope(targets, message))
+        except RedisError as e:
+            logger.warning("inbox_backplane_publish_failed", error=str(e))
+            self.deliver(targets, message)
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        """Take a deployment-wide lease on key for ttl seconds."""
+        bus = self.bus or self._local
+        try:
+            return await bus.claim(key, ttl)
+        except RedisError as e:
+            logger.warning("inbox_backplane_claim_failed", key=key, error=str(e))
+            return await self._local.claim(key, ttl)
+
+    async def set_presence(self, agent_ids: Set[int]) -> None:
+        """Advertise the agents connected to this worker."""
+        bus = self.bus or self._local
+        try:
+            await bus.set_presence(self.worker_id, agent_ids, self.PRESENCE_TTL)
+        except RedisError as e:
+            logger.warning("inbox_backplane_presence_failed", error=str(e))
+
+    async def agents_online(self, local_count: int = 0) -> int:
+        """Count agents connected to any worker."""
+        bus = self.bus or self._local
+        try:
+            return await bus.agents_online()
+        except RedisError:
+            return local_count
+
+    async def _run(self, stream: AsyncIterator[str]) -> None:
+        while True:
+            try:
+                async for raw in stream:
+                    self._dispatch(raw)
+                return
+            except asyncio.CancelledError:
+                raise
+            except RedisError as e:
+                logger.warning("inbox_backplane_disconnected", error=str(e))
+            while True:
+                await asyncio.sleep(self.RECONNECT_DELAY)
+                try:
+                    stream = await self.bus.subscribe()
+                    logger.info("inbox_backplane_resubscribed", worker_id=self.worker_id)
+                    break
+                except RedisError as e:
+                    logger.warning("inbox_backplane_resubscribe_failed", error=str(e))
+
+    def _dispatch(self, raw: Any) -> None:
+        envelope = decode_envelope(raw)
+        if envelope is None:
+            logger.warning("inbox_backplane_bad_payload")
+            return
+        try:
+            if "control" in envelope:
+                if self.on_control is not None:
+                    self.on_control(envelope["control"])
+            else:
+                self.deliver(envelope.get("targets") or [], envelope["message"])
+        except Exception as e:
+            logger.error("inbox_backplane_dispatch_failed", error=str(e))
+
+
+# =============================================================================
+# BLOCKING PUBLISHERS (Celery tasks, scripts)
+# =============================================================================
+
+_sync_client: Optional[Redis] = None
+
+
+def _get_sync_client() -> Optional[Redis]:
+    global _sync_client
+    if _sync_client is None and settings.redis_url:
+        try:
+            _sync_client = Redis.from_url(settings.redis_url)
+            _sync_client.ping()
+        except RedisError as e:
+            logger.warning("redis_connection_failed", error=str(e))
+            _sync_client = None
+    return _sync_client
+
+
+def _publish_sync(payload: str) -> bool:
+    client = _get_sync_client()
+    if client is None:
+        return False
+    try:
+        client.publish(INBOX_EVENTS_CHANNEL, payload)
+        return True
+    except RedisError as e:
+        logger.warning("inbox_backplane_publish_failed", error=str(e))
+        return False
+
+
+def publish_inbox_event(targets: List[Target], message: Dict[str, Any]) -> bool:
+    """Publish an inbox event from outside the API process."""
+    return _publish_sync(encode_envelope(targets, message))
+
+
+def request_inbox_stats_refresh() -> bool:
+    """Ask the API workers to recompute and broadcast inbox stats."""
+    return _publish_sync(json.dumps({"control": CONTROL_STATS_REFRESH}))
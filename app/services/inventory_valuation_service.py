@@ -0,0 +1,630 @@
+"""
+Inventory valuation service.
+
+Maintains perpetual FIFO/LIFO cost layers and a moving-average rate per
+item and warehouse from stock ledger entries (SLEs):
+- sync(): applies new SLEs incrementally (by id watermark); back-dated
+  entries trigger a replay of the affected item/warehouse from the nearest
+  earlier snapshot, as do entries cancelled after they were applied
+- snapshot(): stores end-of-day copies of changed layer books
+- valuation_frame(): one row per item/warehouse for the valuation report,
+  read straight from the maintained state; past dates are rebuilt from the
+  latest snapshot plus the SLEs posted after it
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+import structlog
+from sqlalchemy import and_, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.inventory import StockLedgerEntry, StockValuationSnapshot, StockValuationState
+from app.models.sales import Item
+
+logger = structlog.get_logger(__name__)
+
+ZERO = Decimal("0")
+
+# SLEs fetched per round-trip while syncing
+SYNC_BATCH_SIZE = 5000
+
+VALUATION_COLUMNS = [
+    "item_code",
+    "item_name",
+    "item_group",
+    "stock_uom",
+    "standard_rate",
+    "warehouse",
+    "qty",
+    "fifo_value",
+    "lifo_value",
+    "moving_average_rate",
+]
+
+Pair = Tuple[str, str]
+
+# SLE columns CostLayerBook.apply reads; replays select only these
+LEDGER_COLUMNS = (
+    StockLedgerEntry.id,
+    StockLedgerEntry.item_code,
+    StockLedgerEntry.warehouse,
+    StockLedgerEntry.posting_date,
+    StockLedgerEntry.posting_time,
+    StockLedgerEntry.actual_qty,
+    StockLedgerEntry.incoming_rate,
+    StockLedgerEntry.valuation_rate,
+)
+
+
+def _dec(value: Any) -> Decimal:
+    return Decimal(str(value)) if value is not None else ZERO
+
+
+def _posting_at(sle: Any) -> datetime:
+    """Posting timestamp of an SLE (posting_date plus posting_time when present)."""
+    posted = sle.posting_date or datetime.min
+    if sle.posting_time:
+        try:
+            return datetime.combine(posted.date(), time.fromisoformat(sle.posting_time.split(".")[0]))
+        except ValueError:
+            pass
+    return posted
+
+
+def _posting_key(sle: Any) -> Tuple[datetime, int]:
+    return _posting_at(sle), sle.id
+
+
+def _end_of_day(day: date) -> datetime:
+    """First instant after ``day`` (exclusive upper bound for posting dates)."""
+    return datetime.combine(day + timedelta(days=1), time.min)
+
+
+# =============================================================================
+# COST LAYER BOOK
+# =============================================================================
+
+
+@dataclass
+class CostLayerBook:
+    """FIFO/LIFO layers and moving-average rate for one item in one warehouse.
+
+    Layers hold only stock on hand. Issues beyond the layers drive qty
+    negative; later receipts first cover that deficit before adding a layer.
+    """
+    qty: Decimal = ZERO
+    moving_average_rate: Decimal = ZERO
+    fifo: Deque[List[Decimal]] = field(default_factory=deque)
+    lifo: List[List[Decimal]] = field(default_factory=list)
+    last_sle_id: int = 0
+    last_posting_at: Optional[datetime] = None
+
+    @property
+    def fifo_value(self) -> Decimal:
+        return sum((q * r for q, r in self.fifo), ZERO)
+
+    @property
+    def lifo_value(self) -> Decimal:
+        return sum((q * r for q, r in self.lifo), ZERO)
+
+    def apply(self, sle: Any) -> None:
+        """Apply one SLE or LEDGER_COLUMNS row (entries must arrive in posting order)."""
+        actual_qty = _dec(sle.actual_qty)
+        valuation_rate = _dec(sle.valuation_rate)
+
+        if actual_qty > 0:
+            rate = _dec(sle.incoming_rate) or valuation_rate
+            layer_qty = actual_qty - max(-self.qty, ZERO)
+            if layer_qty > 0:
+                self.fifo.append([layer_qty, rate])
+                self.lifo.append([layer_qty, rate])
+            if self.qty > 0:
+                self.moving_average_rate = (
+                    (self.qty * self.moving_average_rate + actual_qty * rate) / (self.qty + actual_qty)
+                )
+            else:
+                self.moving_average_rate = rate
+        elif actual_qty < 0:
+            self._consume_fifo(-actual_qty)
+            self._consume_lifo(-actual_qty)
+
+        self.qty += actual_qty
+        # Prefer the source system's running rate when it provides one
+        if valuation_rate > 0:
+            self.moving_average_rate = valuation_rate
+        self.last_sle_id = max(self.last_sle_id, sle.id)
+        self.last_posting_at = _posting_at(sle)
+
+    def _consume_fifo(self, qty: Decimal) -> None:
+        while qty > 0 and self.fifo:
+            layer = self.fifo[0]
+            if layer[0] > qty:
+                layer[0] -= qty
+                return
+            qty -= layer[0]
+            self.fifo.popleft()
+
+    def _consume_lifo(self, qty: Decimal) -> None:
+        while qty > 0 and self.lifo:
+            layer = self.lifo[-1]
+            if layer[0] > qty:
+                layer[0] -= qty
+                return
+            qty -= layer[0]
+            self.lifo.pop()
+
+    # Serialization (StockValuationState / StockValuationSnapshot rows)
+
+    @classmethod
+    def from_row(cls, row: Any) -> "CostLayerBook":
+        return cls(
+            qty=_dec(row.qty),
+            moving_average_rate=_dec(row.moving_average_rate),
+            fifo=deque([_dec(q), _dec(r)] for q, r in (row.fifo_layers or [])),
+            lifo=[[_dec(q), _dec(r)] for q, r in (row.lifo_layers or [])],
+            last_sle_id=row.last_sle_id or 0,
+            last_posting_at=row.last_posting_at,
+        )
+
+    def to_columns(self) -> Dict[str, Any]:
+        return {
+            "qty": self.qty,
+            "moving_average_rate": self.moving_average_rate,
+            "fifo_value": self.fifo_value,
+            "lifo_value": self.lifo_value,
+            "fifo_layers": [[str(q), str(r)] for q, r in self.fifo],
+            "lifo_layers": [[str(q), str(r)] for q, r in self.lifo],
+            "last_sle_id": self.last_sle_id,
+            "last_posting_at": self.last_posting_at,
+        }
+
+
+# =============================================================================
+# SERVICE
+# =============================================================================
+
+
+class InventoryValuationService:
+    """Maintains StockValuationState rows and answers valuation queries."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _active_sles(self, *columns):
+        return self.db.query(*(columns or (StockLedgerEntry,))).filter(
+            StockLedgerEntry.is_cancelled == False,  # noqa: E712
+            StockLedgerEntry.item_code.isnot(None),
+            StockLedgerEntry.warehouse.isnot(None),
+        )
+
+    # -------------------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------------------
+
+    def watermark(self) -> int:
+        """Highest SLE id already applied to the valuation state."""
+        return self.db.query(func.max(StockValuationState.last_sle_id)).scalar() or 0
+
+    def sync(self, batch_size: int = SYNC_BATCH_SIZE) -> int:
+        """Apply SLEs posted since the last sync.
+
+        Returns:
+            Number of ledger entries processed
+        """
+        watermark = self.watermark()
+        processed = 0
+
+        while True:
+            batch = (
+                self._active_sles()
+                .filter(StockLedgerEntry.id > watermark)
+                .order_by(StockLedgerEntry.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            watermark = batch[-1].id
+            self._apply_batch(batch, watermark)
+            self.db.commit()
+            processed += len(batch)
+
+        replayed = self._replay_cancelled(watermark)
+        if processed or replayed:
+            logger.info("inventory_valuation_synced", entries=processed, replayed=replayed, watermark=watermark)
+        return processed
+
+    def _cancelled_sles(self, watermark: int) -> Dict[Pair, Tuple[int, Optional[datetime]]]:
+        """Count and earliest posting date of cancelled SLEs up to ``watermark``, per pair."""
+        rows = (
+            self.db.query(
+                StockLedgerEntry.item_code,
+                StockLedgerEntry.warehouse,
+                func.count(StockLedgerEntry.id),
+                func.min(StockLedgerEntry.posting_date),
+            )
+            .filter(
+                StockLedgerEntry.is_cancelled == True,  # noqa: E712
+                StockLedgerEntry.item_code.isnot(None),
+                StockLedgerEntry.warehouse.isnot(None),
+                StockLedgerEntry.id <= watermark,
+            )
+            .group_by(StockLedgerEntry.item_code, StockLedgerEntry.warehouse)
+            .all()
+        )
+        return {(item_code, warehouse): (count, first) for item_code, warehouse, count, first in rows}
+
+    def _replay_cancelled(self, watermark: int) -> int:
+        """Replay pairs whose count of cancelled SLEs changed since they were last built.
+
+        An entry cancelled after it was applied sits below the watermark, so
+        the id scan in sync() never revisits it; the pair is replayed from
+        the snapshot before its earliest cancelled entry instead.
+
+        Returns:
+            Number of item/warehouse pairs replayed
+        """
+        if not watermark:
+            return 0
+        cancelled = self._cancelled_sles(watermark)
+        if not cancelled:
+            return 0
+
+        replayed = 0
+        states = (
+            self.db.query(StockValuationState)
+            .filter(tuple_(StockValuationState.item_code, StockValuationState.warehouse).in_(list(cancelled)))
+            .all()
+        )
+        for state in states:
+            pair = (state.item_code, state.warehouse)
+            count, first_posting = cancelled[pair]
+            if state.cancelled_sle_count == count:
+                continue
+            book = self._replay(pair, first_posting.date() if first_posting else date.min, upto_id=watermark)
+            book.last_sle_id = max(book.last_sle_id, state.last_sle_id)
+            for key, value in book.to_columns().items():
+                setattr(state, key, value)
+            state.cancelled_sle_count = count
+            replayed += 1
+
+        if replayed:
+            self.db.commit()
+        return replayed
+
+    def _apply_batch(self, batch: List[StockLedgerEntry], watermark: int) -> None:
+        by_pair: Dict[Pair, List[StockLedgerEntry]] = {}
+        for sle in batch:
+            by_pair.setdefault((sle.item_code, sle.warehouse), []).append(sle)
+
+        states = {
+            (s.item_code, s.warehouse): s
+            for s in self.db.query(StockValuationState)
+            .filter(tuple_(StockValuationState.item_code, StockValuationState.warehouse).in_(list(by_pair)))
+            .all()
+        }
+
+        for pair, entries in by_pair.items():
+            entries.sort(key=_posting_key)
+            state = states.get(pair)
+            if state is None:
+                state = StockValuationState(item_code=pair[0], warehouse=pair[1])
+                self.db.add(state)
+                book = CostLayerBook()
+            else:
+                book = CostLayerBook.from_row(state)
+
+            first_posting = _posting_at(entries[0])
+            if book.last_posting_at and first_posting < book.last_posting_at:
+                # Back-dated entry: replay the pair from before it
+                book = self._replay(pair, first_posting.date(), upto_id=watermark)
+            else:
+                for sle in entries:
+                    book.apply(sle)
+            book.last_sle_id = max(book.last_sle_id, watermark)
+
+            for key, value in book.to_columns().items():
+                setattr(state, key, value)
+
+    def _replay(self, pair: Pair, from_date: date, upto_id: Optional[int] = None) -> CostLayerBook:
+        """Rebuild a pair's book from the last snapshot before ``from_date``.
+
+        Snapshots on or after ``from_date`` are stale and are deleted.
+        """
+        item_code, warehouse = pair
+        self.db.query(StockValuationSnapshot).filter(
+            StockValuationSnapshot.item_code == item_code,
+            StockValuationSnapshot.warehouse == warehouse,
+            StockValuationSnapshot.snapshot_date >= from_date,
+        ).delete(synchronize_session=False)
+
+        snapshot = (
+            self.db.query(StockValuationSnapshot)
+            .filter(
+                StockValuationSnapshot.item_code == item_code,
+                StockValuationSnapshot.warehouse == warehouse,
+                StockValuationSnapshot.snapshot_date < from_date,
+            )
+            .order_by(StockValuationSnapshot.snapshot_date.desc())
+            .first()
+        )
+        book = CostLayerBook.from_row(snapshot) if snapshot else CostLayerBook()
+
+        query = self._active_sles(*LEDGER_COLUMNS).filter(
+            StockLedgerEntry.item_code == item_code,
+            StockLedgerEntry.warehouse == warehouse,
+        )
+        if snapshot:
+            query = query.filter(StockLedgerEntry.posting_date >= _end_of_day(snapshot.snapshot_date))
+        if upto_id is not None:
+            query = query.filter(StockLedgerEntry.id <= upto_id)
+        for sle in sorted(query.all(), key=_posting_key):
+            book.apply(sle)
+        return book
+
+    def rebuild(self, item_code: Optional[str] = None, warehouse: Optional[str] = None) -> int:
+        """Recompute valuation state from the full ledger (e.g. after cancellations).
+
+        Returns:
+            Number of item/warehouse pairs rebuilt
+        """
+        # Bring the watermark up to date so the rebuilt rows can share it
+        self.sync()
+        watermark = self.watermark() or self.db.query(func.max(StockLedgerEntry.id)).scalar() or 0
+
+        query = self._active_sles().filter(StockLedgerEntry.id <= watermark)
+        state_query = self.db.query(StockValuationState)
+        snapshot_query = self.db.query(StockValuationSnapshot)
+        if item_code:
+            query = query.filter(StockLedgerEntry.item_code == item_code)
+            state_query = state_query.filter(StockValuationState.item_code == item_code)
+            snapshot_query = snapshot_query.filter(StockValuationSnapshot.item_code == item_code)
+        if warehouse:
+            query = query.filter(StockLedgerEntry.warehouse == warehouse)
+            state_query = state_query.filter(StockValuationState.warehouse == warehouse)
+            snapshot_query = snapshot_query.filter(StockValuationSnapshot.warehouse == warehouse)
+
+        books: Dict[Pair, CostLayerBook] = {}
+        ordered = query.order_by(
+            StockLedgerEntry.item_code,
+            StockLedgerEntry.warehouse,
+            StockLedgerEntry.posting_date,
+            StockLedgerEntry.id,
+        ).yield_per(SYNC_BATCH_SIZE)
+        pending: List[StockLedgerEntry] = []
+        for sle in ordered:
+            if pending and (pending[0].item_code, pending[0].warehouse) != (sle.item_code, sle.warehouse):
+                books[(pending[0].item_code, pending[0].warehouse)] = self._book_from(pending)
+                pending = []
+            pending.append(sle)
+        if pending:
+            books[(pending[0].item_code, pending[0].warehouse)] = self._book_from(pending)
+
+        snapshot_query.delete(synchronize_session=False)
+        state_query.delete(synchronize_session=False)
+        self._write_states(books, watermark, self._cancelled_sles(watermark))
+        self.db.commit()
+        logger.info("inventory_valuation_rebuilt", pairs=len(books), item_code=item_code, warehouse=warehouse)
+        return len(books)
+
+    @staticmethod
+    def _book_from(entries: Iterable[StockLedgerEntry]) -> CostLayerBook:
+        book = CostLayerBook()
+        for sle in sorted(entries, key=_posting_key):
+            book.apply(sle)
+        return book
+
+    def _write_states(
+        self,
+        books: Dict[Pair, CostLayerBook],
+        watermark: int,
+        cancelled: Dict[Pair, Tuple[int, Optional[datetime]]],
+    ) -> None:
+        rows = []
+        for (item_code, warehouse), book in books.items():
+            columns = book.to_columns()
+            columns["last_sle_id"] = watermark
+            columns["cancelled_sle_count"] = cancelled.get((item_code, warehouse), (0, None))[0]
+            rows.append({"item_code": item_code, "warehouse": warehouse, **columns})
+        if rows:
+            self.db.bulk_insert_mappings(StockValuationState, rows)
+
+    # -------------------------------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------------------------------
+
+    def snapshot(self, snapshot_date: Optional[date] = None) -> int:
+        """Store end-of-day books for pairs that changed since their last snapshot.
+
+        Args:
+            snapshot_date: Day to snapshot (default: yesterday)
+
+        Returns:
+            Number of snapshot rows written
+        """
+        snapshot_date = snapshot_date or (date.today() - timedelta(days=1))
+        books = self.books_as_of(snapshot_date)
+        latest = self._latest_snapshots(snapshot_date)
+
+        rows = []
+        for (item_code, warehouse), book in books.items():
+            previous = latest.get((item_code, warehouse))
+            if previous is not None and previous.last_sle_id == book.last_sle_id:
+                continue
+            rows.append({
+                "item_code": item_code,
+                "warehouse": warehouse,
+                "snapshot_date": snapshot_date,
+                **book.to_columns(),
+            })
+
+        if rows:
+            self.db.query(StockValuationSnapshot).filter(
+                StockValuationSnapshot.snapshot_date == snapshot_date,
+                tuple_(StockValuationSnapshot.item_code, StockValuationSnapshot.warehouse).in_(
+                    [(r["item_code"], r["warehouse"]) for r in rows]
+                ),
+            ).delete(synchronize_session=False)
+            self.db.bulk_insert_mappings(StockValuationSnapshot, rows)
+        self.db.commit()
+        logger.info("inventory_valuation_snapshot", snapshot_date=snapshot_date.isoformat(), rows=len(rows))
+        return len(rows)
+
+    def _latest_snapshots(
+        self, as_of: date, warehouse: Optional[str] = None
+    ) -> Dict[Pair, StockValuationSnapshot]:
+        """Latest snapshot on or before ``as_of`` for every pair that has one."""
+        latest = (
+            self.db.query(
+                StockValuationSnapshot.item_code,
+                StockValuationSnapshot.warehouse,
+                func.max(StockValuationSnapshot.snapshot_date).label("snapshot_date"),
+            )
+            .filter(StockValuationSnapshot.snapshot_date <= as_of)
+            .group_by(StockValuationSnapshot.item_code, StockValuationSnapshot.warehouse)
+        )
+        if warehouse:
+            latest = latest.filter(StockValuationSnapshot.warehouse == warehouse)
+        latest_sq = latest.subquery()
+        rows = self.db.query(StockValuationSnapshot).join(
+            latest_sq,
+            and_(
+                StockValuationSnapshot.item_code == latest_sq.c.item_code,
+                StockValuationSnapshot.warehouse == latest_sq.c.warehouse,
+                StockValuationSnapshot.snapshot_date == latest_sq.c.snapshot_date,
+            ),
+        ).all()
+        return {(s.item_code, s.warehouse): s for s in rows}
+
+    # -------------------------------------------------------------------------
+    # Valuation queries
+    # -------------------------------------------------------------------------
+
+    def books_as_of(
+        self,
+        as_of: date,
+        warehouse: Optional[str] = None,
+        pairs: Optional[Set[Pair]] = None,
+    ) -> Dict[Pair, CostLayerBook]:
+        """Layer books as of the end of ``as_of``.
+
+        Pairs whose state has nothing posted after ``as_of`` are read from
+        StockValuationState; the rest are rebuilt from their latest snapshot
+        and one query for the SLEs posted after it.
+        """
+        cutoff = _end_of_day(as_of)
+        state_query = self.db.query(StockValuationState)
+        if warehouse:
+            state_query = state_query.filter(StockValuationState.warehouse == warehouse)
+
+        books: Dict[Pair, CostLayerBook] = {}
+        stale: Set[Pair] = set()
+        for state in state_query.all():
+            pair = (state.item_code, state.warehouse)
+            if pairs is not None and pair not in pairs:
+                continue
+            if state.last_posting_at is None or state.last_posting_at < cutoff:
+                books[pair] = CostLayerBook.from_row(state)
+            else:
+                stale.add(pair)
+
+        if stale:
+            books.update(self._rebuild_as_of(as_of, stale, warehouse))
+        return books
+
+    def _rebuild_as_of(self, as_of: date, pairs: Set[Pair], warehouse: Optional[str]) -> Dict[Pair, CostLayerBook]:
+        snapshots = {p: s for p, s in self._latest_snapshots(as_of, warehouse).items() if p in pairs}
+        books = {pair: CostLayerBook.from_row(snapshots[pair]) if pair in snapshots else CostLayerBook() for pair in pairs}
+        starts = {pair: _end_of_day(s.snapshot_date) for pair, s in snapshots.items()}
+
+        # One clause per distinct start date (snapshots are daily, so these
+        # are few) plus one for the pairs without a snapshot
+        by_start: Dict[datetime, List[Pair]] = {}
+        for pair, start in starts.items():
+            by_start.setdefault(start, []).append(pair)
+        pair_key = tuple_(StockLedgerEntry.item_code, StockLedgerEntry.warehouse)
+        clauses = [
+            and_(pair_key.in_(members), StockLedgerEntry.posting_date >= start)
+            for start, members in by_start.items()
+        ]
+        unbounded = [pair for pair in pairs if pair not in starts]
+        if unbounded:
+            clauses.append(pair_key.in_(unbounded))
+
+        query = self._active_sles(*LEDGER_COLUMNS).filter(
+            StockLedgerEntry.posting_date < _end_of_day(as_of),
+            or_(*clauses),
+        )
+        if warehouse:
+            query = query.filter(StockLedgerEntry.warehouse == warehouse)
+
+        entries = query.all()
+        for sle in sorted(entries, key=_posting_key):
+            books[(sle.item_code, sle.warehouse)].apply(sle)
+        return books
+
+    def valuation_frame(
+        self,
+        as_of: date,
+        warehouse: Optional[str] = None,
+        item_group: Optional[str] = None,
+        item_code: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """One row per item/warehouse with quantity and FIFO/LIFO/moving-average values.
+
+        Only pairs whose item exists in the item master are returned.
+        """
+        query = self.db.query(
+            StockValuationState,
+            Item.item_name,
+            Item.item_group,
+            Item.stock_uom,
+            Item.standard_rate,
+        ).join(Item, Item.item_code == StockValuationState.item_code)
+        if warehouse:
+            query = query.filter(StockValuationState.warehouse == warehouse)
+        if item_group:
+            query = query.filter(Item.item_group == item_group)
+        if item_code:
+            query = query.filter(StockValuationState.item_code == item_code)
+
+        cutoff = _end_of_day(as_of)
+        records: Dict[Pair, Dict[str, Any]] = {}
+        books: Dict[Pair, CostLayerBook] = {}
+        stale: Set[Pair] = set()
+        for state, item_name, group, stock_uom, standard_rate in query.all():
+            pair = (state.item_code, state.warehouse)
+            records[pair] = {
+                "item_code": state.item_code,
+                "item_name": item_name,
+                "item_group": group,
+                "stock_uom": stock_uom,
+                "standard_rate": float(standard_rate or 0),
+                "warehouse": state.warehouse,
+            }
+            if state.last_posting_at is None or state.last_posting_at < cutoff:
+                books[pair] = CostLayerBook.from_row(state)
+            else:
+                stale.add(pair)
+
+        if stale:
+            books.update(self._rebuild_as_of(as_of, stale, warehouse))
+
+        rows = [
+            {
+                **records[pair],
+                "qty": float(book.qty),
+                "fifo_value": float(book.fifo_value),
+                "lifo_value": float(book.lifo_value),
+                "moving_average_rate": float(book.moving_average_rate),
+            }
+            for pair, book in books.items()
+            if book.last_posting_at is not None
+        ]
+        return pd.DataFrame(rows, columns=VALUATION_COLUMNS)
@@ -0,0 +1,157 @@
+"""Leave ledger and balance reconciliation.
+
+leave_balances and leave_ledger_entries are maintained incrementally by the
+leave allocation flush hook in app.models.hr_leave (and by the HR bulk
+service for its Core writes). This module checks them against the
+allocations themselves:
+- expected_leave_balances: per-period sums recomputed from allocations
+- reconcile_leave_balances: drift correction for both tables
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Tuple
+
+import structlog
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.models.hr_leave import (
+    ACTIVE_ALLOCATION_STATUSES,
+    LeaveAllocation,
+    LeaveBalance,
+    LeaveLedgerEntry,
+    LeaveLedgerEntryType,
+    LeavePeriod,
+)
+
+logger = structlog.get_logger()
+
+ZERO = Decimal("0")
+
+
+def _active_allocations(db: Session) -> Any:
+    return db.query(LeaveAllocation).filter(
+        LeaveAllocation.status.in_(ACTIVE_ALLOCATION_STATUSES),
+        LeaveAllocation.employee_id.isnot(None),
+        LeaveAllocation.leave_type_id.isnot(None),
+    )
+
+
+def expected_leave_balances(db: Session) -> Dict[LeavePeriod, Tuple[Decimal, Decimal]]:
+    """(balance, allocated) per period, summed from active allocations."""
+    rows = _active_allocations(db).with_entities(
+        LeaveAllocation.employee_id,
+        LeaveAllocation.leave_type_id,
+        LeaveAllocation.from_date,
+        LeaveAllocation.to_date,
+        func.coalesce(func.sum(LeaveAllocation.unused_leaves), 0),
+        func.coalesce(func.sum(LeaveAllocation.total_leaves_allocated), 0),
+    ).group_by(
+        LeaveAllocation.employee_id,
+        LeaveAllocation.leave_type_id,
+        LeaveAllocation.from_date,
+        LeaveAllocation.to_date,
+    )
+    return {
+        (employee_id, leave_type_id, from_date, to_date): (Decimal(balance), Decimal(allocated))
+        for employee_id, leave_type_id, from_date, to_date, balance, allocated in rows
+    }
+
+
+def _reconcile_ledger(db: Session, now: datetime) -> int:
+    """Post adjustment entries where an allocation's ledger differs from its unused leaves."""
+    active = _active_allocations(db).with_entities(
+        LeaveAllocation.id,
+        LeaveAllocation.employee_id,
+        LeaveAllocation.leave_type_id,
+        LeaveAllocation.from_date,
+        LeaveAllocation.to_date,
+        LeaveAllocation.unused_leaves,
+    )
+    expected: Dict[Tuple[int, LeavePeriod], Decimal] = {
+        (allocation_id, (employee_id, leave_type_id, from_date, to_date)): Decimal(unused or 0)
+        for allocation_id, employee_id, leave_type_id, from_date, to_date, unused in active
+    }
+    posted: Dict[Tuple[int, LeavePeriod], Decimal] = {
+        (allocation_id, (employee_id, leave_type_id, from_date, to_date)): Decimal(days)
+        for allocation_id, employee_id, leave_type_id, from_date, to_date, days in db.query(
+            LeaveLedgerEntry.allocation_id,
+            LeaveLedgerEntry.employee_id,
+            LeaveLedgerEntry.leave_type_id,
+            LeaveLedgerEntry.from_date,
+            LeaveLedgerEntry.to_date,
+            func.sum(LeaveLedgerEntry.days),
+        ).group_by(
+            LeaveLedgerEntry.allocation_id,
+            LeaveLedgerEntry.employee_id,
+            LeaveLedgerEntry.leave_type_id,
+            LeaveLedgerEntry.from_date,
+            LeaveLedgerEntry.to_date,
+        )
+    }
+
+    entries = []
+    for allocation_id, period in sorted(set(expected) | set(posted)):
+        difference = expected.get((allocation_id, period), ZERO) - posted.get((allocation_id, period), ZERO)
+        if difference:
+            entries.append({
+                "allocation_id": allocation_id,
+                "employee_id": period[0],
+                "leave_type_id": period[1],
+                "from_date": period[2],
+                "to_date": period[3],
+                "entry_type": LeaveLedgerEntryType.ADJUSTMENT,
+                "days": difference,
+                "created_at": now,
+            })
+    if entries:
+        db.execute(insert(LeaveLedgerEntry), entries)
+    return len(entries)
+
+
+def reconcile_leave_balances(db: Session) -> Dict[str, Any]:
+    """Correct leave balances and ledger entries that drifted from the allocations.
+
+    Covers writes that bypass the ORM (raw SQL, syncs using Core statements)
+    and the initial backfill. Only differing rows are written.
+    """
+    now = datetime.utcnow()
+    expected = expected_leave_balances(db)
+    stored = {
+        (row.employee_id, row.leave_type_id, row.from_date, row.to_date): row
+        for row in db.query(LeaveBalance)
+    }
+
+    updated = inserted = 0
+    for period in sorted(set(expected) | set(stored)):
+        balance, allocated = expected.get(period, (ZERO, ZERO))
+        row = stored.get(period)
+        if row is None:
+            db.add(LeaveBalance(
+                employee_id=period[0], leave_type_id=period[1], from_date=period[2], to_date=period[3],
+                balance=balance, allocated=allocated, updated_at=now,
+            ))
+            inserted += 1
+        elif Decimal(row.balance or 0) != balance or Decimal(row.allocated or 0) != allocated:
+            row.balance, row.allocated, row.updated_at = balance, allocated, now
+            updated += 1
+
+    adjustments = _reconcile_ledger(db, now)
+    db.commit()
+
+    if updated or inserted or adjustments:
+        logger.warning(
+            "leave_ledger_drift_corrected",
+            balances_updated=updated,
+            balances_inserted=inserted,
+            ledger_adjustments=adjustments,
+        )
+
+    return {
+        "periods": len(expected),
+        "balances_updated": updated,
+        "balances_inserted": inserted,
+        "ledger_adjustments": adjustments,
+    }
@@ -3,15 +3,24 @@ Metrics Computation Service - Core engine for computing KPI values and scores
 
 Queries data from various sources (ticketing, field service, etc.) and computes
 KPI values, scores, and weighted totals for employee scorecards.
+
+Two modes:
+- compute_scorecard: one scorecard, one employee, queries per KPI
+- compute_period: every pending scorecard in a period; definitions are loaded
+  once and each KPI is evaluated for all employees with one grouped query
+  (GROUP BY the employee column), then scored in memory
 """
 import logging
+from collections import defaultdict
 from datetime import date, datetime
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable, NamedTuple, Sequence
 
-from sqlalchemy import func, and_, or_, false
+from sqlalchemy import func, and_, or_, false, case, select
 from sqlalchemy.orm import Session
 
+from app.config import settings
+
 from app.models.performance import (
     KPIDefinition,
     KPIDataSource,
@@ -34,9 +43,22 @@ from app.models.crm import Opportunity, Activity, OpportunityStatus, ActivitySta
 from app.models.project import Project, ProjectStatus
 from app.models.task import Task, TaskStatus
 from app.models.employee import Employee
+from app.utils.iteration import chunked
 
 logger = logging.getLogger(__name__)
 
+_OPPORTUNITY_STATUSES = {s.value: s for s in OpportunityStatus}
+_ACTIVITY_STATUSES = {s.value: s for s in ActivityStatus}
+_PROJECT_STATUSES = {s.value: s for s in ProjectStatus}
+_TASK_STATUSES = {s.value: s for s in TaskStatus if s != TaskStatus.TEMPLATE}
+
+
+class ScorecardDefinitions(NamedTuple):
+    """KRA/KPI definitions needed to score templates, keyed by id."""
+    kras: Dict[int, KRADefinition]
+    kpi_maps: Dict[int, List[KRAKPIMap]]  # kra_id -> mappings in id order
+    kpis: Dict[int, KPIDefinition]
+
 
 class MetricsComputationService:
     """Service for computing KPI metrics and scores."""
@@ -75,44 +97,90 @@ class MetricsComputationService:
 
         template_items = self.db.query(ScorecardTemplateItem).filter(
             ScorecardTemplateItem.template_id == template.id
-        ).all()
+        ).order_by(ScorecardTemplateItem.id).all()
+        definitions = self._load_definitions(item.kra_id for item in template_items)
 
         # Clear existing results
         self.db.query(KPIResult).filter(KPIResult.scorecard_instance_id == scorecard_id).delete()
         self.db.query(KRAResult).filter(KRAResult.scorecard_instance_id == scorecard_id).delete()
 
+        employee_id = scorecard.employee_id
+        result = self._score_scorecard(
+            scorecard,
+            template_items,
+            definitions,
+            raw_value=lambda kpi: self._compute_kpi_value(kpi, employee_id, period.start_date, period.end_date),
+            target_value=lambda kpi: self._get_target_value(kpi, employee_id, period.start_date, period.end_date),
+        )
+
+        self.db.commit()
+
+        return {"success": True, "scorecard_id": scorecard_id, **result}
+
+    def _load_definitions(self, kra_ids: Iterable[int]) -> ScorecardDefinitions:
+        """Load KRAs, their KPI mappings and KPI definitions in three queries."""
+        kra_ids = set(kra_ids)
+        if not kra_ids:
+            return ScorecardDefinitions({}, {}, {})
+
+        kras = {
+            kra.id: kra
+            for kra in self.db.query(KRADefinition).filter(KRADefinition.id.in_(kra_ids))
+        }
+        kpi_maps: Dict[int, List[KRAKPIMap]] = defaultdict(list)
+        for kpi_map in self.db.query(KRAKPIMap).filter(
+            KRAKPIMap.kra_id.in_(kra_ids)
+        ).order_by(KRAKPIMap.id):
+            kpi_maps[kpi_map.kra_id].append(kpi_map)
+
+        kpi_ids = {m.kpi_id for maps in kpi_maps.values() for m in maps}
+        kpis = {}
+        if kpi_ids:
+            kpis = {
+                kpi.id: kpi
+                for kpi in self.db.query(KPIDefinition).filter(KPIDefinition.id.in_(kpi_ids))
+            }
+        return ScorecardDefinitions(kras, dict(kpi_maps), kpis)
+
+    def _score_scorecard(
+        self,
+        scorecard: EmployeeScorecardInstance,
+        template_items: List[ScorecardTemplateItem],
+        definitions: ScorecardDefinitions,
+        raw_value: Callable[[KPIDefinition], Optional[Decimal]],
+        target_value: Callable[[KPIDefinition], Optional[Decimal]],
+    ) -> Dict[str, Any]:
+        """
+        Score a scorecard from its template and add KPI/KRA results to the session.
+
+        raw_value and target_value supply the KPI values for the scorecard's
+        employee. Existing results must already be cleared; the caller commits.
+        """
         kra_scores = {}
         errors = []
 
         for item in template_items:
-            kra = self.db.query(KRADefinition).filter(KRADefinition.id == item.kra_id).first()
+            kra = definitions.kras.get(item.kra_id)
             if not kra:
                 continue
 
-            # Get KPIs linked to this KRA
-            kpi_mappings = self.db.query(KRAKPIMap).filter(KRAKPIMap.kra_id == kra.id).all()
-
             kpi_weighted_total = Decimal("0")
             kpi_weight_sum = Decimal("0")
 
-            for kpi_map in kpi_mappings:
-                kpi = self.db.query(KPIDefinition).filter(KPIDefinition.id == kpi_map.kpi_id).first()
+            for kpi_map in definitions.kpi_maps.get(kra.id, []):
+                kpi = definitions.kpis.get(kpi_map.kpi_id)
                 if not kpi:
                     continue
 
                 try:
                     # Compute raw value
-                    raw_value = self._compute_kpi_value(
-                        kpi, scorecard.employee_id, period.start_date, period.end_date
-                    )
+                    raw = raw_value(kpi)
 
                     # Get target value (check for binding override)
-                    target_value = self._get_target_value(
-                        kpi, scorecard.employee_id, period.start_date, period.end_date
-                    )
+                    target = target_value(kpi)
 
                     # Compute score
-                    computed_score = self._compute_score(kpi, raw_value, target_value)
+                    computed_score = self._compute_score(kpi, raw, target)
 
                     # Get weightage in KRA
                     weightage = float(kpi_map.weightage or 0)
@@ -122,11 +190,11 @@ class MetricsComputationService:
 
                     # Store KPI result
                     kpi_result = KPIResult(
-                        scorecard_instance_id=scorecard_id,
+                        scorecard_instance_id=scorecard.id,
                         kpi_id=kpi.id,
                         kra_id=kra.id,
-                        raw_value=raw_value,
-                        target_value=target_value,
+                        raw_value=raw,
+                        target_value=target,
                         computed_score=computed_score,
                         final_score=computed_score,  # Same initially, can be overridden
                         weightage_in_kra=Decimal(str(weightage)),
@@ -149,7 +217,7 @@ class MetricsComputationService:
 
             # Store KRA result
             kra_result = KRAResult(
-                scorecard_instance_id=scorecard_id,
+                scorecard_instance_id=scorecard.id,
                 kra_id=kra.id,
                 computed_score=kra_score,
                 final_score=kra_score,
@@ -172,11 +240,7 @@ class MetricsComputationService:
         scorecard.final_rating = final_rating
         scorecard.status = ScorecardInstanceStatus.COMPUTED
 
-        self.db.commit()
-
         return {
-            "success": True,
-            "scorecard_id": scorecard_id,
             "total_score": total_weighted_score,
             "rating": final_rating,
             "kra_count": len(kra_scores),
@@ -861,9 +925,14 @@ class MetricsComputationService:
         else:
             return "Below Expectations"
 
-    def compute_period(self, period_id: int) -> Dict[str, Any]:
+    def compute_period(self, period_id: int, batched: bool = True) -> Dict[str, Any]:
         """
         Compute all scorecards for a period.
+
+        By default scorecards are computed in chunks of
+        settings.scorecard_batch_size: definitions are loaded once and each
+        KPI is queried once per chunk for all its employees. With
+        batched=False every scorecard goes through compute_scorecard.
         """
         period = self.db.query(EvaluationPeriod).filter(EvaluationPeriod.id == period_id).first()
         if not period:
@@ -877,7 +946,7 @@ class MetricsComputationService:
                 'pending',
                 'computing'
             ])
-        ).all()
+        ).order_by(EmployeeScorecardInstance.id).all()
 
         results: Dict[str, Any] = {
             "total": len(scorecards),
@@ -886,6 +955,10 @@ class MetricsComputationService:
             "errors": [],
         }
 
+        if batched:
+            self._compute_period_batched(period, [s.id for s in scorecards], results)
+            return results
+
         for scorecard in scorecards:
             try:
                 result = self.compute_scorecard(scorecard.id)
@@ -906,3 +979,639 @@ class MetricsComputationService:
                 })
 
         return results
+
+    # =========================================================================
+    # PERIOD BATCH COMPUTATION
+    # =========================================================================
+
+    def _compute_period_batched(
+        self,
+        period: EvaluationPeriod,
+        scorecard_ids: List[int],
+        results: Dict[str, Any],
+    ) -> None:
+        """Compute a period's scorecards chunk by chunk, committing each chunk."""
+        start_date, end_date = period.start_date, period.end_date
+
+        for chunk_ids in chunked(scorecard_ids, settings.scorecard_batch_size):
+            try:
+                missing_template = self._compute_scorecard_chunk(chunk_ids, start_date, end_date)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"Error computing scorecards {chunk_ids[0]}-{chunk_ids[-1]}: {e}")
+                results["failed"] += len(chunk_ids)
+                results["errors"].extend({"scorecard_id": sid, "error": str(e)} for sid in chunk_ids)
+                continue
+
+            results["computed"] += len(chunk_ids) - len(missing_template)
+            results["failed"] += len(missing_template)
+            results["errors"].extend(
+                {"scorecard_id": sid, "error": "Template not found"} for sid in missing_template
+            )
+
+    def _compute_scorecard_chunk(
+        self,
+        scorecard_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+    ) -> List[int]:
+        """
+        Score a chunk of scorecards from one grouped query per KPI.
+
+        Scorecards and definitions are (re)loaded per chunk so that objects
+        expired by the previous chunk's commit are refreshed in bulk. Returns
+        the ids of scorecards whose template does not exist.
+        """
+        scorecards = self.db.query(EmployeeScorecardInstance).filter(
+            EmployeeScorecardInstance.id.in_(scorecard_ids)
+        ).order_by(EmployeeScorecardInstance.id).all()
+
+        templates = set(self.db.scalars(
+            select(ScorecardTemplate.id).where(
+                ScorecardTemplate.id.in_({s.template_id for s in scorecards})
+            )
+        ))
+        template_items: Dict[int, List[ScorecardTemplateItem]] = defaultdict(list)
+        if templates:
+            for item in self.db.query(ScorecardTemplateItem).filter(
+                ScorecardTemplateItem.template_id.in_(templates)
+            ).order_by(ScorecardTemplateItem.id):
+                template_items[item.template_id].append(item)
+        definitions = self._load_definitions(
+            item.kra_id for items in template_items.values() for item in items
+        )
+
+        missing_template = [s.id for s in scorecards if s.template_id not in templates]
+        scorecards = [s for s in scorecards if s.template_id in templates]
+        if not scorecards:
+            return missing_template
+
+        employees_by_kpi: Dict[int, set] = defaultdict(set)
+        for scorecard in scorecards:
+            for item in template_items[scorecard.template_id]:
+                if item.kra_id not in definitions.kras:
+                    continue
+                for kpi_map in definitions.kpi_maps.get(item.kra_id, []):
+                    if kpi_map.kpi_id in definitions.kpis:
+                        employees_by_kpi[kpi_map.kpi_id].add(scorecard.employee_id)
+
+        # A failed KPI query is reported on each scorecard that uses the KPI,
+        # as compute_scorecard does for a failed single-employee query
+        raw_values: Dict[int, Any] = {}
+        for kpi_id, employee_ids in employees_by_kpi.items():
+            try:
+                raw_values[kpi_id] = self._compute_kpi_values(
+                    definitions.kpis[kpi_id], sorted(employee_ids), start_date, end_date
+                )
+            except Exception as e:
+                raw_values[kpi_id] = e
+
+        overrides = self._get_target_overrides(
+            employees_by_kpi, {s.employee_id for s in scorecards}, start_date, end_date
+        )
+
+        computed_ids = [s.id for s in scorecards]
+        self.db.query(KPIResult).filter(
+            KPIResult.scorecard_instance_id.in_(computed_ids)
+        ).delete(synchronize_session=False)
+        self.db.query(KRAResult).filter(
+            KRAResult.scorecard_instance_id.in_(computed_ids)
+        ).delete(synchronize_session=False)
+
+        for scorecard in scorecards:
+            employee_id = scorecard.employee_id
+
+            def raw_value(kpi: KPIDefinition, employee_id: int = employee_id) -> Optional[Decimal]:
+                values = raw_values[kpi.id]
+                if isinstance(values, Exception):
+                    raise values
+                return values.get(employee_id)
+
+            def target_value(kpi: KPIDefinition, employee_id: int = employee_id) -> Optional[Decimal]:
+                return overrides.get((kpi.id, employee_id)) or kpi.target_value
+
+            self._score_scorecard(
+                scorecard, template_items[scorecard.template_id], definitions, raw_value, target_value
+            )
+
+        return missing_template
+
+    def _get_target_overrides(
+        self,
+        kpi_ids: Iterable[int],
+        employee_ids: Iterable[int],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[Tuple[int, int], Optional[Decimal]]:
+        """
+        Binding target overrides keyed by (kpi_id, employee_id).
+
+        Batched counterpart of _get_target_value: the first matching binding
+        (lowest id) decides, and a missing or zero override falls back to the
+        KPI default.
+        """
+        kpi_ids, employee_ids = list(kpi_ids), list(employee_ids)
+        if not kpi_ids or not employee_ids:
+            return {}
+
+        bindings = self.db.query(
+            KPIBinding.kpi_id, KPIBinding.employee_id, KPIBinding.target_override
+        ).filter(
+            KPIBinding.kpi_id.in_(kpi_ids),
+            KPIBinding.employee_id.in_(employee_ids),
+            or_(
+                KPIBinding.effective_from.is_(None),
+                KPIBinding.effective_from <= start_date
+            ),
+            or_(
+                KPIBinding.effective_to.is_(None),
+                KPIBinding.effective_to >= end_date
+            )
+        ).order_by(KPIBinding.id)
+
+        overrides: Dict[Tuple[int, int], Optional[Decimal]] = {}
+        for kpi_id, employee_id, target_override in bindings:
+            overrides.setdefault((kpi_id, employee_id), target_override)
+        return overrides
+
+    def _compute_kpi_values(
+        self,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """
+        Compute raw KPI values for many employees at once.
+
+        Batched counterpart of _compute_kpi_value; employees missing from the
+        result have no value (None).
+        """
+        if kpi.data_source == KPIDataSource.MANUAL:
+            return {}
+
+        elif kpi.data_source == KPIDataSource.TICKETING:
+            return self._group_ticketing_kpi(kpi, employee_ids, start_date, end_date)
+
+        elif kpi.data_source == KPIDataSource.FIELD_SERVICE:
+            return self._group_field_service_kpi(kpi, employee_ids, start_date, end_date)
+
+        elif kpi.data_source == KPIDataSource.CRM:
+            return self._group_crm_kpi(kpi, employee_ids, start_date, end_date)
+
+        elif kpi.data_source == KPIDataSource.PROJECT:
+            return self._group_project_kpi(kpi, employee_ids, start_date, end_date)
+
+        else:
+            logger.warning(f"Unsupported data source: {kpi.data_source}")
+            return {}
+
+    def _aggregate_by_employee(
+        self,
+        kpi: KPIDefinition,
+        owner: Any,
+        owners: Dict[Any, List[int]],
+        filters: List[Any],
+        column: Any = None,
+        numerator: Sequence[Any] = (),
+        denominator: Sequence[Any] = (),
+    ) -> Dict[int, Optional[Decimal]]:
+        """
+        Evaluate a COUNT, SUM, AVG or PERCENT KPI grouped by an owner column.
+
+        owners maps owner column values to employee ids. PERCENT counts rows
+        matching numerator/denominator conditions in the same query. Employees
+        without rows get the value an empty single-employee query returns.
+        When owner is None the KPI has no employee filter and every employee
+        gets the same ungrouped value.
+        """
+        aggregation = kpi.aggregation
+        if aggregation == KPIAggregation.COUNT:
+            measures = [func.count()]
+            empty: List[Any] = [0]
+        elif aggregation in (KPIAggregation.SUM, KPIAggregation.AVG) and column is not None:
+            measures = [func.sum(column) if aggregation == KPIAggregation.SUM else func.avg(column)]
+            empty = [None]
+        elif aggregation == KPIAggregation.PERCENT:
+            measures = [_count_where(denominator), _count_where(numerator)]
+            empty = [0, 0]
+        else:
+            return {}
+
+        def to_value(row: Sequence[Any]) -> Decimal:
+            if aggregation == KPIAggregation.COUNT:
+                return Decimal(str(row[0]))
+            if aggregation == KPIAggregation.PERCENT:
+                denominator_count, numerator_count = row
+                if denominator_count == 0:
+                    return Decimal("0")
+                return Decimal(str((numerator_count / denominator_count) * 100)).quantize(Decimal("0.01"))
+            return Decimal(str(row[0] or 0)).quantize(Decimal("0.01"))
+
+        employee_ids = [employee_id for ids in owners.values() for employee_id in ids]
+        if owner is None:
+            value = to_value(self.db.query(*measures).filter(*filters).one())
+            return {employee_id: value for employee_id in employee_ids}
+
+        values: Dict[int, Optional[Decimal]] = {}
+        if owners:
+            rows = self.db.query(owner, *measures).filter(
+                *filters, owner.in_(list(owners))
+            ).group_by(owner)
+            for key, *row in rows:
+                for employee_id in owners.get(key, ()):
+                    values[employee_id] = to_value(row)
+
+        default = to_value(empty)
+        for employee_id in employee_ids:
+            values.setdefault(employee_id, default)
+        return values
+
+    def _rows_by_employee(
+        self,
+        owner: Any,
+        owners: Dict[Any, List[int]],
+        filters: List[Any],
+        columns: List[Any],
+        order_by: Any,
+    ) -> Dict[int, List[Any]]:
+        """Load rows for KPIs aggregated in Python, grouped by employee."""
+        employee_ids = [employee_id for ids in owners.values() for employee_id in ids]
+        grouped: Dict[int, List[Any]] = {employee_id: [] for employee_id in employee_ids}
+        if not owners:
+            return grouped
+
+        if owner is None:
+            rows = self.db.query(*columns).filter(*filters).order_by(order_by).all()
+            return {employee_id: rows for employee_id in employee_ids}
+
+        for key, *row in self.db.query(owner, *columns).filter(
+            *filters, owner.in_(list(owners))
+        ).order_by(order_by):
+            for employee_id in owners.get(key, ()):
+                grouped[employee_id].append(row)
+        return grouped
+
+    def _group_ticketing_kpi(
+        self,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_ticketing_kpi."""
+        config = kpi.query_config or {}
+
+        filters = [
+            Ticket.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Ticket.created_at <= datetime.combine(end_date, datetime.max.time()),
+        ]
+        if config.get('filter', {}).get('status'):
+            filters.append(Ticket.status == config['filter']['status'])
+
+        numerator: List[Any] = []
+        denominator: List[Any] = []
+        if config.get('denominator', {}).get('status'):
+            denominator.append(Ticket.status == config['denominator']['status'])
+
+        numerator_filter = config.get('numerator', {})
+        if numerator_filter.get('sla_met'):
+            sla_met_column = getattr(Ticket, "sla_met", None)
+            if sla_met_column is not None:
+                numerator.append(sla_met_column.is_(True))
+            else:
+                numerator.append(and_(
+                    Ticket.resolution_by.isnot(None),
+                    Ticket.resolution_date.isnot(None),
+                    Ticket.resolution_date <= Ticket.resolution_by,
+                ))
+        if numerator_filter.get('reopened'):
+            reopened_column = getattr(Ticket, "reopened", None)
+            if reopened_column is not None:
+                numerator.append(reopened_column.is_(True))
+            else:
+                reopened_status = getattr(TicketStatus, "REOPENED", None)
+                numerator.append(Ticket.status == reopened_status if reopened_status is not None else false())
+
+        column = None
+        field = config.get('field')
+        if kpi.aggregation == KPIAggregation.AVG and field and hasattr(Ticket, field):
+            column = getattr(Ticket, field)
+
+        return self._aggregate_by_employee(
+            kpi, Ticket.assigned_employee_id, _employee_owners(employee_ids),
+            filters, column, numerator, denominator,
+        )
+
+    def _group_field_service_kpi(
+        self,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_field_service_kpi."""
+        config = kpi.query_config or {}
+
+        filters = [
+            ServiceOrder.created_at >= datetime.combine(start_date, datetime.min.time()),
+            ServiceOrder.created_at <= datetime.combine(end_date, datetime.max.time()),
+        ]
+        if config.get('filter', {}).get('status'):
+            filters.append(ServiceOrder.status == config['filter']['status'])
+        if config.get('filter', {}).get('order_type'):
+            filters.append(ServiceOrder.order_type == config['filter']['order_type'])
+
+        numerator: List[Any] = []
+        denominator: List[Any] = []
+        if config.get('denominator', {}).get('status'):
+            denominator.append(ServiceOrder.status == config['denominator']['status'])
+
+        numerator_filter = config.get('numerator', {})
+        if numerator_filter.get('status'):
+            numerator.append(ServiceOrder.status == numerator_filter['status'])
+        if numerator_filter.get('first_time_fix'):
+            first_time_fix_column = getattr(ServiceOrder, "first_time_fix", None)
+            if first_time_fix_column is not None:
+                numerator.append(first_time_fix_column.is_(True))
+            else:
+                numerator.append(ServiceOrder.status == ServiceOrderStatus.COMPLETED)
+        if numerator_filter.get('arrived_on_time'):
+            arrived_on_time_column = getattr(ServiceOrder, "arrived_on_time", None)
+            numerator.append(arrived_on_time_column.is_(True) if arrived_on_time_column is not None else false())
+
+        column = None
+        field = config.get('field')
+        if kpi.aggregation == KPIAggregation.AVG and field and hasattr(ServiceOrder, field):
+            column = getattr(ServiceOrder, field)
+
+        return self._aggregate_by_employee(
+            kpi, ServiceOrder.assigned_technician_id, _employee_owners(employee_ids),
+            filters, column, numerator, denominator,
+        )
+
+    def _group_crm_kpi(
+        self,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_crm_kpi."""
+        config = kpi.query_config or {}
+        table = config.get('table', 'opportunities')
+        employee_field = config.get('employee_field', 'owner_id')
+        owners = _employee_owners(employee_ids)
+
+        if table == 'opportunities':
+            return self._group_opportunity_kpi(config, kpi, owners, employee_field, start_date, end_date)
+        elif table == 'activities':
+            return self._group_activity_kpi(config, kpi, owners, employee_field, start_date, end_date)
+
+        return {}
+
+    def _group_opportunity_kpi(
+        self,
+        config: dict,
+        kpi: KPIDefinition,
+        owners: Dict[Any, List[int]],
+        employee_field: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_opportunity_kpi."""
+        filters = [
+            Opportunity.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Opportunity.created_at <= datetime.combine(end_date, datetime.max.time()),
+        ]
+        owner = {
+            'owner_id': Opportunity.owner_id,
+            'sales_person_id': Opportunity.sales_person_id,
+        }.get(employee_field)
+
+        filter_config = config.get('filter', {})
+        if filter_config.get('status'):
+            status = _OPPORTUNITY_STATUSES.get(filter_config['status'].lower())
+            if status:
+                filters.append(Opportunity.status == status)
+
+        numerator: List[Any] = []
+        denominator: List[Any] = []
+        status_in = [
+            _OPPORTUNITY_STATUSES.get(s.lower())
+            for s in config.get('denominator', {}).get('status_in') or []
+        ]
+        status_in = [s for s in status_in if s]
+        if status_in:
+            denominator.append(Opportunity.status.in_(status_in))
+        numerator_status = config.get('numerator', {}).get('status')
+        if numerator_status:
+            status = _OPPORTUNITY_STATUSES.get(numerator_status.lower())
+            if status:
+                numerator.append(Opportunity.status == status)
+        if status_in:
+            numerator.append(Opportunity.status.in_(status_in))
+
+        column = None
+        if kpi.aggregation in (KPIAggregation.SUM, KPIAggregation.AVG):
+            field = config.get('field', 'deal_value')
+            if kpi.aggregation == KPIAggregation.AVG and field == 'sales_cycle_days':
+                # Average days from created_at to actual_close_date
+                closed = self._rows_by_employee(
+                    owner, owners, filters + [Opportunity.actual_close_date.isnot(None)],
+                    [Opportunity.created_at, Opportunity.actual_close_date], Opportunity.id,
+                )
+                values: Dict[int, Optional[Decimal]] = {}
+                for employee_id, rows in closed.items():
+                    if not rows:
+                        values[employee_id] = Decimal("0")
+                        continue
+                    total_days = sum((closed_on - created_at.date()).days for created_at, closed_on in rows)
+                    values[employee_id] = Decimal(str(total_days / len(rows))).quantize(Decimal("0.01"))
+                return values
+            if hasattr(Opportunity, field):
+                column = getattr(Opportunity, field)
+
+        return self._aggregate_by_employee(kpi, owner, owners, filters, column, numerator, denominator)
+
+    def _group_activity_kpi(
+        self,
+        config: dict,
+        kpi: KPIDefinition,
+        owners: Dict[Any, List[int]],
+        employee_field: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_activity_kpi."""
+        if kpi.aggregation not in (KPIAggregation.COUNT, KPIAggregation.AVG):
+            return {}
+
+        filters = [
+            Activity.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Activity.created_at <= datetime.combine(end_date, datetime.max.time()),
+        ]
+        owner = {
+            'assigned_to_id': Activity.assigned_to_id,
+            'owner_id': Activity.owner_id,
+        }.get(employee_field)
+
+        filter_config = config.get('filter', {})
+        if filter_config.get('status'):
+            status = _ACTIVITY_STATUSES.get(filter_config['status'].lower())
+            if status:
+                filters.append(Activity.status == status)
+
+        column = None
+        field = config.get('field', 'duration_minutes')
+        if kpi.aggregation == KPIAggregation.AVG and hasattr(Activity, field):
+            column = getattr(Activity, field)
+
+        return self._aggregate_by_employee(kpi, owner, owners, filters, column)
+
+    def _group_project_kpi(
+        self,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_project_kpi."""
+        config = kpi.query_config or {}
+        table = config.get('table', 'projects')
+        employee_field = config.get('employee_field', 'project_manager_id')
+
+        if table == 'projects':
+            return self._group_project_table_kpi(config, kpi, employee_ids, employee_field, start_date, end_date)
+        elif table == 'tasks':
+            return self._group_task_kpi(config, kpi, employee_ids, employee_field, start_date, end_date)
+
+        return {}
+
+    def _group_project_table_kpi(
+        self,
+        config: dict,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        employee_field: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_project_table_kpi."""
+        filters = [
+            Project.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Project.created_at <= datetime.combine(end_date, datetime.max.time()),
+            Project.is_deleted == False,
+        ]
+        owner = Project.project_manager_id if employee_field == 'project_manager_id' else None
+
+        filter_config = config.get('filter', {})
+        if filter_config.get('status'):
+            status = _PROJECT_STATUSES.get(filter_config['status'].lower())
+            if status:
+                filters.append(Project.status == status)
+
+        numerator: List[Any] = []
+        numerator_filter = config.get('numerator', {})
+        if numerator_filter.get('on_time'):
+            numerator.extend([
+                Project.actual_end_date.isnot(None),
+                Project.expected_end_date.isnot(None),
+                Project.actual_end_date <= Project.expected_end_date,
+            ])
+        if numerator_filter.get('within_budget'):
+            numerator.append(Project.total_costing_amount <= Project.estimated_costing)
+
+        column = None
+        field = config.get('field')
+        if kpi.aggregation == KPIAggregation.AVG and field and hasattr(Project, field):
+            column = getattr(Project, field)
+
+        return self._aggregate_by_employee(
+            kpi, owner, _employee_owners(employee_ids), filters, column, numerator
+        )
+
+    def _group_task_kpi(
+        self,
+        config: dict,
+        kpi: KPIDefinition,
+        employee_ids: Sequence[int],
+        employee_field: str,
+        start_date: date,
+        end_date: date,
+    ) -> Dict[int, Optional[Decimal]]:
+        """Batched counterpart of _query_task_kpi."""
+        filters = [
+            Task.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Task.created_at <= datetime.combine(end_date, datetime.max.time()),
+        ]
+
+        values: Dict[int, Optional[Decimal]] = {}
+        owner = None
+        owners = _employee_owners(employee_ids)
+        if employee_field == 'assigned_to':
+            # Tasks store the assignee as a string; match on employee email.
+            # Employees without an email have no tasks.
+            owner = Task.assigned_to
+            owners = defaultdict(list)
+            emails = dict(
+                self.db.query(Employee.id, Employee.email).filter(Employee.id.in_(employee_ids)).all()
+            )
+            for employee_id in employee_ids:
+                if emails.get(employee_id):
+                    owners[emails[employee_id]].append(employee_id)
+                else:
+                    values[employee_id] = Decimal("0")
+            owners = dict(owners)
+            if not owners:
+                return values
+
+        filter_config = config.get('filter', {})
+        if filter_config.get('status'):
+            status = _TASK_STATUSES.get(filter_config['status'].lower())
+            if status:
+                filters.append(Task.status == status)
+
+        numerator: List[Any] = []
+        if config.get('numerator', {}).get('on_time'):
+            numerator.append(or_(
+                and_(Task.completed_on.isnot(None), Task.exp_end_date.isnot(None),
+                     Task.completed_on <= Task.exp_end_date),
+                and_(Task.act_end_date.isnot(None), Task.exp_end_date.isnot(None),
+                     Task.act_end_date <= Task.exp_end_date)
+            ))
+
+        column = None
+        field = config.get('field')
+        if kpi.aggregation == KPIAggregation.AVG and field == 'time_variance_percent':
+            timed = self._rows_by_employee(
+                owner, owners, filters + [Task.expected_time > 0],
+                [Task.actual_time, Task.expected_time], Task.id,
+            )
+            for employee_id, rows in timed.items():
+                if not rows:
+                    values[employee_id] = Decimal("0")
+                    continue
+                total_variance = sum(
+                    abs(float(actual - expected) / float(expected) * 100) for actual, expected in rows
+                )
+                values[employee_id] = Decimal(str(total_variance / len(rows))).quantize(Decimal("0.01"))
+            return values
+        if kpi.aggregation == KPIAggregation.AVG and field and hasattr(Task, field):
+            column = getattr(Task, field)
+
+        values.update(self._aggregate_by_employee(kpi, owner, owners, filters, column, numerator))
+        return values
+
+
+def _employee_owners(employee_ids: Iterable[int]) -> Dict[int, List[int]]:
+    """Owner mapping for KPIs whose owner column holds the employee id."""
+    return {employee_id: [employee_id] for employee_id in employee_ids}
+
+
+def _count_where(conditions: Sequence[Any]) -> Any:
+    """COUNT of rows matching all conditions (all rows when there are none)."""
+    if not conditions:
+        return func.count()
+    return func.count(case((and_(*conditions), 1)))
@@ -16,7 +16,7 @@ import uuid
 
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.tax_ng import (
     TaxSettings,
@@ -35,6 +35,12 @@ from app.models.tax_ng import (
     TaxJurisdiction,
     NigerianTaxType,
 )
+from app.services.einvoice_batch_service import (
+    check_ubl_context,
+    render_ubl,
+    ubl_context,
+    ubl_document,
+)
 from app.api.tax.helpers import (
     VAT_RATE,
     calculate_vat,
@@ -954,45 +960,22 @@ class NigerianTaxService:
 
         raise ValueError("Unable to generate a unique e-invoice number")
 
-    def validate_einvoice(self, einvoice_id: int) -> Dict:
-        """Validate e-invoice against BIS 3.0 requirements."""
-        einvoice = self.db.query(EInvoice).filter(EInvoice.id == einvoice_id).first()
+    def _get_einvoice(self, einvoice_id: int) -> EInvoice:
+        einvoice = (
+            self.db.query(EInvoice)
+            .options(selectinload(EInvoice.lines))
+            .filter(EInvoice.id == einvoice_id)
+            .first()
+        )
         if not einvoice:
             raise ValueError("E-invoice not found")
+        return einvoice
 
-        errors = []
-        warnings = []
-
-        # Required fields validation
-        required_fields = [
-            ("invoice_number", "Invoice number"),
-            ("issue_date", "Issue date"),
-            ("supplier_name", "Supplier name"),
-            ("customer_name", "Customer name"),
-        ]
-
-        for field, label in required_fields:
-            if not getattr(einvoice, field):
-                errors.append({"field": field, "message": f"{label} is required"})
-
-        # TIN validation
-        if einvoice.supplier_tin and not validate_tin(einvoice.supplier_tin):
-            errors.append({"field": "supplier_tin", "message": "Invalid supplier TIN format"})
-        if einvoice.customer_tin and not validate_tin(einvoice.customer_tin):
-            errors.append({"field": "customer_tin", "message": "Invalid customer TIN format"})
-
-        # Line items validation
-        if not einvoice.lines:
-            errors.append({"field": "lines", "message": "At least one line item is required"})
-
-        # Warnings
-        if not einvoice.supplier_tin:
-            warnings.append({"field": "supplier_tin", "message": "Supplier TIN is recommended"})
-        if not einvoice.customer_tin:
-            warnings.append({"field": "customer_tin", "message": "Customer TIN is recommended"})
-        if not einvoice.supplier_vat_number:
-            warnings.append({"field": "supplier_vat_number", "message": "VAT registration number is recommended"})
+    def validate_einvoice(self, einvoice_id: int) -> Dict:
+        """Validate e-invoice against BIS 3.0 requirements."""
+        einvoice = self._get_einvoice(einvoice_id)
 
+        errors, warnings = check_ubl_context(ubl_context(einvoice))
         is_valid = len(errors) == 0
 
         # Update status
@@ -1010,120 +993,18 @@ class NigerianTaxService:
         }
 
     def get_einvoice_ubl(self, einvoice_id: int) -> Dict:
-        """Generate UBL XML structure for e-invoice."""
-        einvoice = self.db.query(EInvoice).filter(EInvoice.id == einvoice_id).first()
-        if not einvoice:
-            raise ValueError("E-invoice not found")
-
-        # Generate simple UBL structure (placeholder - full implementation would use proper XML library)
-        ubl_structure = {
-            "UBLVersionID": einvoice.ubl_version_id,
-            "CustomizationID": einvoice.customization_id,
-            "ProfileID": einvoice.profile_id,
-            "ID": einvoice.invoice_number,
-            "UUID": einvoice.uuid,
-            "IssueDate": einvoice.issue_date.isoformat(),
-            "DueDate": einvoice.due_date.isoformat() if einvoice.due_date else None,
-            "InvoiceTypeCode": einvoice.invoice_type_code,
-            "DocumentCurrencyCode": einvoice.document_currency_code,
-            "AccountingSupplierParty": {
-                "PartyName": einvoice.supplier_name,
-                "PartyTaxScheme": {
-                    "CompanyID": einvoice.supplier_tin,
-                    "TaxScheme": {"ID": "VAT"}
-                },
-                "PostalAddress": {
-                    "StreetName": einvoice.supplier_street,
-                    "CityName": einvoice.supplier_city,
-                    "CountrySubentity": einvoice.supplier_state,
-                    "Country": {"IdentificationCode": einvoice.supplier_country_code}
-                }
-            },
-            "AccountingCustomerParty": {
-                "PartyName": einvoice.customer_name,
-                "PartyTaxScheme": {
-                    "CompanyID": einvoice.customer_tin,
-                    "TaxScheme": {"ID": "VAT"}
-                },
-                "PostalAddress": {
-                    "StreetName": einvoice.customer_street,
-                    "CityName": einvoice.customer_city,
-                    "CountrySubentity": einvoice.customer_state,
-                    "Country": {"IdentificationCode": einvoice.customer_country_code}
-                }
-            },
-            "TaxTotal": {
-                "TaxAmount": str(einvoice.tax_amount),
-                "TaxSubtotal": {
-                    "TaxableAmount": str(einvoice.line_extension_amount),
-                    "TaxAmount": str(einvoice.tax_amount),
-                    "TaxCategory": {
-                        "ID": einvoice.tax_category_code,
-                        "Percent": str(einvoice.tax_rate * 100)
-                    }
-                }
-            },
-            "LegalMonetaryTotal": {
-                "LineExtensionAmount": str(einvoice.line_extension_amount),
-                "TaxExclusiveAmount": str(einvoice.tax_exclusive_amount),
-                "TaxInclusiveAmount": str(einvoice.tax_inclusive_amount),
-                "PayableAmount": str(einvoice.payable_amount)
-            },
-            "InvoiceLine": [
-                {
-                    "ID": line.line_id,
-                    "InvoicedQuantity": str(line.quantity),
-                    "LineExtensionAmount": str(line.line_extension_amount),
-                    "Item": {
-                        "Name": line.item_name,
-                        "Description": line.item_description
-                    },
-                    "Price": {
-                        "PriceAmount": str(line.unit_price)
-                    }
-                }
-                for line in einvoice.lines
-            ]
-        }
+        """Generate UBL XML for e-invoice, reusing the stored document while its inputs are unchanged."""
+        einvoice = self._get_einvoice(einvoice_id)
 
-        # Convert to XML string using Jinja2 template
-        from app.templates.environment import get_template_env
-        env = get_template_env()
-        xml_template = env.get_template("tax/einvoice_ubl.xml.j2")
-        xml_content = xml_template.render(
-            ubl_version=einvoice.ubl_version_id,
-            customization_id=einvoice.customization_id,
-            profile_id=einvoice.profile_id,
-            invoice_number=einvoice.invoice_number,
-            issue_date=einvoice.issue_date.isoformat() if einvoice.issue_date else "",
-            due_date=einvoice.due_date.isoformat() if einvoice.due_date else None,
-            invoice_type_code=einvoice.invoice_type_code,
-            note=einvoice.note,
-            currency_code=einvoice.document_currency_code,
-            supplier=ubl_structure.get("AccountingSupplierParty", {}).get("Party", {}),
-            customer=ubl_structure.get("AccountingCustomerParty", {}).get("Party", {}),
-            tax_amount=einvoice.tax_amount,
-            tax_subtotals=[{
-                "taxable_amount": einvoice.taxable_amount,
-                "tax_amount": einvoice.tax_amount,
-                "category_id": "S",
-                "percent": "7.5",
-                "scheme_id": "VAT",
-            }],
-            line_extension_amount=einvoice.line_extension_amount,
-            tax_exclusive_amount=einvoice.tax_exclusive_amount,
-            tax_inclusive_amount=einvoice.tax_inclusive_amount,
-            payable_amount=einvoice.payable_amount,
-            lines=[{
-                "id": line.line_id,
-                "quantity": line.quantity,
-                "unit_code": "EA",
-                "line_extension_amount": line.line_extension_amount,
-                "item_name": line.item_name,
-                "item_description": line.item_description,
-                "unit_price": line.unit_price,
-            } for line in einvoice.lines],
-        )
+        document = ubl_document(einvoice)
+        if document.cached:
+            xml_content = einvoice.ubl_xml or ""
+        else:
+            xml_content = render_ubl(document.context)
+            einvoice.ubl_xml = xml_content
+            einvoice.ubl_hash = document.content_hash
+            einvoice.ubl_rendered_at = datetime.utcnow()
+            self.db.commit()
 
         return {
             "invoice_number": einvoice.invoice_number,
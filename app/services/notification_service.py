@@ -1,13 +1,10 @@
 """Notification and webhook dispatch service."""
 from __future__ import annotations
 
-import hashlib
-import hmac
-import json
+import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict, List, Optional
-from decimal import Decimal
 
 import httpx
 import structlog
@@ -28,25 +25,16 @@ from app.models.agent import Team, TeamMember, Agent
 from app.models.field_service import FieldTeam, FieldTeamMember
 from app.models.employee import Employee, EmploymentStatus
 from app.models.auth import User
-from app.services.secrets_service import get_secrets, SecretsServiceError
+from app.middleware.metrics import record_notification_fanout
 from app.services.notification_templates import (
     NotificationTemplateRegistry,
     render_template,
 )
+from app.services.webhook_delivery import SyncWebhookSender, WebhookDeliveryWorker
 
 logger = structlog.get_logger()
 
 
-class DecimalEncoder(json.JSONEncoder):
-    """JSON encoder that handles Decimal types."""
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
-
 class NotificationService:
     """Service for dispatching notifications across channels."""
 
@@ -107,28 +95,39 @@ class NotificationService:
             logger.error("webhook_queue_error", error=str(e))
             errors.append(f"Webhook error: {str(e)}")
 
-        # 2. Create in-app notifications for specified users
         if user_ids:
+            started = time.perf_counter()
+            recipients = list(dict.fromkeys(user_ids))
+            # Loaded once for both channels; on failure each channel retries
+            # the lookup and reports its own error
+            preferences: Optional[Dict[int, NotificationPreference]] = None
+            try:
+                preferences = self._load_preferences(event_type, recipients)
+            except Exception as e:
+                logger.error("notification_preferences_error", error=str(e))
+
+            # 2. Create in-app notifications for specified users
             try:
                 notif_count = self._create_in_app_notifications(
-                    event_type, payload, entity_type, entity_id, user_ids
+                    event_type, payload, entity_type, entity_id, recipients, preferences
                 )
                 results["notifications_created"] = notif_count
             except Exception as e:
                 logger.error("notification_create_error", error=str(e))
                 errors.append(f"Notification error: {str(e)}")
 
-        # 3. Queue emails based on user preferences
-        if user_ids:
+            # 3. Queue emails based on user preferences
             try:
                 email_count = self._queue_emails(
-                    event_type, payload, entity_type, entity_id, user_ids
+                    event_type, payload, entity_type, entity_id, recipients, preferences
                 )
                 results["emails_queued"] = email_count
             except Exception as e:
                 logger.error("email_queue_error", error=str(e))
                 errors.append(f"Email error: {str(e)}")
 
+            record_notification_fanout(event_type.value, time.perf_counter() - started, len(recipients))
+
         self.db.commit()
         return results
 
@@ -241,6 +240,18 @@ class NotificationService:
                     return False
         return True
 
+    def _load_preferences(
+        self, event_type: NotificationEventType, user_ids: List[int]
+    ) -> Dict[int, NotificationPreference]:
+        """Preferences for this event type for all recipients, keyed by user id."""
+        prefs = self.db.query(NotificationPreference).filter(
+            and_(
+                NotificationPreference.user_id.in_(user_ids),
+                NotificationPreference.event_type == event_type,
+            )
+        ).all()
+        return {pref.user_id: pref for pref in prefs}
+
     def _create_in_app_notifications(
         self,
         event_type: NotificationEventType,
@@ -248,42 +259,41 @@ class NotificationService:
         entity_type: Optional[str],
         entity_id: Optional[int],
         user_ids: List[int],
+        preferences: Optional[Dict[int, NotificationPreference]] = None,
     ) -> int:
         """Create in-app notifications for users based on preferences."""
-        created = 0
-
-        # Get notification template
+        if preferences is None:
+            preferences = self._load_preferences(event_type, user_ids)
+
+        # Default to enabled if no preference set
+        recipients = [
+            user_id for user_id in user_ids
+            if not (user_id in preferences and not preferences[user_id].in_app_enabled)
+        ]
+        if not recipients:
+            return 0
+
+        # Same content for every recipient: render once
         title, message, icon, priority = self._get_notification_template(event_type, payload)
+        action_url = self._build_action_url(entity_type, entity_id)
+
+        self.db.bulk_insert_mappings(Notification, [
+            {
+                "user_id": user_id,
+                "event_type": event_type,
+                "title": title,
+                "message": message,
+                "icon": icon,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "action_url": action_url,
+                "extra_data": payload,
+                "priority": priority,
+            }
+            for user_id in recipients
+        ])
 
-        for user_id in user_ids:
-            # Check user preference
-            pref = self.db.query(NotificationPreference).filter(
-                and_(
-                    NotificationPreference.user_id == user_id,
-                    NotificationPreference.event_type == event_type,
-                )
-            ).first()
-
-            # Default to enabled if no preference set
-            if pref and not pref.in_app_enabled:
-                continue
-
-            notification = Notification(
-                user_id=user_id,
-                event_type=event_type,
-                title=title,
-                message=message,
-                icon=icon,
-                entity_type=entity_type,
-                entity_id=entity_id,
-                action_url=self._build_action_url(entity_type, entity_id),
-                extra_data=payload,
-                priority=priority,
-            )
-            self.db.add(notification)
-            created += 1
-
-        return created
+        return len(recipients)
 
     def _queue_emails(
         self,
@@ -292,57 +302,56 @@ class NotificationService:
         entity_type: Optional[str],
         entity_id: Optional[int],
         user_ids: List[int],
+        preferences: Optional[Dict[int, NotificationPreference]] = None,
     ) -> int:
         """Queue emails for users with email notifications enabled."""
-        from app.models.auth import User
-
-        queued = 0
+        if preferences is None:
+            preferences = self._load_preferences(event_type, user_ids)
 
-        for user_id in user_ids:
-            # Check preference
-            pref = self.db.query(NotificationPreference).filter(
-                and_(
-                    NotificationPreference.user_id == user_id,
-                    NotificationPreference.event_type == event_type,
-                )
-            ).first()
-
-            # Default to enabled for important events
-            important_events = {
-                NotificationEventType.APPROVAL_REQUESTED,
-                NotificationEventType.INVOICE_OVERDUE,
-                NotificationEventType.TAX_OVERDUE,
-                NotificationEventType.CREDIT_HOLD_APPLIED,
+        # Default to enabled for important events
+        important_events = {
+            NotificationEventType.APPROVAL_REQUESTED,
+            NotificationEventType.INVOICE_OVERDUE,
+            NotificationEventType.TAX_OVERDUE,
+            NotificationEventType.CREDIT_HOLD_APPLIED,
+        }
+        default_enabled = event_type in important_events
+
+        recipients = [
+            user_id for user_id in user_ids
+            if (preferences[user_id].email_enabled if user_id in preferences else default_enabled)
+        ]
+        if not recipients:
+            return 0
+
+        users = {
+            row.id: row
+            for row in self.db.query(User.id, User.email, User.name).filter(User.id.in_(recipients)).all()
+        }
+        addressed = [users[user_id] for user_id in recipients if user_id in users and users[user_id].email]
+        if not addressed:
+            return 0
+
+        # Same content for every recipient: render once
+        subject, body_html, body_text = self._get_email_template(event_type, payload)
+        priority = self._get_email_priority(event_type)
+
+        self.db.bulk_insert_mappings(EmailQueue, [
+            {
+                "to_email": user.email,
+                "to_name": user.name,
+                "subject": subject,
+                "body_html": body_html,
+                "body_text": body_text,
+                "event_type": event_type.value,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "priority": priority,
             }
-            default_enabled = event_type in important_events
+            for user in addressed
+        ])
 
-            if pref and not pref.email_enabled:
-                continue
-            if not pref and not default_enabled:
-                continue
-
-            # Get user email
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user or not user.email:
-                continue
-
-            subject, body_html, body_text = self._get_email_template(event_type, payload)
-
-            email = EmailQueue(
-                to_email=user.email,
-                to_name=user.name,
-                subject=subject,
-                body_html=body_html,
-                body_text=body_text,
-                event_type=event_type.value,
-                entity_type=entity_type,
-                entity_id=entity_id,
-                priority=self._get_email_priority(event_type),
-            )
-            self.db.add(email)
-            queued += 1
-
-        return queued
+        return len(addressed)
 
     def _get_notification_template(
         self, event_type: NotificationEventType, payload: Dict[str, Any]
@@ -441,113 +450,8 @@ class NotificationService:
         if not delivery:
             return False
 
-        webhook = delivery.webhook
-        if not webhook or not webhook.is_active:
-            delivery.status = NotificationStatus.FAILED
-            delivery.error_message = "Webhook not found or inactive"
-            self.db.commit()
-            return False
-
-        delivery.attempt_count += 1
-        delivery.last_attempt_at = datetime.utcnow()
-
-        try:
-            # Prepare headers
-            headers = {
-                "Content-Type": "application/json",
-                "X-Webhook-Event": delivery.event_type,
-                "X-Webhook-ID": delivery.event_id,
-                "X-Webhook-Timestamp": str(int(datetime.utcnow().timestamp())),
-            }
-
-            # Add custom headers
-            if webhook.custom_headers:
-                headers.update(webhook.custom_headers)
-
-            # Add authentication (decrypt auth value)
-            if webhook.auth_value_encrypted:
-                try:
-                    secrets_service = get_secrets()
-                    decrypted_auth_value = secrets_service.decrypt(webhook.auth_value_encrypted)
-                except SecretsServiceError as e:
-                    logger.error(
-                        "webhook_auth_decryption_failed",
-                        webhook_id=webhook.id,
-                        error=str(e),
-                    )
-                    raise ValueError(f"Failed to decrypt webhook credentials: {e}")
-
-                if webhook.auth_type == "bearer":
-                    headers["Authorization"] = f"Bearer {decrypted_auth_value}"
-                elif webhook.auth_type == "api_key" and webhook.auth_header:
-                    headers[webhook.auth_header] = decrypted_auth_value
-                elif webhook.auth_type == "basic":
-                    headers["Authorization"] = f"Basic {decrypted_auth_value}"
-
-            # Add signature if secret configured
-            payload_json = json.dumps(delivery.payload, cls=DecimalEncoder)
-            if webhook.signing_secret:
-                signature = hmac.new(
-                    webhook.signing_secret.encode(),
-                    payload_json.encode(),
-                    hashlib.sha256
-                ).hexdigest()
-                headers["X-Webhook-Signature"] = f"sha256={signature}"
-
-            # Make request
-            start_time = datetime.utcnow()
-            response = self.http_client.request(
-                method=webhook.method,
-                url=webhook.url,
-                headers=headers,
-                content=payload_json,
-            )
-            end_time = datetime.utcnow()
-
-            delivery.response_status_code = response.status_code
-            delivery.response_body = response.text[:2000] if response.text else None
-            delivery.response_time_ms = int((end_time - start_time).total_seconds() * 1000)
-
-            if 200 <= response.status_code < 300:
-                delivery.status = NotificationStatus.DELIVERED
-                delivery.delivered_at = datetime.utcnow()
-                webhook.success_count += 1
-                webhook.last_triggered_at = datetime.utcnow()
-
-                logger.info(
-                    "webhook_delivered",
-                    webhook_id=webhook.id,
-                    delivery_id=delivery.id,
-                    status_code=response.status_code,
-                )
-                self.db.commit()
-                return True
-            else:
-                raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
-
-        except Exception as e:
-            delivery.error_message = str(e)[:1000]
-            webhook.failure_count += 1
-
-            # Schedule retry if attempts remaining
-            if delivery.attempt_count < webhook.max_retries:
-                delivery.status = NotificationStatus.PENDING
-                delivery.next_retry_at = datetime.utcnow() + timedelta(
-                    seconds=webhook.retry_delay_seconds * delivery.attempt_count
-                )
-            else:
-                delivery.status = NotificationStatus.FAILED
-
-            logger.warning(
-                "webhook_delivery_failed",
-                webhook_id=webhook.id,
-                delivery_id=delivery.id,
-                attempt=delivery.attempt_count,
-                error=str(e),
-            )
-
-            self.db.commit()
-            return False
+        worker = WebhookDeliveryWorker(self.db, sender=SyncWebhookSender(self.http_client))
+        return worker.deliver([delivery])["delivered"] == 1
 
     def get_pending_deliveries(self, limit: int = 100) -> List[WebhookDelivery]:
         """Get webhook deliveries ready for (re)delivery."""
@@ -7,6 +7,12 @@ Supports three calculation methods:
 - PERCENTAGE: Percentage of specified base components
 - PROGRESSIVE: Progressive tax bands
 
+Each region's rules and tax bands are compiled once into immutable objects
+and shared by every calculator in the process. A lookup checks the region's
+version stamp (row counts, max ids and max updated_at of the region, its
+rules and bands) with one query; writes through the config API also call
+invalidate_payroll_rules().
+
 Usage:
     from app.services.payroll_engine import DeductionCalculator, PayrollBuilder
 
@@ -32,14 +38,17 @@ Usage:
 from __future__ import annotations
 
 import logging
+import threading
 import time
+import weakref
+from bisect import bisect_left
 from dataclasses import dataclass, field
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Optional, Any, TYPE_CHECKING
+from typing import Dict, FrozenSet, List, Optional, Any, Sequence, Tuple, TYPE_CHECKING
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import func, select
 
 from app.models.payroll_config import (
     PayrollRegion,
@@ -86,6 +95,264 @@ class PayrollDeductionsResult:
     calc_date: date
 
 
+# ============= RULE REGISTRY =============
+
+
+@dataclass(frozen=True)
+class CompiledTaxBands:
+    """
+    Progressive tax bands of one rule as immutable arrays.
+
+    When the bands (in band_order) are contiguous and ascending, ``cumulative[i]``
+    holds the tax on every band below band i taken in full, so the tax on an
+    income is one bisect plus ``cumulative[i] + (min(income, upper[i]) - lower[i]) * rate[i]``.
+    Other layouts keep ``cumulative`` as None and are walked band by band.
+    """
+    bands: Tuple[Tuple[Decimal, Optional[Decimal], Decimal], ...]  # (lower, upper, rate)
+    lowers: Tuple[Decimal, ...] = ()
+    cumulative: Optional[Tuple[Decimal, ...]] = None
+
+    def tax(self, annual_income: Decimal) -> Decimal:
+        """Total tax on an (annual) income, summed in band order."""
+        if self.cumulative is None:
+            return _banded_tax(self.bands, annual_income)
+
+        i = bisect_left(self.lowers, annual_income) - 1
+        if i < 0:
+            return Decimal("0")
+        lower, upper, rate = self.bands[i]
+        top = annual_income if upper is None else min(annual_income, upper)
+        return self.cumulative[i] + (top - lower) * rate
+
+
+def _banded_tax(bands: Sequence[Tuple[Any, Any, Any]], annual_income: Decimal) -> Decimal:
+    total_tax = Decimal("0")
+    remaining_income = annual_income
+
+    for lower_limit, upper_limit, rate in bands:
+        if remaining_income <= 0:
+            break
+
+        if lower_limit is not None and annual_income <= lower_limit:
+            continue
+
+        upper = upper_limit if upper_limit is not None else annual_income
+        taxable_in_band = min(annual_income, upper) - lower_limit
+        if taxable_in_band <= 0:
+            continue
+
+        total_tax += taxable_in_band * rate
+        remaining_income -= taxable_in_band
+
+    return total_tax
+
+
+def compile_tax_bands(bands: Sequence[Any]) -> Optional[CompiledTaxBands]:
+    """Compile TaxBand rows (in band_order) into a CompiledTaxBands, or None if empty."""
+    rows = tuple((band.lower_limit, band.upper_limit, band.rate) for band in bands)
+    if not rows:
+        return None
+
+    # The shortcut gives the same sums as the band walk only when every band
+    # starts at or above zero, ends above its start and below the next band,
+    # and only the last band is open-ended.
+    for i, (lower, upper, _rate) in enumerate(rows):
+        last = i == len(rows) - 1
+        if lower is None or lower < 0 or (upper is None and not last):
+            return CompiledTaxBands(bands=rows)
+        if upper is not None and (upper <= lower or (not last and upper > rows[i + 1][0])):
+            return CompiledTaxBands(bands=rows)
+
+    cumulative = []
+    running = Decimal("0")
+    for lower, upper, rate in rows:
+        cumulative.append(running)
+        if upper is not None:
+            running += (upper - lower) * rate
+    return CompiledTaxBands(
+        bands=rows,
+        lowers=tuple(lower for lower, _upper, _rate in rows),
+        cumulative=tuple(cumulative),
+    )
+
+
+@dataclass(frozen=True)
+class CompiledDeductionRule:
+    """Immutable copy of a DeductionRule with its tax bands and lowered patterns."""
+    id: int
+    code: str
+    name: str
+    deduction_type: DeductionType
+    applicability: RuleApplicability
+    is_statutory: bool
+    calc_method: CalcMethod
+    rate: Optional[Decimal]
+    flat_amount: Optional[Decimal]
+    employee_share: Optional[Decimal]
+    employer_share: Optional[Decimal]
+    base_components: Tuple[str, ...]
+    base_patterns: Tuple[str, ...]
+    min_base: Optional[Decimal]
+    max_base: Optional[Decimal]
+    cap_amount: Optional[Decimal]
+    floor_amount: Optional[Decimal]
+    employment_types: Tuple[str, ...]
+    allowed_types: FrozenSet[str]
+    min_service_months: int
+    effective_from: date
+    effective_to: Optional[date]
+    display_order: int
+    bands: Optional[CompiledTaxBands] = None
+
+    @classmethod
+    def from_model(cls, rule: DeductionRule, bands: Sequence[TaxBand] = ()) -> "CompiledDeductionRule":
+        base_components = tuple(rule.base_components or ())
+        employment_types = tuple(rule.employment_types or ())
+        return cls(
+            id=rule.id,
+            code=rule.code,
+            name=rule.name,
+            deduction_type=rule.deduction_type,
+            applicability=rule.applicability,
+            is_statutory=rule.is_statutory,
+            calc_method=rule.calc_method,
+            rate=rule.rate,
+            flat_amount=rule.flat_amount,
+            employee_share=rule.employee_share,
+            employer_share=rule.employer_share,
+            base_components=base_components,
+            base_patterns=tuple(c.lower() for c in base_components),
+            min_base=rule.min_base,
+            max_base=rule.max_base,
+            cap_amount=rule.cap_amount,
+            floor_amount=rule.floor_amount,
+            employment_types=employment_types,
+            allowed_types=frozenset(t.upper() for t in employment_types),
+            min_service_months=rule.min_service_months,
+            effective_from=rule.effective_from,
+            effective_to=rule.effective_to,
+            display_order=rule.display_order,
+            bands=compile_tax_bands(bands),
+        )
+
+    def in_effect(self, calc_date: date) -> bool:
+        return self.effective_from <= calc_date and (self.effective_to is None or self.effective_to >= calc_date)
+
+
+@dataclass(frozen=True)
+class PayrollRuleSet:
+    """Compiled active rules of one region, ordered by display_order."""
+    region_code: str
+    version: Tuple[Any, ...]
+    region_id: Optional[int] = None
+    rules: Tuple[CompiledDeductionRule, ...] = ()
+    _by_code: Dict[str, Tuple[CompiledDeductionRule, ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        for rule in self.rules:
+            self._by_code[rule.code] = self._by_code.get(rule.code, ()) + (rule,)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def active_rules(self, calc_date: date) -> List[CompiledDeductionRule]:
+        return [rule for rule in self.rules if rule.in_effect(calc_date)]
+
+    def get_rule(self, rule_code: str, calc_date: date) -> Optional[CompiledDeductionRule]:
+        return next((rule for rule in self._by_code.get(rule_code, ()) if rule.in_effect(calc_date)), None)
+
+
+# Compiled rule sets per database bind (engine), then per region code
+_registry: "weakref.WeakKeyDictionary[Any, Dict[str, PayrollRuleSet]]" = weakref.WeakKeyDictionary()
+_registry_lock = threading.Lock()
+
+
+def payroll_rules_version(db: Session, region_code: str) -> Tuple[Any, ...]:
+    """
+    Version stamp of a region's payroll configuration in one query.
+
+    Covers the region row and all of its rules and tax bands (active or not):
+    row counts, max ids and max updated_at.
+    """
+    region_ids = select(PayrollRegion.id).where(PayrollRegion.code == region_code)
+    rule_ids = select(DeductionRule.id).where(DeductionRule.region_id.in_(region_ids))
+    stamps = [
+        select(func.max(PayrollRegion.id)).where(PayrollRegion.code == region_code),
+        select(func.max(PayrollRegion.updated_at)).where(PayrollRegion.code == region_code),
+        select(func.count(DeductionRule.id)).where(DeductionRule.region_id.in_(region_ids)),
+        select(func.max(DeductionRule.id)).where(DeductionRule.region_id.in_(region_ids)),
+        select(func.max(DeductionRule.updated_at)).where(DeductionRule.region_id.in_(region_ids)),
+        select(func.count(TaxBand.id)).where(TaxBand.deduction_rule_id.in_(rule_ids)),
+        select(func.max(TaxBand.id)).where(TaxBand.deduction_rule_id.in_(rule_ids)),
+        select(func.max(TaxBand.updated_at)).where(TaxBand.deduction_rule_id.in_(rule_ids)),
+    ]
+    row = db.query(*(stamp.scalar_subquery() for stamp in stamps)).one()
+    return tuple(row)
+
+
+def load_payroll_rules(db: Session, region_code: str) -> PayrollRuleSet:
+    """
+    Return the compiled rules of a region, recompiling when the stamp changed.
+
+    Compiled rule sets are shared by every calculator in the process, so a
+    lookup costs one version query instead of loading rules and bands.
+    """
+    bind = db.get_bind()
+    version = payroll_rules_version(db, region_code)
+    with _registry_lock:
+        cached = _registry.get(bind, {}).get(region_code)
+    if cached is not None and cached.version == version:
+        return cached
+
+    region = db.query(PayrollRegion).filter(
+        PayrollRegion.code == region_code,
+        PayrollRegion.is_active == True,
+    ).first()
+    if not region:
+        rule_set = PayrollRuleSet(region_code=region_code, version=version)
+    else:
+        rules = db.query(DeductionRule).filter(
+            DeductionRule.region_id == region.id,
+            DeductionRule.is_active == True,
+        ).order_by(DeductionRule.display_order, DeductionRule.id).all()
+
+        bands_by_rule: Dict[int, List[TaxBand]] = {}
+        progressive_ids = [rule.id for rule in rules if rule.calc_method == CalcMethod.PROGRESSIVE]
+        if progressive_ids:
+            bands = db.query(TaxBand).filter(
+                TaxBand.deduction_rule_id.in_(progressive_ids),
+            ).order_by(TaxBand.deduction_rule_id, TaxBand.band_order).all()
+            for band in bands:
+                bands_by_rule.setdefault(band.deduction_rule_id, []).append(band)
+
+        rule_set = PayrollRuleSet(
+            region_code=region_code,
+            version=version,
+            region_id=region.id,
+            rules=tuple(
+                CompiledDeductionRule.from_model(rule, bands_by_rule.get(rule.id, ()))
+                for rule in rules
+            ),
+        )
+
+    with _registry_lock:
+        _registry.setdefault(bind, {})[region_code] = rule_set
+    logger.debug(f"Compiled {len(rule_set)} payroll rules for region {region_code}")
+    return rule_set
+
+
+def invalidate_payroll_rules(region_code: Optional[str] = None) -> None:
+    """Drop compiled rules for a region (or all regions) in this process."""
+    with _registry_lock:
+        if region_code is None:
+            _registry.clear()
+            return
+        for rule_sets in _registry.values():
+            rule_sets.pop(region_code, None)
+
+
 # ============= DEDUCTION CALCULATOR =============
 
 
@@ -93,103 +360,59 @@ class DeductionCalculator:
     """
     Calculate individual deductions based on configured rules.
 
-    Supports caching of rules and tax bands for performance.
+    Rules and tax bands come from the process-wide registry; the calculator
+    re-checks the registry version at most once per cache_ttl_seconds.
+    Calculation methods accept compiled rules as well as DeductionRule rows.
     """
 
     def __init__(self, db: Session, region_code: str, cache_ttl_seconds: int = 300):
         self.db = db
         self.region_code = region_code
         self._cache_ttl_seconds = cache_ttl_seconds
-        self._rules_cache: Dict[str, tuple[DeductionRule, float]] = {}
-        self._bands_cache: Dict[int, tuple[List[TaxBand], float]] = {}
-        self._region: Optional[tuple[PayrollRegion, float]] = None
+        self._rule_set: Optional[tuple[PayrollRuleSet, float]] = None
 
     def _cache_valid(self, cached_at: float) -> bool:
         if self._cache_ttl_seconds <= 0:
             return False
         return (time.monotonic() - cached_at) <= self._cache_ttl_seconds
 
+    def get_rule_set(self) -> PayrollRuleSet:
+        """Get the compiled rules for this calculator's region."""
+        if self._rule_set is not None and self._cache_valid(self._rule_set[1]):
+            return self._rule_set[0]
+
+        rule_set = load_payroll_rules(self.db, self.region_code)
+        self._rule_set = (rule_set, time.monotonic())
+        return rule_set
+
     def get_region(self) -> Optional[PayrollRegion]:
         """Get the PayrollRegion for this calculator."""
-        if self._region is not None and self._cache_valid(self._region[1]):
-            return self._region[0]
-
-        region = self.db.query(PayrollRegion).filter(
+        return self.db.query(PayrollRegion).filter(
             PayrollRegion.code == self.region_code,
             PayrollRegion.is_active == True,
         ).first()
-        if region:
-            self._region = (region, time.monotonic())
-        return region
 
-    def get_rule(self, rule_code: str, calc_date: Optional[date] = None) -> Optional[DeductionRule]:
+    def get_rule(self, rule_code: str, calc_date: Optional[date] = None) -> Optional[CompiledDeductionRule]:
         """Get a deduction rule by code, respecting effective dates."""
         if calc_date is None:
             calc_date = date.today()
+        return self.get_rule_set().get_rule(rule_code, calc_date)
 
-        cache_key = f"{rule_code}:{calc_date}"
-        if cache_key in self._rules_cache:
-            cached_rule, cached_at = self._rules_cache[cache_key]
-            if self._cache_valid(cached_at):
-                return cached_rule
-            self._rules_cache.pop(cache_key, None)
-
-        region = self.get_region()
-        if not region:
-            return None
-
-        rule = self.db.query(DeductionRule).filter(
-            DeductionRule.region_id == region.id,
-            DeductionRule.code == rule_code,
-            DeductionRule.is_active == True,
-            DeductionRule.effective_from <= calc_date,
-            or_(
-                DeductionRule.effective_to.is_(None),
-                DeductionRule.effective_to >= calc_date,
-            ),
-        ).first()
-
-        if rule:
-            self._rules_cache[cache_key] = (rule, time.monotonic())
-        return rule
-
-    def get_active_rules(self, calc_date: Optional[date] = None) -> List[DeductionRule]:
+    def get_active_rules(self, calc_date: Optional[date] = None) -> List[CompiledDeductionRule]:
         """Get all active deduction rules for the region."""
         if calc_date is None:
             calc_date = date.today()
-
-        region = self.get_region()
-        if not region:
-            return []
-
-        return self.db.query(DeductionRule).filter(
-            DeductionRule.region_id == region.id,
-            DeductionRule.is_active == True,
-            DeductionRule.effective_from <= calc_date,
-            or_(
-                DeductionRule.effective_to.is_(None),
-                DeductionRule.effective_to >= calc_date,
-            ),
-        ).order_by(DeductionRule.display_order).all()
+        return self.get_rule_set().active_rules(calc_date)
 
     def get_tax_bands(self, rule_id: int) -> List[TaxBand]:
         """Get tax bands for a progressive rule."""
-        if rule_id in self._bands_cache:
-            cached_bands, cached_at = self._bands_cache[rule_id]
-            if self._cache_valid(cached_at):
-                return cached_bands
-            self._bands_cache.pop(rule_id, None)
-
-        bands = self.db.query(TaxBand).filter(
+        return self.db.query(TaxBand).filter(
             TaxBand.deduction_rule_id == rule_id,
         ).order_by(TaxBand.band_order).all()
 
-        self._bands_cache[rule_id] = (bands, time.monotonic())
-        return bands
-
     def is_applicable(
         self,
-        rule: DeductionRule,
+        rule: DeductionRule | CompiledDeductionRule,
         employment_type: Optional[str] = None,
         months_of_service: int = 0,
     ) -> tuple[bool, Optional[str]]:
@@ -201,7 +424,10 @@ class DeductionCalculator:
         # Check employment type filter
         if rule.employment_types and employment_type:
             emp_type_upper = employment_type.upper().replace("-", "_").replace(" ", "_")
-            allowed_types = [t.upper() for t in rule.employment_types]
+            if isinstance(rule, CompiledDeductionRule):
+                allowed_types = rule.allowed_types
+            else:
+                allowed_types = [t.upper() for t in rule.employment_types]
             if emp_type_upper not in allowed_types:
                 return False, f"Employment type {employment_type} not in allowed types"
 
@@ -213,7 +439,7 @@ class DeductionCalculator:
 
     def calculate_base(
         self,
-        rule: DeductionRule,
+        rule: DeductionRule | CompiledDeductionRule,
         salary_components: Dict[str, Decimal],
     ) -> Decimal:
         """Calculate the base amount for a percentage calculation."""
@@ -222,7 +448,10 @@ class DeductionCalculator:
             return sum(salary_components.values(), Decimal("0"))
 
         base = Decimal("0")
-        base_patterns = [c.lower() for c in rule.base_components]
+        if isinstance(rule, CompiledDeductionRule):
+            base_patterns = rule.base_patterns
+        else:
+            base_patterns = [c.lower() for c in rule.base_components]
 
         for comp_name, amount in salary_components.items():
             comp_lower = comp_name.lower()
@@ -233,7 +462,7 @@ class DeductionCalculator:
 
         return base
 
-    def calculate_flat(self, rule: DeductionRule, base: Decimal) -> Decimal:
+    def calculate_flat(self, rule: DeductionRule | CompiledDeductionRule, base: Decimal) -> Decimal:
         """Calculate flat amount deduction."""
         amount = rule.flat_amount or Decimal("0")
 
@@ -249,7 +478,7 @@ class DeductionCalculator:
 
     def calculate_percentage(
         self,
-        rule: DeductionRule,
+        rule: DeductionRule | CompiledDeductionRule,
         salary_components: Dict[str, Decimal],
     ) -> Decimal:
         """Calculate percentage-based deduction."""
@@ -276,7 +505,7 @@ class DeductionCalculator:
 
     def calculate_progressive(
         self,
-        rule: DeductionRule,
+        rule: DeductionRule | CompiledDeductionRule,
         taxable_income: Decimal,
         annualize: bool = True,
     ) -> Decimal:
@@ -288,7 +517,10 @@ class DeductionCalculator:
             taxable_income: Monthly taxable income
             annualize: If True, annualize income, calculate, then divide by 12
         """
-        bands = self.get_tax_bands(rule.id)
+        if isinstance(rule, CompiledDeductionRule):
+            bands = rule.bands
+        else:
+            bands = compile_tax_bands(self.get_tax_bands(rule.id))
         if not bands:
             logger.warning(f"No tax bands found for rule {rule.code}")
             return Decimal("0")
@@ -303,24 +535,7 @@ class DeductionCalculator:
             annual_income = min(annual_income, rule.max_base)
 
         # Calculate progressive tax
-        total_tax = Decimal("0")
-        remaining_income = annual_income
-
-        for band in bands:
-            if remaining_income <= 0:
-                break
-
-            if band.lower_limit is not None and annual_income <= band.lower_limit:
-                continue
-
-            upper_limit = band.upper_limit if band.upper_limit is not None else annual_income
-            taxable_in_band = min(annual_income, upper_limit) - band.lower_limit
-            if taxable_in_band <= 0:
-                continue
-
-            tax_in_band = taxable_in_band * band.rate
-            total_tax += tax_in_band
-            remaining_income -= taxable_in_band
+        total_tax = bands.tax(annual_income)
 
         # Convert back to monthly if annualized
         if annualize:
@@ -368,7 +583,16 @@ class DeductionCalculator:
                 is_applicable=False,
                 skip_reason=f"Rule {rule_code} not found for region {self.region_code}",
             )
+        return self.calculate_rule(rule, salary_components, employment_type, months_of_service)
 
+    def calculate_rule(
+        self,
+        rule: DeductionRule | CompiledDeductionRule,
+        salary_components: Dict[str, Decimal],
+        employment_type: Optional[str] = None,
+        months_of_service: int = 0,
+    ) -> DeductionResult:
+        """Calculate a single deduction for an already resolved rule."""
         # Check applicability
         is_applicable, skip_reason = self.is_applicable(
             rule, employment_type, months_of_service
@@ -430,6 +654,8 @@ class PayrollBuilder:
     Orchestrate complete payroll slip deduction calculation.
 
     Loads all applicable rules for a region and calculates deductions.
+    Builders share compiled rules through the registry, so creating one per
+    slip costs a single version query.
     """
 
     def __init__(self, db: Session, region_code: str, cache_ttl_seconds: int = 300):
@@ -473,12 +699,11 @@ class PayrollBuilder:
             if only_statutory and not rule.is_statutory:
                 continue
 
-            result = self.calculator.calculate(
-                rule_code=rule.code,
+            result = self.calculator.calculate_rule(
+                rule,
                 salary_components=salary_components,
                 employment_type=employment_type,
                 months_of_service=months_of_service,
-                calc_date=calc_date,
             )
 
             if not result.is_applicable:
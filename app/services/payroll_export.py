@@ -0,0 +1,169 @@
+"""Salary slip and payroll register exports.
+
+Exports are built as one SQL statement and read back from a server-side
+cursor in batches, so exporting every slip of a period keeps memory flat and
+never touches the slip ORM objects or their child rows:
+- salary_slip_export: one row per slip with the slip totals
+- payroll_register_export: one row per slip plus a column per earning and
+  deduction component, pivoted in the database by one grouped query per
+  child table joined to the slips
+
+Rows carry native values (dates, floats, enum values) and a column type per
+column, which ExportService's streaming writers turn into CSV, XLSX or
+Parquet.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.database import SessionLocal
+from app.models.hr_payroll import SalarySlip, SalarySlipDeduction, SalarySlipEarning
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+ExportColumn = Tuple[str, str, Any]  # (header, column type, SQL expression)
+
+SALARY_SLIP_COLUMNS: List[ExportColumn] = [
+    ("id", "int", SalarySlip.id),
+    ("employee", "string", SalarySlip.employee),
+    ("employee_name", "string", SalarySlip.employee_name),
+    ("posting_date", "date", SalarySlip.posting_date),
+    ("start_date", "date", SalarySlip.start_date),
+    ("end_date", "date", SalarySlip.end_date),
+    ("gross_pay", "float", SalarySlip.gross_pay),
+    ("total_deduction", "float", SalarySlip.total_deduction),
+    ("net_pay", "float", SalarySlip.net_pay),
+    ("status", "string", SalarySlip.status),
+    ("company", "string", SalarySlip.company),
+]
+
+REGISTER_COLUMNS: List[ExportColumn] = [
+    ("Employee ID", "int", SalarySlip.employee_id),
+    ("Employee", "string", SalarySlip.employee),
+    ("Employee Name", "string", SalarySlip.employee_name),
+    ("Department", "string", SalarySlip.department),
+    ("Designation", "string", SalarySlip.designation),
+    ("Period Start", "date", SalarySlip.start_date),
+    ("Period End", "date", SalarySlip.end_date),
+    ("Gross Pay", "float", SalarySlip.gross_pay),
+    ("Total Deduction", "float", SalarySlip.total_deduction),
+    ("Net Pay", "float", SalarySlip.net_pay),
+    ("Status", "string", SalarySlip.status),
+    ("Payment Reference", "string", SalarySlip.payment_reference),
+    ("Paid At", "datetime", SalarySlip.paid_at),
+    ("Company", "string", SalarySlip.company),
+]
+
+
+@dataclass
+class PayrollExport:
+    """A typed export: header, column types and the statement producing the rows."""
+
+    header: List[str]
+    types: List[str]
+    statement: Select
+
+    def count(self, db: Session) -> int:
+        return db.scalar(select(func.count()).select_from(self.statement.order_by(None).subquery())) or 0
+
+
+def salary_slip_export(filters: Sequence[ColumnElement[bool]]) -> PayrollExport:
+    """Slip totals, newest posting date first."""
+    return PayrollExport(
+        header=[header for header, _, _ in SALARY_SLIP_COLUMNS],
+        types=[kind for _, kind, _ in SALARY_SLIP_COLUMNS],
+        statement=select(*(column for _, _, column in SALARY_SLIP_COLUMNS))
+        .where(*filters)
+        .order_by(SalarySlip.posting_date.desc(), SalarySlip.id.desc()),
+    )
+
+
+def register_components(db: Session, filters: Sequence[ColumnElement[bool]]) -> Tuple[List[str], List[str]]:
+    """Earning and deduction components that appear on the matching slips."""
+    slip_ids = select(SalarySlip.id).where(*filters)
+
+    def components(detail: Any) -> List[str]:
+        return list(db.scalars(
+            select(detail.salary_component)
+            .where(detail.salary_slip_id.in_(slip_ids))
+            .distinct()
+            .order_by(detail.salary_component)
+        ))
+
+    return components(SalarySlipEarning), components(SalarySlipDeduction)
+
+
+def _component_pivot(detail: Any, components: Sequence[str], filters: Sequence[ColumnElement[bool]]) -> Any:
+    """One row per slip with the summed amount of each component."""
+    return (
+        select(
+            detail.salary_slip_id.label("salary_slip_id"),
+            *(
+                func.sum(case((detail.salary_component == name, detail.amount), else_=0)).label(f"c{i}")
+                for i, name in enumerate(components)
+            ),
+        )
+        .where(detail.salary_slip_id.in_(select(SalarySlip.id).where(*filters)))
+        .group_by(detail.salary_slip_id)
+        .subquery()
+    )
+
+
+def payroll_register_export(db: Session, filters: Sequence[ColumnElement[bool]]) -> PayrollExport:
+    """Register rows per slip with one column per earning and deduction component."""
+    earnings, deductions = register_components(db, filters)
+    columns: List[Any] = [column for _, _, column in REGISTER_COLUMNS]
+    header = [header for header, _, _ in REGISTER_COLUMNS]
+
+    joins = []
+    for label, detail, components in (
+        ("Earning", SalarySlipEarning, earnings),
+        ("Deduction", SalarySlipDeduction, deductions),
+    ):
+        if not components:
+            continue
+        pivot = _component_pivot(detail, components, filters)
+        joins.append(pivot)
+        columns.extend(func.coalesce(pivot.c[f"c{i}"], 0) for i in range(len(components)))
+        header.extend(f"{label}: {name}" for name in components)
+
+    statement = select(*columns).select_from(SalarySlip)
+    for pivot in joins:
+        statement = statement.outerjoin(pivot, pivot.c.salary_slip_id == SalarySlip.id)
+    statement = statement.where(*filters).order_by(SalarySlip.employee, SalarySlip.start_date, SalarySlip.id)
+
+    return PayrollExport(
+        header=header,
+        types=[kind for _, kind, _ in REGISTER_COLUMNS] + ["float"] * (len(header) - len(REGISTER_COLUMNS)),
+        statement=statement,
+    )
+
+
+def _normalize(value: Any, kind: str) -> Any:
+    if kind == "float":
+        return float(value or 0)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def iter_export_rows(export: PayrollExport, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Any]]:
+    """Yield export rows from a server-side cursor.
+
+    Uses its own session: the request-scoped session is closed before a
+    StreamingResponse body is consumed.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(export.statement.execution_options(yield_per=batch_size))
+        for row in result:
+            yield [_normalize(value, kind) for value, kind in zip(row, export.types)]
+    finally:
+        db.close()
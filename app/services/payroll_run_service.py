@@ -0,0 +1,672 @@
+"""
+Payroll Run Service
+
+Generates draft salary slips for a payroll entry as a resumable run:
+- Salary structures (with earnings and deductions) are loaded once per run;
+  employees and existing slips once per chunk
+- Slip amounts come from a pure function over plain inputs, computed
+  in-process or across a process pool for the Decimal-heavy tax maths
+- Slips and their earning/deduction lines are bulk-inserted per chunk
+- Progress and a resume cursor (last_employee_id) are committed with each
+  chunk, so a failed or interrupted run continues where it stopped
+
+Slip amounts and lines match what generate_payroll_slips produced when it
+computed one employee at a time.
+"""
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+from sqlalchemy import Row, insert, or_, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.api.tax.payroll_integration import (
+    STATUTORY_COMPONENTS,
+    calculate_slip_deductions,
+    get_employment_type_config,
+)
+from app.config import settings
+from app.feature_flags import feature_flags
+from app.models.employee import Employee
+from app.models.hr_payroll import (
+    PayrollEntry,
+    PayrollRun,
+    PayrollRunStatus,
+    SalarySlip,
+    SalarySlipDeduction,
+    SalarySlipEarning,
+    SalarySlipStatus,
+    SalaryStructure,
+    SalaryStructureAssignment,
+)
+from app.services.audit_logger import AuditLogger
+
+logger = structlog.get_logger(__name__)
+
+# Structure deductions replaced by the statutory calculation
+STATUTORY_KEYWORDS = ("paye", "pension", "nhf", "nhis")
+
+# Statutory result key -> STATUTORY_COMPONENTS key, in slip line order
+STATUTORY_LINES = (
+    ("paye", "PAYE"),
+    ("pension_employee", "PENSION_EMPLOYEE"),
+    ("nhf", "NHF"),
+    ("nhis_employee", "NHIS_EMPLOYEE"),
+)
+
+ZERO = Decimal("0")
+
+
+class PayrollRunError(Exception):
+    """Exception raised for payroll run errors."""
+    pass
+
+
+# =============================================================================
+# SLIP COMPUTATION (pure, runs in worker processes)
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class StructureLine:
+    """An earning or deduction row of a salary structure."""
+    salary_component: Optional[str]
+    abbr: Optional[str]
+    amount: Decimal
+    statistical_component: Optional[bool]
+    do_not_include_in_total: Optional[bool]
+
+
+@dataclass(frozen=True)
+class StructureSnapshot:
+    """The parts of a salary structure a slip is built from."""
+    salary_structure_name: str
+    payroll_frequency: Optional[str]
+    company: Optional[str]
+    currency: Optional[str]
+    earnings: Tuple[StructureLine, ...]
+    deductions: Tuple[StructureLine, ...]
+
+
+@dataclass(frozen=True)
+class SlipInput:
+    """Everything needed to compute one employee's slip."""
+    employee_id: int
+    base: Decimal
+    employment_type: Optional[str]
+    months_of_service: Optional[int]
+    employment_config: Optional[Dict[str, Any]]
+    earnings: Tuple[StructureLine, ...]
+    deductions: Tuple[StructureLine, ...]
+
+
+@dataclass(frozen=True)
+class SlipLine:
+    """An earning or deduction row of a computed slip."""
+    salary_component: Optional[str]
+    abbr: Optional[str]
+    amount: Decimal
+    statistical_component: Optional[bool]
+    do_not_include_in_total: Optional[bool]
+
+
+@dataclass(frozen=True)
+class SlipPlan:
+    """Computed amounts and lines for one slip."""
+    employee_id: int
+    gross_pay: Decimal
+    total_deduction: Decimal
+    net_pay: Decimal
+    paye: Decimal
+    pension_employee: Decimal
+    is_paye_exempt: bool
+    earnings: Tuple[SlipLine, ...]
+    deductions: Tuple[SlipLine, ...]
+
+
+def _is_statutory(component: Optional[str]) -> bool:
+    name = (component or "").lower()
+    return any(keyword in name for keyword in STATUTORY_KEYWORDS)
+
+
+def compute_slip(slip: SlipInput, payroll_date: Optional[date], compliance_enabled: bool) -> SlipPlan:
+    """Compute gross, statutory and structure deductions and net pay for a slip."""
+    gross_pay = ZERO
+    basic_salary = ZERO
+    housing_allowance = ZERO
+    transport_allowance = ZERO
+    other_allowances = ZERO
+
+    # Categorize earnings for tax calculation
+    for earning in slip.earnings:
+        if earning.statistical_component or earning.do_not_include_in_total:
+            continue
+        amount = earning.amount
+        gross_pay += amount
+        comp_name = (earning.salary_component or "").lower()
+        if "basic" in comp_name:
+            basic_salary += amount
+        elif "housing" in comp_name:
+            housing_allowance += amount
+        elif "transport" in comp_name:
+            transport_allowance += amount
+        else:
+            other_allowances += amount
+
+    # If no basic salary component found, use base from assignment
+    if basic_salary == ZERO and slip.base:
+        basic_salary = slip.base
+
+    if compliance_enabled:
+        statutory = calculate_slip_deductions(
+            basic_salary=basic_salary,
+            housing_allowance=housing_allowance,
+            transport_allowance=transport_allowance,
+            other_allowances=other_allowances,
+            employment_type=slip.employment_type,
+            months_of_service=slip.months_of_service,
+            payroll_date=payroll_date,
+            employment_config=slip.employment_config,
+        )
+    else:
+        statutory = {
+            "paye": ZERO,
+            "pension_employee": ZERO,
+            "nhf": ZERO,
+            "nhis_employee": ZERO,
+            "total_employee_deductions": ZERO,
+            "is_paye_exempt": True,
+        }
+
+    structure_deductions = sum(
+        (
+            d.amount
+            for d in slip.deductions
+            if not d.statistical_component
+            and not d.do_not_include_in_total
+            and not _is_statutory(d.salary_component)
+        ),
+        ZERO,
+    )
+    total_deduction = statutory["total_employee_deductions"] + structure_deductions
+
+    deductions = [
+        SlipLine(
+            salary_component=STATUTORY_COMPONENTS[component]["name"],
+            abbr=STATUTORY_COMPONENTS[component]["abbr"],
+            amount=statutory[key],
+            statistical_component=False,
+            do_not_include_in_total=False,
+        )
+        for key, component in STATUTORY_LINES
+        if statutory[key] > ZERO
+    ]
+    deductions.extend(
+        SlipLine(d.salary_component, d.abbr, d.amount, d.statistical_component, d.do_not_include_in_total)
+        for d in slip.deductions
+        if not _is_statutory(d.salary_component)
+    )
+
+    return SlipPlan(
+        employee_id=slip.employee_id,
+        gross_pay=gross_pay,
+        total_deduction=total_deduction,
+        net_pay=gross_pay - total_deduction,
+        paye=statutory["paye"],
+        pension_employee=statutory["pension_employee"],
+        is_paye_exempt=statutory["is_paye_exempt"],
+        earnings=tuple(
+            SlipLine(e.salary_component, e.abbr, e.amount, e.statistical_component, e.do_not_include_in_total)
+            for e in slip.earnings
+        ),
+        deductions=tuple(deductions),
+    )
+
+
+def _structure_lines(rows: Sequence[Any]) -> Tuple[StructureLine, ...]:
+    return tuple(
+        StructureLine(
+            salary_component=row.salary_component,
+            abbr=row.abbr,
+            amount=row.amount or ZERO,
+            statistical_component=row.statistical_component,
+            do_not_include_in_total=row.do_not_include_in_total,
+        )
+        for row in sorted(rows, key=lambda r: r.id)
+    )
+
+
+def _months_of_service(date_of_joining: Any, as_of: date) -> Optional[int]:
+    if not date_of_joining:
+        return None
+    joined = date_of_joining.date() if isinstance(date_of_joining, datetime) else date_of_joining
+    return (as_of - joined).days // 30
+
+
+# =============================================================================
+# PAYROLL RUN SERVICE
+# =============================================================================
+
+
+class PayrollRunService:
+    """Creates, runs and resumes payroll runs."""
+
+    ACTIVE_STATUSES = (PayrollRunStatus.PENDING, PayrollRunStatus.RUNNING)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_run(self, run_id: int) -> Optional[PayrollRun]:
+        return self.db.get(PayrollRun, run_id)
+
+    def start(self, entry_id: int, created_by_id: Optional[int] = None) -> PayrollRun:
+        """Create a pending run for a payroll entry."""
+        entry = self.db.get(PayrollEntry, entry_id)
+        if not entry:
+            raise PayrollRunError("Payroll entry not found")
+        if entry.salary_slips_created:
+            raise PayrollRunError("Salary slips already created for this entry")
+
+        active = (
+            self.db.query(PayrollRun)
+            .filter(
+                PayrollRun.payroll_entry_id == entry_id,
+                PayrollRun.status.in_(self.ACTIVE_STATUSES),
+            )
+            .first()
+        )
+        if active:
+            raise PayrollRunError(f"Payroll run {active.id} is already in progress for this entry")
+
+        run = PayrollRun(
+            payroll_entry_id=entry_id,
+            status=PayrollRunStatus.PENDING,
+            created_by_id=created_by_id,
+        )
+        self.db.add(run)
+        self.db.commit()
+        return run
+
+    def resume(self, run_id: int) -> PayrollRun:
+        """Put a failed or abandoned run back to pending so it can be re-queued."""
+        run = self.get_run(run_id)
+        if not run:
+            raise PayrollRunError(f"Payroll run {run_id} not found")
+        if run.status == PayrollRunStatus.COMPLETED:
+            raise PayrollRunError("Payroll run already completed")
+        if run.status == PayrollRunStatus.RUNNING and not self._is_stale(run):
+            raise PayrollRunError("Payroll run is still running")
+
+        run.status = PayrollRunStatus.PENDING
+        run.error_message = None
+        self.db.commit()
+        return run
+
+    def stale_runs(self) -> List[PayrollRun]:
+        """Running runs whose worker stopped committing progress."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.payroll_run_stale_after_seconds)
+        return (
+            self.db.query(PayrollRun)
+            .filter(PayrollRun.status == PayrollRunStatus.RUNNING, PayrollRun.updated_at < cutoff)
+            .all()
+        )
+
+    def run(
+        self,
+        run_id: int,
+        task_id: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        created_details: Optional[List[Dict[str, Any]]] = None,
+    ) -> PayrollRun:
+        """
+        Generate slips for a run, continuing after its last committed chunk.
+
+        Args:
+            run_id: Payroll run to process
+            task_id: Celery task id, recorded on the run
+            chunk_size: Employees per chunk (settings.payroll_run_chunk_size)
+            workers: Compute processes (settings.payroll_run_workers); 0 or
+                running inside a daemonic worker computes in-process
+            created_details: When given, a summary of each created slip is
+                appended to it
+
+        Returns:
+            The run; FAILED with error_message if generation raised
+        """
+        run = self.get_run(run_id)
+        if not run:
+            raise PayrollRunError(f"Payroll run {run_id} not found")
+        if run.status == PayrollRunStatus.COMPLETED or not self._claim(run, task_id):
+            return run
+
+        chunk_size = chunk_size or settings.payroll_run_chunk_size
+        workers = settings.payroll_run_workers if workers is None else workers
+        if workers and multiprocessing.current_process().daemon:
+            # Celery prefork children cannot start their own processes
+            workers = 0
+
+        pool: Optional[Executor] = ProcessPoolExecutor(max_workers=workers) if workers else None
+        try:
+            entry = self.db.get(PayrollEntry, run.payroll_entry_id)
+            if not entry:
+                raise PayrollRunError("Payroll entry not found")
+
+            assignments = self._load_assignments(entry)
+            if run.last_employee_id is None:
+                run.total_employees = len(assignments)
+            else:
+                assignments = [a for a in assignments if a.employee_id > run.last_employee_id]
+            structures = self._load_structures({a.salary_structure_id for a in assignments})
+            self.db.commit()
+
+            for start in range(0, len(assignments), chunk_size):
+                chunk = assignments[start:start + chunk_size]
+                created, skipped = self._process_chunk(run, entry, chunk, structures, pool, created_details)
+                run.processed_employees += len(chunk)
+                run.created_count += created
+                run.skipped_count += len(skipped)
+                run.last_employee_id = chunk[-1].employee_id
+                if skipped:
+                    run.skipped_details = (run.skipped_details or []) + skipped
+                self.db.commit()
+                logger.info(
+                    "payroll_run_chunk_committed",
+                    run_id=run.id,
+                    processed=run.processed_employees,
+                    total=run.total_employees,
+                )
+
+            self._complete(run, entry)
+            self.db.commit()
+            logger.info(
+                "payroll_run_completed",
+                run_id=run.id,
+                entry_id=entry.id,
+                created=run.created_count,
+                skipped=run.skipped_count,
+            )
+        except Exception as e:
+            self.db.rollback()
+            run = self.get_run(run_id) or run
+            run.status = PayrollRunStatus.FAILED
+            run.error_message = str(e)
+            self.db.commit()
+            logger.exception("payroll_run_failed", run_id=run_id, error=str(e))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return run
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _is_stale(self, run: PayrollRun) -> bool:
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.payroll_run_stale_after_seconds)
+        return run.updated_at is not None and run.updated_at < cutoff
+
+    def _claim(self, run: PayrollRun, task_id: Optional[str]) -> bool:
+        """Move the run to RUNNING unless another worker holds it."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.payroll_run_stale_after_seconds)
+        values: Dict[str, Any] = {
+            "status": PayrollRunStatus.RUNNING,
+            "started_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+        if task_id:
+            values["task_id"] = task_id
+        claimed = self.db.execute(
+            update(PayrollRun)
+            .where(
+                PayrollRun.id == run.id,
+                or_(
+                    PayrollRun.status.in_([PayrollRunStatus.PENDING, PayrollRunStatus.FAILED]),
+                    PayrollRun.updated_at < cutoff,
+                ),
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        self.db.refresh(run)
+        if not claimed:
+            logger.info("payroll_run_already_claimed", run_id=run.id)
+        return bool(claimed)
+
+    def _load_assignments(self, entry: PayrollEntry) -> List[Row]:
+        """The latest assignment starting by the period end, per employee, by employee id.
+
+        Plain rows rather than ORM objects, so per-chunk commits do not expire
+        them and trigger a reload per assignment.
+        """
+        query = self.db.query(
+            SalaryStructureAssignment.employee_id,
+            SalaryStructureAssignment.employee,
+            SalaryStructureAssignment.employee_name,
+            SalaryStructureAssignment.salary_structure_id,
+            SalaryStructureAssignment.from_date,
+            SalaryStructureAssignment.base,
+        ).filter(
+            SalaryStructureAssignment.from_date <= entry.end_date,
+            SalaryStructureAssignment.employee_id.isnot(None),
+        )
+        if entry.company:
+            query = query.filter(SalaryStructureAssignment.company == entry.company)
+        if entry.department or entry.designation:
+            query = query.join(Employee, SalaryStructureAssignment.employee_id == Employee.id)
+            if entry.department:
+                query = query.filter(Employee.department == entry.department)
+            if entry.designation:
+                query = query.filter(Employee.designation == entry.designation)
+
+        latest: Dict[int, Row] = {}
+        for assignment in query.order_by(SalaryStructureAssignment.employee_id, SalaryStructureAssignment.id):
+            existing = latest.get(assignment.employee_id)
+            if existing is None or (
+                assignment.from_date and existing.from_date and assignment.from_date > existing.from_date
+            ):
+                latest[assignment.employee_id] = assignment
+        return list(latest.values())
+
+    def _load_structures(self, structure_ids: set) -> Dict[int, StructureSnapshot]:
+        structure_ids.discard(None)
+        if not structure_ids:
+            return {}
+        structures = (
+            self.db.query(SalaryStructure)
+            .options(selectinload(SalaryStructure.earnings), selectinload(SalaryStructure.deductions))
+            .filter(SalaryStructure.id.in_(structure_ids))
+            .all()
+        )
+        return {
+            s.id: StructureSnapshot(
+                salary_structure_name=s.salary_structure_name,
+                payroll_frequency=s.payroll_frequency,
+                company=s.company,
+                currency=s.currency,
+                earnings=_structure_lines(s.earnings),
+                deductions=_structure_lines(s.deductions),
+            )
+            for s in structures
+        }
+
+    def _process_chunk(
+        self,
+        run: PayrollRun,
+        entry: PayrollEntry,
+        chunk: Sequence[Row],
+        structures: Dict[int, StructureSnapshot],
+        pool: Optional[Executor],
+        created_details: Optional[List[Dict[str, Any]]],
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        employee_ids = [a.employee_id for a in chunk]
+        existing = {
+            row.employee_id
+            for row in self.db.query(SalarySlip.employee_id).filter(
+                SalarySlip.employee_id.in_(employee_ids),
+                SalarySlip.start_date == entry.start_date,
+                SalarySlip.end_date == entry.end_date,
+            )
+        }
+        employees = {
+            row.id: row
+            for row in self.db.query(
+                Employee.id, Employee.employment_type, Employee.date_of_joining
+            ).filter(Employee.id.in_(employee_ids))
+        }
+
+        as_of = entry.posting_date or datetime.now().date()
+        configs: Dict[str, Dict[str, Any]] = {}
+        skipped: List[Dict[str, Any]] = []
+        todo: List[Tuple[Row, StructureSnapshot]] = []
+        inputs: List[SlipInput] = []
+
+        for assignment in chunk:
+            if assignment.employee_id in existing:
+                skipped.append(self._skip(assignment, "Salary slip already exists"))
+                continue
+            structure = structures.get(assignment.salary_structure_id)
+            if structure is None:
+                skipped.append(self._skip(assignment, "Salary structure not found"))
+                continue
+            employee = employees.get(assignment.employee_id)
+            employment_type = employee.employment_type if employee else None
+            months_of_service = _months_of_service(employee.date_of_joining, as_of) if employee else None
+            config = None
+            if employment_type:
+                if employment_type not in configs:
+                    configs[employment_type] = get_employment_type_config(self.db, employment_type)
+                config = configs[employment_type]
+
+            todo.append((assignment, structure))
+            inputs.append(SlipInput(
+                employee_id=assignment.employee_id,
+                base=assignment.base or ZERO,
+                employment_type=employment_type,
+                months_of_service=months_of_service,
+                employment_config=config,
+                earnings=structure.earnings,
+                deductions=structure.deductions,
+            ))
+
+        if not inputs:
+            return 0, skipped
+
+        compute = partial(
+            compute_slip,
+            payroll_date=entry.posting_date,
+            compliance_enabled=feature_flags.NIGERIA_COMPLIANCE_ENABLED,
+        )
+        if pool is not None:
+            workers = getattr(pool, "_max_workers", 1) or 1
+            plans = list(pool.map(compute, inputs, chunksize=max(1, len(inputs) // (workers * 4))))
+        else:
+            plans = [compute(slip) for slip in inputs]
+
+        now = datetime.utcnow()
+        slip_rows = [
+            {
+                "employee": assignment.employee,
+                "employee_id": assignment.employee_id,
+                "employee_name": assignment.employee_name,
+                "salary_structure": structure.salary_structure_name,
+                "posting_date": entry.posting_date,
+                "start_date": entry.start_date,
+                "end_date": entry.end_date,
+                "payroll_frequency": structure.payroll_frequency,
+                "company": entry.company or structure.company,
+                "currency": entry.currency or structure.currency,
+                "gross_pay": plan.gross_pay,
+                "total_deduction": plan.total_deduction,
+                "net_pay": plan.net_pay,
+                "rounded_total": plan.net_pay,
+                "status": SalarySlipStatus.DRAFT,
+                "payroll_entry": f"PAYROLL-{entry.id}",
+                "created_by_id": run.created_by_id,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (assignment, structure), plan in zip(todo, plans)
+        ]
+        # Match ids back by employee (one slip per employee per chunk) rather
+        # than by parameter order, which some backends only provide row by row
+        inserted = self.db.execute(
+            insert(SalarySlip).returning(SalarySlip.id, SalarySlip.employee_id),
+            slip_rows,
+        )
+        slip_id_by_employee = {row.employee_id: row.id for row in inserted}
+        slip_ids = [slip_id_by_employee[plan.employee_id] for plan in plans]
+
+        earning_rows: List[Dict[str, Any]] = []
+        deduction_rows: List[Dict[str, Any]] = []
+        for slip_id, plan in zip(slip_ids, plans):
+            earning_rows.extend(self._line_rows(slip_id, plan.earnings))
+            deduction_rows.extend(self._line_rows(slip_id, plan.deductions))
+        if earning_rows:
+            self.db.execute(insert(SalarySlipEarning), earning_rows)
+        if deduction_rows:
+            self.db.execute(insert(SalarySlipDeduction), deduction_rows)
+
+        if created_details is not None:
+            created_details.extend(
+                {
+                    "id": slip_id,
+                    "employee": assignment.employee,
+                    "employee_id": assignment.employee_id,
+                    "gross_pay": float(plan.gross_pay),
+                    "net_pay": float(plan.net_pay),
+                    "paye": float(plan.paye),
+                    "pension": float(plan.pension_employee),
+                    "is_paye_exempt": plan.is_paye_exempt,
+                }
+                for slip_id, (assignment, _), plan in zip(slip_ids, todo, plans)
+            )
+        return len(slip_ids), skipped
+
+    @staticmethod
+    def _line_rows(slip_id: int, lines: Sequence[SlipLine]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "salary_slip_id": slip_id,
+                "salary_component": line.salary_component,
+                "abbr": line.abbr,
+                "amount": line.amount,
+                "default_amount": line.amount,
+                "statistical_component": line.statistical_component,
+                "do_not_include_in_total": line.do_not_include_in_total,
+                "idx": idx,
+            }
+            for idx, line in enumerate(lines)
+        ]
+
+    @staticmethod
+    def _skip(assignment: Row, reason: str) -> Dict[str, Any]:
+        return {
+            "employee_id": assignment.employee_id,
+            "employee": assignment.employee,
+            "reason": reason,
+        }
+
+    def _complete(self, run: PayrollRun, entry: PayrollEntry) -> None:
+        entry.salary_slips_created = True
+        entry.updated_by_id = run.created_by_id
+
+        AuditLogger(self.db).log_create(
+            doctype="payroll_entry",
+            document_id=entry.id,
+            new_values={"slip_count": run.created_count, "payroll_run_id": run.id},
+            user_id=run.created_by_id,
+            document_name=f"Payroll {entry.start_date} to {entry.end_date}",
+            remarks=f"Generated {run.created_count} salary slips",
+        )
+
+        run.status = PayrollRunStatus.COMPLETED
+        run.completed_at = datetime.utcnow()
@@ -19,6 +19,7 @@ from app.models.performance import (
 )
 from app.models.employee import Employee
 from app.models.auth import User
+from app.services.employee_hierarchy import get_reports
 from app.services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
@@ -343,10 +344,7 @@ class PerformanceNotificationService:
         if not manager_employee:
             return {"success": False, "message": "Manager employee record not found"}
 
-        team_employees = self.db.query(Employee).filter(
-            Employee.reports_to == manager_employee.name,
-            Employee.status == 'Active'
-        ).all()
+        team_employees = get_reports(self.db, manager_employee.id, max_depth=1)
 
         team_employee_ids = [e.id for e in team_employees]
 
@@ -2,6 +2,8 @@
 Performance Service - Business logic for performance management
 
 Handles scorecard generation, team queries, finalization, and analytics.
+Team and reporting-chain queries read the employee_hierarchy closure table
+(app.services.employee_hierarchy) rather than walking reports_to_id.
 """
 import logging
 from datetime import datetime
@@ -25,6 +27,7 @@ from app.models.performance import (
 )
 from app.models.employee import Employee, EmploymentStatus
 from app.models.auth import User
+from app.services.employee_hierarchy import get_manager_chain, get_reports
 
 logger = logging.getLogger(__name__)
 
@@ -408,26 +411,7 @@ class PerformanceService:
         Returns:
             List of Employee objects
         """
-        team_members = []
-        visited = set()
-
-        def collect_reports(emp_id: int, depth: int = 0):
-            if depth >= max_depth or emp_id in visited:
-                return
-            visited.add(emp_id)
-
-            direct_reports = self.db.query(Employee).filter(
-                Employee.reports_to_id == emp_id,
-                Employee.status == EmploymentStatus.ACTIVE
-            ).all()
-
-            for report in direct_reports:
-                team_members.append(report)
-                if include_indirect:
-                    collect_reports(report.id, depth + 1)
-
-        collect_reports(manager_id)
-        return team_members
+        return get_reports(self.db, manager_id, max_depth=max_depth if include_indirect else min(max_depth, 1))
 
     def get_team_performance(
         self,
@@ -497,9 +481,10 @@ class PerformanceService:
         }
 
         # Team member details
+        team_by_id = {e.id: e for e in team_members}
         team_details = []
         for sc in scorecards:
-            emp = self.db.query(Employee).filter(Employee.id == sc.employee_id).first()
+            emp = team_by_id.get(sc.employee_id)
             team_details.append({
                 "employee_id": sc.employee_id,
                 "employee_name": emp.name if emp else "Unknown",
@@ -544,31 +529,16 @@ class PerformanceService:
 
         Returns list from immediate manager up to top.
         """
-        hierarchy = []
-        current_id = employee_id
-        depth = 0
-
-        while depth < max_depth:
-            emp = self.db.query(Employee).filter(Employee.id == current_id).first()
-            if not emp or not emp.reports_to_id:
-                break
-
-            manager = self.db.query(Employee).filter(Employee.id == emp.reports_to_id).first()
-            if not manager:
-                break
-
-            hierarchy.append({
-                "level": depth + 1,
+        return [
+            {
+                "level": level,
                 "employee_id": manager.id,
                 "name": manager.name,
                 "designation": manager.designation,
                 "department": manager.department,
-            })
-
-            current_id = manager.id
-            depth += 1
-
-        return hierarchy
+            }
+            for level, manager in get_manager_chain(self.db, employee_id, max_depth)
+        ]
 
     def get_org_tree_performance(
         self,
@@ -581,16 +551,24 @@ class PerformanceService:
 
         Useful for visualizing team structures with scores.
         """
-        def build_tree(emp_id: int, depth: int = 0) -> Optional[Dict[str, Any]]:
-            emp = self.db.query(Employee).filter(Employee.id == emp_id).first()
-            if not emp:
-                return None
+        root = self.db.query(Employee).filter(Employee.id == root_manager_id).first()
+        if not root:
+            return {}
 
-            # Get scorecard for this employee
-            scorecard = self.db.query(EmployeeScorecardInstance).filter(
-                EmployeeScorecardInstance.employee_id == emp_id,
-                EmployeeScorecardInstance.evaluation_period_id == period_id
-            ).first()
+        reports = get_reports(self.db, root_manager_id, max_depth=max_depth)
+        children: Dict[Optional[int], List[Employee]] = {}
+        for report in reports:
+            children.setdefault(report.reports_to_id, []).append(report)
+
+        scorecards: Dict[int, EmployeeScorecardInstance] = {}
+        for scorecard in self.db.query(EmployeeScorecardInstance).filter(
+            EmployeeScorecardInstance.evaluation_period_id == period_id,
+            EmployeeScorecardInstance.employee_id.in_([root.id] + [e.id for e in reports]),
+        ).order_by(EmployeeScorecardInstance.id):
+            scorecards.setdefault(scorecard.employee_id, scorecard)
+
+        def build_tree(emp: Employee) -> Dict[str, Any]:
+            scorecard = scorecards.get(emp.id)
 
             node: Dict[str, Any] = {
                 "employee_id": emp.id,
@@ -600,20 +578,9 @@ class PerformanceService:
                 "score": float(scorecard.total_weighted_score) if scorecard and scorecard.total_weighted_score else None,
                 "rating": scorecard.final_rating if scorecard else None,
                 "status": scorecard.status.value if scorecard and hasattr(scorecard.status, 'value') else (str(scorecard.status) if scorecard else None),
-                "children": [],
+                "children": [build_tree(report) for report in children.get(emp.id, [])],
             }
 
-            if depth < max_depth:
-                direct_reports = self.db.query(Employee).filter(
-                    Employee.reports_to_id == emp_id,
-                    Employee.status == EmploymentStatus.ACTIVE
-                ).all()
-
-                for report in direct_reports:
-                    child_node = build_tree(report.id, depth + 1)
-                    if child_node:
-                        node["children"].append(child_node)
-
             # Calculate aggregate for this node
             if node["children"]:
                 child_scores = [c["score"] for c in node["children"] if c["score"] is not None]
@@ -622,7 +589,7 @@ class PerformanceService:
 
             return node
 
-        return build_tree(root_manager_id) or {}
+        return build_tree(root)
 
     def get_department_ranking(
         self,
@@ -0,0 +1,500 @@
+"""
+Report Job Service
+
+Runs heavy accounting and tax reports in the background with persisted results:
+- Content-hash deduplication of identical report requests
+- Progress reporting while a report is computed
+- zlib-compressed result storage (database or disk)
+- JSON/CSV/PDF downloads rendered through ExportService
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.report_job import ReportJob, ReportJobStatus
+from app.utils.datetime_utils import utc_now
+
+logger = structlog.get_logger(__name__)
+
+ProgressCallback = Callable[[float, Optional[str]], None]
+
+
+class ReportJobError(Exception):
+    """Exception raised for report job errors."""
+    pass
+
+
+class ReportResultEncoder(json.JSONEncoder):
+    """JSON encoder for report payloads."""
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, Decimal):
+            return float(obj)
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
+        if hasattr(obj, "value") and hasattr(obj, "name"):  # Enum members
+            return obj.value
+        return super().default(obj)
+
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    """A report that can be computed by a background job."""
+    report_type: str
+    builder: Callable[[Session, Dict[str, Any], ProgressCallback], Dict[str, Any]]
+    description: str
+    exportable: bool = True  # Has CSV/PDF renderers in ExportService
+
+
+# =============================================================================
+# REPORT BUILDERS
+# =============================================================================
+
+
+def _iter_periods(start_period: str, end_period: Optional[str]) -> List[str]:
+    """Expand an inclusive YYYY-MM range into a list of periods."""
+    try:
+        year, month = map(int, start_period.split("-"))
+        end_year, end_month = map(int, (end_period or start_period).split("-"))
+    except (AttributeError, ValueError):
+        raise ReportJobError("Periods must be in YYYY-MM format")
+
+    periods: List[str] = []
+    while (year, month) <= (end_year, end_month):
+        periods.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    if not periods:
+        raise ReportJobError("end_period must not be before start_period")
+    return periods
+
+
+def _build_trial_balance(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.api.accounting.reports import get_trial_balance
+
+    progress(10, "Computing trial balance")
+    return get_trial_balance(
+        as_of_date=params.get("as_of_date"),
+        fiscal_year=params.get("fiscal_year"),
+        cost_center=params.get("cost_center"),
+        drill=False,
+        db=db,
+    )
+
+
+def _build_balance_sheet(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.api.accounting.reports import get_balance_sheet
+
+    progress(10, "Computing balance sheet")
+    return get_balance_sheet(
+        as_of_date=params.get("as_of_date"),
+        comparative_date=params.get("comparative_date"),
+        common_size=False,
+        currency=None,
+        include_prior_period=bool(params.get("include_prior_period", True)),
+        functional_currency=None,
+        presentation_currency_param=None,
+        db=db,
+    )
+
+
+def _income_statement(db: Session, params: Dict[str, Any], start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
+    from app.api.accounting.reports import get_income_statement
+
+    return get_income_statement(
+        start_date=start_date,
+        end_date=end_date,
+        fiscal_year=params.get("fiscal_year") if start_date is None else None,
+        cost_center=params.get("cost_center"),
+        compare_start=None,
+        compare_end=None,
+        show_ytd=False,
+        common_size=False,
+        basis=params.get("basis", "accrual"),
+        include_prior_period=False,
+        classification_basis="by_nature",
+        functional_currency=None,
+        presentation_currency=None,
+        weighted_avg_shares=None,
+        diluted_shares=None,
+        statutory_tax_rate=None,
+        db=db,
+    )
+
+
+def _build_income_statement(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    progress(10, "Computing income statement")
+    return _income_statement(db, params, params.get("start_date"), params.get("end_date"))
+
+
+def _build_income_statement_yoy(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """Year-over-year income statement, one calendar year per column."""
+    years = sorted({int(y) for y in params.get("years") or []})
+    if not years:
+        raise ReportJobError("At least one year is required")
+
+    statements: Dict[str, Dict[str, Any]] = {}
+    for index, year in enumerate(years):
+        progress(100 * index / len(years), f"Computing {year}")
+        statements[str(year)] = _income_statement(db, params, f"{year}-01-01", f"{year}-12-31")
+
+    return {
+        "years": [str(y) for y in years],
+        "basis": params.get("basis", "accrual"),
+        "statements": statements,
+    }
+
+
+def _build_vat_summary(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.nigerian_tax_service import NigerianTaxService
+
+    service = NigerianTaxService(db)
+    periods = _iter_periods(params["start_period"], params.get("end_period"))
+    rows: List[Dict[str, Any]] = []
+    for index, period in enumerate(periods):
+        progress(100 * index / len(periods), f"Summarising VAT for {period}")
+        rows.append(service.get_vat_summary(params["company"], period))
+
+    return {
+        "company": params["company"],
+        "start_period": periods[0],
+        "end_period": periods[-1],
+        "periods": rows,
+        "total_output_vat": sum((r["output_vat"] for r in rows), Decimal("0")),
+        "total_input_vat": sum((r["input_vat"] for r in rows), Decimal("0")),
+        "total_net_vat_payable": sum((r["net_vat_payable"] for r in rows), Decimal("0")),
+    }
+
+
+def _build_paye_summary(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.nigerian_tax_service import NigerianTaxService
+
+    service = NigerianTaxService(db)
+    periods = _iter_periods(params["start_period"], params.get("end_period"))
+    rows: List[Dict[str, Any]] = []
+    for index, period in enumerate(periods):
+        progress(100 * index / len(periods), f"Summarising PAYE for {period}")
+        rows.append(service.get_paye_summary(params["company"], period))
+
+    return {
+        "company": params["company"],
+        "start_period": periods[0],
+        "end_period": periods[-1],
+        "periods": rows,
+        "total_gross_income": sum((r["total_gross_income"] for r in rows), Decimal("0")),
+        "total_tax": sum((r["total_tax"] for r in rows), Decimal("0")),
+    }
+
+
+def _build_wht_remittance_due(db: Session, params: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    from app.services.nigerian_tax_service import NigerianTaxService
+
+    progress(10, "Collecting unremitted WHT")
+    data = NigerianTaxService(db).get_wht_remittance_due(params["company"])
+    data["transactions"] = [
+        {
+            "reference_number": t.reference_number,
+            "transaction_date": t.transaction_date,
+            "supplier_name": t.supplier_name,
+            "supplier_tin": t.supplier_tin,
+            "payment_type": t.payment_type,
+            "gross_amount": t.gross_amount,
+            "wht_rate": t.wht_rate,
+            "wht_amount": t.wht_amount,
+            "net_amount": t.net_amount,
+            "remittance_due_date": t.remittance_due_date,
+        }
+        for t in data["transactions"]
+    ]
+    data["company"] = params["company"]
+    return data
+
+
+REPORT_DEFINITIONS: Dict[str, ReportDefinition] = {
+    definition.report_type: definition
+    for definition in (
+        ReportDefinition("trial_balance", _build_trial_balance, "Trial balance"),
+        ReportDefinition("balance_sheet", _build_balance_sheet, "Balance sheet"),
+        ReportDefinition("income_statement", _build_income_statement, "Income statement"),
+        ReportDefinition(
+            "income_statement_yoy", _build_income_statement_yoy, "Year-over-year income statement"
+        ),
+        ReportDefinition("vat_summary", _build_vat_summary, "VAT summary over a range of periods"),
+        ReportDefinition("paye_summary", _build_paye_summary, "PAYE summary over a range of periods"),
+        ReportDefinition("wht_remittance_due", _build_wht_remittance_due, "Pending WHT remittances"),
+    )
+}
+
+# Reports scoped to the tax company rather than the accounting books
+TAX_REPORT_TYPES = {"vat_summary", "paye_summary", "wht_remittance_due"}
+
+
+# =============================================================================
+# SERVICE
+# =============================================================================
+
+
+def compute_params_hash(report_type: str, params: Optional[Dict[str, Any]]) -> str:
+    """Return a stable content hash for a report type and its parameters.
+
+    Parameters with a ``None`` value are dropped so that omitting a parameter
+    and passing it explicitly as null hash identically.
+    """
+    canonical = {k: v for k, v in (params or {}).items() if v is not None}
+    payload = json.dumps(
+        {"report_type": report_type, "params": canonical},
+        sort_keys=True,
+        separators=(",", ":"),
+        cls=ReportResultEncoder,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _as_aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class ReportJobService:
+    """Service for submitting, running and downloading background report jobs."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Submission and deduplication
+    # ------------------------------------------------------------------
+
+    def get_job(self, job_id: int) -> Optional[ReportJob]:
+        return self.db.query(ReportJob).filter(ReportJob.id == job_id).first()
+
+    def find_reusable_job(self, params_hash: str) -> Optional[ReportJob]:
+        """Find an in-flight job or an unexpired result for the same parameters."""
+        now = utc_now()
+        candidates = (
+            self.db.query(ReportJob)
+            .filter(
+                ReportJob.params_hash == params_hash,
+                ReportJob.status.in_([
+                    ReportJobStatus.PENDING,
+                    ReportJobStatus.RUNNING,
+                    ReportJobStatus.COMPLETED,
+                ]),
+                or_(ReportJob.expires_at.is_(None), ReportJob.expires_at > now),
+            )
+            .order_by(ReportJob.created_at.desc())
+            .all()
+        )
+
+        stale_before = now - timedelta(seconds=settings.report_job_stale_after_seconds)
+        for job in candidates:
+            if job.status == ReportJobStatus.COMPLETED:
+                return job
+            # Don't attach to jobs whose worker has evidently died
+            started = _as_aware(job.started_at or job.created_at)
+            if started and started >= stale_before:
+                return job
+        return None
+
+    def submit(
+        self,
+        report_type: str,
+        params: Optional[Dict[str, Any]] = None,
+        created_by_id: Optional[int] = None,
+        force: bool = False,
+    ) -> Tuple[ReportJob, bool]:
+        """Create a report job or reuse an identical one.
+
+        Args:
+            report_type: Key in REPORT_DEFINITIONS
+            params: Report parameters
+            created_by_id: Requesting user
+            force: Skip reuse of completed results (in-flight jobs are still reused)
+
+        Returns:
+            Tuple of (job, created). ``created`` is False when deduplicated.
+        """
+        if report_type not in REPORT_DEFINITIONS:
+            raise ReportJobError(f"Unknown report type: {report_type}")
+
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        params_hash = compute_params_hash(report_type, params)
+
+        existing = self.find_reusable_job(params_hash)
+        if existing and not (force and existing.status == ReportJobStatus.COMPLETED):
+            logger.info("report_job_deduplicated", job_id=existing.id, report_type=report_type)
+            return existing, False
+
+        job = ReportJob(
+            report_type=report_type,
+            params=params,
+            params_hash=params_hash,
+            status=ReportJobStatus.PENDING,
+            created_by_id=created_by_id,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info("report_job_created", job_id=job.id, report_type=report_type)
+        return job, True
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def update_progress(self, job: ReportJob, percent: float, message: Optional[str] = None) -> None:
+        """Persist job progress so pollers see it immediately."""
+        job.progress_percent = round(max(0.0, min(float(percent), 99.0)), 2)
+        job.progress_message = message[:255] if message else None
+        self.db.commit()
+
+    def run(self, job_id: int, task_id: Optional[str] = None) -> ReportJob:
+        """Compute the report for a job and store its compressed result."""
+        job = self.get_job(job_id)
+        if not job:
+            raise ReportJobError(f"Report job {job_id} not found")
+        if job.status == ReportJobStatus.COMPLETED:
+            return job
+
+        definition = REPORT_DEFINITIONS.get(job.report_type)
+        if not definition:
+            job.fail(f"Unknown report type: {job.report_type}")
+            self.db.commit()
+            return job
+
+        job.start(task_id)
+        self.db.commit()
+
+        # Builders report progress in 0-100 for the compute phase, which we map to 0-90
+        def progress(percent: float, message: Optional[str] = None) -> None:
+            self.update_progress(job, percent * 0.9, message)
+
+        try:
+            data = definition.builder(self.db, dict(job.params or {}), progress)
+            self.update_progress(job, 90, "Storing result")
+            self._store_result(job, data)
+            job.complete()
+            self.db.commit()
+            logger.info(
+                "report_job_completed",
+                job_id=job.id,
+                report_type=job.report_type,
+                size=job.result_size,
+                compressed_size=job.result_compressed_size,
+            )
+        except Exception as e:
+            self.db.rollback()
+            job = self.get_job(job_id) or job
+            job.fail(str(e))
+            self.db.commit()
+            logger.exception("report_job_failed", job_id=job_id, error=str(e))
+        return job
+
+    # ------------------------------------------------------------------
+    # Result storage
+    # ------------------------------------------------------------------
+
+    def _store_result(self, job: ReportJob, data: Dict[str, Any]) -> None:
+        raw = json.dumps(data, cls=ReportResultEncoder, separators=(",", ":")).encode("utf-8")
+        compressed = zlib.compress(raw, 6)
+
+        storage_dir = settings.report_job_storage_dir
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+            path = os.path.join(storage_dir, f"{job.params_hash}-{job.id}.json.z")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            job.result_path = path
+            job.result_data = None
+        else:
+            job.result_data = compressed
+            job.result_path = None
+
+        job.result_size = len(raw)
+        job.result_compressed_size = len(compressed)
+        job.expires_at = utc_now() + timedelta(hours=settings.report_job_result_ttl_hours)
+
+    def load_result_bytes(self, job: ReportJob) -> bytes:
+        """Return the decompressed JSON bytes of a completed job."""
+        if not job.has_result:
+            raise ReportJobError("Report result is not available")
+        if job.result_path:
+            try:
+                with open(job.result_path, "rb") as f:
+                    compressed = f.read()
+            except OSError as e:
+                raise ReportJobError(f"Report result could not be read: {e}")
+        else:
+            compressed = job.result_data or b""
+        return zlib.decompress(compressed)
+
+    def load_result(self, job: ReportJob) -> Dict[str, Any]:
+        return json.loads(self.load_result_bytes(job))
+
+    def render(self, job: ReportJob, fmt: str) -> Tuple[Any, str, str]:
+        """Render a completed job for download.
+
+        Returns:
+            Tuple of (content, media_type, file extension)
+        """
+        from app.services.export_service import ExportService
+
+        if fmt == "json":
+            return self.load_result_bytes(job), "application/json", "json"
+
+        definition = REPORT_DEFINITIONS.get(job.report_type)
+        if not definition or not definition.exportable:
+            raise ReportJobError(f"Report type {job.report_type} can only be downloaded as JSON")
+
+        export_service = ExportService()
+        data = self.load_result(job)
+        if fmt == "csv":
+            return export_service.export_csv(data, job.report_type), "text/csv", "csv"
+        if fmt == "pdf":
+            return export_service.export_pdf(data, job.report_type), "application/pdf", "pdf"
+        raise ReportJobError("Format must be 'json', 'csv' or 'pdf'")
+
+    # ------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------
+
+    def purge_expired(self, limit: int = 500) -> int:
+        """Delete expired results (and their files) plus old failed jobs."""
+        now = utc_now()
+        failed_before = now - timedelta(hours=settings.report_job_result_ttl_hours)
+        jobs = (
+            self.db.query(ReportJob)
+            .filter(
+                or_(
+                    ReportJob.expires_at < now,
+                    (ReportJob.status == ReportJobStatus.FAILED) & (ReportJob.completed_at < failed_before),
+                )
+            )
+            .limit(limit)
+            .all()
+        )
+        for job in jobs:
+            if job.result_path:
+                try:
+                    os.remove(job.result_path)
+                except OSError:
+                    pass
+            self.db.delete(job)
+        self.db.commit()
+        return len(jobs)
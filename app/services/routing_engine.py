@@ -9,11 +9,18 @@ from typing import Optional, Dict, Any, List, TypedDict
 
 import structlog
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
 from app.models.support_sla import RoutingRule, RoutingRoundRobinState, RoutingStrategy
 from app.models.agent import Agent, Team, TeamMember
-from app.models.ticket import Ticket, TicketStatus
+from app.models.ticket import OPEN_TICKET_STATUSES, Ticket, TicketStatus
+from app.services.agent_workload import (
+    AgentPool,
+    agent_capacity,
+    agent_loads,
+    agent_name,
+    pool_for,
+)
+from app.services.rule_compiler import RuleSet, load_rule_set
 
 logger = structlog.get_logger()
 
@@ -26,13 +33,57 @@ class WorkloadEntry(TypedDict):
     utilization: float
 
 
+class AssignmentBatch:
+    """Caches shared by the tickets of one auto_assign_batch pass.
+
+    The rule set, matched rules, team rosters and teams are loaded once.
+    Agent loads are read from the workload counters once per agent and then
+    bumped in memory as tickets are assigned, so later picks in the batch
+    see earlier ones without re-querying.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rule_set: RuleSet = load_rule_set(db, RoutingRule)
+        self.loads: Dict[str, int] = {}
+        self._rules: Dict[int, Optional[RoutingRule]] = {}
+        self._agents: Dict[int, List[Agent]] = {}
+        self._pools: Dict[tuple, AgentPool] = {}
+        self._teams: Dict[int, Optional[Team]] = {}
+
+    def rule(self, rule_id: int) -> Optional[RoutingRule]:
+        if rule_id not in self._rules:
+            self._rules[rule_id] = self.db.get(RoutingRule, rule_id)
+        return self._rules[rule_id]
+
+    def agents(self, engine: "RoutingEngine", rule: RoutingRule) -> List[Agent]:
+        if rule.id not in self._agents:
+            self._agents[rule.id] = engine.get_available_agents(rule)
+        return self._agents[rule.id]
+
+    def pool(self, agents: List[Agent]) -> AgentPool:
+        key = tuple(agent.id for agent in agents)
+        if key not in self._pools:
+            self._pools[key] = pool_for(self.db, agents, self.loads)
+        return self._pools[key]
+
+    def team(self, team_id: int) -> Optional[Team]:
+        if team_id not in self._teams:
+            self._teams[team_id] = self.db.query(Team).filter(Team.id == team_id).first()
+        return self._teams[team_id]
+
+    def record_assignment(self, agent: Agent) -> None:
+        name = agent_name(agent)
+        self.loads[name] = self.loads.get(name, 0) + 1
+
+
 class RoutingEngine:
     """Service for automatic ticket routing and agent assignment."""
 
     def __init__(self, db: Session):
         self.db = db
 
-    def auto_assign(self, ticket: Ticket) -> Dict[str, Any]:
+    def auto_assign(self, ticket: Ticket, batch: Optional[AssignmentBatch] = None) -> Dict[str, Any]:
         """Automatically assign a ticket to an agent.
 
         Finds the best matching routing rule and assigns an agent based on
@@ -40,6 +91,7 @@ class RoutingEngine:
 
         Args:
             ticket: Ticket to assign
+            batch: Shared caches when assigning a batch; the caller commits
 
         Returns:
             Dict with assignment results
@@ -52,7 +104,11 @@ class RoutingEngine:
             }
 
         # Find matching routing rule
-        rule = self.find_matching_rule(ticket)
+        if batch:
+            matched = batch.rule_set.first_match(ticket)
+            rule = batch.rule(matched.rule_id) if matched else None
+        else:
+            rule = self.find_matching_rule(ticket)
         if not rule:
             logger.debug(
                 "routing_no_rule_matched",
@@ -72,7 +128,7 @@ class RoutingEngine:
             }
 
         # Get available agents
-        agents = self.get_available_agents(rule)
+        agents = batch.agents(self, rule) if batch else self.get_available_agents(rule)
         if not agents:
             logger.warning(
                 "routing_no_agents_available",
@@ -86,7 +142,7 @@ class RoutingEngine:
             }
 
         # Select agent based on strategy
-        selected = self.select_agent(ticket, agents, rule)
+        selected = self.select_agent(ticket, agents, rule, batch.pool(agents) if batch else None)
         if not selected:
             return {
                 "assigned": False,
@@ -97,11 +153,17 @@ class RoutingEngine:
         # Perform assignment
         ticket.assigned_to = selected.display_name or selected.email
         if rule.team_id:
-            team = self.db.query(Team).filter(Team.id == rule.team_id).first()
+            if batch:
+                team = batch.team(rule.team_id)
+            else:
+                team = self.db.query(Team).filter(Team.id == rule.team_id).first()
             if team:
                 ticket.resolution_team = team.name
         ticket.updated_at = datetime.utcnow()
-        self.db.commit()
+        if batch:
+            batch.record_assignment(selected)
+        else:
+            self.db.commit()
 
         logger.info(
             "ticket_auto_assigned",
@@ -126,6 +188,7 @@ class RoutingEngine:
         """Find the routing rule that matches a ticket.
 
         Rules are evaluated in priority order (lower = higher priority).
+        A rule without conditions matches every ticket.
 
         Args:
             ticket: Ticket to match
@@ -133,71 +196,19 @@ class RoutingEngine:
         Returns:
             Matching routing rule or None
         """
-        rules = self.db.query(RoutingRule).filter(
-            RoutingRule.is_active == True
-        ).order_by(RoutingRule.priority).all()
-
-        for rule in rules:
-            conditions = rule.conditions if isinstance(rule.conditions, list) else None
-            if self._evaluate_conditions(conditions, ticket):
-                logger.debug(
-                    "routing_rule_matched",
-                    ticket_id=ticket.id,
-                    rule_id=rule.id,
-                    rule_name=rule.name,
-                )
-                return rule
-
-        return None
-
-    def _evaluate_conditions(
-        self,
-        conditions: Optional[List[Dict[str, Any]]],
-        ticket: Ticket,
-    ) -> bool:
-        """Evaluate if ticket matches rule conditions."""
-        if not conditions:
-            return True  # No conditions = catch-all
-
-        for condition in conditions:
-            field = condition.get("field", "")
-            operator = condition.get("operator", "")
-            value = condition.get("value")
-
-            ticket_value = getattr(ticket, field, None)
-            if ticket_value is not None and hasattr(ticket_value, "value"):
-                ticket_value = ticket_value.value
-
-            if not self._check_condition(ticket_value, operator, value):
-                return False
-
-        return True
-
-    def _check_condition(self, actual: Any, operator: str, expected: Any) -> bool:
-        """Check a single condition."""
-        if operator == "equals":
-            return str(actual) == str(expected)
-        elif operator == "not_equals":
-            return str(actual) != str(expected)
-        elif operator == "contains":
-            return expected in str(actual or "")
-        elif operator == "not_contains":
-            return expected not in str(actual or "")
-        elif operator == "in_list":
-            val_list = expected if isinstance(expected, list) else [expected]
-            return str(actual) in val_list
-        elif operator == "not_in_list":
-            val_list = expected if isinstance(expected, list) else [expected]
-            return str(actual) not in val_list
-        elif operator == "is_empty":
-            return actual is None or actual == ""
-        elif operator == "is_not_empty":
-            return actual is not None and actual != ""
-        elif operator == "starts_with":
-            return str(actual or "").startswith(str(expected))
-        elif operator == "ends_with":
-            return str(actual or "").endswith(str(expected))
-        return False
+        matched = load_rule_set(self.db, RoutingRule).first_match(ticket)
+        if not matched:
+            return None
+
+        rule = self.db.get(RoutingRule, matched.rule_id)
+        if rule:
+            logger.debug(
+                "routing_rule_matched",
+                ticket_id=ticket.id,
+                rule_id=rule.id,
+                rule_name=rule.name,
+            )
+        return rule
 
     def get_available_agents(self, rule: RoutingRule) -> List[Agent]:
         """Get list of available agents for a routing rule.
@@ -248,6 +259,7 @@ class RoutingEngine:
         ticket: Ticket,
         agents: List[Agent],
         rule: RoutingRule,
+        pool: Optional[AgentPool] = None,
     ) -> Optional[Agent]:
         """Select the best agent based on routing strategy.
 
@@ -255,6 +267,7 @@ class RoutingEngine:
             ticket: Ticket being assigned
             agents: Available agents
             rule: Routing rule with strategy
+            pool: Workload pool for these agents (loaded on demand if omitted)
 
         Returns:
             Selected agent or None
@@ -264,11 +277,11 @@ class RoutingEngine:
         if strategy == RoutingStrategy.ROUND_ROBIN.value:
             return self._round_robin(rule.team_id or 0, agents)
         elif strategy == RoutingStrategy.LEAST_BUSY.value:
-            return self._least_busy(agents)
+            return self._least_busy(agents, pool)
         elif strategy == RoutingStrategy.SKILL_BASED.value:
             return self._skill_based(ticket, agents)
         elif strategy == RoutingStrategy.LOAD_BALANCED.value:
-            return self._load_balanced(agents)
+            return self._load_balanced(agents, pool)
         else:
             # Default to first available
             return agents[0] if agents else None
@@ -311,32 +324,13 @@ class RoutingEngine:
 
         return selected
 
-    def _least_busy(self, agents: List[Agent]) -> Optional[Agent]:
+    def _least_busy(self, agents: List[Agent], pool: Optional[AgentPool] = None) -> Optional[Agent]:
         """Select agent with fewest open tickets."""
         if not agents:
             return None
 
-        ticket_counts: Dict[int, int] = {}
-        for agent in agents:
-            name: str = agent.display_name or agent.email or f"agent-{agent.id}"
-            name = str(name)
-            count = self.db.query(func.count(Ticket.id)).filter(
-                Ticket.assigned_to == name,
-                Ticket.status.in_([
-                    TicketStatus.OPEN,
-                    TicketStatus.REPLIED,
-                    TicketStatus.ON_HOLD
-                ])
-            ).scalar() or 0
-            ticket_counts[agent.id] = count
-
-        # Find minimum
-        min_count = min(ticket_counts.values())
-        for agent in agents:
-            if ticket_counts[agent.id] == min_count:
-                return agent
-
-        return agents[0]
+        pool = pool or pool_for(self.db, agents)
+        return pool.least_busy() or agents[0]
 
     def _skill_based(self, ticket: Ticket, agents: List[Agent]) -> Optional[Agent]:
         """Select agent based on skill matching."""
@@ -381,38 +375,13 @@ class RoutingEngine:
 
         return best_match or agents[0]
 
-    def _load_balanced(self, agents: List[Agent]) -> Optional[Agent]:
+    def _load_balanced(self, agents: List[Agent], pool: Optional[AgentPool] = None) -> Optional[Agent]:
         """Select agent based on capacity utilization."""
         if not agents:
             return None
 
-        best_agent = None
-        lowest_utilization = float('inf')
-
-        for agent in agents:
-            capacity = agent.capacity or 10
-            name = agent.display_name or agent.email or f"agent-{agent.id}"
-
-            current_load = self.db.query(func.count(Ticket.id)).filter(
-                Ticket.assigned_to == name,
-                Ticket.status.in_([
-                    TicketStatus.OPEN,
-                    TicketStatus.REPLIED,
-                    TicketStatus.ON_HOLD
-                ])
-            ).scalar() or 0
-
-            utilization = current_load / capacity if capacity > 0 else float('inf')
-
-            # Skip if at or over capacity
-            if utilization >= 1.0:
-                continue
-
-            if utilization < lowest_utilization:
-                lowest_utilization = utilization
-                best_agent = agent
-
-        return best_agent
+        pool = pool or pool_for(self.db, agents)
+        return pool.load_balanced()
 
     def get_workload_summary(self, team_id: Optional[int] = None) -> Dict[str, Any]:
         """Get workload summary for agents.
@@ -434,23 +403,15 @@ class RoutingEngine:
             query = query.filter(Agent.id.in_(agent_ids))
 
         agents = query.all()
+        loads = agent_loads(self.db, agents)
 
         total_capacity = 0
         total_load = 0
         agent_data: List[Dict[str, Any]] = []
 
         for agent in agents:
-            capacity = agent.capacity or 10
-            name: str = agent.display_name or agent.email or f"agent-{agent.id}"
-
-            load = self.db.query(func.count(Ticket.id)).filter(
-                Ticket.assigned_to == name,
-                Ticket.status.in_([
-                    TicketStatus.OPEN,
-                    TicketStatus.REPLIED,
-                    TicketStatus.ON_HOLD
-                ])
-            ).scalar() or 0
+            capacity = agent_capacity(agent)
+            load = loads[agent.id]
 
             total_capacity += capacity
             total_load += load
@@ -509,19 +470,12 @@ class RoutingEngine:
             }
 
         # Calculate current workloads
+        loads = agent_loads(self.db, agents)
         workloads: Dict[int, WorkloadEntry] = {}
         for agent in agents:
-            name: str = agent.display_name or agent.email or f"agent-{agent.id}"
-            capacity = agent.capacity or 10
-
-            load = self.db.query(func.count(Ticket.id)).filter(
-                Ticket.assigned_to == name,
-                Ticket.status.in_([
-                    TicketStatus.OPEN,
-                    TicketStatus.REPLIED,
-                    TicketStatus.ON_HOLD
-                ])
-            ).scalar() or 0
+            name = agent_name(agent)
+            capacity = agent_capacity(agent)
+            load = loads[agent.id]
 
             workloads[agent.id] = {
                 "agent": agent,
@@ -630,11 +584,16 @@ class RoutingEngine:
         """
         return self.db.query(Ticket).filter(
             Ticket.assigned_to.is_(None),
-            Ticket.status.in_([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD])
+            Ticket.status.in_(OPEN_TICKET_STATUSES)
         ).order_by(Ticket.created_at).limit(limit).all()
 
     def auto_assign_batch(self, limit: int = 50) -> Dict[str, Any]:
-        """Auto-assign multiple unassigned tickets.
+        """Auto-assign multiple unassigned tickets in one pass.
+
+        Rules, rosters and agent loads are loaded once for the batch and
+        each pick accounts for the tickets already assigned in it, so
+        load-balanced routing never fills an agent past capacity. The
+        batch commits once at the end.
 
         Args:
             limit: Maximum tickets to process
@@ -648,9 +607,10 @@ class RoutingEngine:
         assigned = 0
         failed = 0
         details: List[Dict[str, Any]] = []
+        batch = AssignmentBatch(self.db)
 
         for ticket in tickets:
-            result = self.auto_assign(ticket)
+            result = self.auto_assign(ticket, batch)
             if result.get("assigned"):
                 assigned += 1
             else:
@@ -661,6 +621,8 @@ class RoutingEngine:
                 **result,
             })
 
+        self.db.commit()
+
         results = {
             "processed": processed,
             "assigned": assigned,
@@ -0,0 +1,467 @@
+"""Compiled rule evaluation for routing, SLA and automation rules.
+
+Rule conditions are JSON lists of ``{"field", "operator", "value"}`` dicts.
+Instead of dispatching on operator strings for every ticket, conditions are
+compiled once into predicates:
+- Operator semantics follow ConditionOperator; a predicate that raises
+  TypeError/ValueError counts as not matched
+- Fields prefixed ``context.`` read from the evaluation context, other fields
+  from the ticket (enum values are compared by ``.value``)
+- Rules are indexed by the field most often tested with equals/in_list
+  (typically ``ticket_type`` or ``priority``), so a ticket only evaluates the
+  rules whose indexed condition can match plus the unindexed rules
+
+Compiled rule sets are cached per process and keyed by table and scope. Each
+lookup checks a version stamp (row count, max id and max updated_at of the
+scope) with one aggregate query, so edits from any process are picked up.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import structlog
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.support_automation import ConditionOperator
+
+logger = structlog.get_logger()
+
+Predicate = Callable[[Any], bool]
+
+CONTEXT_PREFIX = "context."
+
+# Operators whose matching values can be enumerated for the rule index
+INDEXABLE_OPERATORS = (ConditionOperator.EQUALS.value, ConditionOperator.IN_LIST.value)
+
+
+def normalize_conditions(conditions: Any) -> List[Dict[str, Any]]:
+    """Return conditions as a list of condition dicts (a single dict is wrapped)."""
+    if isinstance(conditions, dict):
+        return [conditions] if conditions else []
+    if isinstance(conditions, list):
+        return [c for c in conditions if isinstance(c, dict)]
+    return []
+
+
+def field_getter(field_name: str) -> Callable[[Any, Optional[Dict[str, Any]]], Any]:
+    """Build a reader for a condition field from the context or the ticket."""
+    if field_name.startswith(CONTEXT_PREFIX):
+        key = field_name[len(CONTEXT_PREFIX):]
+        return lambda ticket, context: (context or {}).get(key)
+
+    def get(ticket: Any, context: Optional[Dict[str, Any]]) -> Any:
+        value = getattr(ticket, field_name, None)
+        return value.value if isinstance(value, Enum) else value
+
+    return get
+
+
+def resolve_field(ticket: Any, field_name: str, context: Optional[Dict[str, Any]] = None) -> Any:
+    """Read a condition field from the context or the ticket."""
+    return field_getter(field_name)(ticket, context)
+
+
+def _list_values(expected: Any) -> List[str]:
+    values = expected if isinstance(expected, list) else [expected]
+    return [str(v) for v in values]
+
+
+def _number_predicate(expected: Any, compare: Callable[[float, float], bool]) -> Predicate:
+    try:
+        bound = float(expected)
+    except (TypeError, ValueError):
+        return lambda actual: False
+    return lambda actual: compare(float(actual), bound)
+
+
+def _build_predicate(operator: str, expected: Any) -> Predicate:
+    """Build the raw predicate for an operator (may raise on bad input)."""
+    if operator == ConditionOperator.EQUALS.value:
+        expected_str = str(expected)
+        return lambda actual: str(actual) == expected_str
+    if operator == ConditionOperator.NOT_EQUALS.value:
+        expected_str = str(expected)
+        return lambda actual: str(actual) != expected_str
+    if operator == ConditionOperator.CONTAINS.value:
+        return lambda actual: expected in str(actual or "")
+    if operator == ConditionOperator.NOT_CONTAINS.value:
+        return lambda actual: expected not in str(actual or "")
+    if operator == ConditionOperator.STARTS_WITH.value:
+        prefix = str(expected)
+        return lambda actual: str(actual or "").startswith(prefix)
+    if operator == ConditionOperator.ENDS_WITH.value:
+        suffix = str(expected)
+        return lambda actual: str(actual or "").endswith(suffix)
+    if operator == ConditionOperator.IN_LIST.value:
+        values = frozenset(_list_values(expected))
+        return lambda actual: str(actual) in values
+    if operator == ConditionOperator.NOT_IN_LIST.value:
+        values = frozenset(_list_values(expected))
+        return lambda actual: str(actual) not in values
+    if operator == ConditionOperator.GREATER_THAN.value:
+        return _number_predicate(expected, lambda a, b: a > b)
+    if operator == ConditionOperator.LESS_THAN.value:
+        return _number_predicate(expected, lambda a, b: a < b)
+    if operator == ConditionOperator.GREATER_OR_EQUAL.value:
+        return _number_predicate(expected, lambda a, b: a >= b)
+    if operator == ConditionOperator.LESS_OR_EQUAL.value:
+        return _number_predicate(expected, lambda a, b: a <= b)
+    if operator == ConditionOperator.IS_EMPTY.value:
+        return lambda actual: actual is None or actual == ""
+    if operator == ConditionOperator.IS_NOT_EMPTY.value:
+        return lambda actual: actual is not None and actual != ""
+    if operator == ConditionOperator.REGEX_MATCH.value:
+        try:
+            pattern = re.compile(expected)
+        except (re.error, TypeError):
+            return lambda actual: False
+        return lambda actual: pattern.search(str(actual or "")) is not None
+    return lambda actual: False
+
+
+def _safe(raw: Predicate) -> Predicate:
+    def predicate(actual: Any) -> bool:
+        try:
+            return bool(raw(actual))
+        except (TypeError, ValueError):
+            return False
+
+    return predicate
+
+
+def _comparison_check(field_name: str, operator: str, expected: Any) -> Optional[Callable[[Any, Any], bool]]:
+    """Fused field read + comparison for the common string operators."""
+    if field_name.startswith(CONTEXT_PREFIX):
+        return None
+    if operator in (ConditionOperator.EQUALS.value, ConditionOperator.NOT_EQUALS.value):
+        expected_str = str(expected)
+        negate = operator == ConditionOperator.NOT_EQUALS.value
+
+        def check_equals(ticket: Any, context: Any) -> bool:
+            value = getattr(ticket, field_name, None)
+            if isinstance(value, Enum):
+                value = value.value
+            return (str(value) == expected_str) is not negate
+
+        return check_equals
+    if operator in (ConditionOperator.IN_LIST.value, ConditionOperator.NOT_IN_LIST.value):
+        values = frozenset(_list_values(expected))
+        negate = operator == ConditionOperator.NOT_IN_LIST.value
+
+        def check_in(ticket: Any, context: Any) -> bool:
+            value = getattr(ticket, field_name, None)
+            if isinstance(value, Enum):
+                value = value.value
+            return (str(value) in values) is not negate
+
+        return check_in
+    return None
+
+
+def compile_predicate(operator: str, expected: Any) -> Predicate:
+    """Compile one operator/value pair into a predicate over the field value."""
+    return _safe(_build_predicate(operator, expected))
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """A single compiled condition.
+
+    ``raw`` and ``check`` (field read + raw) may raise on values they cannot
+    compare; ``test`` treats that as not matched.
+    """
+    field: str
+    operator: str
+    expected: Any
+    get: Callable[[Any, Optional[Dict[str, Any]]], Any]
+    raw: Predicate
+    check: Callable[[Any, Optional[Dict[str, Any]]], bool]
+
+    @classmethod
+    def from_json(cls, condition: Dict[str, Any]) -> "CompiledCondition":
+        field_name = condition.get("field", "")
+        operator = condition.get("operator", "")
+        expected = condition.get("value")
+        get = field_getter(field_name)
+        raw = _build_predicate(operator, expected)
+        check = _comparison_check(field_name, operator, expected)
+        return cls(
+            field=field_name,
+            operator=operator,
+            expected=expected,
+            get=get,
+            raw=raw,
+            check=check or (lambda ticket, context: raw(get(ticket, context))),
+        )
+
+    def test(self, actual: Any) -> bool:
+        return _safe(self.raw)(actual)
+
+    def index_keys(self) -> Optional[frozenset]:
+        """Field values (as strings) that can satisfy this condition, if enumerable."""
+        if self.field.startswith(CONTEXT_PREFIX) or self.operator not in INDEXABLE_OPERATORS:
+            return None
+        if self.operator == ConditionOperator.EQUALS.value:
+            return frozenset([str(self.expected)])
+        return frozenset(_list_values(self.expected))
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A rule's conditions compiled for evaluation.
+
+    Attributes:
+        rule_id: Primary key of the rule row
+        position: Evaluation order within its rule set
+        conditions: Compiled conditions (all must match)
+        empty_matches: Result for a rule without conditions
+    """
+    rule_id: int
+    position: int
+    conditions: Tuple[CompiledCondition, ...]
+    empty_matches: bool = True
+    _checks: Tuple[Callable[[Any, Optional[Dict[str, Any]]], bool], ...] = field(
+        default=(), init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_checks", tuple(c.check for c in self.conditions))
+
+    def matches(self, ticket: Any, context: Optional[Dict[str, Any]] = None) -> bool:
+        if not self._checks:
+            return self.empty_matches
+        try:
+            for check in self._checks:
+                if not check(ticket, context):
+                    return False
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def explain(self, ticket: Any, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Evaluate every condition and report which matched."""
+        result: Dict[str, Any] = {
+            "all_matched": bool(self.conditions) or self.empty_matches,
+            "matched": [],
+            "not_matched": [],
+        }
+        for condition in self.conditions:
+            actual = condition.get(ticket, context)
+            matched = condition.test(actual)
+            info = {
+                "field": condition.field,
+                "operator": condition.operator,
+                "expected": condition.expected,
+                "actual": str(actual) if actual is not None else None,
+                "matched": matched,
+            }
+            if matched:
+                result["matched"].append(info)
+            else:
+                result["not_matched"].append(info)
+                result["all_matched"] = False
+        return result
+
+
+def compile_rule(rule_id: int, position: int, conditions: Any, empty_matches: bool = True) -> CompiledRule:
+    """Compile a rule's JSON conditions."""
+    return CompiledRule(
+        rule_id=rule_id,
+        position=position,
+        conditions=tuple(CompiledCondition.from_json(c) for c in normalize_conditions(conditions)),
+        empty_matches=empty_matches,
+    )
+
+
+@dataclass
+class RuleSet:
+    """Ordered compiled rules with an equality index on one field.
+
+    Attributes:
+        rules: Rules in evaluation order
+        version: Version stamp the rules were compiled at
+        default_rule_id: Rule to fall back to when nothing matches (SLA policies)
+    """
+    rules: Sequence[CompiledRule]
+    version: Hashable = None
+    default_rule_id: Optional[int] = None
+    index_field: Optional[str] = field(default=None, init=False)
+    _buckets: Dict[str, List[CompiledRule]] = field(default_factory=dict, init=False, repr=False)
+    _unindexed: List[CompiledRule] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.rules = list(self.rules)
+        counts: Dict[str, int] = {}
+        for rule in self.rules:
+            for field_name in {c.field for c in rule.conditions if c.index_keys() is not None}:
+                counts[field_name] = counts.get(field_name, 0) + 1
+        if counts:
+            self.index_field = min(counts, key=lambda name: (-counts[name], name))
+
+        for rule in self.rules:
+            keys = self._rule_index_keys(rule)
+            if keys is None:
+                self._unindexed.append(rule)
+                continue
+            for key in keys:
+                self._buckets.setdefault(key, []).append(rule)
+
+    def _rule_index_keys(self, rule: CompiledRule) -> Optional[frozenset]:
+        if self.index_field is None:
+            return None
+        for condition in rule.conditions:
+            if condition.field == self.index_field:
+                keys = condition.index_keys()
+                if keys is not None:
+                    return keys
+        return None
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidates(self, ticket: Any, after: int = -1) -> Iterator[CompiledRule]:
+        """Rules (in order, positioned after ``after``) that could match ticket."""
+        if self.index_field is None:
+            bucket: List[CompiledRule] = []
+        else:
+            bucket = self._buckets.get(str(resolve_field(ticket, self.index_field)), [])
+
+        def tail(rules: List[CompiledRule]) -> List[CompiledRule]:
+            return rules[bisect_right(rules, after, key=lambda r: r.position):]
+
+        if not bucket:
+            return iter(tail(self._unindexed))
+        return heapq.merge(tail(bucket), tail(self._unindexed), key=lambda r: r.position)
+
+    def first_match(
+        self,
+        ticket: Any,
+        context: Optional[Dict[str, Any]] = None,
+        after: int = -1,
+    ) -> Optional[CompiledRule]:
+        """First rule after position ``after`` whose conditions match."""
+        for rule in self.candidates(ticket, after):
+            if rule.matches(ticket, context):
+                return rule
+        return None
+
+    def matches(self, ticket: Any, context: Optional[Dict[str, Any]] = None) -> Iterator[CompiledRule]:
+        """All matching rules in order.
+
+        Each step re-reads the ticket, so actions applied between steps are
+        seen by the conditions of later rules.
+        """
+        after = -1
+        while True:
+            rule = self.first_match(ticket, context, after)
+            if rule is None:
+                return
+            yield rule
+            after = rule.position
+
+
+def compile_rule_set(
+    rows: Iterable[Tuple[int, Any]],
+    empty_matches: bool = True,
+    version: Hashable = None,
+    default_rule_id: Optional[int] = None,
+) -> RuleSet:
+    """Compile ``(rule_id, conditions)`` rows, already in evaluation order."""
+    return RuleSet(
+        rules=[
+            compile_rule(rule_id, position, conditions, empty_matches)
+            for position, (rule_id, conditions) in enumerate(rows)
+        ],
+        version=version,
+        default_rule_id=default_rule_id,
+    )
+
+
+# =============================================================================
+# PROCESS CACHE
+# =============================================================================
+
+_cache: Dict[Hashable, RuleSet] = {}
+_cache_lock = threading.Lock()
+
+
+def _scope_filters(model: Any, scope: Dict[str, Any]) -> List[Any]:
+    return [getattr(model, column) == value for column, value in scope.items()]
+
+
+def rule_set_version(db: Session, model: Any, scope: Optional[Dict[str, Any]] = None) -> Tuple[Any, ...]:
+    """Version stamp of all rows (active or not) in a rule table scope."""
+    row = db.query(
+        func.count(model.id),
+        func.max(model.id),
+        func.max(model.updated_at),
+    ).filter(*_scope_filters(model, scope or {})).one()
+    return tuple(row)
+
+
+def load_rule_set(
+    db: Session,
+    model: Any,
+    scope: Optional[Dict[str, Any]] = None,
+    empty_matches: bool = True,
+    default_flag: Optional[str] = None,
+) -> RuleSet:
+    """Return the compiled active rules of a table, recompiling when stale.
+
+    Rules are ordered by ``priority`` then ``id``. ``scope`` restricts rows by
+    column equality (e.g. ``{"trigger": "ticket_created"}``); ``default_flag``
+    names a boolean column marking the fallback rule.
+    """
+    scope = scope or {}
+    key = (model.__tablename__, tuple(sorted(scope.items())))
+    version = rule_set_version(db, model, scope)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+
+    columns = [model.id, model.conditions]
+    if default_flag:
+        columns.append(getattr(model, default_flag))
+    rows = db.query(*columns).filter(
+        model.is_active == True,
+        *_scope_filters(model, scope),
+    ).order_by(model.priority, model.id).all()
+
+    default_rule_id = None
+    if default_flag:
+        default_rule_id = next((row[0] for row in rows if row[2]), None)
+
+    rule_set = compile_rule_set(
+        ((row[0], row[1]) for row in rows),
+        empty_matches=empty_matches,
+        version=version,
+        default_rule_id=default_rule_id,
+    )
+    with _cache_lock:
+        _cache[key] = rule_set
+    logger.debug(
+        "rule_set_compiled",
+        table=model.__tablename__,
+        scope=scope,
+        rules=len(rule_set),
+        index_field=rule_set.index_field,
+    )
+    return rule_set
+
+
+def invalidate_rule_sets(model: Optional[Any] = None) -> None:
+    """Drop cached rule sets for a table (or all tables) in this process."""
+    with _cache_lock:
+        if model is None:
+            _cache.clear()
+            return
+        for key in [k for k in _cache if k[0] == model.__tablename__]:
+            del _cache[key]
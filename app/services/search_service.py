@@ -0,0 +1,240 @@
+"""
+Search index service.
+
+Ranked, index-backed text search for the Data Explorer global search and the
+knowledge base:
+- Postgres: pg_trgm GIN indexes serve substring matches ranked by
+  word_similarity; KB articles are matched against a weighted ``search_vector``
+  tsvector column kept current by a trigger (prefix matching via ``:*``)
+- SQLite: FTS5 external-content tables using the trigram tokenizer, kept in
+  sync by triggers created by ``ensure_search_indexes``
+- Other databases, terms shorter than a trigram, or a missing index: ILIKE
+
+Matches that start with the search term always rank above other matches.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import structlog
+from sqlalchemy import Float, Integer, case, func, literal, literal_column, or_, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Query, Session
+
+from app.models.customer import Customer
+from app.models.employee import Employee
+from app.models.invoice import Invoice
+from app.models.pop import Pop
+from app.models.support_kb import KBArticle
+
+logger = structlog.get_logger(__name__)
+
+# Trigram indexes cannot match terms shorter than this
+MIN_TRIGRAM_LENGTH = 3
+
+# Text search configuration used by the kb_articles.search_vector trigger
+KB_TEXT_SEARCH_CONFIG = "english"
+
+# Added to the rank of rows whose first column starts with the term; larger
+# than any similarity/bm25 score so prefix matches always sort first
+PREFIX_BOOST = 1000.0
+
+
+class SearchError(Exception):
+    """Raised for unknown search entities."""
+    pass
+
+
+@dataclass(frozen=True)
+class SearchEntity:
+    """A searchable table.
+
+    Attributes:
+        model: ORM model searched
+        columns: Text columns matched (first column is the display/prefix column)
+        full_text: Match a tsvector ``search_vector`` column on Postgres
+    """
+    model: Any
+    columns: Tuple[str, ...]
+    full_text: bool = False
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table_name}_fts"
+
+
+SEARCH_ENTITIES: Dict[str, SearchEntity] = {
+    "customers": SearchEntity(Customer, ("name", "email", "phone", "account_number")),
+    "invoices": SearchEntity(Invoice, ("invoice_number",)),
+    "employees": SearchEntity(Employee, ("name", "email")),
+    "pops": SearchEntity(Pop, ("name", "code")),
+    "kb_articles": SearchEntity(KBArticle, ("title", "search_keywords", "content"), full_text=True),
+}
+
+
+def _prefix_tsquery(term: str) -> str:
+    """Build a to_tsquery expression matching every word of term as a prefix."""
+    words = re.findall(r"\w+", term)
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def _fts5_phrase(term: str) -> str:
+    """Quote term as a single FTS5 phrase (substring match under the trigram tokenizer)."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class SearchService:
+    """Ranked search over the entities in SEARCH_ENTITIES."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @property
+    def dialect(self) -> str:
+        return self.db.bind.dialect.name if self.db.bind else ""
+
+    def entity(self, name: str) -> SearchEntity:
+        if name not in SEARCH_ENTITIES:
+            raise SearchError(f"Unknown search entity: {name}")
+        return SEARCH_ENTITIES[name]
+
+    def apply(self, query: Query, entity_name: str, term: str) -> Tuple[Query, Any]:
+        """Restrict query to rows matching term.
+
+        Returns:
+            Tuple of (filtered query, rank expression - order by it descending)
+        """
+        entity = self.entity(entity_name)
+        term = term.strip()
+        if self.dialect == "postgresql":
+            return self._apply_postgres(query, entity, term)
+        if (
+            self.dialect == "sqlite"
+            and len(term) >= MIN_TRIGRAM_LENGTH
+            and self._sqlite_fts_available(entity)
+        ):
+            return self._apply_sqlite_fts(query, entity, term)
+        return self._apply_like(query, entity, term)
+
+    def search(self, entity_name: str, term: str, limit: int = 50) -> List[Any]:
+        """Return up to ``limit`` best-ranked rows of an entity matching term."""
+        model = self.entity(entity_name).model
+        query, rank = self.apply(self.db.query(model), entity_name, term)
+        return query.order_by(rank.desc(), model.id.desc()).limit(limit).all()
+
+    # -------------------------------------------------------------------------
+    # Backends
+    # -------------------------------------------------------------------------
+
+    def _columns(self, entity: SearchEntity) -> List[Any]:
+        return [getattr(entity.model, name) for name in entity.columns]
+
+    def _prefix_boost(self, entity: SearchEntity, term: str) -> Any:
+        first = self._columns(entity)[0]
+        return case((first.istartswith(term, autoescape=True), PREFIX_BOOST), else_=0.0)
+
+    def _apply_like(self, query: Query, entity: SearchEntity, term: str) -> Tuple[Query, Any]:
+        columns = self._columns(entity)
+        query = query.filter(or_(*[col.icontains(term, autoescape=True) for col in columns]))
+        return query, self._prefix_boost(entity, term)
+
+    def _apply_postgres(self, query: Query, entity: SearchEntity, term: str) -> Tuple[Query, Any]:
+        columns = self._columns(entity)
+        # ILIKE '%term%' is served by the gin_trgm_ops indexes
+        substring_match = [col.icontains(term, autoescape=True) for col in columns]
+        similarity = func.greatest(
+            *[func.word_similarity(term, func.coalesce(col, "")) for col in columns], literal(0.0)
+        )
+
+        tsquery_text = _prefix_tsquery(term) if entity.full_text else ""
+        if not tsquery_text:
+            query = query.filter(or_(*substring_match))
+            return query, self._prefix_boost(entity, term) + similarity
+
+        search_vector = literal_column(f"{entity.table_name}.search_vector")
+        tsquery = func.to_tsquery(KB_TEXT_SEARCH_CONFIG, tsquery_text)
+        title_match = substring_match[0]
+        query = query.filter(or_(search_vector.op("@@")(tsquery), title_match))
+        rank = self._prefix_boost(entity, term) + func.ts_rank_cd(search_vector, tsquery)
+        return query, rank
+
+    def _apply_sqlite_fts(self, query: Query, entity: SearchEntity, term: str) -> Tuple[Query, Any]:
+        fts = entity.fts_table
+        matches = (
+            text(
+                f"SELECT rowid AS doc_id, bm25({fts}) AS score "
+                f"FROM {fts} WHERE {fts} MATCH :match"
+            )
+            .bindparams(match=_fts5_phrase(term))
+            .columns(doc_id=Integer, score=Float)
+            .subquery(f"{fts}_matches")
+        )
+        query = query.join(matches, entity.model.id == matches.c.doc_id)
+        # bm25() is lower for better matches
+        return query, self._prefix_boost(entity, term) - matches.c.score
+
+    def _sqlite_fts_available(self, entity: SearchEntity) -> bool:
+        exists = self.db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": entity.fts_table},
+        ).first()
+        return exists is not None
+
+
+# =============================================================================
+# INDEX MAINTENANCE
+# =============================================================================
+
+
+def _create_sqlite_fts(conn: Connection, entity: SearchEntity) -> None:
+    """Create an FTS5 external-content table over entity plus its sync triggers."""
+    table, fts = entity.table_name, entity.fts_table
+    cols = ", ".join(entity.columns)
+    new_values = ", ".join(f"new.{c}" for c in entity.columns)
+    old_values = ", ".join(f"old.{c}" for c in entity.columns)
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    ))
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def ensure_search_indexes(bind: Engine) -> None:
+    """Create the SQLite FTS5 search tables for every entity whose table exists.
+
+    Postgres indexes are managed by Alembic migrations, so this is a no-op there.
+    """
+    if bind.dialect.name != "sqlite":
+        return
+
+    with bind.begin() as conn:
+        existing = {
+            row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        }
+        created = []
+        for entity in SEARCH_ENTITIES.values():
+            if entity.table_name in existing and entity.fts_table not in existing:
+                _create_sqlite_fts(conn, entity)
+                created.append(entity.fts_table)
+    if created:
+        logger.info("search_indexes_created", tables=created)
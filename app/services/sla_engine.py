@@ -2,45 +2,75 @@
 
 Handles SLA policy matching, target time calculations with business hours,
 and breach detection.
+
+Policies are matched through a compiled rule set (see rule_compiler), checked
+once per engine and shared with routing and automation rules. The periodic
+breach sweep (process_sla_checks) is set-based: counts come from a single
+aggregate query, unlogged breaches from an anti-join against sla_breach_logs,
+and new breach logs are bulk inserted.
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta, date, time
+import time
+from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Optional, Dict, Any, List, Tuple
 
 import structlog
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, case, exists, func, or_
+
+from app.middleware.metrics import record_sla_sweep
 
 from app.models.support_sla import (
     SLAPolicy,
     SLATarget,
     SLABreachLog,
     BusinessCalendar,
-    BusinessCalendarHoliday,
     SLATargetType,
     BusinessHourType,
 )
 from app.models.ticket import Ticket, TicketPriority
+from app.services.business_calendar import CompiledBusinessCalendar, get_compiled_calendar
+from app.services.rule_compiler import RuleSet, load_rule_set
 
 logger = structlog.get_logger()
 
 
+# Breach log rows inserted per bulk insert
+BREACH_INSERT_BATCH_SIZE = 1000
+
+# Breach types checked by the sweep: (target type, deadline column, completion column)
+BREACH_CHECKS = (
+    (SLATargetType.FIRST_RESPONSE, Ticket.response_by, Ticket.first_responded_on),
+    (SLATargetType.RESOLUTION, Ticket.resolution_by, Ticket.resolution_date),
+)
+
 class SLAEngine:
     """Service for SLA calculations and breach monitoring."""
 
     def __init__(self, db: Session):
         self.db = db
         self._calendar_cache: Dict[int, BusinessCalendar] = {}
-        self._holiday_cache: Dict[int, List[date]] = {}
-        self._recurring_holiday_cache: Dict[int, List[Tuple[int, int]]] = {}
+        self._compiled_calendars: Dict[int, CompiledBusinessCalendar] = {}
+        self._policy_rules: Optional[RuleSet] = None
+
+    @property
+    def policy_rules(self) -> RuleSet:
+        """Compiled active SLA policies, loaded on first use."""
+        if self._policy_rules is None:
+            self._policy_rules = load_rule_set(
+                self.db, SLAPolicy, empty_matches=False, default_flag="is_default"
+            )
+        return self._policy_rules
 
     def get_applicable_policy(self, ticket: Ticket) -> Optional[SLAPolicy]:
         """Find the SLA policy that applies to a ticket.
 
         Policies are evaluated in priority order (lower number = higher priority).
-        The first policy whose conditions match the ticket is returned.
+        The first policy whose conditions match the ticket is returned,
+        falling back to the default policy. Policies without conditions only
+        apply as the default.
 
         Args:
             ticket: The ticket to match
@@ -48,84 +78,22 @@ class SLAEngine:
         Returns:
             Matching SLA policy or None if no policy matches
         """
-        policies = self.db.query(SLAPolicy).filter(
-            SLAPolicy.is_active == True
-        ).order_by(SLAPolicy.priority).all()
-
-        for policy in policies:
-            if self._matches_policy_conditions(policy, ticket):
-                logger.debug(
-                    "sla_policy_matched",
-                    ticket_id=ticket.id,
-                    policy_id=policy.id,
-                    policy_name=policy.name,
-                )
-                return policy
-
-        # Return default policy if exists
-        default = self.db.query(SLAPolicy).filter(
-            SLAPolicy.is_default == True,
-            SLAPolicy.is_active == True
-        ).first()
-
-        if default:
+        rules = self.policy_rules
+        matched = rules.first_match(ticket)
+        policy_id = matched.rule_id if matched else rules.default_rule_id
+        if policy_id is None:
+            return None
+
+        policy = self.db.get(SLAPolicy, policy_id)
+        if policy:
             logger.debug(
-                "sla_default_policy_used",
+                "sla_policy_matched",
                 ticket_id=ticket.id,
-                policy_id=default.id,
+                policy_id=policy.id,
+                policy_name=policy.name,
+                default=matched is None,
             )
-        return default
-
-    def _matches_policy_conditions(self, policy: SLAPolicy, ticket: Ticket) -> bool:
-        """Check if a ticket matches a policy's conditions."""
-        if not policy.conditions:
-            return False  # Empty conditions = only applies if explicitly default
-
-        for condition in policy.conditions:
-            field = condition.get("field", "")
-            operator = condition.get("operator", "")
-            value = condition.get("value")
-
-            ticket_value = getattr(ticket, field, None)
-            if ticket_value is not None and hasattr(ticket_value, "value"):
-                ticket_value = ticket_value.value
-
-            if not self._evaluate_condition(ticket_value, operator, value):
-                return False
-
-        return True
-
-    def _evaluate_condition(self, actual: Any, operator: str, expected: Any) -> bool:
-        """Evaluate a single condition."""
-        if operator == "equals":
-            return str(actual) == str(expected)
-        elif operator == "not_equals":
-            return str(actual) != str(expected)
-        elif operator == "contains":
-            return expected in str(actual or "")
-        elif operator == "not_contains":
-            return expected not in str(actual or "")
-        elif operator == "in_list":
-            val_list = expected if isinstance(expected, list) else [expected]
-            return str(actual) in val_list
-        elif operator == "not_in_list":
-            val_list = expected if isinstance(expected, list) else [expected]
-            return str(actual) not in val_list
-        elif operator == "is_empty":
-            return actual is None or actual == ""
-        elif operator == "is_not_empty":
-            return actual is not None and actual != ""
-        elif operator == "greater_than":
-            try:
-                return float(actual) > float(expected)
-            except (TypeError, ValueError):
-                return False
-        elif operator == "less_than":
-            try:
-                return float(actual) < float(expected)
-            except (TypeError, ValueError):
-                return False
-        return False
+        return policy
 
     def get_target_for_ticket(
         self,
@@ -184,25 +152,11 @@ class SLAEngine:
         # Calculate with business hours
         return self._add_business_hours(start_time, float(target_hours), calendar)
 
-    def _get_holidays(
-        self,
-        calendar: BusinessCalendar,
-    ) -> Tuple[List[date], List[Tuple[int, int]]]:
-        """Return non-recurring and recurring holiday sets for a calendar."""
-        if calendar.id not in self._holiday_cache:
-            holiday_rows = self.db.query(BusinessCalendarHoliday).filter(
-                BusinessCalendarHoliday.calendar_id == calendar.id
-            ).all()
-            self._holiday_cache[calendar.id] = [
-                h.holiday_date for h in holiday_rows if not h.is_recurring
-            ]
-            self._recurring_holiday_cache[calendar.id] = [
-                (h.holiday_date.month, h.holiday_date.day)
-                for h in holiday_rows
-                if h.is_recurring
-            ]
-
-        return self._holiday_cache[calendar.id], self._recurring_holiday_cache[calendar.id]
+    def _compiled_calendar(self, calendar: BusinessCalendar) -> CompiledBusinessCalendar:
+        """Return the compiled form of a calendar, checked once per engine."""
+        if calendar.id not in self._compiled_calendars:
+            self._compiled_calendars[calendar.id] = get_compiled_calendar(self.db, calendar)
+        return self._compiled_calendars[calendar.id]
 
     def _add_business_hours(
         self,
@@ -211,77 +165,7 @@ class SLAEngine:
         calendar: BusinessCalendar,
     ) -> datetime:
         """Add business hours to a datetime, accounting for schedule and holidays."""
-        holiday_dates, recurring_holidays = self._get_holidays(calendar)
-        schedule = calendar.schedule or {}
-        day_map = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-
-        remaining_hours = hours
-        current = start_time
-
-        # Maximum iterations to prevent infinite loop
-        max_days = int(hours / 0.1) + 365
-
-        for _ in range(max_days):
-            if remaining_hours <= 0:
-                break
-
-            current_date = current.date()
-
-            # Check if holiday
-            if current_date in holiday_dates or (current_date.month, current_date.day) in recurring_holidays:
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            # Get schedule for this day
-            day_name = day_map[current.weekday()]
-            day_schedule = schedule.get(day_name)
-
-            if not day_schedule:
-                # Non-business day
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            # Parse business hours
-            try:
-                start_str = day_schedule.get("start", "09:00")
-                end_str = day_schedule.get("end", "17:00")
-                day_start = datetime.strptime(start_str, "%H:%M").time()
-                day_end = datetime.strptime(end_str, "%H:%M").time()
-            except (ValueError, AttributeError):
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            # Calculate available hours today
-            work_start = datetime.combine(current_date, day_start)
-            work_end = datetime.combine(current_date, day_end)
-
-            # If we're before business hours, move to start
-            if current < work_start:
-                current = work_start
-
-            # If we're after business hours, move to next day
-            if current >= work_end:
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            # Calculate hours remaining today
-            hours_today = (work_end - current).total_seconds() / 3600
-
-            if hours_today >= remaining_hours:
-                # We can complete within today
-                return current + timedelta(hours=remaining_hours)
-            else:
-                # Use all remaining hours today and continue tomorrow
-                remaining_hours -= hours_today
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-
-        # Fallback if we exceed max iterations
-        logger.warning(
-            "sla_business_hours_calculation_exceeded_max",
-            start_time=start_time.isoformat(),
-            hours=hours,
-        )
-        return start_time + timedelta(hours=hours)
+        return self._compiled_calendar(calendar).add_business_hours(start_time, hours)
 
     def calculate_elapsed_business_hours(
         self,
@@ -312,51 +196,7 @@ class SLAEngine:
         calendar: BusinessCalendar,
     ) -> float:
         """Count business hours between two datetimes."""
-        holiday_dates, recurring_holidays = self._get_holidays(calendar)
-        schedule = calendar.schedule or {}
-        day_map = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
-
-        total_hours = 0.0
-        current = start_time
-
-        while current < end_time:
-            current_date = current.date()
-
-            # Check if holiday
-            if current_date in holiday_dates or (current_date.month, current_date.day) in recurring_holidays:
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            # Get schedule for this day
-            day_name = day_map[current.weekday()]
-            day_schedule = schedule.get(day_name)
-
-            if not day_schedule:
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            try:
-                start_str = day_schedule.get("start", "09:00")
-                end_str = day_schedule.get("end", "17:00")
-                day_start = datetime.strptime(start_str, "%H:%M").time()
-                day_end = datetime.strptime(end_str, "%H:%M").time()
-            except (ValueError, AttributeError):
-                current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-                continue
-
-            work_start = datetime.combine(current_date, day_start)
-            work_end = datetime.combine(current_date, day_end)
-
-            # Clamp to business hours
-            effective_start = max(current, work_start)
-            effective_end = min(end_time, work_end)
-
-            if effective_start < effective_end:
-                total_hours += (effective_end - effective_start).total_seconds() / 3600
-
-            current = datetime.combine(current_date + timedelta(days=1), time(0, 0))
-
-        return total_hours
+        return self._compiled_calendar(calendar).elapsed_business_hours(start_time, end_time)
 
     def update_ticket_sla(self, ticket: Ticket) -> Dict[str, Any]:
         """Calculate and update SLA fields on a ticket.
@@ -612,57 +452,112 @@ class SLAEngine:
 
         return breach
 
+    def find_unlogged_breaches(
+        self,
+        now: Optional[datetime] = None,
+    ) -> List[Tuple[Ticket, SLATargetType]]:
+        """Find breached tickets that have no breach log for that target type.
+
+        Uses an anti-join (NOT EXISTS) against sla_breach_logs, so tickets
+        already logged are never loaded.
+        """
+        now = now or datetime.utcnow()
+        unlogged: List[Tuple[Ticket, SLATargetType]] = []
+
+        for target_type, deadline, completed in BREACH_CHECKS:
+            already_logged = exists().where(
+                SLABreachLog.ticket_id == Ticket.id,
+                SLABreachLog.target_type == target_type.value,
+            )
+            tickets = self.db.query(Ticket).filter(
+                completed.is_(None),
+                deadline.isnot(None),
+                deadline < now,
+                ~already_logged,
+            ).order_by(Ticket.id).all()
+            unlogged.extend((ticket, target_type) for ticket in tickets)
+
+        return unlogged
+
+    def _count_sla_tickets(self, now: datetime, threshold_minutes: int = 60) -> Tuple[int, int]:
+        """Count warning tickets and breached (ticket, target) pairs in one query."""
+        warning_threshold = now + timedelta(minutes=threshold_minutes)
+        warning_conditions = []
+        breach_counts = []
+
+        for _target_type, deadline, completed in BREACH_CHECKS:
+            open_with_deadline = and_(completed.is_(None), deadline.isnot(None))
+            warning_conditions.append(
+                and_(open_with_deadline, deadline > now, deadline <= warning_threshold)
+            )
+            breach_counts.append(func.count(case((and_(open_with_deadline, deadline < now), 1))))
+
+        row = self.db.query(
+            func.count(case((or_(*warning_conditions), 1))),
+            *breach_counts,
+        ).one()
+        return int(row[0] or 0), sum(int(count or 0) for count in row[1:])
+
     def process_sla_checks(self) -> Dict[str, Any]:
         """Process all SLA checks (for scheduled task).
 
+        Counts warnings and breaches, then logs every breach that has no
+        breach log yet. Logs are bulk inserted and committed once.
+
         Returns:
             Summary of warnings and breaches found
         """
-        results = {
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        results: Dict[str, Any] = {
             "warnings_found": 0,
             "breaches_found": 0,
             "breaches_logged": 0,
         }
 
-        # Check warnings
-        warnings = self.find_sla_warnings()
-        results["warnings_found"] = len(warnings)
-
-        # Check and log breaches
-        breaches = self.find_sla_breaches()
-        results["breaches_found"] = len(breaches)
-
-        for ticket, breach_type in breaches:
-            # Check if already logged
-            existing = self.db.query(SLABreachLog).filter(
-                SLABreachLog.ticket_id == ticket.id,
-                SLABreachLog.target_type == breach_type,
-            ).first()
-
-            if not existing:
-                policy = self.get_applicable_policy(ticket)
-                if policy:
-                    target = self.get_target_for_ticket(
-                        policy, ticket,
-                        SLATargetType.FIRST_RESPONSE if breach_type == "first_response"
-                        else SLATargetType.RESOLUTION
-                    )
-                    if target:
-                        start_time = ticket.opening_date or ticket.created_at
-                        actual_hours = (datetime.utcnow() - start_time).total_seconds() / 3600
-                        self.log_breach(
-                            ticket,
-                            breach_type,
-                            target.target_hours,
-                            Decimal(str(round(actual_hours, 2))),
-                        )
-                        results["breaches_logged"] += 1
+        results["warnings_found"], results["breaches_found"] = self._count_sla_tickets(now)
+
+        rows: List[Dict[str, Any]] = []
+        logged_by_type = {target_type.value: 0 for target_type, _, _ in BREACH_CHECKS}
+        for ticket, target_type in self.find_unlogged_breaches(now):
+            start_time = ticket.opening_date or ticket.created_at
+            policy = self.get_applicable_policy(ticket)
+            if not policy or not start_time:
+                continue
+            target = self.get_target_for_ticket(policy, ticket, target_type)
+            if not target:
+                continue
+
+            actual_hours = (now - start_time).total_seconds() / 3600
+            rows.append({
+                "ticket_id": ticket.id,
+                "policy_id": policy.id,
+                "target_type": target_type.value,
+                "target_hours": target.target_hours,
+                "actual_hours": Decimal(str(round(actual_hours, 2))),
+                "breached_at": now,
+                "was_warned": False,
+                "created_at": now,
+            })
+            logged_by_type[target_type.value] += 1
+
+        for i in range(0, len(rows), BREACH_INSERT_BATCH_SIZE):
+            self.db.bulk_insert_mappings(SLABreachLog, rows[i:i + BREACH_INSERT_BATCH_SIZE])
+        if rows:
+            self.db.commit()
+            logger.warning("sla_breaches_logged", **logged_by_type)
+        results["breaches_logged"] = len(rows)
+
+        duration = time.perf_counter() - started
+        results["duration_seconds"] = round(duration, 3)
+        record_sla_sweep(duration, results["warnings_found"], results["breaches_found"], logged_by_type)
 
         logger.info(
             "sla_check_completed",
             warnings=results["warnings_found"],
             breaches=results["breaches_found"],
             logged=results["breaches_logged"],
+            duration_seconds=results["duration_seconds"],
         )
 
         return results
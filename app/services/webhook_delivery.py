@@ -0,0 +1,523 @@
+"""Concurrent outbound webhook delivery.
+
+- build_webhook_request: per-delivery headers and HMAC signature on top of
+  endpoint headers (custom headers and decrypted auth) prepared once per
+  endpoint per batch
+- AsyncWebhookSender: asyncio sender on one keep-alive connection pool with
+  a global concurrency cap, a per-origin cap so a slow subscriber only ties
+  up its own slots, and a CircuitBreaker per endpoint
+- SyncWebhookSender: the same request/breaker handling on a blocking client,
+  for single immediate deliveries
+- record_delivery_outcomes: applies a batch of results with one bulk UPDATE
+  for deliveries and one stats UPDATE per endpoint
+- WebhookDeliveryWorker: load due deliveries, send, record
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Protocol
+
+import httpx
+import structlog
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.middleware.metrics import record_webhook_batch
+from app.models.notification import NotificationStatus, WebhookConfig, WebhookDelivery
+from app.services.secrets_service import SecretsServiceError, get_secrets
+from app.sync.base import CircuitBreaker, CircuitBreakerOpenError, get_circuit_breaker
+
+logger = structlog.get_logger()
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_PER_HOST_LIMIT = 8
+REQUEST_TIMEOUT_SECONDS = 30.0
+RESPONSE_BODY_LIMIT = 2000
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """JSON encoder that handles Decimal types."""
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, Decimal):
+            return float(obj)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+class WebhookServerError(Exception):
+    """Response that counts against the endpoint's circuit breaker (5xx, 429)."""
+
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+@dataclass
+class PreparedWebhookRequest:
+    delivery_id: int
+    webhook_id: int
+    method: str
+    url: str
+    headers: Dict[str, str]
+    content: str
+
+
+@dataclass
+class DeliveryOutcome:
+    delivery_id: int
+    webhook_id: int
+    status_code: Optional[int] = None
+    response_body: Optional[str] = None
+    response_time_ms: Optional[int] = None
+    error: Optional[str] = None
+    # Not attempted because the endpoint's circuit is open
+    skipped: bool = False
+    # Endpoint missing or inactive; the delivery is failed without an attempt
+    abandoned: bool = False
+
+    @property
+    def delivered(self) -> bool:
+        return (
+            not self.skipped
+            and not self.abandoned
+            and self.status_code is not None
+            and 200 <= self.status_code < 300
+        )
+
+
+class WebhookSender(Protocol):
+    def send_all(self, requests: List[PreparedWebhookRequest]) -> List[DeliveryOutcome]:
+        ...
+
+
+def breaker_for(webhook_id: int) -> CircuitBreaker:
+    return get_circuit_breaker(f"webhook:{webhook_id}")
+
+
+# =============================================================================
+# REQUEST PREPARATION
+# =============================================================================
+
+
+def endpoint_headers(webhook: WebhookConfig) -> Dict[str, str]:
+    """Custom and auth headers shared by every delivery to an endpoint.
+
+    Raises:
+        ValueError: If the stored auth value cannot be decrypted
+    """
+    headers: Dict[str, str] = dict(webhook.custom_headers or {})
+
+    if webhook.auth_value_encrypted:
+        try:
+            auth_value = get_secrets().decrypt(webhook.auth_value_encrypted)
+        except SecretsServiceError as e:
+            logger.error(
+                "webhook_auth_decryption_failed",
+                webhook_id=webhook.id,
+                error=str(e),
+            )
+            raise ValueError(f"Failed to decrypt webhook credentials: {e}")
+
+        if webhook.auth_type == "bearer":
+            headers["Authorization"] = f"Bearer {auth_value}"
+        elif webhook.auth_type == "api_key" and webhook.auth_header:
+            headers[webhook.auth_header] = auth_value
+        elif webhook.auth_type == "basic":
+            headers["Authorization"] = f"Basic {auth_value}"
+
+    return headers
+
+
+def build_webhook_request(
+    webhook: WebhookConfig,
+    delivery: WebhookDelivery,
+    shared_headers: Dict[str, str],
+) -> PreparedWebhookRequest:
+    """Serialize and sign one delivery."""
+    headers = {
+        "Content-Type": "application/json",
+        "X-Webhook-Event": delivery.event_type,
+        "X-Webhook-ID": delivery.event_id,
+        "X-Webhook-Timestamp": str(int(datetime.utcnow().timestamp())),
+    }
+    headers.update(shared_headers)
+
+    payload_json = json.dumps(delivery.payload, cls=DecimalEncoder)
+    if webhook.signing_secret:
+        signature = hmac.new(
+            webhook.signing_secret.encode(),
+            payload_json.encode(),
+            hashlib.sha256
+        ).hexdigest()
+        headers["X-Webhook-Signature"] = f"sha256={signature}"
+
+    return PreparedWebhookRequest(
+        delivery_id=delivery.id,
+        webhook_id=webhook.id,
+        method=webhook.method or "POST",
+        url=webhook.url,
+        headers=headers,
+        content=payload_json,
+    )
+
+
+def _response_outcome(request: PreparedWebhookRequest, response: httpx.Response, elapsed_ms: int) -> DeliveryOutcome:
+    text = response.text
+    outcome = DeliveryOutcome(
+        delivery_id=request.delivery_id,
+        webhook_id=request.webhook_id,
+        status_code=response.status_code,
+        response_body=text[:RESPONSE_BODY_LIMIT] if text else None,
+        response_time_ms=elapsed_ms,
+    )
+    if not 200 <= response.status_code < 300:
+        outcome.error = f"HTTP {response.status_code}: {text[:200]}"
+    return outcome
+
+
+def _counts_as_endpoint_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def _origin(url: str) -> str:
+    try:
+        parsed = httpx.URL(url)
+        return f"{parsed.scheme}://{parsed.host}:{parsed.port or ''}"
+    except Exception:
+        return url
+
+
+# =============================================================================
+# SENDERS
+# =============================================================================
+
+
+class AsyncWebhookSender:
+    """Send a batch of webhook requests concurrently.
+
+    One AsyncClient per batch keeps connections to each origin alive
+    across deliveries. Requests wait for a per-origin slot before taking
+    a global one, so a slow subscriber cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.transport = transport
+
+    def send_all(self, requests: List[PreparedWebhookRequest]) -> List[DeliveryOutcome]:
+        if not requests:
+            return []
+        return asyncio.run(self.send_all_async(requests))
+
+    async def send_all_async(self, requests: List[PreparedWebhookRequest]) -> List[DeliveryOutcome]:
+        global_slots = asyncio.Semaphore(self.concurrency)
+        host_slots: Dict[str, asyncio.Semaphore] = {}
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport) as client:
+            return list(await asyncio.gather(*(
+                self._send(client, request, global_slots, host_slots) for request in requests
+            )))
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        request: PreparedWebhookRequest,
+        global_slots: asyncio.Semaphore,
+        host_slots: Dict[str, asyncio.Semaphore],
+    ) -> DeliveryOutcome:
+        origin = _origin(request.url)
+        if origin not in host_slots:
+            host_slots[origin] = asyncio.Semaphore(self.per_host_limit)
+        breaker = breaker_for(request.webhook_id)
+
+        async with host_slots[origin], global_slots:
+            if not breaker.can_execute():
+                return _skipped(request, breaker)
+
+            started = time.perf_counter()
+            call = self._request(client, request)
+            try:
+                response = await breaker.execute(call)
+            except CircuitBreakerOpenError:
+                call.close()
+                return _skipped(request, breaker)
+            except WebhookServerError as e:
+                response = e.response
+            except Exception as e:
+                return DeliveryOutcome(
+                    delivery_id=request.delivery_id,
+                    webhook_id=request.webhook_id,
+                    response_time_ms=int((time.perf_counter() - started) * 1000),
+                    error=str(e)[:1000] or type(e).__name__,
+                )
+
+            return _response_outcome(request, response, int((time.perf_counter() - started) * 1000))
+
+    @staticmethod
+    async def _request(client: httpx.AsyncClient, request: PreparedWebhookRequest) -> httpx.Response:
+        response = await client.request(
+            method=request.method,
+            url=request.url,
+            headers=request.headers,
+            content=request.content,
+        )
+        if _counts_as_endpoint_failure(response):
+            raise WebhookServerError(response)
+        return response
+
+
+class SyncWebhookSender:
+    """Send webhook requests one at a time on a blocking client."""
+
+    def __init__(self, client: httpx.Client):
+        self.client = client
+
+    def send_all(self, requests: List[PreparedWebhookRequest]) -> List[DeliveryOutcome]:
+        return [self._send(request) for request in requests]
+
+    def _send(self, request: PreparedWebhookRequest) -> DeliveryOutcome:
+        breaker = breaker_for(request.webhook_id)
+        if not breaker.can_execute():
+            return _skipped(request, breaker)
+
+        started = time.perf_counter()
+        try:
+            response = self.client.request(
+                method=request.method,
+                url=request.url,
+                headers=request.headers,
+                content=request.content,
+            )
+        except Exception as e:
+            breaker.record_failure(e)
+            return DeliveryOutcome(
+                delivery_id=request.delivery_id,
+                webhook_id=request.webhook_id,
+                response_time_ms=int((time.perf_counter() - started) * 1000),
+                error=str(e)[:1000] or type(e).__name__,
+            )
+
+        if _counts_as_endpoint_failure(response):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return _response_outcome(request, response, int((time.perf_counter() - started) * 1000))
+
+
+def _skipped(request: PreparedWebhookRequest, breaker: CircuitBreaker) -> DeliveryOutcome:
+    return DeliveryOutcome(
+        delivery_id=request.delivery_id,
+        webhook_id=request.webhook_id,
+        error=f"Circuit open for endpoint; retrying after {breaker.reset_timeout}s",
+        skipped=True,
+    )
+
+
+# =============================================================================
+# RECORDING
+# =============================================================================
+
+
+def record_delivery_outcomes(
+    db: Session,
+    deliveries: Dict[int, WebhookDelivery],
+    outcomes: Iterable[DeliveryOutcome],
+    attempted_at: datetime,
+) -> Dict[str, int]:
+    """Write a batch of delivery results and endpoint stats, then commit.
+
+    Failed attempts are retried after ``retry_delay_seconds * attempt``
+    until the endpoint's ``max_retries`` is reached. Deliveries skipped by
+    an open circuit keep their attempt count and are retried once the
+    breaker may close.
+
+    Returns:
+        Deliveries per result: delivered, retry, failed, skipped
+    """
+    results = {"delivered": 0, "retry": 0, "failed": 0, "skipped": 0}
+    rows: List[Dict[str, Any]] = []
+    stats: Dict[int, Dict[str, int]] = {}
+
+    for outcome in outcomes:
+        delivery = deliveries[outcome.delivery_id]
+        webhook = delivery.webhook
+
+        if outcome.abandoned:
+            rows.append({
+                "id": delivery.id,
+                "status": NotificationStatus.FAILED,
+                "error_message": outcome.error,
+            })
+            results["failed"] += 1
+            continue
+
+        if outcome.skipped:
+            rows.append({
+                "id": delivery.id,
+                "next_retry_at": attempted_at + timedelta(seconds=breaker_for(outcome.webhook_id).reset_timeout),
+                "error_message": outcome.error,
+            })
+            results["skipped"] += 1
+            continue
+
+        attempt = (delivery.attempt_count or 0) + 1
+        row: Dict[str, Any] = {
+            "id": delivery.id,
+            "attempt_count": attempt,
+            "last_attempt_at": attempted_at,
+        }
+        if outcome.status_code is not None:
+            row.update(
+                response_status_code=outcome.status_code,
+                response_body=outcome.response_body,
+                response_time_ms=outcome.response_time_ms,
+            )
+
+        endpoint = stats.setdefault(webhook.id, {"success": 0, "failure": 0})
+        if outcome.delivered:
+            row.update(status=NotificationStatus.DELIVERED, delivered_at=attempted_at)
+            endpoint["success"] += 1
+            results["delivered"] += 1
+        else:
+            row["error_message"] = (outcome.error or "Delivery failed")[:1000]
+            endpoint["failure"] += 1
+            if attempt < webhook.max_retries:
+                row.update(
+                    status=NotificationStatus.PENDING,
+                    next_retry_at=attempted_at + timedelta(seconds=webhook.retry_delay_seconds * attempt),
+                )
+                results["retry"] += 1
+            else:
+                row["status"] = NotificationStatus.FAILED
+                results["failed"] += 1
+
+            logger.warning(
+                "webhook_delivery_failed",
+                webhook_id=webhook.id,
+                delivery_id=delivery.id,
+                attempt=attempt,
+                error=outcome.error,
+            )
+        rows.append(row)
+
+    if rows:
+        db.bulk_update_mappings(WebhookDelivery, rows)
+
+    for webhook_id, counts in stats.items():
+        values: Dict[str, Any] = {
+            "success_count": WebhookConfig.success_count + counts["success"],
+            "failure_count": WebhookConfig.failure_count + counts["failure"],
+        }
+        if counts["success"]:
+            values["last_triggered_at"] = attempted_at
+        db.execute(update(WebhookConfig).where(WebhookConfig.id == webhook_id).values(**values))
+
+    db.commit()
+    return results
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+
+class WebhookDeliveryWorker:
+    """Deliver due webhooks concurrently and record the results in bulk."""
+
+    def __init__(self, db: Session, sender: Optional[WebhookSender] = None):
+        self.db = db
+        self.sender = sender or AsyncWebhookSender()
+
+    def pending_deliveries(self, limit: int) -> List[WebhookDelivery]:
+        """Due deliveries, oldest first.
+
+        On PostgreSQL the rows are locked with SKIP LOCKED so concurrent
+        workers take disjoint batches.
+        """
+        now = datetime.utcnow()
+        return self.db.query(WebhookDelivery).options(
+            selectinload(WebhookDelivery.webhook)
+        ).filter(
+            and_(
+                WebhookDelivery.status == NotificationStatus.PENDING,
+                (WebhookDelivery.next_retry_at.is_(None)) | (WebhookDelivery.next_retry_at <= now),
+            )
+        ).order_by(WebhookDelivery.created_at).limit(limit).with_for_update(skip_locked=True).all()
+
+    def run(self, limit: int = 200) -> Dict[str, Any]:
+        return self.deliver(self.pending_deliveries(limit))
+
+    def deliver(self, deliveries: List[WebhookDelivery]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        attempted_at = datetime.utcnow()
+
+        outcomes: List[DeliveryOutcome] = []
+        requests: List[PreparedWebhookRequest] = []
+        shared_headers: Dict[int, Dict[str, str]] = {}
+        header_errors: Dict[int, str] = {}
+
+        for delivery in deliveries:
+            webhook = delivery.webhook
+            if not webhook or not webhook.is_active:
+                outcomes.append(DeliveryOutcome(
+                    delivery_id=delivery.id,
+                    webhook_id=delivery.webhook_id,
+                    error="Webhook not found or inactive",
+                    abandoned=True,
+                ))
+                continue
+
+            if webhook.id not in shared_headers and webhook.id not in header_errors:
+                try:
+                    shared_headers[webhook.id] = endpoint_headers(webhook)
+                except ValueError as e:
+                    header_errors[webhook.id] = str(e)
+
+            if webhook.id in header_errors:
+                outcomes.append(DeliveryOutcome(
+                    delivery_id=delivery.id,
+                    webhook_id=webhook.id,
+                    error=header_errors[webhook.id],
+                ))
+                continue
+
+            requests.append(build_webhook_request(webhook, delivery, shared_headers[webhook.id]))
+
+        outcomes.extend(self.sender.send_all(requests))
+        results = record_delivery_outcomes(
+            self.db, {delivery.id: delivery for delivery in deliveries}, outcomes, attempted_at
+        )
+
+        duration = time.perf_counter() - started
+        record_webhook_batch(duration, results)
+        if deliveries:
+            logger.info(
+                "webhook_batch_delivered",
+                processed=len(deliveries),
+                endpoints=len(shared_headers) + len(header_errors),
+                duration_seconds=round(duration, 3),
+                **results,
+            )
+
+        return {
+            "processed": len(deliveries),
+            **results,
+            "duration_seconds": round(duration, 3),
+        }
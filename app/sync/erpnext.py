@@ -6,9 +6,10 @@ in the erpnext_parts subpackage.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from urllib.parse import quote
 
 import httpx
@@ -18,7 +19,7 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import settings
 from app.models.sync_log import SyncSource
-from app.sync.base import BaseSyncClient
+from app.sync.base import BaseSyncClient, utcnow
 from app.sync.erpnext_parts import (
     # Accounting
     sync_accounts,
@@ -191,6 +192,106 @@ class ERPNextSync(BaseSyncClient):
                 records_count=records_count,
             )
 
+    # -------------------------------------------------------------------------
+    # Checkpoints (resumable chunked syncs)
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _checkpoint_entity(entity_type: str) -> str:
+        """Cursor row holding an in-progress checkpoint (kept apart from the sync cursor)."""
+        return f"{entity_type}:checkpoint"
+
+    @staticmethod
+    def _checkpoint_key(record: Dict[str, Any]) -> Tuple[str, str]:
+        """Order in which checkpointed syncs process records: modified, then name."""
+        return (str(record.get("modified") or ""), str(record.get("name") or ""))
+
+    def _start_checkpointed_sync(
+        self, entity_type: str, full_sync: bool
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Get (filters, checkpoint) for a sync that commits and checkpoints per chunk.
+
+        If an earlier run of the entity stopped part way, its checkpoint is
+        returned and the filter starts at the last committed record, so the run
+        resumes instead of starting over. A full sync does not resume an
+        interrupted incremental one.
+        """
+        cursor = self.get_cursor(self._checkpoint_entity(entity_type))
+        checkpoint: Optional[Dict[str, Any]] = None
+        if cursor and cursor.cursor_value:
+            try:
+                checkpoint = json.loads(cursor.cursor_value)
+            except ValueError:
+                checkpoint = None
+
+        if checkpoint and (checkpoint.get("full_sync") or not full_sync):
+            logger.info(
+                "sync_checkpoint_resumed",
+                entity_type=entity_type,
+                modified=checkpoint.get("modified"),
+                name=checkpoint.get("name"),
+                processed=checkpoint.get("processed"),
+            )
+            filters = {"modified": [">=", checkpoint["modified"]]} if checkpoint.get("modified") else None
+            return filters, checkpoint
+
+        return self._get_incremental_filter(entity_type, full_sync), None
+
+    def _checkpointed_chunks(
+        self,
+        entity_type: str,
+        records: List[Dict[str, Any]],
+        full_sync: bool,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Yield records not yet covered by the checkpoint, a chunk at a time.
+
+        Records are ordered by (modified, name). Once the caller has handled a
+        chunk (i.e. asks for the next one) it is committed and the checkpoint
+        moves to its last record; a chunk that raises is neither.
+        """
+        done = self._checkpoint_key(checkpoint) if checkpoint else None
+        pending = sorted(
+            (record for record in records if done is None or self._checkpoint_key(record) > done),
+            key=self._checkpoint_key,
+        )
+        processed = int(checkpoint.get("processed") or 0) if checkpoint else 0
+        size = chunk_size or settings.sync_batch_size
+
+        for start in range(0, len(pending), size):
+            chunk = pending[start:start + size]
+            yield chunk
+            self.db.commit()
+            processed += len(chunk)
+            modified, name = self._checkpoint_key(chunk[-1])
+            cursor = self.get_or_create_cursor(self._checkpoint_entity(entity_type))
+            cursor.cursor_value = json.dumps({
+                "full_sync": full_sync,
+                "modified": modified,
+                "name": name,
+                "processed": processed,
+            })
+            cursor.last_sync_at = utcnow()
+            self.db.commit()
+
+    def _finish_checkpointed_sync(
+        self,
+        entity_type: str,
+        records: List[Dict[str, Any]],
+        checkpoint: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Advance the sync cursor past every record and drop the checkpoint."""
+        seen = list(records)
+        if checkpoint and checkpoint.get("modified"):
+            seen.append({"modified": checkpoint["modified"]})
+        self._update_sync_cursor(entity_type, seen, len(records))
+
+        cursor = self.get_cursor(self._checkpoint_entity(entity_type))
+        if cursor:
+            self.db.delete(cursor)
+            self.db.commit()
+
     # -------------------------------------------------------------------------
     # HTTP methods
     # -------------------------------------------------------------------------
@@ -230,6 +331,7 @@ class ERPNextSync(BaseSyncClient):
         filters: Optional[Dict[str, Any]] = None,
         limit_start: int = 0,
         limit_page_length: int = 100,
+        order_by: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Fetch records of a specific doctype."""
         params: Dict[str, Any] = {
@@ -237,6 +339,9 @@ class ERPNextSync(BaseSyncClient):
             "limit_page_length": limit_page_length,
         }
 
+        if order_by:
+            params["order_by"] = order_by
+
         if fields:
             # ERPNext requires JSON array with double quotes
             params["fields"] = json.dumps(fields)
@@ -254,6 +359,7 @@ class ERPNextSync(BaseSyncClient):
         doctype: str,
         fields: Optional[List[str]] = None,
         filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Fetch all records with pagination."""
         all_records = []
@@ -268,6 +374,7 @@ class ERPNextSync(BaseSyncClient):
                 filters=filters,
                 limit_start=limit_start,
                 limit_page_length=limit_page_length,
+                order_by=order_by,
             )
 
             if not records:
@@ -296,6 +403,104 @@ class ERPNextSync(BaseSyncClient):
         result: Dict[str, Any] = data.get("data", {}) if isinstance(data, dict) else {}
         return result
 
+    async def _fetch_child_rows(
+        self,
+        client: httpx.AsyncClient,
+        parent_doctype: str,
+        child_doctype: str,
+        parents: Sequence[str],
+        parentfields: Sequence[str],
+        fields: Sequence[str],
+    ) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """Fetch child table rows of many documents: {parent: {parentfield: rows}}.
+
+        Rows come from frappe.client.get_list on the child doctype filtered by
+        parent in (...), erpnext_child_batch_size parents per request and at
+        most erpnext_child_fetch_concurrency requests in flight. A batch whose
+        request fails falls back to fetching its documents one at a time.
+        Parents whose rows could not be fetched are left out of the result.
+        """
+        names = list(dict.fromkeys(parents))
+        batch_size = max(1, settings.erpnext_child_batch_size)
+        semaphore = asyncio.Semaphore(max(1, settings.erpnext_child_fetch_concurrency))
+        result: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+
+        async def fetch_document(name: str) -> None:
+            async with semaphore:
+                try:
+                    doc = await self._fetch_document(client, parent_doctype, name)
+                except Exception as e:
+                    logger.warning(
+                        "erpnext_child_rows_fetch_failed", doctype=parent_doctype, parent=name, error=str(e)
+                    )
+                    return
+            result[name] = {field: list(doc.get(field) or []) for field in parentfields}
+
+        async def fetch_batch(batch: List[str]) -> None:
+            try:
+                async with semaphore:
+                    rows = await self._fetch_child_batch(
+                        client, parent_doctype, child_doctype, batch, parentfields, fields
+                    )
+            except Exception as e:
+                logger.warning(
+                    "erpnext_child_batch_failed", doctype=child_doctype, parents=len(batch), error=str(e)
+                )
+                await asyncio.gather(*(fetch_document(name) for name in batch))
+                return
+            for name in batch:
+                result[name] = {field: [] for field in parentfields}
+            for row in rows:
+                by_field = result.get(row.get("parent"))
+                if by_field is not None and row.get("parentfield") in by_field:
+                    by_field[row["parentfield"]].append(row)
+            for name in batch:
+                for field_rows in result[name].values():
+                    field_rows.sort(key=lambda row: int(row.get("idx") or 0))
+
+        await asyncio.gather(*(
+            fetch_batch(names[start:start + batch_size]) for start in range(0, len(names), batch_size)
+        ))
+        return result
+
+    async def _fetch_child_batch(
+        self,
+        client: httpx.AsyncClient,
+        parent_doctype: str,
+        child_doctype: str,
+        parents: List[str],
+        parentfields: Sequence[str],
+        fields: Sequence[str],
+        limit_page_length: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """Child table rows of a batch of parents, paging through get_list."""
+        rows: List[Dict[str, Any]] = []
+        limit_start = 0
+        while True:
+            data = await self._request(
+                client,
+                "POST",
+                "/api/method/frappe.client.get_list",
+                json_data={
+                    "doctype": child_doctype,
+                    "parent": parent_doctype,
+                    "fields": ["parent", "parentfield", *fields],
+                    "filters": [
+                        ["parenttype", "=", parent_doctype],
+                        ["parentfield", "in", list(parentfields)],
+                        ["parent", "in", parents],
+                    ],
+                    "order_by": "parent asc, idx asc",
+                    "limit_start": limit_start,
+                    "limit_page_length": limit_page_length,
+                },
+            )
+            page: List[Dict[str, Any]] = (data.get("message") or []) if isinstance(data, dict) else []
+            rows.extend(page)
+            if len(page) < limit_page_length:
+                return rows
+            limit_start += limit_page_length
+
     # -------------------------------------------------------------------------
     # Connection test
     # -------------------------------------------------------------------------
@@ -6,18 +6,26 @@ This module handles syncing of HR-related entities:
 - Designations
 - ERPNext Users
 - HD Teams and Members
+- Salary components, structures, payroll entries and salary slips
+- Leave types, allocations, applications and attendance
 - Employee relationship resolution
+
+Large doctypes (salary slips and structures, payroll entries, leave
+applications, attendance) are committed a chunk at a time with a checkpoint,
+so an interrupted sync resumes after the last committed chunk. Salary
+slip/structure child rows are fetched in batches through the child doctype
+rather than one document request per record.
 """
 from __future__ import annotations
 
 from datetime import datetime, date
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import httpx
 import structlog
 
-from app.models.employee import Employee, EmploymentStatus
+from app.models.employee import DEFER_HIERARCHY_UPDATES, Employee, EmploymentStatus
 from app.models.hr import Department, Designation, ERPNextUser, HDTeam, HDTeamMember
 from app.models.hr_attendance import Attendance, AttendanceStatus
 from app.models.hr_leave import (
@@ -40,6 +48,7 @@ from app.models.hr_payroll import (
     SalaryStructureEarning,
 )
 from app.models.sales import SalesPerson
+from app.services.employee_hierarchy import reconcile_employee_hierarchy
 
 if TYPE_CHECKING:
     from app.sync.erpnext import ERPNextSync
@@ -174,6 +183,93 @@ def _map_attendance_status(value: Any) -> AttendanceStatus:
     return mapping.get(key, AttendanceStatus.PRESENT)
 
 
+# Order of checkpointed list fetches; matches ERPNextSync._checkpoint_key
+CHECKPOINT_ORDER = "modified asc, name asc"
+
+# Salary Detail rows (earnings/deductions of slips and structures)
+SALARY_DETAIL_FIELDS = [
+    "name",
+    "idx",
+    "salary_component",
+    "abbr",
+    "amount",
+    "default_amount",
+    "additional_amount",
+    "year_to_date",
+    "amount_based_on_formula",
+    "formula",
+    "condition",
+    "statistical_component",
+    "do_not_include_in_total",
+]
+
+
+def _replace_salary_slip_rows(
+    sync_client: "ERPNextSync",
+    rows_by_slip: Dict[int, Dict[str, List[Dict[str, Any]]]],
+) -> None:
+    """Replace the earnings and deductions of a chunk of salary slips."""
+    if not rows_by_slip:
+        return
+    slip_ids = list(rows_by_slip)
+    sync_client.db.query(SalarySlipEarning).filter(
+        SalarySlipEarning.salary_slip_id.in_(slip_ids)
+    ).delete()
+    sync_client.db.query(SalarySlipDeduction).filter(
+        SalarySlipDeduction.salary_slip_id.in_(slip_ids)
+    ).delete()
+
+    for slip_id, rows in rows_by_slip.items():
+        for model, field in ((SalarySlipEarning, "earnings"), (SalarySlipDeduction, "deductions")):
+            for row in rows.get(field, []):
+                sync_client.db.add(model(
+                    salary_slip_id=slip_id,
+                    erpnext_name=row.get("name"),
+                    salary_component=row.get("salary_component") or "",
+                    abbr=row.get("abbr"),
+                    amount=_parse_decimal(row.get("amount")),
+                    default_amount=_parse_decimal(row.get("default_amount")),
+                    additional_amount=_parse_decimal(row.get("additional_amount")),
+                    year_to_date=_parse_decimal(row.get("year_to_date")),
+                    statistical_component=_coerce_bool(row.get("statistical_component")),
+                    do_not_include_in_total=_coerce_bool(row.get("do_not_include_in_total")),
+                    idx=int(row.get("idx") or 0),
+                ))
+
+
+def _replace_salary_structure_rows(
+    sync_client: "ERPNextSync",
+    rows_by_structure: Dict[int, Dict[str, List[Dict[str, Any]]]],
+) -> None:
+    """Replace the earnings and deductions of a chunk of salary structures."""
+    if not rows_by_structure:
+        return
+    structure_ids = list(rows_by_structure)
+    sync_client.db.query(SalaryStructureEarning).filter(
+        SalaryStructureEarning.salary_structure_id.in_(structure_ids)
+    ).delete()
+    sync_client.db.query(SalaryStructureDeduction).filter(
+        SalaryStructureDeduction.salary_structure_id.in_(structure_ids)
+    ).delete()
+
+    for structure_id, rows in rows_by_structure.items():
+        for model, field in ((SalaryStructureEarning, "earnings"), (SalaryStructureDeduction, "deductions")):
+            for row in rows.get(field, []):
+                sync_client.db.add(model(
+                    salary_structure_id=structure_id,
+                    erpnext_name=row.get("name"),
+                    salary_component=row.get("salary_component") or "",
+                    abbr=row.get("abbr"),
+                    amount=_parse_decimal(row.get("amount")),
+                    amount_based_on_formula=_coerce_bool(row.get("amount_based_on_formula")),
+                    formula=row.get("formula"),
+                    condition=row.get("condition"),
+                    statistical_component=_coerce_bool(row.get("statistical_component")),
+                    do_not_include_in_total=_coerce_bool(row.get("do_not_include_in_total")),
+                    idx=int(row.get("idx") or 0),
+                ))
+
+
 async def sync_employees(
     sync_client: "ERPNextSync",
     client: httpx.AsyncClient,
@@ -629,7 +725,7 @@ async def sync_salary_structures(
     sync_client.start_sync("salary_structures", "full" if full_sync else "incremental")
 
     try:
-        filters = sync_client._get_incremental_filter("salary_structures", full_sync)
+        filters, checkpoint = sync_client._start_checkpointed_sync("salary_structures", full_sync)
         structures = await sync_client._fetch_all_doctype(
             client,
             "Salary Structure",
@@ -644,111 +740,83 @@ async def sync_salary_structures(
                 "modified",
             ],
             filters=filters,
+            order_by=CHECKPOINT_ORDER,
         )
 
-        for structure_data in structures:
-            erpnext_id = structure_data.get("name")
-            salary_structure_name = structure_data.get("salary_structure_name") or erpnext_id or ""
-            if not salary_structure_name:
-                continue
-            existing = None
-            if erpnext_id:
-                existing = sync_client.db.query(SalaryStructure).filter(
-                    SalaryStructure.erpnext_id == erpnext_id
-                ).first()
-            if not existing and salary_structure_name:
-                existing = sync_client.db.query(SalaryStructure).filter(
-                    SalaryStructure.salary_structure_name == salary_structure_name
-                ).first()
-
-            is_active_raw = structure_data.get("is_active")
-            if is_active_raw is None:
-                is_active_value = "Yes"
-            else:
-                is_active_str = str(is_active_raw).strip().lower()
-                if is_active_str in {"yes", "no"}:
-                    is_active_value = "Yes" if is_active_str == "yes" else "No"
-                else:
-                    is_active_value = "Yes" if _coerce_bool(is_active_raw) else "No"
+        for chunk in sync_client._checkpointed_chunks("salary_structures", structures, full_sync, checkpoint):
+            children = await sync_client._fetch_child_rows(
+                client,
+                "Salary Structure",
+                "Salary Detail",
+                [str(structure_data["name"]) for structure_data in chunk if structure_data.get("name")],
+                ("earnings", "deductions"),
+                SALARY_DETAIL_FIELDS,
+            )
+            rows_by_structure: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
 
-            if existing:
-                existing.erpnext_id = erpnext_id
-                existing.salary_structure_name = salary_structure_name
-                existing.company = structure_data.get("company")
-                existing.is_active = is_active_value
-                existing.payroll_frequency = structure_data.get("payroll_frequency")
-                existing.currency = structure_data.get("currency") or existing.currency
-                existing.payment_account = structure_data.get("payment_account")
-                existing.mode_of_payment = structure_data.get("mode_of_payment")
-                existing.last_synced_at = datetime.utcnow()
-                structure = existing
-                sync_client.increment_updated()
-            else:
-                structure = SalaryStructure(
-                    erpnext_id=erpnext_id,
-                    salary_structure_name=salary_structure_name,
-                    company=structure_data.get("company"),
-                    is_active=is_active_value,
-                    payroll_frequency=structure_data.get("payroll_frequency"),
-                    currency=structure_data.get("currency") or "USD",
-                    payment_account=structure_data.get("payment_account"),
-                    mode_of_payment=structure_data.get("mode_of_payment"),
-                )
-                sync_client.db.add(structure)
-                sync_client.db.flush()
-                sync_client.increment_created()
+            for structure_data in chunk:
+                erpnext_id = structure_data.get("name")
+                salary_structure_name = structure_data.get("salary_structure_name") or erpnext_id or ""
+                if not salary_structure_name:
+                    continue
+                existing = None
+                if erpnext_id:
+                    existing = sync_client.db.query(SalaryStructure).filter(
+                        SalaryStructure.erpnext_id == erpnext_id
+                    ).first()
+                if not existing and salary_structure_name:
+                    existing = sync_client.db.query(SalaryStructure).filter(
+                        SalaryStructure.salary_structure_name == salary_structure_name
+                    ).first()
 
-            if not erpnext_id:
-                continue
+                is_active_raw = structure_data.get("is_active")
+                if is_active_raw is None:
+                    is_active_value = "Yes"
+                else:
+                    is_active_str = str(is_active_raw).strip().lower()
+                    if is_active_str in {"yes", "no"}:
+                        is_active_value = "Yes" if is_active_str == "yes" else "No"
+                    else:
+                        is_active_value = "Yes" if _coerce_bool(is_active_raw) else "No"
+
+                if existing:
+                    existing.erpnext_id = erpnext_id
+                    existing.salary_structure_name = salary_structure_name
+                    existing.company = structure_data.get("company")
+                    existing.is_active = is_active_value
+                    existing.payroll_frequency = structure_data.get("payroll_frequency")
+                    existing.currency = structure_data.get("currency") or existing.currency
+                    existing.payment_account = structure_data.get("payment_account")
+                    existing.mode_of_payment = structure_data.get("mode_of_payment")
+                    existing.last_synced_at = datetime.utcnow()
+                    structure = existing
+                    sync_client.increment_updated()
+                else:
+                    structure = SalaryStructure(
+                        erpnext_id=erpnext_id,
+                        salary_structure_name=salary_structure_name,
+                        company=structure_data.get("company"),
+                        is_active=is_active_value,
+                        payroll_frequency=structure_data.get("payroll_frequency"),
+                        currency=structure_data.get("currency") or "USD",
+                        payment_account=structure_data.get("payment_account"),
+                        mode_of_payment=structure_data.get("mode_of_payment"),
+                    )
+                    sync_client.db.add(structure)
+                    sync_client.db.flush()
+                    sync_client.increment_created()
 
-            try:
-                structure_doc = await sync_client._fetch_document(client, "Salary Structure", str(erpnext_id))
-                earnings = structure_doc.get("earnings", [])
-                deductions = structure_doc.get("deductions", [])
+                if not erpnext_id:
+                    continue
 
-                sync_client.db.query(SalaryStructureEarning).filter(
-                    SalaryStructureEarning.salary_structure_id == structure.id
-                ).delete()
-                sync_client.db.query(SalaryStructureDeduction).filter(
-                    SalaryStructureDeduction.salary_structure_id == structure.id
-                ).delete()
+                if str(erpnext_id) in children:
+                    rows_by_structure[structure.id] = children[str(erpnext_id)]
+                else:
+                    logger.warning("salary_structure_children_fetch_failed", structure=erpnext_id)
 
-                for row in earnings:
-                    earning = SalaryStructureEarning(
-                        salary_structure_id=structure.id,
-                        erpnext_name=row.get("name"),
-                        salary_component=row.get("salary_component") or "",
-                        abbr=row.get("abbr"),
-                        amount=_parse_decimal(row.get("amount")),
-                        amount_based_on_formula=_coerce_bool(row.get("amount_based_on_formula")),
-                        formula=row.get("formula"),
-                        condition=row.get("condition"),
-                        statistical_component=_coerce_bool(row.get("statistical_component")),
-                        do_not_include_in_total=_coerce_bool(row.get("do_not_include_in_total")),
-                        idx=int(row.get("idx") or 0),
-                    )
-                    sync_client.db.add(earning)
-
-                for row in deductions:
-                    deduction = SalaryStructureDeduction(
-                        salary_structure_id=structure.id,
-                        erpnext_name=row.get("name"),
-                        salary_component=row.get("salary_component") or "",
-                        abbr=row.get("abbr"),
-                        amount=_parse_decimal(row.get("amount")),
-                        amount_based_on_formula=_coerce_bool(row.get("amount_based_on_formula")),
-                        formula=row.get("formula"),
-                        condition=row.get("condition"),
-                        statistical_component=_coerce_bool(row.get("statistical_component")),
-                        do_not_include_in_total=_coerce_bool(row.get("do_not_include_in_total")),
-                        idx=int(row.get("idx") or 0),
-                    )
-                    sync_client.db.add(deduction)
-            except Exception as e:
-                logger.warning("salary_structure_children_fetch_failed", structure=erpnext_id, error=str(e))
+            _replace_salary_structure_rows(sync_client, rows_by_structure)
 
-        sync_client.db.commit()
-        sync_client._update_sync_cursor("salary_structures", structures, len(structures))
+        sync_client._finish_checkpointed_sync("salary_structures", structures, checkpoint)
         sync_client.complete_sync()
 
     except Exception as e:
@@ -766,7 +834,7 @@ async def sync_payroll_entries(
     sync_client.start_sync("payroll_entries", "full" if full_sync else "incremental")
 
     try:
-        filters = sync_client._get_incremental_filter("payroll_entries", full_sync)
+        filters, checkpoint = sync_client._start_checkpointed_sync("payroll_entries", full_sync)
         entries = await sync_client._fetch_all_doctype(
             client,
             "Payroll Entry",
@@ -790,65 +858,66 @@ async def sync_payroll_entries(
                 "modified",
             ],
             filters=filters,
+            order_by=CHECKPOINT_ORDER,
         )
 
-        for entry_data in entries:
-            erpnext_id = entry_data.get("name")
-            existing = None
-            if erpnext_id:
-                existing = sync_client.db.query(PayrollEntry).filter(
-                    PayrollEntry.erpnext_id == erpnext_id
-                ).first()
+        for chunk in sync_client._checkpointed_chunks("payroll_entries", entries, full_sync, checkpoint):
+            for entry_data in chunk:
+                erpnext_id = entry_data.get("name")
+                existing = None
+                if erpnext_id:
+                    existing = sync_client.db.query(PayrollEntry).filter(
+                        PayrollEntry.erpnext_id == erpnext_id
+                    ).first()
 
-            posting_date = _parse_date(entry_data.get("posting_date"))
-            start_date = _parse_date(entry_data.get("start_date"))
-            end_date = _parse_date(entry_data.get("end_date"))
+                posting_date = _parse_date(entry_data.get("posting_date"))
+                start_date = _parse_date(entry_data.get("start_date"))
+                end_date = _parse_date(entry_data.get("end_date"))
 
-            if not posting_date or not start_date or not end_date:
-                continue
+                if not posting_date or not start_date or not end_date:
+                    continue
 
-            if existing:
-                existing.posting_date = posting_date
-                existing.payroll_frequency = entry_data.get("payroll_frequency")
-                existing.start_date = start_date
-                existing.end_date = end_date
-                existing.company = entry_data.get("company")
-                existing.department = entry_data.get("department")
-                existing.branch = entry_data.get("branch")
-                existing.designation = entry_data.get("designation")
-                existing.currency = entry_data.get("currency") or existing.currency
-                existing.exchange_rate = _parse_decimal(entry_data.get("exchange_rate"), Decimal("1"))
-                existing.payment_account = entry_data.get("payment_account")
-                existing.bank_account = entry_data.get("bank_account")
-                existing.salary_slips_created = _coerce_bool(entry_data.get("salary_slips_created"))
-                existing.salary_slips_submitted = _coerce_bool(entry_data.get("salary_slips_submitted"))
-                existing.docstatus = int(entry_data.get("docstatus") or 0)
-                existing.last_synced_at = datetime.utcnow()
-                sync_client.increment_updated()
-            else:
-                entry = PayrollEntry(
-                    erpnext_id=erpnext_id,
-                    posting_date=posting_date,
-                    payroll_frequency=entry_data.get("payroll_frequency"),
-                    start_date=start_date,
-                    end_date=end_date,
-                    company=entry_data.get("company"),
-                    department=entry_data.get("department"),
-                    branch=entry_data.get("branch"),
-                    designation=entry_data.get("designation"),
-                    currency=entry_data.get("currency") or "USD",
-                    exchange_rate=_parse_decimal(entry_data.get("exchange_rate"), Decimal("1")),
-                    payment_account=entry_data.get("payment_account"),
-                    bank_account=entry_data.get("bank_account"),
-                    salary_slips_created=_coerce_bool(entry_data.get("salary_slips_created")),
-                    salary_slips_submitted=_coerce_bool(entry_data.get("salary_slips_submitted")),
-                    docstatus=int(entry_data.get("docstatus") or 0),
-                )
-                sync_client.db.add(entry)
-                sync_client.increment_created()
+                if existing:
+                    existing.posting_date = posting_date
+                    existing.payroll_frequency = entry_data.get("payroll_frequency")
+                    existing.start_date = start_date
+                    existing.end_date = end_date
+                    existing.company = entry_data.get("company")
+                    existing.department = entry_data.get("department")
+                    existing.branch = entry_data.get("branch")
+                    existing.designation = entry_data.get("designation")
+                    existing.currency = entry_data.get("currency") or existing.currency
+                    existing.exchange_rate = _parse_decimal(entry_data.get("exchange_rate"), Decimal("1"))
+                    existing.payment_account = entry_data.get("payment_account")
+                    existing.bank_account = entry_data.get("bank_account")
+                    existing.salary_slips_created = _coerce_bool(entry_data.get("salary_slips_created"))
+                    existing.salary_slips_submitted = _coerce_bool(entry_data.get("salary_slips_submitted"))
+                    existing.docstatus = int(entry_data.get("docstatus") or 0)
+                    existing.last_synced_at = datetime.utcnow()
+                    sync_client.increment_updated()
+                else:
+                    entry = PayrollEntry(
+                        erpnext_id=erpnext_id,
+                        posting_date=posting_date,
+                        payroll_frequency=entry_data.get("payroll_frequency"),
+                        start_date=start_date,
+                        end_date=end_date,
+                        company=entry_data.get("company"),
+                        department=entry_data.get("department"),
+                        branch=entry_data.get("branch"),
+                        designation=entry_data.get("designation"),
+                        currency=entry_data.get("currency") or "USD",
+                        exchange_rate=_parse_decimal(entry_data.get("exchange_rate"), Decimal("1")),
+                        payment_account=entry_data.get("payment_account"),
+                        bank_account=entry_data.get("bank_account"),
+                        salary_slips_created=_coerce_bool(entry_data.get("salary_slips_created")),
+                        salary_slips_submitted=_coerce_bool(entry_data.get("salary_slips_submitted")),
+                        docstatus=int(entry_data.get("docstatus") or 0),
+                    )
+                    sync_client.db.add(entry)
+                    sync_client.increment_created()
 
-        sync_client.db.commit()
-        sync_client._update_sync_cursor("payroll_entries", entries, len(entries))
+        sync_client._finish_checkpointed_sync("payroll_entries", entries, checkpoint)
         sync_client.complete_sync()
 
     except Exception as e:
@@ -866,7 +935,7 @@ async def sync_salary_slips(
     sync_client.start_sync("salary_slips", "full" if full_sync else "incremental")
 
     try:
-        filters = sync_client._get_incremental_filter("salary_slips", full_sync)
+        filters, checkpoint = sync_client._start_checkpointed_sync("salary_slips", full_sync)
         slips = await sync_client._fetch_all_doctype(
             client,
             "Salary Slip",
@@ -900,6 +969,7 @@ async def sync_salary_slips(
                 "modified",
             ],
             filters=filters,
+            order_by=CHECKPOINT_ORDER,
         )
 
         employees_by_erpnext_id: Dict[str, int] = {
@@ -908,139 +978,110 @@ async def sync_salary_slips(
             if e.erpnext_id
         }
 
-        for slip_data in slips:
-            erpnext_id = slip_data.get("name")
-            existing = None
-            if erpnext_id:
-                existing = sync_client.db.query(SalarySlip).filter(
-                    SalarySlip.erpnext_id == erpnext_id
-                ).first()
-
-            posting_date = _parse_date(slip_data.get("posting_date"))
-            start_date = _parse_date(slip_data.get("start_date"))
-            end_date = _parse_date(slip_data.get("end_date"))
-            if not posting_date or not start_date or not end_date:
-                continue
-
-            employee_ref = slip_data.get("employee")
-            employee_id = employees_by_erpnext_id.get(employee_ref) if employee_ref else None
-            status = _map_salary_slip_status(slip_data.get("status"), slip_data.get("docstatus"))
+        for chunk in sync_client._checkpointed_chunks("salary_slips", slips, full_sync, checkpoint):
+            children = await sync_client._fetch_child_rows(
+                client,
+                "Salary Slip",
+                "Salary Detail",
+                [str(slip_data["name"]) for slip_data in chunk if slip_data.get("name")],
+                ("earnings", "deductions"),
+                SALARY_DETAIL_FIELDS,
+            )
+            rows_by_slip: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+
+            for slip_data in chunk:
+                erpnext_id = slip_data.get("name")
+                existing = None
+                if erpnext_id:
+                    existing = sync_client.db.query(SalarySlip).filter(
+                        SalarySlip.erpnext_id == erpnext_id
+                    ).first()
 
-            if existing:
-                existing.employee = employee_ref or existing.employee
-                existing.employee_id = employee_id
-                existing.employee_name = slip_data.get("employee_name")
-                existing.department = slip_data.get("department")
-                existing.designation = slip_data.get("designation")
-                existing.branch = slip_data.get("branch")
-                existing.salary_structure = slip_data.get("salary_structure")
-                existing.posting_date = posting_date
-                existing.start_date = start_date
-                existing.end_date = end_date
-                existing.payroll_frequency = slip_data.get("payroll_frequency")
-                existing.company = slip_data.get("company")
-                existing.currency = slip_data.get("currency") or existing.currency
-                existing.total_working_days = _parse_decimal(slip_data.get("total_working_days"))
-                existing.absent_days = _parse_decimal(slip_data.get("absent_days"))
-                existing.payment_days = _parse_decimal(slip_data.get("payment_days"))
-                existing.leave_without_pay = _parse_decimal(slip_data.get("leave_without_pay"))
-                existing.gross_pay = _parse_decimal(slip_data.get("gross_pay"))
-                existing.total_deduction = _parse_decimal(slip_data.get("total_deduction"))
-                existing.net_pay = _parse_decimal(slip_data.get("net_pay"))
-                existing.rounded_total = _parse_decimal(slip_data.get("rounded_total"))
-                existing.status = status
-                existing.docstatus = int(slip_data.get("docstatus") or 0)
-                existing.bank_name = slip_data.get("bank_name")
-                existing.bank_account_no = slip_data.get("bank_account_no")
-                existing.payroll_entry = slip_data.get("payroll_entry")
-                existing.last_synced_at = datetime.utcnow()
-                slip = existing
-                sync_client.increment_updated()
-            else:
-                slip = SalarySlip(
-                    erpnext_id=erpnext_id,
-                    employee=employee_ref or "",
-                    employee_id=employee_id,
-                    employee_name=slip_data.get("employee_name"),
-                    department=slip_data.get("department"),
-                    designation=slip_data.get("designation"),
-                    branch=slip_data.get("branch"),
-                    salary_structure=slip_data.get("salary_structure"),
-                    posting_date=posting_date,
-                    start_date=start_date,
-                    end_date=end_date,
-                    payroll_frequency=slip_data.get("payroll_frequency"),
-                    company=slip_data.get("company"),
-                    currency=slip_data.get("currency") or "USD",
-                    total_working_days=_parse_decimal(slip_data.get("total_working_days")),
-                    absent_days=_parse_decimal(slip_data.get("absent_days")),
-                    payment_days=_parse_decimal(slip_data.get("payment_days")),
-                    leave_without_pay=_parse_decimal(slip_data.get("leave_without_pay")),
-                    gross_pay=_parse_decimal(slip_data.get("gross_pay")),
-                    total_deduction=_parse_decimal(slip_data.get("total_deduction")),
-                    net_pay=_parse_decimal(slip_data.get("net_pay")),
-                    rounded_total=_parse_decimal(slip_data.get("rounded_total")),
-                    status=status,
-                    docstatus=int(slip_data.get("docstatus") or 0),
-                    bank_name=slip_data.get("bank_name"),
-                    bank_account_no=slip_data.get("bank_account_no"),
-                    payroll_entry=slip_data.get("payroll_entry"),
-                )
-                sync_client.db.add(slip)
-                sync_client.db.flush()
-                sync_client.increment_created()
+                posting_date = _parse_date(slip_data.get("posting_date"))
+                start_date = _parse_date(slip_data.get("start_date"))
+                end_date = _parse_date(slip_data.get("end_date"))
+                if not posting_date or not start_date or not end_date:
+                    continue
 
-            if not erpnext_id:
-                continue
+                employee_ref = slip_data.get("employee")
+                employee_id = employees_by_erpnext_id.get(employee_ref) if employee_ref else None
+                status = _map_salary_slip_status(slip_data.get("status"), slip_data.get("docstatus"))
+
+                if existing:
+                    existing.employee = employee_ref or existing.employee
+                    existing.employee_id = employee_id
+                    existing.employee_name = slip_data.get("employee_name")
+                    existing.department = slip_data.get("department")
+                    existing.designation = slip_data.get("designation")
+                    existing.branch = slip_data.get("branch")
+                    existing.salary_structure = slip_data.get("salary_structure")
+                    existing.posting_date = posting_date
+                    existing.start_date = start_date
+                    existing.end_date = end_date
+                    existing.payroll_frequency = slip_data.get("payroll_frequency")
+                    existing.company = slip_data.get("company")
+                    existing.currency = slip_data.get("currency") or existing.currency
+                    existing.total_working_days = _parse_decimal(slip_data.get("total_working_days"))
+                    existing.absent_days = _parse_decimal(slip_data.get("absent_days"))
+                    existing.payment_days = _parse_decimal(slip_data.get("payment_days"))
+                    existing.leave_without_pay = _parse_decimal(slip_data.get("leave_without_pay"))
+                    existing.gross_pay = _parse_decimal(slip_data.get("gross_pay"))
+                    existing.total_deduction = _parse_decimal(slip_data.get("total_deduction"))
+                    existing.net_pay = _parse_decimal(slip_data.get("net_pay"))
+                    existing.rounded_total = _parse_decimal(slip_data.get("rounded_total"))
+                    existing.status = status
+                    existing.docstatus = int(slip_data.get("docstatus") or 0)
+                    existing.bank_name = slip_data.get("bank_name")
+                    existing.bank_account_no = slip_data.get("bank_account_no")
+                    existing.payroll_entry = slip_data.get("payroll_entry")
+                    existing.last_synced_at = datetime.utcnow()
+                    slip = existing
+                    sync_client.increment_updated()
+                else:
+                    slip = SalarySlip(
+                        erpnext_id=erpnext_id,
+                        employee=employee_ref or "",
+                        employee_id=employee_id,
+                        employee_name=slip_data.get("employee_name"),
+                        department=slip_data.get("department"),
+                        designation=slip_data.get("designation"),
+                        branch=slip_data.get("branch"),
+                        salary_structure=slip_data.get("salary_structure"),
+                        posting_date=posting_date,
+                        start_date=start_date,
+                        end_date=end_date,
+                        payroll_frequency=slip_data.get("payroll_frequency"),
+                        company=slip_data.get("company"),
+                        currency=slip_data.get("currency") or "USD",
+                        total_working_days=_parse_decimal(slip_data.get("total_working_days")),
+                        absent_days=_parse_decimal(slip_data.get("absent_days")),
+                        payment_days=_parse_decimal(slip_data.get("payment_days")),
+                        leave_without_pay=_parse_decimal(slip_data.get("leave_without_pay")),
+                        gross_pay=_parse_decimal(slip_data.get("gross_pay")),
+                        total_deduction=_parse_decimal(slip_data.get("total_deduction")),
+                        net_pay=_parse_decimal(slip_data.get("net_pay")),
+                        rounded_total=_parse_decimal(slip_data.get("rounded_total")),
+                        status=status,
+                        docstatus=int(slip_data.get("docstatus") or 0),
+                        bank_name=slip_data.get("bank_name"),
+                        bank_account_no=slip_data.get("bank_account_no"),
+                        payroll_entry=slip_data.get("payroll_entry"),
+                    )
+                    sync_client.db.add(slip)
+                    sync_client.db.flush()
+                    sync_client.increment_created()
 
-            try:
-                slip_doc = await sync_client._fetch_document(client, "Salary Slip", str(erpnext_id))
-                earnings = slip_doc.get("earnings", [])
-                deductions = slip_doc.get("deductions", [])
+                if not erpnext_id:
+                    continue
 
-                sync_client.db.query(SalarySlipEarning).filter(
-                    SalarySlipEarning.salary_slip_id == slip.id
-                ).delete()
-                sync_client.db.query(SalarySlipDeduction).filter(
-                    SalarySlipDeduction.salary_slip_id == slip.id
-                ).delete()
+                if str(erpnext_id) in children:
+                    rows_by_slip[slip.id] = children[str(erpnext_id)]
+                else:
+                    logger.warning("salary_slip_children_fetch_failed", slip=erpnext_id)
 
-                for row in earnings:
-                    earning = SalarySlipEarning(
-                        salary_slip_id=slip.id,
-                        erpnext_name=row.get("name"),
-                        salary_component=row.get("salary_component") or "",
-                        abbr=row.get("abbr"),
-                        amount=_parse_decimal(row.get("amount")),
-                        default_amount=_parse_decimal(row.get("default_amount")),
-                        additional_amount=_parse_decimal(row.get("additional_amount")),
-                        year_to_date=_parse_decimal(row.get("year_to_date")),
-                        statistical_component=_coerce_bool(row.get("statistical_component")),
-                        do_not_include_in_total=_coerce_bool(row.get("do_not_include_in_total")),
-                        idx=int(row.get("idx") or 0),
-                    )
-                    sync_client.db.add(earning)
-
-                for row in deductions:
-                    deduction = SalarySlipDeduction(
-                        salary_slip_id=slip.id,
-                        erpnext_name=row.get("name"),
-                        salary_component=row.get("salary_component") or "",
-                        abbr=row.get("abbr"),
-                        amount=_parse_decimal(row.get("amount")),
-                        default_amount=_parse_decimal(row.get("default_amount")),
-                        additional_amount=_parse_decimal(row.get("additional_amount")),
-                        year_to_date=_parse_decimal(row.get("year_to_date")),
-                        statistical_component=_coerce_bool(row.get("statistical_component")),
-                        do_not_include_in_total=_coerce_bool(row.get("do_not_include_in_total")),
-                        idx=int(row.get("idx") or 0),
-                    )
-                    sync_client.db.add(deduction)
-            except Exception as e:
-                logger.warning("salary_slip_children_fetch_failed", slip=erpnext_id, error=str(e))
+            _replace_salary_slip_rows(sync_client, rows_by_slip)
 
-        sync_client.db.commit()
-        sync_client._update_sync_cursor("salary_slips", slips, len(slips))
+        sync_client._finish_checkpointed_sync("salary_slips", slips, checkpoint)
         sync_client.complete_sync()
 
     except Exception as e:
@@ -1275,7 +1316,7 @@ async def sync_leave_applications(
     sync_client.start_sync("leave_applications", "full" if full_sync else "incremental")
 
     try:
-        filters = sync_client._get_incremental_filter("leave_applications", full_sync)
+        filters, checkpoint = sync_client._start_checkpointed_sync("leave_applications", full_sync)
         applications = await sync_client._fetch_all_doctype(
             client,
             "Leave Application",
@@ -1299,6 +1340,7 @@ async def sync_leave_applications(
                 "modified",
             ],
             filters=filters,
+            order_by=CHECKPOINT_ORDER,
         )
 
         employees_by_erpnext_id: Dict[str, int] = {
@@ -1317,76 +1359,76 @@ async def sync_leave_applications(
             if lt.erpnext_id
         }
 
-        for app_data in applications:
-            erpnext_id = app_data.get("name")
-            existing = None
-            if erpnext_id:
-                existing = sync_client.db.query(LeaveApplication).filter(
-                    LeaveApplication.erpnext_id == erpnext_id
-                ).first()
-
-            employee_ref = app_data.get("employee")
-            employee_id = employees_by_erpnext_id.get(employee_ref) if employee_ref else None
-            leave_type_name = app_data.get("leave_type") or ""
-            leave_type_id = (
-                leave_types_by_erpnext.get(leave_type_name)
-                or leave_types_by_name.get(leave_type_name)
-            )
+        for chunk in sync_client._checkpointed_chunks("leave_applications", applications, full_sync, checkpoint):
+            for app_data in chunk:
+                erpnext_id = app_data.get("name")
+                existing = None
+                if erpnext_id:
+                    existing = sync_client.db.query(LeaveApplication).filter(
+                        LeaveApplication.erpnext_id == erpnext_id
+                    ).first()
 
-            from_date = _parse_date(app_data.get("from_date"))
-            to_date = _parse_date(app_data.get("to_date"))
-            posting_date = _parse_date(app_data.get("posting_date"))
-            if not from_date or not to_date or not posting_date:
-                continue
+                employee_ref = app_data.get("employee")
+                employee_id = employees_by_erpnext_id.get(employee_ref) if employee_ref else None
+                leave_type_name = app_data.get("leave_type") or ""
+                leave_type_id = (
+                    leave_types_by_erpnext.get(leave_type_name)
+                    or leave_types_by_name.get(leave_type_name)
+                )
 
-            status = _map_leave_application_status(app_data.get("status"), app_data.get("docstatus"))
+                from_date = _parse_date(app_data.get("from_date"))
+                to_date = _parse_date(app_data.get("to_date"))
+                posting_date = _parse_date(app_data.get("posting_date"))
+                if not from_date or not to_date or not posting_date:
+                    continue
 
-            if existing:
-                existing.employee = employee_ref or existing.employee
-                existing.employee_id = employee_id
-                existing.employee_name = app_data.get("employee_name")
-                existing.leave_type = leave_type_name or existing.leave_type
-                existing.leave_type_id = leave_type_id
-                existing.from_date = from_date
-                existing.to_date = to_date
-                existing.half_day = _coerce_bool(app_data.get("half_day"))
-                existing.half_day_date = _parse_date(app_data.get("half_day_date"))
-                existing.total_leave_days = _parse_decimal(app_data.get("total_leave_days"))
-                existing.description = app_data.get("description")
-                existing.leave_approver = app_data.get("leave_approver")
-                existing.leave_approver_name = app_data.get("leave_approver_name")
-                existing.status = status
-                existing.docstatus = int(app_data.get("docstatus") or 0)
-                existing.posting_date = posting_date
-                existing.company = app_data.get("company")
-                existing.last_synced_at = datetime.utcnow()
-                sync_client.increment_updated()
-            else:
-                application = LeaveApplication(
-                    erpnext_id=erpnext_id,
-                    employee=employee_ref or "",
-                    employee_id=employee_id,
-                    employee_name=app_data.get("employee_name"),
-                    leave_type=leave_type_name or "",
-                    leave_type_id=leave_type_id,
-                    from_date=from_date,
-                    to_date=to_date,
-                    half_day=_coerce_bool(app_data.get("half_day")),
-                    half_day_date=_parse_date(app_data.get("half_day_date")),
-                    total_leave_days=_parse_decimal(app_data.get("total_leave_days")),
-                    description=app_data.get("description"),
-                    leave_approver=app_data.get("leave_approver"),
-                    leave_approver_name=app_data.get("leave_approver_name"),
-                    status=status,
-                    docstatus=int(app_data.get("docstatus") or 0),
-                    posting_date=posting_date,
-                    company=app_data.get("company"),
-                )
-                sync_client.db.add(application)
-                sync_client.increment_created()
+                status = _map_leave_application_status(app_data.get("status"), app_data.get("docstatus"))
+
+                if existing:
+                    existing.employee = employee_ref or existing.employee
+                    existing.employee_id = employee_id
+                    existing.employee_name = app_data.get("employee_name")
+                    existing.leave_type = leave_type_name or existing.leave_type
+                    existing.leave_type_id = leave_type_id
+                    existing.from_date = from_date
+                    existing.to_date = to_date
+                    existing.half_day = _coerce_bool(app_data.get("half_day"))
+                    existing.half_day_date = _parse_date(app_data.get("half_day_date"))
+                    existing.total_leave_days = _parse_decimal(app_data.get("total_leave_days"))
+                    existing.description = app_data.get("description")
+                    existing.leave_approver = app_data.get("leave_approver")
+                    existing.leave_approver_name = app_data.get("leave_approver_name")
+                    existing.status = status
+                    existing.docstatus = int(app_data.get("docstatus") or 0)
+                    existing.posting_date = posting_date
+                    existing.company = app_data.get("company")
+                    existing.last_synced_at = datetime.utcnow()
+                    sync_client.increment_updated()
+                else:
+                    application = LeaveApplication(
+                        erpnext_id=erpnext_id,
+                        employee=employee_ref or "",
+                        employee_id=employee_id,
+                        employee_name=app_data.get("employee_name"),
+                        leave_type=leave_type_name or "",
+                        leave_type_id=leave_type_id,
+                        from_date=from_date,
+                        to_date=to_date,
+                        half_day=_coerce_bool(app_data.get("half_day")),
+                        half_day_date=_parse_date(app_data.get("half_day_date")),
+                        total_leave_days=_parse_decimal(app_data.get("total_leave_days")),
+                        description=app_data.get("description"),
+                        leave_approver=app_data.get("leave_approver"),
+                        leave_approver_name=app_data.get("leave_approver_name"),
+                        status=status,
+                        docstatus=int(app_data.get("docstatus") or 0),
+                        posting_date=posting_date,
+                        company=app_data.get("company"),
+                    )
+                    sync_client.db.add(application)
+                    sync_client.increment_created()
 
-        sync_client.db.commit()
-        sync_client._update_sync_cursor("leave_applications", applications, len(applications))
+        sync_client._finish_checkpointed_sync("leave_applications", applications, checkpoint)
         sync_client.complete_sync()
 
     except Exception as e:
@@ -1404,7 +1446,7 @@ async def sync_attendances(
     sync_client.start_sync("attendances", "full" if full_sync else "incremental")
 
     try:
-        filters = sync_client._get_incremental_filter("attendances", full_sync)
+        filters, checkpoint = sync_client._start_checkpointed_sync("attendances", full_sync)
         attendances = await sync_client._fetch_all_doctype(
             client,
             "Attendance",
@@ -1427,6 +1469,7 @@ async def sync_attendances(
                 "modified",
             ],
             filters=filters,
+            order_by=CHECKPOINT_ORDER,
         )
 
         employees_by_erpnext_id: Dict[str, int] = {
@@ -1438,90 +1481,90 @@ async def sync_attendances(
         # Track pending additions to handle duplicates in same batch
         pending_by_key: Dict[tuple, Attendance] = {}
 
-        for att_data in attendances:
-            erpnext_id = att_data.get("name")
-            employee_ref = att_data.get("employee")
-            employee_id = employees_by_erpnext_id.get(employee_ref) if employee_ref else None
-            attendance_date = _parse_date(att_data.get("attendance_date"))
-            if not attendance_date:
-                continue
-
-            # Look up by erpnext_id first
-            existing = None
-            if erpnext_id:
-                existing = sync_client.db.query(Attendance).filter(
-                    Attendance.erpnext_id == erpnext_id
-                ).first()
-
-            # Fall back to employee_id + date (unique constraint)
-            if not existing and employee_id:
-                existing = sync_client.db.query(Attendance).filter(
-                    Attendance.employee_id == employee_id,
-                    Attendance.attendance_date == attendance_date,
-                ).first()
+        for chunk in sync_client._checkpointed_chunks("attendances", attendances, full_sync, checkpoint):
+            for att_data in chunk:
+                erpnext_id = att_data.get("name")
+                employee_ref = att_data.get("employee")
+                employee_id = employees_by_erpnext_id.get(employee_ref) if employee_ref else None
+                attendance_date = _parse_date(att_data.get("attendance_date"))
+                if not attendance_date:
+                    continue
 
-            # Check pending additions in current batch (not yet committed)
-            batch_key = (employee_id, attendance_date)
-            if not existing and batch_key in pending_by_key:
-                existing = pending_by_key[batch_key]
+                # Look up by erpnext_id first
+                existing = None
+                if erpnext_id:
+                    existing = sync_client.db.query(Attendance).filter(
+                        Attendance.erpnext_id == erpnext_id
+                    ).first()
 
-            status = _map_attendance_status(att_data.get("status"))
+                # Fall back to employee_id + date (unique constraint)
+                if not existing and employee_id:
+                    existing = sync_client.db.query(Attendance).filter(
+                        Attendance.employee_id == employee_id,
+                        Attendance.attendance_date == attendance_date,
+                    ).first()
 
-            if existing:
-                existing.employee = employee_ref or existing.employee
-                existing.employee_id = employee_id
-                existing.employee_name = att_data.get("employee_name")
-                existing.attendance_date = attendance_date
-                existing.status = status
-                existing.leave_type = att_data.get("leave_type")
-                existing.leave_application = att_data.get("leave_application")
-                existing.shift = att_data.get("shift")
-                existing.in_time = _parse_datetime(att_data.get("in_time"))
-                existing.out_time = _parse_datetime(att_data.get("out_time"))
-                existing.working_hours = _parse_decimal(att_data.get("working_hours"))
-                existing.check_in_latitude = att_data.get("check_in_latitude")
-                existing.check_in_longitude = att_data.get("check_in_longitude")
-                existing.check_out_latitude = att_data.get("check_out_latitude")
-                existing.check_out_longitude = att_data.get("check_out_longitude")
-                existing.device_info = att_data.get("device_info")
-                existing.late_entry = _coerce_bool(att_data.get("late_entry"))
-                existing.early_exit = _coerce_bool(att_data.get("early_exit"))
-                existing.company = att_data.get("company")
-                existing.docstatus = int(att_data.get("docstatus") or 0)
-                existing.last_synced_at = datetime.utcnow()
-                sync_client.increment_updated()
-            else:
-                attendance = Attendance(
-                    erpnext_id=erpnext_id,
-                    employee=employee_ref or "",
-                    employee_id=employee_id,
-                    employee_name=att_data.get("employee_name"),
-                    attendance_date=attendance_date,
-                    status=status,
-                    leave_type=att_data.get("leave_type"),
-                    leave_application=att_data.get("leave_application"),
-                    shift=att_data.get("shift"),
-                    in_time=_parse_datetime(att_data.get("in_time")),
-                    out_time=_parse_datetime(att_data.get("out_time")),
-                    working_hours=_parse_decimal(att_data.get("working_hours")),
-                    check_in_latitude=att_data.get("check_in_latitude"),
-                    check_in_longitude=att_data.get("check_in_longitude"),
-                    check_out_latitude=att_data.get("check_out_latitude"),
-                    check_out_longitude=att_data.get("check_out_longitude"),
-                    device_info=att_data.get("device_info"),
-                    late_entry=_coerce_bool(att_data.get("late_entry")),
-                    early_exit=_coerce_bool(att_data.get("early_exit")),
-                    company=att_data.get("company"),
-                    docstatus=int(att_data.get("docstatus") or 0),
-                )
-                sync_client.db.add(attendance)
-                # Track in pending dict to detect duplicates in same batch
-                if employee_id and attendance_date:
-                    pending_by_key[batch_key] = attendance
-                sync_client.increment_created()
+                # Check pending additions in current batch (not yet committed)
+                batch_key = (employee_id, attendance_date)
+                if not existing and batch_key in pending_by_key:
+                    existing = pending_by_key[batch_key]
+
+                status = _map_attendance_status(att_data.get("status"))
+
+                if existing:
+                    existing.employee = employee_ref or existing.employee
+                    existing.employee_id = employee_id
+                    existing.employee_name = att_data.get("employee_name")
+                    existing.attendance_date = attendance_date
+                    existing.status = status
+                    existing.leave_type = att_data.get("leave_type")
+                    existing.leave_application = att_data.get("leave_application")
+                    existing.shift = att_data.get("shift")
+                    existing.in_time = _parse_datetime(att_data.get("in_time"))
+                    existing.out_time = _parse_datetime(att_data.get("out_time"))
+                    existing.working_hours = _parse_decimal(att_data.get("working_hours"))
+                    existing.check_in_latitude = att_data.get("check_in_latitude")
+                    existing.check_in_longitude = att_data.get("check_in_longitude")
+                    existing.check_out_latitude = att_data.get("check_out_latitude")
+                    existing.check_out_longitude = att_data.get("check_out_longitude")
+                    existing.device_info = att_data.get("device_info")
+                    existing.late_entry = _coerce_bool(att_data.get("late_entry"))
+                    existing.early_exit = _coerce_bool(att_data.get("early_exit"))
+                    existing.company = att_data.get("company")
+                    existing.docstatus = int(att_data.get("docstatus") or 0)
+                    existing.last_synced_at = datetime.utcnow()
+                    sync_client.increment_updated()
+                else:
+                    attendance = Attendance(
+                        erpnext_id=erpnext_id,
+                        employee=employee_ref or "",
+                        employee_id=employee_id,
+                        employee_name=att_data.get("employee_name"),
+                        attendance_date=attendance_date,
+                        status=status,
+                        leave_type=att_data.get("leave_type"),
+                        leave_application=att_data.get("leave_application"),
+                        shift=att_data.get("shift"),
+                        in_time=_parse_datetime(att_data.get("in_time")),
+                        out_time=_parse_datetime(att_data.get("out_time")),
+                        working_hours=_parse_decimal(att_data.get("working_hours")),
+                        check_in_latitude=att_data.get("check_in_latitude"),
+                        check_in_longitude=att_data.get("check_in_longitude"),
+                        check_out_latitude=att_data.get("check_out_latitude"),
+                        check_out_longitude=att_data.get("check_out_longitude"),
+                        device_info=att_data.get("device_info"),
+                        late_entry=_coerce_bool(att_data.get("late_entry")),
+                        early_exit=_coerce_bool(att_data.get("early_exit")),
+                        company=att_data.get("company"),
+                        docstatus=int(att_data.get("docstatus") or 0),
+                    )
+                    sync_client.db.add(attendance)
+                    # Track in pending dict to detect duplicates in same batch
+                    if employee_id and attendance_date:
+                        pending_by_key[batch_key] = attendance
+                    sync_client.increment_created()
 
-        sync_client.db.commit()
-        sync_client._update_sync_cursor("attendances", attendances, len(attendances))
+        sync_client._finish_checkpointed_sync("attendances", attendances, checkpoint)
         sync_client.complete_sync()
 
     except Exception as e:
@@ -1546,6 +1589,27 @@ def resolve_employee_relationships(sync_client: "ERPNextSync") -> int:
         for e in sync_client.db.query(Employee).filter(Employee.erpnext_id.isnot(None)).all()
     }
 
+    # Manager links change in bulk here; rebuild the hierarchy once afterwards
+    # instead of moving subtrees row by row in the flush hook.
+    sync_client.db.info[DEFER_HIERARCHY_UPDATES] = True
+    try:
+        updated = _resolve_employee_links(sync_client, dept_map, desig_map, emp_map)
+        sync_client.db.commit()
+    finally:
+        sync_client.db.info.pop(DEFER_HIERARCHY_UPDATES, None)
+    reconcile_employee_hierarchy(sync_client.db)
+
+    logger.info(f"Resolved {updated} employee relationships")
+    return updated
+
+
+def _resolve_employee_links(
+    sync_client: "ERPNextSync",
+    dept_map: Dict[str, int],
+    desig_map: Dict[str, int],
+    emp_map: Dict[str, int],
+) -> int:
+    """Set department/designation/manager FKs from their text fields."""
     updated = 0
     for emp in sync_client.db.query(Employee).all():
         changed = False
@@ -1570,9 +1634,6 @@ def resolve_employee_relationships(sync_client: "ERPNextSync") -> int:
 
         if changed:
             updated += 1
-
-    sync_client.db.commit()
-    logger.info(f"Resolved {updated} employee relationships")
     return updated
 
 
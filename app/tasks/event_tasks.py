@@ -31,7 +31,7 @@ def dispatch_event(self, event_dict: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Summary of handler execution results
     """
-    from app.services.event_bus import Event, _handler_registry
+    from app.services.event_bus import Event, _batch_handler_registry, _handler_registry
     from app.database import SessionLocal
 
     event = Event.from_dict(event_dict)
@@ -51,8 +51,9 @@ def dispatch_event(self, event_dict: Dict[str, Any]) -> Dict[str, Any]:
         pass
 
     handlers = _handler_registry.get(event_type, [])
+    batch_handlers = _batch_handler_registry.get(event_type, [])
 
-    if not handlers:
+    if not handlers and not batch_handlers:
         logger.debug(
             "no_handlers_for_event",
             event_type=event_type,
@@ -69,8 +70,11 @@ def dispatch_event(self, event_dict: Dict[str, Any]) -> Dict[str, Any]:
     failed = 0
     errors = []
 
+    # Batch handlers get a one-event batch on this path
+    calls = [(h, [event]) for h in batch_handlers] + [(h, event) for h in handlers]
+
     with SessionLocal() as db:
-        for handler in handlers:
+        for handler, argument in calls:
             try:
                 logger.debug(
                     "executing_handler",
@@ -78,7 +82,7 @@ def dispatch_event(self, event_dict: Dict[str, Any]) -> Dict[str, Any]:
                     event_id=event.event_id,
                 )
                 # Call handler with event and db session
-                handler(event, db)
+                handler(argument, db)
                 db.commit()
                 executed += 1
             except Exception as e:
@@ -110,3 +114,45 @@ def dispatch_event(self, event_dict: Dict[str, Any]) -> Dict[str, Any]:
     )
 
     return result
+
+
+@celery_app.task(
+    name="events.consume_stream",
+    soft_time_limit=90,
+    time_limit=120,
+)
+def consume_event_stream(
+    batch_size: int = 200,
+    max_seconds: float = 50.0,
+    block_ms: int = 1000,
+    reclaim_idle_ms: int = 120_000,
+) -> Dict[str, Any]:
+    """
+    Consume the event stream in batches (streams backend).
+
+    Runs every minute and keeps reading until the stream is idle or
+    max_seconds have passed. Overlapping runs are safe: each run is a
+    separate consumer in the same group. Entries left pending by a crashed
+    consumer are reclaimed first.
+    """
+    from app.services.event_bus import get_event_bus
+    from app.services.event_stream import StreamConsumer
+
+    stream = get_event_bus().stream
+    if stream is None:
+        return {"skipped": True}
+
+    # Import handler modules to populate registry
+    try:
+        import app.tasks.workflow_tasks  # noqa: F401
+    except ImportError:
+        pass
+
+    consumer = StreamConsumer(stream)
+    reclaimed = consumer.reclaim(min_idle_ms=reclaim_idle_ms, count=batch_size)
+    consumed = consumer.drain(count=batch_size, max_seconds=max_seconds, block_ms=block_ms)
+
+    result = {"consumer": consumer.consumer, "reclaimed": reclaimed, "consumed": consumed}
+    if consumed["read"] or reclaimed["read"] or reclaimed.get("dead_lettered"):
+        logger.info("event_stream_consumed", **result)
+    return result
@@ -0,0 +1,54 @@
+"""Celery tasks for the HR module - leave balance maintenance."""
+from typing import Optional
+
+import redis
+import structlog
+
+from app.worker import celery_app
+from app.config import settings
+from app.database import SessionLocal
+
+logger = structlog.get_logger()
+
+# Redis client for distributed locks
+_redis_client: Optional[redis.Redis] = None
+
+
+def get_redis_client() -> redis.Redis:
+    """Get or create Redis client for locks."""
+    global _redis_client
+    if _redis_client is None:
+        redis_url = settings.redis_url or "redis://localhost:6379/0"
+        _redis_client = redis.from_url(redis_url)
+    return _redis_client
+
+
+@celery_app.task(name="hr.reconcile_leave_balances")
+def reconcile_leave_balances():
+    """
+    Correct drift in leave balances and the leave ledger.
+
+    Both are maintained when leave allocations are flushed through the ORM or
+    written by the HR bulk service; syncs and writes that bypass them are
+    caught here.
+    """
+    from app.services.leave_ledger import reconcile_leave_balances as reconcile_balance_rows
+
+    lock = get_redis_client().lock("celery_lock:hr:leave_balance_reconcile", timeout=600, blocking=False)
+    if not lock.acquire():
+        logger.info("leave_balance_reconcile_skipped_lock")
+        return {"success": False, "error": "Leave balance reconcile already running"}
+
+    try:
+        db = SessionLocal()
+        try:
+            result = reconcile_balance_rows(db)
+            logger.info("leave_balance_reconcile_completed", **result)
+            return {"success": True, **result}
+        finally:
+            db.close()
+    finally:
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            pass
@@ -0,0 +1,58 @@
+"""Celery tasks for inventory valuation (cost layers and snapshots)."""
+from datetime import date
+from typing import Optional
+
+import structlog
+
+from app.worker import celery_app
+from app.database import SessionLocal
+from app.services.inventory_valuation_service import InventoryValuationService
+
+logger = structlog.get_logger()
+
+
+@celery_app.task
+def sync_inventory_valuation():
+    """Apply newly posted stock ledger entries to the FIFO/LIFO cost layers."""
+    db = SessionLocal()
+    try:
+        processed = InventoryValuationService(db).sync()
+        return {"processed": processed}
+    finally:
+        db.close()
+
+
+@celery_app.task(time_limit=3600, soft_time_limit=3500)
+def snapshot_inventory_valuation(snapshot_date: Optional[str] = None):
+    """Store end-of-day cost layer snapshots (default: yesterday).
+
+    Args:
+        snapshot_date: Day to snapshot (YYYY-MM-DD)
+    """
+    db = SessionLocal()
+    try:
+        service = InventoryValuationService(db)
+        processed = service.sync()
+        written = service.snapshot(date.fromisoformat(snapshot_date) if snapshot_date else None)
+        return {"processed": processed, "snapshots": written}
+    except Exception as e:
+        logger.exception("inventory_valuation_snapshot_failed", error=str(e))
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(time_limit=3600, soft_time_limit=3500)
+def rebuild_inventory_valuation(item_code: Optional[str] = None, warehouse: Optional[str] = None):
+    """Recompute cost layers from the full ledger, e.g. after entries were cancelled.
+
+    Args:
+        item_code: Limit the rebuild to one item
+        warehouse: Limit the rebuild to one warehouse
+    """
+    db = SessionLocal()
+    try:
+        pairs = InventoryValuationService(db).rebuild(item_code=item_code, warehouse=warehouse)
+        return {"pairs": pairs}
+    finally:
+        db.close()
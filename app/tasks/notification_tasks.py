@@ -6,17 +6,19 @@ import structlog
 from app.worker import celery_app
 from app.database import SessionLocal
 from app.services.notification_service import NotificationService
+from app.services.webhook_delivery import WebhookDeliveryWorker
 from app.models.notification import WebhookDelivery, NotificationStatus, EmailQueue
 
 logger = structlog.get_logger()
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=30)
-def process_pending_webhooks(self, batch_size: int = 50):
+def process_pending_webhooks(self, batch_size: int = 200):
     """Process pending webhook deliveries.
 
-    Fetches webhooks that are pending and due for delivery/retry,
-    then attempts to deliver each one.
+    Fetches webhooks that are pending and due for delivery/retry and sends
+    them concurrently (per-endpoint connection reuse, concurrency limits
+    and circuit breakers), then records all results in one batch.
 
     Args:
         batch_size: Maximum number of webhooks to process in this run
@@ -25,50 +27,28 @@ def process_pending_webhooks(self, batch_size: int = 50):
     logger.info("task_started", task=task_name, batch_size=batch_size)
 
     db = SessionLocal()
-    processed = 0
-    succeeded = 0
-    failed = 0
 
     try:
-        service = NotificationService(db)
-        pending = service.get_pending_deliveries(limit=batch_size)
-
-        logger.info(
-            "webhooks_to_process",
-            task=task_name,
-            count=len(pending),
-        )
-
-        for delivery in pending:
-            try:
-                success = service.deliver_webhook(delivery.id)
-                processed += 1
-                if success:
-                    succeeded += 1
-                else:
-                    failed += 1
-            except Exception as e:
-                logger.error(
-                    "webhook_delivery_error",
-                    delivery_id=delivery.id,
-                    error=str(e),
-                )
-                failed += 1
+        result = WebhookDeliveryWorker(db).run(limit=batch_size)
+        failed = result["retry"] + result["failed"]
 
         logger.info(
             "task_completed",
             task=task_name,
-            processed=processed,
-            succeeded=succeeded,
+            processed=result["processed"],
+            succeeded=result["delivered"],
             failed=failed,
+            skipped=result["skipped"],
+            duration_seconds=result["duration_seconds"],
         )
 
         return {
             "status": "success",
             "task": task_name,
-            "processed": processed,
-            "succeeded": succeeded,
+            "processed": result["processed"],
+            "succeeded": result["delivered"],
             "failed": failed,
+            "skipped": result["skipped"],
         }
 
     except Exception as e:
@@ -20,6 +20,12 @@ from app.models.omni import (
     OmniAttachment,
 )
 from app.models.agent import Agent
+from app.services.inbox_backplane import (
+    InboxEvent,
+    inbox_message,
+    publish_inbox_event,
+    request_inbox_stats_refresh,
+)
 from app.worker import celery_app
 
 
@@ -179,6 +185,26 @@ def _persist_message(
     return msg
 
 
+def _publish_received(messages: List[OmniMessage]) -> None:
+    """Notify inbox WebSocket clients, on whichever API worker, of new mail."""
+    for msg in messages:
+        targets: List[Dict[str, Any]] = [{"channel": "messages"}]
+        if msg.conversation.assigned_agent_id:
+            targets.append({"agent_id": msg.conversation.assigned_agent_id})
+        publish_inbox_event(targets, inbox_message(InboxEvent.NEW_MESSAGE, {
+            "conversation_id": msg.conversation_id,
+            "message": {
+                "id": msg.id,
+                "conversation_id": msg.conversation_id,
+                "direction": msg.direction,
+                "subject": msg.subject,
+                "created_at": msg.created_at.isoformat() if msg.created_at else None,
+            },
+        }))
+    if messages:
+        request_inbox_stats_refresh()
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60)
 def poll_email_channel(self, channel_id: int):
     """Poll an IMAP inbox for new messages for a given channel."""
@@ -212,6 +238,7 @@ def poll_email_channel(self, channel_id: int):
             return
 
         seen_nums: List[bytes] = []
+        received: List[OmniMessage] = []
         for num in data[0].split():
             status, msg_data = imap.fetch(num, "(RFC822)")
             if status != "OK":
@@ -230,11 +257,12 @@ def poll_email_channel(self, channel_id: int):
 
             participant = _get_or_create_participant(db, payload.get("sender") or "", channel.type)
             conv = _get_or_create_conversation(db, channel, thread_id, payload.get("subject"))
-            _persist_message(db, conv, participant, channel, payload)
+            received.append(_persist_message(db, conv, participant, channel, payload))
 
             seen_nums.append(num)
 
         db.commit()
+        _publish_received(received)
 
         for num in seen_nums:
             imap.store(num, "+FLAGS", "\\Seen")
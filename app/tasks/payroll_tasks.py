@@ -0,0 +1,51 @@
+"""Celery tasks for background payroll runs."""
+import structlog
+
+from app.worker import celery_app
+from app.database import SessionLocal
+from app.services.payroll_run_service import PayrollRunService
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(bind=True, max_retries=0, time_limit=7200, soft_time_limit=7000)
+def run_payroll_run(self, run_id: int):
+    """Generate salary slips for a payroll run.
+
+    Args:
+        run_id: ID of the payroll run to process
+    """
+    logger.info("payroll_run_task_started", run_id=run_id, task_id=self.request.id)
+
+    db = SessionLocal()
+    try:
+        run = PayrollRunService(db).run(run_id, task_id=self.request.id)
+        return {
+            "run_id": run.id,
+            "status": run.status.value,
+            "created": run.created_count,
+            "skipped": run.skipped_count,
+        }
+    except Exception as e:
+        logger.exception("payroll_run_task_failed", run_id=run_id, error=str(e))
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def resume_stale_payroll_runs():
+    """Re-queue running payroll runs whose worker died mid-run."""
+    db = SessionLocal()
+    try:
+        service = PayrollRunService(db)
+        resumed = []
+        for run in service.stale_runs():
+            service.resume(run.id)
+            run_payroll_run.delay(run.id)
+            resumed.append(run.id)
+        if resumed:
+            logger.info("payroll_runs_resumed", run_ids=resumed)
+        return {"resumed": resumed}
+    finally:
+        db.close()
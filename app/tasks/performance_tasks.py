@@ -391,8 +391,9 @@ def send_weekly_summaries():
 
     Scheduled via Celery beat to run every Monday morning.
     """
+    from app.models.auth import User
     from app.models.performance import EvaluationPeriod, EvaluationPeriodStatus
-    from app.models.employee import Employee
+    from app.services.employee_hierarchy import get_managers
     from app.services.performance_notification_service import PerformanceNotificationService
 
     logger.info("send_weekly_summaries_started")
@@ -412,14 +413,12 @@ def send_weekly_summaries():
             logger.info("send_weekly_summaries_no_active_periods")
             return {"success": True, "message": "No active periods"}
 
-        # Filter to only those who have direct reports
-        manager_ids = set()
+        # Only employees with direct reports, resolved to users in one lookup
+        manager_emails = [m.email for m in get_managers(db) if m.email]
+        manager_ids = {
+            user_id for (user_id,) in db.query(User.id).filter(User.email.in_(manager_emails))
+        } if manager_emails else set()
         notification_service = PerformanceNotificationService(db)
-        for emp in db.query(Employee).filter(Employee.reports_to.isnot(None)).all():
-            manager = db.query(Employee).filter(Employee.name == emp.reports_to).first()
-            manager_user_id = notification_service._get_user_id_for_employee(manager)
-            if manager_user_id:
-                manager_ids.add(manager_user_id)
         summaries_sent = 0
 
         for period in active_periods:
@@ -586,3 +585,28 @@ def generate_period_report(period_id: int, email_recipients: Optional[List[str]]
 
     finally:
         db.close()
+
+
+@celery_app.task(name="performance.reconcile_employee_hierarchy")
+def reconcile_employee_hierarchy():
+    """
+    Correct drift in the employee hierarchy closure table.
+
+    Rows are maintained when employees are flushed through the ORM; bulk
+    syncs and writes that bypass it are caught here.
+    """
+    from app.services.employee_hierarchy import reconcile_employee_hierarchy as reconcile_hierarchy_rows
+
+    try:
+        with TaskLock("employee_hierarchy_reconcile", timeout=600):
+            db = SessionLocal()
+            try:
+                result = reconcile_hierarchy_rows(db)
+                logger.info("employee_hierarchy_reconcile_completed", **result)
+                return {"success": True, **result}
+            finally:
+                db.close()
+
+    except TaskLockError:
+        logger.info("employee_hierarchy_reconcile_skipped_lock")
+        return {"success": False, "error": "Hierarchy reconcile already running"}
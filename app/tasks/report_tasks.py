@@ -0,0 +1,40 @@
+"""Celery tasks for background report jobs."""
+import structlog
+
+from app.worker import celery_app
+from app.database import SessionLocal
+from app.services.report_job_service import ReportJobService
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(bind=True, max_retries=0, time_limit=3600, soft_time_limit=3500)
+def run_report_job(self, job_id: int):
+    """Compute a report job and persist its result.
+
+    Args:
+        job_id: ID of the report job to run
+    """
+    logger.info("report_job_task_started", job_id=job_id, task_id=self.request.id)
+
+    db = SessionLocal()
+    try:
+        job = ReportJobService(db).run(job_id, task_id=self.request.id)
+        return {"job_id": job.id, "status": job.status.value}
+    except Exception as e:
+        logger.exception("report_job_task_failed", job_id=job_id, error=str(e))
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def purge_expired_report_jobs(limit: int = 500):
+    """Delete expired report results and stale failed jobs."""
+    db = SessionLocal()
+    try:
+        purged = ReportJobService(db).purge_expired(limit=limit)
+        logger.info("report_jobs_purged", count=purged)
+        return {"purged": purged}
+    finally:
+        db.close()
@@ -12,6 +12,7 @@ from app.models.support_automation import AutomationTrigger
 from app.services.sla_engine import SLAEngine
 from app.services.routing_engine import RoutingEngine
 from app.services.automation_executor import AutomationExecutor
+from app.services.agent_workload import reconcile_agent_workload as reconcile_workload_counters
 
 logger = structlog.get_logger()
 
@@ -325,6 +326,47 @@ def rebalance_workload(self, team_id: Optional[int] = None):
         raise
 
 
+@celery_app.task(
+    name="support.reconcile_agent_workload",
+    bind=True,
+    max_retries=1,
+)
+def reconcile_agent_workload(self):
+    """Correct drift in the agent open-ticket counters.
+
+    Counters are updated when tickets are flushed through the ORM; bulk
+    updates and sync jobs that bypass it are caught here.
+    """
+    try:
+        with SupportTaskLock("workload_reconcile", timeout=300):
+            db = SessionLocal()
+            try:
+                result = reconcile_workload_counters(db)
+
+                logger.info(
+                    "agent_workload_reconcile_complete",
+                    corrected=result["corrected"],
+                    drift=result["drift"],
+                )
+
+                return {
+                    "status": "success",
+                    "assignees_checked": result["assignees_checked"],
+                    "corrected": result["corrected"],
+                    "drift": result["drift"],
+                }
+
+            finally:
+                db.close()
+
+    except SupportTaskLockError:
+        logger.info("workload_reconcile_task_skipped_lock")
+        return {"status": "skipped", "reason": "lock_held"}
+    except Exception as e:
+        logger.error("workload_reconcile_task_failed", error=str(e))
+        raise
+
+
 # =============================================================================
 # TICKET EVENT TASKS
 # =============================================================================
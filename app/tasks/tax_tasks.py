@@ -0,0 +1,51 @@
+"""Celery tasks for background tax document processing."""
+import structlog
+
+from app.worker import celery_app
+from app.database import SessionLocal
+from app.services.einvoice_batch_service import EInvoiceBatchService
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(bind=True, max_retries=0, time_limit=7200, soft_time_limit=7000)
+def run_einvoice_batch(self, batch_id: int):
+    """Validate and render UBL for an e-invoice batch.
+
+    Args:
+        batch_id: ID of the e-invoice batch to process
+    """
+    logger.info("einvoice_batch_task_started", batch_id=batch_id, task_id=self.request.id)
+
+    db = SessionLocal()
+    try:
+        batch = EInvoiceBatchService(db).run(batch_id, task_id=self.request.id)
+        return {
+            "batch_id": batch.id,
+            "status": batch.status.value,
+            "valid": batch.valid_count,
+            "invalid": batch.invalid_count,
+        }
+    except Exception as e:
+        logger.exception("einvoice_batch_task_failed", batch_id=batch_id, error=str(e))
+        return {"error": str(e)}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def resume_stale_einvoice_batches():
+    """Re-queue running e-invoice batches whose worker died mid-batch."""
+    db = SessionLocal()
+    try:
+        service = EInvoiceBatchService(db)
+        resumed = []
+        for batch in service.stale_batches():
+            service.resume(batch.id)
+            run_einvoice_batch.delay(batch.id)
+            resumed.append(batch.id)
+        if resumed:
+            logger.info("einvoice_batches_resumed", batch_ids=resumed)
+        return {"resumed": resumed}
+    finally:
+        db.close()
@@ -37,7 +37,7 @@ def get_template_env() -> Environment:
     env = Environment(
         loader=FileSystemLoader(str(TEMPLATES_DIR)),
         autoescape=select_autoescape(
-            enabled_extensions=("html", "htm", "xml", "html.j2"),
+            enabled_extensions=("html", "htm", "xml", "html.j2", "xml.j2"),
             default_for_string=False,
         ),
         trim_blocks=True,
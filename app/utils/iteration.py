@@ -0,0 +1,21 @@
+"""
+Iteration Utility Module
+
+Helpers for processing sequences in fixed-size pieces.
+
+Usage:
+    from app.utils.iteration import chunked
+
+    for chunk in chunked(ids, settings.hr_bulk_chunk_size):
+        ...
+"""
+from typing import Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Yield consecutive slices of at most ``size`` items."""
+    size = max(size, 1)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
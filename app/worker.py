@@ -29,6 +29,13 @@ celery_app = Celery(
         "app.tasks.event_tasks",
         "app.tasks.workflow_tasks",
         "app.tasks.scheduled_actions",
+        "app.tasks.report_tasks",
+        "app.tasks.payroll_tasks",
+        "app.tasks.tax_tasks",
+        "app.tasks.hr_tasks",
+        "app.tasks.inventory_tasks",
+        "app.tasks.support_automation",
+        "app.tasks.notification_tasks",
     ],
 )
 
@@ -166,6 +173,58 @@ celery_app.conf.beat_schedule = {
         "schedule": crontab(minute="*/10"),  # Every 10 minutes
         "kwargs": {"limit": 50},
     },
+    # Background report jobs - purge expired results nightly
+    "report-jobs-purge-expired": {
+        "task": "app.tasks.report_tasks.purge_expired_report_jobs",
+        "schedule": crontab(hour=3, minute=30),
+        "kwargs": {"limit": 500},
+    },
+    # Payroll runs - resume runs whose worker stopped committing progress
+    "payroll-runs-resume-stale": {
+        "task": "app.tasks.payroll_tasks.resume_stale_payroll_runs",
+        "schedule": crontab(minute="*/15"),
+    },
+    # E-invoice batches - resume batches whose worker stopped committing progress
+    "einvoice-batches-resume-stale": {
+        "task": "app.tasks.tax_tasks.resume_stale_einvoice_batches",
+        "schedule": crontab(minute="*/15"),
+    },
+    # Leave balances - correct drift from allocation writes that bypass the ledger
+    "hr-reconcile-leave-balances": {
+        "task": "hr.reconcile_leave_balances",
+        "schedule": crontab(hour=0, minute=50),  # Daily at 00:50
+    },
+    # Inventory valuation - apply new stock ledger entries to cost layers
+    "inventory-valuation-sync": {
+        "task": "app.tasks.inventory_tasks.sync_inventory_valuation",
+        "schedule": crontab(minute="*/15"),
+    },
+    # Inventory valuation - nightly end-of-day layer snapshot
+    "inventory-valuation-snapshot": {
+        "task": "app.tasks.inventory_tasks.snapshot_inventory_valuation",
+        "schedule": crontab(hour=0, minute=45),
+    },
+    # Inventory valuation - weekly full rebuild to correct any drift from ledger edits
+    "inventory-valuation-rebuild": {
+        "task": "app.tasks.inventory_tasks.rebuild_inventory_valuation",
+        "schedule": crontab(hour=1, minute=30, day_of_week=0),  # Sundays at 1:30 AM
+    },
+    # Outbound webhooks - deliver pending deliveries and due retries
+    "webhooks-process-pending": {
+        "task": "app.tasks.notification_tasks.process_pending_webhooks",
+        "schedule": crontab(minute="*"),  # Every minute
+        "kwargs": {"batch_size": 200},
+    },
+    # Event bus streams backend - batch consumer (no-op with the celery backend)
+    "events-consume-stream": {
+        "task": "events.consume_stream",
+        "schedule": crontab(minute="*"),  # Every minute, drains for up to 50s
+    },
+    # Agent workload counters - correct drift from writes that bypass the ORM
+    "support-reconcile-agent-workload": {
+        "task": "support.reconcile_agent_workload",
+        "schedule": crontab(minute="27,57"),  # Every 30 mins
+    },
     # Performance module tasks
     "performance-check-scoring-deadlines": {
         "task": "performance.check_scoring_deadlines",
@@ -183,6 +242,10 @@ celery_app.conf.beat_schedule = {
         "task": "performance.send_weekly_summaries",
         "schedule": crontab(hour=8, minute=30, day_of_week=1),  # Every Monday at 8:30 AM
     },
+    "performance-reconcile-employee-hierarchy": {
+        "task": "performance.reconcile_employee_hierarchy",
+        "schedule": crontab(hour=0, minute=40),  # Daily at 00:40 - catch rows missed by bulk writes
+    },
     # Contacts reconciliation - hourly
     "contacts-reconciliation": {
         "task": "app.tasks.contacts_tasks.run_contacts_reconciliation",
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Search Index Benchmark
+
+Seeds a customers-shaped table and times the leading-wildcard ILIKE scan used
+before the search service against the index the search service relies on:
+- Postgres: pg_trgm GIN indexes (same definition as the search migration)
+- SQLite: FTS5 external-content table with the trigram tokenizer
+
+The benchmark table (search_bench_customers) is separate from the real
+customers table and is dropped afterwards unless --keep is given.
+
+Usage:
+    python scripts/benchmark_search.py                          # 1M rows, DATABASE_URL
+    python scripts/benchmark_search.py --rows 200000 --repeat 10
+    python scripts/benchmark_search.py --database-url sqlite:///./bench.db
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+TABLE = "search_bench_customers"
+COLUMNS = ("name", "email", "phone", "account_number")
+TERMS = ["adebayo", "customer 4242", "0803", "acc-00099", "zzzz-no-match"]
+
+
+# =============================================================================
+# SEEDING
+# =============================================================================
+
+
+def seed_postgres(conn: Connection, rows: int) -> None:
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    conn.execute(text(f"""
+        CREATE TABLE {TABLE} (
+            id bigint PRIMARY KEY,
+            name varchar(255) NOT NULL,
+            email varchar(255),
+            phone varchar(255),
+            account_number varchar(100)
+        )
+    """))
+    conn.execute(text(f"""
+        INSERT INTO {TABLE} (id, name, email, phone, account_number)
+        SELECT g,
+               (ARRAY['Adebayo', 'Chinedu', 'Ngozi', 'Emeka', 'Funke', 'Tunde'])[1 + g % 6]
+                   || ' Customer ' || g,
+               'customer' || g || '@example.com',
+               '080' || lpad((g * 7919 % 100000000)::text, 8, '0'),
+               'ACC-' || lpad(g::text, 8, '0')
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def seed_sqlite(conn: Connection, rows: int) -> None:
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}_fts"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    conn.execute(text(f"""
+        CREATE TABLE {TABLE} (
+            id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT, phone TEXT, account_number TEXT
+        )
+    """))
+    conn.execute(text(f"""
+        WITH RECURSIVE g(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM g WHERE n < :rows)
+        INSERT INTO {TABLE} (id, name, email, phone, account_number)
+        SELECT n,
+               CASE n % 6 WHEN 0 THEN 'Adebayo' WHEN 1 THEN 'Chinedu' WHEN 2 THEN 'Ngozi'
+                          WHEN 3 THEN 'Emeka' WHEN 4 THEN 'Funke' ELSE 'Tunde' END
+                   || ' Customer ' || n,
+               'customer' || n || '@example.com',
+               '080' || substr('00000000' || (n * 7919 % 100000000), -8),
+               'ACC-' || substr('00000000' || n, -8)
+        FROM g
+    """), {"rows": rows})
+
+
+# =============================================================================
+# INDEXES
+# =============================================================================
+
+
+def index_postgres(conn: Connection) -> None:
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in COLUMNS:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{TABLE}_{column}_trgm ON {TABLE} USING gin ({column} gin_trgm_ops)"
+        ))
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def index_sqlite(conn: Connection) -> None:
+    cols = ", ".join(COLUMNS)
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE {TABLE}_fts USING fts5("
+        f"{cols}, content='{TABLE}', content_rowid='id', tokenize='trigram')"
+    ))
+    conn.execute(text(f"INSERT INTO {TABLE}_fts({TABLE}_fts) VALUES ('rebuild')"))
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+
+def like_query(conn: Connection, term: str, limit: int) -> int:
+    op = "ILIKE" if conn.dialect.name == "postgresql" else "LIKE"
+    where = " OR ".join(f"{c} {op} :pattern" for c in COLUMNS)
+    return len(conn.execute(
+        text(f"SELECT id FROM {TABLE} WHERE {where} LIMIT :limit"),
+        {"pattern": f"%{term}%", "limit": limit},
+    ).all())
+
+
+def indexed_query(conn: Connection, term: str, limit: int) -> int:
+    if conn.dialect.name == "postgresql":
+        where = " OR ".join(f"{c} ILIKE :pattern" for c in COLUMNS)
+        similarity = ", ".join(f"word_similarity(:term, coalesce({c}, ''))" for c in COLUMNS)
+        sql = (
+            f"SELECT id FROM {TABLE} WHERE {where} "
+            f"ORDER BY (name ILIKE :prefix) DESC, greatest({similarity}) DESC LIMIT :limit"
+        )
+        params = {"pattern": f"%{term}%", "prefix": f"{term}%", "term": term, "limit": limit}
+    else:
+        sql = (
+            f"SELECT rowid FROM {TABLE}_fts WHERE {TABLE}_fts MATCH :match "
+            f"ORDER BY bm25({TABLE}_fts) LIMIT :limit"
+        )
+        params = {"match": '"' + term.replace('"', '""') + '"', "limit": limit}
+    return len(conn.execute(text(sql), params).all())
+
+
+def time_query(engine: Engine, fn: Callable[[Connection, str, int], int], term: str, limit: int,
+               repeat: int) -> List[float]:
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn(conn, term, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def main() -> int:
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Benchmark ILIKE scans against search indexes")
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50, help="Per-entity result limit")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark table")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    dialect = engine.dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        print(f"Unsupported database: {dialect}")
+        return 2
+
+    seed, build_index = (seed_postgres, index_postgres) if dialect == "postgresql" else (seed_sqlite, index_sqlite)
+
+    print(f"Seeding {args.rows:,} rows into {TABLE} ({dialect})...")
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        seed(conn, args.rows)
+    print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    baseline = {term: time_query(engine, like_query, term, args.limit, args.repeat) for term in TERMS}
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        build_index(conn)
+    print(f"  index built in {time.perf_counter() - started:.1f}s")
+
+    indexed = {term: time_query(engine, indexed_query, term, args.limit, args.repeat) for term in TERMS}
+
+    print()
+    print(f"{'term':<16} {'ILIKE scan (ms)':>16} {'indexed (ms)':>14} {'speedup':>9}")
+    for term in TERMS:
+        before = statistics.median(baseline[term])
+        after = statistics.median(indexed[term])
+        print(f"{term:<16} {before:>16.1f} {after:>14.1f} {before / max(after, 0.001):>8.1f}x")
+
+    if not args.keep:
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}_fts"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Statutory Deduction Benchmark
+
+Computes PAYE, pension, NHF, NHIS, NSITF and ITF for synthetic employees:
+- scalar: calculate_all_statutory_deductions per employee (the loop
+  /tax/payroll/calculate-bulk used before the batch calculator)
+- batch: calculate_statutory_deductions_batch over all employees
+- endpoint: calculate_bulk_deductions end to end, including responses
+
+Salaries are drawn from a fixed set of structures plus per-employee
+variation, so some employees share identical inputs as they do in real
+payrolls. Scalar and batch results are checked to be identical. No database
+is used (employees have no employment type).
+
+Usage:
+    python scripts/benchmark_statutory.py                    # 10k and 100k employees
+    python scripts/benchmark_statutory.py --employees 50000 --unique 0.2
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.tax.helpers import (
+    StatutoryBatchItem,
+    calculate_all_statutory_deductions,
+    calculate_statutory_deductions_batch,
+)
+from app.api.tax.payroll_integration import BulkSalaryInput, SalaryInput, calculate_bulk_deductions
+
+STRUCTURES = [
+    (Decimal("45000"), Decimal("15000"), Decimal("10000")),
+    (Decimal("150000"), Decimal("60000"), Decimal("25000")),
+    (Decimal("350000"), Decimal("150000"), Decimal("50000")),
+    (Decimal("900000"), Decimal("400000"), Decimal("120000")),
+    (Decimal("2500000"), Decimal("1000000"), Decimal("300000")),
+]
+FLAGS = (True, True, True, True, True, True)
+
+
+# =============================================================================
+# SYNTHETIC DATA
+# =============================================================================
+
+
+def make_items(rng: random.Random, count: int, unique: float) -> List[StatutoryBatchItem]:
+    items = []
+    for _ in range(count):
+        basic, housing, transport = rng.choice(STRUCTURES)
+        if rng.random() < unique:
+            basic += Decimal(rng.randint(1, 5_000_000)) / 100
+        other = rng.choice([Decimal("0"), Decimal("0"), Decimal("20000")])
+        items.append((basic, housing, transport, other, *FLAGS))
+    return items
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def timed(label: str, fn: Callable[[], List[Any]]) -> List[Any]:
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed * 1000:>10.1f} ms  ({elapsed / len(result) * 1e6:.1f} us/employee)")
+    return result
+
+
+def run(count: int, unique: float, seed: int, tax_date: date) -> bool:
+    rng = random.Random(seed)
+    items = make_items(rng, count, unique)
+    print(f"{count:,} employees ({unique:.0%} with individual salaries), {tax_date}:")
+
+    scalar = timed("scalar", lambda: [
+        calculate_all_statutory_deductions(*item[:4], tax_date=tax_date) for item in items
+    ])
+    batch = timed("batch", lambda: calculate_statutory_deductions_batch(items, tax_date=tax_date))
+
+    payload = BulkSalaryInput(
+        payroll_period=tax_date.strftime("%Y-%m"),
+        employees=[
+            SalaryInput(
+                employee_id=i, employee_name=f"Employee {i}", basic_salary=item[0],
+                housing_allowance=item[1], transport_allowance=item[2], other_allowances=item[3],
+            )
+            for i, item in enumerate(items)
+        ],
+    )
+    timed("endpoint", lambda: calculate_bulk_deductions(payload, db=None).employees)
+
+    # repr compares Decimal exponents as well as values
+    if any(repr(a) != repr(b) for a, b in zip(scalar, batch)):
+        print("  MISMATCH between scalar and batch results")
+        return False
+    print("  results identical")
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs batch statutory deductions")
+    parser.add_argument("--employees", type=int, action="append",
+                        help="Employee count (repeatable, default 10k and 100k)")
+    parser.add_argument("--unique", type=float, default=0.3,
+                        help="Share of employees whose basic salary differs from their structure")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--date", type=date.fromisoformat, default=date(2025, 6, 1), help="Payroll date")
+    args = parser.parse_args()
+
+    ok = True
+    for count in args.employees or [10_000, 100_000]:
+        ok = run(count, args.unique, args.seed, args.date) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Webhook Delivery Benchmark
+
+Sends synthetic webhook deliveries to a local stub receiver two ways:
+- sequential: one blocking request at a time on a shared client (the loop
+  process_pending_webhooks used to run)
+- concurrent: AsyncWebhookSender with per-host limits and keep-alive pools
+
+The receiver listens on two ports. One answers after --latency ms, the
+other plays a slow subscriber and answers after --slow-latency ms. No
+database is used.
+
+Usage:
+    python scripts/benchmark_webhooks.py                         # 300 deliveries, 1 in 10 slow
+    python scripts/benchmark_webhooks.py --deliveries 1000 --latency 20 --slow-latency 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.webhook_delivery import (
+    AsyncWebhookSender,
+    DeliveryOutcome,
+    PreparedWebhookRequest,
+    SyncWebhookSender,
+)
+from app.sync import base as sync_base
+
+
+# =============================================================================
+# STUB RECEIVER
+# =============================================================================
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: float) -> None:
+    """Minimal HTTP/1.1 keep-alive handler: read a request, sleep, answer 200."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            if length:
+                await reader.readexactly(length)
+            await asyncio.sleep(latency)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_receiver(latency_ms: float, slow_latency_ms: float) -> Tuple[int, int]:
+    """Run the stub receiver on a background loop; returns (fast_port, slow_port)."""
+    loop = asyncio.new_event_loop()
+    ports: List[int] = []
+    ready = threading.Event()
+
+    async def serve() -> None:
+        for latency in (latency_ms / 1000, slow_latency_ms / 1000):
+            server = await asyncio.start_server(
+                lambda r, w, latency=latency: _handle(r, w, latency), "127.0.0.1", 0, backlog=1024
+            )
+            ports.append(server.sockets[0].getsockname()[1])
+        ready.set()
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(serve())
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return ports[0], ports[1]
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+
+def make_requests(count: int, fast_port: int, slow_port: int, slow_every: int) -> List[PreparedWebhookRequest]:
+    requests = []
+    for i in range(count):
+        slow = slow_every and i % slow_every == 0
+        port = slow_port if slow else fast_port
+        # Spread the fast traffic over several endpoints on the same origin
+        webhook_id = 0 if slow else 1 + i % 5
+        requests.append(PreparedWebhookRequest(
+            delivery_id=i,
+            webhook_id=webhook_id,
+            method="POST",
+            url=f"http://127.0.0.1:{port}/hooks/{webhook_id}",
+            headers={"Content-Type": "application/json"},
+            content='{"event": "ticket.created", "n": %d}' % i,
+        ))
+    return requests
+
+
+def report(label: str, elapsed: float, outcomes: List[DeliveryOutcome]) -> None:
+    delivered = sum(o.delivered for o in outcomes)
+    print(f"  {label:<12} {elapsed:>8.2f} s  {len(outcomes) / elapsed:>8.1f} deliveries/s  "
+          f"({delivered}/{len(outcomes)} delivered)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs concurrent webhook delivery")
+    parser.add_argument("--deliveries", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=20.0, help="Receiver latency in ms")
+    parser.add_argument("--slow-latency", type=float, default=500.0, help="Slow subscriber latency in ms")
+    parser.add_argument("--slow-every", type=int, default=10, help="Every Nth delivery goes to the slow subscriber")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--per-host", type=int, default=16)
+    args = parser.parse_args()
+
+    fast_port, slow_port = start_receiver(args.latency, args.slow_latency)
+    requests = make_requests(args.deliveries, fast_port, slow_port, args.slow_every)
+    print(f"Delivering {len(requests)} webhooks (latency {args.latency:.0f} ms, "
+          f"slow subscriber {args.slow_latency:.0f} ms for 1 in {args.slow_every})")
+
+    sync_base._circuit_breakers.clear()
+    with httpx.Client(timeout=30.0) as client:
+        started = time.perf_counter()
+        sequential = SyncWebhookSender(client).send_all(requests)
+        report("sequential", time.perf_counter() - started, sequential)
+
+    sync_base._circuit_breakers.clear()
+    sender = AsyncWebhookSender(concurrency=args.concurrency, per_host_limit=args.per_host)
+    started = time.perf_counter()
+    concurrent = sender.send_all(requests)
+    report("concurrent", time.perf_counter() - started, concurrent)
+
+    if [o.delivered for o in sequential] != [o.delivered for o in concurrent]:
+        print("MISMATCH between delivery strategies")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
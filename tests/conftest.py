@@ -5,12 +5,19 @@ Provides authentication fixtures for testing RBAC scopes:
 - auth_client_with_scope: Factory for authenticated client with specific scopes
 - service_token_client: Factory for service token authenticated client
 - unauthenticated_client: Client with no auth for testing 401s
+
+And database fixtures for service-level tests:
+- db: Session on the test database with the module's DB_MODELS tables created
+- reseed: Empty the test database and seed it again within one test
+- statements: SQL statements executed on the test database
 """
 import os
 import tempfile
 import pytest
 import sqlalchemy as sa
 from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 
 # Force SQLite for tests (use per-session temp DB unless overridden)
 if "TEST_DATABASE_URL" not in os.environ:
@@ -19,7 +26,13 @@ if "TEST_DATABASE_URL" not in os.environ:
 
 from app.main import app as fastapi_app
 from app.auth import get_current_principal, Principal
-from app.database import Base, engine
+from app.database import Base, SessionLocal, engine
+
+
+@compiles(JSONB, "sqlite")
+def compile_jsonb_sqlite(type_, compiler, **kw):
+    """Store PostgreSQL JSONB columns as JSON on the SQLite test database."""
+    return "JSON"
 
 
 # =============================================================================
@@ -57,10 +70,8 @@ def base_client():
         yield client
 
 
-@pytest.fixture(autouse=True)
-def cleanup_db():
-    """Clear database rows after each test to avoid state leakage."""
-    yield
+def clear_database():
+    """Delete all rows from the test database."""
     if engine.dialect.name != "sqlite":
         return
     with engine.begin() as conn:
@@ -73,6 +84,91 @@ def cleanup_db():
         conn.execute(sa.text("PRAGMA foreign_keys=ON"))
 
 
+def create_tables(*models):
+    """Create the tables for models, and the tables they reference, if missing."""
+    tables = {}
+    pending = [model.__table__ for model in models]
+    while pending:
+        table = pending.pop()
+        if table.name not in tables:
+            tables[table.name] = table
+            pending.extend(fk.column.table for fk in table.foreign_keys)
+    with engine.begin() as conn:
+        existing_tables = set(sa.inspect(conn).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name in tables and table.name not in existing_tables:
+                conn.execute(sa.schema.CreateTable(table))
+                # Some models declare an index both on the column and in __table_args__
+                for index in {index.name: index for index in table.indexes}.values():
+                    index.create(conn)
+
+
+@pytest.fixture(autouse=True)
+def cleanup_db():
+    """Clear database rows after each test to avoid state leakage."""
+    yield
+    clear_database()
+
+
+# =============================================================================
+# DATABASE FIXTURES
+# =============================================================================
+
+
+@pytest.fixture
+def db(request):
+    """
+    Session on the test database.
+
+    Creates the tables for the test module's DB_MODELS first; rows are
+    removed by cleanup_db after the test.
+
+    Usage:
+        DB_MODELS = (Employee, SalarySlip)
+
+        def test_something(db):
+            db.add(Employee(...))
+    """
+    create_tables(*getattr(request.module, "DB_MODELS", ()))
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def reseed(db):
+    """
+    Returns a function that empties the test database and seeds it again.
+
+    Lets a test run two code paths over identical data, e.g. a batch
+    operation against its one-row-at-a-time equivalent:
+        reseed(_seed, seed=1)
+        expected = per_row(db)
+        reseed(_seed, seed=1)
+        assert batch(db) == expected
+    """
+    def _reseed(seed_fn, *args, **kwargs):
+        db.rollback()
+        db.expunge_all()
+        clear_database()
+        return seed_fn(db, *args, **kwargs)
+
+    return _reseed
+
+
+@pytest.fixture
+def statements():
+    """SQL statements executed on the test database during the test."""
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    sa.event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    sa.event.remove(engine, "before_cursor_execute", record)
+
+
 # =============================================================================
 # AUTHENTICATED CLIENT FIXTURES
 # =============================================================================
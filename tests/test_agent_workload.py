@@ -0,0 +1,180 @@
+"""Tests for agent open-ticket counters and workload-based routing.
+
+Run with: poetry run pytest tests/test_agent_workload.py -v
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from app.models.agent import Agent, AgentWorkload, Team, TeamMember
+from app.models.support_sla import RoutingRoundRobinState, RoutingRule, RoutingStrategy
+from app.models.ticket import Ticket, TicketStatus
+from app.services.agent_workload import AgentPool, open_ticket_counts, reconcile_agent_workload
+from app.services.routing_engine import RoutingEngine
+from app.services.rule_compiler import invalidate_rule_sets
+
+DB_MODELS = (Agent, Team, TeamMember, AgentWorkload, Ticket, RoutingRule, RoutingRoundRobinState)
+
+
+@pytest.fixture(autouse=True)
+def rule_sets():
+    invalidate_rule_sets()
+    yield
+    invalidate_rule_sets()
+
+
+def _counts(db):
+    return {row.assignee: row.open_tickets for row in db.query(AgentWorkload).all() if row.open_tickets}
+
+
+def test_counters_follow_assign_resolve_reassign_and_soft_delete(db):
+    first = Ticket(subject="A", assigned_to="ada")
+    second = Ticket(subject="B", assigned_to="ada", status=TicketStatus.REPLIED)
+    closed = Ticket(subject="C", assigned_to="bola", status=TicketStatus.CLOSED)
+    db.add_all([first, second, closed, Ticket(subject="D")])
+    db.commit()
+    assert _counts(db) == {"ada": 2}
+
+    second.assigned_to = "bola"
+    first.status = TicketStatus.RESOLVED
+    db.commit()
+    assert _counts(db) == {"bola": 1}
+
+    closed.status = TicketStatus.OPEN
+    db.commit()
+    assert _counts(db) == {"bola": 2}
+
+    second.is_deleted = True
+    closed.assigned_to = None
+    db.commit()
+    assert _counts(db) == {}
+
+    # Counters roll back with the ticket change
+    db.add(Ticket(subject="E", assigned_to="chidi"))
+    db.flush()
+    db.rollback()
+    assert _counts(db) == {}
+
+
+def test_changes_on_expired_tickets_use_loaded_previous_values(db):
+    ticket = Ticket(subject="A", assigned_to="ada")
+    db.add(ticket)
+    db.commit()
+
+    ticket.assigned_to = "bola"  # ticket was expired by the commit
+    db.commit()
+    assert _counts(db) == {"bola": 1}
+
+
+def test_reconcile_corrects_drift_from_bulk_updates(db):
+    db.add_all([Ticket(subject=str(i), assigned_to="ada") for i in range(3)])
+    db.add(AgentWorkload(assignee="ghost", open_tickets=4))
+    db.commit()
+
+    db.execute(update(Ticket).where(Ticket.subject == "0").values(assigned_to="bola"))
+    db.commit()
+    assert open_ticket_counts(db, ["ada", "bola", "ghost", "nobody"]) == {
+        "ada": 3, "bola": 0, "ghost": 4, "nobody": 0,
+    }
+
+    result = reconcile_agent_workload(db)
+    assert result["corrected"] == 3
+    assert result["drift"] == 6
+    assert _counts(db) == {"ada": 2, "bola": 1}
+    assert reconcile_agent_workload(db)["corrected"] == 0
+
+
+# =============================================================================
+# SELECTION
+# =============================================================================
+
+
+def _linear_least_busy(agents, loads):
+    best = min(loads[a.display_name] for a in agents)
+    return next(a for a in agents if loads[a.display_name] == best)
+
+
+def _linear_load_balanced(agents, loads):
+    best, lowest = None, float("inf")
+    for agent in agents:
+        utilization = loads[agent.display_name] / (agent.capacity or 10)
+        if utilization < 1.0 and utilization < lowest:
+            best, lowest = agent, utilization
+    return best
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pool_picks_match_linear_scan(seed):
+    rng = random.Random(seed)
+    agents = [
+        SimpleNamespace(id=i, display_name=f"agent-{i}", email=None, capacity=rng.choice([None, 2, 3, 5, 8]))
+        for i in range(rng.randint(1, 12))
+    ]
+    loads = {a.display_name: rng.randint(0, 6) for a in agents}
+    pool = AgentPool(agents, loads)
+    linear = dict(loads)
+
+    for _ in range(40):
+        if rng.random() < 0.5:
+            picked, expected = pool.least_busy(), _linear_least_busy(agents, linear)
+        else:
+            picked, expected = pool.load_balanced(), _linear_load_balanced(agents, linear)
+        assert picked is expected
+        if picked is None:
+            continue
+        pool.record_assignment(picked)
+        linear[picked.display_name] += 1
+
+
+def _roster(db, capacities, strategy):
+    team = Team(name="Support")
+    db.add(team)
+    db.flush()
+    agents = []
+    for i, capacity in enumerate(capacities):
+        agent = Agent(display_name=f"agent-{i}", email=f"agent{i}@example.com", capacity=capacity)
+        db.add(agent)
+        db.flush()
+        db.add(TeamMember(team_id=team.id, agent_id=agent.id))
+        agents.append(agent)
+    db.add(RoutingRule(name="All", priority=1, team_id=team.id, strategy=strategy.value, conditions=None))
+    db.commit()
+    return agents
+
+
+def test_bulk_assign_respects_capacity(db):
+    _roster(db, [2, 3], RoutingStrategy.LOAD_BALANCED)
+    db.add(Ticket(subject="existing", assigned_to="agent-1"))
+    db.add_all([Ticket(subject=f"new-{i}") for i in range(6)])
+    db.commit()
+
+    result = RoutingEngine(db).auto_assign_batch(limit=10)
+    assert result["processed"] == 6
+    assert result["assigned"] == 4
+    assert [d.get("reason") for d in result["details"] if not d["assigned"]] == [
+        "selection_failed", "selection_failed",
+    ]
+    assert _counts(db) == {"agent-0": 2, "agent-1": 3}
+
+
+def test_bulk_assign_matches_one_at_a_time(db):
+    _roster(db, [4, 2, 6], RoutingStrategy.LEAST_BUSY)
+    db.add_all([Ticket(subject="old", assigned_to="agent-2") for _ in range(2)])
+    db.add_all([Ticket(subject=f"new-{i}") for i in range(8)])
+    db.commit()
+    new_ids = [t.id for t in db.query(Ticket).filter(Ticket.assigned_to.is_(None)).order_by(Ticket.id)]
+
+    engine = RoutingEngine(db)
+    sequential = {}
+    for ticket_id in new_ids:
+        sequential[ticket_id] = engine.auto_assign(db.get(Ticket, ticket_id)).get("agent_name")
+    db.execute(update(Ticket).where(Ticket.id.in_(new_ids)).values(assigned_to=None))
+    db.commit()
+    reconcile_agent_workload(db)
+
+    engine.auto_assign_batch(limit=20)
+    assert {ticket_id: db.get(Ticket, ticket_id).assigned_to for ticket_id in new_ids} == sequential
+    assert engine.get_workload_summary()["total_load"] == 10
@@ -0,0 +1,192 @@
+"""Tests for the approver-assignment backed approvals inbox.
+
+Run with: poetry run pytest tests/test_approval_inbox.py -v
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.models.accounting_ext import (
+    ApprovalAssignment,
+    ApprovalHistory,
+    ApprovalStatus,
+    ApprovalStep,
+    ApprovalWorkflow,
+    AuditLog,
+    DocumentApproval,
+)
+from app.models.auth import Role, User, UserRole
+from app.services.approval_engine import (
+    ApprovalEngine,
+    UnauthorizedApprovalError,
+    invalidate_pending_counts,
+)
+
+USERS = range(1, 7)
+ROLES = ["accountant", "controller", "cfo"]
+DOCTYPES = ["expense", "journal_entry"]
+DB_MODELS = (
+    User, Role, UserRole, ApprovalWorkflow, ApprovalStep, DocumentApproval,
+    ApprovalHistory, ApprovalAssignment, AuditLog,
+)
+
+
+class RecordingNotifications:
+    def __init__(self):
+        self.events = []
+
+    def emit_event(self, **kwargs):
+        self.events.append(kwargs)
+
+
+@pytest.fixture(autouse=True)
+def pending_counts():
+    invalidate_pending_counts()
+    yield
+    invalidate_pending_counts()
+
+
+def _engine(db):
+    engine = ApprovalEngine(db)
+    engine.notification_service = RecordingNotifications()
+    return engine
+
+
+def _seed_people(db, rng):
+    roles = [Role(name=name) for name in ROLES]
+    db.add_all(roles)
+    db.add_all([User(id=uid, external_id=f"u{uid}", email=f"u{uid}@example.com") for uid in USERS])
+    db.flush()
+    for uid in USERS:
+        for role in rng.sample(roles, rng.randint(0, 2)):
+            db.add(UserRole(user_id=uid, role_id=role.id))
+    db.flush()
+
+
+def _seed_workflows(engine, rng):
+    for doctype in DOCTYPES:
+        workflow = engine.create_workflow(f"{doctype} approvals", doctype, user_id=1, escalation_enabled=True)
+        for order in range(1, rng.randint(2, 4)):
+            requirement = rng.choice(["user", "role", "anyone"])
+            engine.add_workflow_step(
+                workflow.id,
+                order,
+                f"step {order}",
+                user_id=rng.choice(USERS) if requirement == "user" else None,
+                role_required=rng.choice(ROLES) if requirement == "role" else None,
+                amount_threshold_min=rng.choice([None, Decimal("500")]),
+                escalation_user_id=rng.choice([None, rng.choice(USERS)]),
+                escalation_role=rng.choice([None, rng.choice(ROLES)]),
+            )
+
+
+def _reference_pending(engine, db, user_id, doctype=None):
+    """The pre-index algorithm: every pending document the user may approve."""
+    query = db.query(DocumentApproval).filter(DocumentApproval.status == ApprovalStatus.PENDING)
+    if doctype:
+        query = query.filter(DocumentApproval.doctype == doctype)
+    return sorted(
+        a.id for a in query if engine.can_user_approve(a.doctype, a.document_id, user_id)
+    )
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_inbox_matches_authorization_through_the_lifecycle(db, seed):
+    rng = random.Random(seed)
+    engine = _engine(db)
+    _seed_people(db, rng)
+    _seed_workflows(engine, rng)
+
+    documents = []
+    for document_id in range(1, 31):
+        doctype = rng.choice(DOCTYPES)
+        engine.submit_document(doctype, document_id, user_id=1, amount=Decimal(rng.choice([100, 1000])))
+        documents.append((doctype, document_id))
+
+    for _ in range(80):
+        doctype, document_id = rng.choice(documents)
+        action = rng.choice(["approve", "approve", "reject", "cancel", "escalate", "resubmit"])
+        approval = db.query(DocumentApproval).filter_by(doctype=doctype, document_id=document_id).one()
+        approvers = [uid for uid in USERS if engine.can_user_approve(doctype, document_id, uid)]
+        if action == "approve" and approvers:
+            engine.approve_document(doctype, document_id, rng.choice(approvers))
+        elif action == "reject" and approvers:
+            engine.reject_document(doctype, document_id, rng.choice(approvers), reason="no")
+        elif action == "cancel" and approval.status == ApprovalStatus.PENDING:
+            engine.cancel_document(doctype, document_id, user_id=1, reason="withdrawn")
+        elif action == "escalate" and approval.status == ApprovalStatus.PENDING:
+            engine._escalate_approval(approval)
+        elif action == "resubmit" and approval.status in (ApprovalStatus.REJECTED, ApprovalStatus.CANCELLED):
+            engine.submit_document(doctype, document_id, user_id=1, amount=approval.amount)
+    db.commit()
+
+    for user_id in USERS:
+        for doctype in [None, *DOCTYPES]:
+            expected = _reference_pending(engine, db, user_id, doctype)
+            inbox = engine.get_pending_approvals(user_id, doctype)
+            assert [row["approval_id"] for row in inbox] == expected
+            assert engine.count_pending_approvals(user_id, doctype) == len(expected)
+
+
+def test_escalation_target_can_act_on_escalated_step(db):
+    engine = _engine(db)
+    db.add_all([User(id=uid, external_id=f"u{uid}", email=f"u{uid}@example.com") for uid in (1, 2, 3)])
+    workflow = engine.create_workflow("expense approvals", "expense", user_id=1, escalation_enabled=True)
+    engine.add_workflow_step(workflow.id, 1, "manager", user_id=2, escalation_user_id=3)
+    approval = engine.submit_document("expense", 10, user_id=1)
+
+    assert engine.get_pending_approvals(3) == []
+    with pytest.raises(UnauthorizedApprovalError):
+        engine.approve_document("expense", 10, user_id=3)
+
+    engine._escalate_approval(approval)
+    assert [row["document_id"] for row in engine.get_pending_approvals(3)] == [10]
+    engine.approve_document("expense", 10, user_id=3)
+    assert approval.status == ApprovalStatus.APPROVED
+    assert db.query(ApprovalAssignment).count() == 0
+
+
+def test_inbox_is_one_query_and_paginates(db, statements):
+    engine = _engine(db)
+    db.add(Role(id=1, name="accountant"))
+    db.add_all([User(id=uid, external_id=f"u{uid}", email=f"u{uid}@example.com") for uid in (1, 2)])
+    db.add(UserRole(user_id=2, role_id=1))
+    workflow = engine.create_workflow("expense approvals", "expense", user_id=1)
+    engine.add_workflow_step(workflow.id, 1, "accounts", role_required="accountant")
+    for document_id in range(1, 26):
+        engine.submit_document("expense", document_id, user_id=1)
+    db.commit()
+
+    statements.clear()
+    page = engine.get_pending_approvals(2, limit=10, offset=20)
+    assert len(statements) == 1
+    assert [row["document_id"] for row in page] == [21, 22, 23, 24, 25]
+    assert page[0]["step_name"] == "accounts"
+    assert engine.get_pending_approvals(1) == []
+
+
+def test_pending_count_is_cached_until_assignments_commit(db, statements):
+    engine = _engine(db)
+    db.add_all([User(id=uid, external_id=f"u{uid}", email=f"u{uid}@example.com") for uid in (1, 2)])
+    workflow = engine.create_workflow("expense approvals", "expense", user_id=1)
+    engine.add_workflow_step(workflow.id, 1, "manager", user_id=2)
+    db.commit()
+
+    statements.clear()
+    assert engine.count_pending_approvals(2) == 0
+    assert engine.count_pending_approvals(2) == 0
+    assert len(statements) == 1
+
+    engine.submit_document("expense", 1, user_id=1)
+    assert engine.count_pending_approvals(2) == 0
+    assert engine.count_pending_approvals(2, use_cache=False) == 1
+
+    db.commit()
+    assert engine.count_pending_approvals(2) == 1
+    assert engine.count_pending_approvals(2, doctype="journal_entry") == 0
+
+    engine.approve_document("expense", 1, user_id=2)
+    db.rollback()
+    assert engine.count_pending_approvals(2) == 1
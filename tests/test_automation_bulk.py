@@ -0,0 +1,169 @@
+"""Tests for bulk automation execution over idle tickets.
+
+Run with: poetry run pytest tests/test_automation_bulk.py -v
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.agent import Agent, AgentWorkload, Team
+from app.models.support_automation import AutomationLog, AutomationRule, AutomationTrigger
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.services.automation_executor import AutomationExecutor
+from app.services.rule_compiler import invalidate_rule_sets, load_rule_set
+
+IDLE = AutomationTrigger.TICKET_IDLE
+CONTEXT = {"idle_hours": 48}
+DB_MODELS = (Ticket, AutomationRule, AutomationLog, Agent, Team, AgentWorkload)
+
+
+@pytest.fixture(autouse=True)
+def rule_sets():
+    invalidate_rule_sets()
+    yield
+    invalidate_rule_sets()
+
+
+def _rule(name, priority, conditions, actions, **fields):
+    return AutomationRule(
+        name=name, trigger=IDLE.value, priority=priority, conditions=conditions, actions=actions, **fields
+    )
+
+
+ACTIONS = [
+    [{"type": "set_status", "params": {"status": "on_hold"}}],
+    [{"type": "set_priority", "params": {"priority": "high"}}],
+    [{"type": "add_tag", "params": {"tag": "idle"}}],
+    [{"type": "add_tag", "params": {"tag": "stale"}}, {"type": "remove_tag", "params": {"tag": "vip"}}],
+    [{"type": "assign_team", "params": {"team_id": 1}}],
+    [{"type": "assign_agent", "params": {"agent_id": 1}}],
+    [{"type": "escalate", "params": {"escalate_to": "lead"}}],
+    [{"type": "set_status", "params": {"status": "bogus"}}],
+]
+
+
+def _seed(db, seed):
+    rng = random.Random(seed)
+    db.add_all([Agent(display_name="ada", email="ada@example.com"), Team(name="Tier 2")])
+    for i in range(rng.randint(2, 7)):
+        conditions = rng.choice([
+            None,
+            [{"field": "priority", "operator": "equals", "value": rng.choice(["low", "medium", "high"])}],
+            [{"field": "ticket_type", "operator": "in_list", "value": ["network", "billing"]}],
+            [{"field": "status", "operator": "equals", "value": "open"}],
+            [{"field": "tags", "operator": "contains", "value": "vip"}],
+        ])
+        db.add(_rule(
+            f"rule-{i}", rng.randint(1, 50), conditions, rng.choice(ACTIONS),
+            stop_processing=rng.random() < 0.2,
+            max_executions_per_hour=rng.choice([None, None, 3, 10]),
+        ))
+    db.add_all([
+        Ticket(
+            subject=f"t{i}",
+            ticket_type=rng.choice(["network", "billing", "other"]),
+            priority=rng.choice(list(TicketPriority)),
+            status=rng.choice([TicketStatus.OPEN, TicketStatus.REPLIED, TicketStatus.ON_HOLD]),
+            assigned_to=rng.choice([None, "bola"]),
+            tags=rng.choice([None, [], ["vip"], ["vip", "idle"]]),
+        )
+        for i in range(40)
+    ])
+    db.commit()
+
+
+def _snapshot(db):
+    tickets = [
+        (t.id, t.status, t.priority, t.assigned_to, t.resolution_team, t.is_escalated, t.tags)
+        for t in db.query(Ticket).order_by(Ticket.id)
+    ]
+    logs = sorted((log.rule_id, log.ticket_id, log.success) for log in db.query(AutomationLog))
+    rules = sorted((r.id, r.execution_count) for r in db.query(AutomationRule))
+    workloads = {w.assignee: w.open_tickets for w in db.query(AgentWorkload) if w.open_tickets}
+    return tickets, logs, rules, workloads
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_bulk_matches_per_ticket_execution(db, reseed, seed):
+    snapshots = []
+    for bulk in (False, True):
+        reseed(_seed, seed)
+        invalidate_rule_sets()
+        executor = AutomationExecutor(db)
+        tickets = db.query(Ticket).order_by(Ticket.id).all()
+        if bulk:
+            executor.execute_trigger_bulk(IDLE, tickets, CONTEXT)
+        else:
+            for ticket in tickets:
+                executor.execute_trigger(IDLE, ticket, CONTEXT)
+        snapshots.append(_snapshot(db))
+
+    assert snapshots[0] == snapshots[1]
+
+
+def test_statement_count_does_not_grow_with_tickets(db, statements):
+    db.add(Team(name="Tier 2"))
+    db.add_all([
+        _rule("Hold", 1, [{"field": "status", "operator": "equals", "value": "open"}],
+              [{"type": "set_status", "params": {"status": "on_hold"}}, {"type": "add_tag", "params": {"tag": "idle"}}]),
+        _rule("Team", 2, None, [{"type": "assign_team", "params": {"team_id": 1}}], max_executions_per_hour=500),
+    ])
+    db.commit()
+
+    # Compile the rule set up front so both runs hit the cache
+    load_rule_set(db, AutomationRule, {"trigger": IDLE.value})
+
+    counts = []
+    for size in (5, 150):
+        db.add_all([Ticket(subject=str(i), status=TicketStatus.OPEN) for i in range(size)])
+        db.commit()
+        tickets = db.query(Ticket).filter(Ticket.status == TicketStatus.OPEN).all()
+        statements.clear()
+        result = AutomationExecutor(db).execute_trigger_bulk(IDLE, tickets, CONTEXT)
+        assert result["tickets_updated"] == size
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert db.query(Ticket).filter(Ticket.status == TicketStatus.ON_HOLD).count() == 155
+    assert db.query(AutomationLog).count() == 310
+    assert {t.resolution_team for t in db.query(Ticket)} == {"Tier 2"}
+
+
+def test_rate_limit_counts_recent_executions(db):
+    rule = _rule("Limited", 1, None, [{"type": "add_tag", "params": {"tag": "idle"}}], max_executions_per_hour=5)
+    db.add(rule)
+    db.add_all([Ticket(subject=str(i)) for i in range(6)])
+    db.commit()
+    # Two recent executions and one outside the window
+    db.add_all([
+        AutomationLog(rule_id=rule.id, ticket_id=1, trigger=IDLE.value),
+        AutomationLog(rule_id=rule.id, ticket_id=2, trigger=IDLE.value),
+        AutomationLog(rule_id=rule.id, ticket_id=3, trigger=IDLE.value,
+                      created_at=datetime.utcnow() - timedelta(hours=2)),
+    ])
+    db.commit()
+
+    result = AutomationExecutor(db).execute_trigger_bulk(IDLE, db.query(Ticket).order_by(Ticket.id).all(), CONTEXT)
+    assert result["rules_executed"] == 3
+    assert result["rate_limited"] == 3
+    assert [d["rules_executed"] for d in result["details"]] == [1, 1, 1, 0, 0, 0]
+
+
+def test_idle_sweep_processes_in_batches_and_keeps_workload_counters(db):
+    db.add(Agent(display_name="ada", email="ada@example.com"))
+    db.add(_rule("Reassign", 1, None, [{"type": "assign_agent", "params": {"agent_id": 1}}]))
+    stale = datetime.utcnow() - timedelta(hours=72)
+    db.add_all([
+        Ticket(subject=str(i), status=TicketStatus.OPEN, assigned_to="bola", updated_at=stale)
+        for i in range(5)
+    ])
+    db.add(Ticket(subject="fresh", status=TicketStatus.OPEN, assigned_to="bola"))
+    db.commit()
+
+    result = AutomationExecutor(db).process_idle_tickets(idle_hours=24, batch_size=2)
+    assert result["idle_tickets_found"] == 5
+    assert result["automations_triggered"] == 5
+    workloads = {w.assignee: w.open_tickets for w in db.query(AgentWorkload) if w.open_tickets}
+    assert workloads == {"ada": 5, "bola": 1}
@@ -0,0 +1,261 @@
+"""Tests for compiled business calendars used by the SLA engine.
+
+The compiled index is checked against the original day-by-day walk on
+randomly generated schedules, holidays, start times and durations.
+
+Run with: poetry run pytest tests/test_business_calendar.py -v
+"""
+
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.models.support_sla import BusinessCalendar, BusinessCalendarHoliday, BusinessHourType
+from app.services import business_calendar
+from app.services.business_calendar import (
+    CompiledBusinessCalendar,
+    get_compiled_calendar,
+    invalidate_compiled_calendar,
+    parse_weekly_schedule,
+)
+from app.services.sla_engine import SLAEngine
+
+DAY_KEYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DB_MODELS = (BusinessCalendar, BusinessCalendarHoliday)
+
+
+# =============================================================================
+# REFERENCE IMPLEMENTATION (day walk the index replaced)
+# =============================================================================
+
+
+def _reference_skip(schedule, holidays, recurring, current):
+    """Return the (work_start, work_end) for current's date or None."""
+    current_date = current.date()
+    if current_date in holidays or (current_date.month, current_date.day) in recurring:
+        return None
+    day_schedule = schedule.get(DAY_KEYS[current.weekday()])
+    if not day_schedule:
+        return None
+    try:
+        day_start = datetime.strptime(day_schedule.get("start", "09:00"), "%H:%M").time()
+        day_end = datetime.strptime(day_schedule.get("end", "17:00"), "%H:%M").time()
+    except (ValueError, AttributeError):
+        return None
+    return datetime.combine(current_date, day_start), datetime.combine(current_date, day_end)
+
+
+def reference_add(schedule, holidays, recurring, start_time, hours):
+    remaining_hours = hours
+    current = start_time
+    for _ in range(int(hours / 0.1) + 365):
+        if remaining_hours <= 0:
+            break
+        next_day = datetime.combine(current.date() + timedelta(days=1), time(0, 0))
+        window = _reference_skip(schedule, holidays, recurring, current)
+        if window is None:
+            current = next_day
+            continue
+        work_start, work_end = window
+        if current < work_start:
+            current = work_start
+        if current >= work_end:
+            current = next_day
+            continue
+        hours_today = (work_end - current).total_seconds() / 3600
+        if hours_today >= remaining_hours:
+            return current + timedelta(hours=remaining_hours)
+        remaining_hours -= hours_today
+        current = next_day
+    return start_time + timedelta(hours=hours)
+
+
+def reference_count(schedule, holidays, recurring, start_time, end_time):
+    total_hours = 0.0
+    current = start_time
+    while current < end_time:
+        window = _reference_skip(schedule, holidays, recurring, current)
+        if window is not None:
+            effective_start = max(current, window[0])
+            effective_end = min(end_time, window[1])
+            if effective_start < effective_end:
+                total_hours += (effective_end - effective_start).total_seconds() / 3600
+        current = datetime.combine(current.date() + timedelta(days=1), time(0, 0))
+    return total_hours
+
+
+# =============================================================================
+# GENERATORS
+# =============================================================================
+
+
+def _random_schedule(rng):
+    schedule = {}
+    for key in DAY_KEYS:
+        roll = rng.random()
+        if roll < 0.2:
+            schedule[key] = None
+        elif roll < 0.25:
+            schedule[key] = {"start": "25:00", "end": "17:00"}
+        elif roll < 0.3:
+            schedule[key] = {}
+        elif roll < 0.35:
+            schedule[key] = {"start": "18:00", "end": "08:00"}
+        else:
+            start = rng.randint(0, 12)
+            end = rng.randint(start + 1, 24)
+            schedule[key] = {
+                "start": f"{start:02d}:{rng.choice([0, 15, 30]):02d}",
+                "end": "23:59" if end == 24 else f"{end:02d}:00",
+            }
+    if rng.random() < 0.1:
+        schedule.pop(rng.choice(DAY_KEYS))
+    return schedule
+
+
+def _random_holidays(rng):
+    holidays = {date(2025, 1, 1) + timedelta(days=rng.randint(0, 700)) for _ in range(rng.randint(0, 25))}
+    recurring = {(m, d) for m, d in [(1, 1), (12, 25), (10, 1), (6, 12)] if rng.random() < 0.5}
+    return holidays, recurring
+
+
+def _random_moment(rng):
+    moment = datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 600 * 86400))
+    if rng.random() < 0.3:
+        # Land exactly on an hour boundary to exercise open/close edges
+        moment = moment.replace(minute=0, second=0)
+    return moment
+
+
+def _compile(schedule, holidays, recurring):
+    return CompiledBusinessCalendar(
+        weekly=parse_weekly_schedule(schedule),
+        holiday_dates=holidays,
+        recurring_holidays=recurring,
+        horizon_start=date(2024, 1, 1),
+        horizon_end=date(2027, 12, 31),
+    )
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_compiled_calendar_matches_day_walk(seed):
+    rng = random.Random(seed)
+    schedule = _random_schedule(rng)
+    holidays, recurring = _random_holidays(rng)
+    compiled = _compile(schedule, holidays, recurring)
+
+    for _ in range(50):
+        start = _random_moment(rng)
+        hours = rng.choice([
+            rng.uniform(0.01, 4),
+            rng.uniform(4, 200),
+            float(rng.randint(1, 72)),
+        ])
+        expected = reference_add(schedule, holidays, recurring, start, hours)
+        actual = compiled.add_business_hours(start, hours)
+        assert abs((actual - expected).total_seconds()) < 0.001, (schedule, start, hours)
+
+        end = start + timedelta(seconds=rng.randint(-3600, 90 * 86400))
+        expected_hours = reference_count(schedule, holidays, recurring, start, end)
+        assert compiled.elapsed_business_hours(start, end) == pytest.approx(expected_hours, abs=1e-6)
+
+
+def test_outside_horizon_falls_back_to_walk():
+    schedule = {key: {"start": "09:00", "end": "17:00"} for key in DAY_KEYS[:5]}
+    compiled = _compile(schedule, {date(2030, 1, 2)}, {(12, 25)})
+
+    start = datetime(2029, 12, 24, 16, 0)
+    expected = reference_add(schedule, {date(2030, 1, 2)}, {(12, 25)}, start, 30)
+    assert compiled.add_business_hours(start, 30) == expected
+
+    # Starts inside the horizon, finishes after it
+    start = datetime(2027, 12, 30, 10, 0)
+    expected = reference_add(schedule, set(), {(12, 25)}, start, 40)
+    assert compiled.add_business_hours(start, 40) == expected
+
+    end = datetime(2031, 2, 1)
+    assert compiled.elapsed_business_hours(start, end) == pytest.approx(
+        reference_count(schedule, {date(2030, 1, 2)}, {(12, 25)}, start, end)
+    )
+
+
+def test_deadline_at_close_stays_on_same_day():
+    compiled = _compile({"mon": {"start": "09:00", "end": "17:00"}}, set(), set())
+    # 2025-06-16 is a Monday
+    assert compiled.add_business_hours(datetime(2025, 6, 16, 9, 0), 8) == datetime(2025, 6, 16, 17, 0)
+    assert compiled.add_business_hours(datetime(2025, 6, 16, 17, 0), 1) == datetime(2025, 6, 23, 10, 0)
+
+
+def test_no_business_days_adds_wall_clock_hours():
+    compiled = _compile({}, set(), set())
+    start = datetime(2025, 6, 16, 9, 0)
+    assert compiled.add_business_hours(start, 5) == start + timedelta(hours=5)
+    assert compiled.elapsed_business_hours(start, start + timedelta(days=3)) == 0.0
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+
+@pytest.fixture(autouse=True)
+def compiled_calendars():
+    invalidate_compiled_calendar()
+    yield
+    invalidate_compiled_calendar()
+
+
+def _calendar(db):
+    calendar = BusinessCalendar(
+        name="Office",
+        calendar_type=BusinessHourType.STANDARD.value,
+        schedule={key: {"start": "09:00", "end": "17:00"} for key in DAY_KEYS[:5]},
+    )
+    db.add(calendar)
+    db.commit()
+    return calendar
+
+
+def test_compiled_calendar_is_cached_until_holidays_change(db):
+    calendar = _calendar(db)
+    first = get_compiled_calendar(db, calendar)
+    assert get_compiled_calendar(db, calendar) is first
+
+    # 2025-06-16 is a Monday; a holiday moves the deadline to Tuesday
+    start = datetime(2025, 6, 16, 9, 0)
+    assert first.add_business_hours(start, 4) == datetime(2025, 6, 16, 13, 0)
+
+    db.add(BusinessCalendarHoliday(calendar_id=calendar.id, holiday_date=date(2025, 6, 16), name="Holiday"))
+    db.commit()
+    recompiled = get_compiled_calendar(db, calendar)
+    assert recompiled is not first
+    assert recompiled.add_business_hours(start, 4) == datetime(2025, 6, 17, 13, 0)
+
+
+def test_compiled_calendar_recompiles_on_schedule_change(db):
+    calendar = _calendar(db)
+    first = get_compiled_calendar(db, calendar)
+
+    calendar.schedule = {key: {"start": "08:00", "end": "12:00"} for key in DAY_KEYS}
+    db.commit()
+    recompiled = get_compiled_calendar(db, calendar)
+    assert recompiled is not first
+    assert recompiled.add_business_hours(datetime(2025, 6, 14, 8, 0), 4) == datetime(2025, 6, 14, 12, 0)
+
+
+def test_invalidate_drops_cached_calendar(db):
+    calendar = _calendar(db)
+    first = get_compiled_calendar(db, calendar)
+    invalidate_compiled_calendar(calendar.id)
+    assert calendar.id not in business_calendar._cache
+    assert get_compiled_calendar(db, calendar) is not first
+
+
+def test_sla_engine_uses_compiled_calendar(db):
+    calendar = _calendar(db)
+    engine = SLAEngine(db)
+    start = datetime(2025, 6, 13, 16, 0)  # Friday
+    deadline = engine.calculate_target_time(start, 4, calendar)
+    assert deadline == datetime(2025, 6, 16, 12, 0)
+    assert engine.calculate_elapsed_business_hours(start, deadline, calendar) == pytest.approx(4)
@@ -0,0 +1,91 @@
+"""Tests for Data Explorer keyset paging and single-pass table stats.
+
+Run with: poetry run pytest tests/test_data_explorer_paging.py -v
+"""
+
+import pytest
+
+from app.api import data_explorer
+from app.database import SessionLocal, engine
+from app.models.pop import Pop
+
+
+@pytest.fixture
+def pops():
+    Pop.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    db.query(Pop).delete()
+    # Duplicate cities exercise the (sort value, id) tie-break; some are NULL
+    db.add_all([
+        Pop(name=f"POP {i}", code=f"K{i}", city=None if i % 5 == 0 else f"City {i % 3}", is_active=i % 4 != 0)
+        for i in range(23)
+    ])
+    db.commit()
+    db.close()
+
+
+def _walk(client, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = {"paginate": "keyset", "limit": 4, **params}
+        if cursor:
+            query["cursor"] = cursor
+        body = client.get("/api/explore/tables/pops", params=query).json()
+        seen.extend(row["id"] for row in body["data"])
+        pages += 1
+        cursor = body["next_cursor"]
+        assert body["has_more"] is (cursor is not None)
+        if not cursor:
+            return seen, pages
+
+
+class TestKeysetPaging:
+    def test_walks_every_row_once_by_id(self, client, pops):
+        seen, pages = _walk(client)
+        assert len(seen) == 23 == len(set(seen))
+        assert seen == sorted(seen, reverse=True)
+        assert pages == 6
+
+    @pytest.mark.parametrize("order_dir", ["asc", "desc"])
+    def test_walks_every_row_once_with_duplicate_and_null_sort_values(self, client, pops, order_dir):
+        seen, _ = _walk(client, order_by="city", order_dir=order_dir)
+        assert len(seen) == 23 == len(set(seen))
+
+        db = SessionLocal()
+        cities = {p.id: p.city for p in db.query(Pop).all()}
+        db.close()
+        values = [cities[i] for i in seen]
+        non_null = [v for v in values if v is not None]
+        assert non_null == sorted(non_null, reverse=order_dir == "desc")
+        assert values[len(non_null):] == [None] * (23 - len(non_null))  # NULLs last
+
+    def test_invalid_cursor_rejected(self, client, pops):
+        resp = client.get("/api/explore/tables/pops", params={"cursor": "not-a-cursor"})
+        assert resp.status_code == 400
+
+    def test_offset_paging_reports_exact_total(self, client, pops):
+        body = client.get("/api/explore/tables/pops", params={"limit": 10, "offset": 20}).json()
+        assert body["total"] == 23
+        assert body["total_is_estimate"] is False
+        assert body["has_more"] is False
+        assert len(body["data"]) == 3
+
+
+class TestTableStats:
+    def test_conditional_counts_in_one_pass(self, client, pops):
+        body = client.get("/api/explore/tables/pops/stats").json()
+        assert body == {"table": "pops", "total_records": 23, "active": 17, "inactive": 6}
+
+    def test_breakdowns_and_top_n(self, pops):
+        spec = data_explorer.TableStatsSpec(
+            group_by={"by_city": Pop.city},
+            counts={"active": Pop.is_active.is_(True)},
+            top_n={"by_city": 2},
+        )
+        db = SessionLocal()
+        stats = data_explorer._compute_table_stats(db, Pop, spec)
+        db.close()
+        assert stats["total_records"] == 23
+        assert stats["active"] == 17
+        assert len(stats["by_city"]) == 2
+        assert sum(stats["by_city"].values()) <= 23 - 5
@@ -0,0 +1,218 @@
+"""Tests for bulk e-invoice validation and cached UBL rendering.
+
+Run with: poetry run pytest tests/test_einvoice_batch.py -v
+"""
+
+import random
+import xml.etree.ElementTree as ET
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+import app.services.einvoice_batch_service as einvoice_batch_service
+from app.feature_flags import feature_flags
+from app.models.tax_ng import EInvoice, EInvoiceBatch, EInvoiceBatchStatus, EInvoiceLine, EInvoiceStatus
+from app.services.einvoice_batch_service import EInvoiceBatchError, EInvoiceBatchService
+from app.services.nigerian_tax_service import NigerianTaxService
+
+COMPANY = "default"
+CAC = "{urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2}"
+CBC = "{urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2}"
+DB_MODELS = (EInvoice, EInvoiceLine, EInvoiceBatch)
+
+
+def _seed(db, count, seed=0):
+    """Draft invoices via create_einvoice; about a fifth fail validation (bad TIN or no lines)."""
+    rng = random.Random(seed)
+    service = NigerianTaxService(db)
+    for i in range(count):
+        invalid = rng.random() < 0.2
+        lines = [] if invalid and rng.random() < 0.5 else [
+            {
+                "item_name": f"Item {n}",
+                "item_description": rng.choice([None, "Fibre & installation"]),
+                "quantity": rng.randint(1, 5),
+                "unit_price": f"{rng.randint(100, 90000)}.{rng.randint(0, 99):02d}",
+                "unit_code": rng.choice(["EA", "MON"]),
+            }
+            for n in range(rng.randint(1, 4))
+        ]
+        service.create_einvoice(
+            company=COMPANY,
+            source_doctype="Sales Invoice",
+            source_docname=f"SINV-{i:05d}",
+            issue_date=date(2025, 6, rng.randint(1, 30)),
+            supplier_name="Dotmac Technologies",
+            supplier_tin="1234567890",
+            supplier_vat_number=rng.choice([None, "VAT-001"]),
+            supplier_city="Abuja",
+            customer_name=f"Customer {i} & Sons",
+            customer_tin="bad" if invalid and lines else rng.choice([None, "0987654321"]),
+            customer_city=rng.choice([None, "Lagos"]),
+            lines=lines,
+        )
+
+
+def _state(db):
+    db.expire_all()
+    return {
+        e.id: (e.status, e.validation_errors, e.ubl_xml, e.ubl_hash)
+        for e in db.query(EInvoice).order_by(EInvoice.id)
+    }
+
+
+def _per_invoice(db):
+    """Validate and render one invoice at a time through NigerianTaxService."""
+    service = NigerianTaxService(db)
+    for (einvoice_id,) in db.query(EInvoice.id).order_by(EInvoice.id).all():
+        if service.validate_einvoice(einvoice_id)["is_valid"]:
+            service.get_einvoice_ubl(einvoice_id)
+    return _state(db)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_batch_matches_per_invoice_validation_and_rendering(db, reseed, seed):
+    results = []
+    for bulk in (False, True):
+        reseed(_seed, 60, seed=seed)
+        if bulk:
+            service = EInvoiceBatchService(db)
+            batch = service.run(service.start(COMPANY).id, chunk_size=25)
+            assert batch.status == EInvoiceBatchStatus.COMPLETED
+            assert batch.processed_invoices == batch.total_invoices == 60
+            assert batch.valid_count + batch.invalid_count == 60
+            assert batch.rendered_count == batch.valid_count and batch.cached_count == 0
+            assert sorted(e["einvoice_id"] for e in batch.invoice_errors or []) == sorted(
+                einvoice_id for einvoice_id, state in _state(db).items() if state[1]
+            )
+            results.append(_state(db))
+        else:
+            results.append(_per_invoice(db))
+
+    assert results[0] == results[1]
+    assert any(state[1] for state in results[0].values())  # some invoices failed validation
+
+
+def test_unchanged_invoices_reuse_stored_ubl(db):
+    _seed(db, 30, seed=3)
+    service = EInvoiceBatchService(db)
+    first = service.run(service.start(COMPANY, invoice_status=None).id)
+    changed = db.query(EInvoice).filter(EInvoice.status == EInvoiceStatus.VALIDATED).first()
+    changed.customer_city = "Port Harcourt"
+    db.commit()
+
+    with patch.object(einvoice_batch_service, "render_ubl", wraps=einvoice_batch_service.render_ubl) as render:
+        second = service.run(service.start(COMPANY, invoice_status=None).id)
+
+    assert render.call_count == 1
+    assert second.rendered_count == 1
+    assert second.cached_count == first.valid_count - 1
+    db.refresh(changed)
+    assert "<cbc:CityName>Port Harcourt</cbc:CityName>" in changed.ubl_xml
+
+    # The single-invoice endpoint serves the stored document too
+    with patch.object(einvoice_batch_service, "render_ubl") as render:
+        assert NigerianTaxService(db).get_einvoice_ubl(changed.id)["xml_content"] == changed.ubl_xml
+    render.assert_not_called()
+
+
+def test_ubl_escapes_and_carries_parties(db):
+    _seed(db, 5, seed=1)
+    einvoice = db.query(EInvoice).filter(EInvoice.customer_tin.is_(None)).first() or db.query(EInvoice).first()
+    root = ET.fromstring(NigerianTaxService(db).get_einvoice_ubl(einvoice.id)["xml_content"])
+
+    supplier = root.find(f"{CAC}AccountingSupplierParty/{CAC}Party")
+    customer = root.find(f"{CAC}AccountingCustomerParty/{CAC}Party")
+    assert supplier.find(f"{CAC}PartyName/{CBC}Name").text == "Dotmac Technologies"
+    assert supplier.find(f"{CAC}PartyIdentification/{CBC}ID").text == "1234567890"
+    assert customer.find(f"{CAC}PartyName/{CBC}Name").text == einvoice.customer_name
+    assert len(root.findall(f"{CAC}InvoiceLine")) == len(einvoice.lines)
+    assert root.find(f"{CAC}TaxTotal/{CAC}TaxSubtotal/{CAC}TaxCategory/{CBC}Percent").text == "7.5"
+
+
+def test_interrupted_batch_resumes_after_last_chunk(db):
+    _seed(db, 50, seed=2)
+    service = EInvoiceBatchService(db)
+    batch_id = service.start(COMPANY).id
+
+    original = einvoice_batch_service.process_ubl_document
+    calls = {"n": 0}
+
+    def fail_in_third_chunk(document):
+        calls["n"] += 1
+        if calls["n"] == 25:
+            raise RuntimeError("worker lost")
+        return original(document)
+
+    with patch.object(einvoice_batch_service, "process_ubl_document", fail_in_third_chunk):
+        batch = service.run(batch_id, chunk_size=10)
+    assert batch.status == EInvoiceBatchStatus.FAILED
+    assert batch.processed_invoices == 20
+    assert batch.error_message == "worker lost"
+    rendered_before = batch.rendered_count
+
+    service.resume(batch_id)
+    with patch.object(einvoice_batch_service, "render_ubl", wraps=einvoice_batch_service.render_ubl) as render:
+        batch = service.run(batch_id, chunk_size=10)
+    assert batch.status == EInvoiceBatchStatus.COMPLETED
+    assert batch.processed_invoices == 50
+    assert batch.valid_count + batch.invalid_count == 50
+    assert render.call_count == batch.rendered_count - rendered_before  # committed chunks are not redone
+
+
+def test_statements_per_chunk_do_not_grow_with_invoices(db, reseed, statements):
+    counts = []
+    for count in (5, 80):
+        reseed(_seed, count)
+        service = EInvoiceBatchService(db)
+        batch_id = service.start(COMPANY).id
+        statements.clear()
+        service.run(batch_id, chunk_size=100)
+        # UPDATEs of one column set are batched per flush; count distinct statements
+        counts.append(len({s for s in statements if not s.startswith("UPDATE ng_einvoices")}))
+
+    assert counts[0] == counts[1]
+
+
+def test_process_pool_matches_inline(db, reseed):
+    results = []
+    for workers in (0, 2):
+        reseed(_seed, 20, seed=4)
+        service = EInvoiceBatchService(db)
+        batch = service.run(service.start(COMPANY).id, workers=workers)
+        assert batch.status == EInvoiceBatchStatus.COMPLETED
+        results.append(_state(db))
+
+    assert results[0] == results[1]
+
+
+def test_start_rejects_unknown_invoices(db):
+    _seed(db, 3)
+    with pytest.raises(EInvoiceBatchError, match="not found"):
+        EInvoiceBatchService(db).start(COMPANY, einvoice_ids=[1, 999])
+    with pytest.raises(EInvoiceBatchError, match="No e-invoices"):
+        EInvoiceBatchService(db).start(COMPANY, from_date=date(2030, 1, 1))
+
+
+@patch.object(feature_flags, "NIGERIA_COMPLIANCE_ENABLED", True)
+def test_batch_endpoints(client, db):
+    _seed(db, 12, seed=5)
+
+    resp = client.post("/api/tax/einvoice/batches", json={"from_date": "2025-06-01", "to_date": "2025-06-30"})
+    assert resp.status_code == 202
+    batch_id = resp.json()["id"]
+
+    # Without a broker the batch runs as a background task after the response
+    resp = client.get(f"/api/tax/einvoice/batches/{batch_id}")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "completed"
+    assert body["progress_percent"] == 100.0
+    assert body["total_invoices"] == 12
+    assert body["valid_count"] + body["invalid_count"] == 12
+    assert all(error["errors"] for error in body["invoice_errors"] or [])
+
+    assert client.post(f"/api/tax/einvoice/batches/{batch_id}/resume").status_code == 400
+    assert client.get("/api/tax/einvoice/batches/999").status_code == 404
+    assert client.post("/api/tax/einvoice/batches", json={"einvoice_ids": [999]}).status_code == 400
@@ -0,0 +1,210 @@
+"""Tests for the employee hierarchy closure table and the team views built on it.
+
+Run with: poetry run pytest tests/test_employee_hierarchy.py -v
+"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.models.employee import DEFER_HIERARCHY_UPDATES, Employee, EmployeeHierarchy, EmploymentStatus
+from app.models.performance import EmployeeScorecardInstance, ScorecardInstanceStatus
+from app.services.employee_hierarchy import (
+    expected_hierarchy,
+    get_managers,
+    reconcile_employee_hierarchy,
+)
+from app.services.performance_service import PerformanceService
+
+DB_MODELS = (Employee, EmployeeHierarchy, EmployeeScorecardInstance)
+
+
+def _stored(db):
+    return {(h.ancestor_id, h.descendant_id): h.depth for h in db.query(EmployeeHierarchy)}
+
+
+def _expected(db):
+    return expected_hierarchy(dict(db.query(Employee.id, Employee.reports_to_id).all()))
+
+
+def _subtree(db, employee_id):
+    return {d for (d,) in db.query(EmployeeHierarchy.descendant_id).filter_by(ancestor_id=employee_id)}
+
+
+def _seed_org(db, rng, employees):
+    """Random forest: each employee reports to an earlier one (or nobody)."""
+    for i in range(1, employees + 1):
+        manager = rng.randint(1, i - 1) if i > 1 and rng.random() < 0.9 else None
+        db.add(Employee(
+            id=i, name=f"Employee {i}", designation=f"D{i % 4}", department=f"Dept {i % 3}",
+            reports_to_id=manager,
+            status=EmploymentStatus.ACTIVE if rng.random() < 0.85 else EmploymentStatus.TERMINATED,
+        ))
+        # Flush in small groups so managers and reports land in different flushes
+        if rng.random() < 0.3:
+            db.flush()
+    for i in range(1, employees + 1):
+        if rng.random() < 0.7:
+            db.add(EmployeeScorecardInstance(
+                employee_id=i, evaluation_period_id=1, template_id=1,
+                status=rng.choice(list(ScorecardInstanceStatus)),
+                total_weighted_score=Decimal(rng.randint(0, 10000)) / 100 if rng.random() < 0.8 else None,
+                final_rating=rng.choice([None, "Meets", "Exceeds"]),
+            ))
+    db.commit()
+
+
+# Reference implementations: the per-level walks the closure table replaced
+
+def _walk_team_members(db, manager_id, include_indirect=True, max_depth=5):
+    team_members, visited = [], set()
+
+    def collect_reports(emp_id, depth=0):
+        if depth >= max_depth or emp_id in visited:
+            return
+        visited.add(emp_id)
+        for report in db.query(Employee).filter(
+            Employee.reports_to_id == emp_id, Employee.status == EmploymentStatus.ACTIVE,
+        ).order_by(Employee.id):
+            team_members.append(report)
+            if include_indirect:
+                collect_reports(report.id, depth + 1)
+
+    collect_reports(manager_id)
+    return team_members
+
+
+def _walk_manager_hierarchy(db, employee_id, max_depth=10):
+    hierarchy, current = [], db.get(Employee, employee_id)
+    while current and current.reports_to_id and len(hierarchy) < max_depth:
+        current = db.get(Employee, current.reports_to_id)
+        hierarchy.append({
+            "level": len(hierarchy) + 1, "employee_id": current.id, "name": current.name,
+            "designation": current.designation, "department": current.department,
+        })
+    return hierarchy
+
+
+def _walk_org_tree(db, emp_id, period_id, max_depth, depth=0):
+    emp = db.get(Employee, emp_id)
+    scorecard = db.query(EmployeeScorecardInstance).filter_by(
+        employee_id=emp_id, evaluation_period_id=period_id,
+    ).order_by(EmployeeScorecardInstance.id).first()
+    node = {
+        "employee_id": emp.id, "name": emp.name, "designation": emp.designation, "department": emp.department,
+        "score": float(scorecard.total_weighted_score) if scorecard and scorecard.total_weighted_score else None,
+        "rating": scorecard.final_rating if scorecard else None,
+        "status": scorecard.status.value if scorecard else None,
+        "children": [],
+    }
+    if depth < max_depth:
+        for report in db.query(Employee).filter(
+            Employee.reports_to_id == emp_id, Employee.status == EmploymentStatus.ACTIVE,
+        ).order_by(Employee.id):
+            node["children"].append(_walk_org_tree(db, report.id, period_id, max_depth, depth + 1))
+    if node["children"]:
+        scores = [c["score"] for c in node["children"] if c["score"] is not None]
+        node["team_avg"] = round(sum(scores) / len(scores), 2) if scores else None
+        node["team_size"] = len(node["children"])
+    return node
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_flush_hook_keeps_closure_in_step_with_manager_changes(db, seed):
+    rng = random.Random(seed)
+    _seed_org(db, rng, employees=40)
+    assert _stored(db) == _expected(db)
+
+    for _ in range(60):
+        db.flush()  # SessionLocal does not autoflush; pick managers from the current tree
+        employee = db.get(Employee, rng.randint(1, 40))
+        candidates = [None] + [e.id for e in db.query(Employee) if e.id not in _subtree(db, employee.id)]
+        employee.reports_to_id = rng.choice(candidates)
+        if rng.random() < 0.5:
+            db.commit()
+    db.commit()
+
+    assert _stored(db) == _expected(db)
+    assert reconcile_employee_hierarchy(db)["deleted"] == 0
+
+
+def test_new_employees_attach_in_any_flush_order(db):
+    # Report added before its manager, and the manager attached in the same flush
+    db.add(Employee(id=3, name="C", reports_to_id=2))
+    db.add(Employee(id=2, name="B", reports_to_id=1))
+    db.add(Employee(id=1, name="A"))
+    db.commit()
+    assert _stored(db) == {
+        (1, 1): 0, (2, 2): 0, (3, 3): 0, (1, 2): 1, (2, 3): 1, (1, 3): 2,
+    }
+
+
+def test_cycle_is_refused_by_hook_and_resolved_by_reconcile(db):
+    db.add_all([Employee(id=1, name="A"), Employee(id=2, name="B", reports_to_id=1)])
+    db.commit()
+    before = _stored(db)
+
+    db.get(Employee, 1).reports_to_id = 2
+    db.commit()
+    assert _stored(db) == before
+
+    result = reconcile_employee_hierarchy(db)
+    assert _stored(db) == _expected(db) == {(1, 1): 0, (2, 2): 0, (2, 1): 1, (1, 2): 1}
+    assert (result["deleted"], result["inserted"]) == (0, 1)
+
+
+def test_reconcile_repairs_deferred_and_raw_writes(db):
+    _seed_org(db, random.Random(7), employees=25)
+    db.query(EmployeeHierarchy).filter(EmployeeHierarchy.depth == 2).delete()
+    db.add(EmployeeHierarchy(ancestor_id=25, descendant_id=1, depth=9))
+    db.commit()
+
+    db.info[DEFER_HIERARCHY_UPDATES] = True
+    db.get(Employee, 10).reports_to_id = None
+    db.commit()
+    db.info.pop(DEFER_HIERARCHY_UPDATES)
+    assert _stored(db) != _expected(db)
+
+    result = reconcile_employee_hierarchy(db)
+    assert result["deleted"] > 0 and result["inserted"] > 0
+    assert _stored(db) == _expected(db)
+    assert reconcile_employee_hierarchy(db) == {**result, "deleted": 0, "inserted": 0}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_team_views_match_recursive_walks(db, seed):
+    rng = random.Random(seed)
+    _seed_org(db, rng, employees=60)
+    service = PerformanceService(db)
+    ids = [e.id for e in db.query(Employee)]
+
+    for employee_id in ids:
+        for include_indirect, max_depth in ((True, 5), (True, 2), (False, 5), (True, 0)):
+            assert service.get_team_members(employee_id, include_indirect, max_depth) == _walk_team_members(
+                db, employee_id, include_indirect, max_depth,
+            )
+        assert service.get_manager_hierarchy(employee_id, max_depth=3) == _walk_manager_hierarchy(db, employee_id, 3)
+        assert service.get_manager_hierarchy(employee_id) == _walk_manager_hierarchy(db, employee_id)
+        for max_depth in (0, 2, 3):
+            assert service.get_org_tree_performance(employee_id, 1, max_depth) == _walk_org_tree(
+                db, employee_id, 1, max_depth,
+            )
+    assert service.get_org_tree_performance(999, 1) == {}
+
+    managers = {e.reports_to_id for e in db.query(Employee) if e.reports_to_id}
+    assert [m.id for m in get_managers(db)] == sorted(managers)
+
+
+def test_team_view_statements_do_not_grow_with_org_size(db, reseed, statements):
+    counts = []
+    for employees in (10, 200):
+        reseed(_seed_org, random.Random(1), employees)
+        service = PerformanceService(db)
+        statements.clear()
+        team = service.get_team_members(1, max_depth=50)
+        tree = service.get_org_tree_performance(1, 1, max_depth=50)
+        chain = service.get_manager_hierarchy(employees)
+        counts.append(len(statements))
+        assert team and tree["children"] and chain
+    assert counts[0] == counts[1] == 5
@@ -0,0 +1,225 @@
+"""Tests for batched child-table fetches and checkpointed ERPNext HR syncs.
+
+Run with: poetry run pytest tests/test_erpnext_hr_sync.py -v
+"""
+
+import asyncio
+import json
+import random
+from decimal import Decimal
+from unittest.mock import patch
+from urllib.parse import unquote
+
+import pytest
+
+from app.config import settings
+from app.models.employee import Employee
+from app.models.hr_leave import LeaveApplication, LeaveType
+from app.models.hr_payroll import SalarySlip, SalarySlipDeduction, SalarySlipEarning
+from app.models.sync_cursor import SyncCursor
+from app.models.sync_log import SyncLog, SyncStatus
+from app.sync.erpnext import ERPNextSync
+from app.sync.erpnext_parts.hr import sync_leave_applications, sync_salary_slips
+
+
+DB_MODELS = (
+    SyncLog, SyncCursor, Employee, SalarySlip, SalarySlipEarning, SalarySlipDeduction, LeaveType, LeaveApplication,
+)
+
+
+class FakeERPNext(ERPNextSync):
+    """ERPNextSync serving list, get_list and document requests from memory."""
+
+    def __init__(self, db, documents, child_rows, fail_batches=0):
+        super().__init__(db)
+        self.documents = documents  # doctype -> [list rows]
+        self.child_rows = child_rows  # Salary Detail rows with parent/parentfield
+        self.fail_batches = fail_batches
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+
+    async def _request(self, client, method, endpoint, params=None, json_data=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            return self._respond(endpoint, params or {}, json_data or {})
+        finally:
+            self.in_flight -= 1
+
+    def _respond(self, endpoint, params, body):
+        if endpoint == "/api/method/frappe.client.get_list":
+            self.calls.append(("get_list", tuple(body["filters"][2][2])))
+            if self.fail_batches:
+                self.fail_batches -= 1
+                raise RuntimeError("get_list not permitted")
+            parents = set(body["filters"][2][2])
+            rows = sorted(
+                (r for r in self.child_rows if r["parent"] in parents and r["parentfield"] in body["filters"][1][2]),
+                key=lambda r: (r["parent"], r["idx"]),
+            )
+            start = body["limit_start"]
+            return {"message": rows[start:start + body["limit_page_length"]]}
+
+        path = endpoint[len("/api/resource/"):]
+        if "/" in path:
+            doctype, name = path.split("/", 1)
+            name = unquote(name)
+            self.calls.append(("document", name))
+            doc = {"name": name, "earnings": [], "deductions": []}
+            for row in self.child_rows:
+                if row["parent"] == name:
+                    doc[row["parentfield"]].append(row)
+            return {"data": doc}
+
+        self.calls.append(("list", path))
+        rows = list(self.documents[path])
+        filters = json.loads(params["filters"]) if "filters" in params else {}
+        if "modified" in filters:
+            rows = [r for r in rows if r["modified"] >= filters["modified"][1]]
+        rows.sort(key=lambda r: (r["modified"], r["name"]))
+        start = params["limit_start"]
+        return {"data": rows[start:start + params["limit_page_length"]]}
+
+
+def _salary_data(rng, slips):
+    documents, child_rows = {"Salary Slip": []}, []
+    for i in range(slips):
+        name = f"Sal Slip/EMP-{i % 7:03d}/{i:05d}"
+        documents["Salary Slip"].append({
+            "name": name, "employee": f"EMP-{i % 7:03d}", "posting_date": "2025-01-31",
+            "start_date": "2025-01-01", "end_date": "2025-01-31", "gross_pay": str(1000 + i),
+            "status": "Submitted", "docstatus": 1,
+            "modified": f"2025-02-{rng.randint(1, 9):02d} 10:00:0{rng.randint(0, 9)}.000000",
+        })
+        for field in ("earnings", "deductions"):
+            for idx in range(rng.randint(0, 3), 0, -1):  # Reverse idx order to check sorting
+                child_rows.append({
+                    "parent": name, "parentfield": field, "name": f"{name}-{field}-{idx}", "idx": idx,
+                    "salary_component": f"{field[:-1]} {idx}", "amount": str(rng.randint(1, 500)),
+                })
+    return documents, child_rows
+
+
+def _slip_rows(db):
+    return {
+        slip.erpnext_id: (
+            slip.gross_pay,
+            [(e.idx, e.salary_component, e.amount) for e in db.query(SalarySlipEarning)
+             .filter_by(salary_slip_id=slip.id).order_by(SalarySlipEarning.idx)],
+            [(d.idx, d.salary_component, d.amount) for d in db.query(SalarySlipDeduction)
+             .filter_by(salary_slip_id=slip.id).order_by(SalarySlipDeduction.idx)],
+        )
+        for slip in db.query(SalarySlip)
+    }
+
+
+def _run(coro_fn, sync, full_sync=False):
+    asyncio.run(coro_fn(sync, None, full_sync))
+
+
+def _sync_slips(db, documents, child_rows, fail_batches=0, full_sync=False):
+    sync = FakeERPNext(db, documents, child_rows, fail_batches=fail_batches)
+    _run(sync_salary_slips, sync, full_sync)
+    return sync
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_batched_child_rows_match_per_document_fetch(db, reseed, seed):
+    documents, child_rows = _salary_data(random.Random(seed), slips=230)
+    results = []
+    for fail_batches in (0, 10**6):
+        with patch.object(settings, "erpnext_child_batch_size", 50), \
+                patch.object(settings, "erpnext_child_fetch_concurrency", 3):
+            sync = reseed(_sync_slips, documents, child_rows, fail_batches=fail_batches)
+        results.append(_slip_rows(db))
+        kinds = [kind for kind, _ in sync.calls]
+        if fail_batches:
+            # Every batch failed and fell back to one request per slip
+            assert kinds.count("document") == 230
+        else:
+            assert kinds.count("document") == 0
+            assert kinds.count("get_list") == 5  # 230 slips in one chunk, 50 per batch
+        assert 1 < sync.max_in_flight <= 3
+    assert results[0] == results[1]
+    assert sum(len(e) + len(d) for _, e, d in results[0].values()) == len(child_rows)
+
+
+def test_resync_replaces_child_rows(db):
+    documents, child_rows = _salary_data(random.Random(1), slips=20)
+    _sync_slips(db, documents, child_rows)
+
+    changed = documents["Salary Slip"][3]["name"]
+    child_rows = [r for r in child_rows if r["parent"] != changed] + [{
+        "parent": changed, "parentfield": "earnings", "name": "new", "idx": 1, "salary_component": "Basic",
+        "amount": "42",
+    }]
+    _sync_slips(db, documents, child_rows, full_sync=True)
+
+    rows = _slip_rows(db)
+    assert rows[changed][1:] == ([(1, "Basic", Decimal("42"))], [])
+    assert db.query(SalarySlip).count() == 20
+
+
+def test_interrupted_sync_resumes_from_checkpoint(db, reseed):
+    documents, child_rows = _salary_data(random.Random(2), slips=120)
+
+    original = ERPNextSync._fetch_child_rows
+    calls = {"n": 0}
+
+    async def fail_third_chunk(self, *args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("connection reset")
+        return await original(self, *args, **kwargs)
+
+    with patch.object(settings, "sync_batch_size", 25):
+        with patch.object(ERPNextSync, "_fetch_child_rows", fail_third_chunk):
+            with pytest.raises(RuntimeError):
+                _run(sync_salary_slips, FakeERPNext(db, documents, child_rows), full_sync=True)
+        assert db.query(SalarySlip).count() == 50
+        checkpoint = json.loads(db.query(SyncCursor).filter_by(entity_type="salary_slips:checkpoint").one().cursor_value)
+        assert checkpoint["processed"] == 50 and checkpoint["full_sync"] is True
+
+        resumed = FakeERPNext(db, documents, child_rows)
+        _run(sync_salary_slips, resumed)
+
+    fetched = [name for kind, names in resumed.calls if kind == "get_list" for name in names]
+    assert len(fetched) == 70 and not set(fetched) & {s.erpnext_id for s in db.query(SalarySlip).filter(SalarySlip.id <= 50)}
+    assert db.query(SyncCursor).filter_by(entity_type="salary_slips:checkpoint").count() == 0
+    assert db.query(SyncCursor).filter_by(entity_type="salary_slips").one().last_modified_at is not None
+    assert db.query(SyncLog).order_by(SyncLog.id.desc()).first().status == SyncStatus.COMPLETED
+
+    resumed_rows = _slip_rows(db)
+    reseed(_sync_slips, documents, child_rows, full_sync=True)
+    assert resumed_rows == _slip_rows(db)
+
+
+def test_full_sync_does_not_resume_incremental_checkpoint(db):
+    documents = {"Leave Application": [
+        {
+            "name": f"HR-LAP-{i:04d}", "employee": "EMP-001", "leave_type": "Annual", "from_date": "2025-03-03",
+            "to_date": "2025-03-04", "posting_date": "2025-03-01", "total_leave_days": 2,
+            "modified": f"2025-03-{i % 28 + 1:02d} 09:00:00.000000",
+        }
+        for i in range(40)
+    ]}
+    db.add(SyncCursor(
+        source=ERPNextSync.source, entity_type="leave_applications:checkpoint",
+        cursor_value=json.dumps({"full_sync": False, "modified": "2025-03-20 09:00:00.000000", "name": "x", "processed": 5}),
+    ))
+    db.commit()
+
+    incremental = FakeERPNext(db, documents, [])
+    with patch.object(ERPNextSync, "_finish_checkpointed_sync", side_effect=RuntimeError("stop")):
+        with pytest.raises(RuntimeError):
+            _run(sync_leave_applications, incremental)
+    # The incremental run resumed after the checkpoint
+    assert {a.erpnext_id for a in db.query(LeaveApplication)} == {
+        d["name"] for d in documents["Leave Application"] if (d["modified"], d["name"]) > ("2025-03-20 09:00:00.000000", "x")
+    }
+
+    full = FakeERPNext(db, documents, [])
+    _run(sync_leave_applications, full, full_sync=True)
+    assert db.query(LeaveApplication).count() == 40
+    assert db.query(SyncCursor).filter_by(entity_type="leave_applications:checkpoint").count() == 0
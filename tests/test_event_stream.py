@@ -0,0 +1,166 @@
+"""Tests for the Redis Streams event bus backend (in-memory stream).
+
+Run with: poetry run pytest tests/test_event_stream.py -v
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.services.event_bus import Event, EventBus, next_offset
+from app.services.event_stream import InMemoryEventStream, StreamConsumer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingSession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def stream(clock):
+    return InMemoryEventStream(clock=clock)
+
+
+def _event(event_type, n, **fields):
+    return Event(event_type=event_type, entity_type="invoice", entity_id=n, payload={"amount": Decimal("10.50")}, **fields)
+
+
+def _consumer(stream, handlers=None, batch_handlers=None, notified=None, **kwargs):
+    def notify(db, events):
+        if notified is not None:
+            notified.extend(e.entity_id for e in events)
+
+    return StreamConsumer(
+        stream,
+        consumer="worker-1",
+        handlers=handlers or {},
+        batch_handlers=batch_handlers or {},
+        session_factory=RecordingSession,
+        notify=notify,
+        **kwargs,
+    )
+
+
+def test_publish_appends_without_inline_dispatch(stream, monkeypatch):
+    bus = EventBus(stream=stream)
+    monkeypatch.setattr(bus, "_notify", lambda event: pytest.fail("notified inline"))
+    monkeypatch.setattr(bus, "_dispatch_async", lambda event: pytest.fail("dispatched via Celery"))
+
+    event_id = bus.publish(_event("invoice_created", 1))
+    ids = bus.publish_many([_event("payment_received", n) for n in range(2, 5)], notify=False)
+
+    assert len(stream) == 4
+    assert ids[0] != event_id
+    entries = bus.replay()
+    assert [e.event.entity_id for e in entries] == [1, 2, 3, 4]
+    assert [e.notify for e in entries] == [True, False, False, False]
+    assert entries[0].event.payload == {"amount": 10.5}
+
+
+def test_batch_handlers_receive_events_grouped_by_type(stream):
+    bus = EventBus(stream=stream)
+    bus.publish_many([_event("payment_received", n) for n in range(5)])
+    bus.publish(_event("invoice_created", 99))
+
+    batches = []
+    singles = []
+    notified = []
+    consumer = _consumer(
+        stream,
+        handlers={"invoice_created": [lambda event, db: singles.append(event.entity_id)]},
+        batch_handlers={"payment_received": [lambda events, db: batches.append([e.entity_id for e in events])]},
+        notified=notified,
+    )
+
+    assert consumer.run_once(count=100) == {"read": 6, "acked": 6, "failed": 0}
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert singles == [99]
+    assert sorted(notified) == [0, 1, 2, 3, 4, 99]
+    assert consumer.run_once()["read"] == 0
+    assert stream.pending("event-handlers", 0, 100) == []
+
+
+def test_failed_entries_stay_pending_then_are_reclaimed_and_dead_lettered(stream, clock):
+    bus = EventBus(stream=stream)
+    bus.publish_many([_event("payment_received", n) for n in range(3)])
+
+    calls = []
+
+    def handler(event, db):
+        calls.append(event.entity_id)
+        if event.entity_id == 1:
+            raise ValueError("boom")
+
+    consumer = _consumer(stream, handlers={"payment_received": [handler]}, max_deliveries=3)
+    assert consumer.run_once() == {"read": 3, "acked": 2, "failed": 1}
+    pending = stream.pending("event-handlers", 0, 10)
+    assert [(p.entry_id, p.deliveries) for p in pending] == [("2-0", 1)]
+
+    # Not idle long enough yet
+    assert consumer.reclaim(min_idle_ms=60_000)["read"] == 0
+
+    # Another consumer takes the entry over after the idle timeout
+    rescuer = _consumer(stream, handlers={"payment_received": [handler]}, max_deliveries=3)
+    rescuer.consumer = "worker-2"
+    for _ in range(2):
+        clock.now += 61
+        assert rescuer.reclaim(min_idle_ms=60_000) == {"read": 1, "acked": 0, "failed": 1, "dead_lettered": 0}
+    clock.now += 61
+    assert rescuer.reclaim(min_idle_ms=60_000) == {"read": 0, "acked": 0, "failed": 0, "dead_lettered": 1}
+
+    assert calls == [0, 1, 2, 1, 1]
+    assert [(entry.event.entity_id, reason, entry.deliveries) for entry, reason in stream.dead] == [
+        (1, "max_deliveries", 3),
+    ]
+    assert stream.pending("event-handlers", 0, 10) == []
+
+
+def test_new_group_starts_from_beginning_and_replay_pages_by_offset(stream):
+    bus = EventBus(stream=stream)
+    bus.publish_many([_event("invoice_created" if n % 2 else "payment_received", n) for n in range(7)])
+
+    page = bus.replay(count=3)
+    assert [e.event.entity_id for e in page] == [0, 1, 2]
+    page = bus.replay(start_id=next_offset(page[-1].entry_id), count=3)
+    assert [e.event.entity_id for e in page] == [3, 4, 5]
+    assert [e.event.entity_id for e in bus.replay(start_id="3-0", event_types=["invoice_created"])] == [3, 5]
+
+    seen = []
+    from app.services import event_bus as event_bus_module
+
+    event_bus_module._handler_registry["invoice_created"].append(lambda event: seen.append(event.entity_id))
+    try:
+        result = bus.reprocess(start_id="2-0", count=4, event_types=["invoice_created"])
+    finally:
+        event_bus_module._handler_registry["invoice_created"].pop()
+    assert seen == [1, 3]
+    assert result["replayed"] == 2
+    assert result["next_offset"] == "5-1"
+
+    # A consumer group created later still sees the full retained history
+    consumer = _consumer(stream)
+    assert consumer.drain(count=3) == {"read": 7, "acked": 7, "failed": 0, "batches": 3}
@@ -0,0 +1,215 @@
+"""Tests for set-based HR bulk operations (attendance and leave).
+
+Run with: poetry run pytest tests/test_hr_bulk.py -v
+"""
+
+import asyncio
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.api.hr.attendance import BulkAttendancePayload, bulk_mark_attendance
+from app.api.hr.helpers import get_leave_balance, update_allocation_balance
+from app.api.hr.leave import (
+    BulkLeaveAllocationCreate,
+    LeaveApplicationBulkAction,
+    bulk_approve_leave_applications,
+    bulk_create_leave_allocations,
+)
+from app.config import settings
+from app.models.accounting_ext import AuditLog
+from app.models.hr_attendance import Attendance, AttendanceRequest, AttendanceRequestStatus, AttendanceStatus
+from app.models.hr_leave import (
+    LeaveAllocation,
+    LeaveAllocationStatus,
+    LeaveApplication,
+    LeaveApplicationStatus,
+    LeaveBalance,
+    LeaveLedgerEntry,
+    LeavePolicy,
+    LeavePolicyDetail,
+    LeaveType,
+)
+from app.services.hr_bulk_service import HRBulkService
+
+DAY = date(2025, 6, 2)
+YEAR_START, YEAR_END = date(2025, 1, 1), date(2025, 12, 31)
+DB_MODELS = (
+    Attendance, AttendanceRequest, LeaveType, LeavePolicy, LeavePolicyDetail,
+    LeaveAllocation, LeaveApplication, LeaveLedgerEntry, LeaveBalance, AuditLog,
+)
+
+
+def test_mark_attendance_skips_existing_and_repeated_employees(db):
+    db.add(Attendance(employee="EMP-2", employee_id=2, attendance_date=DAY, status=AttendanceStatus.ON_LEAVE))
+    db.add(Attendance(employee="EMP-3", employee_id=3, attendance_date=date(2025, 6, 1)))
+    db.commit()
+
+    payload = BulkAttendancePayload(employee_ids=[1, 2, 3, 1, 4], attendance_date=DAY, status=AttendanceStatus.PRESENT)
+    result = asyncio.run(bulk_mark_attendance(payload, db=db, current_user=None))
+
+    ids = {a.employee_id: a.id for a in db.query(Attendance).filter_by(attendance_date=DAY)}
+    existing = ids[2]
+    assert result["created_details"] == [
+        {"employee_id": 1, "id": ids[1]}, {"employee_id": 3, "id": ids[3]}, {"employee_id": 4, "id": ids[4]},
+    ]
+    assert result["skipped_details"] == [
+        {"employee_id": 2, "existing_id": existing, "existing_status": "on_leave"},
+        {"employee_id": 1, "existing_id": ids[1], "existing_status": "present"},
+    ]
+    assert (result["created"], result["skipped"], result["total"]) == (3, 2, 5)
+    assert db.query(AuditLog).count() == 1
+
+
+def test_mark_attendance_statements_per_chunk_do_not_grow(db, statements):
+    # Each run marks a fresh day, so every employee is inserted
+    counts = []
+    for offset, count in enumerate((20, 400)):
+        statements.clear()
+        result = HRBulkService(db, chunk_size=500).mark_attendance(
+            list(range(1, count + 1)), DAY + timedelta(days=offset), AttendanceStatus.PRESENT,
+        )
+        db.commit()
+        assert len(result.succeeded) == count
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+    statements.clear()
+    HRBulkService(db, chunk_size=100).mark_attendance(list(range(1, 401)), DAY + timedelta(days=2), AttendanceStatus.PRESENT)
+    db.commit()
+    assert len(statements) == counts[0] + 3 * 2  # one existence query and one INSERT per extra chunk
+
+
+def test_attendance_requests_change_only_pending(db):
+    statuses = [AttendanceRequestStatus.PENDING, AttendanceRequestStatus.DRAFT, AttendanceRequestStatus.PENDING]
+    for i, status in enumerate(statuses, start=1):
+        db.add(AttendanceRequest(id=i, employee=f"EMP-{i}", from_date=DAY, to_date=DAY, status=status))
+    db.commit()
+
+    updated = HRBulkService(db, chunk_size=2).set_attendance_request_status(
+        [1, 2, 3, 3, 99], AttendanceRequestStatus.APPROVED,
+    )
+    db.commit()
+    assert updated == 2
+    assert [r.status for r in db.query(AttendanceRequest).order_by(AttendanceRequest.id)] == [
+        AttendanceRequestStatus.APPROVED, AttendanceRequestStatus.DRAFT, AttendanceRequestStatus.APPROVED,
+    ]
+    assert all(r.status_changed_at for r in db.query(AttendanceRequest).filter_by(status=AttendanceRequestStatus.APPROVED))
+    assert db.query(AuditLog).count() == 2
+
+
+def _seed_leave(db, rng, employees=12):
+    annual = LeaveType(id=1, leave_type_name="Annual")
+    sick = LeaveType(id=2, leave_type_name="Sick")
+    unpaid = LeaveType(id=3, leave_type_name="Unpaid", is_lwp=True)
+    db.add_all([annual, sick, unpaid])
+    for emp in range(1, employees + 1):
+        for lt in (annual, sick):
+            if rng.random() < 0.8:
+                db.add(LeaveAllocation(
+                    employee=f"EMP-{emp}", employee_id=emp, leave_type=lt.leave_type_name, leave_type_id=lt.id,
+                    from_date=YEAR_START, to_date=YEAR_END, status=LeaveAllocationStatus.SUBMITTED,
+                    total_leaves_allocated=Decimal(10), unused_leaves=Decimal(rng.choice([0, 3, 10])),
+                ))
+    for app_id in range(1, employees * 3 + 1):
+        lt = rng.choice([annual, sick, unpaid])
+        db.add(LeaveApplication(
+            id=app_id, employee=f"EMP-{app_id % employees + 1}", employee_id=app_id % employees + 1,
+            leave_type=lt.leave_type_name, leave_type_id=lt.id,
+            from_date=rng.choice([date(2025, 3, 3), date(2026, 2, 2)]), to_date=date(2026, 3, 3),
+            posting_date=YEAR_START, total_leave_days=Decimal(rng.choice([1, 2, 4])),
+            status=rng.choice([LeaveApplicationStatus.OPEN] * 4 + [LeaveApplicationStatus.REJECTED]),
+        ))
+    db.commit()
+
+
+def _approve_one_at_a_time(db, application_ids):
+    """Bulk approval as done before the bulk service existed."""
+    skipped = []
+    for app_id in application_ids:
+        application = db.get(LeaveApplication, app_id)
+        if not application or application.status != LeaveApplicationStatus.OPEN:
+            skipped.append({"application_id": app_id, "reason": "Not open or not found"})
+            continue
+        leave_type = db.get(LeaveType, application.leave_type_id)
+        if not leave_type.is_lwp:
+            available = get_leave_balance(db, application.employee_id, application.leave_type_id, application.from_date)
+            requested = application.total_leave_days
+            if requested > available:
+                skipped.append({
+                    "application_id": app_id, "reason": "Insufficient balance",
+                    "available": float(available), "requested": float(requested),
+                })
+                continue
+            if not update_allocation_balance(
+                db, application.employee_id, application.leave_type_id, application.from_date, -requested,
+            ):
+                skipped.append({"application_id": app_id, "reason": "No allocation covering dates"})
+                continue
+        application.status = LeaveApplicationStatus.APPROVED
+    db.commit()
+    return skipped
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bulk_leave_approval_matches_per_application_approval(db, reseed, seed):
+    rng = random.Random(seed)
+    ids = [rng.randint(1, 40) for _ in range(45)]
+    outcomes = []
+    for approve in ("reference", "bulk"):
+        reseed(_seed_leave, random.Random(seed))
+        if approve == "reference":
+            skipped = _approve_one_at_a_time(db, ids)
+        else:
+            payload = LeaveApplicationBulkAction(application_ids=ids)
+            # Small chunks so repeated ids and shared allocations span chunks
+            with patch.object(settings, "hr_bulk_chunk_size", 8):
+                response = bulk_approve_leave_applications(payload, db=db, current_user=None)
+            skipped = response["skipped"]
+            assert response["updated"] == len(ids) - len(skipped)
+            assert db.query(AuditLog).count() == response["updated"]
+        outcomes.append((
+            skipped,
+            [(a.id, a.status) for a in db.query(LeaveApplication).order_by(LeaveApplication.id)],
+            [(a.id, a.unused_leaves) for a in db.query(LeaveAllocation).order_by(LeaveAllocation.id)],
+        ))
+    assert outcomes[0] == outcomes[1]
+
+
+def test_bulk_leave_allocation_skips_overlaps_and_repeats(db):
+    db.add_all([LeaveType(id=1, leave_type_name="Annual"), LeaveType(id=2, leave_type_name="Sick")])
+    policy = LeavePolicy(id=1, leave_policy_name="Standard")
+    policy.details = [
+        LeavePolicyDetail(leave_type="Annual", leave_type_id=1, annual_allocation=Decimal("20")),
+        LeavePolicyDetail(leave_type="Legacy", leave_type_id=None),
+        LeavePolicyDetail(leave_type="Sick", leave_type_id=2, annual_allocation=Decimal("5")),
+    ]
+    db.add(policy)
+    db.add(LeaveAllocation(
+        employee="EMP-2", employee_id=2, leave_type="Sick", leave_type_id=2, status=LeaveAllocationStatus.DRAFT,
+        from_date=date(2024, 7, 1), to_date=date(2025, 6, 30),
+    ))
+    db.commit()
+
+    payload = BulkLeaveAllocationCreate(employee_ids=[1, 2, 1], leave_policy_id=1, from_date=YEAR_START, to_date=YEAR_END)
+    result = bulk_create_leave_allocations(payload, db=db, current_user=None)
+
+    assert [(c["employee_id"], c["leave_type"], c["total_allocated"]) for c in result["created_details"]] == [
+        (1, "Annual", 20.0), (1, "Sick", 5.0), (2, "Annual", 20.0),
+    ]
+    assert [(s["employee_id"], s["leave_type"], s["reason"]) for s in result["skipped_details"]] == [
+        (1, "Legacy", "Missing leave_type_id in policy detail"),
+        (2, "Legacy", "Missing leave_type_id in policy detail"),
+        (2, "Sick", "Overlapping allocation exists"),
+        (1, "Annual", "Overlapping allocation exists"),
+        (1, "Legacy", "Missing leave_type_id in policy detail"),
+        (1, "Sick", "Overlapping allocation exists"),
+    ]
+    created = {c["id"] for c in result["created_details"]}
+    assert {a.id for a in db.query(LeaveAllocation).filter_by(leave_policy="Standard")} == created
+    audits = db.query(AuditLog).filter_by(doctype="leave_allocation").all()
+    assert {a.document_id for a in audits} == created
+    assert all(a.new_values["unused_leaves"] == a.new_values["total_leaves_allocated"] for a in audits)
@@ -0,0 +1,207 @@
+"""Tests for cross-worker inbox WebSocket fan-out.
+
+Run with: poetry run pytest tests/test_inbox_backplane.py -v
+"""
+
+import asyncio
+
+from app.api.inbox.websocket import (
+    InboxConnectionManager,
+    InboxStatsRefresher,
+    build_inbox_stats_snapshot,
+)
+from app.models.agent import Agent
+from app.models.omni import OmniChannel, OmniConversation
+from app.services.inbox_backplane import (
+    CONTROL_STATS_REFRESH,
+    InboxBackplane,
+    InboxEvent,
+    LocalInboxBus,
+    inbox_message,
+)
+
+DB_MODELS = (OmniConversation,)
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+        self.unblock = asyncio.Event()
+        if not delay:
+            self.unblock.set()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await self.unblock.wait()
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    def events(self):
+        return [m.get("event") for m in self.sent]
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+async def _worker(bus, **kwargs):
+    manager = InboxConnectionManager(**kwargs)
+    backplane = InboxBackplane(manager.deliver)
+    await backplane.start(bus)
+    return manager, backplane
+
+
+def test_events_published_on_one_worker_reach_every_worker():
+    async def scenario():
+        bus = LocalInboxBus()
+        manager_a, backplane_a = await _worker(bus)
+        manager_b, backplane_b = await _worker(bus)
+
+        agent_on_b = FakeWebSocket()
+        stats_on_a = FakeWebSocket()
+        await manager_b.connect(agent_on_b, "conversations", user_id="user_1", agent_id=7)
+        await manager_a.connect(stats_on_a, "stats")
+
+        # Matched by both the channel and the agent target; delivered once
+        await backplane_a.publish(
+            [{"channel": "conversations"}, {"agent_id": 7}],
+            inbox_message(InboxEvent.CONVERSATION_ASSIGNED, {"conversation_id": 1}),
+        )
+        await backplane_b.publish([{"channel": "stats"}], inbox_message(InboxEvent.STATS_UPDATE, {"open_count": 3}))
+        await backplane_a.publish([{"user_id": "user_1"}], {"type": "direct"})
+        await _settle()
+
+        assert agent_on_b.events() == [InboxEvent.CONVERSATION_ASSIGNED, None]
+        assert stats_on_a.sent[0]["data"] == {"open_count": 3}
+
+        await bus.set_presence("other-worker", {7, 8}, 90)
+        await backplane_a.set_presence(set(manager_a.agent_connections))
+        await backplane_b.set_presence(set(manager_b.agent_connections))
+        assert await backplane_a.agents_online() == 2
+
+        await backplane_a.stop()
+        await backplane_b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_does_not_block_others_and_gets_coalesced_snapshots():
+    async def scenario():
+        manager = InboxConnectionManager(max_pending=5)
+        slow, fast = FakeWebSocket(), FakeWebSocket()
+        slow.unblock.clear()
+        await manager.connect(slow, "stats")
+        await manager.connect(fast, "stats")
+        manager.subscribe(slow, "conversations")
+        manager.subscribe(fast, "conversations")
+
+        for i in range(50):
+            manager.deliver([{"channel": "stats"}], inbox_message(InboxEvent.STATS_UPDATE, {"open_count": i}))
+            manager.deliver(
+                [{"channel": "conversations"}],
+                inbox_message(InboxEvent.CONVERSATION_UPDATE, {"id": i % 2, "version": i}),
+            )
+        await _settle()
+
+        assert len(fast.sent) > 0
+        # The slow client receives only the latest snapshot per key
+        slow.unblock.set()
+        await _settle()
+        assert [(m["event"], m["data"]) for m in slow.sent] == [
+            (InboxEvent.STATS_UPDATE, {"open_count": 49}),
+            (InboxEvent.CONVERSATION_UPDATE, {"id": 0, "version": 48}),
+            (InboxEvent.CONVERSATION_UPDATE, {"id": 1, "version": 49}),
+        ]
+        assert manager.get_stats()["queued_messages"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_client_that_falls_too_far_behind_is_dropped():
+    async def scenario():
+        manager = InboxConnectionManager(max_pending=3)
+        stuck, healthy = FakeWebSocket(), FakeWebSocket()
+        stuck.unblock.clear()
+        await manager.connect(stuck, "messages", agent_id=4)
+        await manager.connect(healthy, "messages")
+
+        for i in range(6):
+            manager.deliver([{"channel": "messages"}], inbox_message(InboxEvent.NEW_MESSAGE, {"n": i}))
+            await asyncio.sleep(0.001)
+        await _settle()
+
+        assert stuck not in manager.queues
+        assert manager.agent_connections == {}
+        assert stuck.closed_with == 1013
+        assert manager.get_stats()["dropped_slow_clients"] == 1
+        assert len(healthy.sent) == 6
+
+    asyncio.run(scenario())
+
+
+def test_stats_requests_are_debounced_across_workers():
+    async def scenario():
+        bus = LocalInboxBus()
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return {"open_count": len(computed), "agents_online": 0}
+
+        manager_a, backplane_a = await _worker(bus)
+        manager_b, backplane_b = await _worker(bus)
+        refresher_a = InboxStatsRefresher(backplane_a, compute, window=0.05)
+        refresher_b = InboxStatsRefresher(backplane_b, compute, window=0.05)
+        backplane_b.on_control = lambda control: control == CONTROL_STATS_REFRESH and refresher_b.request()
+
+        viewer = FakeWebSocket()
+        await manager_b.connect(viewer, "stats")
+
+        for _ in range(20):
+            refresher_a.request()
+            refresher_b.request()
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.15)
+        assert len(computed) == 1
+        assert viewer.events() == [InboxEvent.STATS_UPDATE]
+
+        # A Celery task asks for a refresh through the bus
+        await bus.publish('{"control": "stats_refresh"}')
+        await asyncio.sleep(0.15)
+        assert len(computed) == 2
+        assert viewer.sent[-1]["data"]["open_count"] == 2
+
+        await backplane_a.stop()
+        await backplane_b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stats_snapshot_uses_one_query(db, statements):
+    db.add_all([OmniChannel(id=1, name="email", type="email"), Agent(id=3, display_name="ada", email="ada@example.com")])
+    db.add_all([
+        OmniConversation(channel_id=1, status="open", unread_count=2),
+        OmniConversation(channel_id=1, status="open", unread_count=1, assigned_agent_id=3),
+        OmniConversation(channel_id=1, status="pending", unread_count=4),
+        OmniConversation(channel_id=1, status="resolved", unread_count=9),
+    ])
+    db.commit()
+
+    statements.clear()
+    stats = build_inbox_stats_snapshot(db)
+    assert len(statements) == 1
+    assert {k: v for k, v in stats.items() if k != "agents_online"} == {
+        "open_count": 2,
+        "pending_count": 1,
+        "resolved_count": 1,
+        "unassigned_count": 2,
+        "total_unread": 7,
+    }
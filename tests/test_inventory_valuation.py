@@ -0,0 +1,210 @@
+"""Tests for the inventory cost-layer engine and the valuation report.
+
+Run with: poetry run pytest tests/test_inventory_valuation.py -v
+"""
+
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.api.inventory import get_inventory_valuation_report
+from app.models.inventory import StockLedgerEntry, StockValuationSnapshot, StockValuationState
+from app.models.sales import Item
+from app.services.inventory_valuation_service import CostLayerBook, InventoryValuationService
+
+DB_MODELS = (Item, StockLedgerEntry, StockValuationState, StockValuationSnapshot)
+
+
+@pytest.fixture(autouse=True)
+def items(db):
+    db.add_all([
+        Item(item_code="ROUTER", item_name="Router", item_group="Devices", stock_uom="Nos"),
+        Item(item_code="CABLE", item_name="Cable", item_group=None, stock_uom="m"),
+    ])
+    db.commit()
+
+
+def _sle(db, item, qty, rate=0, day=1, warehouse="Main", cancelled=False):
+    entry = StockLedgerEntry(
+        item_code=item,
+        warehouse=warehouse,
+        posting_date=datetime(2025, 1, day),
+        actual_qty=Decimal(str(qty)),
+        incoming_rate=Decimal(str(rate)),
+        valuation_rate=Decimal("0"),
+        is_cancelled=cancelled,
+    )
+    db.add(entry)
+    db.commit()
+    return entry
+
+
+def _seed(db):
+    _sle(db, "ROUTER", 10, 5, day=1)
+    _sle(db, "ROUTER", 10, 7, day=2)
+    _sle(db, "ROUTER", -15, day=3)
+
+
+def _state(db, item="ROUTER", warehouse="Main"):
+    return db.query(StockValuationState).filter_by(item_code=item, warehouse=warehouse).one()
+
+
+def test_perpetual_fifo_lifo_and_moving_average(db):
+    _seed(db)
+    InventoryValuationService(db).sync()
+    state = _state(db)
+
+    assert state.qty == Decimal("5")
+    assert state.fifo_value == Decimal("35")  # 5 left of the 7.00 layer
+    assert state.lifo_value == Decimal("25")  # 5 left of the 5.00 layer
+    assert state.moving_average_rate == Decimal("6")
+
+
+def test_issue_beyond_stock_is_covered_by_next_receipt():
+    book = CostLayerBook()
+    for sle_id, (qty, rate) in enumerate([(5, 4), (-8, 0), (10, 6)], start=1):
+        book.apply(StockLedgerEntry(id=sle_id, actual_qty=Decimal(qty), incoming_rate=Decimal(rate),
+                                    valuation_rate=Decimal("0"), posting_date=datetime(2025, 1, sle_id)))
+    assert book.qty == Decimal("7")
+    assert list(book.fifo) == [[Decimal("7"), Decimal("6")]]
+
+
+def test_incremental_sync_matches_rebuild_including_backdated_entries(db):
+    service = InventoryValuationService(db)
+    _seed(db)
+    assert service.sync() == 3
+    assert service.sync() == 0
+
+    _sle(db, "ROUTER", 4, 9, day=5)
+    _sle(db, "ROUTER", 2, 1, day=2)  # back-dated: lands before the issue on day 3
+    _sle(db, "CABLE", 100, 2, day=4)
+    _sle(db, "CABLE", -50, day=4, cancelled=True)
+    service.sync()
+    incremental = {(s.item_code, s.warehouse): (s.qty, s.fifo_value, s.lifo_value) for s in db.query(StockValuationState)}
+
+    service.rebuild()
+    rebuilt = {(s.item_code, s.warehouse): (s.qty, s.fifo_value, s.lifo_value) for s in db.query(StockValuationState)}
+
+    assert incremental == rebuilt
+    # FIFO keeps 5@7, 2@1, 4@9; LIFO keeps 7@5, 4@9
+    assert rebuilt[("ROUTER", "Main")] == (Decimal("11"), Decimal("73"), Decimal("71"))
+    assert rebuilt[("CABLE", "Main")][0] == Decimal("100")
+
+
+def test_sync_reverses_entries_cancelled_after_they_were_applied(db):
+    service = InventoryValuationService(db)
+    _seed(db)
+    receipt = _sle(db, "ROUTER", 4, 9, day=5)
+    service.sync()
+    assert service.snapshot(date(2025, 1, 5)) == 1
+    assert _state(db).qty == Decimal("9")
+
+    # Cancelled below the watermark, with no new entries posted
+    db.get(StockLedgerEntry, 2).is_cancelled = True
+    receipt.is_cancelled = True
+    db.commit()
+    assert service.sync() == 0
+    db.expire_all()
+    state = _state(db)
+    assert (state.qty, state.fifo_value, state.cancelled_sle_count) == (Decimal("-5"), Decimal("0"), 2)
+    assert db.query(StockValuationSnapshot).filter_by(snapshot_date=date(2025, 1, 5)).count() == 0
+
+    incremental = (state.qty, state.fifo_value, state.lifo_value, state.moving_average_rate)
+    service.rebuild()
+    state = _state(db)
+    assert (state.qty, state.fifo_value, state.lifo_value, state.moving_average_rate) == incremental
+    assert state.cancelled_sle_count == 2
+
+    # Counts are up to date, so later syncs leave the pair alone
+    with patch.object(service, "_replay", wraps=service._replay) as replay:
+        service.sync()
+    replay.assert_not_called()
+
+
+def test_as_of_rebuild_filters_pairs_and_snapshot_bounds_in_sql(db, statements):
+    service = InventoryValuationService(db)
+    _seed(db)
+    _sle(db, "ROUTER", 5, 3, day=2, warehouse="Annex")
+    service.sync()
+    service.snapshot(date(2025, 1, 1))  # ROUTER@Main only; Annex starts on day 2
+    _sle(db, "ROUTER", 1, 8, day=9, warehouse="Annex")
+    _sle(db, "CABLE", 50, 2, day=9)
+    service.sync()
+
+    statements.clear()
+    books = service.books_as_of(date(2025, 1, 2))
+    replay = [s for s in statements if "FROM stock_ledger_entries" in s]
+    assert len(replay) == 1
+    assert "is_cancelled," not in replay[0] and "voucher_no" not in replay[0]  # only LEDGER_COLUMNS
+    assert "posting_date >=" in replay[0]
+
+    assert (books[("ROUTER", "Main")].qty, books[("ROUTER", "Main")].fifo_value) == (Decimal("20"), Decimal("120"))
+    assert (books[("ROUTER", "Annex")].qty, books[("ROUTER", "Annex")].fifo_value) == (Decimal("5"), Decimal("15"))
+    assert books[("CABLE", "Main")].last_posting_at is None  # nothing posted by day 2
+
+
+def test_as_of_valuation_from_snapshot_and_replay(db):
+    service = InventoryValuationService(db)
+    _seed(db)
+    service.sync()
+    assert service.snapshot(date(2025, 1, 1)) == 1
+    assert service.snapshot(date(2025, 1, 1)) == 0  # unchanged since last snapshot
+
+    day2 = service.books_as_of(date(2025, 1, 2))[("ROUTER", "Main")]
+    assert day2.qty == Decimal("20")
+    assert day2.fifo_value == Decimal("120")
+
+    frame = service.valuation_frame(date(2025, 1, 1))
+    assert frame.set_index("item_code").loc["ROUTER", "fifo_value"] == 50.0
+    assert service.valuation_frame(date(2024, 12, 31)).empty
+
+
+def _report(db, **overrides):
+    params = dict(
+        as_of_date="2025-01-31", warehouse=None, item_group=None, valuation_method="fifo",
+        include_zero_stock=False, currency=None, limit=100, offset=0, db=db,
+    )
+    params.update(overrides)
+    return asyncio.run(get_inventory_valuation_report(**params))
+
+
+def test_valuation_report_reads_state_without_syncing(db):
+    _seed(db)
+    assert _report(db)["total"] == 0
+    assert db.query(StockValuationState).count() == 0
+
+    InventoryValuationService(db).sync()
+    _sle(db, "CABLE", 100, 2, day=4)  # posted after the last sync
+    assert [i["item_code"] for i in _report(db)["items"]] == ["ROUTER"]
+
+
+def test_sync_endpoint_applies_new_entries(client, db):
+    _seed(db)
+    resp = client.post("/api/inventory/valuation-report/sync")
+    assert resp.status_code == 202
+    # Without a broker the sync runs as a background task after the response
+    assert _state(db).qty == Decimal("5")
+
+
+def test_valuation_report_methods_and_summary(db):
+    _seed(db)
+    _sle(db, "CABLE", 100, 2, day=4)
+    _sle(db, "GHOST", 3, 1, day=4)  # not in the item master
+    InventoryValuationService(db).sync()
+
+    fifo = _report(db)
+    assert fifo["total"] == 2
+    assert [i["item_code"] for i in fifo["items"]] == ["CABLE", "ROUTER"]
+    router = fifo["items"][1]
+    assert router["valuation_rate"] == 7.0
+    assert router["stock_value"] == 35.0
+    assert router["uom"] == "Nos"
+    assert fifo["summary"]["total_value"] == 235.0
+    assert {g["item_group"] for g in fifo["summary"]["by_item_group"]} == {"Devices", "Uncategorized"}
+
+    assert _report(db, valuation_method="lifo")["items"][1]["stock_value"] == 25.0
+    assert _report(db, valuation_method="weighted_average")["items"][1]["stock_value"] == 30.0
+    assert _report(db, item_group="Devices", as_of_date="2025-01-02")["items"][0]["quantity"] == 20.0
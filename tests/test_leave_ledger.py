@@ -0,0 +1,352 @@
+"""Tests for the leave ledger, maintained leave balances and compiled holiday calendars.
+
+Run with: poetry run pytest tests/test_leave_ledger.py -v
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, update
+
+from app.api.hr.helpers import get_leave_balance
+from app.api.hr.leave import (
+    LeaveApplicationCreate,
+    approve_leave_application,
+    cancel_leave_application,
+    create_leave_application,
+)
+from app.models.accounting_ext import AuditLog
+from app.models.hr_leave import (
+    Holiday,
+    HolidayList,
+    LeaveAllocation,
+    LeaveAllocationStatus,
+    LeaveApplication,
+    LeaveApplicationStatus,
+    LeaveBalance,
+    LeaveLedgerEntry,
+    LeaveLedgerEntryType,
+    LeavePolicy,
+    LeavePolicyDetail,
+    LeaveType,
+)
+from app.services.holiday_calendar import (
+    count_leave_days,
+    get_holiday_calendar,
+    invalidate_holiday_calendars,
+)
+from app.services.hr_bulk_service import HRBulkService
+from app.services.leave_ledger import expected_leave_balances, reconcile_leave_balances
+
+PERIODS = [(date(2025, 1, 1), date(2025, 12, 31)), (date(2026, 1, 1), date(2026, 12, 31))]
+STATUSES = [LeaveAllocationStatus.SUBMITTED] * 3 + [LeaveAllocationStatus.DRAFT, LeaveAllocationStatus.CANCELLED]
+
+
+DB_MODELS = (
+    LeaveType, LeavePolicy, LeavePolicyDetail, LeaveAllocation, LeaveApplication,
+    LeaveLedgerEntry, LeaveBalance, HolidayList, Holiday, AuditLog,
+)
+
+
+@pytest.fixture(autouse=True)
+def holiday_calendars():
+    invalidate_holiday_calendars()
+    yield
+    invalidate_holiday_calendars()
+
+
+def _stored_balances(db):
+    return {
+        (b.employee_id, b.leave_type_id, b.from_date, b.to_date): (b.balance, b.allocated)
+        for b in db.query(LeaveBalance)
+        if b.balance or b.allocated
+    }
+
+
+def _expected_balances(db):
+    return {period: values for period, values in expected_leave_balances(db).items() if any(values)}
+
+
+def _ledger_sums(db):
+    rows = db.query(LeaveLedgerEntry.allocation_id, func.sum(LeaveLedgerEntry.days)).group_by(
+        LeaveLedgerEntry.allocation_id
+    )
+    return {allocation_id: Decimal(days) for allocation_id, days in rows if days}
+
+
+def _active_unused(db):
+    return {
+        a.id: a.unused_leaves
+        for a in db.query(LeaveAllocation)
+        if a.status != LeaveAllocationStatus.CANCELLED and a.unused_leaves
+    }
+
+
+def _assert_consistent(db):
+    assert _stored_balances(db) == _expected_balances(db)
+    assert _ledger_sums(db) == _active_unused(db)
+
+
+def _old_leave_balance(db, employee_id, leave_type_id, as_of_date):
+    """Balance lookup as done before balances were maintained: sum covering allocations."""
+    allocations = db.query(LeaveAllocation).filter(
+        LeaveAllocation.employee_id == employee_id,
+        LeaveAllocation.leave_type_id == leave_type_id,
+        LeaveAllocation.from_date <= as_of_date,
+        LeaveAllocation.to_date >= as_of_date,
+        LeaveAllocation.status.in_([LeaveAllocationStatus.SUBMITTED, LeaveAllocationStatus.DRAFT]),
+    ).all()
+    return sum([a.unused_leaves or Decimal("0") for a in allocations], Decimal("0"))
+
+
+def _seed(db, rng, employees=8):
+    db.add_all([LeaveType(id=1, leave_type_name="Annual"), LeaveType(id=2, leave_type_name="Sick")])
+    policy = LeavePolicy(id=1, leave_policy_name="Standard")
+    policy.details = [
+        LeavePolicyDetail(leave_type="Annual", leave_type_id=1, annual_allocation=Decimal("12")),
+        LeavePolicyDetail(leave_type="Sick", leave_type_id=2, annual_allocation=Decimal("4.5")),
+    ]
+    db.add(policy)
+    for emp in range(1, employees + 1):
+        for leave_type_id in (1, 2):
+            if rng.random() < 0.7:
+                from_date, to_date = rng.choice(PERIODS)
+                allocated = Decimal(rng.choice([5, 10, 20]))
+                db.add(LeaveAllocation(
+                    employee=f"EMP-{emp}", employee_id=emp, leave_type="Annual" if leave_type_id == 1 else "Sick",
+                    leave_type_id=leave_type_id, from_date=from_date, to_date=to_date, status=rng.choice(STATUSES),
+                    total_leaves_allocated=allocated, unused_leaves=allocated - rng.choice([0, 2]),
+                ))
+        if rng.random() < 0.3:
+            db.flush()
+    for app_id in range(1, employees * 4 + 1):
+        emp = rng.randint(1, employees)
+        from_date = rng.choice(PERIODS)[0] + timedelta(days=rng.randint(0, 300))
+        db.add(LeaveApplication(
+            id=app_id, employee=f"EMP-{emp}", employee_id=emp, leave_type="Annual", leave_type_id=rng.choice([1, 2]),
+            from_date=from_date, to_date=from_date + timedelta(days=2), posting_date=from_date,
+            total_leave_days=Decimal(rng.choice(["1", "2", "0.5", "3"])), status=LeaveApplicationStatus.OPEN,
+        ))
+    db.commit()
+
+
+def _random_step(db, rng, employees):
+    op = rng.choice(["approve", "cancel", "bulk_approve", "edit", "status", "move", "delete", "bulk_create"])
+    allocations = db.query(LeaveAllocation).order_by(LeaveAllocation.id).all()
+    app_ids = [a.id for a in db.query(LeaveApplication.id)]
+
+    if op == "approve":
+        try:
+            approve_leave_application(rng.choice(app_ids), db=db, current_user=None)
+        except HTTPException:
+            db.rollback()
+    elif op == "cancel":
+        try:
+            cancel_leave_application(rng.choice(app_ids), db=db, current_user=None)
+        except HTTPException:
+            db.rollback()
+    elif op == "bulk_approve":
+        HRBulkService(db, chunk_size=3).approve_leave_applications(rng.sample(app_ids, 6), user_id=None)
+        db.commit()
+    elif op == "edit" and allocations:
+        allocation = rng.choice(allocations)
+        allocation.unused_leaves = Decimal(rng.randint(0, 15))
+        if rng.random() < 0.5:
+            allocation.total_leaves_allocated = Decimal(rng.randint(5, 25))
+        db.commit()
+    elif op == "status" and allocations:
+        rng.choice(allocations).status = rng.choice(list(LeaveAllocationStatus))
+        db.commit()
+    elif op == "move" and allocations:
+        allocation = rng.choice(allocations)
+        allocation.from_date, allocation.to_date = rng.choice(PERIODS)
+        if rng.random() < 0.5:
+            allocation.employee_id = rng.randint(1, employees)
+        db.commit()
+    elif op == "delete" and allocations:
+        db.delete(rng.choice(allocations))
+        db.commit()
+    elif op == "bulk_create":
+        from_date, to_date = rng.choice(PERIODS)
+        HRBulkService(db).create_leave_allocations(
+            rng.sample(range(1, employees + 1), 3), db.get(LeavePolicy, 1), from_date, to_date, user_id=None,
+        )
+        db.commit()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_balances_and_ledger_follow_allocation_changes(db, seed):
+    rng = random.Random(seed)
+    _seed(db, rng)
+    _assert_consistent(db)
+
+    for _ in range(80):
+        _random_step(db, rng, employees=8)
+        _assert_consistent(db)
+
+    for emp in range(1, 9):
+        for leave_type_id in (1, 2):
+            for day in (date(2025, 1, 1), date(2025, 6, 30), date(2026, 12, 31), date(2027, 1, 1)):
+                assert get_leave_balance(db, emp, leave_type_id, day) == _old_leave_balance(db, emp, leave_type_id, day)
+
+    assert reconcile_leave_balances(db) == {
+        "periods": len(expected_leave_balances(db)),
+        "balances_updated": 0,
+        "balances_inserted": 0,
+        "ledger_adjustments": 0,
+    }
+
+
+def test_ledger_records_consumption_and_reversal(db):
+    db.add(LeaveType(id=1, leave_type_name="Annual"))
+    db.add(LeaveAllocation(
+        id=1, employee="EMP-1", employee_id=1, leave_type="Annual", leave_type_id=1,
+        from_date=PERIODS[0][0], to_date=PERIODS[0][1], status=LeaveAllocationStatus.SUBMITTED,
+        total_leaves_allocated=Decimal("10"), unused_leaves=Decimal("10"),
+    ))
+    db.add(LeaveApplication(
+        id=7, employee="EMP-1", employee_id=1, leave_type="Annual", leave_type_id=1,
+        from_date=date(2025, 3, 3), to_date=date(2025, 3, 5), posting_date=date(2025, 3, 1),
+        total_leave_days=Decimal("3"), status=LeaveApplicationStatus.OPEN,
+    ))
+    db.commit()
+
+    approve_leave_application(7, db=db, current_user=None)
+    cancel_leave_application(7, db=db, current_user=None)
+
+    entries = [(e.entry_type, e.days, e.application_id) for e in db.query(LeaveLedgerEntry).order_by(LeaveLedgerEntry.id)]
+    assert entries == [
+        (LeaveLedgerEntryType.ALLOCATION, Decimal("10"), None),
+        (LeaveLedgerEntryType.CONSUMPTION, Decimal("-3"), 7),
+        (LeaveLedgerEntryType.REVERSAL, Decimal("3"), 7),
+    ]
+    assert get_leave_balance(db, 1, 1, date(2025, 3, 3)) == Decimal("10")
+
+
+def test_changes_to_expired_allocations_replace_the_counted_state(db):
+    db.add(LeaveType(id=1, leave_type_name="Annual"))
+    allocation = LeaveAllocation(
+        employee="EMP-1", employee_id=1, leave_type="Annual", leave_type_id=1,
+        from_date=PERIODS[0][0], to_date=PERIODS[0][1], status=LeaveAllocationStatus.SUBMITTED,
+        total_leaves_allocated=Decimal("10"), unused_leaves=Decimal("10"),
+    )
+    db.add(allocation)
+    db.commit()
+
+    # commit() expired the attributes; set them without reading them first
+    allocation.unused_leaves = Decimal("8")
+    db.commit()
+    assert _stored_balances(db) == {(1, 1, *PERIODS[0]): (Decimal("8"), Decimal("10"))}
+
+    allocation.from_date, allocation.to_date = PERIODS[1]
+    db.commit()
+    assert _stored_balances(db) == {(1, 1, *PERIODS[1]): (Decimal("8"), Decimal("10"))}
+
+    allocation.status = LeaveAllocationStatus.CANCELLED
+    db.commit()
+    assert _stored_balances(db) == {}
+    _assert_consistent(db)
+
+
+def test_reconcile_corrects_writes_that_bypass_the_ledger(db):
+    _seed(db, random.Random(11))
+    allocation_id = db.query(func.min(LeaveAllocation.id)).filter(
+        LeaveAllocation.status == LeaveAllocationStatus.SUBMITTED
+    ).scalar()
+    db.execute(update(LeaveAllocation).where(LeaveAllocation.id == allocation_id).values(unused_leaves=Decimal("1")))
+    db.query(LeaveBalance).filter(LeaveBalance.id == db.query(func.max(LeaveBalance.id)).scalar_subquery()).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    assert _stored_balances(db) != _expected_balances(db)
+
+    result = reconcile_leave_balances(db)
+    assert result["balances_updated"] >= 1 and result["balances_inserted"] == 1
+    assert result["ledger_adjustments"] == 1
+    _assert_consistent(db)
+    assert reconcile_leave_balances(db) == {
+        **result, "balances_updated": 0, "balances_inserted": 0, "ledger_adjustments": 0,
+    }
+
+
+def _naive_working_days(holiday_lists, start, end):
+    """Walk each day against each holiday row and weekly off."""
+    days = 0
+    day = start
+    while day <= end:
+        off = False
+        for holiday_list, holidays in holiday_lists:
+            if any(h == day for h in holidays):
+                off = True
+            if (
+                holiday_list.weekly_off
+                and holiday_list.from_date <= day <= holiday_list.to_date
+                and day.strftime("%A").lower() == holiday_list.weekly_off.lower()
+            ):
+                off = True
+        days += 0 if off else 1
+        day += timedelta(days=1)
+    return days
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_compiled_calendar_matches_day_walk(db, seed):
+    rng = random.Random(seed)
+    lists = []
+    for list_id, company in enumerate(["Acme", "Acme", None, "Other"], start=1):
+        holiday_list = HolidayList(
+            id=list_id, holiday_list_name=f"List {list_id}", company=company,
+            from_date=date(2025, 1, 1), to_date=date(2025, 12, 31),
+            weekly_off=rng.choice([None, "Sunday", "Saturday", "Friday"]),
+        )
+        holidays = sorted({date(2025, 1, 1) + timedelta(days=rng.randint(0, 364)) for _ in range(12)})
+        db.add(holiday_list)
+        db.add_all(Holiday(holiday_list_id=list_id, holiday_date=h) for h in holidays)
+        lists.append((company, holiday_list, holidays))
+    db.commit()
+
+    for company in ("Acme", "Other", None):
+        applicable = [(hl, hs) for c, hl, hs in lists if company is None or c in (company, None)]
+        calendar = get_holiday_calendar(db, company)
+        for _ in range(40):
+            start = date(2024, 12, 1) + timedelta(days=rng.randint(0, 400))
+            end = start + timedelta(days=rng.randint(0, 40))
+            assert calendar.working_days(start, end) == _naive_working_days(applicable, start, end)
+        assert count_leave_days(db, start, end, company, include_holidays=True) == (end - start).days + 1
+
+
+def test_calendar_recompiles_after_holiday_changes(db):
+    db.add(HolidayList(id=1, holiday_list_name="2025", from_date=date(2025, 1, 1), to_date=date(2025, 12, 31)))
+    db.commit()
+    week = (date(2025, 6, 2), date(2025, 6, 6))
+    assert count_leave_days(db, *week) == Decimal("5")
+
+    db.add(Holiday(holiday_list_id=1, holiday_date=date(2025, 6, 4)))
+    db.commit()
+    assert count_leave_days(db, *week) == Decimal("4")
+    assert count_leave_days(db, *week, half_day=True) == Decimal("3.5")
+    assert get_holiday_calendar(db) is get_holiday_calendar(db)
+
+
+def test_leave_application_days_default_to_working_days(db):
+    db.add_all([LeaveType(id=1, leave_type_name="Annual"), LeaveType(id=2, leave_type_name="Maternity", include_holiday=True)])
+    db.add(HolidayList(
+        id=1, holiday_list_name="2025", company="Acme", weekly_off="Sunday",
+        from_date=date(2025, 1, 1), to_date=date(2025, 12, 31),
+    ))
+    db.add(Holiday(holiday_list_id=1, holiday_date=date(2025, 6, 4)))
+    db.commit()
+
+    def create(**fields):
+        payload = LeaveApplicationCreate(
+            employee="EMP-1", leave_type="Annual", from_date=date(2025, 6, 2), to_date=date(2025, 6, 8),
+            posting_date=date(2025, 6, 1), company="Acme", **fields,
+        )
+        return create_leave_application(payload, db=db, current_user=None)["total_leave_days"]
+
+    assert create() == 5.0  # Sunday and the 4th are off
+    assert create(leave_type_id=2) == 7.0
+    assert create(total_leave_days=Decimal("2")) == 2.0
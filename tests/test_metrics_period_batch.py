@@ -0,0 +1,231 @@
+"""Tests for period-level (batched) scorecard computation.
+
+Run with: poetry run pytest tests/test_metrics_period_batch.py -v
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models.crm import Activity, ActivityStatus, ActivityType, Opportunity, OpportunityStatus
+from app.models.employee import Employee, EmployeeHierarchy
+from app.models.field_service import ServiceOrder, ServiceOrderStatus, ServiceOrderType
+from app.models.performance import (
+    EmployeeScorecardInstance,
+    EvaluationPeriod,
+    EvaluationPeriodType,
+    KPIAggregation,
+    KPIBinding,
+    KPIDataSource,
+    KPIDefinition,
+    KPIResult,
+    KRADefinition,
+    KRAKPIMap,
+    KRAResult,
+    ScorecardInstanceStatus,
+    ScorecardTemplate,
+    ScorecardTemplateItem,
+    ScoringMethod,
+)
+from app.models.project import Project
+from app.models.task import Task
+from app.models.ticket import AgentWorkload, Ticket
+from app.services.metrics_computation_service import MetricsComputationService
+
+PERIOD_START, PERIOD_END = date(2025, 1, 1), date(2025, 3, 31)
+
+# (code, source, aggregation, scoring, target, query_config, higher_is_better)
+KPIS = [
+    ("TKT_COUNT", KPIDataSource.TICKETING, KPIAggregation.COUNT, ScoringMethod.LINEAR, 4, None, True),
+    ("TKT_SLA", KPIDataSource.TICKETING, KPIAggregation.PERCENT, ScoringMethod.BINARY, 50,
+     {"numerator": {"sla_met": True}}, True),
+    ("FS_FTF", KPIDataSource.FIELD_SERVICE, KPIAggregation.PERCENT, ScoringMethod.LINEAR, 80,
+     {"numerator": {"first_time_fix": True}, "filter": {"order_type": "REPAIR"}}, True),
+    ("FS_RATING", KPIDataSource.FIELD_SERVICE, KPIAggregation.AVG, ScoringMethod.BAND, 4,
+     {"field": "customer_rating"}, True),
+    ("OPP_WON_VALUE", KPIDataSource.CRM, KPIAggregation.SUM, ScoringMethod.LINEAR, 100000,
+     {"filter": {"status": "Won"}}, True),
+    ("OPP_WIN_RATE", KPIDataSource.CRM, KPIAggregation.PERCENT, ScoringMethod.THRESHOLD, 50,
+     {"numerator": {"status": "won"}, "denominator": {"status_in": ["won", "lost"]}}, True),
+    ("OPP_CYCLE", KPIDataSource.CRM, KPIAggregation.AVG, ScoringMethod.LINEAR, 30,
+     {"field": "sales_cycle_days"}, False),
+    ("OPP_TEAM", KPIDataSource.CRM, KPIAggregation.COUNT, ScoringMethod.LINEAR, 40,
+     {"employee_field": "territory"}, True),
+    ("ACT_DONE", KPIDataSource.CRM, KPIAggregation.COUNT, ScoringMethod.LINEAR, 3,
+     {"table": "activities", "employee_field": "assigned_to_id", "filter": {"status": "completed"}}, True),
+    ("ACT_MINUTES", KPIDataSource.CRM, KPIAggregation.AVG, ScoringMethod.LINEAR, 45,
+     {"table": "activities", "employee_field": "assigned_to_id"}, True),
+    ("ACT_PCT", KPIDataSource.CRM, KPIAggregation.PERCENT, ScoringMethod.LINEAR, 50,
+     {"table": "activities"}, True),
+    ("PRJ_ON_TIME", KPIDataSource.PROJECT, KPIAggregation.PERCENT, ScoringMethod.LINEAR, 90,
+     {"numerator": {"on_time": True, "within_budget": True}}, True),
+    ("TASK_VARIANCE", KPIDataSource.PROJECT, KPIAggregation.AVG, ScoringMethod.LINEAR, 20,
+     {"table": "tasks", "employee_field": "assigned_to", "field": "time_variance_percent"}, False),
+    ("TASK_ON_TIME", KPIDataSource.PROJECT, KPIAggregation.PERCENT, ScoringMethod.LINEAR, 75,
+     {"table": "tasks", "employee_field": "assigned_to", "numerator": {"on_time": True},
+      "filter": {"status": "completed"}}, True),
+    ("TASK_ALL", KPIDataSource.PROJECT, KPIAggregation.COUNT, ScoringMethod.LINEAR, 100,
+     {"table": "tasks"}, True),
+    ("MANUAL", KPIDataSource.MANUAL, KPIAggregation.COUNT, ScoringMethod.LINEAR, 10, None, True),
+]
+DB_MODELS = (
+    EvaluationPeriod, KRADefinition, KPIDefinition, KRAKPIMap, ScorecardTemplate, ScorecardTemplateItem,
+    KPIBinding, EmployeeScorecardInstance, KPIResult, KRAResult,
+    Employee, EmployeeHierarchy, Ticket, AgentWorkload, ServiceOrder, Opportunity, Activity, Project, Task,
+)
+
+
+def _when(rng):
+    """Creation time inside the period most of the time."""
+    days = rng.randint(-20, 110)
+    return datetime.combine(PERIOD_START, datetime.min.time()) + timedelta(days=days, hours=rng.randint(0, 23))
+
+
+def _seed(db, seed, employees):
+    rng = random.Random(seed)
+    db.add(EvaluationPeriod(
+        id=1, code="Q1", name="Q1 2025", period_type=EvaluationPeriodType.QUARTERLY,
+        start_date=PERIOD_START, end_date=PERIOD_END,
+    ))
+    kpis = [
+        KPIDefinition(
+            id=i, code=code, name=code, data_source=source, aggregation=aggregation, scoring_method=scoring,
+            target_value=Decimal(target), query_config=config, higher_is_better=higher,
+            threshold_config={"bands": [{"min": 0, "max": 40, "score": 30}, {"min": 40, "max": 100, "score": 90}]},
+        )
+        for i, (code, source, aggregation, scoring, target, config, higher) in enumerate(KPIS, start=1)
+    ]
+    db.add_all(kpis)
+    for kra_id in (1, 2, 3):
+        db.add(KRADefinition(id=kra_id, code=f"KRA{kra_id}", name=f"KRA {kra_id}"))
+    for i, kpi in enumerate(kpis):
+        db.add(KRAKPIMap(kra_id=i % 3 + 1, kpi_id=kpi.id, weightage=Decimal(rng.choice([10, 25, 40]))))
+    db.add_all([
+        ScorecardTemplate(id=1, code="SUPPORT", name="Support"),
+        ScorecardTemplate(id=2, code="SALES", name="Sales"),
+        ScorecardTemplateItem(template_id=1, kra_id=1, weightage=Decimal("60")),
+        ScorecardTemplateItem(template_id=1, kra_id=3, weightage=Decimal("40")),
+        ScorecardTemplateItem(template_id=2, kra_id=2, weightage=Decimal("70")),
+        ScorecardTemplateItem(template_id=2, kra_id=3, weightage=Decimal("30")),
+        ScorecardTemplateItem(template_id=2, kra_id=99, weightage=Decimal("10")),
+    ])
+
+    for emp in range(1, employees + 1):
+        # A few employees share an email; some have none
+        email = rng.choice([f"emp{emp}@example.com", f"emp{emp}@example.com", "shared@example.com", None])
+        db.add(Employee(id=emp, name=f"Employee {emp}", email=email))
+        status = rng.choice([ScorecardInstanceStatus.PENDING] * 6 + [ScorecardInstanceStatus.COMPUTED])
+        db.add(EmployeeScorecardInstance(
+            employee_id=emp, evaluation_period_id=1, template_id=rng.choice([1, 1, 2, 2, 3]), status=status,
+        ))
+        for kpi in rng.sample(kpis, 3):
+            db.add(KPIBinding(
+                kpi_id=kpi.id, employee_id=emp, target_override=Decimal(rng.choice([0, 2, 60, 5000])),
+                effective_from=rng.choice([None, date(2024, 1, 1), date(2025, 2, 1)]),
+                effective_to=rng.choice([None, date(2025, 12, 31), date(2025, 2, 28)]),
+            ))
+
+    def someone():
+        return rng.choice(list(range(1, employees + 1)) + [None, employees + 50])
+
+    for i in range(employees * 6):
+        resolution_by = _when(rng)
+        db.add(Ticket(
+            created_at=_when(rng), assigned_employee_id=someone(), resolution_by=resolution_by,
+            resolution_date=rng.choice([None, resolution_by - timedelta(hours=2), resolution_by + timedelta(days=1)]),
+        ))
+        db.add(ServiceOrder(
+            order_number=f"SO-{i}", order_type=rng.choice([ServiceOrderType.REPAIR, ServiceOrderType.INSTALLATION]),
+            customer_id=1, service_address="1 Main St", scheduled_date=PERIOD_START, title="Visit",
+            created_at=_when(rng), assigned_technician_id=someone(),
+            status=rng.choice([ServiceOrderStatus.COMPLETED, ServiceOrderStatus.SCHEDULED]),
+            customer_rating=rng.choice([None, 1, 3, 5]),
+        ))
+        created = _when(rng)
+        db.add(Opportunity(
+            name=f"Deal {i}", created_at=created, owner_id=someone(),
+            status=rng.choice(list(OpportunityStatus)), deal_value=Decimal(rng.randint(0, 90000)),
+            actual_close_date=rng.choice([None, (created + timedelta(days=rng.randint(0, 90))).date()]),
+        ))
+        db.add(Activity(
+            activity_type=ActivityType.CALL, subject="Call", created_at=_when(rng), assigned_to_id=someone(),
+            status=rng.choice(list(ActivityStatus)), duration_minutes=rng.choice([None, 15, 50]),
+        ))
+        expected_end = _when(rng)
+        db.add(Project(
+            project_name=f"Project {i}", created_at=_when(rng), project_manager_id=someone(),
+            is_deleted=rng.random() < 0.1, expected_end_date=expected_end,
+            actual_end_date=rng.choice([None, expected_end - timedelta(days=3), expected_end + timedelta(days=3)]),
+            estimated_costing=Decimal(1000), total_costing_amount=Decimal(rng.choice([500, 1500])),
+        ))
+        exp_end = _when(rng).date()
+        db.add(Task(
+            id=i + 1, subject=f"Task {i}", created_at=_when(rng),
+            assigned_to=rng.choice([f"emp{rng.randint(1, employees)}@example.com", "shared@example.com", None]),
+            status=rng.choice(["COMPLETED", "OPEN"]), exp_end_date=exp_end,
+            completed_on=rng.choice([None, exp_end - timedelta(days=1), exp_end + timedelta(days=1)]),
+            expected_time=Decimal(rng.choice([0, 4, 8])), actual_time=Decimal(rng.choice([2, 5, 9])) / 2,
+        ))
+    db.commit()
+
+
+def _outcome(db):
+    return (
+        [(s.id, s.status, s.total_weighted_score, s.final_rating)
+         for s in db.query(EmployeeScorecardInstance).order_by(EmployeeScorecardInstance.id)],
+        sorted(
+            (r.scorecard_instance_id, r.kra_id, r.kpi_id, r.raw_value, r.target_value, r.computed_score,
+             r.weightage_in_kra, r.weighted_score)
+            for r in db.query(KPIResult)
+        ),
+        sorted(
+            (r.scorecard_instance_id, r.kra_id, r.computed_score, r.weighted_score)
+            for r in db.query(KRAResult)
+        ),
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_batched_period_matches_per_scorecard_computation(db, reseed, seed):
+    outcomes = []
+    for batched in (False, True):
+        reseed(_seed, seed, employees=30)
+        with patch.object(settings, "scorecard_batch_size", 7):
+            result = MetricsComputationService(db).compute_period(1, batched=batched)
+        outcomes.append((result, _outcome(db)))
+
+    (reference, expected), (result, actual) = outcomes
+    assert result == reference
+    assert result["failed"] == len(result["errors"]) > 0  # scorecards on the missing template
+    assert actual == expected
+    assert any(raw is not None and raw % 1 for _, _, _, raw, *_ in actual[1])
+
+
+def test_recomputing_a_period_replaces_results(db):
+    _seed(db, 0, employees=10)
+    service = MetricsComputationService(db)
+    outcomes = []
+    for _ in range(2):
+        db.query(EmployeeScorecardInstance).update({"status": ScorecardInstanceStatus.PENDING})
+        db.commit()
+        service.compute_period(1)
+        outcomes.append(_outcome(db))
+    assert outcomes[0] == outcomes[1]
+    assert outcomes[0][1]
+
+
+def test_period_queries_do_not_grow_with_employees(db, reseed, statements):
+    counts = []
+    for employees in (10, 60):
+        reseed(_seed, 1, employees)
+        statements.clear()
+        result = MetricsComputationService(db).compute_period(1)
+        assert result["computed"] > 0
+        counts.append(sum(1 for s in statements if s.lstrip().upper().startswith("SELECT")))
+    # Period and scorecard lookups, definitions, bindings, employee emails
+    # and one grouped query per KPI (MANUAL needs none)
+    assert counts[0] == counts[1] <= 3 + 5 + 2 + len(KPIS)
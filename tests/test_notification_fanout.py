@@ -0,0 +1,97 @@
+"""Tests for batched in-app and email notification fan-out.
+
+Run with: poetry run pytest tests/test_notification_fanout.py -v
+"""
+
+from app.models.auth import User
+from app.models.notification import (
+    EmailQueue,
+    Notification,
+    NotificationEventType,
+    NotificationPreference,
+    WebhookConfig,
+)
+from app.services.notification_service import NotificationService
+
+DB_MODELS = (User, NotificationPreference, Notification, EmailQueue, WebhookConfig)
+
+
+def _users(db, count, start=0):
+    users = [
+        User(external_id=f"ext-{i}", email=f"user{i}@example.com", name=f"User {i}")
+        for i in range(start, start + count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def _emit(db, user_ids, event_type=NotificationEventType.APPROVAL_REQUESTED):
+    return NotificationService(db).emit_event(
+        event_type,
+        {"document_type": "invoice", "document_id": 7, "amount": 1500},
+        entity_type="approval",
+        entity_id=7,
+        user_ids=user_ids,
+    )
+
+
+def test_fanout_honours_preferences_and_defaults(db):
+    user_ids = _users(db, 5)
+    db.add_all([
+        NotificationPreference(
+            user_id=user_ids[0], event_type=NotificationEventType.APPROVAL_REQUESTED,
+            in_app_enabled=False, email_enabled=True,
+        ),
+        NotificationPreference(
+            user_id=user_ids[1], event_type=NotificationEventType.APPROVAL_REQUESTED,
+            in_app_enabled=True, email_enabled=False,
+        ),
+        # A preference for another event does not apply
+        NotificationPreference(
+            user_id=user_ids[2], event_type=NotificationEventType.INVOICE_CREATED,
+            in_app_enabled=False, email_enabled=False,
+        ),
+    ])
+    db.commit()
+
+    # Duplicate and unknown recipients are tolerated
+    results = _emit(db, user_ids + [user_ids[3], 9999])
+    assert results["errors"] == []
+    assert results["notifications_created"] == 5
+    assert results["emails_queued"] == 4
+
+    notified = {n.user_id for n in db.query(Notification).all()}
+    assert notified == set(user_ids[1:]) | {9999}
+    notification = db.query(Notification).filter_by(user_id=user_ids[2]).one()
+    assert notification.action_url == "/accounting/approvals/7"
+    assert notification.extra_data["amount"] == 1500
+
+    emails = db.query(EmailQueue).all()
+    assert {e.to_email for e in emails} == {f"user{i}@example.com" for i in (0, 2, 3, 4)}
+    assert len({(e.subject, e.body_html) for e in emails}) == 1
+
+
+def test_email_defaults_off_for_routine_events(db):
+    user_ids = _users(db, 3)
+    db.add(NotificationPreference(
+        user_id=user_ids[0], event_type=NotificationEventType.INVOICE_CREATED, email_enabled=True,
+    ))
+    db.commit()
+
+    results = _emit(db, user_ids, NotificationEventType.INVOICE_CREATED)
+    assert results["notifications_created"] == 3
+    assert results["emails_queued"] == 1
+
+
+def test_query_count_does_not_grow_with_recipients(db, statements):
+    small = _users(db, 3)
+    statements.clear()
+    _emit(db, small)
+    small_count = len(statements)
+
+    large = _users(db, 200, start=3)
+    statements.clear()
+    _emit(db, large)
+    assert len(statements) == small_count
+    assert db.query(Notification).count() == 203
@@ -20,8 +20,10 @@ from app.models.payroll_config import (
     RuleApplicability,
 )
 from app.services.payroll_engine import (
+    CompiledDeductionRule,
     DeductionCalculator,
     PayrollBuilder,
+    PayrollRuleSet,
     DeductionResult,
     PayrollDeductionsResult,
 )
@@ -134,6 +136,19 @@ def mock_tax_bands():
     return bands
 
 
+def _compiled(rule, bands=()):
+    """Compile a mock rule (and its bands) the way the rule registry does."""
+    rule.effective_from = date(2024, 1, 1)
+    rule.effective_to = None
+    return CompiledDeductionRule.from_model(rule, bands)
+
+
+def _patch_rules(*rules):
+    """Serve the given compiled rules from the payroll rule registry."""
+    rule_set = PayrollRuleSet(region_code="NG", version=(), region_id=1, rules=tuple(rules))
+    return patch("app.services.payroll_engine.load_payroll_rules", return_value=rule_set)
+
+
 @pytest.fixture
 def salary_components():
     """Standard salary components for testing."""
@@ -241,7 +256,7 @@ class TestDeductionCalculator:
         """Test basic PROGRESSIVE (tax band) calculation."""
         mock_db = MagicMock()
         calculator = DeductionCalculator(mock_db, "NG")
-        calculator._bands_cache[3] = mock_tax_bands
+        paye = _compiled(mock_progressive_rule, mock_tax_bands)
 
         # Monthly income of 200000 -> annual 2400000
         # Band 1: 300000 * 7% = 21000
@@ -252,7 +267,7 @@ class TestDeductionCalculator:
         # Total annual: 392000
         # Monthly: 392000 / 12 = 32666.67
 
-        result = calculator.calculate_progressive(mock_progressive_rule, Decimal("200000"))
+        result = calculator.calculate_progressive(paye, Decimal("200000"))
 
         assert result == Decimal("32666.67")
 
@@ -260,13 +275,13 @@ class TestDeductionCalculator:
         """Test PROGRESSIVE calculation for low income (single band)."""
         mock_db = MagicMock()
         calculator = DeductionCalculator(mock_db, "NG")
-        calculator._bands_cache[3] = mock_tax_bands
+        paye = _compiled(mock_progressive_rule, mock_tax_bands)
 
         # Monthly income of 20000 -> annual 240000
         # Only Band 1 applies: 240000 * 7% = 16800
         # Monthly: 16800 / 12 = 1400
 
-        result = calculator.calculate_progressive(mock_progressive_rule, Decimal("20000"))
+        result = calculator.calculate_progressive(paye, Decimal("20000"))
 
         assert result == Decimal("1400.00")
 
@@ -274,7 +289,7 @@ class TestDeductionCalculator:
         """Test PROGRESSIVE calculation for high income (all bands)."""
         mock_db = MagicMock()
         calculator = DeductionCalculator(mock_db, "NG")
-        calculator._bands_cache[3] = mock_tax_bands
+        paye = _compiled(mock_progressive_rule, mock_tax_bands)
 
         # Monthly income of 400000 -> annual 4800000
         # Band 1: 300000 * 7% = 21000
@@ -286,7 +301,7 @@ class TestDeductionCalculator:
         # Total annual: 944000
         # Monthly: 944000 / 12 = 78666.67
 
-        result = calculator.calculate_progressive(mock_progressive_rule, Decimal("400000"))
+        result = calculator.calculate_progressive(paye, Decimal("400000"))
 
         assert result == Decimal("78666.67")
 
@@ -433,30 +448,17 @@ class TestPayrollEngineIntegration:
         mock_pension_er.cap_amount = None
         mock_pension_er.floor_amount = None
 
-        # Setup active rules query
-        mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
-            mock_progressive_rule,
-            mock_percentage_rule,
-            mock_pension_er,
-        ]
-
-        calculator = DeductionCalculator(mock_db, "NG")
-        calculator._region = mock_region
-        calculator._rules_cache = {
-            f"PAYE:{date.today()}": mock_progressive_rule,
-            f"PENSION_EE:{date.today()}": mock_percentage_rule,
-            f"PENSION_ER:{date.today()}": mock_pension_er,
-        }
-        calculator._bands_cache[3] = mock_tax_bands
-
-        builder = PayrollBuilder(mock_db, "NG")
-        builder.calculator = calculator
-
-        result = builder.calculate_deductions(
-            salary_components=salary_components,
-            employment_type="PERMANENT",
-            months_of_service=12,
+        rules = _patch_rules(
+            _compiled(mock_progressive_rule, mock_tax_bands),
+            _compiled(mock_percentage_rule),
+            _compiled(mock_pension_er),
         )
+        with rules:
+            result = PayrollBuilder(mock_db, "NG").calculate_deductions(
+                salary_components=salary_components,
+                employment_type="PERMANENT",
+                months_of_service=12,
+            )
 
         # Verify results
         assert result.region_code == "NG"
@@ -499,16 +501,9 @@ class TestPayrollEngineIntegration:
         mock_nhis.floor_amount = None
 
         mock_db.query.return_value.filter.return_value.first.return_value = mock_region
-        mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [mock_nhis]
-
-        calculator = DeductionCalculator(mock_db, "NG")
-        calculator._region = mock_region
-        calculator._rules_cache = {f"NHIS:{date.today()}": mock_nhis}
 
-        builder = PayrollBuilder(mock_db, "NG")
-        builder.calculator = calculator
-
-        result = builder.calculate_deductions(salary_components)
+        with _patch_rules(_compiled(mock_nhis)):
+            result = PayrollBuilder(mock_db, "NG").calculate_deductions(salary_components)
 
         # Total NHIS = 15% of basic (300000) = 45000
         # Employee: 45000 * 0.3333 = 14998.50
@@ -570,16 +565,9 @@ class TestEdgeCases:
         mock_huge_rule.floor_amount = None
 
         mock_db.query.return_value.filter.return_value.first.return_value = mock_region
-        mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = [mock_huge_rule]
 
-        calculator = DeductionCalculator(mock_db, "NG")
-        calculator._region = mock_region
-        calculator._rules_cache = {f"HUGE:{date.today()}": mock_huge_rule}
-
-        builder = PayrollBuilder(mock_db, "NG")
-        builder.calculator = calculator
-
-        result = builder.calculate_deductions(salary_components)
+        with _patch_rules(_compiled(mock_huge_rule)):
+            result = PayrollBuilder(mock_db, "NG").calculate_deductions(salary_components)
 
         # Net pay can go negative in this implementation
         # Real system would need validation
@@ -589,9 +577,9 @@ class TestEdgeCases:
         """Test PROGRESSIVE calculation with zero income."""
         mock_db = MagicMock()
         calculator = DeductionCalculator(mock_db, "NG")
-        calculator._bands_cache[3] = mock_tax_bands
+        paye = _compiled(mock_progressive_rule, mock_tax_bands)
 
-        result = calculator.calculate_progressive(mock_progressive_rule, Decimal("0"))
+        result = calculator.calculate_progressive(paye, Decimal("0"))
 
         assert result == Decimal("0.00")
 
@@ -0,0 +1,169 @@
+"""Tests for the streamed salary slip and payroll register exports.
+
+Run with: poetry run pytest tests/test_payroll_export.py -v
+"""
+
+import csv
+import io
+import random
+from datetime import date, datetime
+from decimal import Decimal
+
+import openpyxl
+import pytest
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.models.accounting_ext import AuditLog
+from app.models.auth import User
+from app.models.hr_payroll import SalarySlip, SalarySlipDeduction, SalarySlipEarning, SalarySlipStatus
+from app.services.payroll_export import iter_export_rows, payroll_register_export
+
+EARNINGS = ["Basic", "Housing", "Transport"]
+DEDUCTIONS = ["PAYE", "Pension"]
+
+
+@pytest.fixture
+def slips():
+    for model in (User, SalarySlip, SalarySlipEarning, SalarySlipDeduction, AuditLog):
+        model.__table__.create(bind=engine, checkfirst=True)
+
+    def seed(count, seed=0):
+        rng = random.Random(seed)
+        db = SessionLocal()
+        for i in range(count):
+            slip = SalarySlip(
+                employee=f"EMP-{i % 9:03d}",
+                employee_id=i % 9 + 1,
+                employee_name=f"Employee {i % 9}",
+                posting_date=date(2025, 1 + i % 3, 28),
+                start_date=date(2025, 1 + i % 3, 1),
+                end_date=date(2025, 1 + i % 3, 28),
+                gross_pay=Decimal(rng.randint(1000, 9000)),
+                total_deduction=Decimal(rng.randint(0, 900)),
+                net_pay=Decimal(rng.randint(100, 8000)),
+                status=rng.choice([SalarySlipStatus.DRAFT, SalarySlipStatus.SUBMITTED]),
+                paid_at=datetime(2025, 2, 1, 9, 30) if i % 4 == 0 else None,
+                company="Dotmac" if i % 5 else "Other Co",
+            )
+            slip.earnings = [
+                SalarySlipEarning(salary_component=name, amount=Decimal(rng.randint(1, 500)), idx=idx)
+                for idx, name in enumerate(rng.sample(EARNINGS, rng.randint(0, len(EARNINGS))))
+            ]
+            slip.deductions = [
+                SalarySlipDeduction(salary_component=name, amount=Decimal(rng.randint(1, 200)), idx=idx)
+                for idx, name in enumerate(rng.sample(DEDUCTIONS, rng.randint(0, len(DEDUCTIONS))))
+            ]
+            db.add(slip)
+        db.commit()
+        db.close()
+
+    return seed
+
+
+def _expected_register(filters):
+    """Register rows built the old way: load each slip and walk its child rows."""
+    db = SessionLocal()
+    query = db.query(SalarySlip).filter(*filters).order_by(SalarySlip.employee, SalarySlip.start_date, SalarySlip.id)
+    earnings = sorted({e.salary_component for s in query for e in s.earnings})
+    deductions = sorted({d.salary_component for s in query for d in s.deductions})
+    rows = []
+    for s in query:
+        amounts = {("e", e.salary_component): float(e.amount) for e in s.earnings}
+        amounts.update({("d", d.salary_component): float(d.amount) for d in s.deductions})
+        rows.append([
+            s.employee_id, s.employee, s.employee_name, s.department, s.designation, s.start_date, s.end_date,
+            float(s.gross_pay), float(s.total_deduction), float(s.net_pay), s.status.value,
+            s.payment_reference, s.paid_at, s.company,
+        ] + [amounts.get(("e", name), 0.0) for name in earnings] + [amounts.get(("d", name), 0.0) for name in deductions])
+    db.close()
+    return earnings, deductions, rows
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_register_pivot_matches_per_slip_child_rows(slips, seed):
+    slips(60, seed=seed)
+    filters = [SalarySlip.start_date >= date(2025, 2, 1), SalarySlip.company.ilike("%dotmac%")]
+    earnings, deductions, expected = _expected_register(filters)
+
+    db = SessionLocal()
+    export = payroll_register_export(db, filters)
+    assert export.count(db) == len(expected)
+    db.close()
+
+    assert export.header[14:] == [f"Earning: {n}" for n in earnings] + [f"Deduction: {n}" for n in deductions]
+    assert list(iter_export_rows(export, batch_size=7)) == expected
+
+
+def test_register_statements_do_not_grow_with_slips(slips):
+    counts = []
+    for count in (5, 120):
+        slips(count)
+        statements = []
+
+        def record(*args):
+            statements.append(args[2])
+
+        event.listen(engine, "before_cursor_execute", record)
+        db = SessionLocal()
+        rows = list(iter_export_rows(payroll_register_export(db, [SalarySlip.start_date >= date(2025, 1, 1)])))
+        db.close()
+        event.remove(engine, "before_cursor_execute", record)
+        assert len(rows) >= count
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+
+
+def test_register_csv_endpoint(client, slips):
+    slips(30)
+    resp = client.get(
+        "/api/hr/salary-slips/register/export",
+        params={"start_date": "2025-01-01", "end_date": "2025-03-31", "status": "submitted"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    _, _, expected = _expected_register([SalarySlip.status == SalarySlipStatus.SUBMITTED])
+    assert len(rows) == len(expected)
+    assert {r["Status"] for r in rows} == {"submitted"}
+    assert "Earning: Basic" in rows[0] and "Deduction: PAYE" in rows[0]
+    assert any(r["Paid At"] == "2025-02-01T09:30:00" for r in rows)
+
+    db = SessionLocal()
+    assert db.query(AuditLog).one().remarks == f"Exported {len(rows)} salary slips"
+    db.close()
+
+
+def test_register_rejects_invalid_status(client, slips):
+    resp = client.get(
+        "/api/hr/salary-slips/register/export",
+        params={"start_date": "2025-01-01", "end_date": "2025-03-31", "status": "nope"},
+    )
+    assert resp.status_code == 400
+
+
+def test_salary_slip_export_xlsx(client, slips):
+    slips(25)
+    resp = client.get("/api/hr/salary-slips/export", params={"format": "xlsx", "company": "dotmac"})
+    assert resp.status_code == 200
+    sheet = openpyxl.load_workbook(io.BytesIO(resp.content)).active
+    rows = list(sheet.values)
+    assert rows[0][:3] == ("id", "employee", "employee_name")
+    assert len(rows) == 1 + 20
+    assert [r[3] for r in rows[1:]] == sorted((r[3] for r in rows[1:]), reverse=True)  # posting_date desc
+
+
+def test_register_parquet_round_trips(client, slips):
+    pq = pytest.importorskip("pyarrow.parquet")
+    slips(40, seed=5)
+    resp = client.get(
+        "/api/hr/salary-slips/register/export",
+        params={"start_date": "2025-01-01", "end_date": "2025-03-31", "format": "parquet"},
+    )
+    assert resp.status_code == 200
+    table = pq.read_table(io.BytesIO(resp.content))
+    _, _, expected = _expected_register([])
+    assert table.num_rows == len(expected)
+    assert str(table.schema.field("Period Start").type) == "date32[day]"
+    assert [list(r.values()) for r in table.to_pylist()] == expected
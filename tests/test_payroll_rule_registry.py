@@ -0,0 +1,208 @@
+"""Tests for the compiled payroll rule registry shared by PayrollBuilder instances.
+
+Run with: poetry run pytest tests/test_payroll_rule_registry.py -v
+"""
+
+import random
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.api.tax.helpers import PAYE_BANDS_PITA
+from app.database import engine
+from app.models.payroll_config import (
+    CalcMethod,
+    DeductionRule,
+    DeductionType,
+    PayrollRegion,
+    RuleApplicability,
+    TaxBand,
+)
+from app.services.payroll_engine import (
+    PayrollBuilder,
+    _banded_tax,
+    calculate_deductions_for_slip,
+    compile_tax_bands,
+    invalidate_payroll_rules,
+    load_payroll_rules,
+)
+
+CALC_DATE = date(2025, 6, 30)
+DB_MODELS = (PayrollRegion, DeductionRule, TaxBand)
+
+
+def _rule(region, code, calc_method, **kwargs):
+    kwargs.setdefault("deduction_type", DeductionType.LEVY)
+    kwargs.setdefault("applicability", RuleApplicability.EMPLOYEE)
+    kwargs.setdefault("effective_from", date(2024, 1, 1))
+    return DeductionRule(region=region, code=code, name=code.title(), calc_method=calc_method, **kwargs)
+
+
+def _ignore_check_constraints(dbapi_connection, connection_record, connection_proxy):
+    dbapi_connection.execute("PRAGMA ignore_check_constraints = ON")
+
+
+@pytest.fixture
+def ng_rules(db):
+    # The calc_method/split CHECK constraints compare enum values; SQLite stores names
+    event.listen(engine, "checkout", _ignore_check_constraints)
+
+    region = PayrollRegion(code="NG", name="Nigeria", currency="NGN")
+    paye = _rule(
+        region, "PAYE", CalcMethod.PROGRESSIVE, deduction_type=DeductionType.TAX, is_statutory=True,
+        base_components=["Basic", "Housing", "Transport"], display_order=1,
+    )
+    paye.tax_bands = [
+        TaxBand(lower_limit=lower, upper_limit=upper, rate=rate, band_order=i)
+        for i, (lower, upper, rate) in enumerate(PAYE_BANDS_PITA)
+    ]
+    db.add_all([
+        paye,
+        _rule(region, "PENSION_EE", CalcMethod.PERCENTAGE, deduction_type=DeductionType.PENSION,
+              rate=Decimal("0.08"), base_components=["basic", "housing", "transport"], is_statutory=True,
+              employment_types=["PERMANENT", "contract"], min_service_months=3, display_order=2),
+        _rule(region, "NHIS", CalcMethod.PERCENTAGE, applicability=RuleApplicability.BOTH,
+              rate=Decimal("0.15"), base_components=["basic"], employee_share=Decimal("0.3333"),
+              is_statutory=True, display_order=3),
+        _rule(region, "NHF", CalcMethod.PERCENTAGE, rate=Decimal("0.025"), base_components=["basic"],
+              max_base=Decimal("400000"), floor_amount=Decimal("500"), display_order=4),
+        _rule(region, "UNION", CalcMethod.FLAT, flat_amount=Decimal("2500"), display_order=5),
+        _rule(region, "OLD_LEVY", CalcMethod.FLAT, flat_amount=Decimal("900"),
+              effective_to=date(2024, 12, 31), display_order=6),
+        _rule(region, "ITF", CalcMethod.PERCENTAGE, applicability=RuleApplicability.EMPLOYER,
+              rate=Decimal("0.01"), is_active=False, display_order=7),
+    ])
+    db.commit()
+    invalidate_payroll_rules()
+    yield
+    invalidate_payroll_rules()
+    db.rollback()
+    event.remove(engine, "checkout", _ignore_check_constraints)
+    # Pooled connections keep the pragma; later tests get fresh ones
+    engine.dispose()
+
+
+def _bands(rng):
+    """Random band layouts: contiguous, with gaps, overlapping or out of order."""
+    lowers = sorted(rng.sample(range(0, 5_000_000, 50_000), rng.randint(1, 6)))
+    bands = []
+    for i, lower in enumerate(lowers):
+        last = i == len(lowers) - 1
+        upper = None if last and rng.random() < 0.7 else Decimal(lower + rng.choice([50_000, 250_000, 900_000]))
+        if not last and rng.random() < 0.6:
+            upper = Decimal(lowers[i + 1])
+        bands.append(SimpleNamespace(
+            lower_limit=Decimal(lower), upper_limit=upper, rate=Decimal(rng.randint(1, 30)) / 100,
+        ))
+    if rng.random() < 0.2:
+        rng.shuffle(bands)
+    return bands
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_bands_match_band_walk(seed):
+    rng = random.Random(seed)
+    bands = _bands(rng)
+    compiled = compile_tax_bands(bands)
+    rows = [(b.lower_limit, b.upper_limit, b.rate) for b in bands]
+    incomes = [Decimal("0"), Decimal("-100")] + [b.lower_limit for b in bands] + [
+        Decimal(rng.randint(0, 80_000_000)) / 10 for _ in range(200)
+    ]
+    for income in incomes:
+        assert repr(compiled.tax(income)) == repr(_banded_tax(rows, income))
+
+
+def test_contiguous_bands_use_cumulative_thresholds():
+    bands = [SimpleNamespace(lower_limit=l, upper_limit=u, rate=r) for l, u, r in PAYE_BANDS_PITA]
+    compiled = compile_tax_bands(bands)
+    assert compiled.cumulative == (
+        Decimal("0"), Decimal("21000.00"), Decimal("54000.00"),
+        Decimal("129000.00"), Decimal("224000.00"), Decimal("560000.00"),
+    )
+    assert compile_tax_bands([]) is None
+    gapped = bands[:2] + bands[3:]
+    assert compile_tax_bands(gapped).cumulative is not None
+    assert compile_tax_bands(list(reversed(bands))).cumulative is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_builder_matches_uncompiled_rules(db, ng_rules, seed):
+    rng = random.Random(seed)
+    builder = PayrollBuilder(db, "NG")
+    rules = db.query(DeductionRule).filter(DeductionRule.is_active == True).order_by(DeductionRule.display_order)
+
+    for _ in range(50):
+        components = {
+            "Basic Salary": Decimal(rng.randint(30_000, 2_000_000)),
+            "Housing Allowance": Decimal(rng.randint(0, 900_000)) / 2,
+            "Transport": Decimal(rng.choice([0, 25_000])),
+            "Bonus": Decimal(rng.choice([0, 100_000])),
+        }
+        employment_type = rng.choice([None, "Permanent", "Contract", "Intern"])
+        months = rng.choice([0, 2, 12])
+        result = builder.calculate_deductions(components, employment_type, months, calc_date=CALC_DATE)
+
+        expected = []
+        for rule in rules:
+            if not rule.effective_from <= CALC_DATE or (rule.effective_to and rule.effective_to < CALC_DATE):
+                continue
+            deduction = builder.calculator.calculate_rule(rule, components, employment_type, months)
+            if deduction.is_applicable and deduction.amount:
+                expected.append((deduction.rule_code, deduction.amount, deduction.calc_details))
+        actual = [(d.rule_code, d.amount, d.calc_details) for d in result.employee_deductions
+                  if d.rule_code != "NHIS"]
+        assert actual == [e for e in expected if e[0] != "NHIS"]
+        nhis = next(e for e in expected if e[0] == "NHIS")
+        nhis_ee = next(d for d in result.employee_deductions if d.rule_code == "NHIS")
+        nhis_er = next(d for d in result.employer_contributions if d.rule_code == "NHIS_ER")
+        assert nhis_ee.amount + nhis_er.amount == nhis[1]
+
+
+def test_builders_share_compiled_rules_with_one_query_per_slip(db, ng_rules, statements):
+    first = PayrollBuilder(db, "NG", cache_ttl_seconds=0)
+    second = PayrollBuilder(db, "NG", cache_ttl_seconds=0)
+    assert first.calculator.get_rule_set() is second.calculator.get_rule_set()
+    assert [r.code for r in first.calculator.get_active_rules(CALC_DATE)] == [
+        "PAYE", "PENSION_EE", "NHIS", "NHF", "UNION",
+    ]
+
+    statements.clear()
+    for i in range(10):
+        calculate_deductions_for_slip(
+            db, "NG", {"Basic Salary": Decimal(100_000 + i), "Housing": Decimal("40000")},
+            employment_type="Permanent", months_of_service=6, calc_date=CALC_DATE,
+        )
+    assert len(statements) == 10
+
+    cached = PayrollBuilder(db, "NG", cache_ttl_seconds=300)
+    for _ in range(5):
+        cached.calculate_deductions({"Basic Salary": Decimal("100000")}, calc_date=CALC_DATE)
+    assert len(statements) == 11
+
+
+def test_rule_edits_recompile_the_region(db, ng_rules):
+    rule_set = load_payroll_rules(db, "NG")
+    assert load_payroll_rules(db, "NG") is rule_set
+
+    paye = db.query(DeductionRule).filter_by(code="PAYE").one()
+    paye.tax_bands[0].rate = Decimal("0.05")
+    db.commit()
+    edited = load_payroll_rules(db, "NG")
+    assert edited is not rule_set
+    assert edited.get_rule("PAYE", CALC_DATE).bands.bands[0][2] == Decimal("0.05")
+
+    db.query(DeductionRule).filter_by(code="UNION").delete()
+    db.commit()
+    assert load_payroll_rules(db, "NG").get_rule("UNION", CALC_DATE) is None
+
+    db.query(PayrollRegion).filter_by(code="NG").one().is_active = False
+    db.commit()
+    assert len(load_payroll_rules(db, "NG")) == 0
+
+    unchanged = load_payroll_rules(db, "NG")
+    invalidate_payroll_rules("NG")
+    assert load_payroll_rules(db, "NG") is not unchanged
+
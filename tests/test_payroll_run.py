@@ -0,0 +1,219 @@
+"""Tests for chunked, resumable payroll runs.
+
+Run with: poetry run pytest tests/test_payroll_run.py -v
+"""
+
+import random
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+import app.services.payroll_run_service as payroll_run_service
+from app.api.tax.payroll_integration import calculate_slip_deductions, clear_employment_type_config_cache
+from app.feature_flags import feature_flags
+from app.models.accounting_ext import AuditLog
+from app.models.employee import Employee, EmployeeHierarchy
+from app.models.hr_payroll import (
+    PayrollEntry,
+    PayrollRun,
+    PayrollRunStatus,
+    SalarySlip,
+    SalarySlipDeduction,
+    SalarySlipEarning,
+    SalaryStructure,
+    SalaryStructureAssignment,
+    SalaryStructureDeduction,
+    SalaryStructureEarning,
+)
+from app.models.hr_settings import EmploymentTypeDeductionConfig
+from app.services.payroll_run_service import PayrollRunError, PayrollRunService
+
+PERIOD_START = date(2025, 6, 1)
+PERIOD_END = date(2025, 6, 30)
+DB_MODELS = (
+    Employee, EmployeeHierarchy, SalaryStructure, SalaryStructureEarning, SalaryStructureDeduction,
+    SalaryStructureAssignment, PayrollEntry, PayrollRun, SalarySlip, SalarySlipEarning,
+    SalarySlipDeduction, EmploymentTypeDeductionConfig, AuditLog,
+)
+
+
+@pytest.fixture(autouse=True)
+def statutory_config():
+    clear_employment_type_config_cache()
+    with patch.object(feature_flags, "NIGERIA_COMPLIANCE_ENABLED", True):
+        yield
+    clear_employment_type_config_cache()
+
+
+def _structures(db):
+    structures = []
+    for name, earnings, deductions in (
+        ("Staff", [("Basic Salary", 250000), ("Housing Allowance", 100000), ("Transport Allowance", 50000)],
+         [("Loan Repayment", 15000), ("PAYE", 1)]),
+        ("Junior", [("Basic", 90000), ("Meal Allowance", 20000)], [("Cooperative", 5000)]),
+        ("Flat", [("Consulting Fee", 400000)], []),
+    ):
+        structure = SalaryStructure(salary_structure_name=name, payroll_frequency="Monthly", currency="NGN")
+        structure.earnings = [
+            SalaryStructureEarning(salary_component=c, abbr=c[:3].upper(), amount=Decimal(a)) for c, a in earnings
+        ]
+        structure.deductions = [
+            SalaryStructureDeduction(salary_component=c, abbr=c[:3].upper(), amount=Decimal(a)) for c, a in deductions
+        ]
+        db.add(structure)
+        structures.append(structure)
+    db.flush()
+    return structures
+
+
+def _seed(db, count, seed=0):
+    rng = random.Random(seed)
+    structures = _structures(db)
+    for i in range(1, count + 1):
+        db.add(Employee(
+            id=i,
+            name=f"Employee {i}",
+            employment_type=rng.choice([None, "Full-time", "Intern", "Contract"]),
+            date_of_joining=rng.choice([None, datetime(2025, 5, 1), datetime(2019, 1, 1)]),
+        ))
+        structure = rng.choice(structures)
+        db.add(SalaryStructureAssignment(
+            employee=f"EMP-{i}", employee_id=i, employee_name=f"Employee {i}",
+            salary_structure=structure.salary_structure_name, salary_structure_id=structure.id,
+            from_date=date(2025, 1, 1), base=Decimal(rng.choice([0, 120000])),
+        ))
+    entry = PayrollEntry(posting_date=PERIOD_END, start_date=PERIOD_START, end_date=PERIOD_END, currency="NGN")
+    db.add(entry)
+    db.commit()
+    return entry
+
+
+def _expected(db, assignment):
+    """Per-employee calculation as done before payroll runs existed."""
+    structure = db.get(SalaryStructure, assignment.salary_structure_id)
+    employee = db.get(Employee, assignment.employee_id)
+    parts = {"basic": Decimal("0"), "housing": Decimal("0"), "transport": Decimal("0"), "other": Decimal("0")}
+    for earning in structure.earnings:
+        name = earning.salary_component.lower()
+        key = next((k for k in ("basic", "housing", "transport") if k in name), "other")
+        parts[key] += earning.amount
+    basic = parts["basic"] or assignment.base
+    months = None
+    if employee.date_of_joining:
+        months = (PERIOD_END - employee.date_of_joining.date()).days // 30
+    statutory = calculate_slip_deductions(
+        basic_salary=basic, housing_allowance=parts["housing"], transport_allowance=parts["transport"],
+        other_allowances=parts["other"], employment_type=employee.employment_type,
+        months_of_service=months, db=db, payroll_date=PERIOD_END,
+    )
+    gross = sum(e.amount for e in structure.earnings)
+    other = [d for d in structure.deductions if "paye" not in d.salary_component.lower()]
+    net = gross - statutory["total_employee_deductions"] - sum(d.amount for d in other)
+    lines = [
+        (name, statutory[key])
+        for key, name in (("paye", "PAYE"), ("pension_employee", "Pension - Employee"),
+                          ("nhf", "NHF"), ("nhis_employee", "NHIS - Employee"))
+        if statutory[key] > 0
+    ] + [(d.salary_component, d.amount) for d in other]
+    return gross, net, lines
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_run_matches_per_employee_calculation(db, seed):
+    entry = _seed(db, 25, seed)
+    service = PayrollRunService(db)
+    run = service.run(service.start(entry.id).id, chunk_size=7)
+
+    assert run.status == PayrollRunStatus.COMPLETED
+    assert (run.total_employees, run.processed_employees, run.created_count) == (25, 25, 25)
+    assert db.get(PayrollEntry, entry.id).salary_slips_created
+    assert db.query(AuditLog).count() == 1
+
+    for assignment in db.query(SalaryStructureAssignment):
+        slip = db.query(SalarySlip).filter_by(employee_id=assignment.employee_id).one()
+        gross, net, lines = _expected(db, assignment)
+        assert (slip.gross_pay, slip.net_pay, slip.payroll_entry) == (gross, net, f"PAYROLL-{entry.id}")
+        deductions = sorted(slip.deductions, key=lambda d: d.idx)
+        assert [(d.salary_component, d.amount) for d in deductions] == lines
+        assert [e.idx for e in sorted(slip.earnings, key=lambda e: e.idx)] == list(range(len(slip.earnings)))
+
+
+def test_skips_existing_slips_and_missing_structures(db):
+    entry = _seed(db, 4)
+    db.add(SalarySlip(employee="EMP-2", employee_id=2, posting_date=PERIOD_END,
+                      start_date=PERIOD_START, end_date=PERIOD_END))
+    db.get(SalaryStructureAssignment, 3).salary_structure_id = 999
+    db.commit()
+
+    service = PayrollRunService(db)
+    run = service.run(service.start(entry.id).id)
+    assert (run.created_count, run.skipped_count) == (2, 2)
+    assert [(s["employee_id"], s["reason"]) for s in run.skipped_details] == [
+        (2, "Salary slip already exists"),
+        (3, "Salary structure not found"),
+    ]
+    with pytest.raises(PayrollRunError):
+        service.start(entry.id)
+
+
+def test_failed_run_resumes_after_last_committed_chunk(db):
+    entry = _seed(db, 30)
+    service = PayrollRunService(db)
+    run_id = service.start(entry.id).id
+    compute = payroll_run_service.compute_slip
+
+    def fail_on_employee_17(slip, **kwargs):
+        if slip.employee_id == 17:
+            raise RuntimeError("tax service unavailable")
+        return compute(slip, **kwargs)
+
+    with patch.object(payroll_run_service, "compute_slip", fail_on_employee_17):
+        run = service.run(run_id, chunk_size=10)
+    assert run.status == PayrollRunStatus.FAILED
+    assert "tax service unavailable" in run.error_message
+    assert (run.processed_employees, run.last_employee_id) == (10, 10)
+    assert db.query(SalarySlip).count() == 10
+    assert not db.get(PayrollEntry, entry.id).salary_slips_created
+
+    run = service.run(service.resume(run_id).id, chunk_size=10)
+    assert run.status == PayrollRunStatus.COMPLETED
+    assert (run.total_employees, run.processed_employees, run.created_count) == (30, 30, 30)
+    assert sorted(s.employee_id for s in db.query(SalarySlip)) == list(range(1, 31))
+    with pytest.raises(PayrollRunError):
+        service.resume(run_id)
+
+
+def test_statements_per_chunk_do_not_grow_with_employees(db, reseed, statements):
+    counts = []
+    for count in (5, 80):
+        entry = reseed(_seed, count)
+        clear_employment_type_config_cache()
+        service = PayrollRunService(db)
+        run_id = service.start(entry.id).id
+        statements.clear()
+        run = service.run(run_id, chunk_size=100)
+        assert run.created_count == count
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+
+
+def test_process_pool_matches_inline(db):
+    entry = _seed(db, 12, seed=4)
+    service = PayrollRunService(db)
+    inline = []
+    service.run(service.start(entry.id).id, workers=0, created_details=inline)
+
+    db.query(SalarySlipEarning).delete()
+    db.query(SalarySlipDeduction).delete()
+    db.query(SalarySlip).delete()
+    db.get(PayrollEntry, entry.id).salary_slips_created = False
+    db.commit()
+
+    pooled = []
+    run = service.run(service.start(entry.id).id, workers=2, created_details=pooled)
+    assert run.status == PayrollRunStatus.COMPLETED
+    strip = lambda rows: [{k: v for k, v in row.items() if k != "id"} for row in rows]  # noqa: E731
+    assert strip(pooled) == strip(inline)
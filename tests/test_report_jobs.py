@@ -0,0 +1,157 @@
+"""Tests for background report jobs: dedupe, progress, compressed storage and export.
+
+Run with: poetry run pytest tests/test_report_jobs.py -v
+"""
+
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.report_job import ReportJob, ReportJobStatus
+from app.services import report_job_service as rjs
+from app.services.report_job_service import (
+    ReportDefinition,
+    ReportJobError,
+    ReportJobService,
+    compute_params_hash,
+)
+from app.utils.datetime_utils import utc_now
+
+DB_MODELS = (ReportJob,)
+
+
+@pytest.fixture
+def vat_report(monkeypatch):
+    """Replace the VAT builder with a deterministic in-memory one."""
+    calls = []
+
+    def _builder(db, params, progress):
+        calls.append(params)
+        progress(50, "halfway")
+        return {
+            "start_period": params["start_period"],
+            "end_period": params["start_period"],
+            "periods": [{
+                "period": params["start_period"],
+                "output_vat": Decimal("750.00"),
+                "input_vat": Decimal("250.00"),
+                "net_vat_payable": Decimal("500.00"),
+                "transaction_count": 3,
+                "is_filed": False,
+            }],
+            "total_output_vat": Decimal("750.00"),
+            "total_input_vat": Decimal("250.00"),
+            "total_net_vat_payable": Decimal("500.00"),
+        }
+
+    monkeypatch.setitem(
+        rjs.REPORT_DEFINITIONS,
+        "vat_summary",
+        ReportDefinition("vat_summary", _builder, "VAT summary"),
+    )
+    return calls
+
+
+def test_params_hash_is_order_and_null_insensitive():
+    a = compute_params_hash("vat_summary", {"start_period": "2025-01", "company": "x"})
+    b = compute_params_hash("vat_summary", {"company": "x", "start_period": "2025-01", "end_period": None})
+    c = compute_params_hash("paye_summary", {"company": "x", "start_period": "2025-01"})
+    assert a == b
+    assert a != c
+
+
+def test_identical_requests_dedupe_onto_same_job(db, vat_report):
+    service = ReportJobService(db)
+    job, created = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"})
+    again, created_again = service.submit("vat_summary", {"company": "x", "start_period": "2025-01"})
+
+    assert created is True
+    assert created_again is False
+    assert again.id == job.id
+
+
+def test_run_stores_compressed_result_and_reuses_it(db, vat_report):
+    service = ReportJobService(db)
+    job, _ = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"})
+    job = service.run(job.id)
+
+    assert job.status == ReportJobStatus.COMPLETED
+    assert job.progress_percent == 100.0
+    assert job.result_compressed_size == len(job.result_data)
+    assert len(zlib.decompress(job.result_data)) == job.result_size
+    assert service.load_result(job)["total_net_vat_payable"] == 500.0
+
+    reused, created = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"})
+    assert created is False
+    assert reused.id == job.id
+    assert len(vat_report) == 1
+
+    forced, created = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"}, force=True)
+    assert created is True
+    assert forced.id != job.id
+
+
+def test_expired_and_failed_jobs_are_not_reused(db, vat_report):
+    service = ReportJobService(db)
+    job, _ = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"})
+    service.run(job.id)
+    job.expires_at = utc_now() - timedelta(minutes=1)
+    db.commit()
+
+    fresh, created = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"})
+    assert created is True
+
+    fresh.fail("boom")
+    db.commit()
+    _, created = service.submit("vat_summary", {"start_period": "2025-01", "company": "x"})
+    assert created is True
+
+
+def test_builder_error_marks_job_failed(db, monkeypatch):
+    def _broken(db, params, progress):
+        raise ReportJobError("no data")
+
+    monkeypatch.setitem(
+        rjs.REPORT_DEFINITIONS, "trial_balance", ReportDefinition("trial_balance", _broken, "TB")
+    )
+    service = ReportJobService(db)
+    job, _ = service.submit("trial_balance", {})
+    job = service.run(job.id)
+
+    assert job.status == ReportJobStatus.FAILED
+    assert job.error_message == "no data"
+
+
+def test_disk_storage_and_csv_render(db, vat_report, tmp_path, monkeypatch):
+    monkeypatch.setattr(rjs.settings, "report_job_storage_dir", str(tmp_path))
+    service = ReportJobService(db)
+    job, _ = service.submit("vat_summary", {"start_period": "2025-02", "company": "x"})
+    job = service.run(job.id)
+
+    assert job.result_data is None
+    assert job.result_path.startswith(str(tmp_path))
+
+    content, media_type, extension = service.render(job, "csv")
+    assert media_type == "text/csv"
+    assert extension == "csv"
+    assert "2025-02" in content
+    assert "500.00" in content
+
+    assert service.purge_expired() == 0
+    job.expires_at = utc_now() - timedelta(minutes=1)
+    db.commit()
+    assert service.purge_expired() == 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_unknown_report_type_rejected(db):
+    with pytest.raises(ReportJobError):
+        ReportJobService(db).submit("not_a_report", {})
+
+
+def test_iter_periods_spans_year_boundary():
+    assert rjs._iter_periods("2024-11", "2025-02") == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    with pytest.raises(ReportJobError):
+        rjs._iter_periods("2025-03", "2025-01")
@@ -0,0 +1,189 @@
+"""Tests for the compiled rule engine shared by routing, SLA and automation.
+
+Run with: poetry run pytest tests/test_rule_compiler.py -v
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.support_automation import AutomationLog, AutomationRule, AutomationTrigger
+from app.models.support_sla import RoutingRule
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.services.automation_executor import AutomationExecutor
+from app.services.routing_engine import RoutingEngine
+from app.services.rule_compiler import (
+    compile_predicate,
+    compile_rule,
+    compile_rule_set,
+    invalidate_rule_sets,
+    load_rule_set,
+)
+
+DB_MODELS = (Ticket, RoutingRule, AutomationRule, AutomationLog)
+
+
+@pytest.mark.parametrize("operator,expected,actual,result", [
+    ("equals", "high", "high", True),
+    ("equals", "high", "low", False),
+    ("not_equals", "high", "low", True),
+    ("contains", "vip", "vip customer", True),
+    ("contains", None, "vip", False),
+    ("not_contains", "vip", None, True),
+    ("starts_with", "INV", "INV-001", True),
+    ("ends_with", ".ng", "a@b.ng", True),
+    ("in_list", ["high", "urgent"], "urgent", True),
+    ("in_list", [1, 2], 2, True),
+    ("in_list", "high", "low", False),
+    ("not_in_list", ["high"], "low", True),
+    ("greater_than", "5", "7", True),
+    ("greater_than", "5", "n/a", False),
+    ("less_than", "oops", 1, False),
+    ("greater_or_equal", 5, 5, True),
+    ("less_or_equal", 5, None, False),
+    ("is_empty", None, "", True),
+    ("is_not_empty", None, "x", True),
+    ("regex_match", r"^\d{3}$", "123", True),
+    ("regex_match", "(", "anything", False),
+    ("unknown", "x", "x", False),
+])
+def test_compiled_predicates(operator, expected, actual, result):
+    assert compile_predicate(operator, expected)(actual) is result
+
+
+def test_empty_conditions_and_context_fields():
+    ticket = SimpleNamespace(priority=TicketPriority.HIGH)
+    assert compile_rule(1, 0, None).matches(ticket)
+    assert compile_rule(1, 0, {}).matches(ticket)
+    assert not compile_rule(1, 0, [], empty_matches=False).matches(ticket)
+
+    rule = compile_rule(1, 0, {"field": "context.idle_hours", "operator": "greater_than", "value": 24})
+    assert rule.matches(ticket, {"idle_hours": 48})
+    assert not rule.matches(ticket, {"idle_hours": 2})
+
+    explained = compile_rule(1, 0, [
+        {"field": "priority", "operator": "equals", "value": "high"},
+        {"field": "ticket_type", "operator": "equals", "value": "network"},
+    ]).explain(ticket)
+    assert not explained["all_matched"]
+    assert [c["field"] for c in explained["matched"]] == ["priority"]
+    assert explained["not_matched"][0]["actual"] is None
+
+
+def _random_conditions(rng):
+    conditions = []
+    if rng.random() < 0.7:
+        if rng.random() < 0.5:
+            conditions.append({"field": "ticket_type", "operator": "equals", "value": rng.choice("abcde")})
+        else:
+            conditions.append({
+                "field": "ticket_type", "operator": "in_list", "value": rng.sample("abcde", 2),
+            })
+    if rng.random() < 0.5:
+        conditions.append({
+            "field": "priority", "operator": rng.choice(["equals", "not_equals"]),
+            "value": rng.choice(["low", "medium", "high", "urgent"]),
+        })
+    if rng.random() < 0.3:
+        conditions.append({"field": "subject", "operator": "contains", "value": rng.choice("xyz")})
+    return conditions
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_indexed_matching_equals_linear_scan(seed):
+    rng = random.Random(seed)
+    rules = [(i + 1, _random_conditions(rng)) for i in range(200)]
+    rule_set = compile_rule_set(rules)
+    linear = [compile_rule(rule_id, pos, conditions) for pos, (rule_id, conditions) in enumerate(rules)]
+    assert rule_set.index_field == "ticket_type"
+
+    for _ in range(300):
+        ticket = SimpleNamespace(
+            ticket_type=rng.choice(["a", "b", "c", "d", "e", "f", None]),
+            priority=rng.choice(list(TicketPriority)),
+            subject=rng.choice(["x", "y", "xyz", ""]),
+        )
+        expected = [rule.rule_id for rule in linear if rule.matches(ticket)]
+        assert [rule.rule_id for rule in rule_set.matches(ticket)] == expected
+        first = rule_set.first_match(ticket)
+        assert (first.rule_id if first else None) == (expected[0] if expected else None)
+
+
+def test_matches_re_reads_ticket_between_steps():
+    rule_set = compile_rule_set([
+        (1, [{"field": "ticket_type", "operator": "equals", "value": "billing"}]),
+        (2, [{"field": "ticket_type", "operator": "equals", "value": "network"}]),
+    ])
+    ticket = SimpleNamespace(ticket_type="billing")
+    seen = []
+    for rule in rule_set.matches(ticket):
+        seen.append(rule.rule_id)
+        ticket.ticket_type = "network"
+    assert seen == [1, 2]
+
+
+# =============================================================================
+# DATABASE-BACKED RULE SETS
+# =============================================================================
+
+
+@pytest.fixture(autouse=True)
+def rule_sets():
+    invalidate_rule_sets()
+    yield
+    invalidate_rule_sets()
+
+
+def test_rule_set_cache_tracks_edits(db):
+    rule = RoutingRule(name="Network", priority=10, conditions=[
+        {"field": "ticket_type", "operator": "equals", "value": "network"},
+    ])
+    db.add_all([rule, RoutingRule(name="Catch-all", priority=100, conditions=None)])
+    db.commit()
+
+    first = load_rule_set(db, RoutingRule)
+    assert load_rule_set(db, RoutingRule) is first
+
+    engine = RoutingEngine(db)
+    assert engine.find_matching_rule(Ticket(ticket_type="network")).name == "Network"
+    assert engine.find_matching_rule(Ticket(ticket_type="billing")).name == "Catch-all"
+
+    rule.is_active = False
+    db.commit()
+    assert load_rule_set(db, RoutingRule) is not first
+    assert engine.find_matching_rule(Ticket(ticket_type="network")).name == "Catch-all"
+
+
+def test_automation_rule_sets_are_scoped_by_trigger_and_survive_executions(db):
+    db.add_all([
+        AutomationRule(
+            name="Escalate urgent", trigger=AutomationTrigger.TICKET_CREATED.value, priority=1,
+            conditions=[{"field": "priority", "operator": "equals", "value": "urgent"}],
+            actions=[{"type": "set_status", "params": {"status": "open"}}],
+        ),
+        AutomationRule(
+            name="Raise network", trigger=AutomationTrigger.TICKET_CREATED.value, priority=2,
+            conditions=[{"field": "ticket_type", "operator": "equals", "value": "network"}],
+            actions=[{"type": "set_priority", "params": {"priority": "urgent"}}],
+        ),
+        AutomationRule(
+            name="Other trigger", trigger=AutomationTrigger.TICKET_UPDATED.value, priority=1,
+            conditions=None, actions=[],
+        ),
+    ])
+    ticket = Ticket(subject="Down", ticket_type="network", priority=TicketPriority.LOW, status=TicketStatus.REPLIED)
+    db.add(ticket)
+    db.commit()
+
+    created_rules = load_rule_set(db, AutomationRule, {"trigger": AutomationTrigger.TICKET_CREATED.value})
+    assert len(created_rules) == 2
+
+    results = AutomationExecutor(db).execute_trigger(AutomationTrigger.TICKET_CREATED, ticket)
+    assert results["rules_evaluated"] == 2
+    assert [e["rule_name"] for e in results["executions"]] == ["Raise network"]
+    assert ticket.priority == TicketPriority.URGENT
+
+    # Execution stats do not invalidate the compiled rules
+    assert load_rule_set(db, AutomationRule, {"trigger": AutomationTrigger.TICKET_CREATED.value}) is created_rules
+    assert db.query(AutomationRule).filter_by(name="Raise network").one().execution_count == 1
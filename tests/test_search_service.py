@@ -0,0 +1,81 @@
+"""Tests for the search index service (SQLite FTS5 backend and ILIKE fallback).
+
+Run with: poetry run pytest tests/test_search_service.py -v
+"""
+
+import pytest
+
+from app.database import engine
+from app.models.pop import Pop
+from app.models.support_kb import KBArticle
+from app.services.search_service import (
+    SearchError,
+    SearchService,
+    _prefix_tsquery,
+    ensure_search_indexes,
+)
+
+DB_MODELS = (Pop, KBArticle)
+
+
+@pytest.fixture(autouse=True)
+def pops(db):
+    ensure_search_indexes(engine)
+    db.add_all([
+        Pop(name="Lekki Phase 1", code="LKP1"),
+        Pop(name="Ikeja GRA", code="IKJ"),
+        Pop(name="Victoria Island Lekki Link", code="VIL"),
+    ])
+    db.commit()
+
+
+def test_fts_substring_match_ranks_prefix_first(db):
+    names = [p.name for p in SearchService(db).search("pops", "lekki")]
+    assert names == ["Lekki Phase 1", "Victoria Island Lekki Link"]
+
+
+def test_fts_index_follows_inserts_updates_and_deletes(db):
+    service = SearchService(db)
+    pop = db.query(Pop).filter(Pop.code == "IKJ").one()
+    pop.name = "Ikoyi Central"
+    db.add(Pop(name="Ajah Lekki", code="AJL"))
+    db.commit()
+
+    assert [p.code for p in service.search("pops", "ikeja")] == []
+    assert [p.code for p in service.search("pops", "ikoyi")] == ["IKJ"]
+    assert len(service.search("pops", "lekki")) == 3
+
+    db.query(Pop).filter(Pop.id == pop.id).delete()
+    db.commit()
+    assert service.search("pops", "ikoyi") == []
+
+
+def test_per_entity_limit_and_short_terms_fall_back_to_like(db):
+    service = SearchService(db)
+    assert len(service.search("pops", "lekki", limit=1)) == 1
+    # Two characters cannot use the trigram index but still match
+    assert {p.code for p in service.search("pops", "ek")} == {"LKP1", "VIL"}
+    # LIKE wildcards in the term are literal
+    assert service.search("pops", "l%i") == []
+
+
+def test_apply_composes_with_filters_for_kb(db):
+    db.add_all([
+        KBArticle(title="Reset your router", slug="reset", content="Hold the button", status="published"),
+        KBArticle(title="Billing FAQ", slug="billing", content="How to reset a password", status="draft"),
+    ])
+    db.commit()
+
+    query, rank = SearchService(db).apply(db.query(KBArticle), "kb_articles", "reset")
+    assert [a.slug for a in query.order_by(rank.desc()).all()] == ["reset", "billing"]
+    assert query.filter(KBArticle.status == "published").count() == 1
+
+
+def test_unknown_entity_rejected(db):
+    with pytest.raises(SearchError):
+        SearchService(db).search("nope", "abc")
+
+
+def test_prefix_tsquery():
+    assert _prefix_tsquery("reset  router!") == "reset:* & router:*"
+    assert _prefix_tsquery("&|!") == ""
@@ -0,0 +1,132 @@
+"""Tests for SLA policy matching and the set-based breach sweep.
+
+Run with: poetry run pytest tests/test_sla_sweep.py -v
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.support_sla import BusinessCalendar, SLABreachLog, SLAPolicy, SLATarget
+from app.models.ticket import Ticket, TicketPriority
+from app.services.rule_compiler import invalidate_rule_sets
+from app.services.sla_engine import SLAEngine
+
+DB_MODELS = (Ticket, BusinessCalendar, SLAPolicy, SLATarget, SLABreachLog)
+
+
+@pytest.fixture(autouse=True)
+def rule_sets():
+    invalidate_rule_sets()
+    yield
+    invalidate_rule_sets()
+
+
+def _policy(db, name, priority, conditions=None, is_default=False, targets=(), is_active=True):
+    policy = SLAPolicy(
+        name=name,
+        priority=priority,
+        conditions=conditions,
+        is_default=is_default,
+        is_active=is_active,
+    )
+    for target_type, hours, ticket_priority in targets:
+        policy.targets.append(SLATarget(
+            target_type=target_type, target_hours=Decimal(hours), priority=ticket_priority,
+        ))
+    db.add(policy)
+    db.commit()
+    return policy
+
+
+def _ticket(db, priority=TicketPriority.MEDIUM, hours_ago=10, response_by=None, resolution_by=None, **fields):
+    now = datetime.utcnow()
+    ticket = Ticket(
+        subject="Test",
+        priority=priority,
+        opening_date=now - timedelta(hours=hours_ago),
+        response_by=response_by,
+        resolution_by=resolution_by,
+        **fields,
+    )
+    db.add(ticket)
+    db.commit()
+    return ticket
+
+
+def test_policy_matching_priority_order_and_default(db):
+    _policy(db, "Default", 100, is_default=True)
+    _policy(db, "Urgent", 10, [{"field": "priority", "operator": "equals", "value": "urgent"}])
+    _policy(db, "Urgent network", 5, [
+        {"field": "priority", "operator": "equals", "value": "urgent"},
+        {"field": "ticket_type", "operator": "equals", "value": "network"},
+    ])
+    _policy(db, "Inactive", 1, [{"field": "priority", "operator": "is_not_empty"}], is_active=False)
+
+    engine = SLAEngine(db)
+    urgent = Ticket(priority=TicketPriority.URGENT, ticket_type="billing")
+    urgent_network = Ticket(priority=TicketPriority.URGENT, ticket_type="network")
+    low = Ticket(priority=TicketPriority.LOW)
+
+    assert engine.get_applicable_policy(urgent).name == "Urgent"
+    assert engine.get_applicable_policy(urgent_network).name == "Urgent network"
+    assert engine.get_applicable_policy(low).name == "Default"
+
+
+def test_sweep_logs_only_unlogged_breaches_in_bulk(db):
+    now = datetime.utcnow()
+    policy = _policy(db, "Default", 100, is_default=True, targets=[
+        ("first_response", "4", None),
+        ("resolution", "8", None),
+        ("resolution", "2", "urgent"),
+    ])
+    both = _ticket(db, response_by=now - timedelta(hours=6), resolution_by=now - timedelta(hours=2))
+    urgent = _ticket(db, priority=TicketPriority.URGENT, resolution_by=now - timedelta(hours=8))
+    responded = _ticket(
+        db, response_by=now - timedelta(hours=6), first_responded_on=now - timedelta(hours=7),
+    )
+    warning = _ticket(db, resolution_by=now + timedelta(minutes=30))
+    already = _ticket(db, resolution_by=now - timedelta(hours=1))
+    db.add(SLABreachLog(
+        ticket_id=already.id, policy_id=policy.id, target_type="resolution",
+        target_hours=Decimal("8"), actual_hours=Decimal("9"), breached_at=now,
+    ))
+    db.commit()
+
+    engine = SLAEngine(db)
+    assert {(t.id, kind.value) for t, kind in engine.find_unlogged_breaches()} == {
+        (both.id, "first_response"),
+        (both.id, "resolution"),
+        (urgent.id, "resolution"),
+    }
+
+    results = engine.process_sla_checks()
+    assert results["warnings_found"] == 1
+    assert results["breaches_found"] == 4
+    assert results["breaches_logged"] == 3
+    assert results["duration_seconds"] >= 0
+
+    logs = {(log.ticket_id, log.target_type): log for log in db.query(SLABreachLog).all()}
+    assert len(logs) == 4
+    assert logs[(urgent.id, "resolution")].target_hours == Decimal("2")
+    assert logs[(both.id, "first_response")].actual_hours == Decimal("10.00")
+    assert (responded.id, "first_response") not in logs
+    assert (warning.id, "resolution") not in logs
+
+    # A second sweep finds nothing new to log
+    assert SLAEngine(db).process_sla_checks()["breaches_logged"] == 0
+    assert db.query(SLABreachLog).count() == 4
+
+
+def test_sweep_skips_tickets_without_policy_target(db):
+    now = datetime.utcnow()
+    _policy(db, "Urgent only", 10, [{"field": "priority", "operator": "equals", "value": "urgent"}],
+            targets=[("resolution", "2", None)])
+    _ticket(db, resolution_by=now - timedelta(hours=1))
+    _ticket(db, priority=TicketPriority.URGENT, response_by=now - timedelta(hours=1))
+
+    results = SLAEngine(db).process_sla_checks()
+    assert results["breaches_found"] == 2
+    assert results["breaches_logged"] == 0
+    assert db.query(SLABreachLog).count() == 0
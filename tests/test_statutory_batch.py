@@ -0,0 +1,113 @@
+"""Tests for the batch statutory deduction calculator.
+
+Run with: poetry run pytest tests/test_statutory_batch.py -v
+"""
+
+import random
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.api.tax.helpers import calculate_all_statutory_deductions, calculate_statutory_deductions_batch
+from app.api.tax.payroll_integration import (
+    BulkSalaryInput,
+    SalaryInput,
+    calculate_bulk_deductions,
+    calculate_employee_deductions,
+    clear_employment_type_config_cache,
+)
+from app.models.hr_settings import EmploymentType, EmploymentTypeDeductionConfig
+
+FLAG_NAMES = ("include_paye", "include_pension", "include_nhf", "include_nhis", "include_nsitf", "include_itf")
+TAX_DATES = [date(2025, 6, 1), date(2026, 3, 1)]
+DB_MODELS = (EmploymentTypeDeductionConfig,)
+
+
+def _amount(rng):
+    # Mix integers, kobo and trailing zeros: results must keep the same exponents
+    return rng.choice([
+        Decimal(rng.randint(0, 900) * 1000),
+        Decimal(rng.randint(0, 90_000_000)) / 100,
+        Decimal(f"{rng.randint(0, 500000)}.00"),
+        Decimal("70000"),
+        Decimal("0"),
+    ])
+
+
+def _items(rng, count):
+    items = []
+    for _ in range(count):
+        basic = rng.choice([_amount(rng), Decimal("52500"), Decimal("1250000.50")])
+        items.append((
+            basic, _amount(rng), _amount(rng), rng.choice([Decimal("0"), _amount(rng)]),
+            *(rng.random() < 0.8 for _ in FLAG_NAMES),
+        ))
+    # Repeat some items so shared results are exercised
+    return items + rng.sample(items, count // 4)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("tax_date", TAX_DATES)
+def test_batch_matches_scalar_calculation(seed, tax_date):
+    rng = random.Random(seed)
+    items = _items(rng, 400)
+
+    results = calculate_statutory_deductions_batch(items, tax_date=tax_date)
+    assert len(results) == len(items)
+    for item, result in zip(items, results):
+        expected = calculate_all_statutory_deductions(*item[:4], **dict(zip(FLAG_NAMES, item[4:])), tax_date=tax_date)
+        # repr compares Decimal exponents too (Decimal("1") == Decimal("1.00"))
+        assert repr(result) == repr(expected)
+
+
+def test_identical_inputs_share_one_result():
+    item = (Decimal("250000"), Decimal("100000"), Decimal("0"), Decimal("0"), True, True, True, True, True, True)
+    scaled = (Decimal("250000.00"), *item[1:])
+    first, second, third = calculate_statutory_deductions_batch([item, item, scaled], tax_date=TAX_DATES[0])
+    assert first is second
+    assert third is not first
+    assert str(third["gross_monthly"]) == "350000.00"
+
+
+@pytest.fixture
+def deduction_configs(db):
+    db.add_all([
+        EmploymentTypeDeductionConfig(
+            company="default", employment_type=EmploymentType.INTERN, display_name="Intern",
+            pension_applicable=False, nhf_applicable=False,
+        ),
+        EmploymentTypeDeductionConfig(
+            company="default", employment_type=EmploymentType.CASUAL, display_name="Casual",
+            pension_min_service_months=3, nsitf_applicable=False, itf_applicable=False,
+        ),
+    ])
+    db.commit()
+    clear_employment_type_config_cache()
+    yield
+    clear_employment_type_config_cache()
+
+
+@pytest.mark.parametrize("period", ["2025-06", "2026-02"])
+def test_bulk_endpoint_matches_single_employee_endpoint(db, deduction_configs, period):
+    rng = random.Random(period)
+    employees = [
+        SalaryInput(
+            employee_id=i,
+            employee_name=f"Employee {i}",
+            employment_type=rng.choice([None, "Intern", "Casual", "PERMANENT", "Freelancer"]),
+            months_of_service=rng.choice([None, 1, 12]),
+            basic_salary=rng.choice([Decimal("45000"), Decimal("180000.50"), Decimal("900000")]),
+            housing_allowance=rng.choice([Decimal("0"), Decimal("60000")]),
+            transport_allowance=rng.choice([Decimal("0"), Decimal("15000.25")]),
+            include_nhis=rng.choice([None, None, False]),
+        )
+        for i in range(60)
+    ]
+    bulk = calculate_bulk_deductions(BulkSalaryInput(employees=employees, payroll_period=period), db=db)
+
+    payroll_date = date(int(period[:4]), int(period[5:]), 1)
+    singles = [calculate_employee_deductions(emp, payroll_date=payroll_date, db=db) for emp in employees]
+    assert [e.model_dump() for e in bulk.employees] == [e.model_dump() for e in singles]
+    assert bulk.total_net_pay == sum(e.totals.net_pay for e in singles)
+    assert bulk.total_itf == sum(e.itf_monthly_provision for e in singles)
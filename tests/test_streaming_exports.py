@@ -0,0 +1,98 @@
+"""Tests for streaming export writers and the Data Explorer streaming export.
+
+Run with: poetry run pytest tests/test_streaming_exports.py -v
+"""
+
+import csv
+import io
+import json
+
+import openpyxl
+import pytest
+
+from app.database import SessionLocal, engine
+from app.models.pop import Pop
+from app.services.export_service import ExportService
+
+
+class TestStreamingWriters:
+    """ExportService streaming writers yield bounded chunks."""
+
+    def test_stream_csv_chunks_and_round_trips(self):
+        rows = ([i, "a,b", None] for i in range(2000))
+        chunks = list(ExportService().stream_csv(["id", "text", "empty"], rows, chunk_size=1024))
+
+        assert len(chunks) > 1
+        assert all(len(c) < 2048 for c in chunks)
+        parsed = list(csv.reader(io.StringIO("".join(chunks))))
+        assert parsed[0] == ["id", "text", "empty"]
+        assert parsed[1] == ["0", "a,b", ""]
+        assert len(parsed) == 2001
+
+    def test_stream_ndjson_one_object_per_line(self):
+        body = "".join(ExportService().stream_ndjson({"i": i, "s": "x\ny"} for i in range(10)))
+        lines = body.splitlines()
+        assert len(lines) == 10
+        assert json.loads(lines[3]) == {"i": 3, "s": "x\ny"}
+
+    def test_stream_json_array_is_valid_json(self):
+        service = ExportService()
+        body = "".join(service.stream_json_array(({"i": i} for i in range(500)), chunk_size=64))
+        assert json.loads(body) == [{"i": i} for i in range(500)]
+        assert json.loads("".join(service.stream_json_array(iter([])))) == []
+
+    def test_stream_xlsx_write_only(self):
+        body = b"".join(ExportService().stream_xlsx(["a", "b"], ([i, i * 2] for i in range(100))))
+        sheet = openpyxl.load_workbook(io.BytesIO(body)).active
+        assert sheet.max_row == 101
+        assert [c.value for c in sheet[2]] == [0, 0]
+
+    def test_stream_parquet_row_groups_share_schema(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = ([i, None if i < 10 else f"r{i}", i / 2] for i in range(25))
+        body = b"".join(ExportService().stream_parquet(
+            ["i", "s", "f"], ["int", "string", "float"], rows, row_group_size=10, chunk_size=256,
+        ))
+        parquet = pq.ParquetFile(io.BytesIO(body))
+        assert parquet.metadata.num_row_groups == 3
+        table = parquet.read()
+        assert table.column("s").to_pylist()[9:11] == [None, "r10"]  # first group is all nulls
+        assert table.column("f").to_pylist()[-1] == 12.0
+
+
+@pytest.fixture
+def pops():
+    Pop.__table__.create(bind=engine, checkfirst=True)
+    db = SessionLocal()
+    db.add_all([Pop(name=f"POP {i}", code=f"P{i}") for i in range(25)])
+    db.commit()
+    db.close()
+
+
+class TestExplorerExport:
+    """Data Explorer export streams every matching row without the old cap."""
+
+    def test_csv_export_streams_all_rows(self, client, pops):
+        resp = client.get("/api/explore/tables/pops/export", params={"format": "csv"})
+        assert resp.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(resp.text)))
+        assert len(rows) == 25
+        assert rows[0]["name"] == "POP 24"  # ordered by id desc
+
+    def test_ndjson_export_with_limit_and_search(self, client, pops):
+        resp = client.get(
+            "/api/explore/tables/pops/export",
+            params={"format": "ndjson", "search": "POP 1", "limit": 3},
+        )
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in resp.text.splitlines()]
+        assert len(records) == 3
+        assert all(r["name"].startswith("POP 1") for r in records)
+
+    def test_invalid_date_column_rejected_before_streaming(self, client, pops):
+        resp = client.get(
+            "/api/explore/tables/pops/export",
+            params={"date_column": "nope", "start_date": "2025-01-01", "end_date": "2025-01-31"},
+        )
+        assert resp.status_code == 400
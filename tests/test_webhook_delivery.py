@@ -0,0 +1,186 @@
+"""Tests for the concurrent webhook delivery worker.
+
+Run with: poetry run pytest tests/test_webhook_delivery.py -v
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.models.notification import NotificationStatus, WebhookConfig, WebhookDelivery
+from app.services import webhook_delivery
+from app.services.notification_service import NotificationService
+from app.services.webhook_delivery import AsyncWebhookSender, WebhookDeliveryWorker
+from app.sync import base as sync_base
+
+DB_MODELS = (WebhookConfig, WebhookDelivery)
+
+
+@pytest.fixture(autouse=True)
+def circuit_breakers():
+    sync_base._circuit_breakers.clear()
+    yield
+    sync_base._circuit_breakers.clear()
+
+
+def _webhook(db, name, url, **fields):
+    webhook = WebhookConfig(name=name, url=url, event_types=[], **fields)
+    db.add(webhook)
+    db.commit()
+    return webhook
+
+
+def _deliveries(db, webhook, count, payload=None):
+    deliveries = [
+        WebhookDelivery(
+            webhook_id=webhook.id,
+            event_type="ticket.created",
+            event_id=f"{webhook.name}-{i}",
+            payload=payload or {"n": i},
+        )
+        for i in range(count)
+    ]
+    db.add_all(deliveries)
+    db.commit()
+    return deliveries
+
+
+def _sender(handler, **kwargs):
+    return AsyncWebhookSender(transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_batch_records_delivered_retry_and_failed(db):
+    ok = _webhook(db, "ok", "https://ok.example/hook", signing_secret="s3cret")
+    flaky = _webhook(db, "flaky", "https://flaky.example/hook", max_retries=3)
+    final = _webhook(db, "final", "https://final.example/hook", max_retries=1)
+    inactive = _webhook(db, "inactive", "https://inactive.example/hook", is_active=False)
+    _deliveries(db, ok, 2, payload={"amount": 1})
+    _deliveries(db, flaky, 1)
+    _deliveries(db, final, 1)
+    _deliveries(db, inactive, 1)
+
+    signatures = []
+
+    def handler(request):
+        if request.url.host == "ok.example":
+            signatures.append(request.headers["X-Webhook-Signature"])
+            return httpx.Response(200, text="ok")
+        return httpx.Response(400, text="bad request")
+
+    result = WebhookDeliveryWorker(db, _sender(handler)).run()
+    assert (result["processed"], result["delivered"], result["retry"], result["failed"]) == (5, 2, 1, 2)
+
+    expected = hmac.new(b"s3cret", json.dumps({"amount": 1}).encode(), hashlib.sha256).hexdigest()
+    assert signatures == [f"sha256={expected}"] * 2
+
+    rows = {(d.webhook.name, d.status) for d in db.query(WebhookDelivery).all()}
+    assert rows == {
+        ("ok", NotificationStatus.DELIVERED),
+        ("flaky", NotificationStatus.PENDING),
+        ("final", NotificationStatus.FAILED),
+        ("inactive", NotificationStatus.FAILED),
+    }
+    retry = db.query(WebhookDelivery).filter_by(webhook_id=flaky.id).one()
+    assert retry.attempt_count == 1
+    assert retry.response_status_code == 400
+    assert retry.next_retry_at > retry.last_attempt_at
+    assert db.query(WebhookDelivery).filter_by(webhook_id=inactive.id).one().attempt_count == 0
+
+    db.refresh(ok)
+    db.refresh(flaky)
+    assert (ok.success_count, ok.failure_count) == (2, 0)
+    assert ok.last_triggered_at is not None
+    assert (flaky.success_count, flaky.failure_count) == (0, 1)
+
+    # Scheduled retries are not due yet
+    assert WebhookDeliveryWorker(db, _sender(handler)).run()["processed"] == 0
+
+
+def test_slow_endpoint_only_uses_its_own_slots(db):
+    slow = _webhook(db, "slow", "https://slow.example/hook")
+    fast = _webhook(db, "fast", "https://fast.example/hook")
+    _deliveries(db, slow, 12)
+    _deliveries(db, fast, 12)
+
+    in_flight = Counter()
+    peak = Counter()
+    finished = []
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await asyncio.sleep(0.05 if host == "slow.example" else 0.001)
+        in_flight[host] -= 1
+        finished.append(host)
+        return httpx.Response(200)
+
+    result = WebhookDeliveryWorker(db, _sender(handler, concurrency=8, per_host_limit=3)).run()
+    assert result["delivered"] == 24
+    assert peak["slow.example"] == 3
+    assert peak["fast.example"] <= 3
+    # The fast endpoint drains while the slow one holds its three slots
+    assert finished[:12] == ["fast.example"] * 12
+
+
+def test_open_circuit_skips_endpoint_without_using_attempts(db):
+    down = _webhook(db, "down", "https://down.example/hook", max_retries=10)
+    up = _webhook(db, "up", "https://up.example/hook")
+    _deliveries(db, down, 8)
+    _deliveries(db, up, 2)
+
+    def handler(request):
+        if request.url.host == "down.example":
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200)
+
+    result = WebhookDeliveryWorker(db, _sender(handler, per_host_limit=1)).run()
+    assert result["delivered"] == 2
+    assert result["retry"] == 5  # fail_max failures open the circuit
+    assert result["skipped"] == 3
+
+    skipped = db.query(WebhookDelivery).filter(
+        WebhookDelivery.webhook_id == down.id, WebhookDelivery.attempt_count == 0
+    ).all()
+    assert len(skipped) == 3
+    assert all(d.status == NotificationStatus.PENDING and d.next_retry_at for d in skipped)
+    assert all("Circuit open" in d.error_message for d in skipped)
+
+
+def test_auth_is_decrypted_once_per_endpoint(db, monkeypatch):
+    calls = []
+
+    class FakeSecrets:
+        def decrypt(self, value):
+            calls.append(value)
+            return "token"
+
+    monkeypatch.setattr(webhook_delivery, "get_secrets", lambda: FakeSecrets())
+    secured = _webhook(db, "secured", "https://secured.example/hook", auth_type="bearer", auth_value_encrypted="enc")
+    _deliveries(db, secured, 5)
+
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(204)
+
+    assert WebhookDeliveryWorker(db, _sender(handler)).run()["delivered"] == 5
+    assert calls == ["enc"]
+    assert seen == ["Bearer token"] * 5
+
+
+def test_single_delivery_uses_blocking_client(db):
+    webhook = _webhook(db, "single", "https://single.example/hook")
+    delivery = _deliveries(db, webhook, 1)[0]
+
+    service = NotificationService(db)
+    service.http_client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    assert service.deliver_webhook(delivery.id)
+    assert db.get(WebhookDelivery, delivery.id).status == NotificationStatus.DELIVERED
+    assert not service.deliver_webhook(999)